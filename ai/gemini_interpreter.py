@@ -8,6 +8,7 @@ import aiohttp
 import json
 from typing import Dict, Optional
 from config.settings import logger
+from utils.http_transport import get_http_transport
 
 
 class GeminiInterpreter:
@@ -37,8 +38,7 @@ class GeminiInterpreter:
     async def get_session(self):
         """Получение HTTP сессии"""
         if not self.session or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            self.session = get_http_transport().client("gemini", timeout=30)
         return self.session
 
     async def interpret_metrics(self, metrics: Dict) -> Optional[str]:
@@ -18,7 +18,9 @@ import logging
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from collections import defaultdict
+
+from analytics.liquidation_aggregator import get_liquidation_aggregator
+from core.alert_suppression import get_alert_suppression
 
 logger = logging.getLogger(__name__)
 
@@ -96,8 +98,8 @@ class EnhancedAlertsSystem:
             "news_check_interval": 300,  # Проверка новостей: 5 минут
         }
 
-        # Хранение времени последних алертов (для throttling)
-        self.last_alert_time = defaultdict(lambda: 0)
+        # Общий индекс антиспама (cooldown по типу + лимит в минуту, переживает рестарт)
+        self.suppression = get_alert_suppression()
 
         # Статистика алертов
         self.alert_stats = {
@@ -224,12 +226,15 @@ class EnhancedAlertsSystem:
                 logger.debug(f"⚠️ {symbol}: Нет данных в market_data")
                 return
 
-            market_data = self.bot.market_data[symbol]
-            imbalance_pct = market_data.get("orderbook_imbalance", 0) * 100
+            state = self.bot.market_data[symbol]
+            imbalance_pct = state.get("orderbook_imbalance", 0) * 100
 
-            # Получаем bid/ask давление (если есть)
-            bid_pct = market_data.get("bid_pressure_pct", 50.0)
-            ask_pct = market_data.get("ask_pressure_pct", 50.0)
+            # Bid/ask давление из объёмов L2 (50/50, если их ещё нет)
+            bid_volume = state.get("bid_volume", 0)
+            ask_volume = state.get("ask_volume", 0)
+            total_volume = bid_volume + ask_volume
+            bid_pct = bid_volume / total_volume * 100 if total_volume else 50.0
+            ask_pct = 100.0 - bid_pct
 
             # Вызываем основной метод проверки
             await self.check_l2_imbalance(
@@ -269,21 +274,8 @@ class EnhancedAlertsSystem:
                 return False
 
             # 2️⃣ Проверка cooldown
-            now = time.time()
-            alert_key = f"l2_{symbol}"
-
-            if alert_key in self.last_alert_time:
-                time_since_last = now - self.last_alert_time[alert_key]
-
-                if time_since_last < self.config["l2_cooldown"]:
-                    # Cooldown ещё активен
-                    self.alert_stats["blocked_by_cooldown"] += 1
-                    remaining = int(self.config["l2_cooldown"] - time_since_last)
-                    logger.debug(
-                        f"L2 {symbol}: {abs_imbalance:.1f}% - cooldown "
-                        f"({remaining}s осталось), пропущен"
-                    )
-                    return False
+            if self._should_throttle("l2_imbalance", self.config["l2_cooldown"], symbol):
+                return False
 
             # 3️⃣ Определить уровень важности
             if abs_imbalance >= self.config["l2_extreme_threshold"]:
@@ -321,15 +313,18 @@ class EnhancedAlertsSystem:
 """
 
             # 6️⃣ Отправить алерт
-            success = await self.send_alert("l2_imbalance", message, priority="high")
+            success = await self.send_alert(
+                "l2_imbalance", message, priority="high", symbol=symbol
+            )
 
             if success:
-                self.last_alert_time[alert_key] = now
                 logger.info(
                     f"✅ L2 Alert отправлен: {symbol} {imbalance:+.1f}% ({level})"
                 )
                 return True
 
+            # Не отправлен — cooldown не занимаем
+            self.suppression.release("l2_imbalance", symbol)
             return False
 
         except Exception as e:
@@ -397,8 +392,7 @@ class EnhancedAlertsSystem:
 
             if critical_news:
                 # Throttling
-                alert_key = "news_critical"
-                if self._should_throttle(alert_key, self.config["news_cooldown"]):
+                if self._should_throttle("news", self.config["news_cooldown"]):
                     return
 
                 # Берём топ-3 критичные новости
@@ -437,52 +431,30 @@ class EnhancedAlertsSystem:
         try:
             logger.debug(f"🔍 Проверка ликвидаций для {symbol}...")
 
-            # Получаем последние сделки из Bybit
-            if not hasattr(self.bot, "bybit_connector"):
-                logger.debug("⚠️ bybit_connector не найден")
-                return
-
-            trades = await self.bot.bybit_connector.get_trades(symbol, limit=100)
-
-            if not trades:
-                logger.debug(f"⚠️ {symbol}: Нет данных о сделках")
-                return
-
-            # Анализируем крупные сделки
             current_time = time.time() * 1000  # ms
-            large_trades = []
-
-            for trade in trades:
-                price = float(trade.get("price", 0))
-                qty = float(trade.get("qty", 0))
-                trade_time = int(trade.get("time", 0))
-                side = trade.get("side", "")
-
-                # Объём сделки в USD
-                trade_usd = price * qty
-
-                # Фильтр: сделки > $100k за последние 60 секунд
-                if (
-                    trade_usd > self.config["liquidation_min_usd"]
-                    and (current_time - trade_time) < 60000
-                ):
-
-                    large_trades.append(
-                        {
-                            "price": price,
-                            "qty": qty,
-                            "usd": trade_usd,
-                            "side": side,
-                            "time": datetime.fromtimestamp(trade_time / 1000).strftime(
-                                "%H:%M:%S"
-                            ),
-                        }
-                    )
+            min_usd = self.config["liquidation_min_usd"]
+
+            # Стримы ликвидаций: события за 60 секунд из памяти агрегатора
+            aggregator = get_liquidation_aggregator()
+            if aggregator.is_live():
+                large_trades = [
+                    {
+                        "price": event["price"],
+                        "qty": event["qty"],
+                        "usd": event["usd"],
+                        "side": "SELL" if event["side"] == "long" else "BUY",
+                        "time": datetime.fromtimestamp(event["timestamp"] / 1000).strftime("%H:%M:%S"),
+                    }
+                    for event in aggregator.recent(symbol, int(current_time) - 60000, min_usd)
+                ]
+            else:
+                large_trades = await self._large_trades_proxy(symbol, current_time, min_usd)
+                if large_trades is None:
+                    return
 
             if large_trades:
                 # Throttling
-                alert_key = f"liq_{symbol}"
-                if self._should_throttle(alert_key, self.config["liq_cooldown"]):
+                if self._should_throttle("liquidation", self.config["liq_cooldown"], symbol):
                     return
 
                 # Сортируем по объёму
@@ -504,7 +476,9 @@ class EnhancedAlertsSystem:
                     f"Всего крупных сделок: {len(large_trades)}"
                 )
 
-                await self.send_alert("liquidations", message, priority="high")
+                await self.send_alert(
+                    "liquidations", message, priority="high", symbol=symbol
+                )
                 logger.info(
                     f"💥 Liquidation Alert: {symbol} (${top_trade['usd']:,.0f})"
                 )
@@ -514,6 +488,43 @@ class EnhancedAlertsSystem:
         except Exception as e:
             logger.error(f"❌ Ошибка check_liquidations: {e}", exc_info=True)
 
+    async def _large_trades_proxy(self, symbol: str, current_time: float, min_usd: float) -> Optional[List[Dict]]:
+        """
+        Крупные сделки за 60 секунд как proxy ликвидаций (REST, без стримов)
+
+        Returns:
+            Список сделок или None, если данных нет
+        """
+        if not hasattr(self.bot, "bybit_connector"):
+            logger.debug("⚠️ bybit_connector не найден")
+            return None
+
+        trades = await self.bot.bybit_connector.get_trades(symbol, limit=100)
+
+        if not trades:
+            logger.debug(f"⚠️ {symbol}: Нет данных о сделках")
+            return None
+
+        large_trades = []
+        for trade in trades:
+            price = float(trade.get("price", 0))
+            qty = float(trade.get("qty", 0))
+            trade_time = int(trade.get("time", 0))
+
+            # Фильтр: сделки > $100k за последние 60 секунд
+            trade_usd = price * qty
+            if trade_usd > min_usd and (current_time - trade_time) < 60000:
+                large_trades.append(
+                    {
+                        "price": price,
+                        "qty": qty,
+                        "usd": trade_usd,
+                        "side": trade.get("side", ""),
+                        "time": datetime.fromtimestamp(trade_time / 1000).strftime("%H:%M:%S"),
+                    }
+                )
+        return large_trades
+
     async def check_volume_spike(self, symbol: str):
         """
         Проверка всплесков объёма торгов
@@ -561,8 +572,7 @@ class EnhancedAlertsSystem:
 
             if spike_ratio > self.config["volume_spike_multiplier"]:
                 # Throttling
-                alert_key = f"vol_{symbol}"
-                if self._should_throttle(alert_key, self.config["vol_cooldown"]):
+                if self._should_throttle("volume_spike", self.config["vol_cooldown"], symbol):
                     return
 
                 emoji = "🔥" if spike_ratio > 5.0 else "📊"
@@ -576,7 +586,9 @@ class EnhancedAlertsSystem:
                     f"Время: {datetime.now().strftime('%H:%M:%S')}"
                 )
 
-                await self.send_alert("volume_spike", message, priority="medium")
+                await self.send_alert(
+                    "volume_spike", message, priority="medium", symbol=symbol
+                )
                 logger.info(f"📊 Volume Spike Alert: {symbol} ({spike_ratio:.2f}x)")
             else:
                 logger.debug(f"✅ {symbol}: Всплеска объёма нет ({spike_ratio:.2f}x)")
@@ -607,8 +619,7 @@ class EnhancedAlertsSystem:
         """
         try:
             # Throttling
-            alert_key = f"mm_{symbol}"
-            if self._should_throttle(alert_key, self.config["mm_cooldown"]):
+            if self._should_throttle("mm_scenario", self.config["mm_cooldown"], symbol):
                 return False
 
             # Важные сценарии
@@ -632,7 +643,9 @@ class EnhancedAlertsSystem:
 ⏰ {datetime.now().strftime('%H:%M:%S')}
 """
 
-            success = await self.send_alert("mm_scenario", message, priority="high")
+            success = await self.send_alert(
+                "mm_scenario", message, priority="high", symbol=symbol
+            )
 
             if success:
                 logger.info(
@@ -663,8 +676,7 @@ class EnhancedAlertsSystem:
         """
         try:
             # Throttling
-            alert_key = f"vp_{symbol}_{level}"
-            if self._should_throttle(alert_key, self.config["vp_cooldown"]):
+            if self._should_throttle("vp_break", self.config["vp_cooldown"], symbol, level):
                 return False
 
             emoji = "🚀" if direction == "UP" else "⚠️"
@@ -681,7 +693,9 @@ class EnhancedAlertsSystem:
 ⏰ {datetime.now().strftime('%H:%M:%S')}
 """
 
-            success = await self.send_alert("vp_break", message, priority="medium")
+            success = await self.send_alert(
+                "vp_break", message, priority="medium", symbol=symbol
+            )
 
             if success:
                 logger.info(f"✅ VP Break Alert: {symbol} {level} {direction}")
@@ -694,15 +708,23 @@ class EnhancedAlertsSystem:
             return False
 
     async def send_alert(
-        self, alert_type: str, message: str, priority: str = "medium"
+        self,
+        alert_type: str,
+        message: str,
+        priority: str = "medium",
+        symbol: Optional[str] = None,
     ) -> bool:
         """
         Отправка алерта в Telegram
 
+        Повторные алерты одного типа по одному символу, ещё не ушедшие
+        из очереди Telegram, объединяются в одно сообщение.
+
         Args:
             alert_type: Тип алерта (l2_imbalance, news, etc.)
             message: Текст сообщения
             priority: Приоритет (low/medium/high)
+            symbol: Символ (для объединения повторов)
 
         Returns:
             bool: True если успешно отправлен
@@ -718,10 +740,13 @@ class EnhancedAlertsSystem:
 
             # Отправляем в Telegram
             if self.telegram_handler:
+                coalesce_key = f"{alert_type}:{symbol}" if symbol else None
                 try:
                     # Проверяем наличие метода send_alert
                     if hasattr(self.telegram_handler, "send_alert"):
-                        await self.telegram_handler.send_alert(message)
+                        await self.telegram_handler.send_alert(
+                            message, priority=priority, coalesce_key=coalesce_key
+                        )
                     # Или send_message
                     elif hasattr(self.telegram_handler, "send_message"):
                         await self.telegram_handler.send_message(message)
@@ -750,27 +775,28 @@ class EnhancedAlertsSystem:
             logger.error(f"❌ Ошибка send_alert: {e}", exc_info=True)
             return False
 
-    def _should_throttle(self, alert_key: str, cooldown: int) -> bool:
+    def _should_throttle(
+        self, alert_type: str, cooldown: int, symbol: Optional[str] = None, bucket=""
+    ) -> bool:
         """
-        Проверка throttling (защита от спама)
+        Проверка throttling (защита от спама) через общий индекс алертов
 
         Args:
-            alert_key: Ключ алерта (l2_BTCUSDT)
+            alert_type: Тип алерта (l2_imbalance, liquidation, ...)
             cooldown: Cooldown в секундах
+            symbol: Торговая пара (None — глобальный алерт)
+            bucket: Дополнительный разрез ключа (уровень VP)
 
         Returns:
             True если нужно пропустить, False если можно отправить
         """
-        current_time = time.time()
-        last_time = self.last_alert_time.get(alert_key, 0)
-
-        if current_time - last_time < cooldown:
-            remaining = cooldown - (current_time - last_time)
-            logger.debug(f"⏸️ Throttle: {alert_key} (осталось {remaining:.0f}s)")
-            return True  # Пропускаем
+        if self.suppression.acquire(alert_type, symbol, bucket, cooldown=cooldown):
+            return False  # Отправляем
 
-        self.last_alert_time[alert_key] = current_time
-        return False  # Отправляем
+        self.alert_stats["blocked_by_cooldown"] += 1
+        remaining = self.suppression.remaining(alert_type, symbol, bucket, cooldown=cooldown)
+        logger.debug(f"⏸️ Throttle: {alert_type} {symbol or ''} (осталось {remaining:.0f}s)")
+        return True  # Пропускаем
 
     def get_stats(self) -> Dict:
         """Получить статистику алертов"""
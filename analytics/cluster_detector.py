@@ -7,12 +7,146 @@ Cluster Detector - Обнаружение кластеров OrderFlow
 - POC Shifts (смещение Point of Control)
 - Absorption (зоны поглощения)
 - Exhaustion (зоны истощения)
+
+L2 дисбалансы и POC хранятся в кольцевых NumPy буферах фиксированного
+размера: стрики BUY/SELL и среднее предыдущих POC обновляются на append,
+запросы stacked imbalances и POC shift — O(1).
 """
 
-from typing import Dict, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+import logging
+import time
 import numpy as np
 from config.settings import logger
+from utils.log_batcher import log_batcher
+
+
+IMBALANCE_THRESHOLD = 0.6  # 60% дисбаланс считается значимым
+
+
+class ImbalanceRing:
+    """
+    Кольцевой буфер L2 дисбалансов (значение + timestamp)
+
+    buy_streak / sell_streak — длина текущей серии дисбалансов
+    сильнее порога в одну сторону, поддерживается на append.
+    """
+
+    def __init__(self, capacity: int = 100, threshold: float = IMBALANCE_THRESHOLD):
+        """
+        Args:
+            capacity: Размер буфера
+            threshold: Порог значимого дисбаланса (|imbalance|)
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.head = 0  # позиция следующей записи
+        self.count = 0
+        self.buy_streak = 0
+        self.sell_streak = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, imbalance: float, timestamp: Optional[float] = None):
+        """
+        Добавить дисбаланс (-1..1) и обновить стрики
+
+        Args:
+            imbalance: (bid - ask) / (bid + ask)
+            timestamp: Время (epoch sec)
+        """
+        self.values[self.head] = imbalance
+        self.timestamps[self.head] = time.time() if timestamp is None else timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+        if imbalance > self.threshold:
+            self.buy_streak += 1
+            self.sell_streak = 0
+        elif imbalance < -self.threshold:
+            self.sell_streak += 1
+            self.buy_streak = 0
+        else:
+            self.buy_streak = self.sell_streak = 0
+
+    def streak(self, direction: str) -> int:
+        """Текущая серия: 'BUY' / 'LONG' или 'SELL' / 'SHORT'"""
+        return self.buy_streak if direction in ("BUY", "LONG") else self.sell_streak
+
+    @property
+    def latest(self) -> Optional[float]:
+        """Последний дисбаланс"""
+        return float(self.values[self.head - 1]) if self.count else None
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """Последние n значений в хронологическом порядке (копия)"""
+        n = self.count if n is None else min(n, self.count)
+        idx = (self.head - n + np.arange(n)) % self.capacity
+        return self.values[idx]
+
+    def clear(self):
+        """Сбросить буфер и стрики"""
+        self.head = self.count = 0
+        self.buy_streak = self.sell_streak = 0
+
+
+class PocRing:
+    """
+    Кольцевой буфер POC с бегущей суммой последних `window` значений
+
+    Смещение считается от среднего `window` предыдущих POC: O(1) на
+    добавление. Новое значение пишется, только если POC изменился, —
+    повторные запросы на том же тике не размывают среднее.
+    """
+
+    def __init__(self, capacity: int = 20, window: int = 5):
+        self.capacity = capacity
+        self.window = window
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.window_sum = 0.0  # сумма последних min(count, window) POC
+        self.shift_pct = 0.0  # смещение последнего POC от среднего предыдущих
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def latest(self) -> Optional[float]:
+        return float(self.values[self.head - 1]) if self.count else None
+
+    def push(self, poc: float) -> float:
+        """
+        Добавить POC, если он изменился
+
+        Returns:
+            Смещение (%) от среднего предыдущих `window` POC (0, пока их меньше)
+        """
+        if self.count and poc == self.values[self.head - 1]:
+            return self.shift_pct
+
+        in_window = min(self.count, self.window)
+        if in_window == self.window:
+            mean = self.window_sum / self.window
+            self.shift_pct = (poc - mean) / mean * 100 if mean else 0.0
+            # Из окна уходит значение window позиций назад
+            self.window_sum -= self.values[(self.head - self.window) % self.capacity]
+        else:
+            self.shift_pct = 0.0
+
+        self.window_sum += poc
+        self.values[self.head] = poc
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return self.shift_pct
+
+    @property
+    def ready(self) -> bool:
+        """Есть среднее по полному окну предыдущих POC"""
+        return self.count > self.window
 
 
 class ClusterDetector:
@@ -26,7 +160,7 @@ class ClusterDetector:
         self.bot = bot
 
         # Параметры для stacked imbalances
-        self.imbalance_threshold = 0.6  # 60% дисбаланс считается значимым
+        self.imbalance_threshold = IMBALANCE_THRESHOLD
         self.min_stack_count = 3  # Минимум 3 последовательных дисбаланса
 
         # Параметры для POC shift
@@ -36,9 +170,8 @@ class ClusterDetector:
         self.absorption_volume_multiplier = 2.0  # 2x от среднего объёма
         self.exhaustion_volume_multiplier = 0.3  # 0.3x от среднего объёма
 
-        # Кэш для хранения исторических данных
-        self.poc_history: Dict[str, List[float]] = {}
-        self.imbalance_history: Dict[str, List[Dict]] = {}
+        # Кольцевые буферы POC по символам
+        self.poc_history: Dict[str, PocRing] = {}
 
         logger.info("✅ ClusterDetector инициализирован")
 
@@ -46,6 +179,8 @@ class ClusterDetector:
         """
         Обнаруживает накопленные дисбалансы (последовательные дисбалансы в одном направлении)
 
+        O(1): длина текущей серии хранится в ImbalanceRing.
+
         Args:
             symbol: Торговая пара (например, 'BTCUSDT')
             direction: Направление ('LONG' или 'SHORT')
@@ -54,43 +189,17 @@ class ClusterDetector:
             int: Количество stacked imbalances (0-5+)
         """
         try:
-            # Получаем последние L2 дисбалансы
-            if not hasattr(self.bot, 'l2_imbalances') or symbol not in self.bot.l2_imbalances:
-                logger.debug(f"⚠️ Нет L2 данных для {symbol}")
-                return 0
-
-            # Берём последние 10 дисбалансов
-            recent_imbalances = self.bot.l2_imbalances[symbol][-10:]
-
-            if len(recent_imbalances) < self.min_stack_count:
+            # Кольцевой буфер L2 дисбалансов (заполняется ботом)
+            ring = getattr(self.bot, 'l2_imbalances', {}).get(symbol)
+            if ring is None:
+                logger.debug("⚠️ Нет L2 данных для %s", symbol)
                 return 0
 
-            # Определяем ожидаемое направление дисбаланса
-            expected_direction = 'BUY' if direction == 'LONG' else 'SELL'
+            # Текущая серия в нужном направлении поддерживается на append
+            streak = ring.streak('BUY' if direction == 'LONG' else 'SELL')
+            stack_count = streak if streak >= self.min_stack_count else 0
 
-            # Считаем последовательные дисбалансы в нужном направлении
-            stack_count = 0
-            current_streak = 0
-
-            for imbalance in reversed(recent_imbalances):
-                imbalance_value = imbalance.get('imbalance', 0)
-
-                # Проверяем силу дисбаланса
-                if expected_direction == 'BUY' and imbalance_value > self.imbalance_threshold:
-                    current_streak += 1
-                elif expected_direction == 'SELL' and imbalance_value < -self.imbalance_threshold:
-                    current_streak += 1
-                else:
-                    # Прерываем стрик
-                    if current_streak >= self.min_stack_count:
-                        stack_count = max(stack_count, current_streak)
-                    current_streak = 0
-
-            # Проверяем последний стрик
-            if current_streak >= self.min_stack_count:
-                stack_count = max(stack_count, current_streak)
-
-            logger.debug(f"📊 {symbol}: Stacked Imbalances = {stack_count} ({direction})")
+            logger.debug("📊 %s: Stacked Imbalances = %d (%s)", symbol, stack_count, direction)
             return min(stack_count, 5)  # Максимум 5
 
         except Exception as e:
@@ -122,34 +231,24 @@ class ClusterDetector:
             if current_poc is None:
                 return {'shifted': False, 'direction': 'none', 'magnitude': 0.0}
 
-            # Инициализируем историю POC если нужно
-            if symbol not in self.poc_history:
-                self.poc_history[symbol] = []
-
-            # Добавляем текущий POC в историю
-            self.poc_history[symbol].append(current_poc)
-
-            # Храним только последние 20 значений
-            if len(self.poc_history[symbol]) > 20:
-                self.poc_history[symbol] = self.poc_history[symbol][-20:]
+            ring = self.poc_history.get(symbol)
+            if ring is None:
+                ring = self.poc_history[symbol] = PocRing()
 
-            # Нужно минимум 5 исторических значений
-            if len(self.poc_history[symbol]) < 5:
+            # Смещение от среднего 5 предыдущих POC (бегущая сумма)
+            changed = ring.latest != float(current_poc)
+            shift_pct = ring.push(float(current_poc))
+            if not ring.ready:
                 return {'shifted': False, 'direction': 'none', 'magnitude': 0.0}
 
-            # Сравниваем текущий POC с средним за последние 5 свечей
-            previous_pocs = self.poc_history[symbol][-6:-1]
-            avg_previous_poc = np.mean(previous_pocs)
-
-            # Рассчитываем смещение в процентах
-            shift_pct = ((current_poc - avg_previous_poc) / avg_previous_poc) * 100
-
             # Определяем значимость смещения
             shifted = abs(shift_pct) >= self.poc_shift_threshold
             direction = 'up' if shift_pct > 0 else 'down' if shift_pct < 0 else 'none'
 
-            if shifted:
-                logger.info(f"🎯 {symbol}: POC Shift {direction.upper()} by {abs(shift_pct):.2f}%")
+            if shifted and changed:
+                log_batcher.log_throttled(
+                    logging.INFO, "🎯 %s: POC Shift %s by %.2f%%", symbol, direction.upper(), abs(shift_pct), key=symbol
+                )
 
             return {
                 'shifted': shifted,
@@ -165,6 +264,9 @@ class ClusterDetector:
         """
         Определяет зоны поглощения (absorption) - высокий объём без движения цены
 
+        По footprint всех сделок (bot.footprint_aggregator), если он есть;
+        иначе — по последним крупным сделкам.
+
         Args:
             symbol: Торговая пара
 
@@ -176,6 +278,18 @@ class ClusterDetector:
             }
         """
         try:
+            footprint = getattr(self.bot, 'footprint_aggregator', None)
+            if footprint is not None and footprint.has(symbol):
+                result = footprint.absorption(symbol)
+                if result['detected']:
+                    log_batcher.log_throttled(
+                        logging.INFO,
+                        "🛡️ %s: Absorption detected at $%.2f (volume: %.2f, %s side)",
+                        symbol, result['level'], result['volume'], result['absorbing_side'],
+                        key=symbol,
+                    )
+                return result
+
             # Получаем данные о крупных сделках
             if not hasattr(self.bot, 'large_trades') or symbol not in self.bot.large_trades:
                 return {'detected': False, 'level': 0.0, 'volume': 0.0}
@@ -210,7 +324,10 @@ class ClusterDetector:
 
             for level, data in price_levels.items():
                 if data['volume'] >= absorption_threshold and data['count'] >= 5:
-                    logger.info(f"🛡️ {symbol}: Absorption detected at ${level:.2f} (volume: {data['volume']:.2f})")
+                    log_batcher.log_throttled(
+                        logging.INFO, "🛡️ %s: Absorption detected at $%.2f (volume: %.2f)",
+                        symbol, level, data['volume'], key=symbol,
+                    )
 
                     return {
                         'detected': True,
@@ -228,6 +345,9 @@ class ClusterDetector:
         """
         Определяет зоны истощения (exhaustion) - низкий объём после сильного движения
 
+        По footprint всех сделок (bot.footprint_aggregator), если он есть;
+        иначе — по последним крупным сделкам.
+
         Args:
             symbol: Торговая пара
 
@@ -239,6 +359,18 @@ class ClusterDetector:
             }
         """
         try:
+            footprint = getattr(self.bot, 'footprint_aggregator', None)
+            if footprint is not None and footprint.has(symbol):
+                result = footprint.exhaustion(symbol)
+                if result['detected']:
+                    log_batcher.log_throttled(
+                        logging.INFO,
+                        "💥 %s: Exhaustion detected at $%.2f (strength: %.2f, %s move)",
+                        symbol, result['level'], result['strength'], result['direction'],
+                        key=symbol,
+                    )
+                return result
+
             # Получаем данные о крупных сделках
             if not hasattr(self.bot, 'large_trades') or symbol not in self.bot.large_trades:
                 return {'detected': False, 'level': 0.0, 'strength': 0.0}
@@ -269,7 +401,10 @@ class ClusterDetector:
                 # Находим текущий уровень цены
                 current_level = new_trades[-1].get('price', 0) if new_trades else 0
 
-                logger.info(f"💥 {symbol}: Exhaustion detected at ${current_level:.2f} (strength: {strength:.2f})")
+                log_batcher.log_throttled(
+                    logging.INFO, "💥 %s: Exhaustion detected at $%.2f (strength: %.2f)",
+                    symbol, current_level, strength, key=symbol,
+                )
 
                 return {
                     'detected': True,
@@ -321,13 +456,33 @@ class ClusterDetector:
             if exhaustion['detected']:
                 score += exhaustion['strength'] * 0.15
 
-            logger.debug(f"📊 {symbol} Cluster Score: {score:.2f}")
+            logger.debug("📊 %s Cluster Score: %.2f", symbol, score)
             return score
 
         except Exception as e:
             logger.error(f"❌ Ошибка get_cluster_score для {symbol}: {e}")
             return 0.0
 
+    async def get_cluster_scores(
+        self, direction: str, symbols: Optional[Iterable[str]] = None
+    ) -> Dict[str, float]:
+        """
+        Score кластерного анализа по всем символам (на каждый тик)
+
+        Stacked imbalances и POC shift читаются из кольцевых буферов за O(1),
+        поэтому проход по всем символам не пересобирает историю.
+
+        Args:
+            direction: Направление ('LONG' или 'SHORT')
+            symbols: Символы (по умолчанию — все с L2 данными)
+
+        Returns:
+            {symbol: score}
+        """
+        if symbols is None:
+            symbols = list(getattr(self.bot, 'l2_imbalances', {}))
+        return {symbol: await self.get_cluster_score(symbol, direction) for symbol in symbols}
+
 
 # Экспорт
-__all__ = ["ClusterDetector"]
+__all__ = ["ClusterDetector", "ImbalanceRing", "PocRing", "IMBALANCE_THRESHOLD"]
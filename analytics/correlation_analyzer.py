@@ -2,29 +2,43 @@
 # -*- coding: utf-8 -*-
 """
 Market Correlation Analyzer
-Calculates correlation between crypto assets
+Calculates correlation between crypto assets from a rolling returns panel
 """
 
 import asyncio
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
-from config.settings import logger
+from analytics.returns_panel import ReturnsPanel
+from config.settings import logger, CORRELATION_CONFIG
+from utils.helpers import current_epoch_ms
 
 
 class CorrelationAnalyzer:
     """
     Market Correlation Analyzer
 
-    Calculates Pearson correlation between assets based on:
-    - Price changes (24h, 7d, 30d)
-    - Volume changes
-    - Market cap changes
+    Pearson / EWMA correlation and beta between assets:
+    - Returns panel per period (24h, 7d, 30d), updated on bar close
+    - Bars from the shared kline store (bybit_connector.klines_cache),
+      REST only for missing bars
+    - Co-moment sums updated per bar, matrix for N symbols in O(N²)
     """
 
     def __init__(self, bot_instance):
         self.bot = bot_instance
-        self.cache_duration = 300  # 5 minutes cache
+        self.cache_duration = CORRELATION_CONFIG["cache_duration"]
+        self.method = CORRELATION_CONFIG.get("method", "pearson")
+        self.min_periods = CORRELATION_CONFIG.get("min_periods", 20)
+        self.benchmark = CORRELATION_CONFIG.get("benchmark", "BTCUSDT")
+        self.display_limit = CORRELATION_CONFIG.get("matrix_display_limit", 8)
+        self.max_concurrent = CORRELATION_CONFIG.get("max_concurrent_requests", 10)
+        self.panels = {
+            period: ReturnsPanel(
+                interval, window, CORRELATION_CONFIG.get("ewma_halflife_bars", 24)
+            )
+            for period, (interval, window) in CORRELATION_CONFIG["periods"].items()
+        }
         self._cache = {}
         self._cache_timestamp = {}
         logger.info("✅ CorrelationAnalyzer инициализирован")
@@ -45,33 +59,51 @@ class CorrelationAnalyzer:
                 "symbols": ["BTC", "ETH"],
                 "period": "24h",
                 "timestamp": datetime,
-                "insights": {...}
+                "insights": {...},
+                "betas": {"ETH": 1.12, ...},
+                "bars": 96
             }
         """
         try:
+            if period not in self.panels:
+                period = "24h"
+
             # Check cache
             cache_key = f"corr_{'-'.join(symbols)}_{period}"
             if self._is_cached(cache_key):
                 return self._cache[cache_key]
 
-            # Получаем данные изменений цен для всех символов
-            price_changes = await self._get_price_changes(symbols, period)
+            panel = self.panels[period]
+            await self._sync_panel(panel, symbols)
 
-            if not price_changes or len(price_changes) < 2:
+            if sum(1 for s in symbols if s in panel) < 2:
                 return self._empty_result(symbols, period)
 
             # Вычисляем корреляционную матрицу
-            matrix = self._calculate_correlation(price_changes)
+            matrix = self._calculate_correlation(panel, symbols)
 
             # Генерируем insights
             insights = self._generate_insights(matrix, symbols)
 
+            betas = {}
+            if self.benchmark in panel:
+                present = [s for s in symbols if s in panel and s != self.benchmark]
+                betas = {
+                    s.replace("USDT", ""): beta
+                    for s, beta in panel.beta(
+                        self.benchmark, present, self.method, self.min_periods
+                    ).items()
+                    if beta is not None
+                }
+
             result = {
-                "matrix": matrix,
+                "matrix": matrix.tolist(),
                 "symbols": [s.replace("USDT", "") for s in symbols],
                 "period": period,
                 "timestamp": datetime.now(),
                 "insights": insights,
+                "betas": betas,
+                "bars": panel.count,
             }
 
             # Кэшируем результат
@@ -84,83 +116,170 @@ class CorrelationAnalyzer:
             logger.error(f"calculate_correlation_matrix error: {e}", exc_info=True)
             return self._empty_result(symbols, period)
 
-    async def _get_price_changes(
-        self, symbols: List[str], period: str
-    ) -> Optional[List[List[float]]]:
+    async def calculate_correlations(
+        self, symbols: List[str], period: str = "24h"
+    ) -> Dict[str, Dict[str, float]]:
         """
-        Get price changes for all symbols
+        Correlations as nested dict {s1: {s2: corr}} (EnhancedOverview)
 
         Returns:
-            List of price change arrays for each symbol
+            {} if there is not enough data
         """
-        try:
-            price_changes = []
-
-            for symbol in symbols:
-                ticker = await self.bot.bybit_connector.get_ticker(symbol)
-                if ticker:
-                    change = float(ticker.get("price24hPcnt", 0)) * 100
-                    price_changes.append([change])
-                else:
-                    price_changes.append([0.0])
+        result = await self.calculate_correlation_matrix(symbols, period)
+        if not result.get("insights"):
+            return {}
+        return {
+            s1: {s2: round(value, 4) for s2, value in zip(symbols, row)}
+            for s1, row in zip(symbols, result["matrix"])
+        }
 
-            return price_changes if len(price_changes) == len(symbols) else None
+    async def refresh(self, symbols: Optional[List[str]] = None, period: str = "24h"):
+        """
+        Подтянуть закрытые бары в панель (задача планировщика)
 
-        except Exception as e:
-            logger.error(f"_get_price_changes error: {e}")
-            return None
+        Args:
+            symbols: Символы (по умолчанию — уже в панели + default_symbols)
+            period: Период панели
+        """
+        panel = self.panels[period]
+        if symbols is None:
+            symbols = list(
+                dict.fromkeys(panel.symbols + CORRELATION_CONFIG["default_symbols"])
+            )
+        await self._sync_panel(panel, symbols)
+
+    async def _sync_panel(self, panel: ReturnsPanel, symbols: List[str]):
+        """
+        Дописать в панель бары, закрывшиеся с прошлой синхронизации
 
-    def _calculate_correlation(self, data: List[List[float]]) -> List[List[float]]:
+        Свечи берутся из общего кэша коннектора; по REST (параллельно)
+        запрашиваются только недостающие.
+        """
+        now = current_epoch_ms()
+        latest_closed = (now // panel.interval_ms - 1) * panel.interval_ms
+
+        stale = [s for s in symbols if panel.last_ts.get(s, -1) < latest_closed]
+        if not stale:
+            return
+
+        history = {}
+        to_fetch = []
+        for symbol in stale:
+            candles = self._cached_candles(panel, symbol, latest_closed)
+            if candles:
+                history[symbol] = candles
+            else:
+                to_fetch.append(symbol)
+
+        if to_fetch:
+            semaphore = asyncio.Semaphore(self.max_concurrent)
+
+            async def fetch(symbol: str):
+                async with semaphore:
+                    return await self._fetch_candles(panel, symbol, latest_closed)
+
+            fetched = await asyncio.gather(
+                *(fetch(s) for s in to_fetch), return_exceptions=True
+            )
+            for symbol, candles in zip(to_fetch, fetched):
+                if isinstance(candles, Exception):
+                    logger.debug(f"⚠️ Свечи {symbol} для корреляций: {candles}")
+                elif candles:
+                    history[symbol] = candles
+
+        # Символы панели без длинного разрыва — только новые бары через
+        # on_bar_close (O(n²) на бар); backfill с пересчётом — новым и после разрыва
+        gap_ms = panel.window * panel.interval_ms
+        backfill = {}
+        events = []
+        for symbol, candles in history.items():
+            last_ts = panel.last_ts.get(symbol)
+            if last_ts is None or latest_closed - last_ts > gap_ms:
+                backfill[symbol] = candles
+                continue
+            events.extend(
+                (int(c["timestamp"]), symbol, float(c["close"]))
+                for c in candles
+                if int(c["timestamp"]) > last_ts
+            )
+
+        if events:
+            events.sort(key=lambda e: e[0])
+            for ts, symbol, close in events:
+                panel.on_bar_close(symbol, ts, close)
+            panel.flush()
+        if backfill:
+            panel.load_history(backfill)
+
+    def _cached_candles(
+        self, panel: ReturnsPanel, symbol: str, latest_closed: int
+    ) -> Optional[List[Dict]]:
+        """Закрытые свечи из klines_cache, если кэш покрывает пропуск"""
+        connector = getattr(self.bot, "bybit_connector", None)
+        cache = getattr(connector, "klines_cache", None) or {}
+
+        last_ts = panel.last_ts.get(symbol)
+        need_from = (
+            last_ts
+            if last_ts is not None
+            else latest_closed - panel.window * panel.interval_ms
+        )
+
+        for key in (f"{symbol}_{panel.interval}", f"{symbol}:{panel.interval}"):
+            entry = cache.get(key)
+            candles = entry.get("candles") if isinstance(entry, dict) else None
+            if not candles:
+                continue
+            closed = [c for c in candles if c["timestamp"] <= latest_closed]
+            if not closed:
+                continue
+            timestamps = [c["timestamp"] for c in closed]
+            if max(timestamps) >= latest_closed and min(timestamps) <= need_from:
+                return closed
+        return None
+
+    async def _fetch_candles(
+        self, panel: ReturnsPanel, symbol: str, latest_closed: int
+    ) -> List[Dict]:
+        """REST: полное окно для нового символа, иначе только пропущенные бары"""
+        last_ts = panel.last_ts.get(symbol)
+        if last_ts is None:
+            missed = panel.window + 1
+        else:
+            missed = (latest_closed - last_ts) // panel.interval_ms + 1
+        # + незакрытый текущий бар; Bybit отдаёт максимум 200
+        limit = int(min(missed, panel.window + 1) + 1)
+        limit = min(max(limit, 2), 200)
+
+        candles = await self.bot.bybit_connector.get_klines(
+            symbol, panel.interval, limit
+        )
+        return [c for c in candles or [] if c["timestamp"] <= latest_closed]
+
+    def _calculate_correlation(
+        self, panel: ReturnsPanel, symbols: List[str]
+    ) -> np.ndarray:
         """
-        Calculate Pearson correlation matrix
+        Correlation matrix from the returns panel
 
         Args:
-            data: List of arrays [[change1], [change2], ...]
+            panel: Returns panel with synced symbols
+            symbols: Requested symbols (missing ones get 0.0)
 
         Returns:
-            Correlation matrix as 2D list
+            N×N matrix, 0.0 where there are not enough common bars
         """
-        try:
-            # Конвертируем в numpy array
-            arr = np.array(data)
-
-            # Если данные одномерные (только одно значение), создаем простую корреляцию
-            if arr.shape[1] == 1:
-                # Для одного измерения просто берем correlation based on знака
-                n = len(data)
-                matrix = [[0.0] * n for _ in range(n)]
-
-                for i in range(n):
-                    for j in range(n):
-                        if i == j:
-                            matrix[i][j] = 1.0
-                        else:
-                            # Простая корреляция на основе знака изменения
-                            val_i = data[i][0]
-                            val_j = data[j][0]
-
-                            if val_i * val_j > 0:  # Одинаковый знак
-                                # Корреляция зависит от схожести величины
-                                ratio = min(abs(val_i), abs(val_j)) / max(
-                                    abs(val_i), abs(val_j)
-                                )
-                                matrix[i][j] = 0.5 + 0.5 * ratio
-                            else:  # Разные знаки
-                                matrix[i][j] = -0.3  # Слабая негативная корреляция
-
-                return matrix
-
-            # Для многомерных данных используем numpy
-            corr_matrix = np.corrcoef(arr)
-            return corr_matrix.tolist()
-
-        except Exception as e:
-            logger.error(f"_calculate_correlation error: {e}")
-            # Возвращаем identity matrix как fallback
-            n = len(data)
-            return [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
-
-    def _generate_insights(self, matrix: List[List[float]], symbols: List[str]) -> Dict:
+        n = len(symbols)
+        matrix = np.eye(n)
+        idx = [i for i, s in enumerate(symbols) if s in panel]
+        if len(idx) >= 2:
+            corr = panel.correlation(
+                [symbols[i] for i in idx], self.method, self.min_periods
+            )
+            matrix[np.ix_(idx, idx)] = np.nan_to_num(corr, nan=0.0)
+        return matrix
+
+    def _generate_insights(self, matrix: np.ndarray, symbols: List[str]) -> Dict:
         """
         Generate insights from correlation matrix
 
@@ -174,47 +293,29 @@ class CorrelationAnalyzer:
             }
         """
         try:
+            matrix = np.asarray(matrix, dtype=np.float64)
             n = len(matrix)
             if n < 2:
                 return {}
 
-            # Найти highest correlation (не диагональ)
-            highest = (None, None, 0)
-            lowest = (None, None, 1)
-            total = 0
-            count = 0
-
-            strong_pairs = []
-            weak_pairs = []
-
-            for i in range(n):
-                for j in range(i + 1, n):
-                    corr = matrix[i][j]
-                    sym_i = symbols[i].replace("USDT", "")
-                    sym_j = symbols[j].replace("USDT", "")
-
-                    total += corr
-                    count += 1
+            names = [s.replace("USDT", "") for s in symbols]
+            rows, cols = np.triu_indices(n, k=1)
+            values = matrix[rows, cols]
 
-                    if corr > highest[2]:
-                        highest = (sym_i, sym_j, corr)
+            def pair(k):
+                return (names[rows[k]], names[cols[k]], float(values[k]))
 
-                    if corr < lowest[2]:
-                        lowest = (sym_i, sym_j, corr)
-
-                    if corr >= 0.8:
-                        strong_pairs.append((sym_i, sym_j))
-                    elif corr <= 0.5:
-                        weak_pairs.append((sym_i, sym_j))
-
-            avg_corr = total / count if count > 0 else 0
+            order = np.argsort(-values, kind="stable")
+            strong = order[values[order] >= 0.8][:3]
+            weak = np.argsort(values, kind="stable")
+            weak = weak[values[weak] <= 0.5][:3]
 
             return {
-                "highest_pair": highest,
-                "lowest_pair": lowest,
-                "average_correlation": round(avg_corr, 2),
-                "strong_correlations": strong_pairs[:3],  # Top 3
-                "weak_correlations": weak_pairs[:3],  # Top 3
+                "highest_pair": pair(order[0]),
+                "lowest_pair": pair(order[-1]),
+                "average_correlation": round(float(values.mean()), 2),
+                "strong_correlations": [pair(k)[:2] for k in strong],  # Top 3
+                "weak_correlations": [pair(k)[:2] for k in weak],  # Top 3
             }
 
         except Exception as e:
@@ -244,6 +345,22 @@ class CorrelationAnalyzer:
             "insights": {},
         }
 
+    @staticmethod
+    def _top_pairs(matrix: List[List[float]], symbols: List[str], limit: int = 5) -> List[str]:
+        """Самые сильные и самые слабые пары (для больших матриц)"""
+        values = np.asarray(matrix, dtype=np.float64)
+        rows, cols = np.triu_indices(len(values), k=1)
+        pairs = values[rows, cols]
+        order = np.argsort(-pairs, kind="stable")
+
+        lines = []
+        for label, picked in (("🔝", order[:limit]), ("🔻", order[::-1][:limit])):
+            for k in picked:
+                lines.append(
+                    f"{label} {symbols[rows[k]]}-{symbols[cols[k]]}: {pairs[k]:.2f}"
+                )
+        return lines
+
     def format_correlation_matrix(self, result: Dict) -> str:
         """
         Format correlation matrix for Telegram display
@@ -261,15 +378,23 @@ class CorrelationAnalyzer:
             lines.append("━━━━━━━━━━━━━━━━━━━━━━")
             lines.append("")
 
-            # Header row
-            header = "     " + "  ".join([f"{s:>4}" for s in symbols])
-            lines.append(header)
-
-            # Matrix rows
-            for i, row in enumerate(matrix):
-                row_str = f"{symbols[i]:>4} "
-                row_str += " ".join([f"{val:>5.2f}" for val in row])
-                lines.append(row_str)
+            if len(symbols) <= self.display_limit:
+                # Header row
+                header = "     " + "  ".join([f"{s:>4}" for s in symbols])
+                lines.append(header)
+
+                # Matrix rows
+                for i, row in enumerate(matrix):
+                    row_str = f"{symbols[i]:>4} "
+                    row_str += " ".join([f"{val:>5.2f}" for val in row])
+                    lines.append(row_str)
+            else:
+                lines.append(f"{len(symbols)} активов — матрица скрыта, топ пар:")
+                lines.extend(self._top_pairs(matrix, symbols))
+
+            if result.get("bars"):
+                lines.append("")
+                lines.append(f"Баров в окне: {result['bars']}")
 
             lines.append("")
             lines.append("━━━━━━━━━━━━━━━━━━━━━━")
@@ -306,6 +431,14 @@ class CorrelationAnalyzer:
                     pairs_str = ", ".join([f"{p[0]}-{p[1]}" for p in strong])
                     lines.append(f"• Strong pairs: {pairs_str}")
 
+            betas = result.get("betas")
+            if betas:
+                lines.append("")
+                lines.append(f"📐 BETA vs {self.benchmark.replace('USDT', '')}:")
+                top = sorted(betas.items(), key=lambda item: -abs(item[1]))
+                for name, beta in top[: self.display_limit]:
+                    lines.append(f"• {name}: {beta:.2f}")
+
             return "\n".join(lines)
 
         except Exception as e:
@@ -3,16 +3,21 @@
 """
 Cross-Exchange Validator для GIO Crypto Bot
 Кросс-проверка данных между Bybit, Binance, OKX, Coinbase
+Ряды (price, volume, depth) бирж выровнены по общей сетке времени,
+rolling min/max, средние и ко-моменты объёмов обновляются при закрытии
+слота — проверка дешёвая и может идти на каждом обновлении стакана.
 """
 
-import asyncio
+import heapq
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict, deque
 from dataclasses import dataclass
 from enum import Enum
-from config.settings import logger
+from config.settings import logger, CROSS_EXCHANGE_CONFIG
+from core.trade_bus import EXCHANGES as BUS_EXCHANGES
+from utils.helpers import current_epoch_ms
 
 
 class ValidationStatus(Enum):
@@ -59,23 +64,304 @@ class ValidationResult:
     timestamp: datetime
 
 
+# Имена бирж TradeBus → имена колонок панели
+_EXCHANGE_NAMES = {"bybit": "Bybit", "binance": "Binance", "okx": "OKX", "coinbase": "Coinbase"}
+
+
+class ExchangePanel:
+    """
+    Ряды бирж одного символа на общей сетке времени
+
+    Кольцо на window + 1 слот: открытый слот и window закрытых. Пустые
+    слоты заполняются последним значением биржи (ряды остаются выровнены);
+    объём сделок (add_volume) копится по слоту, пустой слот — 0.
+    При закрытии слота обновляются:
+    - монотонные очереди rolling max / min цены
+    - суммы объёма и глубины (средние за окно)
+    - ко-моменты log-объёмов всех пар бирж (корреляция за окно)
+    Вытесняемый слот вычитается, поэтому обновление — O(E²) на слот.
+    """
+
+    def __init__(self, grid_ms: int = 1000, window: int = 120, max_exchanges: int = 8):
+        """
+        Args:
+            grid_ms: Шаг сетки (мс)
+            window: Число закрытых слотов в окне
+            max_exchanges: Максимум бирж (колонок)
+        """
+        self.grid_ms = grid_ms
+        self.window = window
+        self.size = window + 1
+        self.max_exchanges = max_exchanges
+
+        self.exchanges: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.price = np.full((max_exchanges, self.size), np.nan)
+        self.volume = np.full((max_exchanges, self.size), np.nan)
+        self.depth = np.full((max_exchanges, self.size), np.nan)
+        self.updated_ms = np.zeros(max_exchanges, dtype=np.int64)
+        self.flow = np.zeros(max_exchanges, dtype=bool)  # объём = сделки слота
+        self.head = -1  # номер открытого слота
+        self._closed = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        """Обнулить rolling статистики (после разрыва длиннее окна)"""
+        e = self.max_exchanges
+        self._max_q = [deque() for _ in range(e)]
+        self._min_q = [deque() for _ in range(e)]
+        self.volume_sum = np.zeros(e)
+        self.volume_n = np.zeros(e)
+        self.depth_sum = np.zeros(e)
+        self.depth_n = np.zeros(e)
+        # Ко-моменты log-объёма по слотам, где есть обе биржи пары
+        self.co_n = np.zeros((e, e))
+        self.co_x = np.zeros((e, e))
+        self.co_xx = np.zeros((e, e))
+        self.co_xy = np.zeros((e, e))
+        self._correlation: Dict[int, Optional[float]] = {}
+
+    def column(self, exchange: str) -> Optional[int]:
+        """Колонка биржи (новая биржа получает свободную колонку)"""
+        col = self.index.get(exchange)
+        if col is None and len(self.exchanges) < self.max_exchanges:
+            col = self.index[exchange] = len(self.exchanges)
+            self.exchanges.append(exchange)
+        return col
+
+    # ==================== ОБНОВЛЕНИЕ ====================
+
+    def update(
+        self,
+        exchange: str,
+        ts_ms: int,
+        price: float,
+        volume: Optional[float] = None,
+        depth: Optional[float] = None,
+    ) -> bool:
+        """
+        Записать значение биржи в слот ts_ms (последнее значение в слоте)
+
+        Returns:
+            False если для биржи нет свободной колонки
+        """
+        col = self.column(exchange)
+        if col is None:
+            return False
+
+        pos = self._slot(ts_ms)
+        self.price[col, pos] = price
+        if volume is not None:
+            self.volume[col, pos] = volume
+        if depth is not None:
+            self.depth[col, pos] = depth
+        self.updated_ms[col] = max(self.updated_ms[col], ts_ms)
+        return True
+
+    def add_volume(self, exchange: str, ts_ms: int, qty: float) -> bool:
+        """
+        Прибавить объём сделок биржи к слоту ts_ms
+
+        Returns:
+            False если для биржи нет свободной колонки
+        """
+        col = self.column(exchange)
+        if col is None:
+            return False
+
+        pos = self._slot(ts_ms)
+        current = self.volume[col, pos]
+        self.volume[col, pos] = qty if current != current else current + qty
+        self.flow[col] = True
+        return True
+
+    def _slot(self, ts_ms: int) -> int:
+        """Позиция открытого слота (слоты до ts_ms закрываются)"""
+        slot = ts_ms // self.grid_ms
+        if self.head < 0:
+            self.head = slot
+        elif slot > self.head:
+            self._advance(slot)
+        return self.head % self.size
+
+    def _advance(self, slot: int):
+        """Закрыть слоты до slot, пропуски заполнить последними значениями"""
+        pos = self.head % self.size
+        carry = (self.price[:, pos].copy(), self.volume[:, pos].copy(), self.depth[:, pos].copy())
+        carry[1][self.flow] = 0.0  # сделок в пустом слоте не было
+
+        if slot - self.head > self.window:
+            # Разрыв длиннее окна: окно целиком из последних значений
+            self.price[:] = np.nan
+            self.volume[:] = np.nan
+            self.depth[:] = np.nan
+            self._reset_stats()
+            first = slot - self.window
+        else:
+            self._close(self.head)
+            first = self.head + 1
+
+        for gap in range(first, slot):
+            self._open(gap, carry)
+            self._close(gap)
+        self._open(slot, carry)
+
+    def _open(self, slot: int, carry: Tuple[np.ndarray, ...]):
+        pos = slot % self.size
+        self.price[:, pos], self.volume[:, pos], self.depth[:, pos] = carry
+        self.head = slot
+
+    def _close(self, slot: int):
+        """Добавить слот в окно, вытеснить слот slot - window"""
+        pos = slot % self.size
+        evicted = (slot + 1) % self.size  # там лежит slot - window
+        self._accumulate(evicted, -1.0)
+        self.price[:, evicted] = np.nan
+        self.volume[:, evicted] = np.nan
+        self.depth[:, evicted] = np.nan
+        self._accumulate(pos, 1.0)
+
+        oldest = slot - self.window
+        for col in range(len(self.exchanges)):
+            price = self.price[col, pos]
+            max_q, min_q = self._max_q[col], self._min_q[col]
+            while max_q and max_q[0][0] <= oldest:
+                max_q.popleft()
+            while min_q and min_q[0][0] <= oldest:
+                min_q.popleft()
+            if price != price:  # NaN — биржа ещё не появилась
+                continue
+            while max_q and max_q[-1][1] <= price:
+                max_q.pop()
+            max_q.append((slot, price))
+            while min_q and min_q[-1][1] >= price:
+                min_q.pop()
+            min_q.append((slot, price))
+
+        # Периодический пересчёт сумм из колец (накопленная ошибка float)
+        self._closed += 1
+        if self._closed % self.size == 0:
+            self._resync()
+
+    def _accumulate(self, pos: int, sign: float):
+        """Прибавить / вычесть слот из сумм и ко-моментов"""
+        volume = self.volume[:, pos]
+        valid = ~np.isnan(volume)
+        if valid.any():
+            self._correlation.clear()
+            self.volume_sum += sign * np.where(valid, volume, 0.0)
+            self.volume_n += sign * valid
+            positive = valid & (np.nan_to_num(volume) > 0)
+            log_volume = np.log(volume, out=np.zeros_like(volume), where=positive)
+            mask = positive.astype(float)
+            self.co_n += sign * np.outer(mask, mask)
+            self.co_x += sign * np.outer(log_volume, mask)
+            self.co_xx += sign * np.outer(log_volume * log_volume, mask)
+            self.co_xy += sign * np.outer(log_volume, log_volume)
+
+        depth = self.depth[:, pos]
+        valid = ~np.isnan(depth)
+        if valid.any():
+            self.depth_sum += sign * np.where(valid, depth, 0.0)
+            self.depth_n += sign * valid
+
+    def _resync(self):
+        """Пересчитать суммы и ко-моменты по кольцу (вызывается из _close: все слоты закрыты)"""
+        queues = (self._max_q, self._min_q)
+        self._reset_stats()
+        self._max_q, self._min_q = queues
+        for pos in range(self.size):
+            self._accumulate(pos, 1.0)
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def latest(self, col: int) -> float:
+        """Последняя цена биржи"""
+        return float(self.price[col, self.head % self.size])
+
+    def fresh(self, now_ms: int, stale_ms: int) -> List[int]:
+        """Колонки бирж, обновлявшихся за последние stale_ms"""
+        prices = self.price[:, self.head % self.size].tolist()
+        updated = self.updated_ms.tolist()
+        return [
+            col for col in range(len(self.exchanges))
+            if now_ms - updated[col] <= stale_ms and prices[col] == prices[col]
+        ]
+
+    def rolling_max(self, col: int) -> float:
+        """Максимум цены за окно (закрытые слоты + открытый)"""
+        price = self.latest(col)
+        q = self._max_q[col]
+        return max(q[0][1], price) if q else price
+
+    def rolling_min(self, col: int) -> float:
+        """Минимум цены за окно"""
+        price = self.latest(col)
+        q = self._min_q[col]
+        return min(q[0][1], price) if q else price
+
+    def volume_ratio(self, col: int) -> float:
+        """Текущий объём / средний за окно (0 если нет данных)"""
+        current = self.volume[col, self.head % self.size]
+        n = self.volume_n[col]
+        if n < 1 or current != current:
+            return 0.0
+        mean = self.volume_sum[col] / n
+        return float(current / mean) if mean > 0 else 0.0
+
+    def depth_ratio(self, col: int) -> Optional[float]:
+        """Текущая глубина / средняя за окно (None если нет данных)"""
+        current = self.depth[col, self.head % self.size]
+        n = self.depth_n[col]
+        if n < 1 or current != current:
+            return None
+        mean = self.depth_sum[col] / n
+        return float(current / mean) if mean > 0 else None
+
+    def volume_correlation(self, min_points: int = 10) -> Optional[float]:
+        """
+        Средняя корреляция log-объёмов пар бирж за окно
+
+        Returns:
+            Средняя по парам с ≥ min_points общих слотов, None если пар нет
+        """
+        if min_points in self._correlation:
+            return self._correlation[min_points]
+        count = len(self.exchanges)
+        if count < 2:
+            return None
+        n = self.co_n[:count, :count]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.co_x[:count, :count] / n
+            var = self.co_xx[:count, :count] / n - mean * mean
+            cov = self.co_xy[:count, :count] / n - mean * mean.T
+            corr = cov / np.sqrt(var * var.T)
+
+        upper = np.triu(np.ones((count, count), dtype=bool), k=1)
+        usable = upper & (n >= min_points) & (var > 1e-12) & (var.T > 1e-12)
+        value = float(np.clip(corr[usable], -1.0, 1.0).mean()) if usable.any() else None
+        self._correlation[min_points] = value  # меняется только при закрытии слота
+        return value
+
+
 class CrossExchangeValidator:
     """
     Кросс-валидация данных между биржами
 
     Features:
     - Price consistency validation
-    - Volume correlation analysis
+    - Volume correlation analysis (rolling, по общей сетке времени)
     - Orderbook depth comparison
     - Trade pattern confirmation
-    - Anomaly detection
+    - Anomaly detection (flash crash, pump/dump, liquidity drain)
     - Arbitrage opportunity detection
     """
 
     def __init__(self,
                  price_deviation_threshold: float = 0.001,  # 0.1%
                  volume_spike_threshold: float = 3.0,       # 3x average
-                 min_exchanges_required: int = 2):
+                 min_exchanges_required: int = 2,
+                 config: Optional[Dict] = None):
         """
         Инициализация Cross-Exchange Validator
 
@@ -83,25 +369,19 @@ class CrossExchangeValidator:
             price_deviation_threshold: Максимальное отклонение цены (%)
             volume_spike_threshold: Множитель для определения volume spike
             min_exchanges_required: Минимум бирж для валидации
+            config: Параметры сетки и детекторов (по умолчанию CROSS_EXCHANGE_CONFIG)
         """
         self.price_deviation_threshold = price_deviation_threshold
         self.volume_spike_threshold = volume_spike_threshold
         self.min_exchanges_required = min_exchanges_required
+        self.config = {**CROSS_EXCHANGE_CONFIG, **(config or {})}
+        self.stale_ms = int(self.config["stale_seconds"] * 1000)
 
-        # Price history для каждой биржи
-        self.price_history: Dict[str, Dict[str, deque]] = defaultdict(
-            lambda: defaultdict(lambda: deque(maxlen=100))
-        )
+        # Ряды бирж по символам (общая сетка времени)
+        self.panels: Dict[str, ExchangePanel] = {}
 
-        # Volume history
-        self.volume_history: Dict[str, Dict[str, deque]] = defaultdict(
-            lambda: defaultdict(lambda: deque(maxlen=100))
-        )
-
-        # Orderbook data
-        self.orderbook_data: Dict[str, Dict[str, Dict]] = defaultdict(
-            lambda: defaultdict(dict)
-        )
+        # Аномалии, активные на последнем обновлении (логируются по фронту)
+        self._active: Dict[str, Set[AnomalyType]] = {}
 
         # Trade flow tracking
         self.trade_flow: Dict[str, Dict[str, deque]] = defaultdict(
@@ -113,6 +393,132 @@ class CrossExchangeValidator:
 
         logger.info("✅ CrossExchangeValidator инициализирован")
 
+    def panel(self, symbol: str) -> ExchangePanel:
+        """Ряды бирж символа"""
+        panel = self.panels.get(symbol)
+        if panel is None:
+            panel = self.panels[symbol] = ExchangePanel(
+                self.config["grid_ms"], self.config["window_slots"]
+            )
+        return panel
+
+    # ==================== ОБНОВЛЕНИЯ ====================
+
+    def on_book(self,
+                symbol: str,
+                exchange: str,
+                bid: float,
+                ask: float,
+                depth: Optional[float] = None,
+                volume: Optional[float] = None,
+                ts_ms: Optional[int] = None) -> List[AnomalyType]:
+        """
+        Обновление стакана биржи: mid в ряд символа + проверка
+
+        Args:
+            symbol: Торговая пара (BTCUSDT)
+            exchange: Биржа
+            bid, ask: Лучшие цены
+            depth: Суммарный объём bid + ask (для liquidity drain)
+            volume: Объём слота, если известен (сделки приходят через on_trades)
+            ts_ms: Время обновления (по умолчанию сейчас)
+
+        Returns:
+            Аномалии, появившиеся на этом обновлении
+        """
+        if bid <= 0 or ask <= 0:
+            return []
+        ts_ms = current_epoch_ms() if ts_ms is None else ts_ms
+        self.panel(symbol).update(exchange, ts_ms, (bid + ask) / 2, volume, depth)
+        return self.check(symbol, ts_ms)
+
+    def on_orderbook(self,
+                     symbol: str,
+                     exchange: str,
+                     bids,
+                     asks,
+                     ts_ms: Optional[int] = None) -> List[AnomalyType]:
+        """
+        Обновление по уровням стакана: лучшие цены + глубина top-N уровней
+
+        Args:
+            bids, asks: Уровни стакана (см. book_top)
+
+        Returns:
+            Аномалии, появившиеся на этом обновлении
+        """
+        top = book_top(bids, asks, self.config["depth_levels"])
+        if top is None:
+            return []
+        bid, ask, depth = top
+        return self.on_book(symbol, exchange, bid, ask, depth=depth, ts_ms=ts_ms)
+
+    def on_trades(self, batch):
+        """
+        Подписчик TradeBus: объём сделок бирж в открытый слот символа
+
+        Сумма qty по (биржа, символ) через np.bincount; штамп — локальные
+        часы, как у on_book. Символы без стакана пропускаются.
+
+        Args:
+            batch: core.trade_bus.TradeBatch
+        """
+        if not len(batch):
+            return
+        now = current_epoch_ms()
+        size = len(batch.symbols)
+        sums = np.bincount(batch.exchange.astype(np.int64) * size + batch.symbol, weights=batch.qty)
+        for key in np.flatnonzero(sums).tolist():
+            exchange = _EXCHANGE_NAMES[BUS_EXCHANGES[key // size]]
+            symbol = batch.symbols[key % size]
+            panel = self.panels.get(usdt_pair(symbol) if exchange == "Coinbase" else symbol)
+            if panel is not None:
+                panel.add_volume(exchange, now, float(sums[key]))
+
+    def check(self, symbol: str, now_ms: Optional[int] = None) -> List[AnomalyType]:
+        """
+        Проверка символа по текущим рядам (O(бирж²), без логов на каждый вызов)
+
+        Returns:
+            Аномалии, которых не было на предыдущей проверке
+        """
+        now_ms = current_epoch_ms() if now_ms is None else now_ms
+        panel, cols = self._fresh_columns(symbol, now_ms)
+        result = self.evaluate(symbol, now_ms, cols=cols)
+        found = set(result.anomalies)
+        for detector, anomaly in (
+            (self._flash_crash, AnomalyType.FLASH_CRASH),
+            (self._pump_dump, AnomalyType.PUMP_DUMP),
+            (self._liquidity_drain, AnomalyType.LIQUIDITY_DRAIN),
+        ):
+            details = detector(panel, cols)
+            if details:
+                found.add(anomaly)
+                if anomaly not in self._active.get(symbol, ()):
+                    self._record(symbol, anomaly, details)
+
+        new = [a for a in found if a not in self._active.get(symbol, ())]
+        self._active[symbol] = found
+        for anomaly in new:
+            if anomaly in (AnomalyType.PRICE_DEVIATION, AnomalyType.ARBITRAGE_OPPORTUNITY):
+                logger.warning(
+                    f"⚠️ {symbol} {anomaly.value}: deviation {result.price_deviation:.2%}"
+                )
+        return new
+
+    def _record(self, symbol: str, anomaly: AnomalyType, details: Dict) -> Dict:
+        entry = {
+            'type': anomaly,
+            'symbol': symbol,
+            'details': details,
+            'timestamp': datetime.utcnow()
+        }
+        self.detected_anomalies.append(entry)
+        logger.warning(f"🚨 {symbol} {anomaly.value}: {', '.join(details.get('exchanges', []))}")
+        return entry
+
+    # ==================== ВАЛИДАЦИЯ ====================
+
     async def validate_price(self,
                             symbol: str,
                             prices: Dict[str, PriceData]) -> ValidationResult:
@@ -127,94 +533,32 @@ class CrossExchangeValidator:
             ValidationResult
         """
         try:
-            if len(prices) < self.min_exchanges_required:
-                return ValidationResult(
-                    status=ValidationStatus.INSUFFICIENT_DATA,
-                    confidence=0.0,
-                    exchanges_count=len(prices),
-                    price_deviation=0.0,
-                    volume_correlation=0.0,
-                    anomalies=[],
-                    details={'reason': 'Not enough exchanges'},
-                    timestamp=datetime.utcnow()
-                )
-
-            # 1. Извлечение цен
-            exchange_prices = {ex: data.price for ex, data in prices.items()}
-            price_values = list(exchange_prices.values())
-
-            # 2. Статистика цен
-            mean_price = np.mean(price_values)
-            std_price = np.std(price_values)
-            max_price = max(price_values)
-            min_price = min(price_values)
-
-            # 3. Отклонение цены
-            price_deviation = (max_price - min_price) / mean_price if mean_price > 0 else 0
-
-            # 4. Обновление истории
+            panel = self.panel(symbol)
+            now_ms = 0
             for exchange, data in prices.items():
-                self.price_history[symbol][exchange].append({
-                    'price': data.price,
-                    'timestamp': data.timestamp
-                })
+                ts_ms = _epoch_ms(data.timestamp)
+                now_ms = max(now_ms, ts_ms)
+                panel.update(exchange, ts_ms, data.price, data.volume_24h)
 
-            # 5. Проверка аномалий
-            anomalies = []
+            result = self.evaluate(symbol, now_ms, exchanges=list(prices))
 
             # Большое отклонение цены
-            if price_deviation > self.price_deviation_threshold:
-                anomalies.append(AnomalyType.PRICE_DEVIATION)
+            if AnomalyType.PRICE_DEVIATION in result.anomalies:
                 logger.warning(
                     f"⚠️ Price deviation detected for {symbol}: "
-                    f"{price_deviation:.2%} (threshold: {self.price_deviation_threshold:.2%})"
+                    f"{result.price_deviation:.2%} (threshold: {self.price_deviation_threshold:.2%})"
                 )
 
             # Arbitrage opportunity
-            if price_deviation > 0.002:  # 0.2%
-                anomalies.append(AnomalyType.ARBITRAGE_OPPORTUNITY)
+            if AnomalyType.ARBITRAGE_OPPORTUNITY in result.anomalies:
+                exchange_prices = result.details['prices']
                 cheapest_ex = min(exchange_prices, key=exchange_prices.get)
                 expensive_ex = max(exchange_prices, key=exchange_prices.get)
                 logger.info(
                     f"💰 Arbitrage opportunity: {symbol} "
-                    f"{cheapest_ex}→{expensive_ex} spread: {price_deviation:.2%}"
+                    f"{cheapest_ex}→{expensive_ex} spread: {result.price_deviation:.2%}"
                 )
 
-            # 6. Volume correlation
-            volume_correlation = await self._calculate_volume_correlation(symbol, prices)
-
-            # 7. Определение статуса
-            if price_deviation > self.price_deviation_threshold * 2:
-                status = ValidationStatus.INVALID
-                confidence = 30.0
-            elif price_deviation > self.price_deviation_threshold:
-                status = ValidationStatus.WARNING
-                confidence = 60.0
-            else:
-                status = ValidationStatus.VALID
-                confidence = 95.0
-
-            # 8. Boost confidence если volume correlation высокая
-            if volume_correlation > 0.7:
-                confidence = min(100.0, confidence + 10.0)
-
-            result = ValidationResult(
-                status=status,
-                confidence=confidence,
-                exchanges_count=len(prices),
-                price_deviation=price_deviation,
-                volume_correlation=volume_correlation,
-                anomalies=anomalies,
-                details={
-                    'mean_price': mean_price,
-                    'std_price': std_price,
-                    'max_price': max_price,
-                    'min_price': min_price,
-                    'prices': exchange_prices
-                },
-                timestamp=datetime.utcnow()
-            )
-
             return result
 
         except Exception as e:
@@ -230,34 +574,94 @@ class CrossExchangeValidator:
                 timestamp=datetime.utcnow()
             )
 
-    async def _calculate_volume_correlation(self,
-                                           symbol: str,
-                                           prices: Dict[str, PriceData]) -> float:
-        """Расчёт корреляции объёмов между биржами"""
-        try:
-            volumes = []
-            for exchange, data in prices.items():
-                if data.volume_24h:
-                    volumes.append(data.volume_24h)
-                    self.volume_history[symbol][exchange].append(data.volume_24h)
-
-            if len(volumes) < 2:
-                return 0.0
+    def evaluate(self,
+                 symbol: str,
+                 now_ms: Optional[int] = None,
+                 exchanges: Optional[List[str]] = None,
+                 cols: Optional[List[int]] = None) -> ValidationResult:
+        """
+        Результат валидации по последним ценам рядов
 
-            # Нормализация объёмов
-            volumes_array = np.array(volumes)
-            if volumes_array.std() == 0:
-                return 1.0
+        Args:
+            symbol: Торговая пара
+            now_ms: Текущее время (для отсева устаревших бирж)
+            exchanges: Только эти биржи (по умолчанию — все свежие)
+            cols: Уже отобранные колонки панели
+        """
+        panel = self.panels.get(symbol)
+        now_ms = current_epoch_ms() if now_ms is None else now_ms
+        if panel is None:
+            cols = []
+        elif exchanges is not None:
+            cols = [panel.index[ex] for ex in exchanges if ex in panel.index]
+        elif cols is None:
+            cols = panel.fresh(now_ms, self.stale_ms)
+
+        if len(cols) < self.min_exchanges_required:
+            return ValidationResult(
+                status=ValidationStatus.INSUFFICIENT_DATA,
+                confidence=0.0,
+                exchanges_count=len(cols),
+                price_deviation=0.0,
+                volume_correlation=0.0,
+                anomalies=[],
+                details={'reason': 'Not enough exchanges'},
+                timestamp=datetime.utcnow()
+            )
 
-            # Простая корреляция через стандартное отклонение
-            normalized = (volumes_array - volumes_array.mean()) / volumes_array.std()
-            correlation = 1.0 - (normalized.std() / 2.0)  # Упрощенная метрика
+        # 1. Статистика цен
+        exchange_prices = {panel.exchanges[col]: panel.latest(col) for col in cols}
+        price_values = list(exchange_prices.values())
+        mean_price = sum(price_values) / len(price_values)
+        max_price = max(price_values)
+        min_price = min(price_values)
+        std_price = max(0.0, sum(p * p for p in price_values) / len(price_values) - mean_price**2) ** 0.5
 
-            return max(0.0, min(1.0, correlation))
+        # 2. Отклонение цены
+        price_deviation = (max_price - min_price) / mean_price if mean_price > 0 else 0
 
-        except Exception as e:
-            logger.error(f"❌ Error calculating volume correlation: {e}")
-            return 0.0
+        # 3. Проверка аномалий
+        anomalies = []
+        if price_deviation > self.price_deviation_threshold:
+            anomalies.append(AnomalyType.PRICE_DEVIATION)
+        if price_deviation > 0.002:  # 0.2%
+            anomalies.append(AnomalyType.ARBITRAGE_OPPORTUNITY)
+
+        # 4. Volume correlation (rolling по окну)
+        correlation = panel.volume_correlation(self.config["min_correlation_points"])
+        volume_correlation = max(0.0, correlation) if correlation is not None else 0.0
+
+        # 5. Определение статуса
+        if price_deviation > self.price_deviation_threshold * 2:
+            status = ValidationStatus.INVALID
+            confidence = 30.0
+        elif price_deviation > self.price_deviation_threshold:
+            status = ValidationStatus.WARNING
+            confidence = 60.0
+        else:
+            status = ValidationStatus.VALID
+            confidence = 95.0
+
+        # 6. Boost confidence если volume correlation высокая
+        if volume_correlation > 0.7:
+            confidence = min(100.0, confidence + 10.0)
+
+        return ValidationResult(
+            status=status,
+            confidence=confidence,
+            exchanges_count=len(cols),
+            price_deviation=price_deviation,
+            volume_correlation=volume_correlation,
+            anomalies=anomalies,
+            details={
+                'mean_price': mean_price,
+                'std_price': std_price,
+                'max_price': max_price,
+                'min_price': min_price,
+                'prices': exchange_prices
+            },
+            timestamp=datetime.utcnow()
+        )
 
     async def validate_whale_trade(self,
                                   symbol: str,
@@ -311,39 +715,15 @@ class CrossExchangeValidator:
         anomalies = []
 
         try:
-            # 1. Flash crash detection
-            flash_crash = await self._detect_flash_crash(symbol)
-            if flash_crash:
-                anomalies.append({
-                    'type': AnomalyType.FLASH_CRASH,
-                    'symbol': symbol,
-                    'details': flash_crash,
-                    'timestamp': datetime.utcnow()
-                })
-
-            # 2. Pump/Dump detection
-            pump_dump = await self._detect_pump_dump(symbol)
-            if pump_dump:
-                anomalies.append({
-                    'type': AnomalyType.PUMP_DUMP,
-                    'symbol': symbol,
-                    'details': pump_dump,
-                    'timestamp': datetime.utcnow()
-                })
-
-            # 3. Liquidity drain detection
-            liquidity_drain = await self._detect_liquidity_drain(symbol)
-            if liquidity_drain:
-                anomalies.append({
-                    'type': AnomalyType.LIQUIDITY_DRAIN,
-                    'symbol': symbol,
-                    'details': liquidity_drain,
-                    'timestamp': datetime.utcnow()
-                })
-
-            # Store anomalies
-            for anomaly in anomalies:
-                self.detected_anomalies.append(anomaly)
+            panel, cols = self._fresh_columns(symbol, current_epoch_ms())
+            for detector, anomaly in (
+                (self._flash_crash, AnomalyType.FLASH_CRASH),
+                (self._pump_dump, AnomalyType.PUMP_DUMP),
+                (self._liquidity_drain, AnomalyType.LIQUIDITY_DRAIN),
+            ):
+                details = detector(panel, cols)
+                if details:
+                    anomalies.append(self._record(symbol, anomaly, details))
 
             return anomalies
 
@@ -351,100 +731,86 @@ class CrossExchangeValidator:
             logger.error(f"❌ Error detecting anomalies: {e}")
             return []
 
-    async def _detect_flash_crash(self, symbol: str) -> Optional[Dict]:
-        """Обнаружение flash crash"""
-        try:
-            # Проверка резкого падения цены на 2+ биржах
-            recent_prices = {}
-            for exchange, prices in self.price_history[symbol].items():
-                if len(prices) >= 2:
-                    recent_prices[exchange] = list(prices)[-2:]
-
-            if len(recent_prices) < 2:
-                return None
-
-            # Расчёт изменения цены
-            price_changes = {}
-            for exchange, prices in recent_prices.items():
-                if len(prices) == 2:
-                    change = (prices[1]['price'] - prices[0]['price']) / prices[0]['price']
-                    price_changes[exchange] = change
-
-            # Flash crash если 2+ биржи показывают падение >3%
-            crashes = [ex for ex, change in price_changes.items() if change < -0.03]
-
-            if len(crashes) >= 2:
+    def _fresh_columns(self, symbol: str, now_ms: int) -> Tuple[Optional[ExchangePanel], List[int]]:
+        """Панель символа и колонки бирж со свежими данными"""
+        panel = self.panels.get(symbol)
+        if panel is None:
+            return None, []
+        return panel, panel.fresh(now_ms, self.stale_ms)
+
+    def _flash_crash(self, panel: ExchangePanel, cols: List[int]) -> Optional[Dict]:
+        """Flash crash: просадка от rolling max окна на 2+ биржах"""
+        threshold = -self.config["flash_crash_pct"] / 100
+
+        price_changes = {}
+        for col in cols:
+            peak = panel.rolling_max(col)
+            if peak > 0:
+                price_changes[panel.exchanges[col]] = panel.latest(col) / peak - 1
+
+        crashes = [ex for ex, change in price_changes.items() if change < threshold]
+        if len(crashes) >= 2:
+            return {
+                'exchanges': crashes,
+                'price_changes': price_changes,
+                'severity': 'high'
+            }
+        return None
+
+    def _pump_dump(self, panel: ExchangePanel, cols: List[int]) -> Optional[Dict]:
+        """Pump/dump: всплеск объёма + движение от rolling min/max на 2+ биржах"""
+
+        volume_spikes = {}
+        price_changes = {}
+        for col in cols:
+            ratio = panel.volume_ratio(col)
+            if ratio > self.volume_spike_threshold:
+                exchange = panel.exchanges[col]
+                price = panel.latest(col)
+                up = price / panel.rolling_min(col) - 1
+                down = price / panel.rolling_max(col) - 1
+                volume_spikes[exchange] = ratio
+                price_changes[exchange] = up if up >= -down else down
+
+        if len(volume_spikes) >= 2:
+            avg_price_change = float(np.mean(list(price_changes.values())))
+            if abs(avg_price_change) > self.config["pump_dump_pct"] / 100:
                 return {
-                    'exchanges': crashes,
+                    'exchanges': list(volume_spikes),
+                    'volume_spikes': volume_spikes,
                     'price_changes': price_changes,
-                    'severity': 'high'
+                    'direction': 'pump' if avg_price_change > 0 else 'dump'
                 }
+        return None
 
-            return None
+    def _liquidity_drain(self, panel: ExchangePanel, cols: List[int]) -> Optional[Dict]:
+        """Liquidity drain: глубина стакана ниже средней за окно на 2+ биржах"""
 
-        except Exception as e:
-            logger.error(f"❌ Error detecting flash crash: {e}")
-            return None
+        depth_ratios = {}
+        for col in cols:
+            ratio = panel.depth_ratio(col)
+            if ratio is not None and ratio < self.config["liquidity_drain_ratio"]:
+                depth_ratios[panel.exchanges[col]] = ratio
 
-    async def _detect_pump_dump(self, symbol: str) -> Optional[Dict]:
-        """Обнаружение pump/dump"""
-        try:
-            # Проверка резкого роста/падения объёма + цены
-            volume_spikes = {}
-            price_changes = {}
-
-            for exchange in self.volume_history[symbol].keys():
-                volumes = list(self.volume_history[symbol][exchange])
-                prices = list(self.price_history[symbol][exchange])
-
-                if len(volumes) >= 5 and len(prices) >= 2:
-                    avg_volume = np.mean([v for v in volumes[:-1]])
-                    current_volume = volumes[-1]
-
-                    if avg_volume > 0:
-                        volume_ratio = current_volume / avg_volume
-                        if volume_ratio > self.volume_spike_threshold:
-                            volume_spikes[exchange] = volume_ratio
-
-                            # Проверка изменения цены
-                            price_change = (prices[-1]['price'] - prices[-2]['price']) / prices[-2]['price']
-                            price_changes[exchange] = price_change
-
-            # Pump/Dump если 2+ биржи показывают volume spike + price change >5%
-            if len(volume_spikes) >= 2:
-                avg_price_change = np.mean(list(price_changes.values()))
-                if abs(avg_price_change) > 0.05:
-                    return {
-                        'exchanges': list(volume_spikes.keys()),
-                        'volume_spikes': volume_spikes,
-                        'price_changes': price_changes,
-                        'direction': 'pump' if avg_price_change > 0 else 'dump'
-                    }
+        if len(depth_ratios) >= 2:
+            return {
+                'exchanges': list(depth_ratios),
+                'depth_ratios': depth_ratios,
+                'severity': 'high' if min(depth_ratios.values()) < 0.25 else 'medium'
+            }
+        return None
 
-            return None
+    async def _detect_flash_crash(self, symbol: str) -> Optional[Dict]:
+        """Обнаружение flash crash"""
+        return self._flash_crash(*self._fresh_columns(symbol, current_epoch_ms()))
 
-        except Exception as e:
-            logger.error(f"❌ Error detecting pump/dump: {e}")
-            return None
+    async def _detect_pump_dump(self, symbol: str) -> Optional[Dict]:
+        """Обнаружение pump/dump"""
+        return self._pump_dump(*self._fresh_columns(symbol, current_epoch_ms()))
 
     async def _detect_liquidity_drain(self, symbol: str) -> Optional[Dict]:
         """Обнаружение ухода ликвидности"""
-        try:
-            # Проверка резкого уменьшения bid/ask объёмов
-            liquidity_drops = {}
-
-            for exchange, data in self.orderbook_data[symbol].items():
-                if 'bid_volume' in data and 'ask_volume' in data:
-                    total_liquidity = data['bid_volume'] + data['ask_volume']
-                    # TODO: Сравнить с исторической ликвидностью
-                    # Для простоты - пропускаем пока
-                    pass
-
-            return None
-
-        except Exception as e:
-            logger.error(f"❌ Error detecting liquidity drain: {e}")
-            return None
+        return self._liquidity_drain(*self._fresh_columns(symbol, current_epoch_ms()))
 
     def get_best_price(self, symbol: str, side: str = 'buy') -> Optional[Tuple[str, float]]:
         """
@@ -458,12 +824,15 @@ class CrossExchangeValidator:
             (exchange, price) или None
         """
         try:
-            prices = {}
-            for exchange, history in self.price_history[symbol].items():
-                if history:
-                    latest = history[-1]
-                    prices[exchange] = latest['price']
+            panel = self.panels.get(symbol)
+            if panel is None or panel.head < 0:
+                return None
 
+            prices = {
+                exchange: panel.latest(col)
+                for exchange, col in panel.index.items()
+                if not np.isnan(panel.latest(col))
+            }
             if not prices:
                 return None
 
@@ -481,5 +850,50 @@ class CrossExchangeValidator:
             return None
 
 
+def _epoch_ms(timestamp: datetime) -> int:
+    """datetime (naive = UTC, как datetime.utcnow()) → epoch ms"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+
+def book_top(bids, asks, levels: int) -> Optional[Tuple[float, float, float]]:
+    """
+    Лучшие цены и глубина top-N уровней стакана
+
+    Args:
+        bids, asks: Уровни (price, qty, ...) в порядке стакана
+            или dict {price: qty} (Coinbase)
+        levels: Число уровней с каждой стороны
+
+    Returns:
+        (bid, ask, суммарный объём bid + ask) или None для пустого стакана
+    """
+    if isinstance(bids, dict):
+        bids = heapq.nlargest(levels, bids.items())
+        asks = heapq.nsmallest(levels, asks.items())
+    else:
+        bids, asks = bids[:levels], asks[:levels]
+    if not bids or not asks:
+        return None
+    depth = sum(level[1] for level in bids) + sum(level[1] for level in asks)
+    return bids[0][0], asks[0][0], depth
+
+
+def usdt_pair(symbol: str) -> str:
+    """BTC-USD / BTCUSD → BTCUSDT (USD пары Coinbase сравниваются с USDT)"""
+    symbol = symbol.replace("-", "")
+    return f"{symbol}T" if symbol.endswith("USD") else symbol
+
+
 # Экспорт
-__all__ = ["CrossExchangeValidator", "ValidationStatus", "AnomalyType", "ValidationResult"]
+__all__ = [
+    "CrossExchangeValidator",
+    "ExchangePanel",
+    "PriceData",
+    "ValidationStatus",
+    "AnomalyType",
+    "ValidationResult",
+    "book_top",
+    "usdt_pair",
+]
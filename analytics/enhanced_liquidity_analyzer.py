@@ -3,20 +3,18 @@
 """
 Enhanced Liquidity Depth Analyzer
 Расширенный анализ глубины ликвидности с детальными метриками
+Крупнейшие стены стакана публикуются в общую книгу уровней символа;
+зоны поддержки/сопротивления — сильнейшие уровни книги со стенами
+стакана (с учётом совпадений с volume profile, pivot'ами, ликвидациями)
 """
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import numpy as np
 from dataclasses import dataclass
 
-
-@dataclass
-class LiquidityLevel:
-    """Уровень ликвидности"""
-    price: float
-    volume: float
-    volume_usd: float
-    is_bid: bool
+from analytics.level_engine import LevelBook, LevelSource, get_level_engine, source_names
+from analytics.liquidity_engine import DepthSide, LiquidityBook, LiquidityEngine
+from config.settings import LIQUIDITY_ENGINE_CONFIG
 
 
 @dataclass
@@ -57,6 +55,11 @@ class LiquidityAnalysis:
     avg_ask_6h: Optional[float] = None
     avg_imbalance_6h: Optional[float] = None
 
+    # Глубина от mid: {bps: (bid USD, ask USD)}
+    depth_bps: Optional[Dict[float, Tuple[float, float]]] = None
+    # Биржи, из стаканов которых построен анализ
+    sources: Tuple[str, ...] = ()
+
 
 class EnhancedLiquidityAnalyzer:
     """Расширенный анализатор ликвидности"""
@@ -67,61 +70,68 @@ class EnhancedLiquidityAnalyzer:
         self.logger = logger
         self.bot = bot
 
+        # Книги по живым WebSocket стаканам (общий движок бота)
+        self.engine = getattr(bot, "liquidity_engine", None) or LiquidityEngine(bot)
+        # Общие книги уровней S/R
+        self.level_engine = getattr(bot, "level_engine", None) or get_level_engine()
+
         # История ликвидности для трендов
         self.liquidity_history = {}  # {symbol: [(timestamp, bid, ask, imbalance)]}
 
         self.logger.info("✅ EnhancedLiquidityAnalyzer инициализирован")
 
-    async def analyze(self, symbol: str) -> LiquidityAnalysis:
+    async def analyze(self, symbol: str, consolidated: bool = False) -> LiquidityAnalysis:
         """
         Полный анализ ликвидности
 
         Args:
             symbol: Торговая пара (BTCUSDT)
+            consolidated: Сводный стакан Bybit + Binance + OKX + Coinbase
 
         Returns:
             LiquidityAnalysis с детальными метриками
         """
         try:
-            # 1. Получаем orderbook
-            orderbook = await self._get_orderbook(symbol)
-            if not orderbook:
+            # 1. Живой стакан (или REST fallback)
+            book = await self.engine.get_book(symbol, consolidated=consolidated)
+            if not book:
                 raise ValueError("Не удалось получить orderbook")
+            bids, asks = book.bids, book.asks
 
-            # 2. Получаем текущую цену
-            current_price = await self._get_current_price(symbol)
+            # 2. Текущая цена — mid живого стакана
+            current_price = book.mid
 
-            # 3. Обрабатываем orderbook
-            bids, asks = self._process_orderbook(orderbook)
-
-            # 4. Базовые метрики
-            total_bid = sum(level.volume_usd for level in bids)
-            total_ask = sum(level.volume_usd for level in asks)
+            # 3. Базовые метрики
+            total_bid = bids.total_usd
+            total_ask = asks.total_usd
             imbalance = total_bid - total_ask
             imbalance_ratio = total_bid / total_ask if total_ask > 0 else 0
 
-            # 5. Spread
-            best_bid = bids[0].price if bids else current_price
-            best_ask = asks[0].price if asks else current_price
-            spread = best_ask - best_bid
+            # 4. Spread
+            best_bid = book.best_bid
+            best_ask = book.best_ask
+            spread = book.spread
             spread_pct = (spread / current_price) * 100 if current_price > 0 else 0
 
-            # 6. Key levels
-            resistance_zones = self._find_resistance_zones(asks, current_price)
-            support_zones = self._find_support_zones(bids, current_price)
-            poc_price = self._find_poc(bids, asks, current_price)
+            # 5. Key levels: стены стакана → книга уровней символа
+            levels = self.level_engine.book(symbol)
+            self._publish_walls(levels, bids)
+            self._publish_walls(levels, asks)
+            resistance_zones = self._find_resistance_zones(asks, current_price, levels)
+            support_zones = self._find_support_zones(bids, current_price, levels)
+            poc_price = self._find_poc(book, current_price)
 
-            # 7. Slippage
-            slippage_buy = self._calculate_slippage(asks, is_buy=True)
-            slippage_sell = self._calculate_slippage(bids, is_buy=False)
+            # 6. Slippage
+            slippage_buy = self._calculate_slippage(asks)
+            slippage_sell = self._calculate_slippage(bids)
 
-            # 8. Risk assessment
+            # 7. Risk assessment
             liquidity_score = self._calculate_liquidity_score(
                 total_bid, total_ask, spread_pct
             )
             market_depth_status = self._assess_market_depth(liquidity_score)
 
-            # 9. Trading signals
+            # 8. Trading signals
             long_signal = self._generate_long_signal(
                 current_price, support_zones, imbalance_ratio, liquidity_score
             )
@@ -129,10 +139,10 @@ class EnhancedLiquidityAnalyzer:
                 current_price, resistance_zones, imbalance_ratio, liquidity_score
             )
 
-            # 10. Исторический анализ
+            # 9. Исторический анализ
             historical = self._get_historical_metrics(symbol)
 
-            # 11. Сохраняем в историю
+            # 10. Сохраняем в историю
             self._save_to_history(symbol, total_bid, total_ask, imbalance)
 
             return LiquidityAnalysis(
@@ -155,6 +165,8 @@ class EnhancedLiquidityAnalyzer:
                 market_depth_status=market_depth_status,
                 long_signal=long_signal,
                 short_signal=short_signal,
+                depth_bps=book.depth_bps(LIQUIDITY_ENGINE_CONFIG["depth_bps"]),
+                sources=book.sources,
                 **historical
             )
 
@@ -162,173 +174,75 @@ class EnhancedLiquidityAnalyzer:
             self.logger.error(f"Error analyzing liquidity for {symbol}: {e}", exc_info=True)
             raise
 
-    async def _get_orderbook(self, symbol: str) -> Dict:
-        """Получить orderbook"""
-        if hasattr(self.bot, 'bybit_connector'):
-            return await self.bot.bybit_connector.get_orderbook(symbol, limit=50)
-        return {}
-
-    async def _get_current_price(self, symbol: str) -> float:
-        """Получить текущую цену"""
-        try:
-            if hasattr(self.bot, 'bybit_connector'):
-                ticker = await self.bot.bybit_connector.get_ticker(symbol)
-                # Правильное поле для Bybit V5 API:
-                if 'result' in ticker and 'list' in ticker['result']:
-                    return float(ticker['result']['list'][0]['lastPrice'])
-                # Или попробуйте другой формат:
-                elif 'lastPrice' in ticker:
-                    return float(ticker['lastPrice'])
-            return 0.0
-        except Exception as e:
-            self.logger.error(f"Error getting current price: {e}")
-            # Fallback: используем best_bid/best_ask среднее
-            return 0.0
-
-
-    def _process_orderbook(self, orderbook: Dict) -> Tuple[List[LiquidityLevel], List[LiquidityLevel]]:
-        """Обработать orderbook"""
-        bids = []
-        asks = []
-
-        # Bids (покупки)
-        for price_str, volume_str in orderbook.get('bids', []):
-            price = float(price_str)
-            volume = float(volume_str)
-            bids.append(LiquidityLevel(
-                price=price,
-                volume=volume,
-                volume_usd=price * volume,
-                is_bid=True
-            ))
-
-        # Asks (продажи)
-        for price_str, volume_str in orderbook.get('asks', []):
-            price = float(price_str)
-            volume = float(volume_str)
-            asks.append(LiquidityLevel(
-                price=price,
-                volume=volume,
-                volume_usd=price * volume,
-                is_bid=False
-            ))
-
-        return bids, asks
-
-    def _find_resistance_zones(self, asks: List[LiquidityLevel], current_price: float) -> List[Dict]:
-        """Найти зоны сопротивления"""
+    def _publish_walls(self, levels: LevelBook, side: DepthSide, count: int = 5):
+        """Крупнейшие уровни стороны → книга уровней (сила 1–3 относительно крупнейшего)"""
+        largest = side.largest(count)
+        if not len(largest):
+            return
+        top = float(side.notional[largest[0]])
+        for idx in largest.tolist():
+            weight = 3.0 * float(side.notional[idx]) / top if top > 0 else 1.0
+            levels.add(float(side.prices[idx]), LevelSource.ORDERBOOK, max(1.0, weight))
+
+    def _find_zones(
+        self,
+        side: DepthSide,
+        current_price: float,
+        labels: Tuple[str, ...],
+        levels: Optional[LevelBook] = None,
+    ) -> List[Dict]:
+        """Зоны вокруг сильнейших уровней стороны (по 0.5% от цены)"""
         zones = []
-
-        # Группируем уровни по зонам (по 0.5% от цены)
         zone_width = current_price * 0.005
 
-        # Сортируем по объёму
-        sorted_asks = sorted(asks, key=lambda x: x.volume_usd, reverse=True)
-
-        # Берём топ-3 уровня
-        for i, level in enumerate(sorted_asks[:3]):
-            zone_low = level.price - zone_width / 2
-            zone_high = level.price + zone_width / 2
-
-            # Суммируем объём в зоне
-            zone_volume = sum(
-                ask.volume_usd for ask in asks
-                if zone_low <= ask.price <= zone_high
+        if levels is None:
+            anchors = [(float(side.prices[idx]), None) for idx in side.largest(len(labels)).tolist()]
+        else:
+            strongest = levels.strongest(
+                current_price, "below" if side.is_bid else "above", len(labels), sources=LevelSource.ORDERBOOK
             )
+            # Центр зоны — крупнейшая стена внутри слитого уровня (если она ещё в стакане)
+            anchors = [
+                (side.peak(level.low, level.high) or level.price, source_names(level.sources))
+                for level in strongest
+            ]
 
-            strength = "Heavy" if i == 0 else "Medium" if i == 1 else "Light"
+        for label, (price, sources) in zip(labels, anchors):
+            zone_low = price - zone_width / 2
+            zone_high = price + zone_width / 2
 
-            zones.append({
+            zone = {
                 'price_low': zone_low,
                 'price_high': zone_high,
-                'volume_usd': zone_volume,
-                'strength': strength
-            })
+                'volume_usd': side.range_usd(zone_low, zone_high),
+                'strength': label
+            }
+            if sources is not None:
+                zone['sources'] = sources
+            zones.append(zone)
 
         return zones
 
-    def _find_support_zones(self, bids: List[LiquidityLevel], current_price: float) -> List[Dict]:
-        """Найти зоны поддержки"""
-        zones = []
-
-        # Группируем уровни по зонам
-        zone_width = current_price * 0.005
+    def _find_resistance_zones(
+        self, asks: DepthSide, current_price: float, levels: Optional[LevelBook] = None
+    ) -> List[Dict]:
+        """Найти зоны сопротивления (топ-3 уровня asks / книги уровней)"""
+        return self._find_zones(asks, current_price, ("Heavy", "Medium", "Light"), levels)
 
-        # Сортируем по объёму
-        sorted_bids = sorted(bids, key=lambda x: x.volume_usd, reverse=True)
-
-        # Берём топ-3 уровня
-        for i, level in enumerate(sorted_bids[:3]):
-            zone_low = level.price - zone_width / 2
-            zone_high = level.price + zone_width / 2
-
-            # Суммируем объём в зоне
-            zone_volume = sum(
-                bid.volume_usd for bid in bids
-                if zone_low <= bid.price <= zone_high
-            )
-
-            strength = "Strong" if i == 0 else "Medium" if i == 1 else "Weak"
-
-            zones.append({
-                'price_low': zone_low,
-                'price_high': zone_high,
-                'volume_usd': zone_volume,
-                'strength': strength
-            })
-
-        return zones
+    def _find_support_zones(
+        self, bids: DepthSide, current_price: float, levels: Optional[LevelBook] = None
+    ) -> List[Dict]:
+        """Найти зоны поддержки (топ-3 уровня bids / книги уровней)"""
+        return self._find_zones(bids, current_price, ("Strong", "Medium", "Weak"), levels)
 
-    def _find_poc(self, bids: List[LiquidityLevel], asks: List[LiquidityLevel], current_price: float) -> float:
+    def _find_poc(self, book: LiquidityBook, current_price: float) -> float:
         """Найти Point of Control (цена с максимальным объёмом)"""
-        all_levels = bids + asks
-        if not all_levels:
-            return current_price
-
-        # Находим уровень с максимальным объёмом
-        poc_level = max(all_levels, key=lambda x: x.volume_usd)
-        return poc_level.price
-
-    def _calculate_slippage(self, levels: List[LiquidityLevel], is_buy: bool) -> Dict[float, float]:
-        """Рассчитать проскальзывание для разных размеров ордеров"""
-        slippage = {}
-        order_sizes = [10000, 100000, 500000, 1000000]  # USD
-
-        for order_size in order_sizes:
-            remaining = order_size
-            total_volume = 0
-            weighted_price_sum = 0
-
-            for level in levels:
-                if remaining <= 0:
-                    break
-
-                # Сколько можем купить/продать на этом уровне
-                available_usd = level.volume_usd
-                to_fill = min(remaining, available_usd)
-
-                # Взвешенная цена
-                weighted_price_sum += level.price * to_fill
-                total_volume += to_fill
-                remaining -= to_fill
-
-            if remaining > 0:
-                # Недостаточно ликвидности
-                slippage[order_size] = None
-            else:
-                # Средняя цена исполнения
-                avg_price = weighted_price_sum / total_volume if total_volume > 0 else 0
-                start_price = levels[0].price if levels else 0
-
-                if start_price > 0:
-                    # Проскальзывание в %
-                    slippage_pct = abs((avg_price - start_price) / start_price) * 100
-                    slippage[order_size] = slippage_pct
-                else:
-                    slippage[order_size] = 0.0
-
-        return slippage
+        poc = book.poc()
+        return poc if poc is not None else current_price
 
+    def _calculate_slippage(self, side: DepthSide) -> Dict[float, Optional[float]]:
+        """Рассчитать проскальзывание (%) для разных размеров ордеров (USD)"""
+        return side.slippage(LIQUIDITY_ENGINE_CONFIG["slippage_sizes"])
 
     def _calculate_liquidity_score(self, total_bid: float, total_ask: float, spread_pct: float) -> float:
         """Рассчитать оценку ликвидности (0-10)"""
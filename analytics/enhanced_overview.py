@@ -211,14 +211,12 @@ class EnhancedOverview:
     async def _get_correlation_matrix(self) -> Dict:
         """Получить матрицу корреляций"""
         try:
-            # Используем существующий CorrelationAnalyzer
-            if hasattr(self.bot, "correlation_handler") and hasattr(
-                self.bot.correlation_handler, "correlation_analyzer"
-            ):
-                correlations = await self.bot.correlation_handler.correlation_analyzer.calculate_correlations(
-                    self.symbols[:4]
-                )
-                return correlations
+            # Используем существующий CorrelationAnalyzer (панель доходностей)
+            analyzer = getattr(self.bot, "correlation_analyzer", None)
+            if analyzer is not None:
+                correlations = await analyzer.calculate_correlations(self.symbols[:4])
+                if correlations:
+                    return correlations
 
             # Fallback: простая корреляция
             return await self._calculate_simple_correlations()
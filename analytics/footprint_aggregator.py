@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Footprint Aggregator - потоковый footprint по всем сделкам
+Каждая сделка TradeBus попадает в бин фиксированного тика символа и
+временной срез скользящего окна: панель symbols × slices × bins
+(buy / sell объём). Absorption (крупный объём без смещения цены) и
+exhaustion (затухание объёма после движения) — векторные проходы по
+бинам, сразу по одному или всем символам.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config.settings import logger, FOOTPRINT_CONFIG
+from utils.helpers import current_epoch_ms
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+def nice_tick(price: float, bin_pct: float) -> float:
+    """Ширина бина ≈ bin_pct % цены, округлённая вверх до 1 / 2 / 5 × 10^k"""
+    raw = price * bin_pct / 100
+    scale = 10.0 ** math.floor(math.log10(raw))
+    for step in (1, 2, 5):
+        if raw <= step * scale:
+            return step * scale
+    return 10 * scale
+
+
+class FootprintAggregator:
+    """
+    Footprint всех символов в одной панели
+
+    Features:
+    - Тик символа выбирается один раз по первой цене, бин — floor(price / tick)
+    - Окно из slices срезов: устаревший срез обнуляется при смене среза
+    - Диапазон bins бинов сдвигается за ценой, если она ушла за край
+    - Подписчик TradeBus: батч сделок раскладывается через np.add.at
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: Параметры (по умолчанию FOOTPRINT_CONFIG)
+        """
+        cfg = {**FOOTPRINT_CONFIG, **(config or {})}
+        self.slice_ms = cfg["slice_seconds"] * 1000
+        self.slices = max(2, cfg["window_seconds"] // cfg["slice_seconds"])
+        self.bins = cfg["bins"]
+        self.bin_pct = cfg["bin_pct"]
+        self.absorption_multiplier = cfg["absorption_multiplier"]
+        self.absorption_max_move_pct = cfg["absorption_max_move_pct"]
+        self.exhaustion_multiplier = cfg["exhaustion_multiplier"]
+        self.exhaustion_min_move_pct = cfg["exhaustion_min_move_pct"]
+
+        self.symbols: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # id символа TradeBus → строка панели (-1 — ещё не сопоставлен)
+        self._bus_rows = np.full(0, -1, dtype=np.int64)
+
+        self.capacity = 0
+        self._allocate(16)
+
+        self.epoch: Optional[int] = None  # номер текущего среза (ts // slice_ms)
+
+        self.stats = {"trades": 0, "batches": 0, "rejected": 0, "recenters": 0, "rotations": 0}
+        get_metrics_registry().register_collector(
+            "footprint", stats_collector("footprint", lambda: self.stats)
+        )
+        logger.info(
+            f"✅ FootprintAggregator инициализирован "
+            f"({self.slices}×{self.slice_ms // 1000}s, {self.bins} бинов по {self.bin_pct}%)"
+        )
+
+    # ==================== ПАНЕЛЬ ====================
+
+    def _allocate(self, capacity: int):
+        """Расширить панель до capacity символов (данные сохраняются)"""
+
+        def grow(name, shape, fill=0.0, dtype=np.float64):
+            new = np.full((capacity,) + shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[: len(old)] = old
+            setattr(self, name, new)
+
+        grow("buy", (self.slices, self.bins))
+        grow("sell", (self.slices, self.bins))
+        grow("total_buy", (self.bins,))
+        grow("total_sell", (self.bins,))
+        grow("volume", (self.slices,))
+        grow("first_price", (self.slices,), np.nan)
+        grow("last_price", (), np.nan)
+        grow("tick", (), np.nan)
+        grow("base", (), 0, np.int64)
+        self.capacity = capacity
+
+    def _row(self, symbol: str) -> int:
+        """Строка символа (новый символ — новая строка)"""
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row >= self.capacity:
+                self._allocate(self.capacity * 2)
+            self.symbols.append(symbol)
+            self._rows[symbol] = row
+        return row
+
+    def has(self, symbol: str) -> bool:
+        """Есть ли сделки символа в окне"""
+        row = self._rows.get(symbol)
+        return row is not None and bool(self.volume[row].any())
+
+    def _slot_order(self) -> np.ndarray:
+        """Слоты окна в хронологическом порядке (последний — текущий срез)"""
+        return (self.epoch - self.slices + 1 + np.arange(self.slices)) % self.slices
+
+    def _advance(self, slice_no: int):
+        """Перейти к срезу slice_no: обнулить вышедшие из окна срезы"""
+        if self.epoch is None:
+            self.epoch = slice_no
+            return
+        if slice_no <= self.epoch:
+            return
+
+        steps = min(slice_no - self.epoch, self.slices)
+        slots = (self.epoch + 1 + np.arange(steps)) % self.slices
+        self.buy[:, slots] = 0.0
+        self.sell[:, slots] = 0.0
+        self.volume[:, slots] = 0.0
+        self.first_price[:, slots] = np.nan
+        self.epoch = slice_no
+
+        # Итоги окна пересобираются из срезов — без накопления ошибки
+        np.sum(self.buy, axis=1, out=self.total_buy)
+        np.sum(self.sell, axis=1, out=self.total_sell)
+        self.stats["rotations"] += 1
+
+    def _recenter(self, row: int, price: float):
+        """
+        Сдвинуть диапазон бинов символа за ценой
+
+        price встаёт на четверть диапазона от края, за который вышла цена, —
+        накопленные бины по другую сторону сохраняются.
+        """
+        price_bin = int(price // self.tick[row])
+        if price_bin < self.base[row]:
+            new_base = price_bin - self.bins // 4
+        else:
+            new_base = price_bin - self.bins + self.bins // 4
+        shift = new_base - int(self.base[row])
+        self.base[row] = new_base
+        self.stats["recenters"] += 1
+        if shift == 0:
+            return
+
+        for array in (self.buy[row], self.sell[row], self.total_buy[row], self.total_sell[row]):
+            # Бины за новым краем диапазона отбрасываются
+            if abs(shift) >= self.bins:
+                array[...] = 0.0
+            elif shift > 0:
+                array[..., :-shift] = array[..., shift:]
+                array[..., -shift:] = 0.0
+            else:
+                array[..., -shift:] = array[..., :shift]
+                array[..., :-shift] = 0.0
+
+    # ==================== ПРИЁМ СДЕЛОК ====================
+
+    def on_trades(self, batch):
+        """
+        Подписчик TradeBus: все сделки батча
+
+        Args:
+            batch: core.trade_bus.TradeBatch
+        """
+        if not len(batch):
+            return
+        known = len(self._bus_rows)
+        if len(batch.symbols) > known:
+            self._bus_rows = np.concatenate(
+                [self._bus_rows, np.full(len(batch.symbols) - known, -1, dtype=np.int64)]
+            )
+        rows = self._bus_rows[batch.symbol]
+        if (rows < 0).any():
+            for sid in np.unique(batch.symbol[rows < 0]).tolist():
+                self._bus_rows[sid] = self._row(batch.symbols[sid])
+            rows = self._bus_rows[batch.symbol]
+
+        self.ingest(rows, batch.ts, batch.price, batch.qty, batch.side)
+
+    def add(self, symbol: str, price: float, qty: float, side: int, timestamp_ms: int):
+        """Одна сделка (side: +1 покупка, -1 продажа)"""
+        self.ingest(
+            np.array([self._row(symbol)]),
+            np.array([timestamp_ms], dtype=np.int64),
+            np.array([price], dtype=np.float64),
+            np.array([qty], dtype=np.float64),
+            np.array([side], dtype=np.int8),
+        )
+
+    def ingest(self, rows: np.ndarray, ts: np.ndarray, price: np.ndarray, qty: np.ndarray, side: np.ndarray):
+        """
+        Разложить сделки по бинам и срезам (векторно)
+
+        Args:
+            rows: Строки панели
+            ts: Время сделок (ms)
+            price, qty: Цена и объём
+            side: +1 покупка / -1 продажа (агрессор)
+        """
+        slice_no = ts // self.slice_ms
+        self._advance(int(slice_no.max()))
+
+        keep = slice_no > self.epoch - self.slices
+        if not keep.all():
+            self.stats["rejected"] += int((~keep).sum())
+            rows, ts, price, qty, side, slice_no = (
+                a[keep] for a in (rows, ts, price, qty, side, slice_no)
+            )
+            if not len(rows):
+                return
+
+        # Тик символа — один раз по первой цене
+        fresh = np.isnan(self.tick[rows])
+        if fresh.any():
+            fresh_prices = price[fresh]
+            for row, first in zip(*np.unique(rows[fresh], return_index=True)):
+                tick = nice_tick(float(fresh_prices[first]), self.bin_pct)
+                self.tick[row] = tick
+                self.base[row] = int(fresh_prices[first] // tick) - self.bins // 2
+
+        idx = (price // self.tick[rows]).astype(np.int64) - self.base[rows]
+        outside = (idx < 0) | (idx >= self.bins)
+        if outside.any():
+            # Сдвиг — по последней вышедшей за край сделке символа
+            out_rows = rows[outside]
+            out_prices = price[outside]
+            for row in np.unique(out_rows).tolist():
+                self._recenter(row, float(out_prices[out_rows == row][-1]))
+            idx = (price // self.tick[rows]).astype(np.int64) - self.base[rows]
+            inside = (idx >= 0) & (idx < self.bins)
+            if not inside.all():
+                self.stats["rejected"] += int((~inside).sum())
+                rows, ts, price, qty, side, slice_no, idx = (
+                    a[inside] for a in (rows, ts, price, qty, side, slice_no, idx)
+                )
+
+        slot = slice_no % self.slices
+        cell = rows * self.slices + slot
+        flat = cell * self.bins + idx
+        level = rows * self.bins + idx
+        buys = side > 0
+        sells = ~buys
+
+        np.add.at(self.buy.reshape(-1), flat[buys], qty[buys])
+        np.add.at(self.sell.reshape(-1), flat[sells], qty[sells])
+        np.add.at(self.total_buy.reshape(-1), level[buys], qty[buys])
+        np.add.at(self.total_sell.reshape(-1), level[sells], qty[sells])
+        np.add.at(self.volume.reshape(-1), cell, qty)
+
+        # Первая цена среза и последняя цена символа (по времени сделок)
+        order = np.argsort(ts, kind="stable")
+        cells, first = np.unique(cell[order], return_index=True)
+        first_flat = self.first_price.reshape(-1)
+        empty = np.isnan(first_flat[cells])
+        first_flat[cells[empty]] = price[order][first[empty]]
+        self.last_price[rows[order]] = price[order]
+
+        self.stats["trades"] += len(rows)
+        self.stats["batches"] += 1
+
+    # ==================== ВЕКТОРНЫЕ ПРОХОДЫ ====================
+
+    def _window_move(self, rows: np.ndarray) -> np.ndarray:
+        """Смещение цены за окно (%): последняя цена против первой цены окна"""
+        opens = self.first_price[rows][:, self._slot_order()]
+        has = ~np.isnan(opens)
+        window_open = opens[np.arange(len(rows)), has.argmax(axis=1)]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.last_price[rows] - window_open) / window_open * 100
+
+    def scan_absorption(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Absorption по строкам: пиковый бин ≥ multiplier × средний
+        активный бин при смещении цены за окно ≤ absorption_max_move_pct
+
+        Returns:
+            Массивы detected, level, volume, delta (buy − sell в пике), move
+        """
+        buy = self.total_buy[rows]
+        sell = self.total_sell[rows]
+        volume = buy + sell
+        active = (volume > 0).sum(axis=1)
+        mean = volume.sum(axis=1) / np.maximum(active, 1)
+
+        peak = volume.argmax(axis=1)
+        pick = np.arange(len(rows))
+        peak_volume = volume[pick, peak]
+        move = self._window_move(rows)
+
+        detected = (
+            (active >= 3)
+            & (peak_volume >= self.absorption_multiplier * mean)
+            & (np.abs(move) <= self.absorption_max_move_pct)
+        )
+        return {
+            "detected": detected,
+            "level": (self.base[rows] + peak + 0.5) * self.tick[rows],
+            "volume": peak_volume,
+            "delta": buy[pick, peak] - sell[pick, peak],
+            "move": move,
+        }
+
+    def scan_exhaustion(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Exhaustion по строкам: средний объём последних законченных срезов
+        < multiplier × средний объём предыдущих при движении ≥ min_move_pct
+
+        Returns:
+            Массивы detected, level, strength, move
+        """
+        # Текущий (незаконченный) срез не сравнивается
+        volume = self.volume[rows][:, self._slot_order()[:-1]]
+        recent_count = max(1, volume.shape[1] // 5)
+        recent = volume[:, -recent_count:].mean(axis=1)
+        older = volume[:, :-recent_count]
+        older_active = (older > 0).sum(axis=1)
+        older_mean = older.sum(axis=1) / np.maximum(older_active, 1)
+        move = self._window_move(rows)
+
+        detected = (
+            (older_active >= 3)
+            & (recent < self.exhaustion_multiplier * older_mean)
+            & (np.abs(move) >= self.exhaustion_min_move_pct)
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            strength = np.clip((older_mean - recent) / older_mean, 0.0, 1.0)
+        return {
+            "detected": detected,
+            "level": self.last_price[rows],
+            "strength": np.nan_to_num(strength),
+            "move": move,
+        }
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def _query_rows(self, symbols: Optional[Iterable[str]], now_ms: Optional[int]) -> np.ndarray:
+        """Строки запроса; окно сдвигается к текущему времени"""
+        if self.epoch is not None:
+            self._advance((now_ms or current_epoch_ms()) // self.slice_ms)
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return np.array([self._rows[s] for s in symbols if s in self._rows], dtype=np.int64)
+
+    def absorption(self, symbol: str, now_ms: Optional[int] = None) -> Dict:
+        """
+        Absorption символа (формат ClusterDetector.detect_absorption)
+
+        Returns:
+            {'detected', 'level', 'volume', 'delta', 'absorbing_side'}:
+            absorbing_side='buy' — пассивные покупатели держат агрессивные продажи
+        """
+        rows = self._query_rows([symbol], now_ms)
+        if not len(rows) or self.epoch is None:
+            return {'detected': False, 'level': 0.0, 'volume': 0.0}
+        scan = self.scan_absorption(rows)
+        if not scan["detected"][0]:
+            return {'detected': False, 'level': 0.0, 'volume': 0.0}
+        delta = float(scan["delta"][0])
+        return {
+            'detected': True,
+            'level': float(scan["level"][0]),
+            'volume': float(scan["volume"][0]),
+            'delta': delta,
+            'absorbing_side': 'buy' if delta < 0 else 'sell',
+        }
+
+    def exhaustion(self, symbol: str, now_ms: Optional[int] = None) -> Dict:
+        """
+        Exhaustion символа (формат ClusterDetector.detect_exhaustion)
+
+        Returns:
+            {'detected', 'level', 'strength', 'direction'}: direction — затухающее движение
+        """
+        rows = self._query_rows([symbol], now_ms)
+        if not len(rows) or self.epoch is None:
+            return {'detected': False, 'level': 0.0, 'strength': 0.0}
+        scan = self.scan_exhaustion(rows)
+        if not scan["detected"][0]:
+            return {'detected': False, 'level': 0.0, 'strength': 0.0}
+        return {
+            'detected': True,
+            'level': float(scan["level"][0]),
+            'strength': float(scan["strength"][0]),
+            'direction': 'up' if scan["move"][0] > 0 else 'down',
+        }
+
+    def scan(self, symbols: Optional[Iterable[str]] = None, now_ms: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Absorption и exhaustion по всем символам одним проходом
+
+        Returns:
+            {symbol: {'absorption': bool, 'exhaustion': bool, 'level': ..., ...}}
+            только для символов, где что-то обнаружено
+        """
+        rows = self._query_rows(symbols, now_ms)
+        if not len(rows) or self.epoch is None:
+            return {}
+        absorption = self.scan_absorption(rows)
+        exhaustion = self.scan_exhaustion(rows)
+
+        result = {}
+        for i in np.flatnonzero(absorption["detected"] | exhaustion["detected"]).tolist():
+            result[self.symbols[rows[i]]] = {
+                "absorption": bool(absorption["detected"][i]),
+                "absorption_level": float(absorption["level"][i]),
+                "absorption_volume": float(absorption["volume"][i]),
+                "exhaustion": bool(exhaustion["detected"][i]),
+                "exhaustion_strength": float(exhaustion["strength"][i]),
+                "move_pct": float(absorption["move"][i]),
+            }
+        return result
+
+    def profile(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """Footprint окна: цены бинов, buy / sell объём (только непустые бины)"""
+        row = self._rows.get(symbol)
+        if row is None:
+            return None
+        buy = self.total_buy[row]
+        sell = self.total_sell[row]
+        nonzero = np.flatnonzero(buy + sell)
+        return {
+            "prices": (self.base[row] + nonzero + 0.5) * self.tick[row],
+            "buy": buy[nonzero].copy(),
+            "sell": sell[nonzero].copy(),
+            "tick": float(self.tick[row]),
+        }
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "symbols": len(self.symbols),
+            "memory_mb": round(
+                (self.buy.nbytes + self.sell.nbytes + self.total_buy.nbytes + self.total_sell.nbytes)
+                / 1024 / 1024,
+                2,
+            ),
+        }
+
+
+# ==================== SINGLETON ====================
+
+_global_footprint_aggregator: Optional[FootprintAggregator] = None
+
+
+def get_footprint_aggregator() -> FootprintAggregator:
+    """Получить глобальный FootprintAggregator"""
+    global _global_footprint_aggregator
+    if _global_footprint_aggregator is None:
+        _global_footprint_aggregator = FootprintAggregator()
+    return _global_footprint_aggregator
+
+
+# Экспорт
+__all__ = ["FootprintAggregator", "get_footprint_aggregator", "nice_tick"]
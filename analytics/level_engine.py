@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Level Engine - общий массив уровней поддержки/сопротивления по символу
+Уровни хранятся отсортированными по цене; новый уровень сливается с
+ближайшим соседом в пределах допуска max(ATR × k, цена × %) — поиск
+соседа через bisect. Сила уровня — сумма сил источников (volume
+profile, стакан, pivot'ы, ликвидации) с полураспадом по источнику,
+источники — битовая маска. Ближайший уровень выше/ниже цены — bisect.
+
+AdvancedSupportResistanceDetector, PatternDetector, MarketStructureAnalyzer
+и EnhancedLiquidityAnalyzer пишут в одну книгу символа и читают из неё.
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from enum import IntFlag
+from heapq import nlargest
+from typing import Any, Dict, List, Optional
+
+from config.settings import logger, LEVEL_ENGINE_CONFIG
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+class LevelSource(IntFlag):
+    """Источник уровня (бит маски)"""
+
+    VOLUME_PROFILE = 1
+    ORDERBOOK = 2
+    PIVOT = 4
+    LIQUIDATION = 8
+
+
+SOURCE_NAMES = {
+    LevelSource.VOLUME_PROFILE: "volume_profile",
+    LevelSource.ORDERBOOK: "orderbook",
+    LevelSource.PIVOT: "pivot",
+    LevelSource.LIQUIDATION: "liquidation",
+}
+_SLOTS = {source: source.bit_length() - 1 for source in SOURCE_NAMES}
+
+# Повторное подтверждение тем же источником не суммируется (берётся max),
+# кроме ликвидаций — каждая новая ликвидация усиливает уровень
+_ACCUMULATE = LevelSource.LIQUIDATION
+
+STRENGTH_WEIGHTS = {"weak": 1.0, "medium": 2.0, "strong": 3.0}
+_LABEL_RANK = {"weak": 0, "medium": 1, "strong": 2}
+
+
+def strength_label(score: float) -> str:
+    """Сила уровня → strong / medium / weak"""
+    if score >= 3.0:
+        return "strong"
+    if score >= 2.0:
+        return "medium"
+    return "weak"
+
+
+def source_names(mask: int) -> List[str]:
+    """Битовая маска → имена источников"""
+    return [name for source, name in SOURCE_NAMES.items() if mask & source]
+
+
+class Level:
+    """Уровень: цена, границы зоны, сила по источникам"""
+
+    __slots__ = ("price", "low", "high", "weights", "stamps", "sources", "touches", "volume")
+
+    def __init__(self, price: float, low: float, high: float):
+        self.price = price
+        self.low = low
+        self.high = high
+        self.weights = [0.0] * len(SOURCE_NAMES)
+        self.stamps = [0.0] * len(SOURCE_NAMES)  # время последнего подтверждения источника (сек)
+        self.sources = 0
+        self.touches = 0
+        self.volume = 0.0
+
+    def strength(self, now: float, half_lives: List[float]) -> float:
+        """Сила с учётом полураспада каждого источника"""
+        total = 0.0
+        for slot, weight in enumerate(self.weights):
+            if weight:
+                total += weight * 0.5 ** (max(0.0, now - self.stamps[slot]) / half_lives[slot])
+        return total
+
+
+class LevelBook:
+    """
+    Отсортированный массив уровней одного символа
+
+    Features:
+    - add() — слияние с соседом в пределах допуска (bisect), иначе вставка
+    - nearest_below() / nearest_above() — bisect от цены
+    - below() / above() / strongest() / key_level() — выборки для детекторов
+    - Вытеснение слабых уровней сверх max_levels
+    """
+
+    def __init__(
+        self,
+        tolerance_pct: Optional[float] = None,
+        atr_multiplier: Optional[float] = None,
+        max_levels: Optional[int] = None,
+        config: Optional[Dict] = None,
+    ):
+        """
+        Args:
+            tolerance_pct: Минимальный допуск слияния (% цены)
+            atr_multiplier: Допуск в ATR (0 — только процент)
+            max_levels: Ёмкость книги
+            config: Параметры (по умолчанию LEVEL_ENGINE_CONFIG)
+        """
+        cfg = {**LEVEL_ENGINE_CONFIG, **(config or {})}
+        self.tolerance_pct = cfg["min_tolerance_pct"] if tolerance_pct is None else tolerance_pct
+        self.atr_multiplier = cfg["merge_atr_multiplier"] if atr_multiplier is None else atr_multiplier
+        self.max_levels = max_levels or cfg["max_levels"]
+        self.max_source_strength = cfg["max_source_strength"]
+        self.min_strength = cfg["min_strength"]
+        self.half_lives = [float(cfg["half_life"][name]) for name in SOURCE_NAMES.values()]
+        self.atr = 0.0
+
+        self.prices: List[float] = []
+        self.levels: List[Level] = []
+        self.stats = {"inserts": 0, "merges": 0, "evicted": 0}
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def set_atr(self, atr: Optional[float]):
+        """Обновить ATR символа (масштаб допуска слияния)"""
+        if atr and atr > 0:
+            self.atr = float(atr)
+
+    def tolerance(self, price: float) -> float:
+        """Допуск слияния около цены"""
+        return max(self.atr * self.atr_multiplier, abs(price) * self.tolerance_pct / 100)
+
+    # ==================== ЗАПИСЬ ====================
+
+    def add(
+        self,
+        price: float,
+        source: LevelSource,
+        weight: float = 1.0,
+        now: Optional[float] = None,
+        touches: int = 1,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        volume: float = 0.0,
+    ) -> Level:
+        """
+        Добавить уровень или подтвердить ближайший в пределах допуска
+
+        Args:
+            price: Цена уровня
+            source: Источник (LevelSource)
+            weight: Сила подтверждения (weak=1, medium=2, strong=3)
+            now: Время (сек, по умолчанию time.time())
+            touches: Касаний уровня (сохраняется максимум)
+            low, high: Границы зоны (по умолчанию — сама цена)
+            volume: Объём зоны (суммируется)
+
+        Returns:
+            Уровень, в который попала цена
+        """
+        now = time.time() if now is None else now
+        prices = self.prices
+        tolerance = self.tolerance(price)
+        idx = bisect_left(prices, price)
+
+        target = None
+        if idx < len(prices) and prices[idx] - price <= tolerance:
+            target = idx
+        if idx > 0 and price - prices[idx - 1] <= tolerance:
+            if target is None or price - prices[idx - 1] < prices[idx] - price:
+                target = idx - 1
+
+        if target is None:
+            level = Level(price, price if low is None else low, price if high is None else high)
+            self._confirm(level, source, weight, now)
+            level.touches = touches
+            level.volume = volume
+            prices.insert(idx, price)
+            self.levels.insert(idx, level)
+            self.stats["inserts"] += 1
+            if len(prices) > self.max_levels:
+                self.prune(now)
+            return level
+
+        level = self.levels[target]
+        current = level.strength(now, self.half_lives)
+        if current + weight > 0:
+            # Новая цена лежит между уровнем и соседом — порядок массива сохраняется
+            level.price = (level.price * current + price * weight) / (current + weight)
+        level.low = min(level.low, price if low is None else low)
+        level.high = max(level.high, price if high is None else high)
+        self._confirm(level, source, weight, now)
+        level.touches = max(level.touches, touches)
+        level.volume += volume
+        prices[target] = level.price
+        self.stats["merges"] += 1
+        return self._absorb_neighbours(target, now)
+
+    def _confirm(self, level: Level, source: LevelSource, weight: float, now: float):
+        """Записать силу источника: max с затуханием (ликвидации — сумма)"""
+        slot = _SLOTS[source]
+        decayed = level.weights[slot] * 0.5 ** (max(0.0, now - level.stamps[slot]) / self.half_lives[slot])
+        value = decayed + weight if source & _ACCUMULATE else max(decayed, weight)
+        level.weights[slot] = min(self.max_source_strength, value)
+        level.stamps[slot] = now
+        level.sources |= source
+
+    def _absorb_neighbours(self, idx: int, now: float) -> Level:
+        """Слить уровень с соседями, оказавшимися в допуске после сдвига цены"""
+        prices, levels = self.prices, self.levels
+        while idx > 0 and prices[idx] - prices[idx - 1] <= self.tolerance(prices[idx]):
+            self._merge_into(levels[idx], levels[idx - 1], now)
+            del prices[idx - 1], levels[idx - 1]
+            idx -= 1
+            prices[idx] = levels[idx].price
+        while idx + 1 < len(prices) and prices[idx + 1] - prices[idx] <= self.tolerance(prices[idx]):
+            self._merge_into(levels[idx], levels[idx + 1], now)
+            del prices[idx + 1], levels[idx + 1]
+            prices[idx] = levels[idx].price
+        return levels[idx]
+
+    def _merge_into(self, level: Level, other: Level, now: float):
+        """Перенести силу и границы other в level"""
+        strength = level.strength(now, self.half_lives)
+        other_strength = other.strength(now, self.half_lives)
+        if strength + other_strength > 0:
+            level.price = (level.price * strength + other.price * other_strength) / (strength + other_strength)
+        level.low = min(level.low, other.low)
+        level.high = max(level.high, other.high)
+        for source, slot in _SLOTS.items():
+            if other.weights[slot]:
+                weight = other.weights[slot] * 0.5 ** (max(0.0, now - other.stamps[slot]) / self.half_lives[slot])
+                self._confirm(level, source, weight, now)
+        level.touches = max(level.touches, other.touches)
+        level.volume += other.volume
+        self.stats["merges"] += 1
+
+    def prune(self, now: Optional[float] = None):
+        """Удалить затухшие уровни и самые слабые сверх 3/4 ёмкости"""
+        now = time.time() if now is None else now
+        scored = [(level.strength(now, self.half_lives), level) for level in self.levels]
+        alive = [(score, level) for score, level in scored if score >= self.min_strength]
+        keep = max(1, self.max_levels * 3 // 4)
+        if len(alive) > keep:
+            alive = sorted(nlargest(keep, alive, key=lambda item: item[0]), key=lambda item: item[1].price)
+        self.stats["evicted"] += len(scored) - len(alive)
+        self.levels = [level for _, level in alive]
+        self.prices = [level.price for level in self.levels]
+
+    def clear(self):
+        self.prices.clear()
+        self.levels.clear()
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def _passes(self, level: Level, now: float, min_strength: Optional[float], sources: int) -> bool:
+        if sources and not level.sources & sources:
+            return False
+        threshold = self.min_strength if min_strength is None else min_strength
+        return level.strength(now, self.half_lives) >= threshold
+
+    def nearest_below(
+        self,
+        price: float,
+        min_strength: Optional[float] = None,
+        sources: int = 0,
+        now: Optional[float] = None,
+    ) -> Optional[Level]:
+        """Ближайший уровень строго ниже цены (sources — хотя бы один из источников)"""
+        levels = self.below(price, 1, min_strength, sources, now=now)
+        return levels[0] if levels else None
+
+    def nearest_above(
+        self,
+        price: float,
+        min_strength: Optional[float] = None,
+        sources: int = 0,
+        now: Optional[float] = None,
+    ) -> Optional[Level]:
+        """Ближайший уровень строго выше цены"""
+        levels = self.above(price, 1, min_strength, sources, now=now)
+        return levels[0] if levels else None
+
+    def below(
+        self,
+        price: float,
+        limit: Optional[int] = None,
+        min_strength: Optional[float] = None,
+        sources: int = 0,
+        inclusive: bool = False,
+        now: Optional[float] = None,
+    ) -> List[Level]:
+        """Уровни ниже цены, от ближайшего"""
+        now = time.time() if now is None else now
+        idx = (bisect_right if inclusive else bisect_left)(self.prices, price) - 1
+        result = []
+        while idx >= 0 and (limit is None or len(result) < limit):
+            level = self.levels[idx]
+            if self._passes(level, now, min_strength, sources):
+                result.append(level)
+            idx -= 1
+        return result
+
+    def above(
+        self,
+        price: float,
+        limit: Optional[int] = None,
+        min_strength: Optional[float] = None,
+        sources: int = 0,
+        inclusive: bool = False,
+        now: Optional[float] = None,
+    ) -> List[Level]:
+        """Уровни выше цены, от ближайшего"""
+        now = time.time() if now is None else now
+        idx = (bisect_left if inclusive else bisect_right)(self.prices, price)
+        result = []
+        while idx < len(self.levels) and (limit is None or len(result) < limit):
+            level = self.levels[idx]
+            if self._passes(level, now, min_strength, sources):
+                result.append(level)
+            idx += 1
+        return result
+
+    def strongest(
+        self,
+        price: float,
+        side: str,
+        limit: int,
+        sources: int = 0,
+        inclusive: bool = False,
+        now: Optional[float] = None,
+    ) -> List[Level]:
+        """
+        Самые сильные уровни стороны
+
+        Args:
+            price: Текущая цена
+            side: "below" (поддержки) / "above" (сопротивления)
+            limit: Сколько уровней
+            sources: Только уровни с этими источниками
+        """
+        now = time.time() if now is None else now
+        candidates = (self.below if side == "below" else self.above)(
+            price, sources=sources, inclusive=inclusive, now=now
+        )
+        return nlargest(limit, candidates, key=lambda level: level.strength(now, self.half_lives))
+
+    def key_level(
+        self,
+        price: float,
+        side: str,
+        inclusive: bool = False,
+        now: Optional[float] = None,
+    ) -> Optional[Level]:
+        """Ключевой уровень стороны: самая сильная категория, из неё — ближайший"""
+        now = time.time() if now is None else now
+        candidates = (self.below if side == "below" else self.above)(price, inclusive=inclusive, now=now)
+        if not candidates:
+            return None
+        return max(
+            candidates,
+            key=lambda level: (
+                _LABEL_RANK[strength_label(level.strength(now, self.half_lives))],
+                -abs(level.price - price),
+            ),
+        )
+
+    def describe(self, level: Level, now: Optional[float] = None) -> Dict[str, Any]:
+        """Уровень в формате детекторов: price / strength / source"""
+        now = time.time() if now is None else now
+        score = level.strength(now, self.half_lives)
+        names = source_names(level.sources)
+        return {
+            "price": level.price,
+            "strength": strength_label(score),
+            "score": round(score, 3),
+            "source": "+".join(names),
+            "sources": names,
+            "touches": level.touches,
+            "low": level.low,
+            "high": level.high,
+            "volume": level.volume,
+        }
+
+
+class LevelEngine:
+    """Книги уровней по символам + подписка на ликвидации"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: Параметры (по умолчанию LEVEL_ENGINE_CONFIG)
+        """
+        self.config = {**LEVEL_ENGINE_CONFIG, **(config or {})}
+        self.books: Dict[str, LevelBook] = {}
+
+        get_metrics_registry().register_collector(
+            "level_engine", stats_collector("level_engine", self.get_stats)
+        )
+        logger.info(f"✅ LevelEngine инициализирован (до {self.config['max_levels']} уровней на символ)")
+
+    def book(self, symbol: str) -> LevelBook:
+        """Книга уровней символа (создаётся при первом обращении)"""
+        symbol = symbol.upper()
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = LevelBook(config=self.config)
+        return book
+
+    def on_liquidation(
+        self,
+        symbol: str,
+        usd_value: float,
+        side: str = "",
+        timestamp: Optional[int] = None,
+        price: Optional[float] = None,
+    ) -> bool:
+        """
+        Ликвидация из LiquidationAggregator: +1 к силе уровня за liquidation_usd_unit
+
+        Штамп — локальные часы, как у остальных источников: timestamp биржи
+        может опережать их и раздувать силу при затухании.
+        """
+        if not price or price <= 0:
+            return False
+        weight = usd_value / self.config["liquidation_usd_unit"]
+        self.book(symbol).add(price, LevelSource.LIQUIDATION, weight, volume=usd_value)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"symbols": len(self.books), "levels": 0, "inserts": 0, "merges": 0, "evicted": 0}
+        for book in self.books.values():
+            stats["levels"] += len(book)
+            for key, value in book.stats.items():
+                stats[key] += value
+        return stats
+
+
+# ==================== SINGLETON ====================
+
+_global_level_engine: Optional[LevelEngine] = None
+
+
+def get_level_engine() -> LevelEngine:
+    """Получить глобальный LevelEngine"""
+    global _global_level_engine
+    if _global_level_engine is None:
+        _global_level_engine = LevelEngine()
+    return _global_level_engine
+
+
+# Экспорт
+__all__ = [
+    "LevelSource",
+    "Level",
+    "LevelBook",
+    "LevelEngine",
+    "STRENGTH_WEIGHTS",
+    "strength_label",
+    "source_names",
+    "get_level_engine",
+]
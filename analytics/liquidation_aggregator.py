@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquidation Aggregator - скользящие суммы ликвидаций из публичных стримов
+Принты Bybit allLiquidation / Binance forceOrder раскладываются по
+временным бакетам (кольцо массивов NumPy на 24ч): long/short за
+1h / 4h / 24h — маскированная сумма по бакетам, без REST-запросов.
+Последние события символа хранятся кольцом для ценовой heatmap
+(логарифмические бины) и алертов о крупных ликвидациях.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import logger, LIQUIDATION_STREAM_CONFIG
+from utils.helpers import current_epoch_ms
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+SIDE_LONG = 0
+SIDE_SHORT = 1
+_SIDES = {"long": SIDE_LONG, "short": SIDE_SHORT}
+_SIDE_NAMES = ("long", "short")
+
+
+class SymbolLiquidations:
+    """
+    Ликвидации одного символа
+
+    Бакеты: epochs[slot] — номер бакета (ts // bucket_ms), usd / counts —
+    суммы по сторонам [long, short]. Слот переиспользуется, когда в него
+    попадает более новый бакет. События — кольцо фиксированной ёмкости.
+    """
+
+    __slots__ = (
+        "symbol", "epochs", "usd", "counts",
+        "ev_ts", "ev_price", "ev_usd", "ev_side", "head", "size", "version",
+    )
+
+    def __init__(self, symbol: str, buckets: int, capacity: int):
+        """
+        Args:
+            symbol: Торговая пара
+            buckets: Количество бакетов истории
+            capacity: Ёмкость кольца событий
+        """
+        self.symbol = symbol
+        self.epochs = np.full(buckets, -1, dtype=np.int64)
+        self.usd = np.zeros((2, buckets), dtype=np.float64)
+        self.counts = np.zeros((2, buckets), dtype=np.int64)
+
+        self.ev_ts = np.zeros(capacity, dtype=np.int64)
+        self.ev_price = np.zeros(capacity, dtype=np.float64)
+        self.ev_usd = np.zeros(capacity, dtype=np.float64)
+        self.ev_side = np.zeros(capacity, dtype=np.int8)
+        self.head = 0
+        self.size = 0
+        self.version = 0
+
+    def add(self, bucket: int, timestamp: int, price: float, usd: float, side: int) -> bool:
+        """Добавить событие; False, если слот уже занят более новым бакетом"""
+        slot = bucket % len(self.epochs)
+        current = self.epochs[slot]
+        if current != bucket:
+            if current > bucket:
+                return False
+            self.epochs[slot] = bucket
+            self.usd[:, slot] = 0.0
+            self.counts[:, slot] = 0
+        self.usd[side, slot] += usd
+        self.counts[side, slot] += 1
+
+        i = self.head
+        self.ev_ts[i] = timestamp
+        self.ev_price[i] = price
+        self.ev_usd[i] = usd
+        self.ev_side[i] = side
+        self.head = (i + 1) % len(self.ev_ts)
+        self.size = min(self.size + 1, len(self.ev_ts))
+        self.version += 1
+        return True
+
+    def window(self, now_bucket: int, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Суммы (usd[2], counts[2]) по бакетам (now_bucket - buckets, now_bucket]"""
+        mask = (self.epochs > now_bucket - buckets) & (self.epochs <= now_bucket)
+        return self.usd[:, mask].sum(axis=1), self.counts[:, mask].sum(axis=1)
+
+    def events_since(self, since_ms: int) -> np.ndarray:
+        """Индексы событий кольца с ts >= since_ms (по времени)"""
+        ts = self.ev_ts[: self.size]
+        idx = np.flatnonzero(ts >= since_ms)
+        return idx[np.argsort(ts[idx], kind="stable")]
+
+
+class LiquidationAggregator:
+    """
+    Агрегатор ликвидаций из WebSocket стримов бирж
+
+    Features:
+    - Скользящие суммы long/short за 1h / 4h / 24h на символ
+    - Heatmap ликвидаций по ценовым бинам (кэш до нового события)
+    - Последние крупные ликвидации для алертов
+    - Подписчики на значимые ликвидации (Veto каскад)
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: Optional[int] = None,
+        history_hours: Optional[int] = None,
+        max_events: Optional[int] = None,
+    ):
+        """
+        Args:
+            bucket_seconds: Размер бакета (по умолчанию из LIQUIDATION_STREAM_CONFIG)
+            history_hours: Глубина истории
+            max_events: Ёмкость кольца событий символа
+        """
+        config = LIQUIDATION_STREAM_CONFIG
+        self.bucket_ms = (bucket_seconds or config["bucket_seconds"]) * 1000
+        history_ms = (history_hours or config["history_hours"]) * 3_600_000
+        self.buckets = max(1, history_ms // self.bucket_ms)
+        self.max_events = max_events or config["max_events"]
+        self.windows: Dict[str, int] = dict(config["windows"])
+        self._bin_step = np.log1p(config["heatmap_bin_pct"] / 100)
+
+        self.symbols: Dict[str, SymbolLiquidations] = {}
+
+        # exchange → время подключения стрима (ms)
+        self._streams: Dict[str, int] = {}
+        self._listeners: List[Tuple[Callable, float, bool]] = []
+
+        # (symbol, window) → ((version, now_bucket), heatmap)
+        self._heatmaps: Dict[Tuple[str, str], Tuple[tuple, Dict[str, np.ndarray]]] = {}
+
+        self.stats = {
+            "events": 0,
+            "rejected": 0,
+            "usd_total": 0.0,
+            "queries": 0,
+            "heatmap_builds": 0,
+            "heatmap_hits": 0,
+        }
+
+        get_metrics_registry().register_collector(
+            "liquidations", stats_collector("liquidations", lambda: self.stats)
+        )
+        logger.info(
+            f"✅ LiquidationAggregator инициализирован "
+            f"({self.buckets} бакетов × {self.bucket_ms // 1000}s)"
+        )
+
+    # ==================== ПОТОК ====================
+
+    def mark_connected(self, exchange: str):
+        """Стрим биржи подключён (с этого момента суммы покрывают окно)"""
+        self._streams.setdefault(exchange, current_epoch_ms())
+
+    def mark_disconnected(self, exchange: str):
+        """Стрим биржи отключён"""
+        self._streams.pop(exchange, None)
+
+    def is_live(self) -> bool:
+        """Есть хотя бы один подключённый стрим"""
+        return bool(self._streams)
+
+    def coverage_ms(self, now_ms: Optional[int] = None) -> int:
+        """Сколько времени стримы непрерывно собирают данные"""
+        if not self._streams:
+            return 0
+        now_ms = now_ms or current_epoch_ms()
+        return max(0, now_ms - min(self._streams.values()))
+
+    def subscribe(self, listener: Callable, min_usd: Optional[float] = None, with_price: bool = False):
+        """
+        Подписка на ликвидации: listener(symbol, usd_value, side, timestamp)
+
+        Args:
+            listener: Callback (side — "long" / "short")
+            min_usd: Минимальный объём события (по умолчанию significant_usd)
+            with_price: Передавать цену исполнения (listener(..., price=price))
+        """
+        threshold = LIQUIDATION_STREAM_CONFIG["significant_usd"] if min_usd is None else min_usd
+        self._listeners.append((listener, threshold, with_price))
+
+    def add(
+        self,
+        exchange: str,
+        symbol: str,
+        side: str,
+        price: float,
+        size: float,
+        timestamp: Optional[int] = None,
+        now_ms: Optional[int] = None,
+    ) -> bool:
+        """
+        Добавить ликвидацию
+
+        Args:
+            exchange: Биржа-источник
+            symbol: Торговая пара (BTCUSDT)
+            side: Ликвидированная позиция: "long" / "short"
+            price: Цена исполнения
+            size: Объём (base)
+            timestamp: Время события (ms)
+            now_ms: Текущее время (ms)
+
+        Returns:
+            True, если событие учтено (не старше истории)
+        """
+        now_ms = now_ms or current_epoch_ms()
+        timestamp = int(timestamp or now_ms)
+        bucket = timestamp // self.bucket_ms
+        if bucket <= now_ms // self.bucket_ms - self.buckets or price <= 0 or size <= 0:
+            self.stats["rejected"] += 1
+            return False
+
+        symbol = symbol.upper()
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = SymbolLiquidations(symbol, self.buckets, self.max_events)
+
+        usd = price * size
+        if not state.add(bucket, timestamp, price, usd, _SIDES[side]):
+            self.stats["rejected"] += 1
+            return False
+
+        self.stats["events"] += 1
+        self.stats["usd_total"] += usd
+
+        for listener, min_usd, with_price in self._listeners:
+            if usd >= min_usd:
+                try:
+                    if with_price:
+                        listener(symbol, usd, side, timestamp, price=price)
+                    else:
+                        listener(symbol, usd, side, timestamp)
+                except Exception as e:
+                    logger.debug(f"⚠️ Подписчик ликвидаций ({exchange}): {e}")
+        return True
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def summary(self, symbol: str, window: str = "24h", now_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Сводка ликвидаций за окно (формат get_liquidations_24h)
+
+        Args:
+            symbol: Торговая пара
+            window: "1h" / "4h" / "24h"
+            now_ms: Текущее время (ms)
+
+        Returns:
+            Dict: total_long, total_short, total, count, long_pct, short_pct,
+            long_count, short_count, window, coverage_sec, source, symbol, timestamp
+        """
+        from datetime import datetime
+
+        now_ms = now_ms or current_epoch_ms()
+        window_ms = self.windows[window] * 1000
+        self.stats["queries"] += 1
+
+        usd = np.zeros(2)
+        counts = np.zeros(2, dtype=np.int64)
+        state = self.symbols.get(symbol.upper())
+        if state is not None:
+            usd, counts = state.window(now_ms // self.bucket_ms, -(-window_ms // self.bucket_ms))
+
+        total_long, total_short = float(usd[SIDE_LONG]), float(usd[SIDE_SHORT])
+        total = total_long + total_short
+        return {
+            "total_long": total_long,
+            "total_short": total_short,
+            "total": total,
+            "count": int(counts.sum()),
+            "long_count": int(counts[SIDE_LONG]),
+            "short_count": int(counts[SIDE_SHORT]),
+            "long_pct": total_long / total * 100 if total > 0 else 0.0,
+            "short_pct": total_short / total * 100 if total > 0 else 0.0,
+            "window": window,
+            "coverage_sec": min(window_ms, self.coverage_ms(now_ms)) // 1000,
+            "source": "stream",
+            "symbol": symbol,
+            "timestamp": datetime.fromtimestamp(now_ms / 1000).isoformat(),
+        }
+
+    def window_summaries(self, symbol: str, now_ms: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Сводки по всем окнам: {"1h": {...}, "4h": {...}, "24h": {...}}"""
+        now_ms = now_ms or current_epoch_ms()
+        return {window: self.summary(symbol, window, now_ms) for window in self.windows}
+
+    def heatmap(self, symbol: str, window: str = "24h", now_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Ликвидации по ценовым бинам (ширина heatmap_bin_pct % цены)
+
+        Returns:
+            {"prices": центры бинов по возрастанию, "long_usd": ..., "short_usd": ...}
+        """
+        now_ms = now_ms or current_epoch_ms()
+        state = self.symbols.get(symbol.upper())
+        if state is None:
+            empty = np.empty(0)
+            return {"prices": empty, "long_usd": empty, "short_usd": empty}
+
+        key = (state.version, now_ms // self.bucket_ms)
+        cached = self._heatmaps.get((state.symbol, window))
+        if cached is not None and cached[0] == key:
+            self.stats["heatmap_hits"] += 1
+            return cached[1]
+
+        idx = state.events_since(now_ms - self.windows[window] * 1000)
+        bins = np.floor(np.log(state.ev_price[idx]) / self._bin_step).astype(np.int64)
+        unique, inverse = np.unique(bins, return_inverse=True)
+        usd = state.ev_usd[idx]
+        is_long = state.ev_side[idx] == SIDE_LONG
+
+        heatmap = {
+            "prices": np.exp((unique + 0.5) * self._bin_step),
+            "long_usd": np.bincount(inverse, weights=np.where(is_long, usd, 0.0), minlength=len(unique)),
+            "short_usd": np.bincount(inverse, weights=np.where(is_long, 0.0, usd), minlength=len(unique)),
+        }
+        self._heatmaps[(state.symbol, window)] = (key, heatmap)
+        self.stats["heatmap_builds"] += 1
+        return heatmap
+
+    def levels(self, symbol: str, price: float, window: str = "24h", now_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Зоны ликвидаций относительно текущей цены
+
+        Лонги — самый тяжёлый long-бин не выше цены, шорты — short-бин
+        не ниже цены. Объёмы — суммы стороны на этих участках heatmap.
+
+        Returns:
+            Dict: long_liq_level / short_liq_level (None, если событий нет),
+            long_liq_volume, short_liq_volume
+        """
+        heatmap = self.heatmap(symbol, window, now_ms)
+        prices = heatmap["prices"]
+        split = int(np.searchsorted(prices, price))
+
+        result: Dict[str, Any] = {}
+        for name, values, part in (
+            ("long", heatmap["long_usd"], slice(0, split)),
+            ("short", heatmap["short_usd"], slice(split, None)),
+        ):
+            side_values = values[part]
+            if side_values.size and side_values.max() > 0:
+                result[f"{name}_liq_level"] = float(prices[part][int(np.argmax(side_values))])
+                result[f"{name}_liq_volume"] = float(side_values.sum())
+            else:
+                result[f"{name}_liq_level"] = None
+                result[f"{name}_liq_volume"] = 0.0
+        return result
+
+    def recent(self, symbol: str, since_ms: int, min_usd: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        События символа с ts >= since_ms и объёмом >= min_usd (по времени)
+
+        Returns:
+            [{"price", "qty", "usd", "side", "timestamp"}, ...]
+        """
+        state = self.symbols.get(symbol.upper())
+        if state is None:
+            return []
+        idx = state.events_since(since_ms)
+        idx = idx[state.ev_usd[idx] >= min_usd]
+        return [
+            {
+                "price": float(state.ev_price[i]),
+                "qty": float(state.ev_usd[i] / state.ev_price[i]),
+                "usd": float(state.ev_usd[i]),
+                "side": _SIDE_NAMES[state.ev_side[i]],
+                "timestamp": int(state.ev_ts[i]),
+            }
+            for i in idx
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика агрегатора"""
+        return {
+            **self.stats,
+            "symbols": len(self.symbols),
+            "streams": sorted(self._streams),
+            "coverage_sec": self.coverage_ms() // 1000,
+        }
+
+
+# ==================== SINGLETON ====================
+
+_global_liquidation_aggregator: Optional[LiquidationAggregator] = None
+
+
+def get_liquidation_aggregator() -> LiquidationAggregator:
+    """Получить глобальный LiquidationAggregator"""
+    global _global_liquidation_aggregator
+    if _global_liquidation_aggregator is None:
+        _global_liquidation_aggregator = LiquidationAggregator()
+    return _global_liquidation_aggregator
+
+
+# Экспорт
+__all__ = [
+    "SIDE_LONG",
+    "SIDE_SHORT",
+    "SymbolLiquidations",
+    "LiquidationAggregator",
+    "get_liquidation_aggregator",
+]
@@ -8,7 +8,8 @@ Analyzes orderbook depth for support/resistance and whale walls
 import asyncio
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from config.settings import logger
+from analytics.liquidity_engine import DepthSide, LiquidityEngine
+from config.settings import logger, LIQUIDITY_ENGINE_CONFIG
 
 
 class LiquidityDepthAnalyzer:
@@ -24,6 +25,8 @@ class LiquidityDepthAnalyzer:
 
     def __init__(self, bot_instance):
         self.bot = bot_instance
+        # Книги по живым WebSocket стаканам (общий движок бота)
+        self.engine = getattr(bot_instance, "liquidity_engine", None) or LiquidityEngine(bot_instance)
         self.cache_duration = 60  # 1 minute cache
         self._cache = {}
         self._cache_timestamp = {}
@@ -49,7 +52,8 @@ class LiquidityDepthAnalyzer:
                 "imbalance_pct": 4.2,
                 "bid_walls": [...],
                 "ask_walls": [...],
-                "key_levels": {...}
+                "key_levels": {...},
+                "depth_bps": {10: (bid_usd, ask_usd), ...}
             }
         """
         try:
@@ -58,25 +62,16 @@ class LiquidityDepthAnalyzer:
             if self._is_cached(cache_key):
                 return self._cache[cache_key]
 
-            # Get current price
-            ticker = await self.bot.bybit_connector.get_ticker(symbol)
-            if not ticker:
+            # Live orderbook (REST fallback inside engine)
+            book = await self.engine.get_book(symbol)
+            if not book:
                 return self._empty_result(symbol)
 
-            current_price = float(ticker.get("lastPrice", 0))
-
-            # Get orderbook (L2 depth)
-            orderbook = await self._get_orderbook(symbol)
-            if not orderbook:
-                return self._empty_result(symbol)
+            current_price = book.mid
 
             # Analyze bids and asks
-            bid_analysis = self._analyze_side(
-                orderbook["bids"], current_price, side="bid"
-            )
-            ask_analysis = self._analyze_side(
-                orderbook["asks"], current_price, side="ask"
-            )
+            bid_analysis = self._analyze_side(book.bids, current_price)
+            ask_analysis = self._analyze_side(book.asks, current_price)
 
             # Calculate totals and imbalance
             total_bid = bid_analysis["total_usd"]
@@ -86,7 +81,10 @@ class LiquidityDepthAnalyzer:
 
             # Find key levels
             key_levels = self._find_key_levels(
-                bid_analysis["walls"], ask_analysis["walls"], current_price
+                bid_analysis["walls"],
+                ask_analysis["walls"],
+                self._nearest_wall(book.bids, current_price),
+                self._nearest_wall(book.asks, current_price),
             )
 
             result = {
@@ -100,6 +98,7 @@ class LiquidityDepthAnalyzer:
                 "bid_walls": bid_analysis["walls"],
                 "ask_walls": ask_analysis["walls"],
                 "key_levels": key_levels,
+                "depth_bps": book.depth_bps(LIQUIDITY_ENGINE_CONFIG["depth_bps"]),
             }
 
             # Cache result
@@ -112,26 +111,18 @@ class LiquidityDepthAnalyzer:
             logger.error(f"analyze_liquidity error: {e}", exc_info=True)
             return self._empty_result(symbol)
 
-    async def _get_orderbook(self, symbol: str, limit: int = 50) -> Optional[Dict]:
-        """Get L2 orderbook from exchange"""
-        try:
-            # Try Bybit first
-            orderbook = await self.bot.bybit_connector.get_orderbook(symbol, limit=limit)
-            if orderbook and "bids" in orderbook and "asks" in orderbook:
-                return orderbook
-
-            # Fallback to Binance if needed
-            # orderbook = await self.bot.binance_connector.get_orderbook(symbol, limit=limit)
-
-            return None
-
-        except Exception as e:
-            logger.error(f"_get_orderbook error: {e}")
-            return None
+    def _wall(self, side: DepthSide, idx: int, current_price: float) -> Dict:
+        """Wall dict for level idx of side"""
+        price = float(side.prices[idx])
+        size_usd = float(side.notional[idx])
+        return {
+            "price": price,
+            "size_usd": size_usd,
+            "is_whale": size_usd >= self.whale_threshold_usd,
+            "distance_pct": ((price - current_price) / current_price) * 100,
+        }
 
-    def _analyze_side(
-        self, orders: List[List], current_price: float, side: str
-    ) -> Dict:
+    def _analyze_side(self, side: DepthSide, current_price: float) -> Dict:
         """
         Analyze one side of orderbook (bids or asks)
 
@@ -145,79 +136,37 @@ class LiquidityDepthAnalyzer:
             }
         """
         try:
-            total_usd = 0
-            walls = []
-
-            for order in orders:
-                price = float(order[0])
-                size = float(order[1])
-                size_usd = price * size
-
-                total_usd += size_usd
-
-                # Check if significant level
-                if size_usd >= self.significant_level_threshold:
-                    is_whale = size_usd >= self.whale_threshold_usd
-
-                    walls.append({
-                        "price": price,
-                        "size_usd": size_usd,
-                        "is_whale": is_whale,
-                        "distance_pct": ((price - current_price) / current_price) * 100,
-                    })
-
-            # Sort walls by size (descending)
-            walls.sort(key=lambda x: x["size_usd"], reverse=True)
-
+            # Top 10 walls, sorted by size (descending)
+            walls = side.walls(self.significant_level_threshold, limit=10)
             return {
-                "total_usd": total_usd,
-                "walls": walls[:10],  # Top 10 walls
+                "total_usd": side.total_usd,
+                "walls": [self._wall(side, idx, current_price) for idx in walls.tolist()],
             }
 
         except Exception as e:
             logger.error(f"_analyze_side error: {e}")
             return {"total_usd": 0, "walls": []}
 
+    def _nearest_wall(self, side: DepthSide, current_price: float) -> Optional[Dict]:
+        """Closest significant level to the price on this side"""
+        idx = side.nearest_wall(self.significant_level_threshold)
+        return self._wall(side, idx, current_price) if idx is not None else None
+
     def _find_key_levels(
-        self, bid_walls: List[Dict], ask_walls: List[Dict], current_price: float
+        self,
+        bid_walls: List[Dict],
+        ask_walls: List[Dict],
+        nearest_support: Optional[Dict],
+        nearest_resistance: Optional[Dict],
     ) -> Dict:
         """Find strongest support/resistance levels"""
-        try:
-            strongest_support = None
-            strongest_resistance = None
-            nearest_support = None
-            nearest_resistance = None
-
-            # Find strongest support (largest bid wall)
-            if bid_walls:
-                strongest_support = bid_walls[0]  # Already sorted by size
-
-                # Find nearest support
-                for wall in bid_walls:
-                    if wall["price"] < current_price:
-                        nearest_support = wall
-                        break
-
-            # Find strongest resistance (largest ask wall)
-            if ask_walls:
-                strongest_resistance = ask_walls[0]
-
-                # Find nearest resistance
-                for wall in ask_walls:
-                    if wall["price"] > current_price:
-                        nearest_resistance = wall
-                        break
-
-            return {
-                "strongest_support": strongest_support,
-                "strongest_resistance": strongest_resistance,
-                "nearest_support": nearest_support,
-                "nearest_resistance": nearest_resistance,
-            }
-
-        except Exception as e:
-            logger.error(f"_find_key_levels error: {e}")
-            return {}
+        return {
+            # Walls are already sorted by size
+            "strongest_support": bid_walls[0] if bid_walls else None,
+            "strongest_resistance": ask_walls[0] if ask_walls else None,
+            "nearest_support": nearest_support,
+            "nearest_resistance": nearest_resistance,
+        }
 
     def format_liquidity_analysis(self, result: Dict) -> str:
         """Format liquidity analysis for Telegram"""
@@ -299,6 +248,18 @@ class LiquidityDepthAnalyzer:
 
                 lines.append("")
 
+            # Depth around mid
+            depth_bps = result.get("depth_bps") or {}
+            if depth_bps:
+                lines.append("📏 DEPTH FROM MID")
+                for i, (bps, (bid_usd, ask_usd)) in enumerate(depth_bps.items()):
+                    prefix = "└─" if i == len(depth_bps) - 1 else "├─"
+                    lines.append(
+                        f"{prefix} ±{bps}bps: BID ${bid_usd/1_000_000:.1f}M / "
+                        f"ASK ${ask_usd/1_000_000:.1f}M"
+                    )
+                lines.append("")
+
             # Interpretation
             lines.append("💡 INTERPRETATION:")
             if imbalance_pct > 5:
@@ -345,4 +306,5 @@ class LiquidityDepthAnalyzer:
             "bid_walls": [],
             "ask_walls": [],
             "key_levels": {},
+            "depth_bps": {},
         }
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquidity Engine - глубина, slippage и стены по живым стаканам
+Каждая сторона книги хранится массивами NumPy с накопленной глубиной
+(cum qty / cum USD): slippage для любого объёма, глубина в пределах
+X bps и объём зоны — это searchsorted, а не обход уровней в Python.
+Книги берутся из WebSocket (Bybit / Binance / OKX / Coinbase) и
+пересобираются только при обновлении; есть сводный стакан по биржам.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import logger, LIQUIDITY_ENGINE_CONFIG
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+_EMPTY = np.empty(0, dtype=np.float64)
+
+
+class DepthSide:
+    """
+    Одна сторона стакана (bids или asks), лучшая цена первой
+
+    Массивы одной длины: prices, sizes, notional (USD),
+    cum_qty / cum_usd — накопленная глубина от лучшей цены.
+    """
+
+    __slots__ = ("is_bid", "prices", "sizes", "notional", "cum_qty", "cum_usd", "_keys")
+
+    def __init__(self, prices: np.ndarray, sizes: np.ndarray, is_bid: bool):
+        """
+        Args:
+            prices: Цены, отсортированные от лучшей (bids — по убыванию)
+            sizes: Объёмы уровней (base)
+            is_bid: Сторона покупок
+        """
+        self.is_bid = is_bid
+        self.prices = prices
+        self.sizes = sizes
+        self.notional = prices * sizes
+        self.cum_qty = np.cumsum(sizes)
+        self.cum_usd = np.cumsum(self.notional)
+        # Возрастающий ключ для searchsorted (для bids — цена со знаком минус)
+        self._keys = -prices if is_bid else prices
+
+    @classmethod
+    def from_arrays(cls, prices: np.ndarray, sizes: np.ndarray, is_bid: bool) -> "DepthSide":
+        """Из несортированных массивов: пустые уровни отбрасываются"""
+        prices = np.asarray(prices, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        mask = (sizes > 0) & (prices > 0)
+        if not mask.all():
+            prices, sizes = prices[mask], sizes[mask]
+        order = np.argsort(-prices if is_bid else prices, kind="stable")
+        return cls(prices[order], sizes[order], is_bid)
+
+    @classmethod
+    def from_levels(cls, levels: Sequence, is_bid: bool) -> "DepthSide":
+        """
+        Из уровней [[price, size, ...], ...] (float или строки REST)
+
+        Args:
+            levels: Уровни стакана в любом порядке
+            is_bid: Сторона покупок
+        """
+        if not levels:
+            return cls(_EMPTY, _EMPTY, is_bid)
+        table = np.array([level[:2] for level in levels], dtype=np.float64)
+        return cls.from_arrays(table[:, 0], table[:, 1], is_bid)
+
+    @classmethod
+    def from_mapping(cls, levels: Dict[float, float], is_bid: bool) -> "DepthSide":
+        """Из словаря {price: size} (Coinbase)"""
+        count = len(levels)
+        prices = np.fromiter(levels.keys(), dtype=np.float64, count=count)
+        sizes = np.fromiter(levels.values(), dtype=np.float64, count=count)
+        return cls.from_arrays(prices, sizes, is_bid)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def best(self) -> Optional[float]:
+        """Лучшая цена стороны"""
+        return float(self.prices[0]) if len(self.prices) else None
+
+    @property
+    def total_usd(self) -> float:
+        return float(self.cum_usd[-1]) if len(self.cum_usd) else 0.0
+
+    @property
+    def total_qty(self) -> float:
+        return float(self.cum_qty[-1]) if len(self.cum_qty) else 0.0
+
+    # ==================== SLIPPAGE ====================
+
+    def fill(self, notional_usd) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Исполнение рыночного ордера на notional_usd (скаляр или массив)
+
+        Returns:
+            (средняя цена, объём в base); NaN — ликвидности не хватает
+        """
+        notional_usd = np.asarray(notional_usd, dtype=np.float64)
+        count = len(self.cum_usd)
+        if not count:
+            return np.full(notional_usd.shape, np.nan), np.full(notional_usd.shape, np.nan)
+
+        idx = np.searchsorted(self.cum_usd, notional_usd, side="left")
+        ok = idx < count
+        safe = np.minimum(idx, count - 1)
+
+        # Полностью съеденные уровни [0, safe) + часть уровня safe
+        prev_usd = np.where(safe > 0, self.cum_usd[safe - 1], 0.0)
+        prev_qty = np.where(safe > 0, self.cum_qty[safe - 1], 0.0)
+        qty = prev_qty + (notional_usd - prev_usd) / self.prices[safe]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_price = np.where(ok & (qty > 0), notional_usd / qty, np.nan)
+        return avg_price, np.where(ok, qty, np.nan)
+
+    def slippage(self, sizes_usd: Iterable[float]) -> Dict[float, Optional[float]]:
+        """
+        Проскальзывание (%) от лучшей цены для каждого размера ордера
+
+        Returns:
+            {size_usd: slippage_pct или None, если ликвидности не хватает}
+        """
+        sizes_usd = list(sizes_usd)
+        best = self.best
+        if not best:
+            return {size: None for size in sizes_usd}
+
+        avg_price, _ = self.fill(sizes_usd)
+        slippage = np.abs(avg_price - best) / best * 100
+        return {
+            size: (None if np.isnan(value) else float(value))
+            for size, value in zip(sizes_usd, slippage.tolist())
+        }
+
+    # ==================== ГЛУБИНА И ЗОНЫ ====================
+
+    def _count_to(self, price: float) -> int:
+        """Число уровней не хуже price"""
+        key = -price if self.is_bid else price
+        return int(np.searchsorted(self._keys, key, side="right"))
+
+    def depth_to(self, price: float) -> float:
+        """USD на уровнях от лучшей цены до price включительно"""
+        n = self._count_to(price)
+        return float(self.cum_usd[n - 1]) if n else 0.0
+
+    def depth_within_bps(self, bps: float, reference: Optional[float] = None) -> float:
+        """
+        USD в пределах bps от reference (по умолчанию — лучшая цена)
+
+        Args:
+            bps: Ширина окна в базисных пунктах
+            reference: Опорная цена (mid, last)
+        """
+        reference = reference or self.best
+        if not reference:
+            return 0.0
+        shift = reference * bps / 10_000
+        return self.depth_to(reference - shift if self.is_bid else reference + shift)
+
+    def range_usd(self, low: float, high: float) -> float:
+        """USD уровней с low <= price <= high"""
+        if self.is_bid:
+            start = np.searchsorted(self._keys, -high, side="left")
+            end = np.searchsorted(self._keys, -low, side="right")
+        else:
+            start = np.searchsorted(self._keys, low, side="left")
+            end = np.searchsorted(self._keys, high, side="right")
+        if end <= start:
+            return 0.0
+        before = self.cum_usd[start - 1] if start else 0.0
+        return float(self.cum_usd[end - 1] - before)
+
+    def peak(self, low: float, high: float) -> Optional[float]:
+        """Цена крупнейшего уровня с low <= price <= high (None — уровней нет)"""
+        if self.is_bid:
+            start = np.searchsorted(self._keys, -high, side="left")
+            end = np.searchsorted(self._keys, -low, side="right")
+        else:
+            start = np.searchsorted(self._keys, low, side="left")
+            end = np.searchsorted(self._keys, high, side="right")
+        if end <= start:
+            return None
+        return float(self.prices[start + int(np.argmax(self.notional[start:end]))])
+
+    def largest(self, n: int) -> np.ndarray:
+        """Индексы n крупнейших уровней по USD (по убыванию, при равенстве — ближе к цене)"""
+        count = len(self.notional)
+        if n <= 0 or not count:
+            return np.empty(0, dtype=np.intp)
+        if n < count:
+            # Порог n-го значения, затем стабильная сортировка кандидатов
+            threshold = np.partition(self.notional, count - n)[count - n]
+            candidates = np.flatnonzero(self.notional >= threshold)
+        else:
+            candidates = np.arange(count)
+        order = np.argsort(-self.notional[candidates], kind="stable")
+        return candidates[order][:n]
+
+    def walls(self, min_usd: float, limit: Optional[int] = None) -> np.ndarray:
+        """Индексы уровней >= min_usd, по убыванию размера"""
+        idx = np.flatnonzero(self.notional >= min_usd)
+        order = np.argsort(-self.notional[idx], kind="stable")
+        return idx[order][:limit]
+
+    def nearest_wall(self, min_usd: float) -> Optional[int]:
+        """Индекс ближайшего к лучшей цене уровня >= min_usd"""
+        mask = self.notional >= min_usd
+        return int(np.argmax(mask)) if mask.any() else None
+
+
+class LiquidityBook:
+    """Стакан одного символа: bids + asks и источник(и)"""
+
+    __slots__ = ("symbol", "bids", "asks", "timestamp", "sources")
+
+    def __init__(
+        self,
+        symbol: str,
+        bids: DepthSide,
+        asks: DepthSide,
+        timestamp=None,
+        sources: Tuple[str, ...] = (),
+    ):
+        self.symbol = symbol
+        self.bids = bids
+        self.asks = asks
+        self.timestamp = timestamp
+        self.sources = sources
+
+    @classmethod
+    def from_orderbook(cls, symbol: str, orderbook: Dict, source: str) -> "LiquidityBook":
+        """
+        Из dict стакана коннектора
+
+        Args:
+            orderbook: {"bids": [[p, q, ...]] или {p: q}, "asks": ..., "timestamp": ...}
+            source: Имя биржи
+        """
+        sides = []
+        for key, is_bid in (("bids", True), ("asks", False)):
+            levels = orderbook.get(key) or []
+            if isinstance(levels, dict):
+                sides.append(DepthSide.from_mapping(levels, is_bid))
+            else:
+                sides.append(DepthSide.from_levels(levels, is_bid))
+        return cls(symbol, sides[0], sides[1], orderbook.get("timestamp"), (source,))
+
+    def __bool__(self) -> bool:
+        return bool(len(self.bids) and len(self.asks))
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not self:
+            return None
+        return (self.bids.best + self.asks.best) / 2
+
+    @property
+    def spread(self) -> float:
+        return self.asks.best - self.bids.best if self else 0.0
+
+    def poc(self) -> Optional[float]:
+        """Point of Control: цена уровня с максимальным USD на обеих сторонах"""
+        candidates = [(side.notional.max(), side) for side in (self.bids, self.asks) if len(side)]
+        if not candidates:
+            return None
+        # При равенстве — bids (как max() по bids + asks)
+        _, side = max(candidates, key=lambda item: item[0])
+        return float(side.prices[int(np.argmax(side.notional))])
+
+    def depth_bps(self, bps_list: Iterable[float]) -> Dict[float, Tuple[float, float]]:
+        """{bps: (bid USD, ask USD)} в пределах bps от mid"""
+        mid = self.mid
+        return {
+            bps: (self.bids.depth_within_bps(bps, mid), self.asks.depth_within_bps(bps, mid))
+            for bps in bps_list
+        }
+
+
+def consolidate(symbol: str, books: List[LiquidityBook]) -> LiquidityBook:
+    """
+    Сводный стакан нескольких бирж: объёмы одинаковых цен суммируются
+
+    Котировки USD и USDT считаются эквивалентными; книги бирж могут
+    пересекаться (лучший bid одной выше лучшего ask другой) — это
+    сохраняется как есть.
+    """
+    sides = []
+    for attr, is_bid in (("bids", True), ("asks", False)):
+        prices = np.concatenate([getattr(b, attr).prices for b in books])
+        sizes = np.concatenate([getattr(b, attr).sizes for b in books])
+        unique, inverse = np.unique(prices, return_inverse=True)
+        sides.append(DepthSide.from_arrays(unique, np.bincount(inverse, weights=sizes), is_bid))
+
+    sources = tuple(source for b in books for source in b.sources)
+    return LiquidityBook(symbol, sides[0], sides[1], None, sources)
+
+
+def _same_version(cached: tuple, version: tuple) -> bool:
+    """Версия кэша совпадает: объекты по ссылке, timestamp по значению"""
+    return len(cached) == len(version) and all(
+        old is new or (isinstance(new, (int, float, str)) and old == new)
+        for old, new in zip(cached, version)
+    )
+
+
+class LiquidityEngine:
+    """
+    Книги ликвидности по живым WebSocket стаканам бота
+
+    Features:
+    - Кэш DepthSide по (биржа, символ): пересборка только при новом стакане
+    - Сводный стакан по нескольким биржам
+    - REST fallback (Bybit), если живой книги нет
+    """
+
+    def __init__(self, bot=None):
+        self.bot = bot
+        self.exchanges: Tuple[str, ...] = tuple(LIQUIDITY_ENGINE_CONFIG["exchanges"])
+
+        # (exchange, symbol) → (version, LiquidityBook); version держит ссылки на исходные объекты
+        self._books: Dict[Tuple[str, str], Tuple[tuple, LiquidityBook]] = {}
+
+        self.stats = {"hits": 0, "builds": 0, "consolidated": 0, "rest_fallbacks": 0}
+
+        get_metrics_registry().register_collector(
+            "liquidity_engine", stats_collector("liquidity_engine", lambda: self.stats)
+        )
+        logger.info("✅ LiquidityEngine инициализирован")
+
+    @staticmethod
+    def venue_symbol(exchange: str, symbol: str) -> str:
+        """BTCUSDT → формат биржи (OKX: BTC-USDT, Coinbase: BTC-USD)"""
+        base = symbol[:-4] if symbol.endswith("USDT") else symbol
+        if exchange == "okx":
+            return f"{base}-USDT"
+        if exchange == "coinbase":
+            return f"{base}-USD"
+        return symbol
+
+    def _raw_orderbook(self, exchange: str, symbol: str) -> Optional[Dict]:
+        """Живой стакан из WebSocket кэша коннектора"""
+        bot = self.bot
+        if bot is None:
+            return None
+
+        if exchange == "bybit":
+            for ws in getattr(bot, "orderbook_ws_list", None) or ():
+                if ws.symbol == symbol:
+                    return ws.get_orderbook()
+            return None
+
+        if exchange == "binance":
+            ws = getattr(bot, "binance_orderbook_ws", None)
+            return ws.get_orderbook(symbol) if ws else None
+
+        connector = getattr(bot, f"{exchange}_connector", None)
+        if connector is None:
+            return None
+        return getattr(connector, "orderbooks", {}).get(self.venue_symbol(exchange, symbol))
+
+    def live_book(self, symbol: str, exchange: str = "bybit") -> Optional[LiquidityBook]:
+        """
+        Книга символа по живому стакану биржи
+
+        Returns:
+            LiquidityBook или None, если стакана нет / одна из сторон пуста
+        """
+        raw = self._raw_orderbook(exchange, symbol)
+        if not raw or not raw.get("bids") or not raw.get("asks"):
+            return None
+
+        # Коннекторы заменяют списки уровней (или timestamp) при каждом обновлении.
+        # Кэш держит ссылки на сами списки: id освобождённого объекта переиспользуется
+        version = (raw["bids"], raw["asks"], raw.get("timestamp"))
+        key = (exchange, symbol)
+        cached = self._books.get(key)
+        if cached is not None and _same_version(cached[0], version):
+            self.stats["hits"] += 1
+            return cached[1]
+
+        book = LiquidityBook.from_orderbook(symbol, raw, exchange)
+        self._books[key] = (version, book)
+        self.stats["builds"] += 1
+        return book
+
+    def consolidated(
+        self, symbol: str, exchanges: Optional[Iterable[str]] = None
+    ) -> Optional[LiquidityBook]:
+        """
+        Сводный стакан символа по всем доступным живым книгам
+
+        Args:
+            exchanges: Биржи (по умолчанию LIQUIDITY_ENGINE_CONFIG['exchanges'])
+        """
+        books = [
+            book
+            for exchange in (exchanges or self.exchanges)
+            if (book := self.live_book(symbol, exchange))
+        ]
+        if len(books) <= 1:
+            return books[0] if books else None
+
+        version = tuple(books)
+        key = ("consolidated", symbol)
+        cached = self._books.get(key)
+        if cached is not None and _same_version(cached[0], version):
+            self.stats["hits"] += 1
+            return cached[1]
+
+        book = consolidate(symbol, books)
+        self._books[key] = (version, book)
+        self.stats["consolidated"] += 1
+        return book
+
+    async def get_book(
+        self, symbol: str, exchange: str = "bybit", consolidated: bool = False
+    ) -> Optional[LiquidityBook]:
+        """
+        Книга для анализа: живая (или сводная), иначе REST стакан Bybit
+
+        Args:
+            symbol: Торговая пара (BTCUSDT)
+            exchange: Биржа живой книги
+            consolidated: Сводный стакан по всем биржам
+        """
+        book = self.consolidated(symbol) if consolidated else self.live_book(symbol, exchange)
+        if book:
+            return book
+
+        connector = getattr(self.bot, "bybit_connector", None)
+        if connector is None:
+            return None
+
+        orderbook = await connector.get_orderbook(symbol, limit=LIQUIDITY_ENGINE_CONFIG["rest_depth"])
+        if not orderbook:
+            return None
+
+        self.stats["rest_fallbacks"] += 1
+        book = LiquidityBook.from_orderbook(symbol, orderbook, "bybit_rest")
+        return book if book else None
+
+
+# Экспорт
+__all__ = ["DepthSide", "LiquidityBook", "LiquidityEngine", "consolidate"]
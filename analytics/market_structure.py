@@ -7,6 +7,7 @@ Wyckoff Method, Market Phases, Smart Money Concepts
 
 import numpy as np
 from typing import List, Dict, Optional
+from analytics.level_engine import LevelBook, LevelSource, get_level_engine
 from config.settings import logger
 
 
@@ -210,6 +211,7 @@ class MarketStructureAnalyzer:
         closes: List[float],
         volumes: List[float],
         lookback: int = 50,
+        symbol: Optional[str] = None,
     ) -> Dict:
         """
         Обнаружение зон ликвидности (Smart Money Concepts)
@@ -220,6 +222,7 @@ class MarketStructureAnalyzer:
             closes: Цены закрытия
             volumes: Объёмы
             lookback: Период анализа
+            symbol: Торговая пара — зоны публикуются в общую книгу уровней
 
         Returns:
             Dict с зонами ликвидности
@@ -233,37 +236,47 @@ class MarketStructureAnalyzer:
             recent_closes = closes[-lookback:]
             recent_volumes = volumes[-lookback:]
 
-            zones = []
-
             # Находим зоны с высокими объёмами
             volume_threshold = np.percentile(recent_volumes, 75)  # Топ 25%
 
+            # Близкие зоны (1%) сливаются в книге: границы расширяются, объём суммируется
+            book = LevelBook(tolerance_pct=1.0, atr_multiplier=0.0, max_levels=lookback + 1)
             for i in range(len(recent_volumes)):
                 if recent_volumes[i] > volume_threshold:
                     # Это зона с высокой активностью
                     zone_high = recent_highs[i]
                     zone_low = recent_lows[i]
-                    zone_mid = (zone_high + zone_low) / 2
-
-                    zones.append(
-                        {
-                            "price": round(zone_mid, 2),
-                            "high": round(zone_high, 2),
-                            "low": round(zone_low, 2),
-                            "volume": round(recent_volumes[i], 2),
-                            "type": "high_volume_node",
-                        }
+                    book.add(
+                        (zone_high + zone_low) / 2,
+                        LevelSource.VOLUME_PROFILE,
+                        recent_volumes[i] / volume_threshold if volume_threshold > 0 else 1.0,
+                        now=0.0,
+                        low=zone_low,
+                        high=zone_high,
+                        volume=recent_volumes[i],
                     )
 
-            # Убираем дубликаты (близкие зоны)
-            unique_zones = []
-            for zone in sorted(zones, key=lambda x: x["price"]):
-                if (
-                    not unique_zones
-                    or abs(zone["price"] - unique_zones[-1]["price"])
-                    > zone["price"] * 0.01
-                ):
-                    unique_zones.append(zone)
+            unique_zones = [
+                {
+                    "price": round(level.price, 2),
+                    "high": round(level.high, 2),
+                    "low": round(level.low, 2),
+                    "volume": round(level.volume, 2),
+                    "type": "high_volume_node",
+                }
+                for level in book.levels
+            ]
+
+            if symbol:
+                shared = get_level_engine().book(symbol)
+                for level in book.levels:
+                    shared.add(
+                        level.price,
+                        LevelSource.VOLUME_PROFILE,
+                        level.strength(0.0, book.half_lives),
+                        low=level.low,
+                        high=level.high,
+                    )
 
             # Определяем текущую зону
             current_price = recent_closes[-1]
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict, deque
 import re
 from config.settings import logger
+from utils.performance import run_blocking
 
 # ML/NLP Libraries
 try:
@@ -99,7 +100,8 @@ class MLSentimentAnalyzer:
             # 1. FinBERT (ProsusAI/finbert)
             try:
                 logger.info("📥 Загрузка FinBERT...")
-                self.finbert_pipeline = pipeline(
+                self.finbert_pipeline = await run_blocking(
+                    pipeline,
                     "sentiment-analysis",
                     model="ProsusAI/finbert",
                     device=0 if self.use_gpu else -1,
@@ -113,7 +115,8 @@ class MLSentimentAnalyzer:
             # 2. Crypto-BERT (ElKulako/cryptobert)
             try:
                 logger.info("📥 Загрузка CryptoBERT...")
-                self.crypto_bert_pipeline = pipeline(
+                self.crypto_bert_pipeline = await run_blocking(
+                    pipeline,
                     "sentiment-analysis",
                     model="ElKulako/cryptobert",
                     device=0 if self.use_gpu else -1,
@@ -235,11 +238,12 @@ class MLSentimentAnalyzer:
             return {"mean": 0.0, "std": 0.0, "scores": []}
 
         try:
-            scores = []
-            for text in texts[:50]:  # Limit для performance
-                text_truncated = text[:512]
-                result = self.finbert_pipeline(text_truncated)[0]
+            # Inference блокирует loop → батчем в executor
+            batch = [text[:512] for text in texts[:50]]  # Limit для performance
+            results = await run_blocking(self.finbert_pipeline, batch) if batch else []
 
+            scores = []
+            for result in results:
                 label = result["label"].lower()
                 confidence = result["score"]
 
@@ -268,11 +272,12 @@ class MLSentimentAnalyzer:
             return {"mean": 0.0, "std": 0.0, "scores": []}
 
         try:
-            scores = []
-            for text in texts[:50]:
-                text_truncated = text[:512]
-                result = self.crypto_bert_pipeline(text_truncated)[0]
+            # Inference блокирует loop → батчем в executor
+            batch = [text[:512] for text in texts[:50]]
+            results = await run_blocking(self.crypto_bert_pipeline, batch) if batch else []
 
+            scores = []
+            for result in results:
                 label = result["label"].lower()
                 confidence = result["score"]
 
@@ -5,7 +5,6 @@ Multi-Timeframe Analyzer v2.0
 Полный анализ трендов с ADX, EMA, MACD, RSI
 """
 
-from datetime import datetime
 from typing import Dict, Optional
 from config.settings import logger
 from utils.error_logger import ErrorLogger
@@ -34,60 +33,18 @@ class MultiTimeframeAnalyzer:
             interval: Таймфрейм (1h, 4h, 1d)
 
         Returns:
-            Словарь с результатами анализа или None
+            Словарь с результатами анализа (MTFTrendService) или None
         """
         try:
-            # ✅ МАППИНГ ТАЙМФРЕЙМОВ ДЛЯ BYBIT КЭША
-            timeframe_map = {
-                "1h": "60",
-                "4h": "240",
-                "1d": "D"
-            }
-
-            bybit_interval = timeframe_map.get(interval.lower(), interval)
-
-            # ✅ ПОЛУЧАЕМ СВЕЧИ ИЗ КЭША
-            cache_key = f"{symbol}:{bybit_interval}"
-            cached_data = self.bybit_connector.klines_cache.get(cache_key)
-
-            if not cached_data or "candles" not in cached_data:
-                logger.warning(f"⚠️ Нет данных свечей для {symbol} ({interval})")
-                return None
-
-            candles = cached_data["candles"]
+            # ✅ ОБЩИЙ ТРЕНД: пересчёт только на закрытии нового бара
+            from analytics.mtf_trend_service import get_mtf_trend_service
 
-            # ВАЛИДАЦИЯ
-            if not candles or len(candles) < 50:
-                logger.debug(f"⚠️ Недостаточно свечей для {symbol} ({interval}): {len(candles) if candles else 0}")
+            state = await get_mtf_trend_service(self.bybit_connector).get_trend(symbol, interval)
+            if state is None:
+                logger.debug(f"⚠️ Недостаточно свечей для {symbol} ({interval})")
                 return None
 
-            # ✅ РАСЧЁТ ВСЕХ ИНДИКАТОРОВ
-            rsi = self.calculate_rsi(candles, period=14)
-            adx = self.calculate_adx(candles, period=14)
-            ema_20 = self.calculate_ema(candles, period=20)
-            ema_50 = self.calculate_ema(candles, period=50)
-            macd_data = self.calculate_macd(candles)
-
-            current_price = float(candles[-1]["close"])
-
-            # ✅ ОПРЕДЕЛЕНИЕ ТРЕНДА
-            trend, strength = self._determine_trend(
-                current_price, ema_20, ema_50, rsi, adx, macd_data
-            )
-
-            return {
-                "symbol": symbol,
-                "interval": interval,
-                "trend": trend,
-                "strength": strength,
-                "rsi": rsi,
-                "adx": adx,
-                "ema_20": ema_20,
-                "ema_50": ema_50,
-                "macd": macd_data,
-                "price": current_price,
-                "timestamp": datetime.now()
-            }
+            return {**state.to_dict(), "interval": interval}
 
         except Exception as e:
             ErrorLogger.log_calculation_error(
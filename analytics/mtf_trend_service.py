@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MTF Trend Service - единый тренд (symbol, timeframe) для всех MTF потребителей
+Тренд (EMA 20/50, RSI, ADX, MACD — формулы MultiTimeframeAnalyzer)
+пересчитывается только после закрытия нового бара таймфрейма и хранится
+вместе с версией входных свечей. MultiTimeframeAnalyzer,
+MultiTimeframeFilter, MultiTimeframeTrendDetector и периодическое
+обновление бота читают один и тот же результат.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.constants import TrendDirectionEnum
+from config.settings import logger, MTF_TREND_CONFIG
+from utils.helpers import current_epoch_ms
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+# timeframe → (Bybit interval, длительность бара ms)
+TIMEFRAMES: Dict[str, Tuple[str, int]] = {
+    "15m": ("15", 900_000),
+    "30m": ("30", 1_800_000),
+    "1h": ("60", 3_600_000),
+    "2h": ("120", 7_200_000),
+    "4h": ("240", 14_400_000),
+    "6h": ("360", 21_600_000),
+    "12h": ("720", 43_200_000),
+    "1d": ("D", 86_400_000),
+}
+_INTERVALS = {interval: tf for tf, (interval, _) in TIMEFRAMES.items()}
+
+_DIRECTIONS = {"BULLISH": "UP", "BEARISH": "DOWN"}
+_LABELS = {"BULLISH": "UPTREND", "BEARISH": "DOWNTREND"}
+_ENUMS = {"BULLISH": TrendDirectionEnum.BULLISH, "BEARISH": TrendDirectionEnum.BEARISH}
+
+CandleLoader = Callable[[str, str], Awaitable[Optional[List[Dict]]]]
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """1H / 60 / 1h → 1h, D / 1D → 1d"""
+    if timeframe in _INTERVALS:
+        return _INTERVALS[timeframe]
+    tf = timeframe.lower()
+    if tf not in TIMEFRAMES:
+        raise KeyError(f"Неизвестный таймфрейм: {timeframe}")
+    return tf
+
+
+def candle_ts(candle: Dict) -> int:
+    """Время открытия свечи (Bybit: timestamp, REST-фильтр: time)"""
+    return int(candle.get("timestamp", candle.get("time", 0)))
+
+
+@dataclass
+class TrendState:
+    """Тренд символа на таймфрейме по последнему закрытому бару"""
+
+    symbol: str
+    timeframe: str
+    bar_ts: int  # время открытия последнего закрытого бара (ms)
+    version: Tuple  # (bar_ts, баров, close) — версия входных свечей
+    trend: str  # BULLISH / BEARISH / NEUTRAL
+    strength: float
+    rsi: float
+    adx: float
+    ema_20: float
+    ema_50: float
+    macd: Optional[Dict]
+    price: float
+    computed_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def direction(self) -> str:
+        """UP / DOWN / NEUTRAL (MultiTimeframeFilter)"""
+        return _DIRECTIONS.get(self.trend, "NEUTRAL")
+
+    @property
+    def label(self) -> str:
+        """UPTREND / DOWNTREND / NEUTRAL (MultiTimeframeTrendDetector)"""
+        return _LABELS.get(self.trend, "NEUTRAL")
+
+    @property
+    def enum(self) -> TrendDirectionEnum:
+        """TrendDirectionEnum"""
+        return _ENUMS.get(self.trend, TrendDirectionEnum.NEUTRAL)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Формат MultiTimeframeAnalyzer.analyze()"""
+        return {
+            "symbol": self.symbol,
+            "interval": self.timeframe,
+            "trend": self.trend,
+            "strength": self.strength,
+            "rsi": self.rsi,
+            "adx": self.adx,
+            "ema_20": self.ema_20,
+            "ema_50": self.ema_50,
+            "macd": self.macd,
+            "price": self.price,
+            "bar_ts": self.bar_ts,
+            "timestamp": self.computed_at,
+        }
+
+
+class MTFTrendService:
+    """
+    Кэш трендов (symbol, timeframe) с пересчётом на закрытии бара
+
+    Features:
+    - Запрос до закрытия следующего бара — из кэша, без загрузки свечей
+    - Свечи: klines_cache коннектора, иначе get_klines / внешний загрузчик
+    - Пересчёт только при новой версии свечей (ts, количество, close)
+    - Счётчики hits / misses / recomputes / loads
+    """
+
+    def __init__(self, connector=None):
+        """
+        Args:
+            connector: Bybit коннектор (klines_cache / get_klines)
+        """
+        from analytics.mtf_analyzer import MultiTimeframeAnalyzer
+
+        self.connector = connector
+        self.limit = MTF_TREND_CONFIG["limit"]
+        self.min_bars = MTF_TREND_CONFIG["min_bars"]
+        self.recheck_ms = MTF_TREND_CONFIG["recheck_seconds"] * 1000
+
+        # Формулы индикаторов — MultiTimeframeAnalyzer
+        self._calculator = MultiTimeframeAnalyzer(None)
+
+        self._trends: Dict[Tuple[str, str], TrendState] = {}
+        # (symbol, tf) → время последней загрузки, не давшей нового бара
+        self._checked: Dict[Tuple[str, str], int] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        # Подписчики на пересчёт: listener(state, closed_candles)
+        self._listeners: List[Callable[[TrendState, List[Dict]], None]] = []
+
+        self.stats = {"hits": 0, "misses": 0, "recomputes": 0, "unchanged": 0, "loads": 0}
+
+        get_metrics_registry().register_collector(
+            "mtf_trend", stats_collector("mtf_trend", lambda: self.stats)
+        )
+        logger.info("✅ MTFTrendService инициализирован")
+
+    def subscribe(self, listener: Callable[[TrendState, List[Dict]], None]):
+        """
+        Подписка на закрытие бара: listener(state, closed_candles)
+
+        Вызывается только при пересчёте (новая версия свечей),
+        свечи — закрытые бары по возрастанию времени.
+        """
+        self._listeners.append(listener)
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def peek(self, symbol: str, timeframe: str) -> Optional[TrendState]:
+        """Последний рассчитанный тренд без загрузки свечей"""
+        return self._trends.get((symbol, normalize_timeframe(timeframe)))
+
+    def states(self) -> List[TrendState]:
+        """Все рассчитанные тренды"""
+        return list(self._trends.values())
+
+    def snapshot(self, symbol: str) -> Dict[str, TrendState]:
+        """Все рассчитанные таймфреймы символа"""
+        return {tf: state for (s, tf), state in self._trends.items() if s == symbol}
+
+    async def get_trend(
+        self,
+        symbol: str,
+        timeframe: str,
+        loader: Optional[CandleLoader] = None,
+        now_ms: Optional[int] = None,
+    ) -> Optional[TrendState]:
+        """
+        Тренд по последнему закрытому бару
+
+        Args:
+            symbol: Торговая пара
+            timeframe: 1h / 4h / 1d (или Bybit интервал 60 / 240 / D)
+            loader: Загрузчик свечей (symbol, timeframe), если нет коннектора
+            now_ms: Текущее время (ms)
+
+        Returns:
+            TrendState или None, если свечей недостаточно
+        """
+        tf = normalize_timeframe(timeframe)
+        key = (symbol, tf)
+        now_ms = now_ms or current_epoch_ms()
+        bar_ms = TIMEFRAMES[tf][1]
+        expected = now_ms // bar_ms * bar_ms - bar_ms
+
+        state = self._trends.get(key)
+        if state is not None and (
+            state.bar_ts >= expected or now_ms - self._checked.get(key, 0) < self.recheck_ms
+        ):
+            self.stats["hits"] += 1
+            return state
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Пока ждали блокировку, бар мог посчитать другой вызов
+            state = self._trends.get(key)
+            if state is not None and state.bar_ts >= expected:
+                self.stats["hits"] += 1
+                return state
+
+            candles = self._cached_candles(symbol, tf, expected)
+            if candles is None:
+                candles = await self._load(symbol, tf, loader)
+            if not candles:
+                self.stats["misses"] += 1
+                return state
+
+            state = self.update(symbol, tf, candles, now_ms)
+            if state is None or state.bar_ts < expected:
+                self._checked[key] = now_ms
+            return state
+
+    async def get_trends(
+        self,
+        symbol: str,
+        timeframes: Optional[Iterable[str]] = None,
+        loader: Optional[CandleLoader] = None,
+    ) -> Dict[str, TrendState]:
+        """Тренды по нескольким таймфреймам: {tf: TrendState}"""
+        result = {}
+        for timeframe in timeframes or MTF_TREND_CONFIG["timeframes"]:
+            state = await self.get_trend(symbol, timeframe, loader)
+            if state is not None:
+                result[timeframe] = state
+        return result
+
+    def update(
+        self, symbol: str, timeframe: str, candles: List[Dict], now_ms: Optional[int] = None
+    ) -> Optional[TrendState]:
+        """
+        Передать свечи (в любом порядке); пересчёт только при новой версии
+
+        Незакрытый бар отбрасывается.
+        """
+        tf = normalize_timeframe(timeframe)
+        key = (symbol, tf)
+        now_ms = now_ms or current_epoch_ms()
+        bar_ms = TIMEFRAMES[tf][1]
+
+        closed = sorted(
+            (candle for candle in candles if candle_ts(candle) + bar_ms <= now_ms), key=candle_ts
+        )
+        if len(closed) < self.min_bars:
+            self.stats["misses"] += 1
+            return self._trends.get(key)
+
+        last = closed[-1]
+        version = (candle_ts(last), len(closed), float(last["close"]))
+        state = self._trends.get(key)
+        if state is not None and state.version == version:
+            self.stats["unchanged"] += 1
+            return state
+
+        self.stats["misses"] += 1
+        self.stats["recomputes"] += 1
+        state = self._compute(symbol, tf, closed, version)
+        self._trends[key] = state
+        self._checked.pop(key, None)
+
+        for listener in self._listeners:
+            try:
+                listener(state, closed)
+            except Exception as e:
+                logger.debug(f"⚠️ Подписчик MTF тренда ({symbol} {tf}): {e}")
+        return state
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Сбросить тренды символа (или все)"""
+        for key in [key for key in self._trends if symbol is None or key[0] == symbol]:
+            del self._trends[key]
+            self._checked.pop(key, None)
+
+    # ==================== ВНУТРЕННИЕ ====================
+
+    def _cached_candles(self, symbol: str, tf: str, expected: int) -> Optional[List[Dict]]:
+        """Свечи из klines_cache коннектора, если загружены после закрытия бара"""
+        cache = getattr(self.connector, "klines_cache", None)
+        if not cache:
+            return None
+        interval, bar_ms = TIMEFRAMES[tf]
+        entry = cache.get(f"{symbol}:{interval}") or cache.get(f"{symbol}_{interval}")
+        if not isinstance(entry, dict) or not entry.get("candles"):
+            return None
+        # Загруженный до закрытия бар содержит промежуточный close
+        if entry.get("timestamp", 0) < expected + bar_ms:
+            return None
+        return entry["candles"]
+
+    async def _load(self, symbol: str, tf: str, loader: Optional[CandleLoader]) -> Optional[List[Dict]]:
+        """Загрузка свечей: get_klines коннектора или внешний загрузчик"""
+        self.stats["loads"] += 1
+        try:
+            if self.connector is not None and hasattr(self.connector, "get_klines"):
+                candles = await self.connector.get_klines(symbol, TIMEFRAMES[tf][0], self.limit)
+                if candles and isinstance(getattr(self.connector, "klines_cache", None), dict):
+                    self.connector.klines_cache[f"{symbol}:{TIMEFRAMES[tf][0]}"] = {
+                        "candles": candles,
+                        "timestamp": current_epoch_ms(),
+                    }
+                return candles
+            if loader is not None:
+                return await loader(symbol, tf)
+        except Exception as e:
+            logger.warning(f"⚠️ MTF свечи {symbol} {tf} недоступны: {e}")
+        return None
+
+    def _compute(self, symbol: str, tf: str, candles: List[Dict], version: Tuple) -> TrendState:
+        """Индикаторы и тренд по закрытым барам (по возрастанию времени)"""
+        calc = self._calculator
+        rsi = calc.calculate_rsi(candles, period=14)
+        adx = calc.calculate_adx(candles, period=14)
+        ema_20 = calc.calculate_ema(candles, period=20)
+        ema_50 = calc.calculate_ema(candles, period=50)
+        macd = calc.calculate_macd(candles)
+        price = float(candles[-1]["close"])
+
+        trend, strength = calc._determine_trend(price, ema_20, ema_50, rsi, adx, macd)
+        return TrendState(
+            symbol=symbol,
+            timeframe=tf,
+            bar_ts=version[0],
+            version=version,
+            trend=trend,
+            strength=strength,
+            rsi=rsi,
+            adx=adx,
+            ema_20=ema_20,
+            ema_50=ema_50,
+            macd=macd,
+            price=price,
+        )
+
+
+# ==================== SINGLETON ====================
+
+_global_mtf_trend_service: Optional[MTFTrendService] = None
+
+
+def get_mtf_trend_service(connector=None) -> MTFTrendService:
+    """
+    Получить глобальный MTFTrendService
+
+    Args:
+        connector: Bybit коннектор (подключается при первом переданном значении)
+    """
+    global _global_mtf_trend_service
+    if _global_mtf_trend_service is None:
+        _global_mtf_trend_service = MTFTrendService(connector)
+    elif connector is not None and _global_mtf_trend_service.connector is None:
+        _global_mtf_trend_service.connector = connector
+    return _global_mtf_trend_service
+
+
+# Экспорт
+__all__ = [
+    "TIMEFRAMES",
+    "TrendState",
+    "MTFTrendService",
+    "normalize_timeframe",
+    "get_mtf_trend_service",
+]
@@ -5,12 +5,12 @@ News Sentiment Analyzer для GIO Bot
 Анализ крипто-новостей с определением sentiment через AI
 """
 
-import requests
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from config.settings import logger
+from utils.http_transport import get_http_transport
+from connectors.news_store import get_news_store
 import os
-import hashlib
 
 
 class NewsSentimentAnalyzer:
@@ -28,9 +28,10 @@ class NewsSentimentAnalyzer:
         # CryptoCompare API (бесплатный, не требует API key для основных функций)
         self.cryptocompare_url = "https://min-api.cryptocompare.com/data/v2/news/"
 
-        # Кэш новостей
-        self.cache = {}
+        # Кэш запросов и sentiment статей — NewsStore (общий с
+        # UnifiedNewsConnector, переживает рестарт)
         self.cache_duration = 600  # 10 минут
+        self.news_store = get_news_store()
 
         logger.info("✅ NewsSentimentAnalyzer инициализирован")
 
@@ -47,22 +48,23 @@ class NewsSentimentAnalyzer:
         """
         try:
             # Проверяем кэш
-            cache_key = f"news_{hours}h"
-            if self._is_cached(cache_key):
+            cache_key = f"cryptocompare_sentiment_{hours}h"
+            cached = self.news_store.get_query(cache_key, max_age=self.cache_duration)
+            if cached is not None:
                 logger.debug(f"✅ Используем кэш новостей ({hours}h)")
-                return self.cache[cache_key]
+                return cached[:limit]
 
             # Запрос к CryptoCompare
             params = {"lang": "EN", "sortOrder": "latest"}
 
-            response = requests.get(self.cryptocompare_url, params=params, timeout=10)
+            data = await get_http_transport().get_json(
+                self.cryptocompare_url, params=params, timeout=10
+            )
 
-            if response.status_code != 200:
-                logger.error(f"❌ CryptoCompare API error: {response.status_code}")
+            if data is None:
+                logger.error("❌ CryptoCompare API error")
                 return []
 
-            data = response.json()
-
             # Проверяем ТОЛЬКО Response, игнорируем Message
             if data.get("Response") == "Error":
                 logger.error(
@@ -100,8 +102,8 @@ class NewsSentimentAnalyzer:
                     if len(filtered_news) >= limit:
                         break
 
-            # Кэшируем результат
-            self.cache[cache_key] = filtered_news
+            # Кэшируем результат (статьи получают news_key и сохранённый sentiment)
+            filtered_news = self.news_store.put_query(cache_key, filtered_news)
 
             logger.info(f"✅ Получено {len(filtered_news)} новостей за {hours}h")
 
@@ -129,14 +131,10 @@ class NewsSentimentAnalyzer:
             # Анализируем каждую новость через Gemini
             for news in news_list:
                 try:
-                    # ✅ КЭШИРУЕМ ПО MD5 ХЭШУ ЗАГОЛОВКА (ДЕТЕРМИНИСТИЧНЫЙ!)
-                    cache_key = (
-                        f"sentiment_{hashlib.md5(news['title'].encode()).hexdigest()}"
-                    )
-
-                    if cache_key in self.cache:
-                        news["sentiment"] = self.cache[cache_key]["sentiment"]
-                        news["sentiment_emoji"] = self.cache[cache_key]["emoji"]
+                    # ✅ SENTIMENT ХРАНИТСЯ ВМЕСТЕ СО СТАТЬЁЙ (NewsStore)
+                    cached = self.news_store.get_sentiment(news)
+                    if cached:
+                        news.update(cached)
                         logger.debug(
                             f"✅ Используем кэш sentiment для новости: {news['title'][:50]}..."
                         )
@@ -168,10 +166,9 @@ class NewsSentimentAnalyzer:
                             news["sentiment_emoji"] = "🟡"
 
                         # ✅ КЭШИРУЕМ РЕЗУЛЬТАТ
-                        self.cache[cache_key] = {
-                            "sentiment": news["sentiment"],
-                            "emoji": news["sentiment_emoji"],
-                        }
+                        self.news_store.set_sentiment(
+                            news, news["sentiment"], news["sentiment_emoji"]
+                        )
                     else:
                         # ✅ ИСПОЛЬЗУЕМ RULE-BASED FALLBACK И КЭШИРУЕМ
                         sentiment = self._rule_based_sentiment_single(news["title"])
@@ -179,10 +176,9 @@ class NewsSentimentAnalyzer:
                         news["sentiment_emoji"] = sentiment["emoji"]
 
                         # ✅ КЭШИРУЕМ FALLBACK РЕЗУЛЬТАТ
-                        self.cache[cache_key] = {
-                            "sentiment": news["sentiment"],
-                            "emoji": news["sentiment_emoji"],
-                        }
+                        self.news_store.set_sentiment(
+                            news, news["sentiment"], news["sentiment_emoji"]
+                        )
 
 
                 except Exception as e:
@@ -538,15 +534,6 @@ class NewsSentimentAnalyzer:
     ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
 
 
-    def _is_cached(self, key: str) -> bool:
-        """Проверяет актуальность кэша"""
-        if key not in self.cache:
-            return False
-
-        # Проверяем время жизни кэша
-        # (упрощённо, можно добавить timestamp tracking)
-        return True
-
     def format_news_report(self, news_list: List[Dict], overall: Dict) -> str:
         """Форматирует отчёт по новостям для Telegram"""
         if not news_list:
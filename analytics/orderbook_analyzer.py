@@ -6,7 +6,11 @@ OrderbookAnalyzer — Анализ orderbook и CVD
 
 from datetime import datetime
 from typing import Dict
+
+import numpy as np
+
 from config.settings import logger
+from core.trade_bus import TradeBatch
 
 
 class OrderbookAnalyzer:
@@ -94,6 +98,50 @@ class OrderbookAnalyzer:
         except Exception as e:
             logger.error(f"[CVD ERROR] process_trade для {symbol}: {e}", exc_info=True)
 
+    def on_trades(self, batch: TradeBatch):
+        """
+        Подписчик TradeBus: CVD по батчу сделок (суммы по символам через bincount)
+
+        Args:
+            batch: Нормализованные сделки всех бирж
+        """
+        buy = np.where(batch.side > 0, batch.qty, 0.0)
+        buys = batch.per_symbol(buy)
+        sells = batch.per_symbol(batch.qty - buy)
+        counts = batch.per_symbol(np.ones(len(batch)))
+        now = datetime.now().isoformat()
+
+        for symbol, buy_volume in buys.items():
+            sell_volume = sells[symbol]
+            entry = self.cvd_cache.get(symbol)
+            if entry is None:
+                entry = self.cvd_cache[symbol] = {
+                    "cvd": 0,
+                    "buy_volume": 0,
+                    "sell_volume": 0,
+                    "timestamp": now,
+                }
+                logger.info(f"[CVD] 🎯 Инициализирован кэш для {symbol}")
+
+            entry["buy_volume"] += buy_volume
+            entry["sell_volume"] += sell_volume
+            entry["cvd"] += buy_volume - sell_volume
+            entry["timestamp"] = now
+
+            before = self._trade_counter.get(symbol, 0)
+            after = before + int(counts[symbol])
+            self._trade_counter[symbol] = after
+
+            # Логируем раз в 500 сделок
+            if after // 500 > before // 500:
+                total_vol = entry["buy_volume"] + entry["sell_volume"]
+                cvd_pct = (entry["cvd"] / total_vol) * 100 if total_vol > 0 else 0
+                logger.info(
+                    f"📊 [CVD] {symbol}: {cvd_pct:+.2f}% | "
+                    f"Buy: ${entry['buy_volume']:,.0f} | Sell: ${entry['sell_volume']:,.0f} | "
+                    f"Trades: {after}"
+                )
+
     async def get_cvd(self, symbol: str) -> Dict:
         """
         Получить CVD данные для символа
@@ -3,16 +3,197 @@
 """
 Pattern Detector - распознавание паттернов на графиках
 Candlestick patterns, Support/Resistance, Trend Lines
+
+Каждый свечной паттерн — булева маска по всему массиву OHLC (один
+векторный проход), pivot'ы — скользящие max/min окна, касания уровней —
+searchsorted по отсортированным ценам. Близкие уровни сливаются в
+LevelBook. Результат analyze() кэшируется по (symbol, interval) до
+закрытия новой свечи, уровни публикуются в общую книгу символа.
 """
 
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from analytics.level_engine import LevelBook, LevelEngine, LevelSource, get_level_engine
 from config.settings import logger
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+# (name, type, strength, description, свечей в паттерне)
+CANDLESTICK_PATTERNS: Tuple[Tuple[str, str, str, str, int], ...] = (
+    ("Doji", "reversal", "medium", "Нерешительность рынка", 1),
+    ("Hammer", "bullish_reversal", "strong", "Сильный бычий разворот", 1),
+    ("Shooting Star", "bearish_reversal", "strong", "Сильный медвежий разворот", 1),
+    ("Bullish Engulfing", "bullish_reversal", "very_strong", "Очень сильный бычий сигнал", 2),
+    ("Bearish Engulfing", "bearish_reversal", "very_strong", "Очень сильный медвежий сигнал", 2),
+    ("Morning Star", "bullish_reversal", "very_strong", "Мощный бычий разворот", 3),
+    ("Evening Star", "bearish_reversal", "very_strong", "Мощный медвежий разворот", 3),
+)
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """Сдвиг вправо на periods баров (начало заполняется NaN)"""
+    shifted = np.full_like(values, np.nan)
+    shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def candlestick_masks(
+    opens: Sequence[float], highs: Sequence[float], lows: Sequence[float], closes: Sequence[float]
+) -> Dict[str, np.ndarray]:
+    """
+    Маски свечных паттернов по всей истории
+
+    mask[i] — паттерн завершился на свече i (для 2–3 свечных
+    паттернов первые бары всегда False).
+
+    Returns:
+        {name: bool array длины len(closes)}
+    """
+    o = np.asarray(opens, dtype=np.float64)
+    h = np.asarray(highs, dtype=np.float64)
+    l = np.asarray(lows, dtype=np.float64)
+    c = np.asarray(closes, dtype=np.float64)
+
+    body = np.abs(c - o)
+    rng = h - l
+    green = c > o
+    red = o > c
+
+    o1, c1 = _shift(o, 1), _shift(c, 1)
+    body1 = np.abs(c1 - o1)
+    o2, c2 = _shift(o, 2), _shift(c, 2)
+    range2 = _shift(rng, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        doji = (rng > 0) & (body / rng < 0.1)
+
+    small_middle = body1 < range2 * 0.3
+    return {
+        "Doji": doji,
+        "Hammer": green & (o - l > body * 2) & (h - c < body * 0.5),
+        "Shooting Star": red & (h - o > body * 2) & (c - l < body * 0.5),
+        "Bullish Engulfing": (o1 > c1) & green & (c > o1) & (o < c1) & (body > body1),
+        "Bearish Engulfing": (c1 > o1) & red & (o > c1) & (c < o1) & (body > body1),
+        "Morning Star": (o2 > c2) & small_middle & green & (c > (o2 + c2) / 2),
+        "Evening Star": (c2 > o2) & small_middle & red & (c < (o2 + c2) / 2),
+    }
+
+
+def pivot_mask(values: np.ndarray, width: int = 2, highs: bool = True) -> np.ndarray:
+    """
+    Swing-точки через скользящие max/min
+
+    Args:
+        values: Максимумы (highs=True) или минимумы
+        width: Баров с каждой стороны
+        highs: Искать максимумы (иначе минимумы)
+
+    Returns:
+        mask[i] — значение строго больше (меньше) всех соседей в ±width
+    """
+    mask = np.zeros(len(values), dtype=bool)
+    if len(values) < 2 * width + 1:
+        return mask
+
+    sign = 1.0 if highs else -1.0
+    windows = sliding_window_view(values * sign, 2 * width + 1)
+    neighbours = np.maximum(windows[:, :width].max(axis=1), windows[:, width + 1 :].max(axis=1))
+    mask[width:-width] = windows[:, width] > neighbours
+    return mask
+
+
+def count_touches(values: np.ndarray, levels: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Касания уровней: сколько values в (level·(1-threshold), level·(1+threshold))
+
+    Одна сортировка values и два searchsorted на все уровни сразу.
+    """
+    ordered = np.sort(values)
+    lower = np.searchsorted(ordered, levels * (1 - threshold), side="right")
+    upper = np.searchsorted(ordered, levels * (1 + threshold), side="left")
+    return upper - lower
 
 
 class PatternDetector:
     """Детектор графических паттернов"""
 
+    def __init__(self, engine: Optional[LevelEngine] = None):
+        """
+        Args:
+            engine: Книги уровней (по умолчанию общий LevelEngine)
+        """
+        # (symbol, interval) → (ts последней закрытой свечи, результат analyze)
+        self._cache: Dict[Tuple[str, str], Tuple[int, Dict]] = {}
+        self.engine = engine
+        self.stats = {"hits": 0, "misses": 0}
+
+        get_metrics_registry().register_collector(
+            "pattern_detector", stats_collector("pattern_detector", lambda: self.stats)
+        )
+
+    def analyze(self, symbol: str, interval: str, candles: List[Dict]) -> Dict:
+        """
+        Свечные паттерны, S/R и структура тренда по свечам символа
+
+        Повторный вызов без новой закрытой свечи возвращает кэш.
+
+        Args:
+            symbol: Торговая пара
+            interval: Таймфрейм свечей ("60", "240", ...)
+            candles: Свечи {"timestamp", "open", "high", "low", "close"} в любом порядке
+
+        Returns:
+            {"candlestick": ..., "support_resistance": ..., "trend_structure": ..., "last_close_ts": int}
+        """
+        if not candles:
+            return {}
+
+        last_ts = max(int(candle["timestamp"]) for candle in candles)
+        key = (symbol, interval)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == last_ts:
+            self.stats["hits"] += 1
+            return cached[1]
+
+        self.stats["misses"] += 1
+        ordered = sorted(candles, key=lambda candle: int(candle["timestamp"]))
+        ohlc = np.array(
+            [[candle["open"], candle["high"], candle["low"], candle["close"]] for candle in ordered],
+            dtype=np.float64,
+        )
+        o, h, l, c = ohlc.T
+
+        result = {
+            "candlestick": self.detect_candlestick_patterns(o, h, l, c),
+            "support_resistance": self.find_support_resistance(h, l, c),
+            "trend_structure": self.detect_trend_structure(h, l, c),
+            "last_close_ts": last_ts,
+        }
+        self._cache[key] = (last_ts, result)
+        self._publish_levels(symbol, h, l, c, result["support_resistance"])
+        return result
+
+    def _publish_levels(self, symbol: str, h: np.ndarray, l: np.ndarray, c: np.ndarray, levels: Dict):
+        """Pivot уровни закрытой свечи → общая книга символа (ATR 14 — допуск слияния)"""
+        if self.engine is None:
+            self.engine = get_level_engine()
+        book = self.engine.book(symbol)
+        if len(c) > 1:
+            true_range = np.maximum(h[1:], c[:-1]) - np.minimum(l[1:], c[:-1])
+            book.set_atr(float(true_range[-14:].mean()))
+        for level in levels.get("support", []) + levels.get("resistance", []):
+            weight = 3.0 if level["strength"] == "strong" else 2.0
+            book.add(level["level"], LevelSource.PIVOT, weight, touches=level["touches"])
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Сбросить кэш символа (или весь)"""
+        if symbol is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[0] == symbol]:
+            del self._cache[key]
+
     @staticmethod
     def detect_candlestick_patterns(
         opens: List[float],
@@ -32,127 +213,27 @@ class PatternDetector:
             lookback: Количество свечей для анализа
 
         Returns:
-            Dict с найденными паттернами
+            Dict с паттернами последней свечи; occurrences — число
+            срабатываний каждого паттерна по всей истории
         """
         try:
             if len(closes) < lookback:
                 return {"patterns": [], "signal": "neutral"}
 
-            patterns = []
-
-            # Последние свечи
-            o = opens[-lookback:]
-            h = highs[-lookback:]
-            l = lows[-lookback:]
-            c = closes[-lookback:]
-
-            # 1. DOJI - нерешительность
-            last_body = abs(c[-1] - o[-1])
-            last_range = h[-1] - l[-1]
-            if last_range > 0 and (last_body / last_range) < 0.1:
-                patterns.append(
-                    {
-                        "name": "Doji",
-                        "type": "reversal",
-                        "strength": "medium",
-                        "description": "Нерешительность рынка",
-                    }
-                )
-
-            # 2. HAMMER - бычий разворот
-            if c[-1] > o[-1]:  # Зелёная свеча
-                body = c[-1] - o[-1]
-                lower_shadow = o[-1] - l[-1]
-                upper_shadow = h[-1] - c[-1]
-
-                if lower_shadow > body * 2 and upper_shadow < body * 0.5:
-                    patterns.append(
-                        {
-                            "name": "Hammer",
-                            "type": "bullish_reversal",
-                            "strength": "strong",
-                            "description": "Сильный бычий разворот",
-                        }
-                    )
-
-            # 3. SHOOTING STAR - медвежий разворот
-            if o[-1] > c[-1]:  # Красная свеча
-                body = o[-1] - c[-1]
-                lower_shadow = c[-1] - l[-1]
-                upper_shadow = h[-1] - o[-1]
-
-                if upper_shadow > body * 2 and lower_shadow < body * 0.5:
-                    patterns.append(
-                        {
-                            "name": "Shooting Star",
-                            "type": "bearish_reversal",
-                            "strength": "strong",
-                            "description": "Сильный медвежий разворот",
-                        }
-                    )
-
-            # 4. ENGULFING - поглощение (2 свечи)
-            if len(c) >= 2:
-                prev_body = abs(c[-2] - o[-2])
-                curr_body = abs(c[-1] - o[-1])
-
-                # Bullish Engulfing
-                if o[-2] > c[-2] and c[-1] > o[-1]:  # Была красная, стала зелёная
-                    if c[-1] > o[-2] and o[-1] < c[-2] and curr_body > prev_body:
-                        patterns.append(
-                            {
-                                "name": "Bullish Engulfing",
-                                "type": "bullish_reversal",
-                                "strength": "very_strong",
-                                "description": "Очень сильный бычий сигнал",
-                            }
-                        )
-
-                # Bearish Engulfing
-                if c[-2] > o[-2] and o[-1] > c[-1]:  # Была зелёная, стала красная
-                    if o[-1] > c[-2] and c[-1] < o[-2] and curr_body > prev_body:
-                        patterns.append(
-                            {
-                                "name": "Bearish Engulfing",
-                                "type": "bearish_reversal",
-                                "strength": "very_strong",
-                                "description": "Очень сильный медвежий сигнал",
-                            }
-                        )
-
-            # 5. MORNING/EVENING STAR (3 свечи)
-            if len(c) >= 3:
-                # Morning Star (бычий)
-                if (
-                    o[-3] > c[-3]  # 1я свеча красная
-                    and abs(c[-2] - o[-2]) < (h[-3] - l[-3]) * 0.3  # 2я маленькая
-                    and c[-1] > o[-1]  # 3я зелёная
-                    and c[-1] > (o[-3] + c[-3]) / 2
-                ):  # Закрылась выше середины 1й
-
-                    patterns.append(
-                        {
-                            "name": "Morning Star",
-                            "type": "bullish_reversal",
-                            "strength": "very_strong",
-                            "description": "Мощный бычий разворот",
-                        }
-                    )
-
-                # Evening Star (медвежий)
-                if (
-                    c[-3] > o[-3]  # 1я свеча зелёная
-                    and abs(c[-2] - o[-2]) < (h[-3] - l[-3]) * 0.3  # 2я маленькая
-                    and o[-1] > c[-1]  # 3я красная
-                    and c[-1] < (o[-3] + c[-3]) / 2
-                ):  # Закрылась ниже середины 1й
+            masks = candlestick_masks(opens, highs, lows, closes)
 
+            patterns = []
+            occurrences = {}
+            for name, kind, strength, description, bars in CANDLESTICK_PATTERNS:
+                mask = masks[name]
+                occurrences[name] = int(mask.sum())
+                if bars <= lookback and mask[-1]:
                     patterns.append(
                         {
-                            "name": "Evening Star",
-                            "type": "bearish_reversal",
-                            "strength": "very_strong",
-                            "description": "Мощный медвежий разворот",
+                            "name": name,
+                            "type": kind,
+                            "strength": strength,
+                            "description": description,
                         }
                     )
 
@@ -170,7 +251,12 @@ class PatternDetector:
             else:
                 signal = "neutral"
 
-            return {"patterns": patterns, "signal": signal, "count": len(patterns)}
+            return {
+                "patterns": patterns,
+                "signal": signal,
+                "count": len(patterns),
+                "occurrences": occurrences,
+            }
 
         except Exception as e:
             logger.error(f"❌ Ошибка детекции паттернов: {e}")
@@ -202,89 +288,34 @@ class PatternDetector:
                 return {"support": [], "resistance": []}
 
             # Берём последние N свечей
-            recent_highs = highs[-lookback:]
-            recent_lows = lows[-lookback:]
-            current_price = closes[-1]
-
-            # Находим локальные максимумы
-            resistance_levels = []
-            for i in range(2, len(recent_highs) - 2):
-                if (
-                    recent_highs[i] > recent_highs[i - 1]
-                    and recent_highs[i] > recent_highs[i - 2]
-                    and recent_highs[i] > recent_highs[i + 1]
-                    and recent_highs[i] > recent_highs[i + 2]
-                ):
-
-                    # Считаем количество касаний
-                    touches = sum(
-                        1
-                        for h in recent_highs
-                        if abs(h - recent_highs[i]) / recent_highs[i] < touch_threshold
-                    )
-
-                    if touches >= 2:  # Минимум 2 касания
-                        resistance_levels.append(
-                            {
-                                "level": round(recent_highs[i], 2),
-                                "touches": touches,
-                                "strength": "strong" if touches >= 3 else "medium",
-                                "distance_pct": round(
-                                    ((recent_highs[i] - current_price) / current_price)
-                                    * 100,
-                                    2,
-                                ),
-                            }
-                        )
-
-            # Находим локальные минимумы
-            support_levels = []
-            for i in range(2, len(recent_lows) - 2):
-                if (
-                    recent_lows[i] < recent_lows[i - 1]
-                    and recent_lows[i] < recent_lows[i - 2]
-                    and recent_lows[i] < recent_lows[i + 1]
-                    and recent_lows[i] < recent_lows[i + 2]
-                ):
-
-                    # Считаем количество касаний
-                    touches = sum(
-                        1
-                        for l in recent_lows
-                        if abs(l - recent_lows[i]) / recent_lows[i] < touch_threshold
+            recent_highs = np.asarray(highs[-lookback:], dtype=np.float64)
+            recent_lows = np.asarray(lows[-lookback:], dtype=np.float64)
+            current_price = float(closes[-1])
+
+            def collect(values: np.ndarray, is_high: bool) -> List[Dict]:
+                pivots = values[pivot_mask(values, 2, highs=is_high)]
+                touches = count_touches(values, pivots, touch_threshold)
+
+                # Близкие уровни (в пределах порога касания) сливаются в книге
+                book = LevelBook(tolerance_pct=touch_threshold * 100, atr_multiplier=0.0, max_levels=len(pivots) + 1)
+                for level, count in zip(pivots[touches >= 2].tolist(), touches[touches >= 2].tolist()):
+                    book.add(level, LevelSource.PIVOT, touches=count, now=0.0)
+
+                levels = []
+                for merged in book.levels:
+                    distance = merged.price - current_price if is_high else current_price - merged.price
+                    levels.append(
+                        {
+                            "level": round(merged.price, 2),
+                            "touches": merged.touches,
+                            "strength": "strong" if merged.touches >= 3 else "medium",
+                            "distance_pct": round(distance / current_price * 100, 2),
+                        }
                     )
+                return levels
 
-                    if touches >= 2:  # Минимум 2 касания
-                        support_levels.append(
-                            {
-                                "level": round(recent_lows[i], 2),
-                                "touches": touches,
-                                "strength": "strong" if touches >= 3 else "medium",
-                                "distance_pct": round(
-                                    ((current_price - recent_lows[i]) / current_price)
-                                    * 100,
-                                    2,
-                                ),
-                            }
-                        )
-
-            # Убираем дубликаты (близкие уровни)
-            def remove_duplicates(levels):
-                if not levels:
-                    return []
-
-                unique = []
-                for level in sorted(levels, key=lambda x: x["level"]):
-                    if (
-                        not unique
-                        or abs(level["level"] - unique[-1]["level"]) / level["level"]
-                        > touch_threshold
-                    ):
-                        unique.append(level)
-                return unique
-
-            resistance_levels = remove_duplicates(resistance_levels)
-            support_levels = remove_duplicates(support_levels)
+            resistance_levels = collect(recent_highs, True)
+            support_levels = collect(recent_lows, False)
 
             # Сортируем по силе
             resistance_levels.sort(key=lambda x: x["touches"], reverse=True)
@@ -321,52 +352,28 @@ class PatternDetector:
             if len(closes) < lookback:
                 return {"trend": "unknown", "structure": "sideways"}
 
-            recent_highs = highs[-lookback:]
-            recent_lows = lows[-lookback:]
+            recent_highs = np.asarray(highs[-lookback:], dtype=np.float64)
+            recent_lows = np.asarray(lows[-lookback:], dtype=np.float64)
 
-            # Находим swing points (локальные экстремумы)
-            swing_highs = []
-            swing_lows = []
-
-            for i in range(2, len(recent_highs) - 2):
-                # Swing High
-                if (
-                    recent_highs[i] > recent_highs[i - 1]
-                    and recent_highs[i] > recent_highs[i + 1]
-                ):
-                    swing_highs.append(recent_highs[i])
-
-                # Swing Low
-                if (
-                    recent_lows[i] < recent_lows[i - 1]
-                    and recent_lows[i] < recent_lows[i + 1]
-                ):
-                    swing_lows.append(recent_lows[i])
+            # Swing points (локальные экстремумы ±1 бар), без двух крайних баров
+            high_mask = pivot_mask(recent_highs, 1, highs=True)
+            low_mask = pivot_mask(recent_lows, 1, highs=False)
+            high_mask[:2] = high_mask[-2:] = False
+            low_mask[:2] = low_mask[-2:] = False
+            swing_highs = recent_highs[high_mask]
+            swing_lows = recent_lows[low_mask]
 
             # Анализируем тренд
             if len(swing_highs) >= 2 and len(swing_lows) >= 2:
-                # Higher Highs и Higher Lows = Uptrend
-                hh = all(
-                    swing_highs[i] > swing_highs[i - 1]
-                    for i in range(1, len(swing_highs))
-                )
-                hl = all(
-                    swing_lows[i] > swing_lows[i - 1] for i in range(1, len(swing_lows))
-                )
+                high_steps = np.diff(swing_highs)
+                low_steps = np.diff(swing_lows)
 
+                # Higher Highs и Higher Lows = Uptrend
                 # Lower Highs и Lower Lows = Downtrend
-                lh = all(
-                    swing_highs[i] < swing_highs[i - 1]
-                    for i in range(1, len(swing_highs))
-                )
-                ll = all(
-                    swing_lows[i] < swing_lows[i - 1] for i in range(1, len(swing_lows))
-                )
-
-                if hh and hl:
+                if (high_steps > 0).all() and (low_steps > 0).all():
                     trend = "uptrend"
                     structure = "higher_highs_higher_lows"
-                elif lh and ll:
+                elif (high_steps < 0).all() and (low_steps < 0).all():
                     trend = "downtrend"
                     structure = "lower_highs_lower_lows"
                 else:
@@ -381,8 +388,8 @@ class PatternDetector:
                 "structure": structure,
                 "swing_highs_count": len(swing_highs),
                 "swing_lows_count": len(swing_lows),
-                "last_swing_high": round(swing_highs[-1], 2) if swing_highs else 0,
-                "last_swing_low": round(swing_lows[-1], 2) if swing_lows else 0,
+                "last_swing_high": round(float(swing_highs[-1]), 2) if len(swing_highs) else 0,
+                "last_swing_low": round(float(swing_lows[-1]), 2) if len(swing_lows) else 0,
             }
 
         except Exception as e:
@@ -390,5 +397,25 @@ class PatternDetector:
             return {"trend": "unknown", "structure": "error"}
 
 
+# ==================== SINGLETON ====================
+
+_global_pattern_detector: Optional[PatternDetector] = None
+
+
+def get_pattern_detector() -> PatternDetector:
+    """Получить глобальный PatternDetector (общий кэш для сканеров)"""
+    global _global_pattern_detector
+    if _global_pattern_detector is None:
+        _global_pattern_detector = PatternDetector()
+    return _global_pattern_detector
+
+
 # Экспорт
-__all__ = ["PatternDetector"]
+__all__ = [
+    "CANDLESTICK_PATTERNS",
+    "PatternDetector",
+    "candlestick_masks",
+    "pivot_mask",
+    "count_touches",
+    "get_pattern_detector",
+]
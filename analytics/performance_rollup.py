@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Performance Rollup - дневные агрегаты закрытых сигналов (SQLite)
+Таблица signal_daily_rollup по (day, symbol, scenario, direction):
+count, wins, losses, sum ROI, sum ROI², min / max, время удержания,
+качество и R/R. Строка обновляется триггером в момент закрытия сигнала,
+поэтому /stats N — сумма по строкам за N дней вместо скана signals.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.settings import logger, DATABASE_PATH
+
+
+ROLLUP_TABLE = "signal_daily_rollup"
+
+# Статусы закрытого сигнала (signal_recorder, оба ROI tracker'а)
+CLOSED_STATUSES = ("closed", "completed", "stopped")
+
+# Колонки ROI в порядке приоритета (схема signals отличается между версиями)
+ROI_COLUMNS = ("profit_percent", "roi", "current_roi")
+
+GROUP_COLUMNS = ("symbol", "scenario", "direction")
+
+CREATE_ROLLUP_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    day TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    sum_roi REAL NOT NULL DEFAULT 0,
+    sum_roi_sq REAL NOT NULL DEFAULT 0,
+    min_roi REAL,
+    max_roi REAL,
+    sum_hold_minutes REAL NOT NULL DEFAULT 0,
+    hold_count INTEGER NOT NULL DEFAULT 0,
+    sum_quality REAL NOT NULL DEFAULT 0,
+    quality_count INTEGER NOT NULL DEFAULT 0,
+    sum_rr REAL NOT NULL DEFAULT 0,
+    rr_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, symbol, scenario, direction)
+) WITHOUT ROWID
+"""
+
+# Суммы по строкам rollup (SELECT и GROUP BY по любым колонкам ключа)
+AGGREGATES = """
+    SUM(count), SUM(wins), SUM(losses), SUM(sum_roi), SUM(sum_roi_sq),
+    MIN(min_roi), MAX(max_roi), SUM(sum_hold_minutes), SUM(hold_count),
+    SUM(sum_quality), SUM(quality_count), SUM(sum_rr), SUM(rr_count)
+"""
+
+
+def _summarize(row: Sequence) -> Dict:
+    """Производные метрики из сумм rollup"""
+    count, wins, losses, sum_roi, sum_sq, min_roi, max_roi = (v or 0 for v in row[:7])
+    hold_sum, hold_n, quality_sum, quality_n, rr_sum, rr_n = (v or 0 for v in row[7:13])
+    avg_roi = sum_roi / count if count else 0.0
+    variance = sum_sq / count - avg_roi**2 if count else 0.0
+
+    return {
+        "count": count,
+        "wins": wins,
+        "losses": losses,
+        "win_rate": wins / count * 100 if count else 0.0,
+        "total_roi": sum_roi,
+        "avg_roi": avg_roi,
+        "std_roi": max(variance, 0.0) ** 0.5,
+        "min_roi": min_roi,
+        "max_roi": max_roi,
+        "avg_hold_minutes": hold_sum / hold_n if hold_n else 0.0,
+        "avg_quality": quality_sum / quality_n if quality_n else 0.0,
+        "avg_rr": rr_sum / rr_n if rr_n else 0.0,
+    }
+
+
+class PerformanceRollup:
+    """
+    Дневной rollup производительности сигналов
+
+    - ensure() создаёт таблицу и триггеры на signals (INSERT закрытого
+      сигнала и UPDATE status → закрыт) и заполняет rollup из истории
+    - summary() / extremes() читают только строки rollup за период
+    - top_signals() — лучшие / худшие сигналы по частичному индексу ROI
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: Путь к SQLite (по умолчанию DATABASE_PATH)
+        """
+        self.db_path = str(db_path or DATABASE_PATH)
+        self._ready = False
+
+    # ==================== СХЕМА ====================
+
+    def _signal_expressions(self, columns: Sequence[str], row: str) -> Dict[str, str]:
+        """SQL выражения полей rollup для строки signals (NEW или имя таблицы)"""
+
+        def column(name: str, default: str = "NULL") -> str:
+            return f"{row}.{name}" if name in columns else default
+
+        roi_columns = [f"{row}.{name}" for name in ROI_COLUMNS if name in columns]
+        roi = f"COALESCE({', '.join(roi_columns)})" if len(roi_columns) > 1 else (roi_columns or ["NULL"])[0]
+        hold = (
+            f"(julianday({row}.close_time) - julianday({row}.timestamp)) * 1440"
+            if "close_time" in columns
+            else "NULL"
+        )
+        return {
+            "day": f"date({row}.timestamp)",
+            "symbol": f"COALESCE({row}.symbol, '')",
+            "scenario": f"COALESCE({column('scenario_id')}, '')",
+            "direction": f"COALESCE({column('direction')}, 'UNKNOWN')",
+            "roi": roi,
+            "hold": hold,
+            "quality": column("quality_score"),
+            "rr": column("risk_reward"),
+        }
+
+    def _create_triggers(self, cursor: sqlite3.Cursor, columns: Sequence[str]):
+        """Триггеры инкрементального обновления (пересоздаются под текущую схему)"""
+        e = self._signal_expressions(columns, "NEW")
+        closed = ", ".join(f"'{s}'" for s in CLOSED_STATUSES)
+        upsert = f"""
+            INSERT INTO {ROLLUP_TABLE} (
+                day, symbol, scenario, direction, count, wins, losses,
+                sum_roi, sum_roi_sq, min_roi, max_roi, sum_hold_minutes, hold_count,
+                sum_quality, quality_count, sum_rr, rr_count
+            ) VALUES (
+                {e['day']}, {e['symbol']}, {e['scenario']}, {e['direction']}, 1,
+                {e['roi']} > 0, {e['roi']} < 0,
+                {e['roi']}, {e['roi']} * {e['roi']}, {e['roi']}, {e['roi']},
+                COALESCE({e['hold']}, 0), {e['hold']} IS NOT NULL,
+                COALESCE({e['quality']}, 0), {e['quality']} IS NOT NULL,
+                COALESCE({e['rr']}, 0), {e['rr']} IS NOT NULL
+            )
+            ON CONFLICT (day, symbol, scenario, direction) DO UPDATE SET
+                count = count + 1,
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                sum_roi = sum_roi + excluded.sum_roi,
+                sum_roi_sq = sum_roi_sq + excluded.sum_roi_sq,
+                min_roi = MIN(min_roi, excluded.min_roi),
+                max_roi = MAX(max_roi, excluded.max_roi),
+                sum_hold_minutes = sum_hold_minutes + excluded.sum_hold_minutes,
+                hold_count = hold_count + excluded.hold_count,
+                sum_quality = sum_quality + excluded.sum_quality,
+                quality_count = quality_count + excluded.quality_count,
+                sum_rr = sum_rr + excluded.sum_rr,
+                rr_count = rr_count + excluded.rr_count;
+        """
+
+        cursor.execute(f"DROP TRIGGER IF EXISTS {ROLLUP_TABLE}_on_insert")
+        cursor.execute(f"DROP TRIGGER IF EXISTS {ROLLUP_TABLE}_on_close")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER {ROLLUP_TABLE}_on_insert AFTER INSERT ON signals
+            WHEN NEW.status IN ({closed}) AND {e['roi']} IS NOT NULL
+            BEGIN {upsert} END
+            """
+        )
+        cursor.execute(
+            f"""
+            CREATE TRIGGER {ROLLUP_TABLE}_on_close AFTER UPDATE OF status ON signals
+            WHEN NEW.status IN ({closed})
+                AND (OLD.status IS NULL OR OLD.status NOT IN ({closed}))
+                AND {e['roi']} IS NOT NULL
+            BEGIN {upsert} END
+            """
+        )
+
+    def _backfill(self, cursor: sqlite3.Cursor, columns: Sequence[str]):
+        """Заполнить rollup по уже закрытым сигналам (один GROUP BY)"""
+        e = self._signal_expressions(columns, "signals")
+        closed = ", ".join(f"'{s}'" for s in CLOSED_STATUSES)
+        cursor.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        cursor.execute(
+            f"""
+            INSERT INTO {ROLLUP_TABLE}
+            SELECT
+                {e['day']}, {e['symbol']}, {e['scenario']}, {e['direction']},
+                COUNT(*), SUM({e['roi']} > 0), SUM({e['roi']} < 0),
+                SUM({e['roi']}), SUM({e['roi']} * {e['roi']}), MIN({e['roi']}), MAX({e['roi']}),
+                COALESCE(SUM({e['hold']}), 0), COUNT({e['hold']}),
+                COALESCE(SUM({e['quality']}), 0), COUNT({e['quality']}),
+                COALESCE(SUM({e['rr']}), 0), COUNT({e['rr']})
+            FROM signals
+            WHERE status IN ({closed}) AND {e['roi']} IS NOT NULL
+            GROUP BY 1, 2, 3, 4
+            """
+        )
+        return cursor.rowcount
+
+    def ensure(self, rebuild: bool = False) -> bool:
+        """
+        Создать rollup, триггеры и индекс ROI (идемпотентно)
+
+        Args:
+            rebuild: Пересчитать rollup из signals даже если таблица уже есть
+
+        Returns:
+            True если rollup готов (таблица signals существует)
+        """
+        if self._ready and not rebuild:
+            return True
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA table_info(signals)")
+            columns = [row[1] for row in cursor.fetchall()]
+            if not columns:
+                return False
+
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (ROLLUP_TABLE,),
+            )
+            created = cursor.fetchone() is None
+            cursor.execute(CREATE_ROLLUP_TABLE)
+            self._create_triggers(cursor, columns)
+            if created or rebuild:
+                rows = self._backfill(cursor, columns)
+                logger.info(f"📊 {ROLLUP_TABLE}: заполнено {rows} дневных строк из истории")
+
+            if "roi" in columns:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_signals_closed_roi "
+                    "ON signals(roi) WHERE status = 'closed' AND roi IS NOT NULL"
+                )
+            conn.commit()
+            self._ready = True
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"❌ Ошибка создания {ROLLUP_TABLE}: {e}")
+            return False
+        finally:
+            conn.close()
+
+    # ==================== ЗАПРОСЫ ====================
+
+    @staticmethod
+    def cutoff_day(days: int) -> str:
+        """Первый день окна /stats N"""
+        return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        if not self.ensure():
+            return []
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def summary(self, days: int = 30, by: Sequence[str] = (), scenario_only: bool = False):
+        """
+        Статистика закрытых сигналов за период
+
+        Args:
+            days: Период (дней)
+            by: Колонки группировки из (symbol, scenario, direction); () — итог
+            scenario_only: Только сигналы с scenario_id
+
+        Returns:
+            Dict метрик (by=()) или {ключ: метрики}; ключ — значение колонки
+            при одной колонке группировки, иначе кортеж
+        """
+        for column in by:
+            if column not in GROUP_COLUMNS:
+                raise ValueError(f"Unknown rollup group column: {column}")
+
+        where = "day >= ?" + (" AND scenario != ''" if scenario_only else "")
+        group = ", ".join(by)
+        rows = self._query(
+            f"SELECT {group + ',' if group else ''} {AGGREGATES} "
+            f"FROM {ROLLUP_TABLE} WHERE {where}"
+            + (f" GROUP BY {group}" if group else ""),
+            (self.cutoff_day(days),),
+        )
+
+        if not by:
+            return _summarize(rows[0] if rows else (0,) * 13)
+
+        width = len(by)
+        return {
+            (row[0] if width == 1 else tuple(row[:width])): _summarize(row[width:])
+            for row in rows
+        }
+
+    def distinct(self, days: int = 30) -> Dict[str, int]:
+        """Число символов и сценариев с закрытыми сигналами за период"""
+        rows = self._query(
+            f"SELECT COUNT(DISTINCT symbol), COUNT(DISTINCT NULLIF(scenario, '')) "
+            f"FROM {ROLLUP_TABLE} WHERE day >= ?",
+            (self.cutoff_day(days),),
+        )
+        symbols, scenarios = rows[0] if rows else (0, 0)
+        return {"symbols": symbols, "scenarios": scenarios}
+
+    def extremes(self, days: int = 30) -> Dict[str, Dict]:
+        """Лучшая и худшая сделка периода (символ и ROI)"""
+        cutoff = (self.cutoff_day(days),)
+        result = {}
+        for name, column, order in (("best", "max_roi", "DESC"), ("worst", "min_roi", "ASC")):
+            rows = self._query(
+                f"SELECT symbol, {column} FROM {ROLLUP_TABLE} "
+                f"WHERE day >= ? ORDER BY {column} {order} LIMIT 1",
+                cutoff,
+            )
+            result[name] = {"symbol": rows[0][0], "roi": rows[0][1]} if rows else None
+        return result
+
+    def top_signals(self, limit: int = 10, best: bool = True) -> List[Dict]:
+        """
+        Лучшие / худшие закрытые сигналы по ROI (частичный индекс, O(limit))
+
+        Returns:
+            [{symbol, roi, direction, entry_time}, ...]
+        """
+        order = "DESC" if best else "ASC"
+        rows = self._query(
+            f"""
+            SELECT symbol, roi, direction, entry_time
+            FROM signals
+            WHERE status = 'closed' AND roi IS NOT NULL
+            ORDER BY roi {order}
+            LIMIT ?
+            """,
+            (limit,),
+        )
+        return [
+            {"symbol": row[0], "roi": row[1], "direction": row[2], "entry_time": row[3]}
+            for row in rows
+        ]
+
+
+# ==================== SINGLETON ====================
+
+_global_rollups: Dict[str, PerformanceRollup] = {}
+
+
+def get_performance_rollup(db_path: Optional[str] = None) -> PerformanceRollup:
+    """Получить PerformanceRollup для файла БД"""
+    key = str(db_path or DATABASE_PATH)
+    rollup = _global_rollups.get(key)
+    if rollup is None:
+        rollup = _global_rollups[key] = PerformanceRollup(key)
+    return rollup
+
+
+# Экспорт
+__all__ = ["PerformanceRollup", "get_performance_rollup", "CLOSED_STATUSES"]
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regime Service - режим и фаза рынка по символу, пересчёт на закрытии бара
+Признаки (ADX из MTFTrendService, перцентили ATR и ширины BB, объём к
+среднему) считаются один раз на закрытый бар таймфрейма, режим — по
+правилам MarketRegimeDetector, фаза — Wyckoff по тем же свечам. Новый
+режим принимается после confirm_bars баров подряд; всплеск диапазона
+или объёма внутри бара переключает режим сразу. Переходы хранятся с
+временем.
+
+EnhancedScenarioMatcher и генератор сигналов читают режим из словаря
+состояний вместо классификации на каждом скане.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from analytics.market_structure import MarketStructureAnalyzer
+from analytics.mtf_trend_service import TIMEFRAMES, TrendState, candle_ts, normalize_timeframe
+from config.settings import logger, REGIME_CONFIG
+from systems.market_regime_detector import REGIME_CONFIDENCE, classify_regime
+from utils.helpers import current_epoch_ms
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+ATR_PERIOD = 14
+BB_PERIOD = 20
+VOLUME_PERIOD = 20
+
+
+def _rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Скользящее среднее через кумулятивную сумму (len - period + 1 значений)"""
+    csum = np.cumsum(np.insert(values, 0, 0.0))
+    return (csum[period:] - csum[:-period]) / period
+
+
+def _percentile_of_last(series: np.ndarray) -> float:
+    """Перцентиль последнего значения внутри ряда (0-100)"""
+    if len(series) == 0:
+        return 50.0
+    return float((series <= series[-1]).mean() * 100)
+
+
+def bar_features(candles: List[Dict], lookback: int) -> Optional[Dict[str, float]]:
+    """
+    Признаки режима по закрытым барам (по возрастанию времени)
+
+    Args:
+        candles: Свечи (open/high/low/close/volume)
+        lookback: Баров для перцентилей
+
+    Returns:
+        Dict с atr, atr_percentile, bb_width_percentile, volume_ratio,
+        volume_ma или None, если баров меньше BB_PERIOD + 1
+    """
+    candles = candles[-(lookback + BB_PERIOD):]
+    if len(candles) <= BB_PERIOD:
+        return None
+
+    highs = np.array([float(c["high"]) for c in candles])
+    lows = np.array([float(c["low"]) for c in candles])
+    closes = np.array([float(c["close"]) for c in candles])
+    volumes = np.array([float(c.get("volume", 0)) for c in candles])
+
+    prev = closes[:-1]
+    tr = np.maximum(highs[1:] - lows[1:], np.maximum(np.abs(highs[1:] - prev), np.abs(lows[1:] - prev)))
+    atr = _rolling_mean(tr, ATR_PERIOD)
+
+    mean = _rolling_mean(closes, BB_PERIOD)
+    sq_mean = _rolling_mean(closes * closes, BB_PERIOD)
+    std = np.sqrt(np.maximum(sq_mean - mean * mean, 0.0))
+    width = np.divide(4 * std, mean, out=np.zeros_like(mean), where=mean > 0)
+
+    volume_ma = float(volumes[-VOLUME_PERIOD:].mean())
+    return {
+        "atr": float(atr[-1]),
+        "atr_percentile": _percentile_of_last(atr[-lookback:]),
+        "bb_width_percentile": _percentile_of_last(width[-lookback:]),
+        "volume_ratio": float(volumes[-1]) / volume_ma if volume_ma > 0 else 1.0,
+        "volume_ma": volume_ma,
+    }
+
+
+@dataclass
+class RegimeState:
+    """Режим символа по последнему закрытому бару"""
+
+    symbol: str
+    timeframe: str
+    regime: str  # TRENDING / RANGING / SQUEEZING / EXPANDING / NEUTRAL
+    confidence: float
+    phase: str  # accumulation / markup / distribution / markdown / transition
+    since_ts: int  # начало текущего режима (ms)
+    bar_ts: int  # время открытия последнего закрытого бара (ms)
+    updated_ts: int
+    adx: float = 0.0
+    volume_ratio: float = 1.0
+    bb_width_percentile: float = 50.0
+    atr_percentile: float = 50.0
+    atr: float = 0.0
+    volume_ma: float = 0.0
+    bars_in_regime: int = 1
+    # Кандидат на смену режима и сколько баров подряд он держится
+    pending: Optional[str] = None
+    pending_count: int = 0
+    # Бар, на котором режим уже переключён всплеском
+    spike_bar_ts: int = 0
+    transitions: Deque[Dict[str, Any]] = field(default_factory=deque)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Формат detect_regime() + фаза и переходы"""
+        return {
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "regime": self.regime,
+            "confidence": self.confidence,
+            "phase": self.phase,
+            "since_ts": self.since_ts,
+            "bar_ts": self.bar_ts,
+            "adx": self.adx,
+            "volume_ratio": round(self.volume_ratio, 3),
+            "bb_width_percentile": round(self.bb_width_percentile, 1),
+            "atr_percentile": round(self.atr_percentile, 1),
+            "bars_in_regime": self.bars_in_regime,
+            "transitions": list(self.transitions),
+        }
+
+
+class RegimeService:
+    """
+    Конечный автомат режима рынка по символам
+
+    Features:
+    - Пересчёт только на закрытии бара (подписка на MTFTrendService)
+    - Подтверждение нового режима N барами подряд (без дребезга)
+    - Всплеск диапазона / объёма внутри бара — переход без ожидания
+    - История переходов с временем, get() — O(1) словарь
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: Параметры (по умолчанию REGIME_CONFIG)
+        """
+        self.config = {**REGIME_CONFIG, **(config or {})}
+        self.timeframe = normalize_timeframe(self.config["timeframe"])
+        self.bar_ms = TIMEFRAMES[self.timeframe][1]
+        self.lookback = self.config["lookback"]
+        self.confirm_bars = max(1, self.config["confirm_bars"])
+        self.stale_ms = self.config["stale_bars"] * self.bar_ms
+
+        self._states: Dict[str, RegimeState] = {}
+        # Формирующийся бар по сделкам: symbol → [bar_ts, high, low, volume]
+        self._forming: Dict[str, List[float]] = {}
+        self.stats = {"bars": 0, "transitions": 0, "spikes": 0, "hits": 0, "stale": 0}
+
+        get_metrics_registry().register_collector(
+            "regime", stats_collector("regime", self.get_stats)
+        )
+        logger.info(f"✅ RegimeService инициализирован ({self.timeframe}, подтверждение {self.confirm_bars} бар.)")
+
+    # ==================== ОБНОВЛЕНИЕ ====================
+
+    def on_trend(self, trend: TrendState, candles: List[Dict]):
+        """Подписчик MTFTrendService: новый закрытый бар таймфрейма режима"""
+        if trend.timeframe == self.timeframe:
+            self.on_bar_close(trend.symbol, candles, adx=trend.adx)
+
+    def on_bar_close(
+        self,
+        symbol: str,
+        candles: List[Dict],
+        adx: Optional[float] = None,
+        now_ms: Optional[int] = None,
+    ) -> Optional[RegimeState]:
+        """
+        Закрытый бар: признаки, режим, фаза, подтверждение перехода
+
+        Args:
+            symbol: Торговая пара
+            candles: Закрытые бары по возрастанию времени
+            adx: ADX последнего бара (из TrendState), иначе считается
+            now_ms: Текущее время (ms)
+
+        Returns:
+            RegimeState или None, если баров недостаточно
+        """
+        features = bar_features(candles, self.lookback)
+        if features is None:
+            return self._states.get(symbol)
+
+        bar_ts = candle_ts(candles[-1])
+        state = self._states.get(symbol)
+        if state is not None and bar_ts <= state.bar_ts:
+            return state
+
+        if adx is None:
+            from analytics.mtf_analyzer import MultiTimeframeAnalyzer
+
+            adx = MultiTimeframeAnalyzer(None).calculate_adx(candles, period=ATR_PERIOD)
+
+        self.stats["bars"] += 1
+        now_ms = now_ms or current_epoch_ms()
+        regime = classify_regime(
+            adx, features["volume_ratio"], features["bb_width_percentile"], features["atr_percentile"]
+        )
+        phase = self._phase(candles)
+
+        if state is None:
+            state = RegimeState(
+                symbol=symbol,
+                timeframe=self.timeframe,
+                regime=regime,
+                confidence=REGIME_CONFIDENCE.get(regime, 0.5),
+                phase=phase,
+                since_ts=bar_ts,
+                bar_ts=bar_ts,
+                updated_ts=now_ms,
+                transitions=deque(maxlen=self.config["history"]),
+            )
+            self._states[symbol] = state
+        elif regime == state.regime:
+            state.pending, state.pending_count = None, 0
+            state.bars_in_regime += 1
+        else:
+            if regime == state.pending:
+                state.pending_count += 1
+            else:
+                state.pending, state.pending_count = regime, 1
+            if state.pending_count >= self.confirm_bars:
+                self._transition(state, regime, bar_ts, "bar_close")
+            else:
+                state.bars_in_regime += 1
+
+        state.bar_ts = bar_ts
+        state.updated_ts = now_ms
+        state.phase = phase
+        state.adx = float(adx)
+        state.atr = features["atr"]
+        state.volume_ma = features["volume_ma"]
+        state.volume_ratio = features["volume_ratio"]
+        state.bb_width_percentile = features["bb_width_percentile"]
+        state.atr_percentile = features["atr_percentile"]
+        state.confidence = self._confidence(state)
+        return state
+
+    def on_market_update(
+        self,
+        symbol: str,
+        bar_ts: int,
+        high: float,
+        low: float,
+        volume: float,
+        now_ms: Optional[int] = None,
+    ) -> bool:
+        """
+        Формирующийся бар: переход без ожидания закрытия при всплеске
+
+        Диапазон бара ≥ range_spike_atr × ATR или объём ≥
+        volume_spike_ratio × средний объём. Не чаще раза за бар.
+
+        Returns:
+            True, если режим переключён
+        """
+        state = self._states.get(symbol)
+        if state is None or bar_ts <= state.bar_ts or bar_ts == state.spike_bar_ts:
+            return False
+
+        range_spike = state.atr > 0 and high - low >= self.config["range_spike_atr"] * state.atr
+        volume_spike = state.volume_ma > 0 and volume >= self.config["volume_spike_ratio"] * state.volume_ma
+        if not (range_spike or volume_spike):
+            return False
+
+        state.spike_bar_ts = bar_ts
+        self.stats["spikes"] += 1
+        # Всплеск при сильном ADX — продолжение тренда, иначе расширение волатильности
+        regime = "TRENDING" if state.adx > 30 else "EXPANDING"
+        if regime == state.regime:
+            return False
+
+        self._transition(state, regime, now_ms or current_epoch_ms(), "volume_spike" if volume_spike else "range_spike")
+        state.confidence = self._confidence(state)
+        return True
+
+    def on_trades(self, batch):
+        """
+        Подписчик TradeBus: high / low / объём формирующегося бара → on_market_update
+
+        Args:
+            batch: core.trade_bus.TradeBatch (сделки одной биржи — объём
+                сравнивается со средним объёмом её свечей)
+        """
+        if not len(batch):
+            return
+        bars = batch.ts // self.bar_ms * self.bar_ms
+        for sid in np.unique(batch.symbol).tolist():
+            symbol = batch.symbols[sid]
+            if symbol not in self._states:
+                continue
+            mask = batch.symbol == sid
+            bar_ts = int(bars[mask].max())
+            mask &= bars == bar_ts
+            price, qty = batch.price[mask], batch.qty[mask]
+
+            bar = self._forming.get(symbol)
+            if bar is None or bar[0] < bar_ts:
+                bar = self._forming[symbol] = [bar_ts, float(price.max()), float(price.min()), 0.0]
+            elif bar[0] > bar_ts:
+                continue  # запоздалые сделки прошлого бара
+            bar[1] = max(bar[1], float(price.max()))
+            bar[2] = min(bar[2], float(price.min()))
+            bar[3] += float(qty.sum())
+            self.on_market_update(symbol, bar_ts, bar[1], bar[2], bar[3])
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Сбросить состояние символа (или все)"""
+        if symbol is None:
+            self._states.clear()
+            self._forming.clear()
+        else:
+            self._states.pop(symbol, None)
+            self._forming.pop(symbol, None)
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def get(self, symbol: str, now_ms: Optional[int] = None) -> Optional[RegimeState]:
+        """Текущее состояние символа; None, если нет или устарело"""
+        state = self._states.get(symbol)
+        if state is None:
+            return None
+        # Возраст считается от закрытия последнего бара
+        if now_ms is not None and now_ms - state.bar_ts - self.bar_ms > self.stale_ms:
+            self.stats["stale"] += 1
+            return None
+        self.stats["hits"] += 1
+        return state
+
+    def regime(self, symbol: str, default: str = "NEUTRAL") -> str:
+        """Текущий режим символа (UPPERCASE) или default"""
+        state = self._states.get(symbol)
+        return state.regime if state is not None else default
+
+    def states(self) -> List[RegimeState]:
+        """Все состояния"""
+        return list(self._states.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счётчики + количество символов"""
+        return {**self.stats, "symbols": len(self._states)}
+
+    # ==================== ВНУТРЕННИЕ ====================
+
+    def _transition(self, state: RegimeState, regime: str, ts: int, reason: str):
+        """Смена режима с записью перехода"""
+        state.transitions.append({"ts": ts, "from": state.regime, "to": regime, "reason": reason})
+        logger.info(f"🔄 {state.symbol}: режим {state.regime} → {regime} ({reason})")
+        state.regime = regime
+        state.since_ts = ts
+        state.bars_in_regime = 1
+        state.pending, state.pending_count = None, 0
+        self.stats["transitions"] += 1
+
+    @staticmethod
+    def _confidence(state: RegimeState) -> float:
+        """Базовая уверенность режима + 0.05 за каждый бар удержания (до 4)"""
+        confidence = REGIME_CONFIDENCE.get(state.regime, 0.5) + 0.05 * min(state.bars_in_regime - 1, 4)
+        return round(min(1.0, confidence), 2)
+
+    @staticmethod
+    def _phase(candles: List[Dict]) -> str:
+        """Фаза Wyckoff по тем же закрытым барам"""
+        recent = candles[-50:]
+        result = MarketStructureAnalyzer.analyze_wyckoff_phase(
+            [float(c["open"]) for c in recent],
+            [float(c["high"]) for c in recent],
+            [float(c["low"]) for c in recent],
+            [float(c["close"]) for c in recent],
+            [float(c.get("volume", 0)) for c in recent],
+        )
+        return result.get("phase", "unknown")
+
+
+# ==================== SINGLETON ====================
+
+_global_regime_service: Optional[RegimeService] = None
+
+
+def get_regime_service() -> RegimeService:
+    """Получить глобальный RegimeService"""
+    global _global_regime_service
+    if _global_regime_service is None:
+        _global_regime_service = RegimeService()
+    return _global_regime_service
+
+
+# Экспорт
+__all__ = [
+    "RegimeState",
+    "RegimeService",
+    "bar_features",
+    "get_regime_service",
+]
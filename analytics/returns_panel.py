@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Returns Panel - скользящая панель лог-доходностей символов
+Матрица bars × symbols (кольцевой буфер) обновляется на закрытии бара;
+корреляции Pearson / EWMA и beta считаются из co-moment сумм, которые
+обновляются за O(n²) на бар, без пересчёта по всему окну.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import logger
+
+
+# Bybit interval → длительность бара (ms)
+_INTERVAL_MS = {"D": 86_400_000, "W": 604_800_000}
+
+
+def interval_to_ms(interval: str) -> int:
+    """'1' / '5' / '60' / '240' (минуты), 'D', 'W' → ms"""
+    return _INTERVAL_MS.get(interval) or int(interval) * 60_000
+
+
+def _pairwise_correlation(cov: np.ndarray, var: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """corr_ij = cov_ij / sqrt(var_i|j * var_j|i); NaN, где данных мало"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.sqrt(var * var.T)
+    corr[~valid | (var <= 0) | (var.T <= 0)] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+class CoMoments:
+    """
+    Попарные co-moment суммы для скользящей корреляции Pearson и beta
+
+    Пропуски (NaN) учитываются попарно: для пары (i, j) суммы идут
+    только по барам, где есть оба символа.
+        N[i, j]   — число общих баров
+        Sx[i, j]  — сумма x_i по общим барам
+        Sxx[i, j] — сумма x_i² по общим барам
+        Sxy[i, j] — сумма x_i·x_j
+    """
+
+    def __init__(self, size: int = 0):
+        self.size = 0
+        self.N = self.Sx = self.Sxx = self.Sxy = np.zeros((0, 0))
+        self.resize(size)
+
+    def resize(self, size: int):
+        """Расширить матрицы под новых символов (нулями)"""
+        if size <= self.size:
+            return
+        grown = []
+        for matrix in (self.N, self.Sx, self.Sxx, self.Sxy):
+            new = np.zeros((size, size))
+            new[: self.size, : self.size] = matrix
+            grown.append(new)
+        self.N, self.Sx, self.Sxx, self.Sxy = grown
+        self.size = size
+
+    def reset(self):
+        for matrix in (self.N, self.Sx, self.Sxx, self.Sxy):
+            matrix.fill(0.0)
+
+    def add(self, row: np.ndarray, weight: float = 1.0):
+        """
+        Добавить (weight=1) или убрать (weight=-1) бар
+
+        Args:
+            row: Доходности бара по символам (NaN — нет данных)
+        """
+        present = ~np.isnan(row)
+        x = np.where(present, row, 0.0)
+        m = present.astype(np.float64)
+        if weight != 1.0:
+            x_w, m_w = x * weight, m * weight
+        else:
+            x_w, m_w = x, m
+
+        self.N += np.outer(m_w, m)
+        self.Sx += np.outer(x_w, m)
+        self.Sxx += np.outer(x_w * x, m)
+        self.Sxy += np.outer(x_w, x)
+
+    def _cov_var(self):
+        # Ненормированные (× N²) ковариация и дисперсии — нормировка сокращается
+        cov = self.N * self.Sxy - self.Sx * self.Sx.T
+        var = self.N * self.Sxx - self.Sx * self.Sx
+        return cov, var
+
+    def correlation(self, min_periods: int = 2) -> np.ndarray:
+        cov, var = self._cov_var()
+        return _pairwise_correlation(cov, var, self.N >= max(min_periods, 2))
+
+    def beta(self, benchmark: int, min_periods: int = 2) -> np.ndarray:
+        """beta_i = cov(i, b) / var(b) по общим барам i и b"""
+        cov, var = self._cov_var()
+        var_b = var[benchmark, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = cov[:, benchmark] / var_b
+        beta[(self.N[:, benchmark] < max(min_periods, 2)) | (var_b <= 0)] = np.nan
+        return beta
+
+
+class EwmaCovariance:
+    """
+    Экспоненциально взвешенные ковариации (RiskMetrics)
+
+    cov ← λ·cov + (1 − λ)·d·dᵀ, d = x − mean; пары с пропуском
+    на баре не обновляются.
+    """
+
+    def __init__(self, halflife: float, size: int = 0):
+        self.lam = 0.5 ** (1.0 / halflife)
+        self.size = 0
+        self.mean = np.zeros(0)
+        self.cov = np.zeros((0, 0))
+        self.count = np.zeros((0, 0))
+        self.resize(size)
+
+    def resize(self, size: int):
+        if size <= self.size:
+            return
+        mean = np.zeros(size)
+        mean[: self.size] = self.mean
+        grown = []
+        for matrix in (self.cov, self.count):
+            new = np.zeros((size, size))
+            new[: self.size, : self.size] = matrix
+            grown.append(new)
+        self.mean = mean
+        self.cov, self.count = grown
+        self.size = size
+
+    def reset(self):
+        self.mean.fill(0.0)
+        self.cov.fill(0.0)
+        self.count.fill(0.0)
+
+    def update(self, row: np.ndarray):
+        present = ~np.isnan(row)
+        both = np.outer(present, present)
+        d = np.where(present, row - self.mean, 0.0)
+
+        lam = self.lam
+        self.cov = np.where(both, lam * self.cov + (1.0 - lam) * np.outer(d, d), self.cov)
+        self.mean = np.where(present, lam * self.mean + (1.0 - lam) * np.where(present, row, 0.0), self.mean)
+        self.count += both
+
+    def correlation(self, min_periods: int = 2) -> np.ndarray:
+        var = np.broadcast_to(np.diag(self.cov)[:, None], self.cov.shape)
+        return _pairwise_correlation(self.cov.copy(), np.array(var), self.count >= max(min_periods, 2))
+
+    def beta(self, benchmark: int, min_periods: int = 2) -> np.ndarray:
+        var_b = self.cov[benchmark, benchmark]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = self.cov[:, benchmark] / var_b
+        beta[(self.count[:, benchmark] < max(min_periods, 2)) | (var_b <= 0)] = np.nan
+        return beta
+
+
+class ReturnsPanel:
+    """
+    Панель лог-доходностей на одном интервале
+
+    Features:
+    - Кольцевой буфер window баров × symbols (NumPy)
+    - Бар фиксируется, когда отчитались все символы или пришёл следующий бар
+    - Pearson (скользящее окно) и EWMA корреляции / beta за O(n²) на бар
+    - Backfill истории одним выровненным проходом
+    """
+
+    def __init__(self, interval: str = "5", window: int = 288, ewma_halflife: float = 48):
+        """
+        Args:
+            interval: Интервал свечей Bybit ('5', '60', '240', 'D')
+            window: Размер окна (баров) для Pearson
+            ewma_halflife: Период полураспада EWMA (баров)
+        """
+        self.interval = interval
+        self.interval_ms = interval_to_ms(interval)
+        self.window = window
+
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._capacity = 16
+
+        self._returns = np.full((window, self._capacity), np.nan)
+        self._bar_ts = np.zeros(window, dtype=np.int64)
+        self._head = 0
+        self.count = 0
+
+        self._last_close: Dict[str, float] = {}
+        self.last_ts: Dict[str, int] = {}
+
+        self._pending_ts: Optional[int] = None
+        self._pending = np.full(self._capacity, np.nan)
+        self._pending_count = 0
+
+        self.moments = CoMoments()
+        self.ewma = EwmaCovariance(ewma_halflife)
+
+        self._bulk = False
+        # Полная матрица корреляций до следующего изменения панели
+        self._version = 0
+        self._corr_cache: Dict[tuple, tuple] = {}
+
+        self.stats = {"bars": 0, "late": 0, "amended": 0, "recomputes": 0}
+
+    # ==================== СИМВОЛЫ ====================
+
+    def _symbol_index(self, symbol: str) -> int:
+        idx = self._index.get(symbol)
+        if idx is not None:
+            return idx
+
+        idx = len(self.symbols)
+        if idx >= self._capacity:
+            self._capacity *= 2
+            returns = np.full((self.window, self._capacity), np.nan)
+            returns[:, :idx] = self._returns[:, :idx]
+            pending = np.full(self._capacity, np.nan)
+            pending[:idx] = self._pending[:idx]
+            self._returns, self._pending = returns, pending
+
+        self.symbols.append(symbol)
+        self._index[symbol] = idx
+        self.moments.resize(idx + 1)
+        self.ewma.resize(idx + 1)
+        self._version += 1
+        return idx
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    # ==================== ОБНОВЛЕНИЕ ====================
+
+    def on_bar_close(self, symbol: str, bar_ts: int, close: float) -> bool:
+        """
+        Закрытие бара символа
+
+        Args:
+            symbol: Торговая пара
+            bar_ts: Время открытия бара (ms)
+            close: Цена закрытия
+
+        Returns:
+            True, если доходность записана в панель
+        """
+        last_ts = self.last_ts.get(symbol)
+        if last_ts is not None and bar_ts <= last_ts:
+            return False
+
+        idx = self._symbol_index(symbol)
+        prev = self._last_close.get(symbol)
+        self._last_close[symbol] = close
+        self.last_ts[symbol] = bar_ts
+        if not prev or prev <= 0 or close <= 0:
+            return False
+        value = np.log(close / prev)
+
+        if self._pending_ts is not None and bar_ts > self._pending_ts:
+            self._commit()
+        if self._pending_ts is None and (self.count == 0 or bar_ts > self.newest_ts):
+            self._pending_ts = bar_ts
+
+        if bar_ts != self._pending_ts:
+            # Бар уже зафиксирован без этого символа
+            return self._amend(bar_ts, idx, value)
+
+        if np.isnan(self._pending[idx]):
+            self._pending_count += 1
+        self._pending[idx] = value
+
+        if self._pending_count == len(self.symbols):
+            self._commit()
+        return True
+
+    @property
+    def newest_ts(self) -> Optional[int]:
+        """Время последнего зафиксированного бара"""
+        if not self.count:
+            return None
+        return int(self._bar_ts[(self._head - 1) % self.window])
+
+    def flush(self):
+        """Зафиксировать текущий бар, даже если отчитались не все символы"""
+        if self._pending_ts is not None:
+            self._commit()
+
+    def _commit(self):
+        n = len(self.symbols)
+        row = self._pending[:n].copy()
+
+        if self.count == self.window and not self._bulk:
+            # Бар, выходящий из окна
+            self.moments.add(self._returns[self._head, :n], weight=-1.0)
+
+        self._returns[self._head, :] = np.nan
+        self._returns[self._head, :n] = row
+        self._bar_ts[self._head] = self._pending_ts
+        self._head = (self._head + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+
+        if not self._bulk:
+            self.moments.add(row)
+            self.ewma.update(row)
+
+        self._pending[:] = np.nan
+        self._pending_ts = None
+        self._pending_count = 0
+        self._version += 1
+
+        self.stats["bars"] += 1
+        # Скользящие суммы копят ошибку округления — пересчёт раз в окно
+        if not self._bulk and self.stats["bars"] % self.window == 0:
+            self.recompute()
+
+    def _amend(self, bar_ts: int, idx: int, value: float) -> bool:
+        """Дописать опоздавшую доходность в зафиксированный бар окна"""
+        slots = np.flatnonzero(self._bar_ts[: self.count] == bar_ts)
+        if not len(slots):
+            self.stats["late"] += 1
+            return False
+
+        n = len(self.symbols)
+        row = self._returns[slots[0], :n]
+        if self._bulk:
+            row[idx] = value
+            return True
+
+        # Попарные суммы: убрать бар и добавить исправленный — O(n²)
+        self.moments.add(row, weight=-1.0)
+        row[idx] = value
+        self.moments.add(row)
+        self._version += 1
+        self.stats["amended"] += 1
+        return True
+
+    def recompute(self):
+        """Пересчитать co-moment суммы и EWMA по окну"""
+        self.moments.reset()
+        self.ewma.reset()
+        n = len(self.symbols)
+        for row in self._ordered_rows():
+            self.moments.add(row[:n])
+            self.ewma.update(row[:n])
+        self._version += 1
+        self.stats["recomputes"] += 1
+
+    def _ordered_rows(self) -> np.ndarray:
+        """Бары окна от старых к новым"""
+        if self.count < self.window:
+            return self._returns[: self.count]
+        return np.roll(self._returns, -self._head, axis=0)
+
+    def load_history(self, candles_by_symbol: Dict[str, Sequence[Dict]]):
+        """
+        Backfill: выровнять историю нескольких символов по времени бара
+
+        Новые символы дописываются в уже зафиксированные бары окна,
+        суммы пересчитываются один раз в конце.
+
+        Args:
+            candles_by_symbol: {symbol: [{"timestamp": ms, "close": float}, ...]}
+                (любой порядок; незакрытый последний бар не передавать)
+        """
+        events = []
+        for symbol, candles in candles_by_symbol.items():
+            last_ts = self.last_ts.get(symbol, -1)
+            closes = sorted(
+                (int(c["timestamp"]), float(c["close"]))
+                for c in candles
+                if int(c["timestamp"]) > last_ts and float(c["close"]) > 0
+            )[-(self.window + 1):]
+            events.extend((ts, symbol, close) for ts, close in closes)
+        if not events:
+            return
+
+        self.flush()
+        self._bulk = True
+        try:
+            events.sort(key=lambda e: e[0])
+            for ts, symbol, close in events:
+                self.on_bar_close(symbol, ts, close)
+            self.flush()
+        finally:
+            self._bulk = False
+        self.recompute()
+
+        logger.debug(
+            f"📈 ReturnsPanel[{self.interval}]: backfill {len(candles_by_symbol)} символов, "
+            f"{len(events)} свечей"
+        )
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def _indices(self, symbols: Optional[Iterable[str]]) -> np.ndarray:
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return np.array([self._index[s] for s in symbols], dtype=np.intp)
+
+    def matrix(self, symbols: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Доходности symbols × bars (от старых к новым)"""
+        return self._ordered_rows()[:, self._indices(symbols)].T
+
+    def bar_timestamps(self) -> np.ndarray:
+        if self.count < self.window:
+            return self._bar_ts[: self.count].copy()
+        return np.roll(self._bar_ts, -self._head)
+
+    def correlation(
+        self, symbols: Optional[Sequence[str]] = None, method: str = "pearson", min_periods: int = 2
+    ) -> np.ndarray:
+        """
+        Корреляционная матрица (NaN — мало общих баров)
+
+        Args:
+            symbols: Подмножество символов (по умолчанию все)
+            method: pearson (окно) / ewma
+        """
+        key = (method, min_periods)
+        cached = self._corr_cache.get(key)
+        if cached is None or cached[0] != self._version:
+            source = self.ewma if method == "ewma" else self.moments
+            cached = (self._version, source.correlation(min_periods))
+            self._corr_cache[key] = cached
+
+        if symbols is None:
+            return cached[1].copy()
+        idx = self._indices(symbols)
+        return cached[1][np.ix_(idx, idx)]
+
+    def beta(
+        self,
+        benchmark: str,
+        symbols: Optional[Sequence[str]] = None,
+        method: str = "pearson",
+        min_periods: int = 2,
+    ) -> Dict[str, Optional[float]]:
+        """beta символов к benchmark (None — нет данных)"""
+        if benchmark not in self._index:
+            return {}
+        source = self.ewma if method == "ewma" else self.moments
+        beta = source.beta(self._index[benchmark], min_periods)
+        names = list(symbols) if symbols is not None else self.symbols
+        return {
+            s: (None if np.isnan(b) else float(b))
+            for s, b in zip(names, beta[self._indices(names)].tolist())
+        }
+
+
+# Экспорт
+__all__ = ["ReturnsPanel", "CoMoments", "EwmaCovariance", "interval_to_ms"]
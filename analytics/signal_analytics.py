@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 
 from config.settings import logger, DATABASE_PATH
+from analytics.performance_rollup import get_performance_rollup
 
 
 class SignalAnalytics:
@@ -17,6 +18,7 @@ class SignalAnalytics:
 
     def __init__(self, db_path: str = None):
         self.db_path = db_path or DATABASE_PATH
+        self.rollup = get_performance_rollup(self.db_path)
         logger.info(f"✅ SignalAnalytics инициализирован (DB: {self.db_path})")
 
     def get_stats_by_scenario(self, days: int = 30) -> Dict:
@@ -30,50 +32,13 @@ class SignalAnalytics:
             Dict с статистикой по сценариям
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            query = f"""
-                SELECT
-                    scenario_id,
-                    COUNT(*) as total_signals,
-                    SUM(CASE WHEN profit_percent > 0 THEN 1 ELSE 0 END) as winning,
-                    SUM(CASE WHEN profit_percent < 0 THEN 1 ELSE 0 END) as losing,
-                    AVG(profit_percent) as avg_roi,
-                    MAX(profit_percent) as max_profit,
-                    MIN(profit_percent) as max_loss,
-                    AVG(quality_score) as avg_quality,
-                    AVG(risk_reward) as avg_rr
-                FROM signals
-                WHERE timestamp > datetime('now', '-{days} days')
-                    AND exit_price IS NOT NULL
-                    AND scenario_id IS NOT NULL
-                GROUP BY scenario_id
-                ORDER BY total_signals DESC
-            """
-
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            conn.close()
+            rows = self.rollup.summary(days, by=("scenario",), scenario_only=True)
 
             stats = {}
-            for row in rows:
-                scenario_id = row[0]
-                total = row[1]
-                winning = row[2] or 0
-                losing = row[3] or 0
-
-                stats[scenario_id] = {
-                    "total_signals": total,
-                    "winning": winning,
-                    "losing": losing,
-                    "win_rate": (winning / total * 100) if total > 0 else 0.0,
-                    "avg_roi": row[4] or 0.0,
-                    "max_profit": row[5] or 0.0,
-                    "max_loss": row[6] or 0.0,
-                    "avg_quality": row[7] or 0.0,
-                    "avg_rr": row[8] or 0.0,
-                }
+            for scenario_id, data in sorted(
+                rows.items(), key=lambda x: x[1]["count"], reverse=True
+            ):
+                stats[scenario_id] = self._format_stats(data)
 
             return stats
 
@@ -316,66 +281,34 @@ class SignalAnalytics:
             Dict с общей статистикой
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            query = f"""
-                SELECT
-                    COUNT(*) as total_signals,
-                    SUM(CASE WHEN profit_percent > 0 THEN 1 ELSE 0 END) as winning,
-                    SUM(CASE WHEN profit_percent < 0 THEN 1 ELSE 0 END) as losing,
-                    AVG(profit_percent) as avg_roi,
-                    MAX(profit_percent) as max_profit,
-                    MIN(profit_percent) as max_loss,
-                    AVG(quality_score) as avg_quality,
-                    AVG(risk_reward) as avg_rr,
-                    COUNT(DISTINCT symbol) as symbols_traded,
-                    COUNT(DISTINCT scenario_id) as scenarios_used
-                FROM signals
-                WHERE timestamp > datetime('now', '-{days} days')
-                    AND exit_price IS NOT NULL
-            """
-
-            cursor.execute(query)
-            row = cursor.fetchone()
-            conn.close()
-
-            if not row or row[0] == 0:
-                return {
-                    "total_signals": 0,
-                    "winning": 0,
-                    "losing": 0,
-                    "win_rate": 0.0,
-                    "avg_roi": 0.0,
-                    "max_profit": 0.0,
-                    "max_loss": 0.0,
-                    "avg_quality": 0.0,
-                    "avg_rr": 0.0,
-                    "symbols_traded": 0,
-                    "scenarios_used": 0,
-                }
-
-            total = row[0]
-            winning = row[1] or 0
+            data = self.rollup.summary(days)
+            distinct = self.rollup.distinct(days)
 
             return {
-                "total_signals": total,
-                "winning": winning,
-                "losing": row[2] or 0,
-                "win_rate": (winning / total * 100) if total > 0 else 0.0,
-                "avg_roi": row[3] or 0.0,
-                "max_profit": row[4] or 0.0,
-                "max_loss": row[5] or 0.0,
-                "avg_quality": row[6] or 0.0,
-                "avg_rr": row[7] or 0.0,
-                "symbols_traded": row[8] or 0,
-                "scenarios_used": row[9] or 0,
+                **self._format_stats(data),
+                "symbols_traded": distinct["symbols"],
+                "scenarios_used": distinct["scenarios"],
             }
 
         except Exception as e:
             logger.error(f"❌ Ошибка get_overall_stats: {e}")
             return {}
 
+    @staticmethod
+    def _format_stats(data: Dict) -> Dict:
+        """Поля статистики из метрик rollup"""
+        return {
+            "total_signals": data["count"],
+            "winning": data["wins"],
+            "losing": data["losses"],
+            "win_rate": data["win_rate"],
+            "avg_roi": data["avg_roi"],
+            "max_profit": data["max_roi"] or 0.0,
+            "max_loss": data["min_roi"] or 0.0,
+            "avg_quality": data["avg_quality"],
+            "avg_rr": data["avg_rr"],
+        }
+
 
 # Экспорт
 __all__ = ["SignalAnalytics"]
@@ -5,12 +5,12 @@ Signal Performance Analyzer
 Расширенная аналитика производительности сигналов
 """
 
-import asyncio
 import sqlite3
-from typing import Dict, List, Optional
+from typing import Dict
 from datetime import datetime, timedelta
-from collections import defaultdict
 from config.settings import logger, DATA_DIR
+from analytics.performance_rollup import get_performance_rollup
+from utils.performance import run_blocking
 
 
 class SignalPerformanceAnalyzer:
@@ -27,6 +27,7 @@ class SignalPerformanceAnalyzer:
     def __init__(self, bot_instance):
         self.bot = bot_instance
         self.db_path = DATA_DIR / "gio_crypto_bot.db"
+        self.rollup = get_performance_rollup(self.db_path)
         logger.info("✅ SignalPerformanceAnalyzer инициализирован")
 
     async def get_performance_overview(self, days: int = 30) -> Dict:
@@ -53,183 +54,76 @@ class SignalPerformanceAnalyzer:
             }
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cutoff_date = datetime.now() - timedelta(days=days)
-            cutoff_str = cutoff_date.strftime("%Y-%m-%d %H:%M:%S")
-
-            # ✅ ИСПРАВЛЕНО: timestamp вместо created_at
-            cursor.execute(
-                """
-                SELECT
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed,
-                    SUM(CASE WHEN status = 'active' THEN 1 ELSE 0 END) as active
-                FROM signals
-                WHERE timestamp >= ?
-            """,
-                (cutoff_str,),
-            )
-
-            row = cursor.fetchone()
-            total_signals = row[0] if row else 0
-            closed_signals = row[1] if row else 0
-            active_signals = row[2] if row else 0
-
-            # ✅ ИСПРАВЛЕНО: timestamp вместо created_at, close_time вместо exit_time
-            cursor.execute(
-                """
-                SELECT
-                    symbol,
-                    direction,
-                    roi,
-                    timestamp,
-                    close_time
-                FROM signals
-                WHERE status = 'closed'
-                  AND timestamp >= ?
-                  AND roi IS NOT NULL
-            """,
-                (cutoff_str,),
-            )
-
-            closed_trades = cursor.fetchall()
-            conn.close()
-
-            if not closed_trades:
-                return self._empty_performance()
-
-            # Подсчёты
-            wins = sum(1 for trade in closed_trades if trade[2] > 0)
-            losses = len(closed_trades) - wins
-            win_rate = (wins / len(closed_trades)) * 100 if closed_trades else 0
-
-            rois = [trade[2] for trade in closed_trades]
-            avg_roi = sum(rois) / len(rois) if rois else 0
-            total_roi = sum(rois)
-
-            # Best/Worst trades
-            best_trade = max(closed_trades, key=lambda x: x[2])
-            worst_trade = min(closed_trades, key=lambda x: x[2])
-
-            # Sharpe Ratio (упрощённый)
-            if rois:
-                std_roi = self._calculate_std(rois)
-                sharpe_ratio = (avg_roi / std_roi) if std_roi > 0 else 0
-            else:
-                sharpe_ratio = 0
-
-            # Среднее время удержания
-            hold_times = []
-            for trade in closed_trades:
-                if trade[3] and trade[4]:  # timestamp и close_time
-                    try:
-                        entry = datetime.fromisoformat(trade[3])
-                        exit_time = datetime.fromisoformat(trade[4])
-                        hold_minutes = (exit_time - entry).total_seconds() / 60
-                        hold_times.append(hold_minutes)
-                    except:
-                        pass
-
-            avg_hold_time_minutes = (
-                sum(hold_times) / len(hold_times) if hold_times else 0
-            )
-
-            # По символам
-            by_symbol = self._group_by_symbol(closed_trades)
-
-            # По типам (direction)
-            by_type = self._group_by_type(closed_trades)
-
-            return {
-                "total_signals": total_signals,
-                "closed_signals": closed_signals,
-                "active_signals": active_signals,
-                "win_rate": round(win_rate, 1),
-                "wins": wins,
-                "losses": losses,
-                "avg_roi": round(avg_roi, 2),
-                "total_roi": round(total_roi, 2),
-                "best_trade": {"symbol": best_trade[0], "roi": round(best_trade[2], 2)},
-                "worst_trade": {
-                    "symbol": worst_trade[0],
-                    "roi": round(worst_trade[2], 2),
-                },
-                "sharpe_ratio": round(sharpe_ratio, 2),
-                "avg_hold_time_minutes": round(avg_hold_time_minutes, 0),
-                "by_symbol": by_symbol,
-                "by_type": by_type,
-            }
-
+            return await run_blocking(self._build_overview, days)
         except Exception as e:
             logger.error(f"get_performance_overview error: {e}", exc_info=True)
             return self._empty_performance()
 
-    def _group_by_symbol(self, trades: List) -> Dict:
-        """Группировать по символам"""
-        grouped = defaultdict(lambda: {"trades": [], "rois": []})
+    def _build_overview(self, days: int) -> Dict:
+        """Статистика из дневного rollup: сумма по строкам за период, без скана signals"""
+        overall = self.rollup.summary(days)
+        if not overall["count"]:
+            return self._empty_performance()
+
+        # Активные сигналы — маленькое множество (индекс по status)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cutoff_str = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+            active_signals = conn.execute(
+                "SELECT COUNT(*) FROM signals WHERE status = 'active' AND timestamp >= ?",
+                (cutoff_str,),
+            ).fetchone()[0]
+        finally:
+            conn.close()
 
-        for trade in trades:
-            symbol = trade[0]
-            roi = trade[2]
-            grouped[symbol]["trades"].append(trade)
-            grouped[symbol]["rois"].append(roi)
+        extremes = self.rollup.extremes(days)
+        avg_roi = overall["avg_roi"]
+        std_roi = overall["std_roi"]
+        # Sharpe Ratio (упрощённый)
+        sharpe_ratio = (avg_roi / std_roi) if std_roi > 0 else 0
 
-        result = {}
-        for symbol, data in grouped.items():
-            rois = data["rois"]
-            wins = sum(1 for r in rois if r > 0)
-            win_rate = (wins / len(rois)) * 100 if rois else 0
-            total_roi = sum(rois)
+        return {
+            "total_signals": overall["count"] + active_signals,
+            "closed_signals": overall["count"],
+            "active_signals": active_signals,
+            "win_rate": round(overall["win_rate"], 1),
+            "wins": overall["wins"],
+            "losses": overall["count"] - overall["wins"],
+            "avg_roi": round(avg_roi, 2),
+            "total_roi": round(overall["total_roi"], 2),
+            "best_trade": {
+                "symbol": extremes["best"]["symbol"],
+                "roi": round(extremes["best"]["roi"], 2),
+            },
+            "worst_trade": {
+                "symbol": extremes["worst"]["symbol"],
+                "roi": round(extremes["worst"]["roi"], 2),
+            },
+            "sharpe_ratio": round(sharpe_ratio, 2),
+            "avg_hold_time_minutes": round(overall["avg_hold_minutes"], 0),
+            "by_symbol": self._group(days, "symbol", sort=True),
+            "by_type": self._group(days, "direction"),
+        }
 
-            result[symbol] = {
-                "win_rate": round(win_rate, 1),
-                "total_roi": round(total_roi, 2),
-                "count": len(rois),
+    def _group(self, days: int, column: str, sort: bool = False) -> Dict:
+        """Группировать по символам / типам (direction)"""
+        result = {
+            key: {
+                "win_rate": round(stats["win_rate"], 1),
+                "total_roi": round(stats["total_roi"], 2),
+                "count": stats["count"],
             }
+            for key, stats in self.rollup.summary(days, by=(column,)).items()
+        }
 
         # Сортировка по total_roi
-        result = dict(
-            sorted(result.items(), key=lambda x: x[1]["total_roi"], reverse=True)
-        )
-
-        return result
-
-    def _group_by_type(self, trades: List) -> Dict:
-        """Группировать по типам сигналов"""
-        grouped = defaultdict(lambda: {"trades": [], "rois": []})
-
-        for trade in trades:
-            direction = trade[1] or "UNKNOWN"
-            roi = trade[2]
-            grouped[direction]["trades"].append(trade)
-            grouped[direction]["rois"].append(roi)
-
-        result = {}
-        for direction, data in grouped.items():
-            rois = data["rois"]
-            wins = sum(1 for r in rois if r > 0)
-            win_rate = (wins / len(rois)) * 100 if rois else 0
-            total_roi = sum(rois)
-
-            result[direction] = {
-                "win_rate": round(win_rate, 1),
-                "total_roi": round(total_roi, 2),
-                "count": len(rois),
-            }
+        if sort:
+            result = dict(
+                sorted(result.items(), key=lambda x: x[1]["total_roi"], reverse=True)
+            )
 
         return result
 
-    def _calculate_std(self, values: List[float]) -> float:
-        """Расчёт стандартного отклонения"""
-        if not values:
-            return 0
-
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        return variance**0.5
-
     def format_performance_overview(self, stats: Dict) -> str:
         """Форматировать для Telegram"""
         try:
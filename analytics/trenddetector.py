@@ -27,6 +27,10 @@ class MultiTimeframeTrendDetector:
         # ✅ ДОБАВИТЬ: Кэш для трендов
         self.trend_cache = {}
 
+        # timeframe → (версия свечей, тренд): без очистки и пересчёта
+        # DataFrame, пока не закрылся новый бар
+        self._frame_trends: Dict[str, tuple] = {}
+
         logger.info("✅ MultiTimeframeTrendDetector инициализирован")
 
     def detect_trends(
@@ -49,26 +53,10 @@ class MultiTimeframeTrendDetector:
         try:
             trends = {}
 
-            # Валидация данных
-            candles_1h = DataValidator.clean_dataframe(candles_1h)
-            candles_4h = DataValidator.clean_dataframe(candles_4h)
-            candles_1d = DataValidator.clean_dataframe(candles_1d)
-
-            # Определяем тренд для каждого ТФ
-            if not candles_1h.empty:
-                trends['trend_1h'] = self._detect_trend(candles_1h, '1h')
-            else:
-                trends['trend_1h'] = TrendDirectionEnum.NEUTRAL
-
-            if not candles_4h.empty:
-                trends['trend_4h'] = self._detect_trend(candles_4h, '4h')
-            else:
-                trends['trend_4h'] = TrendDirectionEnum.NEUTRAL
-
-            if not candles_1d.empty:
-                trends['trend_1d'] = self._detect_trend(candles_1d, '1d')
-            else:
-                trends['trend_1d'] = TrendDirectionEnum.NEUTRAL
+            # Тренд ТФ пересчитывается только при новой версии свечей
+            trends['trend_1h'] = self._cached_trend(candles_1h, '1h')
+            trends['trend_4h'] = self._cached_trend(candles_4h, '4h')
+            trends['trend_1d'] = self._cached_trend(candles_1d, '1d')
 
             logger.debug(
                 f"📈 Тренды: 1H={trends['trend_1h'].value}, "
@@ -86,6 +74,27 @@ class MultiTimeframeTrendDetector:
                 'trend_1d': TrendDirectionEnum.NEUTRAL
             }
 
+    def _cached_trend(self, df: pd.DataFrame, timeframe: str) -> TrendDirectionEnum:
+        """
+        Тренд ТФ с кэшем по версии свечей (длина, последний индекс и close)
+
+        Returns:
+            TrendDirectionEnum
+        """
+        if df is None or df.empty:
+            return TrendDirectionEnum.NEUTRAL
+
+        last = df.iloc[-1]
+        version = (len(df), df.index[-1], last.get('timestamp'), last.get('close'))
+        cached = self._frame_trends.get(timeframe)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        cleaned = DataValidator.clean_dataframe(df)
+        trend = self._detect_trend(cleaned, timeframe) if not cleaned.empty else TrendDirectionEnum.NEUTRAL
+        self._frame_trends[timeframe] = (version, trend)
+        return trend
+
     def _detect_trend(
         self,
         df: pd.DataFrame,
@@ -422,6 +431,9 @@ class MultiTimeframeTrendDetector:
         """
         Получить тренд для символа и таймфрейма из кэша
 
+        Без записи в trend_cache — последний тренд MTFTrendService
+        (рассчитан на закрытии бара, без загрузки свечей).
+
         Args:
             symbol: BTCUSDT, ETHUSDT, etc.
             timeframe: 1H, 4H, 1D
@@ -446,8 +458,11 @@ class MultiTimeframeTrendDetector:
 
                 return cached_trend
 
-            # Если нет в кэше, вернуть NEUTRAL
-            return 'NEUTRAL'
+            # Общий тренд MTFTrendService (если уже рассчитан)
+            from analytics.mtf_trend_service import get_mtf_trend_service
+
+            state = get_mtf_trend_service().peek(symbol, timeframe)
+            return state.label if state is not None else 'NEUTRAL'
 
         except Exception as e:
             logger.warning(f"⚠️ get_trend error: {e}")
@@ -2,13 +2,20 @@
 """
 Расширенная система вето для GIO Crypto Bot
 Защита от плохих торговых решений с интеллектуальным анализом рисков
+
+Проверки подписаны на свои входные данные (funding, ticker, orderbook,
+ликвидации, новости): при изменении входа пересчитываются только
+зависящие от него проверки, вердикт каждой кэшируется по символу.
+Запрос итогового вето по символу — O(1).
 """
 
-import asyncio
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
 from collections import deque, defaultdict
+from itertools import islice
+
+import numpy as np
 
 from config.settings import (
     logger, FUNDING_RATE_VETO_THRESHOLD, VOLUME_ANOMALY_VETO_THRESHOLD,
@@ -16,7 +23,6 @@ from config.settings import (
 )
 from config.constants import VetoReasonEnum, AlertTypeEnum, TrendDirectionEnum, Colors
 from utils.helpers import current_epoch_ms, safe_float, format_percentage
-from utils.validators import validate_market_data_completeness
 
 
 class VetoSeverityEnum(Enum):
@@ -27,6 +33,35 @@ class VetoSeverityEnum(Enum):
     CRITICAL = "critical"
 
 
+# Проверка → входные данные, от которых зависит её вердикт
+CHECK_INPUTS = {
+    "funding_rate": ("funding",),
+    "volume_anomaly": ("ticker",),
+    "spread": ("orderbook",),
+    "liquidation_cascade": ("ticker", "liquidations"),
+    "market_stability": ("ticker", "orderbook", "funding"),
+    "orderbook_manipulation": ("orderbook",),
+    "news_conflict": ("news",),
+}
+
+# Вход → проверки, которые нужно пересчитать при его изменении
+INPUT_CHECKS: Dict[str, Tuple[str, ...]] = defaultdict(tuple)
+for _check, _inputs in CHECK_INPUTS.items():
+    for _input in _inputs:
+        INPUT_CHECKS[_input] += (_check,)
+
+LIQUIDATION_WINDOW_MS = 3600000  # Окно каскада ликвидаций (1 час)
+RECENT_HISTORY_MS = 3600000  # recent_hour_count в сводке истории
+MANIPULATION_THRESHOLD = 10.0  # Дисбаланс топа стакана (x), с которого подозревается манипуляция
+
+SEVERITY_WEIGHTS = {
+    VetoSeverityEnum.LOW: 0.2,
+    VetoSeverityEnum.MEDIUM: 0.4,
+    VetoSeverityEnum.HIGH: 0.7,
+    VetoSeverityEnum.CRITICAL: 1.0
+}
+
+
 @dataclass
 class VetoTrigger:
     """Триггер системы вето"""
@@ -54,22 +89,52 @@ class VetoAnalysisResult:
     veto_history_summary: Dict[str, Any]
 
 
+class SymbolVetoState:
+    """
+    Состояние вето одного символа
+
+    inputs — последние входные данные по источникам, verdicts — последний
+    вердикт каждой проверки, active — активные вето по причине.
+    """
+
+    __slots__ = (
+        "symbol", "inputs", "fingerprints", "verdicts", "active",
+        "funding_rate_history", "volume_history", "spread_history", "liquidation_events",
+        "risk_score", "market_stability", "result", "dirty", "expires_at",
+    )
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.inputs: Dict[str, Any] = {}
+        self.fingerprints: Dict[str, Any] = {}
+        self.verdicts: Dict[str, Optional[VetoTrigger]] = {}
+        self.active: Dict[str, VetoTrigger] = {}
+
+        self.funding_rate_history = deque(maxlen=100)
+        self.volume_history = deque(maxlen=500)
+        self.spread_history = deque(maxlen=200)
+        self.liquidation_events = deque(maxlen=1000)
+
+        self.risk_score = 0.0
+        self.market_stability = 0.5
+        self.result: Optional[VetoAnalysisResult] = None
+        self.dirty = True
+        # Ближайшее время, когда вердикт меняется сам (истечение вето / окна ликвидаций)
+        self.expires_at = float("inf")
+
+
 class EnhancedVetoSystem:
     """Расширенная система вето с интеллектуальным анализом рисков"""
 
     def __init__(self):
         """Инициализация системы вето"""
-        # Активные вето
-        self.active_vetos: Dict[str, VetoTrigger] = {}
+        # Состояние по символам
+        self.states: Dict[str, SymbolVetoState] = {}
 
         # История вето (последние 1000)
         self.veto_history = deque(maxlen=1000)
+        self._recent_veto_times = deque()
 
-        # Данные для анализа
-        self.funding_rate_history = deque(maxlen=100)
-        self.volume_history = deque(maxlen=500)
-        self.spread_history = deque(maxlen=200)
-        self.liquidation_events = deque(maxlen=1000)
         self.market_anomalies = deque(maxlen=200)
 
         # Настройки чувствительности
@@ -94,6 +159,9 @@ class EnhancedVetoSystem:
             "vetos_by_severity": defaultdict(int),
         }
 
+        # Счётчики инкрементального пересчёта
+        self.eval_stats = {"input_updates": 0, "unchanged_inputs": 0, "check_evals": 0, "result_builds": 0, "lookups": 0}
+
         # Адаптивные пороги (самообучение)
         self.adaptive_thresholds = {
             "funding_rate": FUNDING_RATE_VETO_THRESHOLD,
@@ -103,8 +171,346 @@ class EnhancedVetoSystem:
             "market_stability": MARKET_STABILITY_THRESHOLD,
         }
 
+        self._checks = {
+            "funding_rate": self._check_funding_rate,
+            "volume_anomaly": self._check_volume_anomaly,
+            "spread": self._check_spread_conditions,
+            "liquidation_cascade": self._check_liquidation_cascade,
+            "market_stability": self._check_market_stability,
+            "orderbook_manipulation": self._check_orderbook_manipulation,
+            "news_conflict": self._check_news_conflicts,
+        }
+
         logger.info("✅ EnhancedVetoSystem инициализирована")
 
+    @property
+    def active_vetos(self) -> Dict[str, VetoTrigger]:
+        """Все активные вето: {"<reason>_<symbol>": VetoTrigger}"""
+        return {
+            f"{reason}_{symbol}": veto
+            for symbol, state in self.states.items()
+            for reason, veto in state.active.items()
+        }
+
+    def _state(self, symbol: str) -> SymbolVetoState:
+        state = self.states.get(symbol)
+        if state is None:
+            state = SymbolVetoState(symbol)
+            self.states[symbol] = state
+        return state
+
+    # ==================== ПОДПИСКИ НА ДАННЫЕ ====================
+
+    def on_funding(self, symbol: str, funding_rate: float) -> bool:
+        """
+        Новый funding rate
+
+        Returns:
+            True, если вход изменился и проверки пересчитаны
+        """
+        rate = safe_float(funding_rate)
+        if not self._set_input(symbol, "funding", rate, rate):
+            return False
+
+        state = self.states[symbol]
+        state.funding_rate_history.append({"rate": rate, "timestamp": current_epoch_ms(), "symbol": symbol})
+        self._evaluate(state, "funding")
+        return True
+
+    def on_ticker(self, symbol: str, volume_24h: float, price_24h_pcnt: float) -> bool:
+        """Новый тикер: объём 24h и изменение цены 24h (%)"""
+        ticker = {"volume_24h": safe_float(volume_24h), "price_24h_pcnt": safe_float(price_24h_pcnt)}
+        if not self._set_input(symbol, "ticker", ticker, (ticker["volume_24h"], ticker["price_24h_pcnt"])):
+            return False
+
+        state = self.states[symbol]
+        now = current_epoch_ms()
+        if ticker["volume_24h"] > 0:
+            state.volume_history.append({"volume": ticker["volume_24h"], "timestamp": now, "symbol": symbol})
+
+        # Резкое движение цены — косвенный признак ликвидаций
+        price_change = ticker["price_24h_pcnt"]
+        if price_change:
+            state.liquidation_events.append({
+                "price_change": price_change,
+                "timestamp": now,
+                "symbol": symbol,
+                "severity": "high" if abs(price_change) > 10 else "medium" if abs(price_change) > 5 else "low"
+            })
+        self._evaluate(state, "ticker")
+        return True
+
+    def on_orderbook(
+        self,
+        symbol: str,
+        bids: List[Any],
+        asks: List[Any],
+        spread_bps: Optional[float] = None,
+        mid_price: Optional[float] = None
+    ) -> bool:
+        """
+        Обновление стакана
+
+        Args:
+            bids/asks: Уровни [price, size] или {"price", "size"} от лучшего
+            spread_bps/mid_price: Если не заданы — считаются по лучшим уровням
+        """
+        top_bid = self._top_levels(bids)
+        top_ask = self._top_levels(asks)
+        if not spread_bps or not mid_price:
+            best_bid, best_ask = top_bid[0], top_ask[0]
+            mid_price = (best_bid + best_ask) / 2 if best_bid > 0 and best_ask > 0 else 0.0
+            spread_bps = (best_ask - best_bid) / mid_price * 10000 if mid_price > 0 else 0.0
+
+        orderbook = {
+            "spread_bps": safe_float(spread_bps),
+            "mid_price": safe_float(mid_price),
+            "top_bid_volume": top_bid[1],
+            "top_ask_volume": top_ask[1],
+        }
+        # Отпечаток — только то, от чего зависят вердикты: спред (0.1 bps) и дисбаланс
+        # топа выше порога манипуляции. mid_price и объёмы меняются почти на каждом тике
+        low, high = sorted((top_bid[1], top_ask[1]))
+        ratio = high / low if low > 0 else 0.0
+        fingerprint = (
+            round(orderbook["spread_bps"], 1),
+            round(ratio, 1) if ratio > MANIPULATION_THRESHOLD else None,
+        )
+        if not self._set_input(symbol, "orderbook", orderbook, fingerprint):
+            return False
+
+        state = self.states[symbol]
+        if orderbook["spread_bps"] > 0 and orderbook["mid_price"] > 0:
+            state.spread_history.append({
+                "spread_bps": orderbook["spread_bps"],
+                "mid_price": orderbook["mid_price"],
+                "timestamp": current_epoch_ms(),
+                "symbol": symbol
+            })
+        self._evaluate(state, "orderbook")
+        return True
+
+    def on_liquidation(self, symbol: str, usd_value: float, side: str = "", timestamp: Optional[int] = None) -> bool:
+        """Принт ликвидации с биржи (учитывается каскадной проверкой)"""
+        state = self._state(symbol)
+        state.liquidation_events.append({
+            "usd_value": safe_float(usd_value),
+            "side": side,
+            "timestamp": timestamp or current_epoch_ms(),
+            "symbol": symbol,
+        })
+        self.eval_stats["input_updates"] += 1
+        self._evaluate(state, "liquidations")
+        return True
+
+    def on_news(self, symbol: str, symbol_sentiment: Any) -> bool:
+        """Новый новостной sentiment символа"""
+        if symbol_sentiment is None:
+            fingerprint = None
+        else:
+            fingerprint = tuple(
+                getattr(symbol_sentiment, name, None)
+                for name in ("bullish_count", "bearish_count", "total_news_count", "confidence", "overall_sentiment")
+            )
+        if not self._set_input(symbol, "news", symbol_sentiment, fingerprint):
+            return False
+
+        self._evaluate(self.states[symbol], "news")
+        return True
+
+    def ingest(self, symbol: str, market_data: Dict[str, Any], news_sentiment: Dict = None) -> bool:
+        """
+        Разобрать market_data в подписки (неизменённые секции пропускаются)
+
+        Returns:
+            True, если в market_data есть данные для проверок
+        """
+        funding_data = market_data.get("funding_rate") or {}
+        ticker = market_data.get("ticker") or {}
+        orderbook = market_data.get("orderbook") or {}
+        if not (funding_data or ticker or orderbook):
+            return False
+
+        if funding_data:
+            self.on_funding(symbol, funding_data.get("funding_rate", 0))
+        if ticker:
+            self.on_ticker(symbol, ticker.get("volume_24h", 0), ticker.get("price_24h_pcnt", 0))
+        if orderbook:
+            self.on_orderbook(
+                symbol, orderbook.get("bids", []), orderbook.get("asks", []),
+                orderbook.get("spread_bps"), orderbook.get("mid_price")
+            )
+        if news_sentiment:
+            self.on_news(symbol, news_sentiment.get(symbol))
+        return True
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Пересчитать все проверки (например, после смены порогов)"""
+        states = [self.states[symbol]] if symbol in self.states else list(self.states.values()) if symbol is None else []
+        for state in states:
+            for check in self._checks:
+                self._run_check(state, check)
+            state.dirty = True
+
+    def _set_input(self, symbol: str, source: str, value: Any, fingerprint: Any) -> bool:
+        state = self._state(symbol)
+        if source in state.fingerprints and state.fingerprints[source] == fingerprint:
+            self.eval_stats["unchanged_inputs"] += 1
+            return False
+        state.fingerprints[source] = fingerprint
+        state.inputs[source] = value
+        self.eval_stats["input_updates"] += 1
+        return True
+
+    @staticmethod
+    def _top_levels(levels: List[Any], depth: int = 5) -> Tuple[float, float]:
+        """(лучшая цена, объём топ-depth уровней) для [p, q] и {"price", "size"}"""
+        best, volume = 0.0, 0.0
+        for i, level in enumerate(islice(levels or (), depth)):
+            if isinstance(level, dict):
+                price, size = safe_float(level.get("price", 0)), safe_float(level.get("size", 0))
+            else:
+                price, size = safe_float(level[0]), safe_float(level[1])
+            if i == 0:
+                best = price
+            volume += size
+        return best, volume
+
+    # ==================== ПЕРЕСЧЁТ ====================
+
+    def _evaluate(self, state: SymbolVetoState, source: str):
+        """Пересчитать проверки, зависящие от source"""
+        for check in INPUT_CHECKS[source]:
+            self._run_check(state, check)
+        state.dirty = True
+
+    def _run_check(self, state: SymbolVetoState, check: str):
+        trigger = self._checks[check](state)
+        self.eval_stats["check_evals"] += 1
+        previous = state.verdicts.get(check)
+        state.verdicts[check] = trigger
+
+        if trigger is None:
+            if previous is not None:
+                # Условие снято — вето живёт до конца своей длительности
+                cleared = state.active.get(previous.reason.value)
+                if cleared is not None:
+                    state.expires_at = min(state.expires_at, cleared.timestamp + cleared.duration_estimate_ms)
+            return
+        active = state.active.get(trigger.reason.value)
+        # Новое срабатывание или рост серьёзности — в историю и статистику
+        if previous is None or active is None or previous.severity != trigger.severity:
+            self.veto_history.append(trigger)
+            self._recent_veto_times.append(trigger.timestamp)
+            self._update_veto_stats(trigger)
+        state.active[trigger.reason.value] = trigger
+
+    def _expire(self, state: SymbolVetoState, current_time: int):
+        """Истечение вето и окна ликвидаций (вызывается при lookup по времени)"""
+        if current_time < state.expires_at:
+            return
+
+        # События ликвидаций вышли из окна — вердикт каскада мог смениться
+        self._run_check(state, "liquidation_cascade")
+
+        # Вето, чьё условие всё ещё выполняется, не истекает
+        live = {trigger.reason.value for trigger in state.verdicts.values() if trigger is not None}
+        expired = [
+            reason for reason, veto in state.active.items()
+            if reason not in live
+            and veto.auto_recovery and (current_time - veto.timestamp) > veto.duration_estimate_ms
+        ]
+        for reason in expired:
+            expired_veto = state.active.pop(reason)
+            logger.info(f"⏰ Вето истекло: {expired_veto.reason.value} для {expired_veto.affected_symbols}")
+
+        state.expires_at = min(
+            (
+                veto.timestamp + veto.duration_estimate_ms
+                for reason, veto in state.active.items()
+                if veto.auto_recovery and reason not in live
+            ),
+            default=float("inf")
+        )
+        if state.liquidation_events:
+            state.expires_at = min(state.expires_at, self._next_liquidation_expiry(state, current_time))
+        state.dirty = True
+
+    def _next_liquidation_expiry(self, state: SymbolVetoState, current_time: int) -> float:
+        hour_ago = current_time - LIQUIDATION_WINDOW_MS
+        for event in state.liquidation_events:
+            if event["timestamp"] > hour_ago:
+                return event["timestamp"] + LIQUIDATION_WINDOW_MS + 1
+        return float("inf")
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def get_veto(self, symbol: str, current_time: Optional[int] = None) -> VetoAnalysisResult:
+        """
+        Текущий результат вето по символу из кэша вердиктов — O(1)
+
+        Args:
+            symbol: Торговая пара
+            current_time: Время (ms), по умолчанию сейчас
+
+        Returns:
+            VetoAnalysisResult (без данных — вето "недостаточно данных")
+        """
+        current_time = current_time or current_epoch_ms()
+        self.eval_stats["lookups"] += 1
+
+        state = self.states.get(symbol)
+        if state is None or not state.inputs:
+            return self._create_no_data_result(current_time)
+
+        self._expire(state, current_time)
+        if state.dirty or state.result is None:
+            state.result = self._build_result(state, current_time)
+            state.dirty = False
+        return state.result
+
+    def is_vetoed(self, symbol: str) -> bool:
+        """Есть ли вето по символу (для горячих циклов)"""
+        return self.get_veto(symbol).is_vetoed
+
+    def veto_checks(self, symbol: str) -> Dict[str, bool]:
+        """Сработавшие проверки символа: {check: bool} для scenario matcher"""
+        state = self.states.get(symbol)
+        if state is None:
+            return {}
+        self._expire(state, current_epoch_ms())
+        return {check: trigger is not None for check, trigger in state.verdicts.items()}
+
+    def _build_result(self, state: SymbolVetoState, current_time: int) -> VetoAnalysisResult:
+        """Итог по кэшированным вердиктам"""
+        self.eval_stats["result_builds"] += 1
+        triggers = [trigger for trigger in state.verdicts.values() if trigger is not None]
+
+        state.risk_score = self._calculate_risk_score(triggers, state)
+        state.market_stability = self._calculate_market_stability(state)
+        is_vetoed = bool(state.active) or state.risk_score > 0.7
+
+        result = VetoAnalysisResult(
+            is_vetoed=is_vetoed,
+            active_vetos=list(state.active.values()),
+            risk_score=round(state.risk_score, 3),
+            market_stability=round(state.market_stability, 3),
+            recommendation=self._generate_recommendation(triggers, state.risk_score, state.market_stability),
+            analysis_timestamp=current_time,
+            next_check_time=current_time + 60000,  # Следующая проверка через минуту
+            veto_history_summary=self._get_veto_history_summary()
+        )
+
+        # Логируем только при смене набора активных вето
+        previous = state.result
+        if is_vetoed and (
+            previous is None
+            or not previous.is_vetoed
+            or {v.reason.value for v in previous.active_vetos} != set(state.active)
+        ):
+            self._log_veto_result(result, state.symbol)
+        return result
+
     async def analyze_market_conditions(
         self,
         symbol: str,
@@ -112,106 +518,33 @@ class EnhancedVetoSystem:
         volume_profile: Any = None,
         news_sentiment: Dict = None
     ) -> VetoAnalysisResult:
-        """Комплексный анализ рыночных условий для определения вето"""
-        try:
-            current_time = current_epoch_ms()
+        """
+        Анализ рыночных условий для определения вето
 
-            # Проверяем полноту рыночных данных
-            data_completeness = validate_market_data_completeness(market_data)
-            if not any(data_completeness.values()):
-                return self._create_no_data_result(current_time)
-
-            # Выполняем различные проверки
-            veto_triggers = []
-
-            # 1. Анализ funding rate
-            funding_veto = await self._check_funding_rate(market_data, symbol)
-            if funding_veto:
-                veto_triggers.append(funding_veto)
-
-            # 2. Анализ аномалий объёма
-            volume_veto = await self._check_volume_anomaly(market_data, volume_profile, symbol)
-            if volume_veto:
-                veto_triggers.append(volume_veto)
-
-            # 3. Анализ спреда
-            spread_veto = await self._check_spread_conditions(market_data, symbol)
-            if spread_veto:
-                veto_triggers.append(spread_veto)
-
-            # 4. Анализ каскадов ликвидации
-            liquidation_veto = await self._check_liquidation_cascade(market_data, symbol)
-            if liquidation_veto:
-                veto_triggers.append(liquidation_veto)
-
-            # 5. Анализ стабильности рынка
-            stability_veto = await self._check_market_stability(market_data, symbol)
-            if stability_veto:
-                veto_triggers.append(stability_veto)
-
-            # 6. Анализ манипуляций orderbook
-            manipulation_veto = await self._check_orderbook_manipulation(market_data, symbol)
-            if manipulation_veto:
-                veto_triggers.append(manipulation_veto)
-
-            # 7. Анализ конфликтов новостей
-            if news_sentiment:
-                news_veto = await self._check_news_conflicts(news_sentiment, symbol)
-                if news_veto:
-                    veto_triggers.append(news_veto)
-
-            # Обновляем активные вето
-            await self._update_active_vetos(veto_triggers, current_time)
-
-            # Рассчитываем общий риск-скор
-            risk_score = self._calculate_risk_score(veto_triggers, market_data)
-
-            # Оценка стабильности рынка
-            market_stability = self._calculate_market_stability(market_data, volume_profile)
-
-            # Определяем итоговое решение
-            is_vetoed = len(self.active_vetos) > 0 or risk_score > 0.7
-
-            # Генерируем рекомендацию
-            recommendation = self._generate_recommendation(veto_triggers, risk_score, market_stability)
-
-            # Создаём результат
-            result = VetoAnalysisResult(
-                is_vetoed=is_vetoed,
-                active_vetos=list(self.active_vetos.values()),
-                risk_score=round(risk_score, 3),
-                market_stability=round(market_stability, 3),
-                recommendation=recommendation,
-                analysis_timestamp=current_time,
-                next_check_time=current_time + 60000,  # Следующая проверка через минуту
-                veto_history_summary=self._get_veto_history_summary()
-            )
-
-            # Логируем результат если есть активные вето
-            if is_vetoed:
-                self._log_veto_result(result, symbol)
+        market_data раскладывается по подпискам: пересчитываются только
+        проверки, чьи входы изменились с прошлого вызова.
+        """
+        current_time = current_epoch_ms()
+        try:
+            if not market_data or not self.ingest(symbol, market_data, news_sentiment):
+                if symbol not in self.states or not self.states[symbol].inputs:
+                    return self._create_no_data_result(current_time)
 
-            return result
+            return self.get_veto(symbol, current_time)
 
         except Exception as e:
             logger.error(f"❌ Ошибка анализа veto системы: {e}")
             return self._create_error_result(current_time, str(e))
 
-    async def _check_funding_rate(self, market_data: Dict, symbol: str) -> Optional[VetoTrigger]:
+    # ==================== ПРОВЕРКИ ====================
+
+    def _check_funding_rate(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка funding rate на экстремальные значения"""
         try:
-            funding_data = market_data.get("funding_rate", {})
-            if not funding_data:
+            if "funding" not in state.inputs:
                 return None
 
-            current_rate = safe_float(funding_data.get("funding_rate", 0))
-
-            # Сохраняем в истории
-            self.funding_rate_history.append({
-                "rate": current_rate,
-                "timestamp": current_epoch_ms(),
-                "symbol": symbol
-            })
+            current_rate = state.inputs["funding"]
 
             # Применяем адаптивный порог
             threshold = self.adaptive_thresholds["funding_rate"] * self.sensitivity_settings["funding_rate"]
@@ -229,7 +562,7 @@ class EnhancedVetoSystem:
                         "threshold": threshold,
                         "rate_direction": "positive" if current_rate > 0 else "negative"
                     },
-                    affected_symbols=[symbol],
+                    affected_symbols=[state.symbol],
                     duration_estimate_ms=1800000,  # 30 минут
                     auto_recovery=True
                 )
@@ -253,33 +586,19 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _check_volume_anomaly(
-        self,
-        market_data: Dict,
-        volume_profile: Any,
-        symbol: str
-    ) -> Optional[VetoTrigger]:
+    def _check_volume_anomaly(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка аномалий объёма"""
         try:
-            # Получаем текущий объём из ticker
-            ticker = market_data.get("ticker", {})
-            current_volume = safe_float(ticker.get("volume_24h", 0))
+            current_volume = state.inputs.get("ticker", {}).get("volume_24h", 0)
 
             if current_volume <= 0:
                 return None
 
-            # Сохраняем в истории
-            self.volume_history.append({
-                "volume": current_volume,
-                "timestamp": current_epoch_ms(),
-                "symbol": symbol
-            })
-
             # Рассчитываем среднее за последние записи
-            if len(self.volume_history) < 10:
+            if len(state.volume_history) < 10:
                 return None
 
-            recent_volumes = [entry["volume"] for entry in list(self.volume_history)[-20:]]
+            recent_volumes = [entry["volume"] for entry in islice(reversed(state.volume_history), 20)]
             avg_volume = sum(recent_volumes) / len(recent_volumes)
 
             if avg_volume <= 0:
@@ -306,7 +625,7 @@ class EnhancedVetoSystem:
                         "anomaly_type": anomaly_type,
                         "threshold": threshold
                     },
-                    affected_symbols=[symbol],
+                    affected_symbols=[state.symbol],
                     duration_estimate_ms=600000,  # 10 минут
                     auto_recovery=True
                 )
@@ -336,28 +655,20 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _check_spread_conditions(self, market_data: Dict, symbol: str) -> Optional[VetoTrigger]:
+    def _check_spread_conditions(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка условий спреда"""
         try:
-            orderbook = market_data.get("orderbook", {})
+            orderbook = state.inputs.get("orderbook")
             if not orderbook:
                 return None
 
             # Получаем spread в basis points
-            spread_bps = safe_float(orderbook.get("spread_bps", 0))
-            mid_price = safe_float(orderbook.get("mid_price", 0))
+            spread_bps = orderbook["spread_bps"]
+            mid_price = orderbook["mid_price"]
 
             if spread_bps <= 0 or mid_price <= 0:
                 return None
 
-            # Сохраняем в истории
-            self.spread_history.append({
-                "spread_bps": spread_bps,
-                "mid_price": mid_price,
-                "timestamp": current_epoch_ms(),
-                "symbol": symbol
-            })
-
             # Конвертируем порог в basis points
             threshold_bps = self.adaptive_thresholds["spread"] * 10000 * self.sensitivity_settings["spread"]
 
@@ -375,7 +686,7 @@ class EnhancedVetoSystem:
                         "mid_price": mid_price,
                         "spread_percentage": spread_bps / 10000
                     },
-                    affected_symbols=[symbol],
+                    affected_symbols=[state.symbol],
                     duration_estimate_ms=300000,  # 5 минут
                     auto_recovery=True
                 )
@@ -399,39 +710,30 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _check_liquidation_cascade(self, market_data: Dict, symbol: str) -> Optional[VetoTrigger]:
+    def _check_liquidation_cascade(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка каскадов ликвидации"""
         try:
-            # Для упрощения, используем анализ резких движений цены как индикатор ликвидации
-            ticker = market_data.get("ticker", {})
-            price_change = safe_float(ticker.get("price_24h_pcnt", 0))
-
-            if abs(price_change) == 0:
+            if not state.liquidation_events:
                 return None
 
-            # Добавляем событие в историю
-            liquidation_event = {
-                "price_change": price_change,
-                "timestamp": current_epoch_ms(),
-                "symbol": symbol,
-                "severity": "high" if abs(price_change) > 10 else "medium" if abs(price_change) > 5 else "low"
-            }
-
-            self.liquidation_events.append(liquidation_event)
-
-            # Подсчитываем количество значительных событий за последний час
+            # Значительные события за последний час: принты ликвидаций
+            # и резкие движения цены (косвенный признак)
             current_time = current_epoch_ms()
-            hour_ago = current_time - 3600000
+            hour_ago = current_time - LIQUIDATION_WINDOW_MS
 
             recent_events = [
-                event for event in self.liquidation_events
-                if event["timestamp"] > hour_ago and abs(event["price_change"]) > 3
+                event for event in state.liquidation_events
+                if event["timestamp"] > hour_ago
+                and ("usd_value" in event or abs(event["price_change"]) > 3)
             ]
+            if recent_events:
+                state.expires_at = min(state.expires_at, recent_events[0]["timestamp"] + LIQUIDATION_WINDOW_MS + 1)
 
             threshold = self.adaptive_thresholds["liquidation_cascade"] * self.sensitivity_settings["liquidation"]
 
             if len(recent_events) > threshold:
                 cascade_severity = self._determine_liquidation_severity(len(recent_events), threshold)
+                price_moves = [abs(e["price_change"]) for e in recent_events if "price_change" in e]
 
                 return VetoTrigger(
                     reason=VetoReasonEnum.LIQUIDATION_CASCADE,
@@ -441,10 +743,11 @@ class EnhancedVetoSystem:
                     data={
                         "events_count": len(recent_events),
                         "threshold": threshold,
-                        "max_price_change": max(abs(e["price_change"]) for e in recent_events),
+                        "max_price_change": max(price_moves, default=0.0),
+                        "liquidated_usd": sum(e.get("usd_value", 0.0) for e in recent_events),
                         "timeframe": "1h"
                     },
-                    affected_symbols=[symbol],
+                    affected_symbols=[state.symbol],
                     duration_estimate_ms=1200000,  # 20 минут
                     auto_recovery=True
                 )
@@ -468,10 +771,10 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _check_market_stability(self, market_data: Dict, symbol: str) -> Optional[VetoTrigger]:
+    def _check_market_stability(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка стабильности рынка"""
         try:
-            stability_score = self._calculate_market_stability(market_data, None)
+            stability_score = self._calculate_market_stability(state)
             threshold = self.adaptive_thresholds["market_stability"] * self.sensitivity_settings["market_stability"]
 
             if stability_score < threshold:
@@ -488,7 +791,7 @@ class EnhancedVetoSystem:
                         "threshold": threshold,
                         "instability_level": instability_level
                     },
-                    affected_symbols=[symbol],
+                    affected_symbols=[state.symbol],
                     duration_estimate_ms=900000,  # 15 минут
                     auto_recovery=True
                 )
@@ -512,38 +815,29 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _check_orderbook_manipulation(self, market_data: Dict, symbol: str) -> Optional[VetoTrigger]:
+    def _check_orderbook_manipulation(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка манипуляций orderbook"""
         try:
-            orderbook = market_data.get("orderbook", {})
+            orderbook = state.inputs.get("orderbook")
             if not orderbook:
                 return None
 
-            bids = orderbook.get("bids", [])
-            asks = orderbook.get("asks", [])
-
-            if not bids or not asks:
-                return None
-
             # Анализируем дисбаланс в топе стакана
-            top_bid_volume = sum(safe_float(bid.get("size", 0)) for bid in bids[:5])
-            top_ask_volume = sum(safe_float(ask.get("size", 0)) for ask in asks[:5])
+            top_bid_volume = orderbook["top_bid_volume"]
+            top_ask_volume = orderbook["top_ask_volume"]
 
             if top_bid_volume == 0 or top_ask_volume == 0:
                 return None
 
             imbalance_ratio = max(top_bid_volume, top_ask_volume) / min(top_bid_volume, top_ask_volume)
 
-            # Пороговое значение для подозрения на манипуляцию
-            manipulation_threshold = 10.0
-
-            if imbalance_ratio > manipulation_threshold:
+            if imbalance_ratio > MANIPULATION_THRESHOLD:
                 manipulation_severity = self._determine_manipulation_severity(imbalance_ratio)
 
                 return VetoTrigger(
                     reason=VetoReasonEnum.ORDERBOOK_MANIPULATION,
                     severity=manipulation_severity,
-                    confidence=min(1.0, imbalance_ratio / manipulation_threshold / 2),
+                    confidence=min(1.0, imbalance_ratio / MANIPULATION_THRESHOLD / 2),
                     message=f"Подозрение на манипуляцию orderbook: дисбаланс {imbalance_ratio:.1f}x",
                     data={
                         "imbalance_ratio": imbalance_ratio,
@@ -551,7 +845,7 @@ class EnhancedVetoSystem:
                         "top_ask_volume": top_ask_volume,
                         "stronger_side": "bid" if top_bid_volume > top_ask_volume else "ask"
                     },
-                    affected_symbols=[symbol],
+                    affected_symbols=[state.symbol],
                     duration_estimate_ms=600000,  # 10 минут
                     auto_recovery=True
                 )
@@ -573,11 +867,11 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _check_news_conflicts(self, news_sentiment: Dict, symbol: str) -> Optional[VetoTrigger]:
+    def _check_news_conflicts(self, state: SymbolVetoState) -> Optional[VetoTrigger]:
         """Проверка конфликтных новостей"""
         try:
             # Получаем sentiment для символа
-            symbol_sentiment = news_sentiment.get(symbol)
+            symbol_sentiment = state.inputs.get("news")
             if not symbol_sentiment:
                 return None
 
@@ -610,7 +904,7 @@ class EnhancedVetoSystem:
                             "overall_sentiment": symbol_sentiment.overall_sentiment,
                             "confidence": symbol_sentiment.confidence
                         },
-                        affected_symbols=[symbol],
+                        affected_symbols=[state.symbol],
                         duration_estimate_ms=1800000,  # 30 минут
                         auto_recovery=True
                     )
@@ -633,33 +927,6 @@ class EnhancedVetoSystem:
         else:
             return VetoSeverityEnum.LOW
 
-    async def _update_active_vetos(self, new_triggers: List[VetoTrigger], current_time: int):
-        """Обновление активных вето"""
-        try:
-            # Добавляем новые триггеры
-            for trigger in new_triggers:
-                veto_key = f"{trigger.reason.value}_{trigger.affected_symbols[0] if trigger.affected_symbols else 'global'}"
-                self.active_vetos[veto_key] = trigger
-
-                # Добавляем в историю
-                self.veto_history.append(trigger)
-
-                # Обновляем статистику
-                self._update_veto_stats(trigger)
-
-            # Удаляем истёкшие вето (если включено auto_recovery)
-            expired_keys = []
-            for key, veto in self.active_vetos.items():
-                if veto.auto_recovery and (current_time - veto.timestamp) > veto.duration_estimate_ms:
-                    expired_keys.append(key)
-
-            for key in expired_keys:
-                expired_veto = self.active_vetos.pop(key)
-                logger.info(f"⏰ Вето истекло: {expired_veto.reason.value} для {expired_veto.affected_symbols}")
-
-        except Exception as e:
-            logger.error(f"❌ Ошибка обновления active vetos: {e}")
-
     def _update_veto_stats(self, trigger: VetoTrigger):
         """Обновление статистики вето"""
         try:
@@ -667,32 +934,27 @@ class EnhancedVetoSystem:
             self.veto_stats["vetos_by_reason"][trigger.reason.value] += 1
             self.veto_stats["vetos_by_severity"][trigger.severity.value] += 1
 
-            # Определяем наиболее частую причину
-            most_common = max(self.veto_stats["vetos_by_reason"], key=self.veto_stats["vetos_by_reason"].get)
-            self.veto_stats["most_common_reason"] = most_common
+            # Наиболее частая причина — сравнение только с обновлённой
+            reason = trigger.reason.value
+            most_common = self.veto_stats["most_common_reason"]
+            by_reason = self.veto_stats["vetos_by_reason"]
+            if most_common is None or by_reason[reason] > by_reason[most_common]:
+                self.veto_stats["most_common_reason"] = reason
 
         except Exception as e:
             logger.error(f"❌ Ошибка обновления veto stats: {e}")
 
-    def _calculate_risk_score(self, veto_triggers: List[VetoTrigger], market_data: Dict) -> float:
+    def _calculate_risk_score(self, veto_triggers: List[VetoTrigger], state: SymbolVetoState) -> float:
         """Расчёт общего риск-скора"""
         try:
             if not veto_triggers:
                 return 0.0
 
             # Базовый риск от триггеров
-            severity_weights = {
-                VetoSeverityEnum.LOW: 0.2,
-                VetoSeverityEnum.MEDIUM: 0.4,
-                VetoSeverityEnum.HIGH: 0.7,
-                VetoSeverityEnum.CRITICAL: 1.0
-            }
-
-            trigger_risks = []
-            for trigger in veto_triggers:
-                severity_weight = severity_weights.get(trigger.severity, 0.3)
-                risk = severity_weight * trigger.confidence
-                trigger_risks.append(risk)
+            trigger_risks = [
+                SEVERITY_WEIGHTS.get(trigger.severity, 0.3) * trigger.confidence
+                for trigger in veto_triggers
+            ]
 
             # Комбинируем риски (не простое среднее, а учитываем множественные факторы)
             if len(trigger_risks) == 1:
@@ -704,8 +966,8 @@ class EnhancedVetoSystem:
                     combined_risk *= (1.0 - risk)
                 base_risk = 1.0 - combined_risk
 
-            # Дополнительные факторы риска из market_data
-            market_risk_factors = self._assess_market_risk_factors(market_data)
+            # Дополнительные факторы риска из входных данных символа
+            market_risk_factors = self._assess_market_risk_factors(state)
             final_risk = base_risk * (1.0 + market_risk_factors * 0.3)
 
             return min(1.0, final_risk)
@@ -714,21 +976,21 @@ class EnhancedVetoSystem:
             logger.error(f"❌ Ошибка расчёта risk score: {e}")
             return 0.5
 
-    def _assess_market_risk_factors(self, market_data: Dict) -> float:
-        """Оценка дополнительных факторов риска из market_data"""
+    def _assess_market_risk_factors(self, state: SymbolVetoState) -> float:
+        """Оценка дополнительных факторов риска по входным данным символа"""
         try:
             risk_factors = []
 
             # Фактор волатильности
-            ticker = market_data.get("ticker", {})
-            price_change = abs(safe_float(ticker.get("price_24h_pcnt", 0)))
+            ticker = state.inputs.get("ticker", {})
+            price_change = abs(ticker.get("price_24h_pcnt", 0.0))
             volatility_factor = min(1.0, price_change / 20.0)  # Нормализуем к 20%
             risk_factors.append(volatility_factor)
 
             # Фактор объёма (аномально низкий или высокий)
-            volume_24h = safe_float(ticker.get("volume_24h", 0))
-            if len(self.volume_history) > 5:
-                recent_volumes = [entry["volume"] for entry in list(self.volume_history)[-5:]]
+            volume_24h = ticker.get("volume_24h", 0.0)
+            if len(state.volume_history) > 5:
+                recent_volumes = [entry["volume"] for entry in islice(reversed(state.volume_history), 5)]
                 avg_volume = sum(recent_volumes) / len(recent_volumes)
                 if avg_volume > 0:
                     volume_deviation = abs(volume_24h - avg_volume) / avg_volume
@@ -736,8 +998,7 @@ class EnhancedVetoSystem:
                     risk_factors.append(volume_factor)
 
             # Фактор спреда
-            orderbook = market_data.get("orderbook", {})
-            spread_bps = safe_float(orderbook.get("spread_bps", 0))
+            spread_bps = state.inputs.get("orderbook", {}).get("spread_bps", 0.0)
             if spread_bps > 0:
                 spread_factor = min(1.0, spread_bps / 100.0)  # Нормализуем к 100 bps
                 risk_factors.append(spread_factor)
@@ -748,28 +1009,26 @@ class EnhancedVetoSystem:
             logger.error(f"❌ Ошибка оценки market risk factors: {e}")
             return 0.0
 
-    def _calculate_market_stability(self, market_data: Dict, volume_profile: Any) -> float:
+    def _calculate_market_stability(self, state: SymbolVetoState) -> float:
         """Расчёт стабильности рынка"""
         try:
             stability_factors = []
 
             # Фактор спреда (узкий спред = более стабильный рынок)
-            orderbook = market_data.get("orderbook", {})
-            spread_bps = safe_float(orderbook.get("spread_bps", 0))
+            spread_bps = state.inputs.get("orderbook", {}).get("spread_bps", 0.0)
             if spread_bps > 0:
                 spread_stability = max(0.0, 1.0 - (spread_bps / 50.0))  # 50 bps как базовый уровень
                 stability_factors.append(spread_stability)
 
             # Фактор волатильности (низкая волатильность = более стабильный)
-            ticker = market_data.get("ticker", {})
-            price_change = abs(safe_float(ticker.get("price_24h_pcnt", 0)))
+            price_change = abs(state.inputs.get("ticker", {}).get("price_24h_pcnt", 0.0))
             volatility_stability = max(0.0, 1.0 - (price_change / 10.0))  # 10% как базовый уровень
             stability_factors.append(volatility_stability)
 
             # Фактор объёма (стабильный объём = более стабильный рынок)
-            if len(self.volume_history) >= 5:
-                recent_volumes = [entry["volume"] for entry in list(self.volume_history)[-5:]]
-                volume_std = np.std(recent_volumes) if len(recent_volumes) > 1 else 0
+            if len(state.volume_history) >= 5:
+                recent_volumes = [entry["volume"] for entry in islice(reversed(state.volume_history), 5)]
+                volume_std = np.std(recent_volumes)
                 volume_mean = np.mean(recent_volumes)
                 if volume_mean > 0:
                     volume_cv = volume_std / volume_mean  # Коэффициент вариации
@@ -777,15 +1036,11 @@ class EnhancedVetoSystem:
                     stability_factors.append(volume_stability)
 
             # Фактор funding rate (близость к нулю = более стабильный)
-            funding_data = market_data.get("funding_rate", {})
-            funding_rate = abs(safe_float(funding_data.get("funding_rate", 0)))
+            funding_rate = abs(state.inputs.get("funding", 0.0))
             funding_stability = max(0.0, 1.0 - (funding_rate / 0.01))  # 1% как базовый уровень
             stability_factors.append(funding_stability)
 
-            if not stability_factors:
-                return 0.5  # Нейтральная стабильность по умолчанию
-
-            return sum(stability_factors) / len(stability_factors)
+            return float(sum(stability_factors) / len(stability_factors))
 
         except Exception as e:
             logger.error(f"❌ Ошибка расчёта market stability: {e}")
@@ -836,17 +1091,19 @@ class EnhancedVetoSystem:
             return "❌ Ошибка анализа - торговля не рекомендуется"
 
     def _get_veto_history_summary(self) -> Dict[str, Any]:
-        """Получение сводки истории вето"""
+        """Получение сводки истории вето (счётчики ведутся инкрементально)"""
         try:
             if not self.veto_history:
                 return {"total_count": 0}
 
-            recent_time = current_epoch_ms() - 3600000  # Последний час
-            recent_vetos = [v for v in self.veto_history if v.timestamp > recent_time]
+            recent_time = current_epoch_ms() - RECENT_HISTORY_MS  # Последний час
+            recent = self._recent_veto_times
+            while recent and recent[0] <= recent_time:
+                recent.popleft()
 
             return {
                 "total_count": len(self.veto_history),
-                "recent_hour_count": len(recent_vetos),
+                "recent_hour_count": len(recent),
                 "most_common_reason": self.veto_stats.get("most_common_reason"),
                 "total_by_severity": dict(self.veto_stats["vetos_by_severity"]),
                 "accuracy_rate": self.veto_stats.get("accuracy_rate", 0.0)
@@ -912,7 +1169,10 @@ class EnhancedVetoSystem:
             }
 
             if result.active_vetos:
-                max_severity = max(veto.severity for veto in result.active_vetos)
+                max_severity = max(
+                    (veto.severity for veto in result.active_vetos),
+                    key=lambda severity: SEVERITY_WEIGHTS.get(severity, 0.0),
+                )
                 color = severity_colors.get(max_severity, Colors.ALERT)
             else:
                 color = Colors.ALERT
@@ -932,14 +1192,16 @@ class EnhancedVetoSystem:
             current_time = current_epoch_ms()
             expired_count = 0
 
-            expired_keys = []
-            for key, veto in self.active_vetos.items():
-                if (current_time - veto.timestamp) > veto.duration_estimate_ms:
-                    expired_keys.append(key)
-
-            for key in expired_keys:
-                self.active_vetos.pop(key)
-                expired_count += 1
+            for state in self.states.values():
+                expired = [
+                    reason for reason, veto in state.active.items()
+                    if (current_time - veto.timestamp) > veto.duration_estimate_ms
+                ]
+                for reason in expired:
+                    state.active.pop(reason)
+                    expired_count += 1
+                if expired:
+                    state.dirty = True
 
             if expired_count > 0:
                 logger.info(f"🧹 Очищено {expired_count} истёкших вето")
@@ -953,23 +1215,27 @@ class EnhancedVetoSystem:
     def get_veto_stats(self) -> Dict[str, Any]:
         """Получение детальной статистики системы вето"""
         try:
+            active_vetos = self.active_vetos
+            states = self.states.values()
             return {
-                "active_vetos_count": len(self.active_vetos),
+                "active_vetos_count": len(active_vetos),
                 "active_vetos": {key: {
                     "reason": veto.reason.value,
                     "severity": veto.severity.value,
                     "confidence": veto.confidence,
                     "age_minutes": (current_epoch_ms() - veto.timestamp) / 60000,
                     "symbols": veto.affected_symbols
-                } for key, veto in self.active_vetos.items()},
+                } for key, veto in active_vetos.items()},
                 "history_stats": self.veto_stats.copy(),
+                "eval_stats": self.eval_stats.copy(),
                 "adaptive_thresholds": self.adaptive_thresholds.copy(),
                 "sensitivity_settings": self.sensitivity_settings.copy(),
                 "data_counts": {
-                    "funding_rate_history": len(self.funding_rate_history),
-                    "volume_history": len(self.volume_history),
-                    "spread_history": len(self.spread_history),
-                    "liquidation_events": len(self.liquidation_events)
+                    "symbols": len(self.states),
+                    "funding_rate_history": sum(len(s.funding_rate_history) for s in states),
+                    "volume_history": sum(len(s.volume_history) for s in states),
+                    "spread_history": sum(len(s.spread_history) for s in states),
+                    "liquidation_events": sum(len(s.liquidation_events) for s in states)
                 }
             }
 
@@ -984,4 +1250,5 @@ __all__ = [
     'VetoTrigger',
     'VetoAnalysisResult',
     'VetoSeverityEnum',
+    'SymbolVetoState',
 ]
@@ -18,6 +18,7 @@ from config.settings import (
 from config.constants import TrendDirectionEnum, VetoReasonEnum
 from utils.helpers import current_epoch_ms, safe_float, safe_int
 from utils.validators import validate_trade_data, validate_orderbook_data
+from utils.memory_manager import get_memory_manager
 
 
 @dataclass
@@ -79,6 +80,29 @@ def _create_default_volume_level() -> VolumeLevel:
     )
 
 
+def _evict_weak_price_levels(price_levels: Dict[float, "VolumeLevel"], fraction: float) -> int:
+    """
+    Eviction hook для price_levels: удаляются уровни с наименьшим объёмом
+
+    Args:
+        price_levels: Словарь уровней калькулятора
+        fraction: Доля уровней для удаления
+
+    Returns:
+        Количество удалённых уровней
+    """
+    n = int(len(price_levels) * fraction)
+    if n <= 0:
+        return 0
+    weakest = sorted(
+        price_levels.items(),
+        key=lambda item: item[1].executed_volume + item[1].resting_liquidity,
+    )[:n]
+    for price, _ in weakest:
+        del price_levels[price]
+    return n
+
+
 class EnhancedVolumeProfileCalculator:
     """Расширенный калькулятор Volume Profile с профессиональными возможностями"""
 
@@ -119,6 +143,11 @@ class EnhancedVolumeProfileCalculator:
             "validation_errors": 0,  # Новая метрика
         }
 
+        get_memory_manager().register_component(
+            "volume_profile.price_levels", self, "price_levels",
+            evict=_evict_weak_price_levels,
+        )
+
         logger.info("✅ EnhancedVolumeProfileCalculator инициализирован")
 
     def add_trade_data(self, trade_data: Dict, exchange: str = "bybit"):
@@ -6,13 +6,207 @@ Whale Activity Tracker
 """
 
 import sqlite3
+import time
+from array import array
+from bisect import bisect_left
 from datetime import datetime, timedelta, UTC
 from typing import Dict, List, Optional
-from collections import deque
+
+import numpy as np
+
 from config.settings import logger
+from core.trade_bus import TradeBatch
+from utils.metrics import get_metrics_registry
+from utils.performance import run_blocking_nowait
+from utils.memory_manager import get_memory_manager
 from connectors.whale_log_batcher import WhaleLogBatcher  # ✅ ПРОВЕРИТЬ ПУТЬ!
 
 
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+
+class WhaleTradeBuffer:
+    """
+    Колоночный буфер whale-сделок одного символа, упорядоченный по времени
+
+    Колонки — array (epoch-ms int64, side int8, size/price/value float64)
+    плюс префиксные суммы buy/sell объёма и количества. Окно [since, now]
+    находится bisect'ом по timestamps, а суммы по окну — разностью префиксов,
+    т.е. сводка за 5m/15m/1h стоит O(log n) независимо от числа сделок.
+    """
+
+    __slots__ = (
+        "max_trades", "_head", "timestamps", "sides", "sizes", "prices",
+        "values", "_cum_buy", "_cum_sell", "_cum_buy_n", "_cum_sell_n",
+    )
+
+    def __init__(self, max_trades: int = 10000):
+        """
+        Args:
+            max_trades: Максимум сделок в буфере (старые вытесняются)
+        """
+        self.max_trades = max_trades
+        self._head = 0  # Индекс первой живой записи (до компактизации)
+        self.timestamps = array("q")
+        self.sides = array("b")
+        self.sizes = array("d")
+        self.prices = array("d")
+        self.values = array("d")
+        # Префиксные суммы: _cum_x[i] = сумма по записям [0..i]
+        self._cum_buy = array("d")
+        self._cum_sell = array("d")
+        self._cum_buy_n = array("q")
+        self._cum_sell_n = array("q")
+
+    def __len__(self) -> int:
+        return len(self.timestamps) - self._head
+
+    def __sizeof__(self) -> int:
+        """Размер для memory manager: данные колонок (вместе с ещё не сжатыми)"""
+        columns = sum(
+            column.itemsize * len(column)
+            for column in (
+                self.timestamps, self.sides, self.sizes, self.prices, self.values,
+                self._cum_buy, self._cum_sell, self._cum_buy_n, self._cum_sell_n,
+            )
+        )
+        return object.__sizeof__(self) + columns
+
+    def append(self, ts_ms: int, side: int, size: float, price: float, value: float):
+        """Добавить сделку (ts_ms не меньше последнего — иначе выравнивается)"""
+        if self.timestamps and ts_ms < self.timestamps[-1]:
+            ts_ms = self.timestamps[-1]
+
+        is_buy = side == SIDE_BUY
+        prev_buy = self._cum_buy[-1] if self._cum_buy else 0.0
+        prev_sell = self._cum_sell[-1] if self._cum_sell else 0.0
+        prev_buy_n = self._cum_buy_n[-1] if self._cum_buy_n else 0
+        prev_sell_n = self._cum_sell_n[-1] if self._cum_sell_n else 0
+
+        self.timestamps.append(ts_ms)
+        self.sides.append(SIDE_BUY if is_buy else SIDE_SELL)
+        self.sizes.append(size)
+        self.prices.append(price)
+        self.values.append(value)
+        self._cum_buy.append(prev_buy + value if is_buy else prev_buy)
+        self._cum_sell.append(prev_sell if is_buy else prev_sell + value)
+        self._cum_buy_n.append(prev_buy_n + 1 if is_buy else prev_buy_n)
+        self._cum_sell_n.append(prev_sell_n if is_buy else prev_sell_n + 1)
+
+        if len(self) > self.max_trades:
+            self._head += 1
+            self._maybe_compact()
+
+    def index_at(self, since_ms: int) -> int:
+        """Индекс первой сделки с ts >= since_ms"""
+        return bisect_left(self.timestamps, since_ms, self._head)
+
+    def window(self, since_ms: int) -> Dict:
+        """
+        Агрегаты за окно [since_ms, последняя сделка] — O(log n)
+
+        Returns:
+            Dict: count, buy_count, sell_count, buy_volume, sell_volume
+        """
+        start = self.index_at(since_ms)
+        end = len(self.timestamps) - 1
+        if start > end:
+            return {
+                "count": 0, "buy_count": 0, "sell_count": 0,
+                "buy_volume": 0.0, "sell_volume": 0.0,
+            }
+
+        before = start - 1
+        buy_volume = self._cum_buy[end] - (self._cum_buy[before] if before >= 0 else 0.0)
+        sell_volume = self._cum_sell[end] - (self._cum_sell[before] if before >= 0 else 0.0)
+        buy_count = self._cum_buy_n[end] - (self._cum_buy_n[before] if before >= 0 else 0)
+        sell_count = self._cum_sell_n[end] - (self._cum_sell_n[before] if before >= 0 else 0)
+
+        return {
+            "count": end - start + 1,
+            "buy_count": buy_count,
+            "sell_count": sell_count,
+            "buy_volume": buy_volume,
+            "sell_volume": sell_volume,
+        }
+
+    def _trade_at(self, i: int) -> Dict:
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamps[i] / 1000, UTC),
+            "timestamp_ms": self.timestamps[i],
+            "side": "BUY" if self.sides[i] == SIDE_BUY else "SELL",
+            "size": self.sizes[i],
+            "price": self.prices[i],
+            "value": self.values[i],
+        }
+
+    def trades(self, since_ms: int, newest_first: bool = True) -> List[Dict]:
+        """Сделки окна как список dict (материализуется только окно)"""
+        indices = range(self.index_at(since_ms), len(self.timestamps))
+        if newest_first:
+            indices = reversed(indices)
+        return [self._trade_at(i) for i in indices]
+
+    def largest(self, since_ms: int) -> Optional[Dict]:
+        """Крупнейшая сделка окна (линейно по окну, не по буферу)"""
+        start = self.index_at(since_ms)
+        if start >= len(self.values):
+            return None
+        values = self.values
+        best = max(range(start, len(values)), key=values.__getitem__)
+        return self._trade_at(best)
+
+    def drop_before(self, cutoff_ms: int) -> int:
+        """Удалить сделки старше cutoff_ms"""
+        start = self.index_at(cutoff_ms)
+        removed = start - self._head
+        self._head = start
+        self._maybe_compact()
+        return removed
+
+    def drop_oldest(self, n: int) -> int:
+        """Удалить n самых старых сделок (память освобождается сразу)"""
+        n = max(0, min(n, len(self)))
+        self._head += n
+        self._maybe_compact(force=True)
+        return n
+
+    def _maybe_compact(self, force: bool = False):
+        """
+        Физически удалить вытесненные записи, когда их накопилось
+        не меньше живых (амортизированно O(1) на append)
+
+        Args:
+            force: Сжать сразу (eviction по бюджету памяти)
+        """
+        head = self._head
+        if head == 0 or (head < len(self) and not force):
+            return
+
+        base_buy = self._cum_buy[head - 1]
+        base_sell = self._cum_sell[head - 1]
+        base_buy_n = self._cum_buy_n[head - 1]
+        base_sell_n = self._cum_sell_n[head - 1]
+
+        self.timestamps = self.timestamps[head:]
+        self.sides = self.sides[head:]
+        self.sizes = self.sizes[head:]
+        self.prices = self.prices[head:]
+        self.values = self.values[head:]
+        # Rebase префиксов, чтобы суммы не росли бесконечно
+        self._cum_buy = array("d", (v - base_buy for v in self._cum_buy[head:]))
+        self._cum_sell = array("d", (v - base_sell for v in self._cum_sell[head:]))
+        self._cum_buy_n = array("q", (v - base_buy_n for v in self._cum_buy_n[head:]))
+        self._cum_sell_n = array("q", (v - base_sell_n for v in self._cum_sell_n[head:]))
+        self._head = 0
+
+
+def _evict_whale_buffers(buffers: Dict[str, WhaleTradeBuffer], fraction: float) -> int:
+    """Eviction hook для memory manager: самые старые сделки каждого символа"""
+    return sum(buf.drop_oldest(int(len(buf) * fraction)) for buf in buffers.values())
+
+
 class WhaleActivityTracker:
     """
     Отслеживание активности китов (крупных ордеров)
@@ -24,9 +218,22 @@ class WhaleActivityTracker:
     ✅ С ПОДДЕРЖКОЙ БАЗЫ ДАННЫХ SQLite!CVD!
     """
 
-    def __init__(self, window_minutes: int = 15, db_path: Optional[str] = None, enable_batcher: bool = True):
+    def __init__(
+        self,
+        window_minutes: int = 15,
+        db_path: Optional[str] = None,
+        enable_batcher: bool = True,
+        max_trades_per_symbol: int = 10000,
+    ):
         self.window_minutes = window_minutes
-        self.whale_trades = {}
+        # Память держит не меньше часа — для окон 5m/15m/1h
+        self.retention_minutes = max(window_minutes, 60)
+        self.max_trades_per_symbol = max_trades_per_symbol
+        self.whale_trades: Dict[str, WhaleTradeBuffer] = {}
+
+        self._db_write_latency = get_metrics_registry().histogram(
+            "db_write_seconds", "Латентность записи в SQLite", ("table",)
+        ).labels("large_trades")
 
         self.whale_thresholds = {
             "BTCUSDT": 10000,  # $10,000
@@ -43,6 +250,10 @@ class WhaleActivityTracker:
         # ✅ ДОБАВЛЕНО: Накопление CVD данных
         self.trade_data = {}  # {"BTCUSDT": {"buy_volume": 0, "sell_volume": 0, ...}}
 
+        get_memory_manager().register_component(
+            "whale_tracker.whale_trades", self, "whale_trades", evict=_evict_whale_buffers
+        )
+
         # ✅ ИНИЦИАЛИЗАЦИЯ BATCHER!
         if enable_batcher:
             try:
@@ -155,54 +366,36 @@ class WhaleActivityTracker:
         data["cvd_percent"] = self.get_cvd_percent(symbol)
         return data
 
+    def _volume_entry(self, symbol: str) -> Dict:
+        entry = self.trade_data.get(symbol)
+        if entry is None:
+            entry = self.trade_data[symbol] = {
+                "buy_volume": 0.0,
+                "sell_volume": 0.0,
+                "total_trades": 0,
+                "last_update": datetime.now(UTC),
+            }
+        return entry
+
     def add_trade(self, symbol: str, side: str, size: float, price: float) -> bool:
         """Добавить сделку (проверить кита)"""
         try:
             value = size * price
             threshold = self.whale_thresholds.get(symbol, self.default_threshold)
 
-            if symbol not in self.trade_data:
-                self.trade_data[symbol] = {
-                    "buy_volume": 0.0,
-                    "sell_volume": 0.0,
-                    "total_trades": 0,
-                    "last_update": datetime.now(UTC),
-                }
-
             # Обновляем объемы для CVD
+            data = self._volume_entry(symbol)
             if side.upper() == "BUY":
-                self.trade_data[symbol]["buy_volume"] += value
+                data["buy_volume"] += value
             elif side.upper() == "SELL":
-                self.trade_data[symbol]["sell_volume"] += value
+                data["sell_volume"] += value
 
-            self.trade_data[symbol]["total_trades"] += 1
-            self.trade_data[symbol]["last_update"] = datetime.now(UTC)
+            data["total_trades"] += 1
+            data["last_update"] = datetime.now(UTC)
 
             # === ОСТАЛЬНАЯ ЛОГИКА ДЛЯ КИТОВ (БЕЗ ИЗМЕНЕНИЙ) ===
             if value >= threshold:
-                timestamp = datetime.now(UTC)
-
-                # 1. Сохранить в память
-                if symbol not in self.whale_trades:
-                    self.whale_trades[symbol] = deque(maxlen=1000)
-
-                trade = {
-                    "timestamp": timestamp,
-                    "side": side.upper(),
-                    "size": size,
-                    "price": price,
-                    "value": value,
-                }
-                self.whale_trades[symbol].append(trade)
-
-                # 2. ✅ Сохранить в БД
-                if self.db_path:
-                    self._save_to_database(
-                        symbol, side.upper(), size, price, value, timestamp
-                    )
-                if self.whale_log_batcher:
-                    self.whale_log_batcher.add_whale(symbol, side.upper(), value)
-
+                self._record_whale(symbol, side.upper(), size, price, value, datetime.now(UTC))
                 return True
 
             return False
@@ -211,6 +404,75 @@ class WhaleActivityTracker:
             logger.error(f"❌ add_trade: {e}", exc_info=True)
             return False
 
+    def on_trades(self, batch: TradeBatch) -> int:
+        """
+        Подписчик TradeBus: объёмы по символам векторно, порог кита —
+        маской по батчу; построчно обрабатываются только сами киты
+
+        Args:
+            batch: Нормализованные сделки всех бирж
+
+        Returns:
+            Количество китов в батче
+        """
+        notional = batch.notional
+        buy = np.where(batch.side > 0, notional, 0.0)
+        buys = batch.per_symbol(buy)
+        sells = batch.per_symbol(notional - buy)
+        counts = batch.per_symbol(np.ones(len(batch)))
+        now = datetime.now(UTC)
+
+        for symbol, buy_volume in buys.items():
+            data = self._volume_entry(symbol)
+            data["buy_volume"] += buy_volume
+            data["sell_volume"] += sells[symbol]
+            data["total_trades"] += int(counts[symbol])
+            data["last_update"] = now
+
+        thresholds = np.array(
+            [self.whale_thresholds.get(s, self.default_threshold) for s in batch.symbols],
+            dtype=np.float64,
+        )[batch.symbol]
+        whales = np.flatnonzero(notional >= thresholds)
+
+        for i in whales.tolist():
+            self._record_whale(
+                batch.symbols[batch.symbol[i]],
+                "BUY" if batch.side[i] > 0 else "SELL",
+                float(batch.qty[i]),
+                float(batch.price[i]),
+                float(notional[i]),
+                now,
+            )
+        return len(whales)
+
+    def _record_whale(
+        self, symbol: str, side: str, size: float, price: float, value: float, timestamp: datetime
+    ):
+        """Кит: в колоночный буфер, в БД (вне event loop) и в batcher логов"""
+        # 1. Сохранить в память (колоночный буфер)
+        buffer = self.whale_trades.get(symbol)
+        if buffer is None:
+            buffer = WhaleTradeBuffer(self.max_trades_per_symbol)
+            self.whale_trades[symbol] = buffer
+
+        buffer.append(
+            int(timestamp.timestamp() * 1000),
+            SIDE_BUY if side == "BUY" else SIDE_SELL,
+            size,
+            price,
+            value,
+        )
+
+        # 2. ✅ Сохранить в БД (вне event loop)
+        if self.db_path:
+            run_blocking_nowait(
+                self._save_to_database,
+                symbol, side, size, price, value, timestamp,
+            )
+        if self.whale_log_batcher:
+            self.whale_log_batcher.add_whale(symbol, side, value)
+
     def _save_to_database(
         self,
         symbol: str,
@@ -222,6 +484,7 @@ class WhaleActivityTracker:
     ):
         """Сохранить в БД"""
         conn = None
+        write_start = time.perf_counter()
         try:
             conn = sqlite3.connect(self.db_path, timeout=10.0)
             cursor = conn.cursor()
@@ -242,26 +505,21 @@ class WhaleActivityTracker:
         finally:
             if conn:
                 conn.close()
+            self._db_write_latency.observe(time.perf_counter() - write_start)
 
     def get_recent_whales(
         self, symbol: str, minutes: Optional[int] = None
     ) -> List[Dict]:
-        """Получить киты из памяти"""
+        """Получить киты из памяти (новые первыми)"""
         try:
-            if symbol not in self.whale_trades:
+            buffer = self.whale_trades.get(symbol)
+            if buffer is None:
                 return []
 
             if minutes is None:
                 minutes = self.window_minutes
 
-            cutoff_time = datetime.now(UTC) - timedelta(minutes=minutes)
-            recent = [
-                trade
-                for trade in self.whale_trades[symbol]
-                if trade["timestamp"] >= cutoff_time
-            ]
-            recent.sort(key=lambda x: x["timestamp"], reverse=True)
-            return recent
+            return buffer.trades(self._cutoff_ms(minutes * 60))
 
         except Exception as e:
             logger.error(f"❌ get_recent_whales: {e}", exc_info=True)
@@ -345,17 +603,70 @@ class WhaleActivityTracker:
             logger.error(f"❌ get_recent_whales_from_db: {e}", exc_info=True)
             return []
 
+    def _cutoff_ms(self, seconds: float) -> int:
+        """Начало окна в epoch-ms"""
+        return int((time.time() - seconds) * 1000)
+
+    def get_window_stats(self, symbol: str, seconds: float) -> Dict:
+        """
+        Агрегаты китов за последние N секунд из памяти — O(log n)
+
+        Args:
+            symbol: Торговая пара
+            seconds: Размер окна
+
+        Returns:
+            Dict: count, buy_count, sell_count, buy_volume, sell_volume, net_volume
+        """
+        buffer = self.whale_trades.get(symbol)
+        if buffer is None:
+            stats = {
+                "count": 0, "buy_count": 0, "sell_count": 0,
+                "buy_volume": 0.0, "sell_volume": 0.0,
+            }
+        else:
+            stats = buffer.window(self._cutoff_ms(seconds))
+        stats["net_volume"] = stats["buy_volume"] - stats["sell_volume"]
+        return stats
+
+    def get_multi_window_stats(
+        self, symbol: str, windows: tuple = (300, 900, 3600)
+    ) -> Dict[int, Dict]:
+        """Агрегаты по нескольким окнам (по умолчанию 5m / 15m / 1h)"""
+        return {seconds: self.get_window_stats(symbol, seconds) for seconds in windows}
+
+    def _summary_from_trades(self, whales: List[Dict]) -> Dict:
+        """Агрегаты из списка сделок (fallback на данные БД)"""
+        buy_trades = [t for t in whales if t["side"] == "BUY"]
+        sell_trades = [t for t in whales if t["side"] == "SELL"]
+        return {
+            "count": len(whales),
+            "buy_count": len(buy_trades),
+            "sell_count": len(sell_trades),
+            "buy_volume": sum(t["value"] for t in buy_trades),
+            "sell_volume": sum(t["value"] for t in sell_trades),
+        }
+
     def get_whale_summary(self, symbol: str, minutes: Optional[int] = None) -> Dict:
         """Получить сводку по китам"""
         try:
-            # Сначала из памяти
-            whales = self.get_recent_whales(symbol, minutes)
+            if minutes is None:
+                minutes = self.window_minutes
+
+            # Сначала из памяти (O(log n) по префиксным суммам)
+            stats = self.get_window_stats(symbol, minutes * 60)
+            largest = None
+            if stats["count"]:
+                largest = self.whale_trades[symbol].largest(self._cutoff_ms(minutes * 60))
 
             # Если пусто, из БД
-            if not whales and self.db_path:
+            elif self.db_path:
                 whales = self.get_recent_whales_from_db(symbol, minutes)
+                if whales:
+                    stats = self._summary_from_trades(whales)
+                    largest = max(whales, key=lambda x: x["value"])
 
-            if not whales:
+            if not stats["count"]:
                 return {
                     "count": 0,
                     "buy_count": 0,
@@ -367,11 +678,8 @@ class WhaleActivityTracker:
                     "sentiment": "NEUTRAL",
                 }
 
-            buy_trades = [t for t in whales if t["side"] == "BUY"]
-            sell_trades = [t for t in whales if t["side"] == "SELL"]
-
-            buy_volume = sum(t["value"] for t in buy_trades)
-            sell_volume = sum(t["value"] for t in sell_trades)
+            buy_volume = stats["buy_volume"]
+            sell_volume = stats["sell_volume"]
             net_volume = buy_volume - sell_volume
 
             if net_volume > 0:
@@ -385,12 +693,10 @@ class WhaleActivityTracker:
             else:
                 sentiment = "NEUTRAL"
 
-            largest = max(whales, key=lambda x: x["value"])
-
             return {
-                "count": len(whales),
-                "buy_count": len(buy_trades),
-                "sell_count": len(sell_trades),
+                "count": stats["count"],
+                "buy_count": stats["buy_count"],
+                "sell_count": stats["sell_count"],
                 "buy_volume": buy_volume,
                 "sell_volume": sell_volume,
                 "net_volume": net_volume,
@@ -414,15 +720,16 @@ class WhaleActivityTracker:
     def get_whale_activity(self, symbol: str, timeframe_seconds: int = 300) -> Dict:
         """Получить активность китов за последние N секунд"""
         try:
-            minutes = timeframe_seconds / 60
-
-            # Приоритет БД
-            if self.db_path:
-                whales = self.get_recent_whales_from_db(symbol, minutes=minutes)
-            else:
-                whales = self.get_recent_whales(symbol, minutes=minutes)
+            # Память — O(log n); БД только если в памяти пусто (после рестарта)
+            stats = self.get_window_stats(symbol, timeframe_seconds)
+            if not stats["count"] and self.db_path:
+                whales = self.get_recent_whales_from_db(
+                    symbol, minutes=timeframe_seconds / 60
+                )
+                if whales:
+                    stats = self._summary_from_trades(whales)
 
-            if not whales:
+            if not stats["count"]:
                 return {
                     "trades": 0,
                     "buy_volume": 0,
@@ -431,11 +738,8 @@ class WhaleActivityTracker:
                     "dominant_side": "neutral",
                 }
 
-            buy_trades = [t for t in whales if t["side"] == "BUY"]
-            sell_trades = [t for t in whales if t["side"] == "SELL"]
-
-            buy_volume = sum(t["value"] for t in buy_trades)
-            sell_volume = sum(t["value"] for t in sell_trades)
+            buy_volume = stats["buy_volume"]
+            sell_volume = stats["sell_volume"]
             net = buy_volume - sell_volume
 
             if buy_volume > sell_volume * 1.2:
@@ -446,7 +750,7 @@ class WhaleActivityTracker:
                 dominant_side = "neutral"
 
             return {
-                "trades": len(whales),
+                "trades": stats["count"],
                 "buy_volume": buy_volume,
                 "sell_volume": sell_volume,
                 "net": net,
@@ -466,20 +770,11 @@ class WhaleActivityTracker:
     def cleanup_old_trades(self):
         """Очистка старых сделок"""
         try:
-            cutoff_time = datetime.now(UTC) - timedelta(minutes=self.window_minutes)
-
-            for symbol in list(self.whale_trades.keys()):
-                recent = [
-                    trade
-                    for trade in self.whale_trades[symbol]
-                    if trade["timestamp"] >= cutoff_time
-                ]
-
-                if recent:
-                    self.whale_trades[symbol] = deque(
-                        recent, maxlen=1000
-                    )  # ⬅️ УВЕЛИЧЕНО ДО 1000!
-                else:
+            cutoff_ms = self._cutoff_ms(self.retention_minutes * 60)
+
+            for symbol, buffer in list(self.whale_trades.items()):
+                buffer.drop_before(cutoff_ms)
+                if not len(buffer):
                     del self.whale_trades[symbol]
 
             # Очистка БД (старше 7 дней)
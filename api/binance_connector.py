@@ -10,6 +10,7 @@ import hashlib
 import time
 from typing import Dict, List, Optional
 from config.settings import logger
+from utils.http_transport import get_http_transport
 
 class EnhancedBinanceConnector:
     """Расширенный коннектор для Binance API"""
@@ -33,7 +34,7 @@ class EnhancedBinanceConnector:
         """Создание HTTP сессии"""
         if self.session is None or self.session.closed:
             headers = {'X-MBX-APIKEY': self.api_key} if self.api_key else {}
-            self.session = aiohttp.ClientSession(headers=headers)
+            self.session = get_http_transport().client("binance", headers=headers)
     
     def _generate_signature(self, params: Dict) -> str:
         """Генерация HMAC SHA256 подписи"""
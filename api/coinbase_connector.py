@@ -11,6 +11,7 @@ import time
 import json
 from typing import Dict, List, Optional
 from config.settings import logger
+from utils.http_transport import get_http_transport
 
 class EnhancedCoinbaseConnector:
     """Расширенный коннектор для Coinbase Advanced Trade API"""
@@ -27,7 +28,7 @@ class EnhancedCoinbaseConnector:
     async def ensure_session(self):
         """Создание HTTP сессии"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = get_http_transport().client("coinbase")
     
     def _generate_signature(self, timestamp: str, method: str, request_path: str, body: str = '') -> str:
         """Генерация CB-ACCESS-SIGN подписи"""
@@ -12,6 +12,7 @@ import json
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from config.settings import logger
+from utils.http_transport import get_http_transport
 
 class EnhancedOKXConnector:
     """Расширенный коннектор для OKX API"""
@@ -30,7 +31,7 @@ class EnhancedOKXConnector:
     async def ensure_session(self):
         """Создание HTTP сессии"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = get_http_transport().client("okx")
     
     def _generate_signature(self, timestamp: str, method: str, request_path: str, body: str = '') -> str:
         """Генерация подписи для OKX API"""
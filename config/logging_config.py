@@ -1,9 +1,88 @@
 # config/logging_config.py
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+# Фонові потоки запису: logger name → (logger, QueueHandler, QueueListener)
+_listeners: Dict[str, Tuple[logging.Logger, QueueHandler, QueueListener]] = {}
+
+
+class RenderedQueueHandler(QueueHandler):
+    """
+    QueueHandler без копії запису
+
+    Повідомлення рендериться один раз у потоці виклику (аргументи можуть
+    змінитися до запису), traceback кешується в exc_text — форматтери
+    handlers у фоновому потоці використовують його замість exc_info.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def attach_queue(target: logging.Logger, handlers: List[logging.Handler]) -> QueueHandler:
+    """
+    Повісити на logger QueueHandler, а handlers запускати у фоновому потоці
+
+    Потік циклу лише кладе запис у чергу; форматування та файловий I/O
+    виконує QueueListener.
+
+    Args:
+        target: Logger
+        handlers: Handlers з уже встановленими форматтерами і рівнями
+
+    Returns:
+        QueueHandler, доданий до logger
+    """
+    detach_queue(target)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = RenderedQueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[target.name] = (target, queue_handler, listener)
+    target.addHandler(queue_handler)
+    return queue_handler
+
+
+def detach_queue(target: logging.Logger):
+    """Зняти QueueHandler з logger, дописати чергу і зупинити фоновий потік"""
+    entry = _listeners.pop(target.name, None)
+    if entry is not None:
+        _, queue_handler, listener = entry
+        target.removeHandler(queue_handler)
+        listener.stop()
+
+
+def stop_queue_logging():
+    """Дописати всі черги і зупинити фонові потоки (atexit, завершення бота)"""
+    for target, _, _ in list(_listeners.values()):
+        detach_queue(target)
+
+
+def get_queue_stats() -> Dict[str, int]:
+    """Записів у черзі очікують запису"""
+    return {
+        "listeners": len(_listeners),
+        "queued": sum(listener.queue.qsize() for _, _, listener in _listeners.values()),
+    }
+
+
+# Виконується до logging.shutdown (atexit — LIFO)
+atexit.register(stop_queue_logging)
 
 
 class LogConfig:
@@ -23,6 +102,9 @@ class LogConfig:
     # Визначити середовище з змінної оточення або за замовчуванням
     ENV = _get_env.__func__('ENVIRONMENT', 'development')
 
+    # Запис логів у фоновому потоці (QueueHandler → QueueListener)
+    QUEUE = _get_env.__func__('LOG_QUEUE_ENABLED', 'true').lower() == 'true'
+
     # Рівні логування для різних середовищ
     LOG_LEVELS = {
         'development': logging.DEBUG,   # Повні деталі для відлагодження
@@ -37,13 +119,14 @@ class LogConfig:
     }
 
     @classmethod
-    def setup_logger(cls, name='gio_bot', environment=None):
+    def setup_logger(cls, name='gio_bot', environment=None, use_queue=None):
         """
         Налаштувати logger з автоматичним визначенням середовища
 
         Args:
             name: Ім'я logger (за замовчуванням 'gio_bot')
             environment: 'development' або 'production' (якщо None - з ENV)
+            use_queue: Писати через QueueListener (якщо None - з LOG_QUEUE_ENABLED)
 
         Returns:
             Налаштований logger
@@ -59,8 +142,10 @@ class LogConfig:
 
         # Створити або отримати logger
         logger = logging.getLogger(name)
+        detach_queue(logger)
         logger.handlers.clear()  # Очистити старі handlers
         logger.setLevel(logging.DEBUG)  # Logger приймає всі рівні
+        handlers = []
 
         # Визначити формат залежно від середовища
         if env == 'development':
@@ -77,7 +162,7 @@ class LogConfig:
         console_handler.setLevel(console_level)
         console_formatter = ColoredFormatter(console_format)
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
         # === HANDLER 2: Файл DEBUG (тільки для development) ===
         if env == 'development':
@@ -91,7 +176,7 @@ class LogConfig:
             debug_handler.setLevel(logging.DEBUG)
             debug_formatter = logging.Formatter(cls.FORMATS['detailed'])
             debug_handler.setFormatter(debug_formatter)
-            logger.addHandler(debug_handler)
+            handlers.append(debug_handler)
 
             print(f"📁 Debug log: {debug_file}")
 
@@ -106,7 +191,7 @@ class LogConfig:
         error_handler.setLevel(logging.WARNING)
         error_formatter = logging.Formatter(cls.FORMATS['detailed'])
         error_handler.setFormatter(error_formatter)
-        logger.addHandler(error_handler)
+        handlers.append(error_handler)
 
         # === HANDLER 4: Основний файл (всі події) ===
         main_file = log_dir / f'gio_bot_{env}.log'
@@ -119,7 +204,15 @@ class LogConfig:
         main_handler.setLevel(log_level)
         main_formatter = logging.Formatter(file_format)
         main_handler.setFormatter(main_formatter)
-        logger.addHandler(main_handler)
+        handlers.append(main_handler)
+
+        # === Підключення: черга з фоновим записом або напряму ===
+        queued = cls.QUEUE if use_queue is None else use_queue
+        if queued:
+            attach_queue(logger, handlers)
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
 
         # Вивести інформацію про налаштування
         print("=" * 70)
@@ -127,6 +220,7 @@ class LogConfig:
         print(f"📊 Log Level: {logging.getLevelName(log_level)}")
         print(f"📁 Main log: {main_file}")
         print(f"📁 Error log: {error_file}")
+        print(f"🧵 Writer: {'QueueListener (background thread)' if queued else 'synchronous'}")
         print("=" * 70)
 
         # Логувати початок сесії
@@ -154,13 +248,17 @@ class ColoredFormatter(logging.Formatter):
     }
 
     def format(self, record):
-        # Додати колір до levelname
+        # Додати колір до levelname (запис спільний для всіх handlers —
+        # файлові handlers після консолі мають бачити levelname без ANSI)
         levelname = record.levelname
         if levelname in self.COLORS:
             colored_levelname = f"{self.COLORS[levelname]}{levelname}{self.COLORS['RESET']}"
             record.levelname = colored_levelname
 
-        return super().format(record)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
 class ModuleLoggerAdapter:
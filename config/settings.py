@@ -11,6 +11,7 @@ import logging
 from pathlib import Path
 from typing import List
 from dotenv import load_dotenv
+from config.logging_config import attach_queue
 
 
 # === ФУНКЦИЯ ДЛЯ УДАЛЕНИЯ КАВЫЧЕК ===
@@ -102,6 +103,10 @@ TELEGRAM_CONFIG = {
     "auto_signals": True,
     "auto_alerts": True,
     "commands_enabled": True,
+    # Outbox: лимиты Telegram (~30 msg/s на бота, ~1 msg/s в один чат)
+    "outbox_global_rate": int(os.getenv("TELEGRAM_OUTBOX_GLOBAL_RATE", "25")),
+    "outbox_per_chat_rate": int(os.getenv("TELEGRAM_OUTBOX_PER_CHAT_RATE", "1")),
+    "outbox_max_queue": int(os.getenv("TELEGRAM_OUTBOX_MAX_QUEUE", "1000")),
 }
 
 # ============================================================================
@@ -130,12 +135,24 @@ if LOG_TO_FILE and DEVELOPMENT_MODE:
         )
     )
 
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format=LOG_FORMAT,
-    datefmt=LOG_DATE_FORMAT,
-    handlers=handlers,
-)
+# Запись в консоль/файл — в фоновом потоке (QueueListener), цикл только
+# кладёт запись в очередь. Как basicConfig: если root уже настроен — не трогаем
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE_ENABLED", "true").lower() == "true"
+# Hot-path логи (LogBatcher.log_throttled): не чаще раза в N секунд на место вызова
+LOG_THROTTLE_SECONDS = float(os.getenv("LOG_THROTTLE_SECONDS", "10"))
+
+if LOG_QUEUE_ENABLED and not logging.root.handlers:
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+    logging.root.setLevel(LOG_LEVEL)
+    attach_queue(logging.root, handlers)
+else:
+    logging.basicConfig(
+        level=LOG_LEVEL,
+        format=LOG_FORMAT,
+        datefmt=LOG_DATE_FORMAT,
+        handlers=handlers,
+    )
 
 # Отключаем логи сторонних библиотек
 logging.getLogger("httpx").setLevel(logging.ERROR)
@@ -232,6 +249,175 @@ MEMORY_CONFIG = {
     "cleanup_interval": int(
         os.getenv("CLEANUP_INTERVAL", "180" if PRODUCTION_MODE else "300")
     ),
+    # Per-component учёт памяти: интервал замеров и tracemalloc
+    "sample_interval": int(os.getenv("MEMORY_SAMPLE_INTERVAL", "300")),
+    "tracemalloc": os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true",
+    "tracemalloc_frames": int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "1")),
+    # Бюджеты компонентов (MB); при превышении вызывается их eviction hook
+    "component_budgets_mb": {
+        "volume_profile.price_levels": 48 if PRODUCTION_MODE else 128,
+        "bybit.klines_cache": 32 if PRODUCTION_MODE else 64,
+        "bot.large_trades": 8,
+        "bot.news_cache": 8,
+        "news_connector.news_cache": 8,
+        "news_store.articles": 8,
+        "whale_tracker.whale_trades": 16 if PRODUCTION_MODE else 32,
+    },
+}
+
+# ============================================================================
+# EVENT LOOP WATCHDOG (задержка loop, блокирующие вызовы)
+# ============================================================================
+LOOP_MONITOR_CONFIG = {
+    "enabled": os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true",
+    "interval": float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1")),
+    # Задержка loop, после которой снимается стек блокирующей корутины (мс)
+    "stall_threshold_ms": float(os.getenv("LOOP_STALL_THRESHOLD_MS", "250")),
+    # Debug: предупреждать о time.sleep / sqlite3 / requests / json.dump в loop
+    "blocking_guard": os.getenv("LOOP_BLOCKING_GUARD", "false").lower() == "true",
+}
+
+# ============================================================================
+# HTTP TRANSPORT (общий пул REST соединений)
+# ============================================================================
+HTTP_TRANSPORT_CONFIG = {
+    "pool_limit": int(os.getenv("HTTP_POOL_LIMIT", "100")),
+    "pool_limit_per_host": int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20")),
+    "keepalive_timeout": 30,
+    "timeout": 30,
+    "connect_timeout": 10,
+    "max_retries": int(os.getenv("HTTP_MAX_RETRIES", "2")),
+    "retry_base_delay": 0.5,
+    "retry_max_delay": 10.0,
+    # Бюджет в единицах веса в секунду (с запасом от официальных лимитов):
+    # Bybit 600 req/5s, Binance 6000 weight/min, OKX ~20 req/2s, Coinbase 10 req/s
+    "exchange_budgets": {
+        "bybit": int(os.getenv("BYBIT_WEIGHT_PER_SEC", "50")),
+        "binance": int(os.getenv("BINANCE_WEIGHT_PER_SEC", "40")),
+        "okx": int(os.getenv("OKX_WEIGHT_PER_SEC", "8")),
+        "coinbase": int(os.getenv("COINBASE_WEIGHT_PER_SEC", "8")),
+    },
+    "default_budget": 5,
+}
+
+# ============================================================================
+# TRADE BUS (единая шина сделок всех бирж)
+# ============================================================================
+TRADE_BUS_CONFIG = {
+    # Как часто доставлять накопленные сделки подписчикам (сек)
+    "flush_interval": float(os.getenv("TRADE_BUS_FLUSH_INTERVAL", "0.05")),
+    # Доставка раньше интервала, если в буфере столько сделок
+    "max_batch": int(os.getenv("TRADE_BUS_MAX_BATCH", "5000")),
+    # Крупная сделка для bot.large_trades (Cluster Detector), USD
+    "large_trade_usd": float(os.getenv("LARGE_TRADE_USD", "50000")),
+}
+
+# ============================================================================
+# ALERT SUPPRESSION (общий индекс антиспама алертов)
+# ============================================================================
+ALERT_SUPPRESSION_CONFIG = {
+    # Cooldown по типу алерта (сек); остальные типы — default_cooldown
+    "default_cooldown": 300,
+    "cooldowns": {
+        "liquidation": 60,
+        "liquidation_cascade": 300,
+        "volume_spike": 60,
+        "orderbook_imbalance": 300,
+        "l2_imbalance": 300,
+        "news": 300,
+        "news_tone_shift": 300,
+        "mm_scenario": 600,
+        "vp_break": 900,
+    },
+    # Общий лимит алертов в минуту (все системы)
+    "max_per_minute": int(os.getenv("ALERTS_MAX_PER_MINUTE", "20")),
+    # Состояние переживает рестарт: повторный запуск не шлёт те же алерты
+    "state_path": os.getenv("ALERT_SUPPRESSION_STATE", str(DATA_DIR / "alert_suppression.json")),
+    "save_interval": 5,
+}
+
+# ============================================================================
+# FOOTPRINT (все сделки → ценовые бины × временные срезы)
+# ============================================================================
+FOOTPRINT_CONFIG = {
+    # Скользящее окно и длительность среза (сек)
+    "window_seconds": int(os.getenv("FOOTPRINT_WINDOW_SECONDS", "300")),
+    "slice_seconds": int(os.getenv("FOOTPRINT_SLICE_SECONDS", "15")),
+    # Ширина бина (% цены → округляется до 1/2/5 × 10^k) и число бинов
+    "bin_pct": float(os.getenv("FOOTPRINT_BIN_PCT", "0.05")),
+    "bins": int(os.getenv("FOOTPRINT_BINS", "200")),
+    # Absorption: объём бина ≥ x среднего при смещении цены ≤ %
+    "absorption_multiplier": 2.0,
+    "absorption_max_move_pct": 0.15,
+    # Exhaustion: объём последних срезов < x среднего после движения ≥ %
+    "exhaustion_multiplier": 0.3,
+    "exhaustion_min_move_pct": 0.3,
+}
+
+# ============================================================================
+# CROSS-EXCHANGE VALIDATOR (ряды бирж на общей сетке времени)
+# ============================================================================
+CROSS_EXCHANGE_CONFIG = {
+    # Шаг сетки (мс) и окно rolling статистик (слотов)
+    "grid_ms": int(os.getenv("CROSS_EXCHANGE_GRID_MS", "1000")),
+    "window_slots": int(os.getenv("CROSS_EXCHANGE_WINDOW_SLOTS", "120")),
+    # Биржа без обновлений дольше stale_seconds не участвует в сравнении
+    "stale_seconds": 10,
+    # Flash crash: просадка от rolling max ≥ % на 2+ биржах
+    "flash_crash_pct": 3.0,
+    # Pump/dump: всплеск объёма + движение от rolling min/max ≥ %
+    "pump_dump_pct": 5.0,
+    # Liquidity drain: глубина < доли от средней за окно на 2+ биржах
+    "liquidity_drain_ratio": 0.5,
+    # Минимум общих слотов пары бирж для корреляции объёмов
+    "min_correlation_points": 10,
+    # Уровней стакана с каждой стороны в глубине (liquidity drain)
+    "depth_levels": 20,
+}
+
+# ============================================================================
+# LIQUIDITY ENGINE (глубина, slippage и стены по live-стаканам)
+# ============================================================================
+LIQUIDITY_ENGINE_CONFIG = {
+    # Биржи сводного стакана (живые WebSocket книги)
+    "exchanges": ("bybit", "binance", "okx", "coinbase"),
+    # Глубина REST-стакана, если живой книги нет
+    "rest_depth": int(os.getenv("LIQUIDITY_REST_DEPTH", "200")),
+    # Размеры ордеров для оценки slippage (USD)
+    "slippage_sizes": (10_000, 100_000, 500_000, 1_000_000),
+    # Окна глубины от лучшей цены (bps)
+    "depth_bps": (10, 50, 100),
+}
+
+# ============================================================================
+# LIQUIDATION STREAM (Bybit allLiquidation + Binance forceOrder)
+# ============================================================================
+LIQUIDATION_STREAM_CONFIG = {
+    "enabled": os.getenv("LIQUIDATION_STREAM_ENABLED", "true").lower() == "true",
+    "exchanges": ("bybit", "binance"),
+    # Размер временного бакета (сек) и глубина истории (часы)
+    "bucket_seconds": int(os.getenv("LIQUIDATION_BUCKET_SECONDS", "60")),
+    "history_hours": int(os.getenv("LIQUIDATION_HISTORY_HOURS", "24")),
+    # Окна сводок (сек)
+    "windows": {"1h": 3600, "4h": 14400, "24h": 86400},
+    # Последние события символа для heatmap и алертов
+    "max_events": int(os.getenv("LIQUIDATION_MAX_EVENTS", "20000")),
+    # Ширина ценового бина heatmap (% цены)
+    "heatmap_bin_pct": float(os.getenv("LIQUIDATION_HEATMAP_BIN_PCT", "0.25")),
+    # Ликвидация, передаваемая подписчикам (Veto каскад), USD
+    "significant_usd": float(os.getenv("LIQUIDATION_SIGNIFICANT_USD", "100000")),
+}
+
+# ============================================================================
+# NEWS STORE (статьи CryptoPanic / CryptoCompare + sentiment, SQLite)
+# ============================================================================
+NEWS_STORE_CONFIG = {
+    "path": os.getenv("NEWS_STORE_PATH", str(DATA_DIR / "news_store.db")),
+    # Статья удаляется, если не появлялась в выдаче API дольше TTL
+    "article_ttl_hours": float(os.getenv("NEWS_ARTICLE_TTL_HOURS", "48")),
+    # TTL результата запроса к API (сек)
+    "query_ttl": int(os.getenv("NEWS_QUERY_TTL", "900")),
+    "evict_interval": 300,
 }
 
 # ============================================================================
@@ -241,6 +427,8 @@ WEBSOCKET_CONFIG = {
     "ping_interval": int(os.getenv("WS_PING_INTERVAL", "30")),
     "ping_timeout": int(os.getenv("WS_PING_TIMEOUT", "10")),
     "reconnect_delay": int(os.getenv("WS_RECONNECT_DELAY", "5")),
+    # JSON backend для сообщений: auto (orjson → ujson → json) / orjson / ujson / json
+    "json_backend": os.getenv("JSON_BACKEND", "auto").lower(),
 }
 
 # ============================================================================
@@ -281,6 +469,33 @@ MULTI_TF_FILTER_CONFIG = {
     "higher_tf_weight": 2.0,
 }
 
+# ============================================================================
+# MTF TREND SERVICE (общий тренд symbol × TF, пересчёт на закрытии бара)
+# ============================================================================
+MTF_TREND_CONFIG = {
+    "timeframes": ("1h", "4h", "1d"),
+    # Свечей на запрос и минимум закрытых баров для расчёта
+    "limit": int(os.getenv("MTF_TREND_LIMIT", "200")),
+    "min_bars": 50,
+    # Повторная загрузка, если биржа ещё не отдала закрытый бар (сек)
+    "recheck_seconds": int(os.getenv("MTF_TREND_RECHECK_SECONDS", "15")),
+}
+
+# Regime Service: режим рынка символа, пересчёт на закрытии бара
+REGIME_CONFIG = {
+    "timeframe": os.getenv("REGIME_TIMEFRAME", "1h"),
+    # Баров для перцентилей ATR / ширины BB
+    "lookback": 100,
+    # Новый режим принимается после N закрытых баров подряд
+    "confirm_bars": int(os.getenv("REGIME_CONFIRM_BARS", "2")),
+    # Внутри бара: диапазон ≥ k × ATR или объём ≥ k × средний — переход сразу
+    "range_spike_atr": float(os.getenv("REGIME_RANGE_SPIKE_ATR", "2.0")),
+    "volume_spike_ratio": float(os.getenv("REGIME_VOLUME_SPIKE_RATIO", "2.5")),
+    "history": 50,
+    # Состояние старше N баров не выдаётся
+    "stale_bars": 3,
+}
+
 # ============================================================================
 # PERFORMANCE OPTIMIZATION
 # ============================================================================
@@ -420,6 +635,26 @@ SR_DETECTOR_CONFIG = {
     ),  # Порог volume для определения силы уровня
 }
 
+# Level Engine: общий массив уровней S/R по символу
+LEVEL_ENGINE_CONFIG = {
+    # Допуск слияния: max(ATR × k, цена × %)
+    "merge_atr_multiplier": float(os.getenv("LEVEL_MERGE_ATR_MULTIPLIER", "0.3")),
+    "min_tolerance_pct": 0.05,
+    "max_levels": int(os.getenv("LEVEL_ENGINE_MAX_LEVELS", "64")),
+    # Полураспад силы по источнику (сек): стакан меняется быстрее pivot'ов
+    "half_life": {
+        "volume_profile": 4 * 3600,
+        "orderbook": 300,
+        "pivot": 12 * 3600,
+        "liquidation": 2 * 3600,
+    },
+    # Сила одного источника ограничена, уровни слабее min_strength не выдаются
+    "max_source_strength": 3.0,
+    "min_strength": 0.25,
+    # Ликвидации: +1 к силе за каждые N USD
+    "liquidation_usd_unit": 1_000_000,
+}
+
 # News Sentiment Analyzer Config
 NEWS_SENTIMENT_CONFIG = {
     "cache_duration": int(
@@ -447,6 +682,18 @@ CORRELATION_CONFIG = {
         "SOLUSDT",
         "XRPUSDT",
     ],
+    # Период → (интервал свечей Bybit, окно в барах) для панели доходностей
+    "periods": {
+        "24h": ("15", 96),
+        "7d": ("60", 168),
+        "30d": ("240", 180),
+    },
+    "method": os.getenv("CORR_METHOD", "pearson"),  # pearson / ewma
+    "ewma_halflife_bars": int(os.getenv("CORR_EWMA_HALFLIFE", "24")),
+    "min_periods": int(os.getenv("CORR_MIN_PERIODS", "20")),  # Минимум общих баров
+    "benchmark": os.getenv("CORR_BENCHMARK", "BTCUSDT"),  # База для beta
+    "max_concurrent_requests": int(os.getenv("CORR_MAX_CONCURRENT", "10")),
+    "matrix_display_limit": 8,  # Больше символов — только insights и топ пар
 }
 
 # Whale Activity Tracker Config
@@ -10,6 +10,7 @@ import aiohttp
 from typing import Dict, List, Optional
 from collections import deque
 from config.settings import logger
+from utils.http_transport import get_http_transport
 from utils.validators import DataValidator
 from connectors.binance_orderbook_websocket import BinanceOrderbookWebSocket
 from connectors.binance_trade_websocket import BinanceTradeWebSocket
@@ -68,10 +69,8 @@ class BinanceConnector:
     async def initialize(self) -> bool:
         """Инициализация REST сессии и WebSocket"""
         try:
-            # 1. Инициализация REST API
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30)
-            )
+            # 1. Инициализация REST API (общий транспорт, бюджет Binance)
+            self.session = get_http_transport().client("binance", timeout=30)
 
             # Проверка подключения
             server_time = await self.get_server_time()
@@ -7,7 +7,7 @@ Binance Orderbook WebSocket
 
 import asyncio
 import time
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional
 from utils.websocket_manager import WebSocketManager
 from config.settings import logger
 
@@ -19,16 +19,24 @@ class BinanceOrderbookWebSocket:
     Документация: https://developers.binance.com/docs/derivatives/usds-margined-futures/websocket-market-streams
     """
 
-    def __init__(self, symbols: List[str], connector, depth: int = 20):
+    def __init__(
+        self,
+        symbols: List[str],
+        connector,
+        depth: int = 20,
+        on_update: Optional[Callable[[str, Dict], Awaitable]] = None,
+    ):
         """
         Args:
             symbols: Список символов (например, ["BTCUSDT", "ETHUSDT"])
             connector: BinanceConnector instance
             depth: Глубина orderbook (5, 10, 20) - по умолчанию 20
+            on_update: async callback(symbol, orderbook) на каждое обновление
         """
         self.symbols = symbols
         self.connector = connector
         self.depth = depth
+        self.on_update = on_update
         self.orderbook_data = {}
         self.last_pressure_log: Dict[str, float] = {}  # Throttling для логов
 
@@ -95,6 +103,9 @@ class BinanceOrderbookWebSocket:
             if hasattr(self.connector, "orderbook_data"):
                 self.connector.orderbook_data[symbol] = self.orderbook_data[symbol]
 
+            if self.on_update:
+                await self.on_update(symbol, self.orderbook_data[symbol])
+
             # Рассчитываем дисбаланс и логируем (throttled)
             imbalance = self._calculate_imbalance(symbol)
 
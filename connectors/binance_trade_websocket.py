@@ -6,11 +6,15 @@ Real-time трейды для WhaleTracker интеграции
 """
 
 import asyncio
-import json
+import logging
 import time
 from typing import List, Optional, Dict
 import websockets
 from config.settings import logger
+from connectors.ws_parsers import parse_binance_trade
+from core.trade_bus import get_trade_bus
+from utils import fast_json
+from utils.log_batcher import log_batcher
 
 
 class BinanceTradeWebSocket:
@@ -94,51 +98,23 @@ class BinanceTradeWebSocket:
     async def _handle_message(self, message: str):
         """Обработка входящих сообщений"""
         try:
-            data = json.loads(message)
-
-            # Binance trade stream format:
-            # {
-            #   "e": "trade",
-            #   "E": 1234567890,
-            #   "s": "BTCUSDT",
-            #   "t": 12345,
-            #   "p": "0.001",
-            #   "q": "100",
-            #   "b": 88,
-            #   "a": 50,
-            #   "T": 123456785,
-            #   "m": true,
-            #   "M": true
-            # }
-
-            if data.get("e") != "trade":
+            # Binance trade stream: {"e": "trade", "s", "p", "q", "T", "m", ...}
+            trade = parse_binance_trade(fast_json.loads(message))
+            if trade is None:
                 return
 
             self.stats["trades_received"] += 1
 
-            symbol = data.get("s")  # "BTCUSDT"
-            price = float(data.get("p"))
-            quantity = float(data.get("q"))
-            timestamp = data.get("T")  # milliseconds
-            is_buyer_maker = data.get("m")  # True = sell, False = buy
-
-            side = "sell" if is_buyer_maker else "buy"
-
-            # ✅ ОТПРАВКА В WHALETRACKER
-            if self.connector and hasattr(self.connector, 'whale_tracker') and self.connector.whale_tracker:
-                await self.connector.whale_tracker.process_trade(
-                    symbol=symbol,
-                    side=side,
-                    price=price,
-                    quantity=quantity,
-                    timestamp=timestamp
-                )
+            # Киты, CVD и остальная аналитика — подписчики TradeBus
+            if get_trade_bus().publish(
+                "binance", trade.symbol, trade.timestamp, trade.price, trade.size, trade.side
+            ):
                 self.stats["trades_processed"] += 1
 
             self.stats["last_trade_time"] = time.time()
 
         except Exception as e:
-            logger.error(f"❌ Ошибка обработки Binance trade: {e}")
+            log_batcher.log_throttled(logging.ERROR, "❌ Ошибка обработки Binance trade: %s", e)
             self.stats["trades_failed"] += 1
 
     # ===========================================
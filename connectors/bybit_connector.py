@@ -7,7 +7,6 @@
 import asyncio
 import websockets
 import aiohttp
-import json
 import time
 import hmac
 import hashlib
@@ -20,6 +19,12 @@ from core.exceptions import APIConnectionError
 from utils.helpers import current_epoch_ms
 from utils.rate_limiter import get_rate_limiter, ExponentialBackoff
 from utils.cache_manager import get_cache_manager
+from utils.metrics import get_metrics_registry, stats_collector
+from utils.http_transport import get_http_transport
+from utils import fast_json
+from utils.memory_manager import get_memory_manager, evict_oldest
+from core.trade_bus import RollingDelta, get_trade_bus
+from analytics.liquidation_aggregator import get_liquidation_aggregator
 
 
 class EnhancedBybitConnector:
@@ -69,9 +74,8 @@ class EnhancedBybitConnector:
         self.max_reconnect_attempts = 10
 
         # CVD tracking (НОВОЕ!)
-        self.cvd = {}  # {symbol: cumulative_delta}
         self.cvd_window = 300  # 5 минут window для CVD
-        self.cvd_trades = {}  # {symbol: [(timestamp, delta), ...]}
+        self.cvd_delta = RollingDelta(self.cvd_window)  # rolling CVD по символам
 
         self.rate_limiter = get_rate_limiter()
         logger.info("✅ Rate Limiter интегрирован в EnhancedBybitConnector")
@@ -79,14 +83,21 @@ class EnhancedBybitConnector:
         self.cache = get_cache_manager()
         logger.info("✅ Cache Manager интегрирован в EnhancedBybitConnector")
 
+        get_memory_manager().register_component(
+            "bybit.klines_cache", self, "klines_cache", evict=evict_oldest
+        )
+
+        get_metrics_registry().register_collector(
+            "bybit_batch", stats_collector("bybit_batch", self.get_batch_stats)
+        )
+
         logger.info("✅ EnhancedBybitConnector инициализирован")
 
     async def initialize(self):
         """Инициализация коннектора"""
         try:
-            # Создаём HTTP сессию
-            timeout = aiohttp.ClientTimeout(total=30, connect=10)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            # REST через общий транспорт (пул соединений + бюджет Bybit)
+            self.session = get_http_transport().client("bybit", timeout=30)
 
             # Тестируем подключение
             await self._test_connection()
@@ -984,7 +995,7 @@ class EnhancedBybitConnector:
 
             subscribe_message = {"op": "subscribe", "args": subscriptions}
 
-            await websocket.send(json.dumps(subscribe_message))
+            await websocket.send(fast_json.dumps(subscribe_message))
 
             self.websocket_connections[symbol] = websocket
             self.websocket_subscriptions[symbol] = subscriptions
@@ -1003,7 +1014,7 @@ class EnhancedBybitConnector:
         try:
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    data = fast_json.loads(message)
 
                     self.connection_health["last_ping"] = current_epoch_ms()
                     self.connection_health["ping_count"] += 1
@@ -1011,7 +1022,7 @@ class EnhancedBybitConnector:
                     if "topic" in data:
                         await self._process_websocket_data(symbol, data)
 
-                except json.JSONDecodeError as e:
+                except fast_json.JSONDecodeError as e:
                     logger.error(f"Ошибка парсинга WebSocket сообщения: {e}")
                 except Exception as e:
                     logger.error(f"Ошибка обработки WebSocket сообщения: {e}")
@@ -1088,7 +1099,10 @@ class EnhancedBybitConnector:
                     }
 
                     self.trades_cache.append(trade)
-                    await self._handle_trade_for_cvd(trade)
+                    # CVD и остальная аналитика — подписчики TradeBus
+                    get_trade_bus().publish(
+                        "bybit", symbol, trade["timestamp"], trade["price"], trade["size"], trade["side"]
+                    )
         except Exception as e:
             logger.error(f"Ошибка обработки trades update: {e}")
 
@@ -1379,7 +1393,11 @@ class EnhancedBybitConnector:
 
     async def get_liquidations_24h(self, symbol: str = "BTCUSDT") -> Dict:
         """
-        Получить данные ликвидаций за 24 часа с Bybit
+        Получить данные ликвидаций за 24 часа
+
+        Если стримы ликвидаций (Bybit allLiquidation / Binance forceOrder)
+        подключены — сводка из LiquidationAggregator без запросов к API.
+        Иначе — крупные сделки REST recent-trade как proxy ликвидаций.
 
         Args:
             symbol: Торговая пара (например, "BTCUSDT")
@@ -1399,10 +1417,14 @@ class EnhancedBybitConnector:
         Документация API:
             https://bybit-exchange.github.io/docs/v5/market/recent-trade
         """
+        aggregator = get_liquidation_aggregator()
+        if aggregator.is_live():
+            return aggregator.summary(symbol, "24h")
+
         try:
             from datetime import datetime, timedelta
 
-            logger.info(f"📊 Получение ликвидаций за 24ч для {symbol}...")
+            logger.debug(f"📊 Получение ликвидаций за 24ч для {symbol} (REST proxy)...")
 
             # Bybit НЕ предоставляет прямой endpoint для ликвидаций
             # Используем косвенные методы:
@@ -1490,10 +1512,11 @@ class EnhancedBybitConnector:
                     "long_pct": long_pct,
                     "short_pct": short_pct,
                     "symbol": symbol,
-                    "timestamp": now.isoformat()
+                    "timestamp": now.isoformat(),
+                    "source": "rest_proxy",
                 }
 
-                logger.info(
+                logger.debug(
                     f"💥 Liquidations {symbol}: "
                     f"Total ${total:,.0f} | "
                     f"Long: {long_pct:.1f}% | "
@@ -1556,25 +1579,9 @@ class EnhancedBybitConnector:
 
             # Вычисляем delta
             delta = size if side == "buy" else -size
+            cvd = self.cvd_delta.add(symbol, timestamp, delta)
 
-            # Инициализируем структуры если нужно
-            if symbol not in self.cvd:
-                self.cvd[symbol] = 0
-                self.cvd_trades[symbol] = []
-
-            # Добавляем текущий трейд
-            self.cvd_trades[symbol].append((timestamp, delta))
-
-            # Удаляем старые трейды (старше 5 минут)
-            cutoff_time = timestamp - self.cvd_window
-            self.cvd_trades[symbol] = [
-                (ts, d) for ts, d in self.cvd_trades[symbol] if ts > cutoff_time
-            ]
-
-            # Пересчитываем CVD
-            self.cvd[symbol] = sum(d for ts, d in self.cvd_trades[symbol])
-
-            logger.debug(f"📊 Bybit CVD updated {symbol}: {self.cvd[symbol]:.2f}")
+            logger.debug(f"📊 Bybit CVD updated {symbol}: {cvd:.2f}")
 
         except Exception as e:
             logger.error(f"❌ Bybit CVD calculation error: {e}")
@@ -1589,7 +1596,7 @@ class EnhancedBybitConnector:
         Returns:
             float: Cumulative Volume Delta
         """
-        return self.cvd.get(symbol, 0)
+        return self.cvd_delta.value(symbol)
 
     def get_cvd_percentage(self, symbol: str) -> float:
         """
@@ -1602,17 +1609,14 @@ class EnhancedBybitConnector:
             float: CVD в процентах (-100 до +100)
         """
         try:
-            if symbol not in self.cvd_trades or not self.cvd_trades[symbol]:
-                return 0
-
             # Сумма всех трейдов (по модулю)
-            total_volume = sum(abs(d) for ts, d in self.cvd_trades[symbol])
+            total_volume = self.cvd_delta.volume(symbol)
 
             if total_volume == 0:
                 return 0
 
             # CVD в процентах
-            cvd_pct = (self.cvd[symbol] / total_volume) * 100
+            cvd_pct = (self.cvd_delta.value(symbol) / total_volume) * 100
             return cvd_pct
 
         except Exception as e:
@@ -6,10 +6,15 @@ WebSocket коннектор для L2 Orderbook от Bybit
 """
 
 import asyncio
+import logging
+import time
 import websockets
-import json
-from typing import Dict, List, Callable, Optional
+from typing import Dict, List, Callable, Optional, Tuple
 from config.settings import logger
+from connectors.ws_parsers import BookMessage, parse_bybit_orderbook
+from utils import fast_json
+from utils.log_batcher import log_batcher
+from utils.metrics import get_metrics_registry
 
 
 class BybitOrderbookWebSocket:
@@ -53,6 +58,13 @@ class BybitOrderbookWebSocket:
         self._orderbook = None
         self._snapshot_received = False
 
+        # Метрики обработки сообщений
+        self._message_latency = get_metrics_registry().histogram(
+            "ws_message_seconds",
+            "Время обработки WebSocket сообщения",
+            ("stream",),
+        ).labels(f"bybit_orderbook_{symbol}")
+
         logger.info(
             f"✅ BybitOrderbookWebSocket инициализирован "
             f"для {symbol} (depth={self.depth}, refresh={self._get_refresh_rate()}ms)"
@@ -89,7 +101,7 @@ class BybitOrderbookWebSocket:
                 "args": [f"orderbook.{self.depth}.{self.symbol}"],
             }
 
-            await self.websocket.send(json.dumps(subscribe_msg))
+            await self.websocket.send(fast_json.dumps(subscribe_msg))
             logger.info(f"✅ Подписка на orderbook.{self.depth}.{self.symbol}")
 
             self.is_running = True
@@ -103,17 +115,19 @@ class BybitOrderbookWebSocket:
         """Прослушивание WebSocket сообщений"""
         try:
             async for message in self.websocket:
+                start = time.perf_counter()
                 try:
-                    data = json.loads(message)
-
                     # Обрабатываем только данные orderbook
-                    if data.get("topic", "").startswith("orderbook"):
-                        await self._process_message(data)
+                    book = parse_bybit_orderbook(fast_json.loads(message))
+                    if book is not None:
+                        await self._process_message(book)
 
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Ошибка парсинга JSON: {e}")
+                except fast_json.JSONDecodeError as e:
+                    log_batcher.log_throttled(logging.ERROR, "❌ Ошибка парсинга JSON: %s", e, key=self.symbol)
                 except Exception as e:
-                    logger.error(f"❌ Ошибка обработки сообщения: {e}")
+                    log_batcher.log_throttled(logging.ERROR, "❌ Ошибка обработки сообщения: %s", e, key=self.symbol)
+                finally:
+                    self._message_latency.observe(time.perf_counter() - start)
 
         except websockets.exceptions.ConnectionClosed:
             logger.warning("⚠️ WebSocket соединение закрыто")
@@ -122,38 +136,28 @@ class BybitOrderbookWebSocket:
             logger.error(f"❌ Критическая ошибка WebSocket: {e}")
             self.is_running = False
 
-    async def _process_message(self, data: Dict):
+    async def _process_message(self, book: BookMessage):
         """
         Обработка сообщений от Bybit
         Правильная обработка snapshot и delta
+
+        Args:
+            book: Разобранное сообщение (уровни уже float)
         """
         try:
-            if "data" not in data:
-                return
-
-            orderbook_data = data["data"]
-
-            # Определяем тип сообщения
-            message_type = data.get("type", "snapshot")
-
-            bids = orderbook_data.get("b", [])
-            asks = orderbook_data.get("a", [])
-            timestamp = int(orderbook_data.get("ts", 0))
-            update_id = orderbook_data.get("u", 0)
-
             # === SNAPSHOT: Полная инициализация orderbook ===
-            if message_type == "snapshot":
+            if book.kind == "snapshot":
                 logger.info(
-                    f"📸 Получен snapshot: bids={len(bids)}, asks={len(asks)} "
+                    f"📸 Получен snapshot: bids={len(book.bids)}, asks={len(book.asks)} "
                     f"(depth={self.depth})"
                 )
 
                 self._orderbook = {
-                    "symbol": orderbook_data.get("s", self.symbol),
-                    "timestamp": timestamp,
-                    "update_id": update_id,
-                    "bids": [[float(b[0]), float(b[1])] for b in bids],
-                    "asks": [[float(a[0]), float(a[1])] for a in asks],
+                    "symbol": book.symbol or self.symbol,
+                    "timestamp": book.timestamp,
+                    "update_id": book.update_id,
+                    "bids": [[price, size] for price, size in book.bids],
+                    "asks": [[price, size] for price, size in book.asks],
                 }
 
                 self._snapshot_received = True
@@ -163,83 +167,24 @@ class BybitOrderbookWebSocket:
                 return
 
             # === DELTA: Обновление существующих уровней ===
-            elif message_type == "delta":
+            elif book.kind == "delta":
                 # Проверяем что snapshot уже был получен
                 if not self._snapshot_received or not self._orderbook:
                     logger.warning("⚠️ Delta получен до snapshot, игнорируем")
                     return
 
-                # === ОБНОВЛЯЕМ BIDS ===
-                for bid in bids:
-                    try:
-                        price = float(bid[0])
-                        size = float(bid[1])
-
-                        if size == 0:
-                            # Удаляем уровень (цена исчезла из orderbook)
-                            self._orderbook["bids"] = [
-                                b for b in self._orderbook["bids"] if b[0] != price
-                            ]
-                        else:
-                            # Обновляем или добавляем уровень
-                            updated = False
-                            for i, existing_bid in enumerate(self._orderbook["bids"]):
-                                if existing_bid[0] == price:
-                                    self._orderbook["bids"][i] = [price, size]
-                                    updated = True
-                                    break
-
-                            if not updated:
-                                # Новый уровень - добавляем
-                                self._orderbook["bids"].append([price, size])
-
-                    except (ValueError, IndexError) as e:
-                        logger.warning(f"⚠️ Ошибка парсинга bid: {e}")
-                        continue
-
-                # === ОБНОВЛЯЕМ ASKS ===
-                for ask in asks:
-                    try:
-                        price = float(ask[0])
-                        size = float(ask[1])
-
-                        if size == 0:
-                            # Удаляем уровень
-                            self._orderbook["asks"] = [
-                                a for a in self._orderbook["asks"] if a[0] != price
-                            ]
-                        else:
-                            # Обновляем или добавляем уровень
-                            updated = False
-                            for i, existing_ask in enumerate(self._orderbook["asks"]):
-                                if existing_ask[0] == price:
-                                    self._orderbook["asks"][i] = [price, size]
-                                    updated = True
-                                    break
-
-                            if not updated:
-                                # Новый уровень - добавляем
-                                self._orderbook["asks"].append([price, size])
-
-                    except (ValueError, IndexError) as e:
-                        logger.warning(f"⚠️ Ошибка парсинга ask: {e}")
-                        continue
-
-                # === СОРТИРУЕМ И ОГРАНИЧИВАЕМ ===
-                # Bids по убыванию цены (лучшая bid первая)
-                self._orderbook["bids"].sort(key=lambda x: x[0], reverse=True)
-                # Asks по возрастанию цены (лучшая ask первая)
-                self._orderbook["asks"].sort(key=lambda x: x[0])
-
-                # Ограничиваем до depth (200 уровней)
-                self._orderbook["bids"] = self._orderbook["bids"][: self.depth]
-                self._orderbook["asks"] = self._orderbook["asks"][: self.depth]
+                # Bids по убыванию цены (лучшая bid первая), asks по возрастанию
+                self._orderbook["bids"] = self._apply_delta(
+                    self._orderbook["bids"], book.bids, reverse=True
+                )
+                self._orderbook["asks"] = self._apply_delta(
+                    self._orderbook["asks"], book.asks, reverse=False
+                )
 
                 # Обновляем timestamp
-                self._orderbook["timestamp"] = timestamp
-                self._orderbook["update_id"] = update_id
+                self._orderbook["timestamp"] = book.timestamp
+                self._orderbook["update_id"] = book.update_id
 
-                from utils.log_batcher import log_batcher
                 log_batcher.log_orderbook_update('Bybit', self.symbol)
 
                 # Вызываем callbacks с ОБНОВЛЁННЫМ orderbook
@@ -251,6 +196,36 @@ class BybitOrderbookWebSocket:
 
             logger.error(traceback.format_exc())
 
+    def _apply_delta(
+        self, levels: List[List[float]], changes: List[Tuple[float, float]], reverse: bool
+    ) -> List[List[float]]:
+        """
+        Применить delta к стороне стакана
+
+        Args:
+            levels: Текущие уровни [[price, size], ...]
+            changes: Изменения [(price, size), ...]; size=0 — удаление уровня
+            reverse: Сортировка по убыванию цены (bids)
+
+        Returns:
+            Отсортированные уровни, ограниченные depth
+        """
+        book = dict(levels)
+        for price, size in changes:
+            if size == 0:
+                # Удаляем уровень (цена исчезла из orderbook)
+                book.pop(price, None)
+            else:
+                # Обновляем или добавляем уровень
+                book[price] = size
+
+        prices = sorted(book, reverse=reverse)[: self.depth]
+        return [[price, book[price]] for price in prices]
+
+    def get_orderbook(self) -> Optional[Dict]:
+        """Текущий стакан (None до первого snapshot)"""
+        return self._orderbook if self._snapshot_received else None
+
     async def _notify_callbacks(self):
         """Уведомление всех callbacks о новом состоянии orderbook"""
         try:
@@ -8,7 +8,7 @@ REST API + WebSocket streams (Coinbase Advanced Trade API)
 import asyncio
 import aiohttp
 import websockets
-import json
+import heapq
 import hmac
 import hashlib
 import time
@@ -16,6 +16,10 @@ from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime
 from collections import deque
 from config.settings import logger
+from connectors.ws_parsers import parse_coinbase_changes, parse_coinbase_snapshot
+from core.trade_bus import get_trade_bus
+from utils import fast_json
+from utils.http_transport import get_http_transport
 from utils.validators import DataValidator
 
 
@@ -90,10 +94,8 @@ class CoinbaseConnector:
             True если успешно
         """
         try:
-            # 1. Инициализация REST API
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30)
-            )
+            # 1. Инициализация REST API (общий транспорт, бюджет Coinbase)
+            self.session = get_http_transport().client("coinbase", timeout=30)
 
             # Проверка подключения
             server_time = await self.get_server_time()
@@ -447,7 +449,7 @@ class CoinbaseConnector:
                         ],
                     }
 
-                    await ws.send(json.dumps(subscribe_msg))
+                    await ws.send(fast_json.dumps(subscribe_msg))
                     logger.info(
                         f"✅ Подписка на Coinbase каналы для {len(self.symbols)} пар"
                     )
@@ -457,7 +459,7 @@ class CoinbaseConnector:
                             break
 
                         try:
-                            data = json.loads(message)
+                            data = fast_json.loads(message)
                             await self._handle_ws_message(data)
                         except Exception as e:
                             logger.error(f"❌ Coinbase WS processing error: {e}")
@@ -507,11 +509,12 @@ class CoinbaseConnector:
         if not symbol:
             return
 
+        bids, asks = parse_coinbase_snapshot(data)
         orderbook = {
             "symbol": symbol,
             "timestamp": datetime.utcnow(),
-            "bids": {float(p): float(s) for p, s in data.get("bids", [])},
-            "asks": {float(p): float(s) for p, s in data.get("asks", [])},
+            "bids": bids,
+            "asks": asks,
         }
 
         self.orderbooks[symbol] = orderbook
@@ -534,21 +537,13 @@ class CoinbaseConnector:
 
         orderbook = self.orderbooks[symbol]
 
-        # Update bids
-        for side, price, size in data.get("changes", []):
-            price = float(price)
-            size = float(size)
-
-            if side == "buy":
-                if size == 0:
-                    orderbook["bids"].pop(price, None)
-                else:
-                    orderbook["bids"][price] = size
-            elif side == "sell":
-                if size == 0:
-                    orderbook["asks"].pop(price, None)
-                else:
-                    orderbook["asks"][price] = size
+        bids, asks = orderbook["bids"], orderbook["asks"]
+        for is_bid, price, size in parse_coinbase_changes(data):
+            levels = bids if is_bid else asks
+            if size == 0:
+                levels.pop(price, None)
+            else:
+                levels[price] = size
 
         orderbook["timestamp"] = datetime.utcnow()
 
@@ -557,9 +552,9 @@ class CoinbaseConnector:
 
         # ========== ДОБАВИТЬ РАСЧЁТ ДИСБАЛАНСА ==========
         try:
-            # Сортируем для получения топ уровней
-            sorted_bids = sorted(orderbook["bids"].items(), reverse=True)[:5]
-            sorted_asks = sorted(orderbook["asks"].items())[:5]
+            # Топ-5 уровней без полной сортировки стакана
+            sorted_bids = heapq.nlargest(5, bids.items())
+            sorted_asks = heapq.nsmallest(5, asks.items())
 
             if sorted_bids and sorted_asks:
                 # Суммируем объёмы топ 5 уровней
@@ -620,6 +615,16 @@ class CoinbaseConnector:
         self.stats["ws_messages"] += 1
         self.stats["ws_trade_updates"] += 1
 
+        if trade_data["symbol"]:
+            get_trade_bus().publish(
+                "coinbase",
+                trade_data["symbol"],
+                self._trade_time_ms(trade_data["timestamp"]),
+                trade_data["price"],
+                trade_data["size"],
+                trade_data["side"],
+            )
+
         # 🚀 НОВОЕ: Детект large trades
         usd_value = trade_data["price"] * trade_data["size"]
         if usd_value >= 100000:  # $100k threshold
@@ -631,6 +636,14 @@ class CoinbaseConnector:
         if "on_trade" in self.callbacks:
             await self.callbacks["on_trade"](trade_data["symbol"], trade_data)
 
+    @staticmethod
+    def _trade_time_ms(value: Optional[str]) -> int:
+        """ISO-время Coinbase (2023-11-14T22:13:20.123456Z) → epoch ms"""
+        try:
+            return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+        except (AttributeError, ValueError):
+            return int(time.time() * 1000)
+
     # ===========================================
     # HELPER METHODS
     # ===========================================
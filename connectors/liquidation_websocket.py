@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquidation Stream WebSocket
+Публичные стримы ликвидаций: Bybit allLiquidation и Binance forceOrder.
+События сразу складываются в LiquidationAggregator.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import websockets
+
+from analytics.liquidation_aggregator import LiquidationAggregator, get_liquidation_aggregator
+from config.settings import logger
+from connectors.ws_parsers import LiquidationTick, parse_binance_force_order, parse_bybit_liquidation
+from utils import fast_json
+
+
+class LiquidationWebSocket:
+    """
+    Базовый стрим ликвидаций: подключение, переподключение, статистика
+
+    Наследники задают exchange, _url(), _subscribe() и _parse()
+    """
+
+    exchange = ""
+
+    def __init__(self, symbols: List[str], aggregator: Optional[LiquidationAggregator] = None):
+        """
+        Args:
+            symbols: Список пар ['BTCUSDT', 'ETHUSDT']
+            aggregator: Агрегатор (по умолчанию глобальный)
+        """
+        self.symbols = [s.upper() for s in symbols]
+        self.aggregator = aggregator or get_liquidation_aggregator()
+        self.ws = None
+        self.running = False
+
+        self.stats = {
+            "liquidations_received": 0,
+            "liquidations_processed": 0,
+            "messages_failed": 0,
+            "last_liquidation_time": None,
+            "connection_time": None,
+        }
+
+        logger.info(f"✅ {self.__class__.__name__} готов для {len(self.symbols)} символов")
+
+    def _url(self) -> str:
+        raise NotImplementedError
+
+    async def _subscribe(self, ws):
+        """Подписка после подключения (если биржа требует)"""
+
+    def _parse(self, data: Dict) -> List[LiquidationTick]:
+        raise NotImplementedError
+
+    # ===========================================
+    # WEBSOCKET CONNECTION
+    # ===========================================
+
+    async def start(self):
+        """Запуск WebSocket подключения"""
+        self.running = True
+        logger.info(f"🚀 Запуск {self.exchange} liquidation stream...")
+
+        while self.running:
+            try:
+                async with websockets.connect(self._url(), ping_interval=20) as ws:
+                    self.ws = ws
+                    await self._subscribe(ws)
+                    self.stats["connection_time"] = time.time()
+                    self.aggregator.mark_connected(self.exchange)
+                    logger.info(f"✅ {self.exchange} liquidation stream подключён: {len(self.symbols)} пар")
+
+                    async for message in ws:
+                        if not self.running:
+                            break
+                        self._handle_message(message)
+
+            except websockets.ConnectionClosed:
+                logger.warning(f"⚠️ {self.exchange} liquidation stream отключён, переподключение...")
+            except Exception as e:
+                logger.error(f"❌ Ошибка {self.exchange} liquidation stream: {e}")
+            finally:
+                self.aggregator.mark_disconnected(self.exchange)
+
+            if self.running:
+                await asyncio.sleep(5)
+
+        logger.info(f"🛑 {self.exchange} liquidation stream остановлен")
+
+    async def stop(self):
+        """Остановка WebSocket"""
+        logger.info(f"🛑 Остановка {self.exchange} liquidation stream...")
+        self.running = False
+        if self.ws:
+            await self.ws.close()
+
+    # ===========================================
+    # MESSAGE HANDLING
+    # ===========================================
+
+    def _handle_message(self, message: str):
+        """Обработка входящего сообщения"""
+        try:
+            ticks = self._parse(fast_json.loads(message))
+        except Exception as e:
+            logger.debug(f"⚠️ Ошибка разбора {self.exchange} liquidation: {e}")
+            self.stats["messages_failed"] += 1
+            return
+
+        for tick in ticks:
+            self.stats["liquidations_received"] += 1
+            if self.aggregator.add(
+                self.exchange, tick.symbol, tick.side, tick.price, tick.size, tick.timestamp
+            ):
+                self.stats["liquidations_processed"] += 1
+        if ticks:
+            self.stats["last_liquidation_time"] = time.time()
+
+    # ===========================================
+    # STATISTICS
+    # ===========================================
+
+    def get_stats(self) -> Dict:
+        """Получить статистику"""
+        uptime = None
+        if self.stats["connection_time"]:
+            uptime = time.time() - self.stats["connection_time"]
+
+        return {
+            **self.stats,
+            "uptime_seconds": uptime,
+            "is_running": self.running,
+        }
+
+
+class BybitLiquidationWebSocket(LiquidationWebSocket):
+    """Bybit v5 linear: allLiquidation.{symbol}"""
+
+    exchange = "bybit"
+
+    def _url(self) -> str:
+        return "wss://stream.bybit.com/v5/public/linear"
+
+    async def _subscribe(self, ws):
+        # Bybit принимает до 10 топиков в одном запросе
+        topics = [f"allLiquidation.{symbol}" for symbol in self.symbols]
+        for i in range(0, len(topics), 10):
+            await ws.send(fast_json.dumps({"op": "subscribe", "args": topics[i : i + 10]}))
+
+    def _parse(self, data: Dict) -> List[LiquidationTick]:
+        return parse_bybit_liquidation(data)
+
+
+class BinanceLiquidationWebSocket(LiquidationWebSocket):
+    """Binance USDⓈ-M Futures: <symbol>@forceOrder"""
+
+    exchange = "binance"
+
+    def _url(self) -> str:
+        streams = "/".join(f"{symbol.lower()}@forceOrder" for symbol in self.symbols)
+        return f"wss://fstream.binance.com/stream?streams={streams}"
+
+    def _parse(self, data: Dict) -> List[LiquidationTick]:
+        # Combined stream: {"stream": "...", "data": {...}}
+        tick = parse_binance_force_order(data.get("data", data))
+        return [tick] if tick else []
+
+
+# Экспорт
+__all__ = [
+    "LiquidationWebSocket",
+    "BybitLiquidationWebSocket",
+    "BinanceLiquidationWebSocket",
+]
@@ -7,17 +7,23 @@
 
 import asyncio
 import aiohttp
-import json
 import re
 from datetime import datetime
 from typing import Dict, List, Optional, Set
 from collections import deque
-from pathlib import Path
-from config.settings import CRYPTOPANIC_API_KEY, CRYPTOCOMPARE_API_KEY, logger
+from config.settings import (
+    CRYPTOPANIC_API_KEY,
+    CRYPTOCOMPARE_API_KEY,
+    NEWS_STORE_CONFIG,
+    logger,
+)
 from config.constants import API_ENDPOINTS, SYMBOL_FILTERS, TIME_FORMATS
 from core.exceptions import APIConnectionError
 from utils.helpers import current_epoch_ms, datetime_to_epoch_ms
 from utils.validators import validate_news_data
+from utils.memory_manager import get_memory_manager, evict_oldest
+from utils.http_transport import get_http_transport
+from connectors.news_store import get_news_store
 
 
 class SmartRateLimiter:
@@ -76,11 +82,9 @@ class UnifiedNewsConnector:
         # Ограничители запросов
         self.rate_limiter = SmartRateLimiter(requests_per_minute=30, burst_allowance=10)
 
-        # Кэш новостей (УЛУЧШЕНО)
-        self.cryptopanic_cache = (
-            {}
-        )  # {cache_key: {'data': [], 'timestamp': int, 'ttl': int}}
-        self.cryptocompare_cache = {}
+        # Статьи и результаты запросов — в NewsStore (SQLite, TTL, sentiment)
+        self.news_store = get_news_store()
+        self.query_ttl = NEWS_STORE_CONFIG["query_ttl"]
         self.news_cache = deque(maxlen=1000)
         self.seen_news_ids: Set[str] = set()
 
@@ -89,48 +93,20 @@ class UnifiedNewsConnector:
         self.last_cryptocompare_request = 0
         self.cryptopanic_retry_after = 0  # Timestamp когда можно снова делать запрос
 
-        logger.info("✅ UnifiedNewsConnector инициализирован")
+        get_memory_manager().register_component(
+            "news_connector.news_cache", self, "news_cache", evict=evict_oldest
+        )
 
-        # ✅ PERSISTENT CACHE (НОВЫЙ КОД)
-        self.cryptopanic_cache_file = Path("data/cryptopanic_cache.json")
-        self.cryptocompare_cache_file = Path("data/cryptocompare_cache.json")
+        logger.info("✅ UnifiedNewsConnector инициализирован")
 
-        # Создаём директорию data если не существует
-        self.cryptopanic_cache_file.parent.mkdir(exist_ok=True)
-
-        # Загружаем CryptoPanic кэш с диска при старте
-        if self.cryptopanic_cache_file.exists():
-            try:
-                with open(self.cryptopanic_cache_file, "r", encoding="utf-8") as f:
-                    cache_data = json.load(f)
-                    self.cryptopanic_cache = cache_data.get("cryptopanic_cache", {})
-                    cache_count = len(self.cryptopanic_cache)
-                    logger.info(
-                        f"✅ CryptoPanic cache loaded from disk ({cache_count} entries)"
-                    )
-            except Exception as e:
-                logger.error(f"❌ Failed to load CryptoPanic cache: {e}")
-                self.cryptopanic_cache = {}
-
-        # Загружаем CryptoCompare кэш с диска при старте
-        if self.cryptocompare_cache_file.exists():
-            try:
-                with open(self.cryptocompare_cache_file, "r", encoding="utf-8") as f:
-                    cache_data = json.load(f)
-                    self.cryptocompare_cache = cache_data.get("cryptocompare_cache", {})
-                    cache_count = len(self.cryptocompare_cache)
-                    logger.info(
-                        f"✅ CryptoCompare cache loaded from disk ({cache_count} entries)"
-                    )
-            except Exception as e:
-                logger.error(f"❌ Failed to load CryptoCompare cache: {e}")
-                self.cryptocompare_cache = {}
+    def _cached(self, cache_key: str, max_age: Optional[float] = None) -> Optional[List[Dict]]:
+        """Результат запроса из NewsStore (max_age=None — любой давности)"""
+        return self.news_store.get_query(cache_key, max_age=max_age)
 
     async def get_session(self):
         """Получение HTTP сессии"""
         if not self.session or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=30, connect=10)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            self.session = get_http_transport().client(timeout=30)
         return self.session
 
     async def fetch_unified_news(
@@ -159,7 +135,7 @@ class UnifiedNewsConnector:
             except Exception as e:
                 logger.error(f"❌ CryptoCompare API ошибка: {e}")
 
-            # Дедупликация по заголовку и времени
+            # Дедупликация по статье
             unique_news = []
             seen = set()
 
@@ -167,12 +143,11 @@ class UnifiedNewsConnector:
                 if news_item is None or not isinstance(news_item, dict):
                     continue
 
-                key = (
-                    news_item.get("title", "").lower().strip(),
-                    news_item.get("published_at", 0),
-                )
+                # Ключ NewsStore: хэш URL, а для одной новости из разных
+                # источников — ключ первой по заголовку
+                key = self.news_store.article_key(news_item)
 
-                if key not in seen and key[0]:
+                if key not in seen and news_item.get("title", "").strip():
                     seen.add(key)
                     unique_news.append(news_item)
 
@@ -234,7 +209,7 @@ class UnifiedNewsConnector:
 
                 all_news.extend(result)
 
-            # Дедупликация по заголовку и времени
+            # Дедупликация по статье
             unique_news = []
             seen = set()
 
@@ -242,12 +217,11 @@ class UnifiedNewsConnector:
                 if news_item is None or not isinstance(news_item, dict):
                     continue
 
-                key = (
-                    news_item.get("title", "").lower().strip(),
-                    news_item.get("published_at", 0),
-                )
+                # Ключ NewsStore: хэш URL, а для одной новости из разных
+                # источников — ключ первой по заголовку
+                key = self.news_store.article_key(news_item)
 
-                if key not in seen and key[0]:
+                if key not in seen and news_item.get("title", "").strip():
                     seen.add(key)
                     unique_news.append(news_item)
 
@@ -280,22 +254,14 @@ class UnifiedNewsConnector:
             cache_key = f"cryptopanic_{'_'.join(sorted(symbols))}"
             current_time = current_epoch_ms()
 
-            # 3. ✅ ПРОВЕРКА КЭША (NEW!)
-            if cache_key in self.cryptopanic_cache:
-                cached_entry = self.cryptopanic_cache[cache_key]
-                cache_age = (current_time - cached_entry["timestamp"]) / 1000
-                ttl = cached_entry.get("ttl", 900)  # 15 минут по умолчанию
-
-                if cache_age < ttl:
-                    logger.debug(
-                        f"📦 CryptoPanic cache HIT: {cache_key} "
-                        f"(age: {cache_age:.0f}s/{ttl}s)"
-                    )
-                    return cached_entry["data"]
-                else:
-                    logger.debug(
-                        f"⏰ CryptoPanic cache EXPIRED: {cache_age:.0f}s > {ttl}s"
-                    )
+            # 3. ✅ ПРОВЕРКА КЭША (NewsStore, 15 минут TTL)
+            cached = self._cached(cache_key, self.query_ttl)
+            if cached is not None:
+                logger.debug(
+                    f"📦 CryptoPanic cache HIT: {cache_key} "
+                    f"(age: {self.news_store.query_age(cache_key):.0f}s/{self.query_ttl}s)"
+                )
+                return cached
 
             # 4. ✅ ПРОВЕРКА RETRY_AFTER (NEW!)
             if self.cryptopanic_retry_after > 0:
@@ -306,9 +272,10 @@ class UnifiedNewsConnector:
                         f"waiting {wait_time:.0f}s ({wait_time/60:.1f} min)"
                     )
                     # Возвращаем кэшированные данные если есть
-                    if cache_key in self.cryptopanic_cache:
+                    cached = self._cached(cache_key)
+                    if cached is not None:
                         logger.info("📦 Returning cached data due to retry_after")
-                        return self.cryptopanic_cache[cache_key]["data"]
+                        return cached
                     return []
                 else:
                     # Таймер истек, сбрасываем
@@ -325,9 +292,10 @@ class UnifiedNewsConnector:
                         f"waiting {wait_time:.0f}s ({wait_time/60:.1f} min) before next request"
                     )
                     # Возвращаем кэшированные данные если есть
-                    if cache_key in self.cryptopanic_cache:
+                    cached = self._cached(cache_key)
+                    if cached is not None:
                         logger.debug("📦 Returning cached data due to rate limit")
-                        return self.cryptopanic_cache[cache_key]["data"]
+                        return cached
                     return []
 
             # 6. Rate limiter (существующий)
@@ -395,26 +363,8 @@ class UnifiedNewsConnector:
                                 )
                                 continue
 
-                                # ✅ СОХРАНЕНИЕ В КЭШ RAM
-                        self.cryptopanic_cache[cache_key] = {
-                            "data": news_items,
-                            "timestamp": current_epoch_ms(),
-                            "ttl": 900,
-                        }
-
-                        # ✅ СОХРАНЕНИЕ КЭША НА ДИСК (НОВЫЙ КОД)
-                        try:
-                            cache_data = {
-                                "cryptopanic_cache": self.cryptopanic_cache,
-                                "saved_at": current_epoch_ms(),
-                            }
-                            with open(
-                                self.cryptopanic_cache_file, "w", encoding="utf-8"
-                            ) as f:
-                                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-                            logger.debug(f"💾 CryptoPanic cache saved to disk")
-                        except Exception as e:
-                            logger.error(f"❌ Failed to save CryptoPanic cache: {e}")
+                        # ✅ СОХРАНЕНИЕ В NEWSSTORE (память + SQLite вне loop)
+                        news_items = self.news_store.put_query(cache_key, news_items)
 
                         logger.info(
                             f"📰 CryptoPanic: {len(news_items)} новостей (cached)"
@@ -456,9 +406,10 @@ class UnifiedNewsConnector:
                         )
 
                     # Возвращаем кэшированные данные если есть
-                    if cache_key in self.cryptopanic_cache:
+                    cached = self._cached(cache_key)
+                    if cached is not None:
                         logger.info("📦 Returning cached data due to rate limit (429)")
-                        return self.cryptopanic_cache[cache_key]["data"]
+                        return cached
 
                     return []
 
@@ -466,9 +417,10 @@ class UnifiedNewsConnector:
                     logger.error(f"❌ CryptoPanic HTTP ошибка: {response.status}")
 
                     # Возвращаем кэшированные данные если есть
-                    if cache_key in self.cryptopanic_cache:
+                    cached = self._cached(cache_key)
+                    if cached is not None:
                         logger.debug("📦 Returning cached data due to HTTP error")
-                        return self.cryptopanic_cache[cache_key]["data"]
+                        return cached
 
                     return []
 
@@ -477,9 +429,10 @@ class UnifiedNewsConnector:
 
             # Возвращаем кэшированные данные если есть
             cache_key = f"cryptopanic_{'_'.join(sorted(symbols))}"
-            if cache_key in self.cryptopanic_cache:
+            cached = self._cached(cache_key)
+            if cached is not None:
                 logger.debug("📦 Returning cached data due to timeout")
-                return self.cryptopanic_cache[cache_key]["data"]
+                return cached
 
             return []
 
@@ -499,20 +452,15 @@ class UnifiedNewsConnector:
 
             # 1. Создание cache key
             cache_key = f"cryptocompare_{symbol or 'all'}"
-            current_time = current_epoch_ms()
-
-            # 2. ✅ ПРОВЕРКА КЭША (NEW!)
-            if cache_key in self.cryptocompare_cache:
-                cached_entry = self.cryptocompare_cache[cache_key]
-                cache_age = (current_time - cached_entry["timestamp"]) / 1000
-                ttl = cached_entry.get("ttl", 900)
 
-                if cache_age < ttl:
-                    logger.debug(
-                        f"📦 CryptoCompare cache HIT: {cache_key} "
-                        f"(age: {cache_age:.0f}s/{ttl}s)"
-                    )
-                    return cached_entry["data"]
+            # 2. ✅ ПРОВЕРКА КЭША (NewsStore, 15 минут TTL)
+            cached = self._cached(cache_key, self.query_ttl)
+            if cached is not None:
+                logger.debug(
+                    f"📦 CryptoCompare cache HIT: {cache_key} "
+                    f"(age: {self.news_store.query_age(cache_key):.0f}s/{self.query_ttl}s)"
+                )
+                return cached
 
             session = await self.get_session()
 
@@ -564,26 +512,8 @@ class UnifiedNewsConnector:
                             }
                         )
 
-                        # ✅ СОХРАНЕНИЕ В КЭШ RAM
-                    self.cryptocompare_cache[cache_key] = {
-                        "data": processed_news,
-                        "timestamp": current_epoch_ms(),
-                        "ttl": 900,
-                    }
-
-                    # ✅ СОХРАНЕНИЕ КЭША НА ДИСК (НОВЫЙ КОД)
-                    try:
-                        cache_data = {
-                            "cryptocompare_cache": self.cryptocompare_cache,
-                            "saved_at": current_epoch_ms(),
-                        }
-                        with open(
-                            self.cryptocompare_cache_file, "w", encoding="utf-8"
-                        ) as f:
-                            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-                        logger.debug(f"💾 CryptoCompare cache saved to disk")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to save CryptoCompare cache: {e}")
+                    # ✅ СОХРАНЕНИЕ В NEWSSTORE (память + SQLite вне loop)
+                    processed_news = self.news_store.put_query(cache_key, processed_news)
 
                     logger.info(
                         f"📰 CryptoCompare: {len(processed_news)} новостей (cached)"
@@ -594,10 +524,7 @@ class UnifiedNewsConnector:
                     logger.warning("⚠️ CryptoCompare rate limit exceeded")
 
                     # Возвращаем кэш если есть
-                    if cache_key in self.cryptocompare_cache:
-                        return self.cryptocompare_cache[cache_key]["data"]
-
-                    return []
+                    return self._cached(cache_key) or []
                 else:
                     logger.warning(f"⚠️ CryptoCompare API status: {response.status}")
                     return []
@@ -606,10 +533,7 @@ class UnifiedNewsConnector:
             logger.error("❌ CryptoCompare API timeout")
 
             # Возвращаем кэш если есть
-            if cache_key in self.cryptocompare_cache:
-                return self.cryptocompare_cache[cache_key]["data"]
-
-            return []
+            return self._cached(cache_key) or []
         except Exception as e:
             logger.error(f"❌ CryptoCompare API ошибка: {e}")
             return []
@@ -775,6 +699,9 @@ class UnifiedNewsConnector:
     async def close(self):
         """Закрытие коннектора"""
         try:
+            # Дожидаемся записей NewsStore (executor не блокируем ожиданием)
+            await asyncio.to_thread(self.news_store.flush)
+
             if self.session and not self.session.closed:
                 await self.session.close()
                 logger.info("🌐 News connector HTTP сессия закрыта")
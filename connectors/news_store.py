@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+News Store - хранилище новостей по статьям (SQLite)
+Ключ статьи — хэш URL (или source+id / заголовка), дедупликация
+CryptoPanic / CryptoCompare по заголовку, TTL eviction, sentiment
+хранится вместе со статьёй. Запись на диск — вне event loop.
+"""
+
+import hashlib
+import itertools
+import json
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import logger, NEWS_STORE_CONFIG
+from utils.memory_manager import get_memory_manager
+from utils.metrics import get_metrics_registry, stats_collector
+from utils.performance import run_blocking_nowait
+
+
+# Поля sentiment, которые переносятся между повторными загрузками статьи
+SENTIMENT_FIELDS = ("sentiment", "sentiment_emoji")
+
+_NON_WORD = re.compile(r"[^0-9a-zа-яё]+")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _title_hash(title: str) -> str:
+    """Хэш нормализованного заголовка (регистр, пунктуация, пробелы)"""
+    return _digest(_NON_WORD.sub(" ", title.lower()).strip())
+
+
+def _normalize_url(url: str) -> str:
+    """URL без схемы, query, fragment и завершающего /"""
+    url = url.strip().lower().split("#", 1)[0].split("?", 1)[0]
+    url = url.split("://", 1)[-1]
+    if url.startswith("www."):
+        url = url[4:]
+    return url.rstrip("/")
+
+
+class NewsStore:
+    """
+    Хранилище новостей
+
+    В памяти:
+    - articles: {key: news_item}, порядок — от давно виденных к свежим
+    - queries: {query_key: (fetched_at, [keys])} — результаты запросов к API
+    - title index: хэш заголовка → key (одна статья из разных источников)
+
+    На диске (SQLite): таблицы news_articles / news_queries, запись
+    upsert'ами изменённых строк через ThreadPoolExecutor — задания
+    выполняются строго в порядке постановки (очередь под _write_lock).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        article_ttl: Optional[float] = None,
+        evict_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            path: Файл SQLite (по умолчанию NEWS_STORE_CONFIG['path'])
+            article_ttl: Сколько хранить статью после последнего появления (сек)
+            evict_interval: Как часто проверять TTL (сек)
+        """
+        self.path = path or NEWS_STORE_CONFIG["path"]
+        self.article_ttl = article_ttl or NEWS_STORE_CONFIG["article_ttl_hours"] * 3600
+        self.evict_interval = evict_interval or NEWS_STORE_CONFIG["evict_interval"]
+
+        self.articles: Dict[str, Dict] = {}
+        self.queries: Dict[str, Tuple[float, List[str]]] = {}
+        self._seen: Dict[str, float] = {}
+        self._titles: Dict[str, str] = {}
+        self._last_evict = 0.0
+        self._write_lock = threading.Lock()
+        self._writes: deque = deque()
+        self._pending: List[Future] = []
+
+        self.stats = {
+            "articles_added": 0,
+            "duplicates": 0,
+            "query_hits": 0,
+            "query_misses": 0,
+            "sentiment_hits": 0,
+            "sentiment_misses": 0,
+            "evicted": 0,
+            "write_errors": 0,
+        }
+
+        self._load()
+
+        # Hook по weakref: вместе со статьями чистятся _seen / _titles
+        store_ref = weakref.ref(self)
+        get_memory_manager().register_component(
+            "news_store.articles", self, "articles",
+            evict=lambda _articles, fraction: store_ref().evict_oldest(fraction),
+        )
+        get_metrics_registry().register_collector(
+            "news_store", stats_collector("news_store", self.get_stats)
+        )
+
+    # ==================== КЛЮЧИ ====================
+
+    @staticmethod
+    def _own_key(item: Dict) -> str:
+        """Ключ статьи по её собственным полям"""
+        url = item.get("url") or ""
+        if url:
+            return "u:" + _digest(_normalize_url(url))
+        if item.get("id"):
+            return "i:" + _digest(f"{str(item.get('source', '')).lower()}:{item['id']}")
+        return "t:" + _title_hash(item.get("title", ""))
+
+    def article_key(self, item: Dict) -> str:
+        """
+        Ключ статьи с учётом дубликатов
+
+        Одна новость из CryptoPanic и CryptoCompare приходит с разными URL,
+        поэтому при совпадении заголовка возвращается ключ уже известной статьи.
+        """
+        key = item.get("news_key")
+        if key:
+            return key
+
+        key = self._own_key(item)
+        if key in self.articles:
+            return key
+
+        title = item.get("title") or ""
+        if title:
+            known = self._titles.get(_title_hash(title))
+            if known in self.articles:
+                return known
+        return key
+
+    # ==================== ЗАПРОСЫ К API ====================
+
+    def get_query(
+        self, query_key: str, max_age: Optional[float] = None, now: Optional[float] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Закэшированный результат запроса
+
+        Args:
+            query_key: Ключ запроса (cryptopanic_BTC, cryptocompare_all, ...)
+            max_age: Максимальный возраст (сек); None — любой (fallback при ошибках)
+            now: Текущее время (по умолчанию time.time())
+
+        Returns:
+            Список статей или None, если кэша нет / он устарел
+        """
+        entry = self.queries.get(query_key)
+        if entry is None or (
+            max_age is not None and (now or time.time()) - entry[0] >= max_age
+        ):
+            self.stats["query_misses"] += 1
+            return None
+
+        self.stats["query_hits"] += 1
+        articles = self.articles
+        return [articles[key] for key in entry[1] if key in articles]
+
+    def query_age(self, query_key: str, now: Optional[float] = None) -> Optional[float]:
+        """Возраст результата запроса (сек) или None"""
+        entry = self.queries.get(query_key)
+        return None if entry is None else (now or time.time()) - entry[0]
+
+    def put_query(self, query_key: str, items: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """
+        Сохранить результат запроса: статьи дедуплицируются, известные
+        статьи сохраняют свой sentiment
+
+        Args:
+            query_key: Ключ запроса
+            items: Новости от API
+            now: Время загрузки
+
+        Returns:
+            Статьи без дубликатов (с полем news_key)
+        """
+        now = now or time.time()
+        keys: List[str] = []
+        seen_keys = set()
+        rows = []
+
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            key = self.article_key(item)
+            if key in seen_keys:
+                self.stats["duplicates"] += 1
+                continue
+            seen_keys.add(key)
+
+            existing = self.articles.get(key)
+            if existing is None:
+                self.stats["articles_added"] += 1
+            else:
+                if existing.get("source") != item.get("source"):
+                    self.stats["duplicates"] += 1
+                for name in SENTIMENT_FIELDS:
+                    if item.get(name) is None and existing.get(name) is not None:
+                        item[name] = existing[name]
+
+            item["news_key"] = key
+            self._remember(key, item, now)
+            keys.append(key)
+            rows.append(self._article_row(key, item, now))
+
+        self.queries[query_key] = (now, keys)
+        self._submit(self._write, rows, (query_key, now, json.dumps(keys)))
+        self.maybe_evict(now)
+        return [self.articles[key] for key in keys]
+
+    # ==================== SENTIMENT ====================
+
+    def get_sentiment(self, item: Dict) -> Optional[Dict[str, str]]:
+        """Сохранённый sentiment статьи или None"""
+        article = self.articles.get(self.article_key(item))
+        if article is None or not article.get("sentiment"):
+            self.stats["sentiment_misses"] += 1
+            return None
+        self.stats["sentiment_hits"] += 1
+        return {name: article.get(name) for name in SENTIMENT_FIELDS}
+
+    def set_sentiment(self, item: Dict, sentiment: str, emoji: str, now: Optional[float] = None):
+        """
+        Сохранить sentiment вместе со статьёй (статья добавляется, если её нет)
+
+        Args:
+            item: Новость
+            sentiment: BULLISH / BEARISH / NEUTRAL
+            emoji: 🟢 / 🔴 / 🟡
+        """
+        now = now or time.time()
+        key = self.article_key(item)
+        article = self.articles.get(key)
+        if article is None:
+            article = item
+            self.stats["articles_added"] += 1
+
+        article["news_key"] = key
+        article["sentiment"] = sentiment
+        article["sentiment_emoji"] = emoji
+        self._remember(key, article, now)
+        self._submit(self._write, [self._article_row(key, article, now)], None)
+
+    # ==================== TTL ====================
+
+    def maybe_evict(self, now: Optional[float] = None) -> int:
+        """evict_expired(), но не чаще evict_interval"""
+        now = now or time.time()
+        if now - self._last_evict < self.evict_interval:
+            return 0
+        return self.evict_expired(now)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """
+        Удалить статьи, не появлявшиеся дольше article_ttl
+
+        Returns:
+            Количество удалённых статей
+        """
+        now = now or time.time()
+        self._last_evict = now
+        cutoff = now - self.article_ttl
+
+        expired = []
+        # _seen упорядочен по времени последнего появления
+        for key, seen in self._seen.items():
+            if seen >= cutoff:
+                break
+            expired.append(key)
+
+        for key in expired:
+            self._forget(key)
+
+        for query_key in [k for k, (ts, _) in self.queries.items() if ts < cutoff]:
+            del self.queries[query_key]
+
+        if expired:
+            self.stats["evicted"] += len(expired)
+            logger.debug(f"🗑️ NewsStore: удалено {len(expired)} устаревших статей")
+        self._submit(self._delete_expired, cutoff)
+        return len(expired)
+
+    def evict_oldest(self, fraction: float) -> int:
+        """
+        Удалить самую старую долю статей из памяти (eviction hook memory manager)
+
+        На диске статьи остаются до TTL.
+
+        Returns:
+            Количество удалённых статей
+        """
+        n = int(len(self._seen) * max(0.0, min(1.0, fraction)))
+        for key in list(itertools.islice(self._seen, n)):
+            self._forget(key)
+        self.stats["evicted"] += n
+        return n
+
+    # ==================== ВНУТРЕННЕЕ ====================
+
+    def _remember(self, key: str, item: Dict, now: float):
+        """Положить статью в память (в конец порядка свежести)"""
+        self.articles.pop(key, None)
+        self.articles[key] = item
+        self._seen.pop(key, None)
+        self._seen[key] = now
+        title = item.get("title")
+        if title:
+            self._titles.setdefault(_title_hash(title), key)
+
+    def _forget(self, key: str):
+        """Убрать статью из памяти вместе с индексами"""
+        self._seen.pop(key, None)
+        article = self.articles.pop(key, None)
+        if article and article.get("title"):
+            title_hash = _title_hash(article["title"])
+            if self._titles.get(title_hash) == key:
+                del self._titles[title_hash]
+
+    @staticmethod
+    def _article_row(key: str, item: Dict, now: float) -> Tuple:
+        return (
+            key,
+            str(item.get("source", "")),
+            item.get("title", ""),
+            item.get("url", ""),
+            now,
+            item.get("sentiment"),
+            json.dumps(item, ensure_ascii=False, default=str),
+        )
+
+    def _submit(self, func, *args):
+        """
+        Запись в SQLite вне event loop
+
+        Задание ставится в очередь, а в пул уходит _drain: задания выполняются
+        по одному под _write_lock в порядке постановки, поэтому более старый
+        upsert не может перезаписать более новый (например, sentiment).
+        """
+        self._writes.append((func, args))
+        result = run_blocking_nowait(self._drain)
+        if isinstance(result, Future):
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(result)
+
+    def flush(self, timeout: Optional[float] = 10.0):
+        """Дождаться незавершённых записей (shutdown, тесты)"""
+        pending, self._pending = self._pending, []
+        if pending:
+            wait(pending, timeout=timeout)
+
+    def _drain(self):
+        with self._write_lock:
+            while self._writes:
+                func, args = self._writes.popleft()
+                func(*args)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write(self, article_rows: List[Tuple], query_row: Optional[Tuple]):
+        """Upsert статей и результата запроса одной транзакцией (из _drain)"""
+        conn = None
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO news_articles "
+                    "(key, source, title, url, seen_ts, sentiment, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    article_rows,
+                )
+                if query_row:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO news_queries (query_key, fetched_ts, keys) "
+                        "VALUES (?, ?, ?)",
+                        query_row,
+                    )
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"❌ NewsStore write error: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def _delete_expired(self, cutoff: float):
+        conn = None
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM news_articles WHERE seen_ts < ?", (cutoff,))
+                conn.execute("DELETE FROM news_queries WHERE fetched_ts < ?", (cutoff,))
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"❌ NewsStore delete error: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def _load(self):
+        """Создать схему и загрузить неустаревшие статьи (при старте)"""
+        conn = None
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS news_articles (
+                        key TEXT PRIMARY KEY,
+                        source TEXT,
+                        title TEXT,
+                        url TEXT,
+                        seen_ts REAL NOT NULL,
+                        sentiment TEXT,
+                        payload TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_news_articles_seen ON news_articles (seen_ts)"
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS news_queries (
+                        query_key TEXT PRIMARY KEY,
+                        fetched_ts REAL NOT NULL,
+                        keys TEXT NOT NULL
+                    )
+                    """
+                )
+
+            cutoff = time.time() - self.article_ttl
+            for key, seen, payload in conn.execute(
+                "SELECT key, seen_ts, payload FROM news_articles "
+                "WHERE seen_ts >= ? ORDER BY seen_ts",
+                (cutoff,),
+            ):
+                self._remember(key, json.loads(payload), seen)
+
+            for query_key, fetched, keys in conn.execute(
+                "SELECT query_key, fetched_ts, keys FROM news_queries WHERE fetched_ts >= ?",
+                (cutoff,),
+            ):
+                self.queries[query_key] = (fetched, json.loads(keys))
+
+            if self.articles:
+                logger.info(f"✅ NewsStore: загружено {len(self.articles)} статей с диска")
+
+        except Exception as e:
+            logger.error(f"❌ NewsStore load error: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика хранилища"""
+        return {**self.stats, "articles": len(self.articles), "queries": len(self.queries)}
+
+
+# ==================== SINGLETON ====================
+
+_global_news_store: Optional[NewsStore] = None
+
+
+def get_news_store() -> NewsStore:
+    """Получить глобальный NewsStore"""
+    global _global_news_store
+    if _global_news_store is None:
+        _global_news_store = NewsStore()
+        logger.info(f"✅ NewsStore инициализирован: {_global_news_store.path}")
+    return _global_news_store
+
+
+# Экспорт
+__all__ = [
+    "SENTIMENT_FIELDS",
+    "NewsStore",
+    "get_news_store",
+]
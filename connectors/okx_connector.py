@@ -8,13 +8,16 @@ REST API + WebSocket streams
 import asyncio
 import aiohttp
 import websockets
-import json
 import hmac
 import base64
 import time  # ← ДОБАВЛЕНО В НАЧАЛО!
 from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime
 from config.settings import logger
+from connectors.ws_parsers import parse_okx_books, parse_okx_trades
+from core.trade_bus import RollingDelta, get_trade_bus
+from utils import fast_json
+from utils.http_transport import get_http_transport
 from utils.validators import DataValidator
 
 
@@ -78,9 +81,9 @@ class OKXConnector:
         self.large_trades = []  # Список крупных трейдов
         self.large_trade_threshold = 50000  # $50k минимум
         # CVD tracking (НОВОЕ!)
-        self.cvd = {}  # {symbol: cumulative_delta}
         self.cvd_window = 300  # 5 минут window для CVD
-        self.cvd_trades = {}  # {symbol: [(timestamp, delta), ...]}
+        # Rolling CVD по символам (BTCUSDT); наполняется подписчиком TradeBus
+        self.cvd_delta = RollingDelta(self.cvd_window)
 
 
         # Statistics
@@ -105,10 +108,8 @@ class OKXConnector:
             True если успешно
         """
         try:
-            # 1. Инициализация REST API
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30)
-            )
+            # 1. Инициализация REST API (общий транспорт, бюджет OKX)
+            self.session = get_http_transport().client("okx", timeout=30)
 
             # Проверка подключения
             server_time = await self.get_server_time()
@@ -157,55 +158,21 @@ class OKXConnector:
             return 0.0
 
 
-    async def _handle_trade_for_cvd(self, trade_data: Dict):
-        """Обрабатывает трейды для расчёта CVD"""
-        try:
-            symbol = trade_data.get('instId', '').replace('-', '')
-            if symbol not in self.symbols:
-                return
-
-            side = trade_data.get('side')
-            size = float(trade_data.get('sz', 0))
-            timestamp = int(trade_data.get('ts', 0)) / 1000
-
-            delta = size if side == 'buy' else -size
-
-            if symbol not in self.cvd:
-                self.cvd[symbol] = 0
-                self.cvd_trades[symbol] = []
-
-            self.cvd_trades[symbol].append((timestamp, delta))
-
-            cutoff_time = timestamp - self.cvd_window
-            self.cvd_trades[symbol] = [
-                (ts, d) for ts, d in self.cvd_trades[symbol]
-                if ts > cutoff_time
-            ]
-
-            self.cvd[symbol] = sum(d for ts, d in self.cvd_trades[symbol])
-            logger.debug(f"📊 OKX CVD updated {symbol}: {self.cvd[symbol]:.2f}")
-
-        except Exception as e:
-            logger.error(f"❌ OKX CVD calculation error: {e}")
-
-
     def get_cvd(self, symbol: str) -> float:
         """Возвращает текущий CVD для символа"""
-        return self.cvd.get(symbol, 0)
+        return self.cvd_delta.value(symbol)
 
 
     def get_cvd_percentage(self, symbol: str) -> float:
         """Возвращает CVD в процентах от общего объёма"""
         try:
-            if symbol not in self.cvd_trades or not self.cvd_trades[symbol]:
-                return 0
-
-            total_volume = sum(abs(d) for ts, d in self.cvd_trades[symbol])
+            # Сумма всех трейдов (по модулю)
+            total_volume = self.cvd_delta.volume(symbol)
 
             if total_volume == 0:
                 return 0
 
-            cvd_pct = (self.cvd[symbol] / total_volume) * 100
+            cvd_pct = (self.cvd_delta.value(symbol) / total_volume) * 100
             return cvd_pct
 
         except Exception as e:
@@ -504,14 +471,14 @@ class OKXConnector:
                         "args": [{"channel": "books", "instId": symbol}],
                     }
 
-                    await ws.send(json.dumps(subscribe_msg))
+                    await ws.send(fast_json.dumps(subscribe_msg))
 
                     async for message in ws:
                         if not self.is_ws_running:
                             break
 
                         try:
-                            data = json.loads(message)
+                            data = fast_json.loads(message)
                             if "data" in data:
                                 await self._handle_orderbook_update(symbol, data)
                         except Exception as e:
@@ -548,14 +515,14 @@ class OKXConnector:
                         "args": [{"channel": "trades", "instId": symbol}],
                     }
 
-                    await ws.send(json.dumps(subscribe_msg))
+                    await ws.send(fast_json.dumps(subscribe_msg))
 
                     async for message in ws:
                         if not self.is_ws_running:
                             break
 
                         try:
-                            data = json.loads(message)
+                            data = fast_json.loads(message)
                             if "data" in data:
                                 await self._handle_trade(symbol, data)
                         except Exception as e:
@@ -581,21 +548,13 @@ class OKXConnector:
         if "data" not in data:
             return
 
-        for book_data in data["data"]:
-            bids_raw = book_data["bids"]
-            asks_raw = book_data["asks"]
-
+        # Уровни: (price, qty, orders), уже float/int
+        for timestamp, bids, asks in parse_okx_books(data):
             orderbook = {
                 "symbol": symbol,
-                "timestamp": int(book_data["ts"]),
-                "bids": [
-                    [float(price), float(qty), int(orders)]
-                    for price, qty, _, orders in bids_raw
-                ],
-                "asks": [
-                    [float(price), float(qty), int(orders)]
-                    for price, qty, _, orders in asks_raw
-                ],
+                "timestamp": timestamp,
+                "bids": bids,
+                "asks": asks,
             }
 
             self.orderbooks[symbol] = orderbook
@@ -605,9 +564,6 @@ class OKXConnector:
             self.stats["ws_orderbook_updates"] += 1
 
             # Рассчитываем и сохраняем давление
-            bids = orderbook["bids"]
-            asks = orderbook["asks"]
-
             pressure = self._calculate_orderbook_pressure(symbol, bids, asks)
             self.orderbook_pressure[symbol] = pressure
 
@@ -667,19 +623,19 @@ class OKXConnector:
         if "data" not in data:
             return
 
-        for trade in data["data"]:
-            # CVD tracking
-            await self._handle_trade_for_cvd(trade)
+        bus = get_trade_bus()
+        for trade in parse_okx_trades(data):
+            # CVD, киты и остальная аналитика — подписчики TradeBus
+            bus.publish("okx", trade.symbol, trade.timestamp, trade.price, trade.size, trade.side)
 
-            # Parse trade data
-            price = float(trade["px"])
-            quantity = float(trade["sz"])
-            timestamp_ms = int(trade["ts"])
-            side = trade["side"]  # buy/sell
+            price = trade.price
+            quantity = trade.size
+            timestamp_ms = trade.timestamp
+            side = trade.side  # buy/sell
 
             trade_data = {
                 "symbol": symbol,
-                "trade_id": trade["tradeId"],
+                "trade_id": trade.trade_id,
                 "price": price,
                 "quantity": quantity,
                 "timestamp": timestamp_ms,
@@ -690,24 +646,6 @@ class OKXConnector:
             # Calculate trade value
             trade_value = price * quantity
 
-            # ⭐ WHALE TRACKER INTEGRATION
-            if hasattr(self, 'whale_tracker') and self.whale_tracker:
-                self.whale_tracker.add_trade(
-                    symbol=symbol.replace('-', ''),  # BTC-USDT -> BTCUSDT
-                    side=side.upper(),               # buy -> BUY
-                    size=quantity,
-                    price=price
-                )
-
-            # ⭐ CVD CALCULATOR INTEGRATION
-            if hasattr(self, 'cvd_calculator') and self.cvd_calculator:
-                self.cvd_calculator.process_trade(
-                    symbol=symbol.replace('-', ''),
-                    side=side.upper(),
-                    price=price,
-                    quantity=quantity
-                )
-
             # Локальное хранение крупных трейдов
             if trade_value >= self.large_trade_threshold:
                 whale_trade = {
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebSocket Parsers - разбор сообщений бирж по схеме
+Строки цен/объёмов конвертируются в float ровно один раз,
+уровни стакана — компактные tuple (price, size)
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+Level = Tuple[float, float]
+
+
+class BookMessage(NamedTuple):
+    """Обновление стакана (snapshot или delta)"""
+
+    kind: str  # "snapshot" / "delta"
+    symbol: str
+    timestamp: int  # ms
+    update_id: int
+    bids: List[Level]
+    asks: List[Level]
+
+
+class TradeTick(NamedTuple):
+    """Одна сделка"""
+
+    symbol: str
+    price: float
+    size: float
+    timestamp: int  # ms
+    side: str  # "buy" / "sell"
+    trade_id: str
+
+
+class LiquidationTick(NamedTuple):
+    """Принудительное закрытие позиции"""
+
+    symbol: str
+    price: float
+    size: float
+    timestamp: int  # ms
+    side: str  # ликвидированная позиция: "long" / "short"
+
+
+def parse_levels(levels: List[List[str]]) -> List[Level]:
+    """[["price", "size", ...], ...] → [(price, size), ...]"""
+    return [(float(level[0]), float(level[1])) for level in levels]
+
+
+# ==================== BYBIT ====================
+
+
+def parse_bybit_orderbook(data: Dict) -> Optional[BookMessage]:
+    """
+    Bybit v5 orderbook.{depth}.{symbol}
+
+    {"topic": "orderbook.200.BTCUSDT", "type": "snapshot"|"delta",
+     "data": {"s": "BTCUSDT", "b": [["p", "q"]], "a": [...], "u": 1, "seq": 2},
+     "ts": 1700000000000}
+    """
+    book = data.get("data")
+    if not book or not data.get("topic", "").startswith("orderbook"):
+        return None
+    return BookMessage(
+        kind=data.get("type", "snapshot"),
+        symbol=book.get("s", ""),
+        timestamp=int(book.get("ts") or data.get("ts") or 0),
+        update_id=book.get("u", 0),
+        bids=parse_levels(book.get("b", ())),
+        asks=parse_levels(book.get("a", ())),
+    )
+
+
+def parse_bybit_liquidation(data: Dict) -> List[LiquidationTick]:
+    """
+    Bybit v5 allLiquidation.{symbol}
+
+    {"topic": "allLiquidation.BTCUSDT", "ts": 1700000000000,
+     "data": [{"T": 1700000000000, "s": "BTCUSDT", "S": "Buy", "v": "0.5", "p": "60000"}]}
+
+    S — сторона позиции: Buy — ликвидирован лонг, Sell — шорт
+    """
+    if not data.get("topic", "").startswith("allLiquidation"):
+        return []
+    return [
+        LiquidationTick(
+            symbol=item["s"],
+            price=float(item["p"]),
+            size=float(item["v"]),
+            timestamp=int(item["T"]),
+            side="long" if item["S"] == "Buy" else "short",
+        )
+        for item in data.get("data", ())
+    ]
+
+
+# ==================== BINANCE ====================
+
+
+def parse_binance_trade(data: Dict) -> Optional[TradeTick]:
+    """
+    Binance <symbol>@trade
+
+    {"e": "trade", "s": "BTCUSDT", "t": 1, "p": "0.001", "q": "100",
+     "T": 1700000000000, "m": true}
+    """
+    if data.get("e") != "trade":
+        return None
+    return TradeTick(
+        symbol=data["s"],
+        price=float(data["p"]),
+        size=float(data["q"]),
+        timestamp=data["T"],
+        # m=True: покупатель — maker → агрессор продаёт
+        side="sell" if data["m"] else "buy",
+        trade_id=str(data.get("t", "")),
+    )
+
+
+def parse_binance_force_order(data: Dict) -> Optional[LiquidationTick]:
+    """
+    Binance Futures <symbol>@forceOrder
+
+    {"e": "forceOrder", "E": 1700000000000, "o": {"s": "BTCUSDT", "S": "SELL",
+     "q": "0.014", "p": "9910", "ap": "9910", "z": "0.014", "T": 1700000000000}}
+
+    Ордер SELL закрывает лонг, BUY — шорт
+    """
+    if data.get("e") != "forceOrder":
+        return None
+    order = data["o"]
+    price = float(order.get("ap") or 0) or float(order["p"])
+    return LiquidationTick(
+        symbol=order["s"],
+        price=price,
+        size=float(order.get("z") or 0) or float(order["q"]),
+        timestamp=int(order["T"]),
+        side="long" if order["S"] == "SELL" else "short",
+    )
+
+
+# ==================== OKX ====================
+
+
+def parse_okx_books(data: Dict) -> List[Tuple[int, List[Tuple[float, float, int]], List[Tuple[float, float, int]]]]:
+    """
+    OKX books: уровни [price, size, liquidated, orders]
+
+    Returns:
+        [(timestamp_ms, bids[(price, size, orders)], asks[...]), ...]
+    """
+    return [
+        (
+            int(book["ts"]),
+            [(float(p), float(q), int(n)) for p, q, _, n in book["bids"]],
+            [(float(p), float(q), int(n)) for p, q, _, n in book["asks"]],
+        )
+        for book in data.get("data", ())
+    ]
+
+
+def parse_okx_trades(data: Dict) -> List[TradeTick]:
+    """
+    OKX trades
+
+    {"arg": {...}, "data": [{"instId": "BTC-USDT", "tradeId": "1", "px": "1",
+     "sz": "0.1", "side": "buy", "ts": "1700000000000"}]}
+    """
+    return [
+        TradeTick(
+            symbol=trade["instId"],
+            price=float(trade["px"]),
+            size=float(trade["sz"]),
+            timestamp=int(trade["ts"]),
+            side=trade["side"],
+            trade_id=trade["tradeId"],
+        )
+        for trade in data.get("data", ())
+    ]
+
+
+# ==================== COINBASE ====================
+
+
+def parse_coinbase_snapshot(data: Dict) -> Tuple[Dict[float, float], Dict[float, float]]:
+    """Coinbase level2 snapshot → (bids {price: size}, asks {price: size})"""
+    bids = {float(p): float(s) for p, s in data.get("bids", ())}
+    asks = {float(p): float(s) for p, s in data.get("asks", ())}
+    return bids, asks
+
+
+def parse_coinbase_changes(data: Dict) -> List[Tuple[bool, float, float]]:
+    """Coinbase l2update: [["buy"|"sell", "price", "size"]] → [(is_bid, price, size)]"""
+    return [
+        (side == "buy", float(price), float(size))
+        for side, price, size in data.get("changes", ())
+    ]
+
+
+# Экспорт
+__all__ = [
+    "BookMessage",
+    "TradeTick",
+    "LiquidationTick",
+    "parse_levels",
+    "parse_bybit_orderbook",
+    "parse_bybit_liquidation",
+    "parse_binance_trade",
+    "parse_binance_force_order",
+    "parse_okx_books",
+    "parse_okx_trades",
+    "parse_coinbase_snapshot",
+    "parse_coinbase_changes",
+]
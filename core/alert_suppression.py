@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alert Suppression - общий индекс антиспама алертов
+(type, symbol, bucket) → (время последней отправки (monotonic), cooldown).
+Проверка с записью O(1), cooldown по типу алерта, общий лимит
+алертов в минуту. Состояние сохраняется на диск (вне event loop),
+чтобы рестарт не отправил повторно те же алерты.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from config.settings import logger, ALERT_SUPPRESSION_CONFIG
+from utils import fast_json
+from utils.metrics import get_metrics_registry, stats_collector
+from utils.performance import run_blocking_nowait
+
+
+AlertKey = Tuple[str, str, str]
+
+
+class AlertSuppressionIndex:
+    """
+    Индекс последних отправок алертов
+
+    Features:
+    - acquire() — атомарная проверка cooldown и лимита с записью
+    - release() — откат записи, если отправка не удалась
+    - Cooldown хранится вместе с ключом (переданный в acquire переживает
+      очистку и рестарт)
+    - Очистка истёкших ключей и сохранение в JSON (wall-clock) не чаще
+      save_interval; запись файла — в executor
+    """
+
+    def __init__(self, config: Optional[Dict] = None, state_path: Optional[str] = None):
+        """
+        Args:
+            config: Параметры (по умолчанию ALERT_SUPPRESSION_CONFIG)
+            state_path: Файл состояния (None — из config, "" — без сохранения)
+        """
+        cfg = {**ALERT_SUPPRESSION_CONFIG, **(config or {})}
+        self.default_cooldown = cfg["default_cooldown"]
+        self.cooldowns: Dict[str, float] = dict(cfg["cooldowns"])
+        self.max_per_minute = cfg["max_per_minute"]
+        self.save_interval = cfg["save_interval"]
+        self.state_path = cfg["state_path"] if state_path is None else state_path
+
+        self._last_fire: Dict[AlertKey, Tuple[float, float]] = {}  # key → (время, cooldown)
+        self._fired: Deque[float] = deque()  # отправки за последнюю минуту
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._save_lock = threading.Lock()
+        self._save_seq = 0  # последний снимок, поставленный на запись
+        self._written_seq = 0
+
+        self.stats = {"allowed": 0, "suppressed_cooldown": 0, "suppressed_rate": 0, "restored": 0}
+
+        if self.state_path:
+            self.load()
+
+        get_metrics_registry().register_collector(
+            "alert_suppression", stats_collector("alert_suppression", lambda: self.stats)
+        )
+
+    # ==================== КЛЮЧИ ====================
+
+    @staticmethod
+    def key(alert_type: str, symbol: Optional[str] = None, bucket: str = "") -> AlertKey:
+        """Ключ индекса: тип без учёта регистра, symbol=None — глобальный алерт"""
+        return (alert_type.lower(), symbol or "global", str(bucket))
+
+    def cooldown_for(self, alert_type: str) -> float:
+        """Cooldown типа алерта (сек)"""
+        return self.cooldowns.get(alert_type.lower(), self.default_cooldown)
+
+    # ==================== ПРОВЕРКА ====================
+
+    def remaining(
+        self,
+        alert_type: str,
+        symbol: Optional[str] = None,
+        bucket: str = "",
+        cooldown: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> float:
+        """Сколько секунд осталось до конца cooldown (0 — можно отправлять)"""
+        entry = self._last_fire.get(self.key(alert_type, symbol, bucket))
+        if entry is None:
+            return 0.0
+        last, stored = entry
+        if cooldown is None:
+            cooldown = stored
+        now = time.monotonic() if now is None else now
+        return max(0.0, cooldown - (now - last))
+
+    def acquire(
+        self,
+        alert_type: str,
+        symbol: Optional[str] = None,
+        bucket: str = "",
+        cooldown: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> bool:
+        """
+        Проверить и занять слот алерта
+
+        Args:
+            alert_type: Тип алерта (liquidation, l2_imbalance, ...)
+            symbol: Торговая пара (None — глобальный алерт)
+            bucket: Дополнительный разрез (направление, уровень, ...)
+            cooldown: Cooldown (сек) вместо cooldown типа
+            now: time.monotonic()
+
+        Returns:
+            True — алерт можно отправить (время записано), False — подавлен
+        """
+        now = time.monotonic() if now is None else now
+        key = self.key(alert_type, symbol, bucket)
+        if cooldown is None:
+            cooldown = self.cooldown_for(key[0])
+
+        entry = self._last_fire.get(key)
+        if entry is not None and now - entry[0] < cooldown:
+            self.stats["suppressed_cooldown"] += 1
+            return False
+
+        fired = self._fired
+        while fired and now - fired[0] >= 60:
+            fired.popleft()
+        if len(fired) >= self.max_per_minute:
+            self.stats["suppressed_rate"] += 1
+            logger.debug(f"⏸️ Лимит алертов: {self.max_per_minute}/мин, {key} подавлен")
+            return False
+
+        self._last_fire[key] = (now, cooldown)
+        fired.append(now)
+        self.stats["allowed"] += 1
+        self._dirty = True
+        if now - self._last_save >= self.save_interval:
+            self._prune(now)
+            if self.state_path:
+                run_blocking_nowait(self._write_state, *self._snapshot(now))
+            self._last_save = now
+        return True
+
+    def release(self, alert_type: str, symbol: Optional[str] = None, bucket: str = ""):
+        """Откатить acquire(), если алерт не был отправлен"""
+        entry = self._last_fire.pop(self.key(alert_type, symbol, bucket), None)
+        if entry is not None:
+            try:
+                self._fired.remove(entry[0])
+            except ValueError:
+                pass
+            self._dirty = True
+
+    def reset(self):
+        """Очистить индекс"""
+        self._last_fire.clear()
+        self._fired.clear()
+        self._dirty = True
+
+    # ==================== СОХРАНЕНИЕ ====================
+
+    def _prune(self, now: float):
+        """Удалить ключи с истёкшим cooldown (своим у каждого ключа)"""
+        expired = [
+            key for key, (last, cooldown) in self._last_fire.items()
+            if now - last >= cooldown
+        ]
+        for key in expired:
+            del self._last_fire[key]
+
+    def _snapshot(self, now: float) -> Tuple[int, Dict]:
+        """Снимок активных cooldown (monotonic → wall-clock) на потоке цикла"""
+        wall = time.time()
+        self._save_seq += 1
+        self._dirty = False
+        state = {
+            "alerts": [
+                [*key, wall - (now - last), cooldown]
+                for key, (last, cooldown) in self._last_fire.items()
+            ],
+            "fired": [wall - (now - ts) for ts in self._fired],
+        }
+        return self._save_seq, state
+
+    def _write_state(self, seq: int, state: Dict):
+        """Записать снимок в файл (executor); более старый снимок не пишется поверх нового"""
+        with self._save_lock:
+            if seq <= self._written_seq:
+                return
+            try:
+                tmp_path = f"{self.state_path}.tmp"
+                os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(fast_json.dumps(state))
+                os.replace(tmp_path, self.state_path)
+                self._written_seq = seq
+            except OSError as e:
+                self._dirty = True
+                logger.warning(f"⚠️ Не удалось сохранить состояние алертов: {e}")
+
+    def save(self, now: Optional[float] = None):
+        """Сохранить активные cooldown синхронно (при остановке)"""
+        now = time.monotonic() if now is None else now
+        self._prune(now)
+        self._last_save = now
+        if self.state_path:
+            self._write_state(*self._snapshot(now))
+
+    def flush(self):
+        """Сохранить состояние, если есть несохранённые изменения (при остановке)"""
+        if self._dirty:
+            self.save()
+
+    def load(self):
+        """Восстановить cooldown после рестарта (wall-clock → monotonic)"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = fast_json.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Состояние алертов не прочитано: {e}")
+            return
+
+        now = time.monotonic()
+        wall = time.time()
+        for alert_type, symbol, bucket, fired_at, *stored in state.get("alerts", []):
+            age = wall - fired_at
+            cooldown = stored[0] if stored else self.cooldown_for(alert_type)
+            if 0 <= age < cooldown:
+                self._last_fire[(alert_type, symbol, bucket)] = (now - age, cooldown)
+                self.stats["restored"] += 1
+        for fired_at in state.get("fired", []):
+            age = wall - fired_at
+            if 0 <= age < 60:
+                self._fired.append(now - age)
+
+        if self.stats["restored"]:
+            logger.info(f"✅ Восстановлено {self.stats['restored']} активных cooldown алертов")
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "keys": len(self._last_fire), "last_minute": len(self._fired)}
+
+
+# ==================== SINGLETON ====================
+
+_global_alert_suppression: Optional[AlertSuppressionIndex] = None
+
+
+def get_alert_suppression() -> AlertSuppressionIndex:
+    """Получить общий AlertSuppressionIndex"""
+    global _global_alert_suppression
+    if _global_alert_suppression is None:
+        _global_alert_suppression = AlertSuppressionIndex()
+    return _global_alert_suppression
+
+
+# Экспорт
+__all__ = ["AlertSuppressionIndex", "get_alert_suppression"]
@@ -8,6 +8,7 @@ from typing import Dict, List, Optional
 from collections import deque
 from datetime import datetime, timedelta
 from config.settings import logger
+from core.alert_suppression import get_alert_suppression
 
 class AlertSystem:
     """Система уведомлений о рыночных аномалиях"""
@@ -15,7 +16,7 @@ class AlertSystem:
     def __init__(self):
         self.liquidation_history = deque(maxlen=100)
         self.volume_history = {}  # {symbol: deque([vol, vol, ...])}
-        self.alerts_sent = {}  # Предотвращение дублирования алертов
+        self.suppression = get_alert_suppression()  # Предотвращение дублирования алертов
         logger.info("✅ AlertSystem инициализирована")
 
     async def check_liquidations(self, symbol: str, liquidations: List[Dict]) -> Optional[Dict]:
@@ -459,7 +460,11 @@ class AlertSystem:
                 if news_alert:
                     alerts.append(news_alert)
             
-            return alerts
+            # Дубли (type, symbol, direction) в пределах cooldown типа отсекаются
+            return [
+                alert for alert in alerts
+                if self.suppression.acquire(alert['type'], symbol, alert.get('direction', ''))
+            ]
             
         except Exception as e:
             logger.error(f"❌ Ошибка проверки алертов: {e}")
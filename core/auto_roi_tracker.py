@@ -8,6 +8,7 @@ import asyncio
 from typing import Dict, List
 from datetime import datetime, timedelta
 from config.settings import logger
+from utils.performance import run_blocking
 
 
 class AutoROITracker:
@@ -53,7 +54,7 @@ class AutoROITracker:
             if not hasattr(self.bot, "signal_recorder"):
                 return
 
-            active_signals = self.bot.signal_recorder.get_active_signals()
+            active_signals = await run_blocking(self.bot.signal_recorder.get_active_signals)
             cutoff_time = datetime.now() - timedelta(hours=24)
             filtered_count = 0
 
@@ -267,7 +268,8 @@ class AutoROITracker:
             signal["realized_roi"] += roi
 
             if hasattr(self.bot, "signal_recorder"):
-                self.bot.signal_recorder.update_signal_tp_reached(
+                await run_blocking(
+                    self.bot.signal_recorder.update_signal_tp_reached,
                     signal_id=signal_id, tp_level=1, realized_roi=signal["realized_roi"]
                 )
 
@@ -336,7 +338,8 @@ class AutoROITracker:
             signal["realized_roi"] += roi
 
             if hasattr(self.bot, "signal_recorder"):
-                self.bot.signal_recorder.update_signal_tp_reached(
+                await run_blocking(
+                    self.bot.signal_recorder.update_signal_tp_reached,
                     signal_id=signal_id, tp_level=2, realized_roi=signal["realized_roi"]
                 )
 
@@ -402,7 +405,8 @@ class AutoROITracker:
             signal["realized_roi"] += roi
 
             if hasattr(self.bot, "signal_recorder"):
-                self.bot.signal_recorder.close_signal(
+                await run_blocking(
+                    self.bot.signal_recorder.close_signal,
                     signal_id=signal_id,
                     exit_price=current_price,
                     realized_roi=signal["realized_roi"],
@@ -442,7 +446,8 @@ class AutoROITracker:
             )
 
             if hasattr(self.bot, "signal_recorder"):
-                self.bot.signal_recorder.close_signal(
+                await run_blocking(
+                    self.bot.signal_recorder.close_signal,
                     signal_id=signal_id,
                     exit_price=current_price,
                     realized_roi=total_roi,
@@ -21,6 +21,9 @@ from config.settings import (
     DATABASE_PATH,
     TRACKED_SYMBOLS,
     SCANNER_CONFIG,
+    LOOP_MONITOR_CONFIG,
+    TRADE_BUS_CONFIG,
+    LIQUIDATION_STREAM_CONFIG,
 )
 from config.constants import TrendDirectionEnum, Colors
 
@@ -42,10 +45,22 @@ from connectors.news_connector import UnifiedNewsConnector
 
 # Core модули
 from core.memory_manager import AdvancedMemoryManager
+from utils.memory_manager import get_memory_manager, evict_oldest
+from utils.http_transport import get_http_transport
+from utils.loop_monitor import get_loop_monitor, get_blocking_guard
+from core.market_state import MarketStateStore
+from core.trade_bus import SIDE_BUY, TradeBatch, get_trade_bus
 from core.scenario_manager import ScenarioManager
 from core.scenario_matcher import EnhancedScenarioMatcher
-from core.veto_system import EnhancedVetoSystem
+from analytics.veto_system import EnhancedVetoSystem
+from analytics.liquidation_aggregator import get_liquidation_aggregator
+from analytics.footprint_aggregator import get_footprint_aggregator
+from analytics.level_engine import get_level_engine
+from analytics.cross_exchange_validator import usdt_pair
+from analytics.performance_rollup import get_performance_rollup
+from connectors.liquidation_websocket import BinanceLiquidationWebSocket, BybitLiquidationWebSocket
 from core.alerts import AlertSystem
+from core.alert_suppression import get_alert_suppression
 from core.decision_matrix import DecisionMatrix
 from core.triggers import TriggerSystem
 from core.simple_alerts import SimpleAlertsSystem
@@ -62,15 +77,18 @@ from trading.unified_auto_scanner import UnifiedAutoScanner
 
 # Analytics
 from analytics.mtf_analyzer import MultiTimeframeAnalyzer
+from analytics.mtf_trend_service import get_mtf_trend_service
+from analytics.regime_service import get_regime_service
 from analytics.volume_profile import EnhancedVolumeProfileCalculator
 from analytics.orderbook_analyzer import OrderbookAnalyzer
 from analytics.enhanced_sentiment_analyzer import UnifiedSentimentAnalyzer
-from analytics.cluster_detector import ClusterDetector
+from analytics.cluster_detector import ClusterDetector, ImbalanceRing
 from analytics.whale_activity_tracker import WhaleActivityTracker
 from analytics.market_heat_indicator import MarketHeatIndicator
 from analytics.correlation_analyzer import CorrelationAnalyzer
 from handlers.correlation_handler import CorrelationHandler
 from analytics.liquidity_depth_analyzer import LiquidityDepthAnalyzer
+from analytics.liquidity_engine import LiquidityEngine
 from handlers.liquidity_handler import LiquidityHandler
 from analytics.signal_performance_analyzer import SignalPerformanceAnalyzer
 from handlers.performance_handler import PerformanceHandler
@@ -105,8 +123,8 @@ class GIOCryptoBot:
         self.initialization_complete = False
         self.shutdown_event = asyncio.Event()
 
-        # Данные
-        self.market_data = {}
+        # Данные (типизированное состояние рынка по символам)
+        self.market_data = MarketStateStore()
         self.news_cache = []
         self._last_log_time = 0
 
@@ -121,10 +139,17 @@ class GIOCryptoBot:
         self.scenario_manager = None
         self.scenario_matcher = None
         self.veto_system = None
+        self.liquidation_aggregator = None
+        self.footprint_aggregator = None
+        self.level_engine = None
+        self.liquidation_streams = []
         self.alert_system = None
         self.decision_matrix = None
         self.trigger_system = None
         self.mtf_analyzer = None
+        self.mtf_trend_service = None
+        self.regime_service = None
+        self.cross_validator = None
         self.volume_calculator = None
         self.signal_generator = None
         self.orderbook_analyzer = None
@@ -195,6 +220,9 @@ class GIOCryptoBot:
 
             conn.close()
 
+            # Дневной rollup производительности (триггеры на закрытие сигнала)
+            get_performance_rollup(db_path).ensure()
+
         except Exception as e:
             logger.error(f"❌ Ошибка миграции БД: {e}", exc_info=True)
 
@@ -209,6 +237,14 @@ class GIOCryptoBot:
             logger.info("1️⃣ Инициализация Memory Manager...")
             self.memory_manager = AdvancedMemoryManager(max_memory_mb=1024)
 
+            # Per-component учёт памяти долгоживущих кэшей бота
+            # (l2_imbalances — кольцевые буферы фиксированного размера)
+            self.memory_accounting = get_memory_manager()
+            for attr in ("large_trades", "news_cache"):
+                self.memory_accounting.register_component(
+                    f"bot.{attr}", self, attr, evict=evict_oldest
+                )
+
             # 1️⃣.5 Инициализация LogBatcher
             logger.info("1️⃣.5 Инициализация LogBatcher...")
             from utils.log_batcher import log_batcher
@@ -247,7 +283,8 @@ class GIOCryptoBot:
             # 2️⃣.2 Инициализация Binance Orderbook WebSocket
             logger.info("2️⃣.2 Инициализация Binance Orderbook WebSocket...")
             self.binance_orderbook_ws = BinanceOrderbookWebSocket(
-                symbols=TRACKED_SYMBOLS, connector=self, depth=20
+                symbols=TRACKED_SYMBOLS, connector=self, depth=20,
+                on_update=self.handle_binance_orderbook,
             )
             logger.info("✅ Binance Orderbook WebSocket инициализирован")
 
@@ -286,7 +323,6 @@ class GIOCryptoBot:
             self.okx_connector.set_callbacks(
                 {
                     "on_orderbook_update": self.handle_okx_orderbook,
-                    "on_trade": self.handle_okx_trade,
                 }
             )
 
@@ -312,7 +348,6 @@ class GIOCryptoBot:
             self.coinbase_connector.set_callbacks(
                 {
                     "on_orderbook_update": self.handle_coinbase_orderbook,
-                    "on_trade": self.handle_coinbase_trade,
                     "on_ticker": self.handle_coinbase_ticker,
                 }
             )
@@ -354,75 +389,9 @@ class GIOCryptoBot:
 
             logger.info(f"✅ Создано {len(self.orderbook_ws_list)} Bybit Orderbook WebSocket")
 
-            async def process_orderbook(orderbook):
-                """Обработка L2 стакана заявок"""
-                try:
-                    current_time = time.time()
-                    bids = orderbook.get("bids", [])[:50]
-                    asks = orderbook.get("asks", [])[:50]
-
-                    if not bids or not asks:
-                        return
-
-                    bid_volume = sum(float(q) for p, q in bids if q)
-                    ask_volume = sum(float(q) for p, q in asks if q)
-                    total_volume = bid_volume + ask_volume
-
-                    if total_volume > 0:
-                        imbalance = (bid_volume - ask_volume) / total_volume
-
-                        if "BTCUSDT" not in self.market_data:
-                            self.market_data["BTCUSDT"] = {}
-
-                        self.market_data["BTCUSDT"]["orderbook_imbalance"] = imbalance
-                        self.market_data["BTCUSDT"]["bid_volume"] = bid_volume
-                        self.market_data["BTCUSDT"]["ask_volume"] = ask_volume
-                        self.market_data["BTCUSDT"]["orderbook_full"] = {
-                            "bids": orderbook.get("bids", [])[:200],
-                            "asks": orderbook.get("asks", [])[:200],
-                            "timestamp": current_time,
-                            "depth": 200,
-                        }
-
-                        # Сохраняем дисбаланс для Cluster Detector
-                        if hasattr(self, "l2_imbalances"):
-                            if "BTCUSDT" not in self.l2_imbalances:
-                                self.l2_imbalances["BTCUSDT"] = []
-
-                            self.l2_imbalances["BTCUSDT"].append(
-                                {
-                                    "imbalance": imbalance,
-                                    "timestamp": datetime.now(),
-                                    "direction": "BUY" if imbalance > 0 else "SELL",
-                                }
-                            )
-
-                            # Храним только последние 100 дисбалансов
-                            if len(self.l2_imbalances["BTCUSDT"]) > 100:
-                                self.l2_imbalances["BTCUSDT"] = self.l2_imbalances[
-                                    "BTCUSDT"
-                                ][-100:]
-
-                        if (
-                            abs(imbalance) > 0.75
-                            and (current_time - self._last_log_time) > 30
-                        ):
-                            direction = (
-                                "📈 BUY pressure"
-                                if imbalance > 0
-                                else "📉 SELL pressure"
-                            )
-                            logger.info(
-                                f"📊 L2 дисбаланс BTCUSDT: {imbalance:.2%} {direction}"
-                            )
-                            self._last_log_time = current_time
-
-                except Exception as e:
-                    logger.error(f"❌ Ошибка обработки orderbook: {e}")
-
             # запускаем ВСЕ WebSocket
             for ws in self.orderbook_ws_list:
-                ws.add_callback(process_orderbook)
+                ws.add_callback(self.handle_bybit_orderbook)
                 await ws.start()
                 logger.info(f"   ✅ Bybit WebSocket Orderbook запущен для {ws.symbol} (depth=200)")
 
@@ -445,6 +414,9 @@ class GIOCryptoBot:
 
             # 4. Аналитика
             logger.info("4️⃣ Инициализация аналитики...")
+            self.mtf_trend_service = get_mtf_trend_service(self.bybit_connector)
+            self.regime_service = get_regime_service()
+            self.mtf_trend_service.subscribe(self.regime_service.on_trend)
             self.mtf_analyzer = MultiTimeframeAnalyzer(self.bybit_connector)
             self.volume_calculator = EnhancedVolumeProfileCalculator()
             from indicators.indicator_calculator import IndicatorCalculator
@@ -498,31 +470,6 @@ class GIOCryptoBot:
             )
             logger.info("   ✅ Whale Activity Tracker инициализирован (15min window)")
 
-            # 4️⃣.6 Подключение WhaleTracker к коннекторам
-            logger.info("4️⃣.6 Подключение WhaleTracker к коннекторам...")
-
-            # OKX
-            if self.okx_connector:
-                self.okx_connector.whale_tracker = self.whale_tracker
-                logger.info("   ✅ OKX connector → WhaleTracker")
-
-            # Binance
-            if self.binance_connector:
-                self.binance_connector.whale_tracker = self.whale_tracker
-                logger.info("   ✅ Binance connector → WhaleTracker")
-
-            # Bybit
-            if self.bybit_connector:
-                self.bybit_connector.whale_tracker = self.whale_tracker
-                logger.info("   ✅ Bybit connector → WhaleTracker")
-
-            # Coinbase
-            if self.coinbase_connector:
-                self.coinbase_connector.whale_tracker = self.whale_tracker
-                logger.info("   ✅ Coinbase connector → WhaleTracker")
-
-            logger.info("✅ Все коннекторы подключены к WhaleTracker!")
-
             # Market Heat Indicator
             self.market_heat_indicator = MarketHeatIndicator()
             logger.info("✅ MarketHeatIndicator инициализирован")
@@ -532,10 +479,52 @@ class GIOCryptoBot:
             self.orderbook_analyzer = OrderbookAnalyzer(bot=self)
             logger.info("   ✅ OrderbookAnalyzer инициализирован")
 
+            # 4️⃣.8 Trade Bus: сделки всех бирж → CVD, киты, крупные сделки
+            logger.info("4️⃣.8 Подписка аналитики на Trade Bus...")
+            self.trade_bus = get_trade_bus()
+            self.trade_bus.subscribe("orderbook_cvd", self.orderbook_analyzer.on_trades)
+            self.trade_bus.subscribe("whale_tracker", self.whale_tracker.on_trades)
+            self.trade_bus.subscribe("large_trades", self._on_large_trades)
+            # Footprint всех сделок для absorption / exhaustion (Cluster Detector)
+            self.footprint_aggregator = get_footprint_aggregator()
+            self.trade_bus.subscribe("footprint", self.footprint_aggregator.on_trades)
+            if self.bybit_connector:
+                self.trade_bus.subscribe(
+                    "bybit_cvd", self.bybit_connector.cvd_delta.add_batch, exchanges=("bybit",)
+                )
+            if self.okx_connector:
+                self.trade_bus.subscribe(
+                    "okx_cvd", self.okx_connector.cvd_delta.add_batch, exchanges=("okx",)
+                )
+            # Всплеск диапазона / объёма внутри бара режима (свечи режима — Bybit)
+            self.trade_bus.subscribe("regime", self.regime_service.on_trades, exchanges=("bybit",))
+            logger.info(f"   ✅ Trade Bus: {len(self.trade_bus.subscribers)} подписчиков")
+
+            # 4️⃣.9 Ликвидации: стримы бирж → скользящие суммы в памяти
+            self.liquidation_aggregator = get_liquidation_aggregator()
+            # Общие книги уровней S/R: ликвидации — источник уровней
+            self.level_engine = get_level_engine()
+            self.liquidation_aggregator.subscribe(self.veto_system.on_liquidation)
+            self.liquidation_aggregator.subscribe(self.level_engine.on_liquidation, with_price=True)
+            if LIQUIDATION_STREAM_CONFIG["enabled"]:
+                liquidation_symbols = [
+                    s.get("symbol") if isinstance(s, dict) else str(s)
+                    for s in TRACKED_SYMBOLS
+                    if not isinstance(s, dict) or s.get("enabled", True)
+                ]
+                streams = {"bybit": BybitLiquidationWebSocket, "binance": BinanceLiquidationWebSocket}
+                self.liquidation_streams = [
+                    streams[exchange](liquidation_symbols, self.liquidation_aggregator)
+                    for exchange in LIQUIDATION_STREAM_CONFIG["exchanges"]
+                ]
+
             # Correlation Analyzer
             self.correlation_analyzer = CorrelationAnalyzer(self)
             logger.info("✅ CorrelationAnalyzer инициализирован")
 
+            # Liquidity Engine: книги по живым стаканам для анализаторов ликвидности
+            self.liquidity_engine = LiquidityEngine(self)
+
             # Liquidity Depth Analyzer
             self.liquidity_depth_analyzer = LiquidityDepthAnalyzer(self)
             logger.info("✅ LiquidityDepthAnalyzer инициализирован")
@@ -580,6 +569,8 @@ class GIOCryptoBot:
                 volume_spike_threshold=3.0,
                 min_exchanges_required=2,
             )
+            # Объём сделок всех бирж — на общую сетку (всплески, корреляция)
+            self.trade_bus.subscribe("cross_exchange", self.cross_validator.on_trades)
             logger.info("   ✅ Cross-Exchange Validator инициализирован")
 
             # 7. Торговая логика
@@ -823,6 +814,20 @@ class GIOCryptoBot:
             asyncio.create_task(self._health_monitor())
             logger.info("   ✅ Health Monitor запущен")
 
+            # Memory accounting: замеры компонентов, бюджеты, tracemalloc
+            self.memory_monitor_task = asyncio.create_task(
+                self.memory_accounting.run_monitor()
+            )
+
+            # Watchdog event loop: lag, стек блокирующей корутины
+            if LOOP_MONITOR_CONFIG["enabled"]:
+                await get_loop_monitor().start()
+
+            # Фоновая доставка батчей Trade Bus
+            await self.trade_bus.start()
+            if LOOP_MONITOR_CONFIG["blocking_guard"]:
+                get_blocking_guard().install()
+
             # 9. Планировщик
             # logger.info("9️⃣ Настройка планировщика...")
             self.setup_scheduler()
@@ -846,91 +851,91 @@ class GIOCryptoBot:
             logger.error(f"❌ Ошибка инициализации: {e}", exc_info=True)
             raise BotInitializationError(f"Не удалось инициализировать бота: {e}")
 
-    # ⭐ ДОБАВЛЕНО: Binance WebSocket Callback Handlers
-
-    async def handle_binance_orderbook(self, symbol: str, orderbook: Dict):
-        """Обработка Binance orderbook обновлений"""
+    async def handle_bybit_orderbook(self, orderbook: Dict):
+        """Обработка Bybit L2 стакана заявок"""
         try:
-            ba = self.binance_connector.get_best_bid_ask(symbol)
-            if ba:
-                spread = self.binance_connector.get_spread(symbol)
-                if hasattr(self, "log_batcher"):
-                    self.log_batcher.log_orderbook_update("Binance", symbol)
-
-                # Сохраняем в market_data
-                if symbol not in self.market_data:
-                    self.market_data[symbol] = {}
-
-                self.market_data[symbol]["binance_bid"] = ba[0]
-                self.market_data[symbol]["binance_ask"] = ba[1]
-                self.market_data[symbol]["binance_spread"] = spread
+            current_time = time.time()
+            symbol = orderbook.get("symbol")
+            bids = orderbook.get("bids", [])[:50]
+            asks = orderbook.get("asks", [])[:50]
 
-        except Exception as e:
-            logger.error(f"❌ Binance orderbook handler error: {e}", exc_info=True)
+            if not symbol or not bids or not asks:
+                return
 
-    async def handle_binance_trade(self, symbol: str, trade: Dict):
-        """Обработка Binance real-time trades"""
-        try:
-            side = "SELL" if trade["is_buyer_maker"] else "BUY"
-            value = trade["quantity"] * trade["price"]
-
-            # Нормализуем символ (BTC-USDT -> BTCUSDT)
-            symbol_normalized = symbol.replace("-", "")
-
-            # Передача в OrderbookAnalyzer для CVD
-            if hasattr(self, "orderbook_analyzer") and self.orderbook_analyzer:
-                await self.orderbook_analyzer.process_trade(
-                    symbol_normalized,
-                    {
-                        "side": side,
-                        "volume": trade["quantity"],
-                        "price": trade["price"],
-                        "timestamp": trade.get("T", 0),
+            # Уровни уже float (connectors/ws_parsers)
+            bid_volume = sum(q for p, q in bids)
+            ask_volume = sum(q for p, q in asks)
+            total_volume = bid_volume + ask_volume
+
+            if total_volume > 0:
+                imbalance = (bid_volume - ask_volume) / total_volume
+
+                # Вердикты спреда / манипуляций пересчитываются по книге
+                if self.veto_system:
+                    self.veto_system.on_orderbook(symbol, bids, asks)
+
+                # Кросс-биржевая проверка на каждом обновлении стакана
+                if self.cross_validator:
+                    self.cross_validator.on_orderbook(symbol, "Bybit", bids, asks)
+
+                self.market_data.update(
+                    symbol,
+                    now=current_time,
+                    orderbook_imbalance=imbalance,
+                    bid_volume=bid_volume,
+                    ask_volume=ask_volume,
+                    orderbook_full={
+                        "bids": orderbook.get("bids", [])[:200],
+                        "asks": orderbook.get("asks", [])[:200],
+                        "timestamp": current_time,
+                        "depth": 200,
                     },
                 )
 
-            # ✅ Whale Tracker: добавляем КАЖДУЮ сделку (фильтр внутри tracker)
-            if hasattr(self, "whale_tracker"):
-                self.whale_tracker.add_trade(
-                    symbol=symbol_normalized,
-                    side=side,
-                    size=trade["quantity"],
-                    price=trade["price"],
-                )
+                # Сохраняем дисбаланс для Cluster Detector
+                # (кольцевой буфер, стрики обновляются на append)
+                ring = self.l2_imbalances.get(symbol)
+                if ring is None:
+                    ring = self.l2_imbalances[symbol] = ImbalanceRing(capacity=100)
+                ring.append(imbalance, current_time)
 
-            # Логируем только ОЧЕНЬ крупные сделки > $50k
-            if value > 50000:
-                logger.info(
-                    f"💰 Binance {symbol.upper()} Large Trade: "
-                    f"{side} {trade['quantity']:.4f} @ ${trade['price']:,.2f} "
-                    f"(${value:,.0f})"
-                )
+                if (
+                    abs(imbalance) > 0.75
+                    and (current_time - self._last_log_time) > 30
+                ):
+                    direction = (
+                        "📈 BUY pressure"
+                        if imbalance > 0
+                        else "📉 SELL pressure"
+                    )
+                    logger.info(
+                        f"📊 L2 дисбаланс {symbol}: {imbalance:.2%} {direction}"
+                    )
+                    self._last_log_time = current_time
 
-                # ✅ ИСПРАВЛЕНО: Сохраняем в large_trades_cache для Whale Tracking
-                if not hasattr(self, "large_trades_cache"):
-                    self.large_trades_cache = {}
+        except Exception as e:
+            logger.error(f"❌ Ошибка обработки orderbook: {e}")
 
-                if symbol_normalized not in self.large_trades_cache:
-                    self.large_trades_cache[symbol_normalized] = []
+    # ⭐ ДОБАВЛЕНО: Binance WebSocket Callback Handlers
 
-                self.large_trades_cache[symbol_normalized].append(
-                    {
-                        "timestamp": time.time(),
-                        "side": side.lower(),  # "buy" или "sell"
-                        "volume": value,  # USD value
-                        "price": trade["price"],
-                        "quantity": trade["quantity"],
-                    }
-                )
+    async def handle_binance_orderbook(self, symbol: str, orderbook: Dict):
+        """Обработка Binance orderbook обновлений (BinanceOrderbookWebSocket)"""
+        try:
+            bids, asks = orderbook.get("bids"), orderbook.get("asks")
+            if bids and asks:
+                ba = (bids[0][0], asks[0][0])
+                if hasattr(self, "log_batcher"):
+                    self.log_batcher.log_orderbook_update("Binance", symbol)
 
-                # Ограничиваем размер кеша (последние 100 сделок)
-                if len(self.large_trades_cache[symbol_normalized]) > 100:
-                    self.large_trades_cache[symbol_normalized] = (
-                        self.large_trades_cache[symbol_normalized][-100:]
-                    )
+                # Сохраняем в market_data
+                self.market_data.update(
+                    symbol, binance_bid=ba[0], binance_ask=ba[1], binance_spread=ba[1] - ba[0]
+                )
+                if self.cross_validator:
+                    self.cross_validator.on_orderbook(symbol.upper(), "Binance", bids, asks)
 
         except Exception as e:
-            logger.error(f"❌ Binance trade handler error: {e}", exc_info=True)
+            logger.error(f"❌ Binance orderbook handler error: {e}", exc_info=True)
 
     async def handle_binance_kline(self, symbol: str, kline: Dict):
         """Обработка Binance klines (свечей)"""
@@ -958,65 +963,16 @@ class GIOCryptoBot:
 
                 # Сохраняем в market_data
                 symbol_normalized = symbol.replace("-", "")  # BTC-USDT -> BTCUSDT
-                if symbol_normalized not in self.market_data:
-                    self.market_data[symbol_normalized] = {}
-
-                self.market_data[symbol_normalized]["okx_bid"] = ba[0]
-                self.market_data[symbol_normalized]["okx_ask"] = ba[1]
-                self.market_data[symbol_normalized]["okx_spread"] = spread
-
-        except Exception as e:
-            logger.error(f"❌ OKX orderbook handler error: {e}", exc_info=True)
-
-    async def handle_okx_trade(self, symbol: str, trade: Dict):
-        """Обработка OKX real-time trades"""
-        try:
-            value = trade["quantity"] * trade["price"]
-            symbol_normalized = symbol.replace("-", "")  # BTC-USDT -> BTCUSDT
-
-            # Передача в OrderbookAnalyzer для CVD
-            if hasattr(self, "orderbook_analyzer") and self.orderbook_analyzer:
-                await self.orderbook_analyzer.process_trade(
-                    symbol_normalized,
-                    {
-                        "side": trade["side"],
-                        "volume": trade["quantity"],
-                        "price": trade["price"],
-                        "timestamp": trade.get("timestamp", 0),
-                    },
-                )
-
-            # Логируем крупные сделки > $50k
-            if value > 50000:
-                logger.info(
-                    f"💰 OKX {symbol} Large Trade: "
-                    f"{trade['side'].upper()} {trade['quantity']:.4f} @ ${trade['price']:,.2f} "
-                    f"(${value:,.0f})"
+                self.market_data.update(
+                    symbol_normalized, okx_bid=ba[0], okx_ask=ba[1], okx_spread=spread
                 )
-                # Сохраняем крупную сделку для Cluster Detector
-                if hasattr(self, "large_trades"):
-                    symbol_normalized = symbol.replace("-", "")  # BTC-USDT -> BTCUSDT
-
-                    if symbol_normalized not in self.large_trades:
-                        self.large_trades[symbol_normalized] = []
-
-                    self.large_trades[symbol_normalized].append(
-                        {
-                            "price": trade["price"],
-                            "quantity": trade["quantity"],
-                            "side": trade["side"],
-                            "timestamp": datetime.now(),
-                        }
+                if self.cross_validator:
+                    self.cross_validator.on_orderbook(
+                        symbol_normalized, "OKX", orderbook["bids"], orderbook["asks"]
                     )
 
-                    # Храним только последние 200 сделок
-                    if len(self.large_trades[symbol_normalized]) > 200:
-                        self.large_trades[symbol_normalized] = self.large_trades[
-                            symbol_normalized
-                        ][-200:]
-
         except Exception as e:
-            logger.error(f"❌ OKX trade handler error: {e}", exc_info=True)
+            logger.error(f"❌ OKX orderbook handler error: {e}", exc_info=True)
 
     async def handle_coinbase_orderbook(self, symbol: str, orderbook: Dict):
         """Обработка Coinbase orderbook обновлений"""
@@ -1029,66 +985,47 @@ class GIOCryptoBot:
 
                 # Сохраняем в market_data
                 symbol_normalized = symbol.replace("-", "")  # BTC-USD -> BTCUSD
-                if symbol_normalized not in self.market_data:
-                    self.market_data[symbol_normalized] = {}
-
-                self.market_data[symbol_normalized]["coinbase_bid"] = ba[0]
-                self.market_data[symbol_normalized]["coinbase_ask"] = ba[1]
-                self.market_data[symbol_normalized]["coinbase_spread"] = spread
+                self.market_data.update(
+                    symbol_normalized, coinbase_bid=ba[0], coinbase_ask=ba[1], coinbase_spread=spread
+                )
+                if self.cross_validator:
+                    # BTC-USD сравнивается с USDT парами других бирж
+                    self.cross_validator.on_orderbook(
+                        usdt_pair(symbol), "Coinbase", orderbook["bids"], orderbook["asks"]
+                    )
 
         except Exception as e:
             logger.error(f"❌ Coinbase orderbook handler error: {e}", exc_info=True)
 
-    async def handle_coinbase_trade(self, symbol: str, trade: Dict):
-        """Обработка Coinbase real-time trades"""
-        try:
-            value = trade["size"] * trade["price"]
-            symbol_normalized = symbol.replace("-", "")  # BTC-USD -> BTCUSD
-
-            # Передача в OrderbookAnalyzer для CVD
-            if hasattr(self, "orderbook_analyzer") and self.orderbook_analyzer:
-                await self.orderbook_analyzer.process_trade(
-                    symbol_normalized,
-                    {
-                        "side": trade["side"],
-                        "volume": trade["size"],
-                        "price": trade["price"],
-                        "timestamp": trade.get("time", 0),
-                    },
-                )
-
-            # Логируем крупные сделки > $50k
-            if value > 50000:
-                logger.info(
-                    f"💰 Coinbase {symbol} Large Trade: "
-                    f"{trade['side'].upper()} {trade['size']:.4f} @ ${trade['price']:,.2f} "
-                    f"(${value:,.0f})"
-                )
-
-                # Сохраняем крупную сделку для Cluster Detector
-                if hasattr(self, "large_trades"):  # ← 12 ПРОБЕЛОВ!
-                    symbol_normalized = symbol.replace("-", "")  # ← 16 ПРОБЕЛОВ!
-
-                    if symbol_normalized not in self.large_trades:  # ← 16 ПРОБЕЛОВ!
-                        self.large_trades[symbol_normalized] = []  # ← 20 ПРОБЕЛОВ!
-
-                    self.large_trades[symbol_normalized].append(
-                        {  # ← 16 ПРОБЕЛОВ!
-                            "price": trade["price"],
-                            "quantity": trade["size"],
-                            "side": trade["side"],
-                            "timestamp": datetime.now(),
-                        }
-                    )
+    def _on_large_trades(self, batch: TradeBatch):
+        """
+        Подписчик Trade Bus: крупные сделки (> large_trade_usd) всех бирж
+        в self.large_trades для Cluster Detector
+        """
+        notional = batch.notional
+        mask = notional > TRADE_BUS_CONFIG["large_trade_usd"]
+        if not mask.any():
+            return
+
+        now = datetime.now()
+        large = batch.select(mask)
+        for (exchange, symbol, _, price, qty, side), value in zip(
+            large.records(), notional[mask].tolist()
+        ):
+            side_name = "buy" if side == SIDE_BUY else "sell"
+            logger.info(
+                f"💰 {exchange.upper()} {symbol} Large Trade: "
+                f"{side_name.upper()} {qty:.4f} @ ${price:,.2f} (${value:,.0f})"
+            )
 
-                    # Храним только последние 200 сделок
-                    if len(self.large_trades[symbol_normalized]) > 200:
-                        self.large_trades[symbol_normalized] = self.large_trades[
-                            symbol_normalized
-                        ][-200:]
+            trades = self.large_trades.setdefault(symbol, [])
+            trades.append(
+                {"price": price, "quantity": qty, "side": side_name, "timestamp": now}
+            )
 
-        except Exception as e:
-            logger.error(f"❌ Coinbase trade handler error: {e}", exc_info=True)
+            # Храним только последние 200 сделок
+            if len(trades) > 200:
+                del trades[:-200]
 
     async def handle_coinbase_ticker(self, symbol: str, ticker: Dict):
         """Обработка Coinbase ticker updates"""
@@ -1235,16 +1172,18 @@ class GIOCryptoBot:
             except Exception as e:
                 logger.debug(f"⚠️ CVD данные недоступны: {e}")
 
-            # ✅ 7. LIQUIDATIONS (24H) - НОВОЕ!
+            # ✅ 7. LIQUIDATIONS (1H / 4H / 24H) — из стримов, REST только без них
             try:
-                if hasattr(self, 'bybit_connector') and self.bybit_connector:
-                    logger.info(f"📊 Fetching 24H liquidations for {symbol}...")
+                if self.liquidation_aggregator and self.liquidation_aggregator.is_live():
+                    windows = self.liquidation_aggregator.window_summaries(symbol)
+                    market_data['liquidations'] = {**windows["24h"], "windows": windows}
+                elif hasattr(self, 'bybit_connector') and self.bybit_connector:
                     liquidations = await self.bybit_connector.get_liquidations_24h(symbol)
 
                     if liquidations and isinstance(liquidations, dict):
                         market_data['liquidations'] = liquidations
                         total_m = liquidations.get('total', 0) / 1_000_000
-                        logger.info(f"✅ Liquidations {symbol}: ${total_m:.2f}M total")
+                        logger.debug(f"✅ Liquidations {symbol}: ${total_m:.2f}M total")
                     else:
                         logger.warning(f"⚠️ No liquidations data for {symbol}")
                         market_data['liquidations'] = None
@@ -1507,6 +1446,17 @@ class GIOCryptoBot:
                 name="Обновление новостей",
                 max_instances=1,
             )
+            if getattr(self, "correlation_analyzer", None):
+                # Панель доходностей 24h — сразу после закрытия 15m бара
+                self.scheduler.add_job(
+                    self.update_correlations,
+                    "cron",
+                    minute="*/15",
+                    second=5,
+                    id="update_correlations",
+                    name="Обновление панели корреляций",
+                    max_instances=1,
+                )
             logger.info("✅ Планировщик настроен")
         except Exception as e:
             logger.error(f"❌ Ошибка настройки scheduler: {e}")
@@ -1823,6 +1773,12 @@ class GIOCryptoBot:
                 asyncio.create_task(self.coinbase_connector.start_websocket())
                 logger.info("✅ Coinbase WebSocket запущен")
 
+            # ⭐ Запуск стримов ликвидаций
+            for stream in self.liquidation_streams:
+                asyncio.create_task(stream.start())
+            if self.liquidation_streams:
+                logger.info(f"✅ Liquidation streams запущены: {len(self.liquidation_streams)}")
+
             if self.enhanced_alerts:
                 asyncio.create_task(self.enhanced_alerts.start_monitoring())
                 logger.info("✅ Enhanced Alerts запущен")
@@ -1865,6 +1821,13 @@ class GIOCryptoBot:
             traceback.print_exc()
             raise BotRuntimeError(f"Ошибка главного цикла: {e}")
 
+    async def update_correlations(self):
+        """Дописать закрытые бары в панель доходностей CorrelationAnalyzer"""
+        try:
+            await self.correlation_analyzer.refresh()
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления корреляций: {e}")
+
     async def update_news(self):
         """Обновление новостей"""
         try:
@@ -1960,6 +1923,20 @@ class GIOCryptoBot:
                 await self.log_batcher.stop()
                 logger.info("✅ LogBatcher остановлен")
 
+            if getattr(self, "memory_monitor_task", None):
+                self.memory_monitor_task.cancel()
+
+            await get_loop_monitor().stop()
+
+            if getattr(self, "trade_bus", None):
+                await self.trade_bus.stop()
+
+            for stream in self.liquidation_streams:
+                await stream.stop()
+
+            # Cooldown алертов переживают рестарт
+            get_alert_suppression().flush()
+
             if self.auto_scanner:
                 await self.auto_scanner.stop()
 
@@ -2010,6 +1987,8 @@ class GIOCryptoBot:
                     await ws.stop()
                     logger.info(f"🛑 Bybit Orderbook WS для {ws.symbol} остановлен")
 
+            # Общий пул HTTP соединений (после всех REST клиентов)
+            await get_http_transport().close()
 
             logger.info(f"{Colors.OKGREEN}✅ Бот успешно остановлен{Colors.ENDC}")
 
@@ -2019,7 +1998,9 @@ class GIOCryptoBot:
     async def _mtf_periodic_update(self):
         """
         Периодическое обновление MTF анализа для всех символов
-        Запускается каждые 5 минут
+        Запускается каждые 5 минут; MTFTrendService пересчитывает
+        тренд только на закрытии бара. multi_tf_filter.trends (дашборд)
+        читает тот же результат.
         """
         try:
             logger.info("🔄 MTF Periodic Update Task started (every 5min)")
@@ -2028,50 +2009,15 @@ class GIOCryptoBot:
                 try:
                     for symbol in TRACKED_SYMBOLS:
                         try:
-                            logger.info(f"🔄 MTF анализ для {symbol}...")
-
-                            # ✅ ИСПРАВЛЕНО: Обновляем кэш свечей ПЕРЕД анализом!
-                            logger.info(f"🔄 Обновление кэша свечей для {symbol}...")
-                            for interval in ['60', '240', 'D']:
-                                try:
-                                    await self.bybit_connector.update_klines_cache(
-                                        symbol=symbol,
-                                        interval=interval,
-                                        limit=200
-                                    )
-                                    logger.debug(f"   ✅ {symbol} ({interval}) обновлён")
-                                    await asyncio.sleep(1)
-                                except Exception as e:
-                                    logger.error(f"   ❌ Ошибка {symbol} ({interval}): {e}")
-
-                            logger.info(f"   ✅ Кэш свечей {symbol} обновлён")
-
-                            # Анализируем 1h, 4h, 1d
-                            mtf_results = {}
-                            for timeframe in ["1h", "4h", "1d"]:
-                                result = await self.mtf_analyzer.analyze(
-                                    symbol, timeframe
-                                )
-
-                                if result:
-                                    mtf_results[timeframe] = result
-                                    logger.info(
-                                        f"   ✅ {symbol} {timeframe}: {result.get('trend', 'UNKNOWN')} "
-                                        f"(strength {result.get('strength', 0):.2f})"
-                                    )
-                                else:
-                                    logger.debug(
-                                        f"   ⚠️ {symbol} {timeframe}: Недостаточно данных"
-                                    )
-
-                            # Сохраняем в multi_tf_filter для дашборда
-                            if self.multi_tf_filter and mtf_results:
-                                if not hasattr(self.multi_tf_filter, "trends"):
-                                    self.multi_tf_filter.trends = {}
-
-                                self.multi_tf_filter.trends[symbol] = mtf_results
-                                logger.info(
-                                    f"   ✅ MTF данные для {symbol} сохранены в кеш"
+                            # Свечи загружаются только после закрытия нового
+                            # бара ТФ, иначе тренд отдаётся из сервиса
+                            states = await self.mtf_trend_service.get_trends(
+                                symbol, ["1h", "4h", "1d"]
+                            )
+                            for timeframe, state in states.items():
+                                logger.debug(
+                                    f"   ✅ {symbol} {timeframe}: {state.trend} "
+                                    f"(strength {state.strength:.2f})"
                                 )
 
                         except Exception as e:
@@ -7,9 +7,10 @@ Market Dashboard - главный дашборд рынка (альтернат
 
 from typing import Dict, Optional
 from datetime import datetime
-import requests
 import pandas as pd
 from config.settings import logger
+from analytics.liquidation_aggregator import get_liquidation_aggregator
+from utils.http_transport import get_http_transport
 from telegram_bot.dashboard_helpers import DashboardFormatter
 from ai.gemini_interpreter import GeminiInterpreter
 from handlers.support_resistance_detector import AdvancedSupportResistanceDetector
@@ -515,10 +516,11 @@ class MarketDashboard:
 
             try:
                 # Метод 1: L2 imbalance из market_data
-                if hasattr(self.bot, "market_data") and symbol in self.bot.market_data:
-                    l2_data = self.bot.market_data[symbol].get("l2_imbalance", {})
-                    if l2_data:
-                        cvd_value = l2_data.get("imbalance_percent", 0.0)
+                if hasattr(self.bot, "market_data"):
+                    imbalance = self.bot.market_data.value(
+                        symbol, "orderbook_imbalance", 0.0
+                    )
+                    cvd_value = imbalance * 100
 
                 # Метод 2: Fallback на Bybit orderbook если L2 = 0
                 if cvd_value == 0.0:
@@ -658,29 +660,27 @@ class MarketDashboard:
             funding_label = "⚪ Neutral"
 
             try:
-                response = requests.get(
-                    f"https://api.bybit.com/v5/market/funding/history",
+                data = await get_http_transport().get_json(
+                    "https://api.bybit.com/v5/market/funding/history",
                     params={"category": "linear", "symbol": symbol, "limit": 1},
                     timeout=3,
                 )
 
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("retCode") == 0:
-                        result = data.get("result", {}).get("list", [])
-                        if result:
-                            funding_rate = float(result[0].get("fundingRate", 0)) * 100
-
-                            if funding_rate > 0.03:
-                                funding_label = "🔥 Very Bullish"
-                            elif funding_rate > 0.01:
-                                funding_label = "🟢 Bullish"
-                            elif funding_rate < -0.03:
-                                funding_label = "❄️ Very Bearish"
-                            elif funding_rate < -0.01:
-                                funding_label = "🔴 Bearish"
-                            else:
-                                funding_label = "⚪ Neutral"
+                if data and data.get("retCode") == 0:
+                    result = data.get("result", {}).get("list", [])
+                    if result:
+                        funding_rate = float(result[0].get("fundingRate", 0)) * 100
+
+                        if funding_rate > 0.03:
+                            funding_label = "🔥 Very Bullish"
+                        elif funding_rate > 0.01:
+                            funding_label = "🟢 Bullish"
+                        elif funding_rate < -0.03:
+                            funding_label = "❄️ Very Bearish"
+                        elif funding_rate < -0.01:
+                            funding_label = "🔴 Bearish"
+                        else:
+                            funding_label = "⚪ Neutral"
             except Exception as e:
                 logger.debug(f"⚠️ Funding недоступен: {e}")
 
@@ -691,7 +691,7 @@ class MarketDashboard:
             oi_trend_emoji = ""
 
             try:
-                response = requests.get(
+                data = await get_http_transport().get_json(
                     "https://api.bybit.com/v5/market/open-interest",
                     params={
                         "category": "linear",
@@ -702,141 +702,139 @@ class MarketDashboard:
                     timeout=3,
                 )
 
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("retCode") == 0:
-                        result = data.get("result", {}).get("list", [])
-                        if result:
-                            # ✅ Получаем OI в контрактах
-                            oi_contracts = float(result[0].get("openInterest", 0))
-
-                            # ✅ КОНВЕРТИРУЕМ В USD
-                            # Для линейных контрактов Bybit: notional value = contracts * price
-                            ticker = await self._get_ticker(symbol)
-                            current_price = ticker.get("price", 1)
-                            open_interest = oi_contracts * current_price
-
-                            # ✅ OI DELTA РАСЧЁТ
-                            try:
-                                if not hasattr(self, "oi_cache"):
-                                    self.oi_cache = {}
-                                    logger.info("✅ OI cache инициализирован")
-
-                                cache_key = f"oi_{symbol}"
-                                current_time = datetime.now()
-
-                                if cache_key in self.oi_cache:
-                                    prev_oi = self.oi_cache[cache_key]["value"]
-                                    prev_time = self.oi_cache[cache_key]["time"]
-                                    time_diff_seconds = (
-                                        current_time - prev_time
-                                    ).total_seconds()
-
-                                    if time_diff_seconds > 3000:  # 50 минут
-                                        if prev_oi > 0:
-                                            oi_delta_pct = (
-                                                (open_interest - prev_oi) / prev_oi
-                                            ) * 100
-
-                                            if oi_delta_pct > 5:
-                                                oi_trend_emoji = "📈"
-                                                oi_label = "🔥 Rising"
-                                            elif oi_delta_pct > 2:
-                                                oi_trend_emoji = "⬆️"
-                                                oi_label = "🟢 Growing"
-                                            elif oi_delta_pct < -5:
-                                                oi_trend_emoji = "📉"
-                                                oi_label = "❄️ Falling"
-                                            elif oi_delta_pct < -2:
-                                                oi_trend_emoji = "⬇️"
-                                                oi_label = "🔴 Declining"
-                                            else:
-                                                oi_trend_emoji = "➡️"
-                                                oi_label = "⚪ Stable"
-
-                                            logger.info(
-                                                f"📊 OI Delta {symbol}: {oi_delta_pct:+.2f}% "
-                                                f"(${prev_oi/1e9:.2f}B → ${open_interest/1e9:.2f}B USD)"
-                                            )
-
-                                # Обновляем кэш
-                                self.oi_cache[cache_key] = {
-                                    "value": open_interest,
-                                    "time": current_time,
-                                }
-
-                            except Exception as delta_e:
-                                logger.error(
-                                    f"❌ OI Delta calculation failed: {delta_e}"
-                                )
+                if data and data.get("retCode") == 0:
+                    result = data.get("result", {}).get("list", [])
+                    if result:
+                        # ✅ Получаем OI в контрактах
+                        oi_contracts = float(result[0].get("openInterest", 0))
+
+                        # ✅ КОНВЕРТИРУЕМ В USD
+                        # Для линейных контрактов Bybit: notional value = contracts * price
+                        ticker = await self._get_ticker(symbol)
+                        current_price = ticker.get("price", 1)
+                        open_interest = oi_contracts * current_price
+
+                        # ✅ OI DELTA РАСЧЁТ
+                        try:
+                            if not hasattr(self, "oi_cache"):
+                                self.oi_cache = {}
+                                logger.info("✅ OI cache инициализирован")
+
+                            cache_key = f"oi_{symbol}"
+                            current_time = datetime.now()
+
+                            if cache_key in self.oi_cache:
+                                prev_oi = self.oi_cache[cache_key]["value"]
+                                prev_time = self.oi_cache[cache_key]["time"]
+                                time_diff_seconds = (
+                                    current_time - prev_time
+                                ).total_seconds()
+
+                                if time_diff_seconds > 3000:  # 50 минут
+                                    if prev_oi > 0:
+                                        oi_delta_pct = (
+                                            (open_interest - prev_oi) / prev_oi
+                                        ) * 100
+
+                                        if oi_delta_pct > 5:
+                                            oi_trend_emoji = "📈"
+                                            oi_label = "🔥 Rising"
+                                        elif oi_delta_pct > 2:
+                                            oi_trend_emoji = "⬆️"
+                                            oi_label = "🟢 Growing"
+                                        elif oi_delta_pct < -5:
+                                            oi_trend_emoji = "📉"
+                                            oi_label = "❄️ Falling"
+                                        elif oi_delta_pct < -2:
+                                            oi_trend_emoji = "⬇️"
+                                            oi_label = "🔴 Declining"
+                                        else:
+                                            oi_trend_emoji = "➡️"
+                                            oi_label = "⚪ Stable"
+
+                                        logger.info(
+                                            f"📊 OI Delta {symbol}: {oi_delta_pct:+.2f}% "
+                                            f"(${prev_oi/1e9:.2f}B → ${open_interest/1e9:.2f}B USD)"
+                                        )
+
+                            # Обновляем кэш
+                            self.oi_cache[cache_key] = {
+                                "value": open_interest,
+                                "time": current_time,
+                            }
 
-                            logger.debug(
-                                f"✅ OI {symbol}: ${open_interest/1e9:.2f}B USD"
+                        except Exception as delta_e:
+                            logger.error(
+                                f"❌ OI Delta calculation failed: {delta_e}"
                             )
 
-                            # OI DELTA РАСЧЁТ
-                            try:
-                                if not hasattr(self, "oi_cache"):
-                                    self.oi_cache = {}
-                                    logger.info("✅ OI cache инициализирован")
-
-                                cache_key = f"oi_{symbol}"
-                                current_time = datetime.now()
-
-                                if cache_key in self.oi_cache:
-                                    prev_oi = self.oi_cache[cache_key]["value"]
-                                    prev_time = self.oi_cache[cache_key]["time"]
-                                    time_diff_seconds = (
-                                        current_time - prev_time
-                                    ).total_seconds()
-
-                                    if time_diff_seconds > 3000:
-                                        if prev_oi > 0:
-                                            oi_delta_pct = (
-                                                (open_interest - prev_oi) / prev_oi
-                                            ) * 100
-
-                                            if oi_delta_pct > 5:
-                                                oi_trend_emoji = "📈"
-                                                oi_label = "🔥 Rising"
-                                            elif oi_delta_pct > 2:
-                                                oi_trend_emoji = "⬆️"
-                                                oi_label = "🟢 Growing"
-                                            elif oi_delta_pct < -5:
-                                                oi_trend_emoji = "📉"
-                                                oi_label = "❄️ Falling"
-                                            elif oi_delta_pct < -2:
-                                                oi_trend_emoji = "⬇️"
-                                                oi_label = "🔴 Declining"
-                                            else:
-                                                oi_trend_emoji = "➡️"
-                                                oi_label = "⚪ Stable"
-
-                                            logger.info(
-                                                f"📊 OI Delta {symbol}: {oi_delta_pct:+.2f}% "
-                                                f"({prev_oi:,.0f} → {open_interest:,.0f})"
-                                            )
-                                    else:
-                                        minutes_left = int(
-                                            (3000 - time_diff_seconds) / 60
-                                        )
-                                        logger.debug(
-                                            f"⏳ OI Delta {symbol}: ждём {minutes_left} мин"
+                        logger.debug(
+                            f"✅ OI {symbol}: ${open_interest/1e9:.2f}B USD"
+                        )
+
+                        # OI DELTA РАСЧЁТ
+                        try:
+                            if not hasattr(self, "oi_cache"):
+                                self.oi_cache = {}
+                                logger.info("✅ OI cache инициализирован")
+
+                            cache_key = f"oi_{symbol}"
+                            current_time = datetime.now()
+
+                            if cache_key in self.oi_cache:
+                                prev_oi = self.oi_cache[cache_key]["value"]
+                                prev_time = self.oi_cache[cache_key]["time"]
+                                time_diff_seconds = (
+                                    current_time - prev_time
+                                ).total_seconds()
+
+                                if time_diff_seconds > 3000:
+                                    if prev_oi > 0:
+                                        oi_delta_pct = (
+                                            (open_interest - prev_oi) / prev_oi
+                                        ) * 100
+
+                                        if oi_delta_pct > 5:
+                                            oi_trend_emoji = "📈"
+                                            oi_label = "🔥 Rising"
+                                        elif oi_delta_pct > 2:
+                                            oi_trend_emoji = "⬆️"
+                                            oi_label = "🟢 Growing"
+                                        elif oi_delta_pct < -5:
+                                            oi_trend_emoji = "📉"
+                                            oi_label = "❄️ Falling"
+                                        elif oi_delta_pct < -2:
+                                            oi_trend_emoji = "⬇️"
+                                            oi_label = "🔴 Declining"
+                                        else:
+                                            oi_trend_emoji = "➡️"
+                                            oi_label = "⚪ Stable"
+
+                                        logger.info(
+                                            f"📊 OI Delta {symbol}: {oi_delta_pct:+.2f}% "
+                                            f"({prev_oi:,.0f} → {open_interest:,.0f})"
                                         )
                                 else:
-                                    logger.info(f"🔄 OI {symbol}: первая запись в кэш")
+                                    minutes_left = int(
+                                        (3000 - time_diff_seconds) / 60
+                                    )
+                                    logger.debug(
+                                        f"⏳ OI Delta {symbol}: ждём {minutes_left} мин"
+                                    )
+                            else:
+                                logger.info(f"🔄 OI {symbol}: первая запись в кэш")
 
-                                self.oi_cache[cache_key] = {
-                                    "value": open_interest,
-                                    "time": current_time,
-                                }
+                            self.oi_cache[cache_key] = {
+                                "value": open_interest,
+                                "time": current_time,
+                            }
 
-                            except Exception as delta_e:
-                                logger.error(
-                                    f"❌ OI Delta calculation failed: {delta_e}"
-                                )
+                        except Exception as delta_e:
+                            logger.error(
+                                f"❌ OI Delta calculation failed: {delta_e}"
+                            )
 
-                            logger.debug(f"✅ OI {symbol}: ${open_interest:,.0f}")
+                        logger.debug(f"✅ OI {symbol}: ${open_interest:,.0f}")
             except Exception as e:
                 logger.debug(f"⚠️ OI недоступен: {e}")
 
@@ -1003,10 +1001,21 @@ class MarketDashboard:
             }
 
     async def _get_liquidation_levels(self, symbol: str, ticker: Dict) -> Dict:
-        """Получить зоны ликвидации с расчётом из Order Book"""
+        """
+        Получить зоны ликвидации
+
+        При подключённых стримах — самые тяжёлые бины heatmap фактических
+        ликвидаций за 24ч; иначе оценка ATR × 5 и объёмов из Order Book.
+        """
         try:
             current_price = ticker["price"]
 
+            aggregator = get_liquidation_aggregator()
+            if aggregator.is_live():
+                levels = aggregator.levels(symbol, current_price)
+                if levels["long_liq_level"] is not None or levels["short_liq_level"] is not None:
+                    return self._stream_liquidation_levels(levels, ticker)
+
             # Получаем ATR для расчёта уровней
             atr = ticker.get("atr", current_price * 0.02)  # Fallback 2% от цены
 
@@ -1057,14 +1066,7 @@ class MarketDashboard:
                 logger.debug(f"⚠️ Order Book fallback для ликвидаций failed: {e}")
 
             # Определение уровня риска
-            total_liq = long_liq_volume + short_liq_volume
-
-            if total_liq > 100_000_000:  # >$100M
-                risk_level = "🔴 High"
-            elif total_liq > 50_000_000:  # >$50M
-                risk_level = "🟡 Medium"
-            else:
-                risk_level = "⚪ Low"
+            risk_level = self._liquidation_risk_level(long_liq_volume + short_liq_volume)
 
             return {
                 "long_liq_level": long_liq_level,
@@ -1084,6 +1086,29 @@ class MarketDashboard:
                 "risk_level": "⚪ Low",
             }
 
+    @staticmethod
+    def _liquidation_risk_level(total_liq: float) -> str:
+        """Уровень риска по объёму ликвидаций"""
+        if total_liq > 100_000_000:  # >$100M
+            return "🔴 High"
+        if total_liq > 50_000_000:  # >$50M
+            return "🟡 Medium"
+        return "⚪ Low"
+
+    def _stream_liquidation_levels(self, levels: Dict, ticker: Dict) -> Dict:
+        """Зоны из heatmap стримов; пустая сторона — оценка ATR × 5"""
+        current_price = ticker["price"]
+        atr = ticker.get("atr", current_price * 0.02)
+        long_volume = levels["long_liq_volume"]
+        short_volume = levels["short_liq_volume"]
+        return {
+            "long_liq_level": levels["long_liq_level"] or current_price - atr * 5,
+            "short_liq_level": levels["short_liq_level"] or current_price + atr * 5,
+            "long_liq_volume": long_volume,
+            "short_liq_volume": short_volume,
+            "risk_level": self._liquidation_risk_level(long_volume + short_volume),
+        }
+
     async def _get_mtf_trends(self, symbol: str) -> Dict:
         """Получить multi-timeframe тренды с контекстными метками"""
         try:
@@ -1272,6 +1297,7 @@ class MarketDashboard:
 
             # ✅ ФОРМИРУЕМ FEATURES ДЛЯ DETECTOR
             features = {
+                "symbol": symbol,
                 "price": current_price,
                 "poc": poc,
                 "vah": vah,
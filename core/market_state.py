@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Market State Store - типизированное состояние рынка по символам
+Одно поле на метрику (__slots__), время обновления каждого поля,
+версии для пропуска неизменённых символов, дешёвый snapshot
+"""
+
+import time
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import logger
+
+
+# Поля состояния символа (порядок = индекс в массиве timestamps)
+STATE_FIELDS = (
+    # Цена / объём
+    "price",
+    "volume",
+    "volume_ratio",
+    "cvd",
+    # L2 orderbook (Bybit)
+    "orderbook_imbalance",
+    "bid_volume",
+    "ask_volume",
+    "orderbook_full",
+    # Best bid/ask других бирж
+    "binance_bid",
+    "binance_ask",
+    "binance_spread",
+    "okx_bid",
+    "okx_ask",
+    "okx_spread",
+    "coinbase_bid",
+    "coinbase_ask",
+    "coinbase_spread",
+    # Деривативы
+    "funding_rate",
+    "long_short_ratio",
+    # Результаты сканера
+    "market_regime",
+    "wyckoff_phase",
+    "pattern",
+    "strategy",
+    "score",
+    "trend_1h",
+    "trend_4h",
+    "trend_1d",
+    "mtf_aligned",
+    "mtf_agreement",
+)
+
+FIELD_INDEX = {name: i for i, name in enumerate(STATE_FIELDS)}
+
+
+class SymbolState:
+    """
+    Состояние одного символа
+
+    Поле, которое ещё не обновлялось, считается отсутствующим:
+    get() вернёт default, updated_at() — 0.
+    """
+
+    __slots__ = STATE_FIELDS + ("symbol", "version", "updated", "_timestamps")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.version = 0
+        self.updated = 0.0
+        self._timestamps = array("d", bytes(8 * len(STATE_FIELDS)))
+        for name in STATE_FIELDS:
+            setattr(self, name, None)
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Значение поля или default, если поле не обновлялось"""
+        index = FIELD_INDEX.get(name)
+        if index is None or not self._timestamps[index]:
+            return default
+        return getattr(self, name)
+
+    def __getitem__(self, name: str) -> Any:
+        index = FIELD_INDEX.get(name)
+        if index is None or not self._timestamps[index]:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name: str) -> bool:
+        index = FIELD_INDEX.get(name)
+        return index is not None and bool(self._timestamps[index])
+
+    def updated_at(self, name: str) -> float:
+        """Время последнего обновления поля (unix, 0 — не обновлялось)"""
+        return self._timestamps[FIELD_INDEX[name]]
+
+    def age(self, name: str, now: Optional[float] = None) -> float:
+        """Возраст поля в секундах (inf, если не обновлялось)"""
+        ts = self.updated_at(name)
+        if not ts:
+            return float("inf")
+        return (now or time.time()) - ts
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Заданные поля как dict (для JSON / логов)"""
+        ts = self._timestamps
+        return {
+            name: getattr(self, name) for i, name in enumerate(STATE_FIELDS) if ts[i]
+        }
+
+    def copy(self) -> "SymbolState":
+        """Независимая копия (значения полей не копируются глубоко)"""
+        clone = SymbolState.__new__(SymbolState)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone._timestamps = array("d", self._timestamps)
+        return clone
+
+    def __repr__(self) -> str:
+        return f"SymbolState({self.symbol}, v{self.version}, {self.to_dict()!r})"
+
+
+class MarketStateStore:
+    """
+    Хранилище состояния рынка по символам
+
+    Все обновления идут из event loop, поэтому snapshot() между await
+    атомарен: ни одно поле не может измениться посреди копирования.
+
+    Features:
+    - update(symbol, **fields): слияние полей, время обновления на поле
+    - Глобальная версия: changed_since(version) → только изменённые символы
+    - snapshot(): копии состояний + версия, на которой они сняты
+    """
+
+    def __init__(self):
+        self.states: Dict[str, SymbolState] = {}
+        self.version = 0
+        self.stats = {"updates": 0, "snapshots": 0}
+
+    # ==================== ЗАПИСЬ ====================
+
+    def update(self, symbol: str, now: Optional[float] = None, **fields) -> SymbolState:
+        """
+        Обновить поля символа (остальные поля не затрагиваются)
+
+        Args:
+            symbol: Торговая пара (BTCUSDT)
+            now: Время обновления (по умолчанию time.time())
+            **fields: Поля из STATE_FIELDS
+
+        Returns:
+            SymbolState символа
+
+        Raises:
+            KeyError: Неизвестное поле
+        """
+        state = self.states.get(symbol)
+        if state is None:
+            state = SymbolState(symbol)
+            self.states[symbol] = state
+
+        now = now or time.time()
+        timestamps = state._timestamps
+        for name, value in fields.items():
+            index = FIELD_INDEX.get(name)
+            if index is None:
+                raise KeyError(f"Неизвестное поле market state: {name}")
+            setattr(state, name, value)
+            timestamps[index] = now
+
+        self.version += 1
+        state.version = self.version
+        state.updated = now
+        self.stats["updates"] += 1
+        return state
+
+    def remove(self, symbol: str) -> bool:
+        """Удалить символ"""
+        return self.states.pop(symbol, None) is not None
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def get(self, symbol: str, default: Any = None) -> Optional[SymbolState]:
+        return self.states.get(symbol, default)
+
+    def __getitem__(self, symbol: str) -> SymbolState:
+        return self.states[symbol]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.states
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.states)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def value(self, symbol: str, name: str, default: Any = None) -> Any:
+        """Значение поля символа или default"""
+        state = self.states.get(symbol)
+        return default if state is None else state.get(name, default)
+
+    def changed_since(self, version: int) -> Tuple[int, List[str]]:
+        """
+        Символы, обновлённые после version
+
+        Использование:
+            version, symbols = store.changed_since(last_version)
+            for symbol in symbols: ...
+            last_version = version
+
+        Returns:
+            (текущая версия, список символов)
+        """
+        if version >= self.version:
+            return self.version, []
+        return self.version, [
+            symbol for symbol, state in self.states.items() if state.version > version
+        ]
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None) -> Tuple[int, Dict[str, SymbolState]]:
+        """
+        Согласованный snapshot состояний для аналитики
+
+        Args:
+            symbols: Символы (по умолчанию все)
+
+        Returns:
+            (версия, {symbol: копия SymbolState})
+        """
+        keys = self.states if symbols is None else symbols
+        states = self.states
+        copies = {s: states[s].copy() for s in keys if s in states}
+        self.stats["snapshots"] += 1
+        return self.version, copies
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика хранилища"""
+        return {**self.stats, "symbols": len(self.states), "version": self.version}
+
+
+# ==================== SINGLETON ====================
+
+_global_market_state: Optional[MarketStateStore] = None
+
+
+def get_market_state() -> MarketStateStore:
+    """Получить глобальный MarketStateStore"""
+    global _global_market_state
+    if _global_market_state is None:
+        _global_market_state = MarketStateStore()
+        logger.info(f"✅ MarketStateStore инициализирован: {len(STATE_FIELDS)} полей")
+    return _global_market_state
+
+
+# Экспорт
+__all__ = [
+    "STATE_FIELDS",
+    "SymbolState",
+    "MarketStateStore",
+    "get_market_state",
+]
@@ -6,9 +6,10 @@
 
 import asyncio
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import deque
 from config.settings import logger
+from core.alert_suppression import get_alert_suppression
 
 
 class PremiumAlertSystem:
@@ -30,8 +31,10 @@ class PremiumAlertSystem:
         self.volume_history = {}  # symbol -> deque of volumes
         self.history_window = 20  # последние 20 периодов
 
-        # Кэш алертов (чтобы не дублировать)
+        # История алертов; дубли отсекает общий индекс (5 минут на type + symbol)
         self.recent_alerts = deque(maxlen=100)
+        self.suppression = get_alert_suppression()
+        self.duplicate_window = 300
 
         logger.info("✅ PremiumAlertSystem инициализирована")
 
@@ -326,18 +329,10 @@ class PremiumAlertSystem:
             return None
 
     def _is_duplicate_alert(self, alert: Dict) -> bool:
-        """Проверка на дублирование алертов (в течение 5 минут)"""
-        alert_signature = f"{alert['type']}_{alert.get('symbol', 'global')}"
-        cutoff_time = datetime.now() - timedelta(minutes=5)
-
-        for recent_alert in self.recent_alerts:
-            if recent_alert.get('type') == alert['type'] and \
-               recent_alert.get('symbol') == alert.get('symbol'):
-                alert_time = datetime.fromisoformat(recent_alert['timestamp'])
-                if alert_time > cutoff_time:
-                    return True
-
-        return False
+        """Проверка на дублирование алертов (в течение 5 минут), занимает слот при отправке"""
+        return not self.suppression.acquire(
+            alert['type'], alert.get('symbol'), cooldown=self.duplicate_window
+        )
 
     def get_recent_alerts(self, limit: int = 10) -> List[Dict]:
         """Получение последних алертов"""
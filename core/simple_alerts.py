@@ -228,10 +228,11 @@ class SimpleAlertsSystem:
 
             # Отправляем
             if self.bot.telegram_handler:
-                await self.bot.telegram_handler.application.bot.send_message(
-                    chat_id=self.bot.telegram_handler.chat_id,
-                    text=message,
-                    parse_mode='Markdown'
+                # Через outbox: rate limiting + объединение повторов
+                await self.bot.telegram_handler.send_message(
+                    message,
+                    parse_mode='Markdown',
+                    coalesce_key=f"{alert_type}:{symbol}"
                 )
 
                 # Регистрируем отправку
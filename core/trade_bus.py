@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trade Bus - единая шина сделок всех бирж
+Каждая сделка нормализуется один раз в компактную запись
+(exchange, symbol id, ts_ms, price, qty, side) и раздаётся подписчикам
+колоночными батчами (NumPy) — CVD, киты, крупные сделки и т.д.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import logger, TRADE_BUS_CONFIG
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+EXCHANGES = ("bybit", "binance", "okx", "coinbase")
+EXCHANGE_ID = {name: i for i, name in enumerate(EXCHANGES)}
+
+_SIDES = {
+    "buy": SIDE_BUY,
+    "Buy": SIDE_BUY,
+    "BUY": SIDE_BUY,
+    "b": SIDE_BUY,
+    "sell": SIDE_SELL,
+    "Sell": SIDE_SELL,
+    "SELL": SIDE_SELL,
+    "s": SIDE_SELL,
+    SIDE_BUY: SIDE_BUY,
+    SIDE_SELL: SIDE_SELL,
+}
+
+
+def normalize_symbol(symbol: str) -> str:
+    """BTC-USDT / btc/usdt / btcusdt → BTCUSDT"""
+    return symbol.replace("-", "").replace("/", "").upper()
+
+
+def normalize_side(side: Any) -> int:
+    """
+    Сторона агрессора: buy/Buy/BUY/b/1 → SIDE_BUY, sell/.../-1 → SIDE_SELL
+
+    Raises:
+        KeyError: Неизвестная сторона
+    """
+    return _SIDES[side]
+
+
+class TradeBatch:
+    """
+    Колоночный батч сделок
+
+    Массивы одинаковой длины: exchange (int8), symbol (int32, id в
+    symbols), ts (int64, ms), price / qty (float64), side (int8, ±1).
+    """
+
+    __slots__ = ("exchange", "symbol", "ts", "price", "qty", "side", "symbols")
+
+    def __init__(self, exchange, symbol, ts, price, qty, side, symbols: List[str]):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.ts = ts
+        self.price = price
+        self.qty = qty
+        self.side = side
+        self.symbols = symbols
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def notional(self) -> np.ndarray:
+        """Объём сделок в quote-валюте (USD)"""
+        return self.price * self.qty
+
+    @property
+    def signed_qty(self) -> np.ndarray:
+        """qty со знаком агрессора (delta для CVD)"""
+        return self.qty * self.side
+
+    def select(self, mask: np.ndarray) -> "TradeBatch":
+        """Подбатч по булевой маске / индексам"""
+        return TradeBatch(
+            self.exchange[mask],
+            self.symbol[mask],
+            self.ts[mask],
+            self.price[mask],
+            self.qty[mask],
+            self.side[mask],
+            self.symbols,
+        )
+
+    def per_symbol(self, values: np.ndarray) -> Dict[str, float]:
+        """
+        Сумма values по символам (np.bincount)
+
+        Returns:
+            {symbol: сумма} только для символов, присутствующих в батче
+        """
+        size = len(self.symbols)
+        counts = np.bincount(self.symbol, minlength=size)
+        sums = np.bincount(self.symbol, weights=values, minlength=size)
+        return {self.symbols[i]: float(sums[i]) for i in np.flatnonzero(counts)}
+
+    def records(self) -> Iterator[Tuple[str, str, int, float, float, int]]:
+        """Построчный обход (exchange, symbol, ts_ms, price, qty, side)"""
+        symbols = self.symbols
+        for ex, sym, ts, price, qty, side in zip(
+            self.exchange.tolist(),
+            self.symbol.tolist(),
+            self.ts.tolist(),
+            self.price.tolist(),
+            self.qty.tolist(),
+            self.side.tolist(),
+        ):
+            yield EXCHANGES[ex], symbols[sym], ts, price, qty, side
+
+
+@dataclass
+class TradeSubscriber:
+    """Подписчик шины и его счётчики"""
+
+    name: str
+    handler: Callable[[TradeBatch], Any]
+    exchanges: Optional[Tuple[int, ...]] = None
+    trades: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    errors: int = 0
+
+    def throughput(self) -> float:
+        """Сделок в секунду времени обработчика"""
+        return self.trades / self.busy_seconds if self.busy_seconds else 0.0
+
+
+class RollingDelta:
+    """
+    Скользящее по времени окно delta по символам (rolling CVD)
+
+    deque + текущие суммы: добавление и вытеснение O(1),
+    без пересборки списка на каждую сделку.
+    """
+
+    def __init__(self, window_seconds: float = 300):
+        self.window = window_seconds
+        self.trades: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._sum: Dict[str, float] = {}
+        self._abs: Dict[str, float] = {}
+
+    def _series(self, symbol: str) -> Deque[Tuple[float, float]]:
+        trades = self.trades.get(symbol)
+        if trades is None:
+            trades = self.trades[symbol] = deque()
+            self._sum[symbol] = self._abs[symbol] = 0.0
+        return trades
+
+    def _evict(
+        self, symbol: str, trades: Deque[Tuple[float, float]], total: float, volume: float, timestamp: float
+    ) -> float:
+        """Вытеснить сделки старше окна и сохранить суммы"""
+        cutoff = timestamp - self.window
+        while trades and trades[0][0] <= cutoff:
+            _, old = trades.popleft()
+            total -= old
+            volume -= abs(old)
+
+        self._sum[symbol] = total
+        self._abs[symbol] = volume
+        return total
+
+    def add(self, symbol: str, timestamp: float, delta: float) -> float:
+        """
+        Добавить delta сделки
+
+        Args:
+            symbol: Торговая пара
+            timestamp: Время сделки (сек)
+            delta: +qty для покупки, -qty для продажи
+
+        Returns:
+            Текущая сумма delta в окне
+        """
+        trades = self._series(symbol)
+        trades.append((timestamp, delta))
+        return self._evict(
+            symbol, trades, self._sum[symbol] + delta, self._abs[symbol] + abs(delta), timestamp
+        )
+
+    def add_batch(self, batch: "TradeBatch"):
+        """
+        Подписчик TradeBus: все сделки батча (ts в секундах, delta = ±qty)
+
+        Суммы по символам — np.bincount, сделки символа дописываются
+        одним deque.extend; Python-цикл только по символам батча.
+        """
+        count = len(batch)
+        if not count:
+            return
+        size = len(batch.symbols)
+        deltas = batch.signed_qty
+        sums = np.bincount(batch.symbol, weights=deltas, minlength=size).tolist()
+        volumes = np.bincount(batch.symbol, weights=batch.qty, minlength=size).tolist()
+
+        order = np.argsort(batch.symbol, kind="stable")
+        ids = batch.symbol[order]
+        bounds = (np.flatnonzero(np.diff(ids)) + 1).tolist()
+        seconds = batch.ts[order] / 1000
+        latest = np.maximum.reduceat(seconds, [0, *bounds]).tolist()
+        seconds = seconds.tolist()
+        deltas = deltas[order].tolist()
+
+        for start, end, sym, last in zip([0, *bounds], [*bounds, count], ids[[0, *bounds]].tolist(), latest):
+            symbol = batch.symbols[sym]
+            trades = self._series(symbol)
+            trades.extend(zip(seconds[start:end], deltas[start:end]))
+            self._evict(
+                symbol, trades, self._sum[symbol] + sums[sym], self._abs[symbol] + volumes[sym], last
+            )
+
+    def value(self, symbol: str) -> float:
+        """Сумма delta в окне"""
+        return self._sum.get(symbol, 0.0)
+
+    def volume(self, symbol: str) -> float:
+        """Сумма |delta| в окне"""
+        return self._abs.get(symbol, 0.0)
+
+
+class TradeBus:
+    """
+    Шина сделок
+
+    publish() только дописывает запись в буфер (O(1), без await);
+    фоновая задача раз в flush_interval (или при заполнении max_batch)
+    собирает NumPy-батч и вызывает подписчиков по очереди.
+
+    Features:
+    - Нормализация символа и стороны один раз на сделку
+    - Батчевые обработчики (sync или async), фильтр по биржам
+    - Счётчики и метрики по каждому подписчику
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None, max_batch: Optional[int] = None):
+        self.flush_interval = flush_interval or TRADE_BUS_CONFIG["flush_interval"]
+        self.max_batch = max_batch or TRADE_BUS_CONFIG["max_batch"]
+
+        self.subscribers: Dict[str, TradeSubscriber] = {}
+
+        # Символы: raw-строка биржи → id, id → нормализованное имя
+        self.symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._raw_symbol_ids: Dict[str, int] = {}
+
+        # Буфер до flush (колонки)
+        self._exchange: List[int] = []
+        self._symbol: List[int] = []
+        self._ts: List[int] = []
+        self._price: List[float] = []
+        self._qty: List[float] = []
+        self._side: List[int] = []
+
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._running = False
+
+        self.stats = {"published": 0, "flushes": 0, "rejected": 0}
+
+        registry = get_metrics_registry()
+        self._published = registry.counter(
+            "trade_bus_published_total", "Сделки, опубликованные в шину", ("exchange",)
+        )
+        self._delivered = registry.counter(
+            "trade_bus_trades_total", "Сделки, обработанные подписчиком", ("subscriber",)
+        )
+        self._handler_latency = registry.histogram(
+            "trade_bus_batch_seconds", "Время обработки батча подписчиком", ("subscriber",)
+        )
+        self._errors = registry.counter(
+            "trade_bus_errors_total", "Ошибки обработчиков шины", ("subscriber",)
+        )
+        registry.register_collector("trade_bus", stats_collector("trade_bus", self.get_totals))
+
+    # ==================== ПОДПИСКА ====================
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable[[TradeBatch], Any],
+        exchanges: Optional[Tuple[str, ...]] = None,
+    ) -> TradeSubscriber:
+        """
+        Подписать батчевый обработчик
+
+        Args:
+            name: Уникальное имя (метки метрик)
+            handler: handler(batch) — sync или async
+            exchanges: Только сделки этих бирж (по умолчанию все)
+
+        Returns:
+            TradeSubscriber
+        """
+        ids = tuple(EXCHANGE_ID[e] for e in exchanges) if exchanges else None
+        subscriber = TradeSubscriber(name=name, handler=handler, exchanges=ids)
+        self.subscribers[name] = subscriber
+        logger.debug(f"🔌 TradeBus: подписчик {name}")
+        return subscriber
+
+    def unsubscribe(self, name: str) -> bool:
+        return self.subscribers.pop(name, None) is not None
+
+    # ==================== ПУБЛИКАЦИЯ ====================
+
+    def symbol_id(self, symbol: str) -> int:
+        """id символа (нормализация — один раз на raw-строку биржи)"""
+        sid = self._raw_symbol_ids.get(symbol)
+        if sid is None:
+            name = normalize_symbol(symbol)
+            sid = self._symbol_ids.get(name)
+            if sid is None:
+                sid = len(self.symbols)
+                self.symbols.append(name)
+                self._symbol_ids[name] = sid
+            self._raw_symbol_ids[symbol] = sid
+        return sid
+
+    def publish(
+        self, exchange: str, symbol: str, ts_ms: int, price: float, qty: float, side: Any
+    ) -> bool:
+        """
+        Опубликовать сделку
+
+        Args:
+            exchange: bybit / binance / okx / coinbase
+            symbol: Символ в формате биржи (BTC-USDT, BTCUSDT, ...)
+            ts_ms: Время сделки (ms)
+            price: Цена
+            qty: Объём в базовой валюте
+            side: Сторона агрессора (buy/sell/±1)
+
+        Returns:
+            False, если запись отброшена (неизвестная биржа/сторона, qty <= 0)
+        """
+        side_id = _SIDES.get(side)
+        exchange_id = EXCHANGE_ID.get(exchange)
+        if side_id is None or exchange_id is None or not qty > 0:
+            self.stats["rejected"] += 1
+            return False
+
+        self._exchange.append(exchange_id)
+        self._symbol.append(self.symbol_id(symbol))
+        self._ts.append(int(ts_ms))
+        self._price.append(price)
+        self._qty.append(qty)
+        self._side.append(side_id)
+        self.stats["published"] += 1
+
+        if len(self._ts) >= self.max_batch and self._wake is not None:
+            self._wake.set()
+        return True
+
+    def pending(self) -> int:
+        """Сделок в буфере"""
+        return len(self._ts)
+
+    def _take_batch(self) -> TradeBatch:
+        batch = TradeBatch(
+            np.array(self._exchange, dtype=np.int8),
+            np.array(self._symbol, dtype=np.int32),
+            np.array(self._ts, dtype=np.int64),
+            np.array(self._price, dtype=np.float64),
+            np.array(self._qty, dtype=np.float64),
+            np.array(self._side, dtype=np.int8),
+            self.symbols,
+        )
+        self._exchange, self._symbol, self._ts = [], [], []
+        self._price, self._qty, self._side = [], [], []
+        return batch
+
+    # ==================== ДОСТАВКА ====================
+
+    async def flush(self) -> int:
+        """
+        Доставить накопленные сделки всем подписчикам
+
+        Returns:
+            Количество сделок в батче
+        """
+        if not self._ts:
+            return 0
+
+        batch = self._take_batch()
+        self.stats["flushes"] += 1
+
+        counts = np.bincount(batch.exchange, minlength=len(EXCHANGES))
+        for exchange_id in np.flatnonzero(counts):
+            self._published.labels(EXCHANGES[exchange_id]).inc(int(counts[exchange_id]))
+
+        for subscriber in list(self.subscribers.values()):
+            await self._deliver(subscriber, batch)
+        return len(batch)
+
+    async def _deliver(self, subscriber: TradeSubscriber, batch: TradeBatch):
+        if subscriber.exchanges is not None:
+            batch = batch.select(np.isin(batch.exchange, subscriber.exchanges))
+            if not len(batch):
+                return
+
+        start = time.perf_counter()
+        try:
+            result = subscriber.handler(batch)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            subscriber.errors += 1
+            self._errors.labels(subscriber.name).inc()
+            logger.error(f"❌ TradeBus: ошибка подписчика {subscriber.name}: {e}")
+        finally:
+            elapsed = time.perf_counter() - start
+            subscriber.trades += len(batch)
+            subscriber.batches += 1
+            subscriber.busy_seconds += elapsed
+            self._delivered.labels(subscriber.name).inc(len(batch))
+            self._handler_latency.labels(subscriber.name).observe(elapsed)
+
+    async def start(self):
+        """Запустить фоновую доставку"""
+        if self._running:
+            return
+        self._running = True
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"✅ TradeBus запущен: flush={self.flush_interval * 1000:.0f}ms, "
+            f"max_batch={self.max_batch}, подписчиков: {len(self.subscribers)}"
+        )
+
+    async def stop(self):
+        """Остановить доставку (остаток буфера доставляется)"""
+        self._running = False
+        if self._task:
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ TradeBus flush error: {e}")
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_totals(self) -> Dict[str, int]:
+        """Общие счётчики (для collector'а метрик)"""
+        return {**self.stats, "pending": self.pending(), "symbols": len(self.symbols)}
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Счётчики и пропускная способность по подписчикам"""
+        return {
+            name: {
+                "trades": s.trades,
+                "batches": s.batches,
+                "errors": s.errors,
+                "busy_ms": round(s.busy_seconds * 1000, 2),
+                "trades_per_sec": round(s.throughput()),
+            }
+            for name, s in self.subscribers.items()
+        }
+
+
+# ==================== SINGLETON ====================
+
+_global_trade_bus: Optional[TradeBus] = None
+
+
+def get_trade_bus() -> TradeBus:
+    """Получить глобальный TradeBus"""
+    global _global_trade_bus
+    if _global_trade_bus is None:
+        _global_trade_bus = TradeBus()
+        logger.info("✅ TradeBus инициализирован")
+    return _global_trade_bus
+
+
+# Экспорт
+__all__ = [
+    "SIDE_BUY",
+    "SIDE_SELL",
+    "EXCHANGES",
+    "EXCHANGE_ID",
+    "normalize_symbol",
+    "normalize_side",
+    "TradeBatch",
+    "TradeSubscriber",
+    "RollingDelta",
+    "TradeBus",
+    "get_trade_bus",
+]
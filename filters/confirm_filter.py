@@ -88,7 +88,8 @@ class ConfirmFilter:
         try:
             # Получаем market_data
             if market_data is None and self.bot:
-                market_data = self.bot.market_data.get(symbol, {})
+                state = self.bot.market_data.get(symbol)
+                market_data = state.to_dict() if state else {}
             elif market_data is None:
                 logger.warning(f"⚠️ {symbol}: Нет market_data, пропускаем проверку")
                 result['warnings'].append("⚠️ Нет market_data")
@@ -295,8 +296,7 @@ class ConfirmFilter:
             if not self.bot:
                 return 0
 
-            market_data = self.bot.market_data.get(symbol, {})
-            volume = market_data.get("volume", 0)
+            volume = self.bot.market_data.value(symbol, "volume", 0)
 
             if volume > 0:
                 return float(volume)
@@ -5,9 +5,9 @@ Multi-Timeframe Filter - согласование тренда по нескол
 """
 
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
-import numpy as np
+from datetime import datetime
 from config.settings import logger
+from utils.http_transport import get_http_transport
 
 
 class MultiTimeframeFilter:
@@ -47,15 +47,8 @@ class MultiTimeframeFilter:
         # Таймфреймы для анализа (по умолчанию)
         self.default_timeframes = ["1h", "4h", "1d"]
 
-        # Параметры для определения тренда
-        self.ema_fast_period = 20  # Быстрая EMA
-        self.ema_slow_period = 50  # Медленная EMA
-        self.sma_period = 200  # SMA для глобального тренда
-
-        # Кэш для хранения данных MTF
+        # Последние MTF данные по символу (тренды — из MTFTrendService)
         self.mtf_cache: Dict[str, Dict] = {}
-        self.cache_expiry = timedelta(minutes=5)
-        self.last_cache_update: Dict[str, datetime] = {}
 
         logger.info(
             f"✅ MultiTimeframeFilter инициализирован "
@@ -177,10 +170,9 @@ class MultiTimeframeFilter:
         """
         Получает MTF данные (тренд + сила) для всех таймфреймов
 
-        Использует:
-        1. MTFAnalyzer из бота (если доступен)
-        2. Прямой расчет из klines
-        3. Кэш (если данные свежие)
+        Тренды берутся из общего MTFTrendService: пересчёт только на
+        закрытии нового бара, между закрытиями — без загрузки свечей.
+        Свечи: klines_cache коннектора бота, иначе Bybit REST.
 
         Returns:
             Dict[str, Dict]: {
@@ -190,35 +182,16 @@ class MultiTimeframeFilter:
             }
         """
         try:
-            # Проверяем кэш
-            if self._is_cache_valid(symbol):
-                logger.debug(f"📦 Использую кэш MTF для {symbol}")
-                return self.mtf_cache[symbol]
-
-            mtf_data = {}
-
-            # Метод 1: Получаем из MTFAnalyzer (если доступен)
-            if self.bot and hasattr(self.bot, "mtf_analyzer"):
-                for tf in timeframes:
-                    try:
-                        # Получаем данные из MTFAnalyzer
-                        trend_data = await self._get_trend_from_mtf_analyzer(symbol, tf)
-                        if trend_data:
-                            mtf_data[tf] = trend_data
-                    except Exception as e:
-                        logger.debug(f"⚠️ MTFAnalyzer недоступен для {symbol} {tf}: {e}")
-
-            # Метод 2: Расчет напрямую из klines (fallback)
-            if not mtf_data:
-                for tf in timeframes:
-                    trend_data = await self._calculate_trend_from_klines(symbol, tf)
-                    if trend_data:
-                        mtf_data[tf] = trend_data
+            states = await self.trend_service.get_trends(
+                symbol, timeframes, loader=self._get_klines_from_connector
+            )
+            mtf_data = {
+                tf: {"trend": state.direction, "strength": state.strength}
+                for tf, state in states.items()
+            }
 
-            # Сохраняем в кэш
             if mtf_data:
                 self.mtf_cache[symbol] = mtf_data
-                self.last_cache_update[symbol] = datetime.now()
 
             return mtf_data
 
@@ -226,191 +199,28 @@ class MultiTimeframeFilter:
             logger.error(f"❌ Ошибка получения MTF данных для {symbol}: {e}")
             return {}
 
-    async def _get_trend_from_mtf_analyzer(self, symbol: str, timeframe: str) -> Dict:
-        """Получение тренда из MTFAnalyzer"""
-        try:
-            # ✅ ИСПОЛЬЗУЕМ _get_klines_from_connector!
-            klines = await self._get_klines_from_connector(symbol, timeframe)
-
-            if not klines or len(klines) < 20:
-                logger.debug(
-                    f"⚠️ Недостаточно свечей для MTF анализа {symbol} {timeframe}"
-                )
-                return {"trend": "UNKNOWN", "strength": 0}  # ✅ ПРАВИЛЬНО!
-
-            # ✅ Анализируем тренд
-            trend_data = self._analyze_trend_simple(klines)
-
-            logger.debug(
-                f"✅ MTFAnalyzer {symbol} {timeframe}: {trend_data['trend']} (strength: {trend_data['strength']:.2f})"  # ✅ ПРАВИЛЬНО!
-            )
-
-            return trend_data
-
-        except Exception as e:
-            logger.debug(f"⚠️ Ошибка получения из MTFAnalyzer {symbol} {timeframe}: {e}")
-            return {"trend": "UNKNOWN", "strength": 0}  # ✅ ПРАВИЛЬНО!
-
-    def _analyze_trend_simple(self, klines: List[Dict]) -> Dict:
-        """
-        Упрощённый анализ тренда по klines
-
-        Returns:
-            {'trend': 'UP'/'DOWN'/'NEUTRAL', 'strength': 0.0-1.0}
-        """
-        if not klines or len(klines) < 20:
-            return {"trend": "NEUTRAL", "strength": 0.0}
-
-        try:
-            import pandas as pd
-
-            df = pd.DataFrame(klines)
-            df["close"] = pd.to_numeric(df["close"], errors="coerce")
-            df = df.dropna(subset=["close"])
-
-            if len(df) < 20:
-                return {"trend": "NEUTRAL", "strength": 0.0}
-
-            # Вычисляем EMA 20
-            ema20 = df["close"].ewm(span=20, adjust=False).mean().iloc[-1]
-            current_price = df["close"].iloc[-1]
-
-            # Вычисляем процент отклонения
-            deviation = ((current_price - ema20) / ema20) * 100
-
-            # ✅ РАССЧИТЫВАЕМ STRENGTH
-            strength = min(abs(deviation) / 5.0, 1.0)
-
-            # ✅ ОПРЕДЕЛЯЕМ ТРЕНД ПО НАПРАВЛЕНИЮ (БЕЗ ЖЁСТКОГО ПОРОГА!)
-            if deviation > 0:
-                trend = "UP"
-            elif deviation < 0:
-                trend = "DOWN"
-            else:
-                trend = "NEUTRAL"
-
-            # ✅ ЕСЛИ STRENGTH < 0.02, ТО NEUTRAL (ТОЛЬКО ДЛЯ ОЧЕНЬ СЛАБЫХ)
-            if strength < 0.02:
-                trend = "NEUTRAL"
-
-            return {"trend": trend, "strength": strength}
-
-        except Exception as e:
-            logger.debug(f"Ошибка в _analyze_trend_simple: {e}")
-            return {"trend": "NEUTRAL", "strength": 0.0}
-
-    async def _calculate_trend_from_klines(
-        self, symbol: str, timeframe: str
-    ) -> Optional[Dict]:
-        """
-        Рассчитывает тренд напрямую из klines (fallback метод)
-
-        Returns:
-            Dict: {'trend': 'UP', 'strength': 0.85} или None
-        """
-        try:
-            # Получаем klines напрямую из коннектора
-            klines = await self._get_klines_from_connector(symbol, timeframe)
-
-            if not klines or len(klines) < 50:
-                return None
+    @property
+    def trend_service(self):
+        """Общий MTFTrendService (коннектор бота, если есть)"""
+        from analytics.mtf_trend_service import get_mtf_trend_service
 
-            # Рассчитываем тренд
-            trend, strength = self._calculate_trend_and_strength(klines)
+        return get_mtf_trend_service(getattr(self.bot, "bybit_connector", None))
 
-            return {"trend": trend, "strength": strength}
-
-        except Exception as e:
-            logger.debug(f"⚠️ Ошибка расчета тренда {symbol} {timeframe}: {e}")
-            return None
-
-    def _calculate_trend_and_strength(self, klines: List[Dict]) -> Tuple[str, float]:
+    @property
+    def trends(self) -> Dict[str, Dict[str, Dict]]:
         """
-        Рассчитывает тренд и его силу на основе klines
-
-        Использует:
-        - EMA 20/50 crossover
-        - SMA 200 для глобального тренда
-        - Price position относительно EMA/SMA
+        Рассчитанные тренды для дашборда без загрузки свечей
 
         Returns:
-            Tuple[str, float]: ('UP'/'DOWN'/'NEUTRAL', strength 0.0-1.0)
+            {symbol: {'1h': {'trend': 'UP', 'strength': 0.8}, ...}}
         """
-        try:
-            # Извлекаем цены закрытия
-            closes = np.array([float(k.get("close", k.get("c", 0))) for k in klines])
-
-            if len(closes) < 50:
-                return "NEUTRAL", 0.5
-
-            current_price = closes[-1]
-
-            # Рассчитываем индикаторы
-            ema_fast = self._calculate_ema(closes, self.ema_fast_period)
-            ema_slow = self._calculate_ema(closes, self.ema_slow_period)
-
-            if len(closes) >= self.sma_period:
-                sma_200 = self._calculate_sma(closes, self.sma_period)
-                sma_200_current = sma_200[-1]
-            else:
-                sma_200_current = current_price
-
-            # Текущие значения
-            ema_fast_current = ema_fast[-1]
-            ema_slow_current = ema_slow[-1]
-
-            # Определяем тренд (scoring system)
-            trend_signals = 0
-            strength_factors = []
-
-            # 1. EMA crossover (самый важный сигнал, вес 2)
-            if ema_fast_current > ema_slow_current:
-                trend_signals += 2
-                ema_distance = (ema_fast_current - ema_slow_current) / ema_slow_current
-                strength_factors.append(min(abs(ema_distance) * 100, 1.0))
-            elif ema_fast_current < ema_slow_current:
-                trend_signals -= 2
-                ema_distance = (ema_slow_current - ema_fast_current) / ema_slow_current
-                strength_factors.append(min(abs(ema_distance) * 100, 1.0))
-
-            # 2. Цена относительно SMA 200 (глобальный тренд, вес 1)
-            if current_price > sma_200_current:
-                trend_signals += 1
-                strength_factors.append(0.8)
-            elif current_price < sma_200_current:
-                trend_signals -= 1
-                strength_factors.append(0.8)
-
-            # 3. Цена относительно быстрой EMA (краткосрочный импульс, вес 1)
-            if current_price > ema_fast_current:
-                trend_signals += 1
-                strength_factors.append(0.6)
-            elif current_price < ema_fast_current:
-                trend_signals -= 1
-                strength_factors.append(0.6)
-
-            # Определяем итоговый тренд
-            if trend_signals >= 2:
-                trend = "UP"
-            elif trend_signals <= -2:
-                trend = "DOWN"
-            else:
-                trend = "NEUTRAL"
-
-            # Рассчитываем силу тренда (0.0 - 1.0)
-            if strength_factors:
-                strength = np.mean(strength_factors)
-            else:
-                strength = 0.5
-
-            # Нормализуем силу в зависимости от количества согласованных сигналов
-            strength = min(strength * (abs(trend_signals) / 4), 1.0)
-
-            return trend, float(strength)
-
-        except Exception as e:
-            logger.error(f"❌ Ошибка расчета тренда: {e}")
-            return "NEUTRAL", 0.5
+        result: Dict[str, Dict[str, Dict]] = {}
+        for state in self.trend_service.states():
+            result.setdefault(state.symbol, {})[state.timeframe] = {
+                "trend": state.direction,
+                "strength": state.strength,
+            }
+        return result
 
     async def _get_klines_from_connector(
         self, symbol: str, timeframe: str
@@ -421,8 +231,6 @@ class MultiTimeframeFilter:
         Использует прямой HTTP запрос к api.bybit.com
         """
         try:
-            import httpx
-
             # Конвертируем timeframe в формат Bybit
             interval_map = {
                 "1m": "1",
@@ -450,39 +258,38 @@ class MultiTimeframeFilter:
                 "limit": 200,
             }
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                data = response.json()
-
-                if data.get("retCode") == 0 and data.get("result", {}).get("list"):
-                    klines_raw = data["result"]["list"]
-
-                    # Конвертируем в нужный формат
-                    klines = []
-                    for k in klines_raw:
-                        klines.append(
-                            {
-                                "time": int(k[0]),
-                                "open": float(k[1]),
-                                "high": float(k[2]),
-                                "low": float(k[3]),
-                                "close": float(k[4]),
-                                "volume": float(k[5]),
-                            }
-                        )
-
-                    # Bybit возвращает в обратном порядке (от новых к старым)
-                    klines.reverse()
-
-                    logger.info(
-                        f"✅ Получено {len(klines)} klines из Bybit REST для {symbol} {timeframe}"
-                    )
-                    return klines
-                else:
-                    logger.warning(
-                        f"⚠️ Bybit API error: {data.get('retMsg', 'Unknown error')}"
+            data = await get_http_transport().get_json(
+                url, params=params, exchange="bybit", timeout=10
+            )
+            if data and data.get("retCode") == 0 and data.get("result", {}).get("list"):
+                klines_raw = data["result"]["list"]
+
+                # Конвертируем в нужный формат
+                klines = []
+                for k in klines_raw:
+                    klines.append(
+                        {
+                            "time": int(k[0]),
+                            "open": float(k[1]),
+                            "high": float(k[2]),
+                            "low": float(k[3]),
+                            "close": float(k[4]),
+                            "volume": float(k[5]),
+                        }
                     )
-                    return []
+
+                # Bybit возвращает в обратном порядке (от новых к старым)
+                klines.reverse()
+
+                logger.info(
+                    f"✅ Получено {len(klines)} klines из Bybit REST для {symbol} {timeframe}"
+                )
+                return klines
+            else:
+                logger.warning(
+                    f"⚠️ Bybit API error: {(data or {}).get('retMsg', 'Unknown error')}"
+                )
+                return []
 
         except Exception as e:
             logger.error(
@@ -616,44 +423,14 @@ class MultiTimeframeFilter:
             logger.error(f"❌ Ошибка get_trend_strength: {e}")
             return 0.5
 
-    def _calculate_ema(self, data: np.ndarray, period: int) -> np.ndarray:
-        """Рассчитывает экспоненциальную скользящую среднюю (EMA)"""
-        ema = np.zeros_like(data)
-        ema[0] = data[0]
-        multiplier = 2 / (period + 1)
-
-        for i in range(1, len(data)):
-            ema[i] = (data[i] * multiplier) + (ema[i - 1] * (1 - multiplier))
-
-        return ema
-
-    def _calculate_sma(self, data: np.ndarray, period: int) -> np.ndarray:
-        """Рассчитывает простую скользящую среднюю (SMA)"""
-        if len(data) < period:
-            return np.full_like(data, np.nan)
-
-        sma = np.convolve(data, np.ones(period) / period, mode="valid")
-        # Дополняем начало массива NaN значениями
-        padding = np.full(period - 1, np.nan)
-        return np.concatenate([padding, sma])
-
-    def _is_cache_valid(self, symbol: str) -> bool:
-        """Проверяет валидность кэша для символа"""
-        if symbol not in self.mtf_cache or symbol not in self.last_cache_update:
-            return False
-
-        time_since_update = datetime.now() - self.last_cache_update[symbol]
-        return time_since_update < self.cache_expiry
-
     def clear_cache(self, symbol: Optional[str] = None):
         """Очищает кэш MTF данных"""
+        self.trend_service.invalidate(symbol)
         if symbol:
             self.mtf_cache.pop(symbol, None)
-            self.last_cache_update.pop(symbol, None)
             logger.info(f"🧹 MTF кэш очищен для {symbol}")
         else:
             self.mtf_cache.clear()
-            self.last_cache_update.clear()
             logger.info("🧹 Весь MTF кэш очищен")
 
     async def get_trend_summary(self, symbol: str) -> Dict:
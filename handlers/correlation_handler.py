@@ -32,16 +32,22 @@ class CorrelationHandler:
         """
         /correlation - Show correlation matrix for top assets
         /correlation BTC ETH SOL - Show correlation for specific assets
+        /correlation BTC ETH SOL 7d - Period 24h / 7d / 30d
         """
         try:
             user = update.effective_user.username or "Unknown"
             logger.info(f"📊 /correlation от @{user}")
 
+            args = list(context.args or [])
+            period = "24h"
+            if args and args[-1].lower() in self.bot.correlation_analyzer.panels:
+                period = args.pop().lower()
+
             # Определяем символы
-            if context.args and len(context.args) >= 2:
+            if len(args) >= 2:
                 # User provided symbols
                 symbols = []
-                for arg in context.args:
+                for arg in args:
                     symbol = arg.upper()
                     if not symbol.endswith("USDT"):
                         symbol = f"{symbol}USDT"
@@ -57,7 +63,7 @@ class CorrelationHandler:
 
             # Calculate correlation
             result = await self.bot.correlation_analyzer.calculate_correlation_matrix(
-                symbols, period="24h"
+                symbols, period=period
             )
 
             # Format output
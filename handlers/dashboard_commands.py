@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 from telebot.async_telebot import AsyncTeleBot
 from telebot.types import Message
 from config.settings import logger, TRACKED_SYMBOLS
+from handlers.dashboard_publisher import get_dashboard_publisher, html_footer
 
 
 class DashboardCommands:
@@ -206,7 +207,7 @@ class DashboardCommands:
         )
 
         try:
-            dashboard_text = await self.dashboard_handler._build_dashboard(symbol)
+            dashboard_text = await self.dashboard_handler.build_dashboard(symbol)
 
             await self.telegram_bot.delete_message(
                 message.chat.id, loading_msg.message_id
@@ -243,8 +244,11 @@ class DashboardCommands:
         )
 
         try:
-            # Генерируем первый dashboard
-            dashboard_text = await self.dashboard_handler._build_dashboard(symbol)
+            # Генерируем первый dashboard (общий кэш для всех live-подписчиков)
+            publisher = get_dashboard_publisher()
+            key = ("gio", symbol)
+            builder = lambda: self.dashboard_handler.build_dashboard(symbol)
+            dashboard_text = await publisher.render(key, builder)
 
             # Добавляем индикатор автообновления
             end_time = datetime.now() + timedelta(minutes=60)
@@ -252,21 +256,19 @@ class DashboardCommands:
             dashboard_text += f"\n\n🔄 <i>Автообновление: каждые 60 сек | Активно до {end_time_str}</i>"
 
             # ✅ ПРАВИЛЬНЫЙ ФОРМАТ ДЛЯ TELEBOT
-            await self.telegram_bot.edit_message_text(
-                dashboard_text,
-                message.chat.id,
-                loading_msg.message_id,
-                parse_mode="HTML",  # ✅ Правильно
-                disable_web_page_preview=True,  # ✅ Отключает превью ссылок
-            )
+            await self._edit_dashboard(loading_msg, dashboard_text)
 
             logger.info(
                 f"✅ Live dashboard {symbol} запущен для user {message.from_user.id}"
             )
 
-            # Запускаем автообновление
-            asyncio.create_task(
-                self._auto_update_dashboard(loading_msg, message.from_user.id, symbol)
+            # Подписываем сообщение на автообновление
+            publisher.subscribe(
+                key,
+                subscriber_id=(loading_msg.chat.id, loading_msg.message_id),
+                builder=builder,
+                editor=lambda text: self._edit_dashboard(loading_msg, text),
+                footer=html_footer,
             )
 
         except Exception as e:
@@ -277,55 +279,15 @@ class DashboardCommands:
                 loading_msg.message_id,
             )
 
-    async def _auto_update_dashboard(self, message, user_id: int, symbol: str):
-        """Фоновое автообновление dashboard каждые 60 секунд"""
-        try:
-            logger.info(f"✅ Starting auto-update for user {user_id}")
-
-            end_time = datetime.now() + timedelta(minutes=60)
-            update_count = 0
-
-            while datetime.now() < end_time:
-                await asyncio.sleep(60)  # Ждём 60 секунд
-
-                try:
-                    update_count += 1
-                    time_left = int((end_time - datetime.now()).total_seconds() / 60)
-
-                    # Генерируем новый dashboard
-                    dashboard_text = await self.dashboard_handler._build_dashboard(
-                        symbol
-                    )
-
-                    # Добавляем индикатор
-                    dashboard_text += f"\n\n🔄 <i>Обновлено #{update_count} | Осталось ~{time_left} мин</i>"
-
-                    # ✅ ПРАВИЛЬНЫЙ ФОРМАТ ДЛЯ TELEBOT
-                    await self.telegram_bot.edit_message_text(
-                        dashboard_text,
-                        message.chat.id,
-                        message.message_id,
-                        parse_mode="HTML",  # ✅ Правильно
-                        disable_web_page_preview=True,  # ✅ Отключает превью ссылок
-                    )
-
-                    logger.info(
-                        f"🔄 Dashboard updated #{update_count} for user {user_id}"
-                    )
-
-                except Exception as e:
-                    if "message is not modified" in str(e).lower():
-                        logger.debug("Dashboard unchanged, skipping")
-                        continue
-                    else:
-                        logger.error(f"Error updating dashboard: {e}")
-                        break
-
-        except Exception as e:
-            logger.error(f"Auto-update task error: {e}")
-
-        finally:
-            logger.info(f"🛑 Live dashboard stopped for user {user_id}")
+    async def _edit_dashboard(self, message: Message, text: str):
+        """Обновить сообщение dashboard (HTML, без превью ссылок)"""
+        await self.telegram_bot.edit_message_text(
+            text,
+            message.chat.id,
+            message.message_id,
+            parse_mode="HTML",  # ✅ Правильно для telebot
+            disable_web_page_preview=True,  # ✅ Отключает превью ссылок
+        )
 
     def _extract_symbol(self, text: str) -> str:
         """
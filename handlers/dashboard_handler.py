@@ -12,6 +12,9 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 from config.settings import logger
+from analytics.regime_service import get_regime_service
+from utils.helpers import current_epoch_ms
+from handlers.dashboard_publisher import get_dashboard_publisher, html_footer
 
 
 class GIODashboardHandler:
@@ -209,8 +212,11 @@ class GIODashboardHandler:
                 f"📊 GIO Intelligence ({symbol})...\n⏳ Загрузка с автообновлением..."
             )
 
-            # Генерируем dashboard
-            dashboard_text = await self._build_dashboard(symbol)
+            # Генерируем dashboard (общий кэш для всех live-подписчиков символа)
+            publisher = get_dashboard_publisher()
+            key = ("gio", symbol)
+            builder = lambda: self.build_dashboard(symbol)
+            dashboard_text = await publisher.render(key, builder)
 
             # Добавляем индикатор автообновления
             end_time = datetime.now() + timedelta(minutes=60)
@@ -220,60 +226,22 @@ class GIODashboardHandler:
             # Обновляем сообщение
             await message.edit_text(dashboard_text, parse_mode="HTML")
 
-            # Запускаем автообновление в фоне
+            # Подписываем сообщение на автообновление
             logger.info(
                 f"✅ Starting live dashboard for user {update.effective_user.id}"
             )
-            asyncio.create_task(
-                self._auto_update_dashboard(message, update.effective_user.id, symbol)
+            publisher.subscribe(
+                key,
+                subscriber_id=(message.chat_id, message.message_id),
+                builder=builder,
+                editor=lambda text: message.edit_text(text, parse_mode="HTML"),
+                footer=html_footer,
             )
 
         except Exception as e:
             logger.error(f"Dashboard live error: {e}")
             await update.message.reply_text("❌ Ошибка загрузки dashboard")
 
-    async def _auto_update_dashboard(self, message, user_id: int, symbol: str):
-        """Автообновление dashboard каждые 60 секунд в течение 60 минут"""
-        try:
-            logger.info(f"✅ Starting live dashboard auto-update for user {user_id}")
-
-            end_time = datetime.now() + timedelta(minutes=60)
-            update_count = 0
-
-            while datetime.now() < end_time:
-                await asyncio.sleep(60)  # Ждём 60 секунд
-
-                try:
-                    update_count += 1
-                    time_left = int((end_time - datetime.now()).total_seconds() / 60)
-
-                    # Генерируем новый dashboard
-                    dashboard_text = await self._build_dashboard(symbol)
-
-                    # Добавляем индикатор с счётчиком
-                    dashboard_text += f"\n\n🔄 <i>Обновлено #{update_count} | Осталось ~{time_left} мин</i>"
-
-                    # Пытаемся обновить сообщение
-                    await message.edit_text(dashboard_text, parse_mode="HTML")
-                    logger.info(
-                        f"🔄 Dashboard updated #{update_count} for user {user_id}"
-                    )
-
-                except Exception as e:
-                    # Игнорируем ошибку "Message is not modified"
-                    if "Message is not modified" in str(e):
-                        logger.debug("Dashboard data unchanged, skipping update")
-                        continue
-                    else:
-                        logger.error(f"Error updating dashboard: {e}")
-                        break
-
-        except Exception as e:
-            logger.error(f"Auto-update task error: {e}")
-
-        finally:
-            logger.info(f"🛑 Live dashboard stopped for user {user_id}")
-
     async def _generate_ai_interpretation(self, symbol: str, metrics: dict) -> str:
         """
         Генерация AI INTERPRETATION для Market Overview
@@ -498,7 +466,7 @@ class GIODashboardHandler:
             # === ✅ WHALE ACTIVITY (НОВОЕ) ===
             if hasattr(self.bot, "whale_tracker"):
                 try:
-                    whale_data = await self.bot.whale_tracker.get_whale_summary(
+                    whale_data = self.bot.whale_tracker.get_whale_summary(
                         symbol, minutes=15
                     )
                     whale_net = float(whale_data.get("net_volume", 0))
@@ -544,14 +512,10 @@ class GIODashboardHandler:
 
                     # Получаем режим рынка
                     try:
-                        regime = (
-                            await self.bot.market_structure_analyzer.get_market_regime(
-                                symbol
-                            )
-                        )
+                        regime = get_regime_service().get(symbol, now_ms=current_epoch_ms())
                         if regime:
-                            regime_name = regime.get("regime", "Unknown")
-                            regime_conf = regime.get("confidence", 0)
+                            regime_name = regime.regime
+                            regime_conf = regime.confidence * 100
                             regime_emoji = self.get_regime_emoji(regime_name)
                             lines.append(
                                 f"└─ Trend: {regime_emoji} {regime_name.upper()} ({regime_conf:.0f}% conf)"
@@ -1342,7 +1306,7 @@ class GIODashboardHandler:
             whale_net = 0.0
             if hasattr(self.bot, "whale_tracker"):
                 try:
-                    whale_data = await self.bot.whale_tracker.get_whale_summary(
+                    whale_data = self.bot.whale_tracker.get_whale_summary(
                         symbol, minutes=15
                     )
                     whale_net = float(whale_data.get("net_volume", 0))
@@ -1440,7 +1404,14 @@ class GIODashboardHandler:
             return "Ошибка генерации интерпретации. Проверьте данные вручную."
 
     def get_regime_emoji(self, regime: str) -> str:
-        mapping = {"TRENDING": "📈", "RANGING": "↔️", "VOLATILE": "⚡", "BREAKOUT": "🚀"}
+        mapping = {
+            "TRENDING": "📈",
+            "RANGING": "↔️",
+            "VOLATILE": "⚡",
+            "EXPANDING": "⚡",
+            "SQUEEZING": "🗜️",
+            "BREAKOUT": "🚀",
+        }
         return mapping.get(regime.upper(), "⚪")
 
     def get_scenario_emoji(self, scenario: str) -> str:
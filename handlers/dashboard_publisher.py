@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dashboard Publisher - общий рендер live dashboard для всех подписчиков
+Один builder task на (тип dashboard, символ), fan-out текста во все
+подписанные сообщения, пропуск edit при неизменном содержимом
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from config.settings import logger
+from utils.metrics import get_metrics_registry
+
+
+ChannelKey = Tuple[str, str]  # (dashboard_type, symbol)
+Builder = Callable[[], Awaitable[str]]
+Editor = Callable[[str], Awaitable]
+Footer = Callable[[int, int], str]
+
+
+def default_footer(update_count: int, minutes_left: int) -> str:
+    """Стандартная подпись live dashboard"""
+    return f"\n\n🔄 Обновлено #{update_count} | Осталось ~{minutes_left} мин"
+
+
+def html_footer(update_count: int, minutes_left: int) -> str:
+    """Подпись live dashboard для parse_mode=HTML"""
+    return f"\n\n🔄 <i>Обновлено #{update_count} | Осталось ~{minutes_left} мин</i>"
+
+
+@dataclass
+class DashboardSubscriber:
+    """Подписчик live dashboard (одно сообщение в одном чате)"""
+
+    subscriber_id: Hashable
+    editor: Editor
+    expires_at: float
+    footer: Footer = default_footer
+    last_hash: Optional[str] = None
+    update_count: int = 0
+
+    def minutes_left(self, now: float) -> int:
+        return max(0, int((self.expires_at - now) / 60))
+
+
+@dataclass
+class DashboardChannel:
+    """Публикация одного dashboard: builder, кэш последнего рендера, подписчики"""
+
+    key: ChannelKey
+    builder: Builder
+    interval: float
+    subscribers: Dict[Hashable, DashboardSubscriber] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = None
+    last_text: Optional[str] = None
+    last_hash: Optional[str] = None
+    rendered_at: float = 0.0
+    renders: int = 0
+    render_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class DashboardPublisher:
+    """
+    Сервис публикации live dashboard
+
+    Features:
+    - Один рендер за интервал на (тип, символ) независимо от числа подписчиков
+    - Fan-out: текст рассылается во все подписанные сообщения параллельно
+    - Content hash: edit пропускается, если содержимое не изменилось
+    - Подписка истекает по времени; канал останавливается вместе
+      с последним подписчиком
+    """
+
+    def __init__(self, interval: float = 60.0, duration: float = 3600.0):
+        """
+        Args:
+            interval: Интервал обновления (секунды)
+            duration: Время жизни подписки по умолчанию (секунды)
+        """
+        self.interval = interval
+        self.duration = duration
+        self.channels: Dict[ChannelKey, DashboardChannel] = {}
+
+        self.stats = {
+            "renders": 0,
+            "edits": 0,
+            "edits_skipped": 0,
+            "edit_errors": 0,
+        }
+
+        registry = get_metrics_registry()
+        self._render_latency = registry.histogram(
+            "dashboard_render_seconds", "Время рендера dashboard", ("type",)
+        )
+        self._edits = registry.counter(
+            "dashboard_edits_total", "Обновления live dashboard", ("type", "result")
+        )
+        registry.register_collector("dashboard_publisher", self._collect)
+
+        logger.info(
+            f"✅ DashboardPublisher инициализирован: interval={interval}s, "
+            f"duration={duration / 60:.0f}мин"
+        )
+
+    # ==================== ПОДПИСКИ ====================
+
+    async def render(self, key: ChannelKey, builder: Builder) -> str:
+        """
+        Получить текст dashboard: из кэша, если он свежее интервала,
+        иначе построить заново (одновременные вызовы делят один рендер)
+
+        Args:
+            key: (тип dashboard, символ)
+            builder: Корутина построения текста
+
+        Returns:
+            Текст dashboard (без подписи автообновления)
+        """
+        channel = self._get_channel(key, builder)
+        async with channel.render_lock:
+            if (
+                channel.last_text is not None
+                and time.monotonic() - channel.rendered_at < self.interval
+            ):
+                return channel.last_text
+            return await self._render(channel)
+
+    def subscribe(
+        self,
+        key: ChannelKey,
+        subscriber_id: Hashable,
+        builder: Builder,
+        editor: Editor,
+        footer: Footer = default_footer,
+        duration: Optional[float] = None,
+    ) -> DashboardSubscriber:
+        """
+        Подписать сообщение на автообновление
+
+        Повторная подписка с тем же subscriber_id заменяет предыдущую.
+
+        Args:
+            key: (тип dashboard, символ)
+            subscriber_id: ID подписчика (chat_id или (chat_id, message_id))
+            builder: Корутина построения текста
+            editor: Корутина редактирования сообщения: editor(text)
+            footer: Формирует подпись: footer(update_count, minutes_left)
+            duration: Время жизни подписки (секунды)
+
+        Returns:
+            DashboardSubscriber
+        """
+        channel = self._get_channel(key, builder)
+
+        subscriber = DashboardSubscriber(
+            subscriber_id=subscriber_id,
+            editor=editor,
+            expires_at=time.monotonic() + (duration or self.duration),
+            footer=footer,
+            last_hash=channel.last_hash,
+        )
+        channel.subscribers[subscriber_id] = subscriber
+
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.create_task(self._publish_loop(channel))
+            logger.info(f"🔄 Dashboard channel {key} запущен")
+
+        logger.info(
+            f"✅ Подписка {subscriber_id} на {key} "
+            f"(подписчиков: {len(channel.subscribers)})"
+        )
+        return subscriber
+
+    def unsubscribe(self, key: ChannelKey, subscriber_id: Hashable) -> bool:
+        """Отписать сообщение (канал остановится на следующем тике)"""
+        channel = self.channels.get(key)
+        if channel is None:
+            return False
+        return channel.subscribers.pop(subscriber_id, None) is not None
+
+    async def stop(self):
+        """Остановить все каналы"""
+        for channel in list(self.channels.values()):
+            channel.subscribers.clear()
+            if channel.task and not channel.task.done():
+                channel.task.cancel()
+                try:
+                    await channel.task
+                except asyncio.CancelledError:
+                    pass
+        self.channels.clear()
+        logger.info("🛑 DashboardPublisher остановлен")
+
+    def get_stats(self) -> Dict:
+        """Статистика публикаций"""
+        return {
+            **self.stats,
+            "channels": {
+                f"{key[0]}:{key[1]}": {
+                    "subscribers": len(channel.subscribers),
+                    "renders": channel.renders,
+                }
+                for key, channel in self.channels.items()
+            },
+        }
+
+    # ==================== ВНУТРЕННЕЕ ====================
+
+    def _get_channel(self, key: ChannelKey, builder: Builder) -> DashboardChannel:
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = DashboardChannel(key=key, builder=builder, interval=self.interval)
+            self.channels[key] = channel
+        return channel
+
+    async def _render(self, channel: DashboardChannel) -> str:
+        """Построить dashboard и обновить кэш канала"""
+        start = time.perf_counter()
+        text = await channel.builder()
+        self._render_latency.labels(channel.key[0]).observe(time.perf_counter() - start)
+
+        channel.last_text = text
+        channel.last_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        channel.rendered_at = time.monotonic()
+        channel.renders += 1
+        self.stats["renders"] += 1
+        return text
+
+    def _expire(self, channel: DashboardChannel):
+        now = time.monotonic()
+        expired = [
+            sid for sid, sub in channel.subscribers.items() if sub.expires_at <= now
+        ]
+        for sid in expired:
+            del channel.subscribers[sid]
+            logger.info(f"🛑 Live dashboard {channel.key} истёк для {sid}")
+
+    async def _publish_loop(self, channel: DashboardChannel):
+        """Цикл канала: рендер раз в интервал → fan-out подписчикам"""
+        try:
+            while True:
+                await asyncio.sleep(channel.interval)
+
+                self._expire(channel)
+                if not channel.subscribers:
+                    break
+
+                try:
+                    async with channel.render_lock:
+                        text = await self._render(channel)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка рендера dashboard {channel.key}: {e}")
+                    continue
+
+                await self._fan_out(channel, text)
+
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if self.channels.get(channel.key) is channel and not channel.subscribers:
+                del self.channels[channel.key]
+            logger.info(f"🛑 Dashboard channel {channel.key} остановлен")
+
+    async def _fan_out(self, channel: DashboardChannel, text: str):
+        """Разослать текст всем подписчикам, у которых он изменился"""
+        now = time.monotonic()
+        targets = []
+        for subscriber in channel.subscribers.values():
+            if subscriber.last_hash == channel.last_hash:
+                self.stats["edits_skipped"] += 1
+                self._edits.labels(channel.key[0], "skipped").inc()
+                continue
+            targets.append(subscriber)
+
+        if not targets:
+            return
+
+        async def edit(subscriber: DashboardSubscriber):
+            subscriber.update_count += 1
+            footer = subscriber.footer(
+                subscriber.update_count, subscriber.minutes_left(now)
+            )
+            await subscriber.editor(text + footer)
+            subscriber.last_hash = channel.last_hash
+
+        results = await asyncio.gather(
+            *(edit(sub) for sub in targets), return_exceptions=True
+        )
+
+        for subscriber, result in zip(targets, results):
+            if not isinstance(result, Exception):
+                self.stats["edits"] += 1
+                self._edits.labels(channel.key[0], "ok").inc()
+            elif "message is not modified" in str(result).lower():
+                subscriber.last_hash = channel.last_hash
+                self.stats["edits_skipped"] += 1
+                self._edits.labels(channel.key[0], "skipped").inc()
+            else:
+                # Сообщение удалено / чат недоступен — снимаем подписку
+                self.stats["edit_errors"] += 1
+                self._edits.labels(channel.key[0], "error").inc()
+                channel.subscribers.pop(subscriber.subscriber_id, None)
+                logger.error(
+                    f"❌ Ошибка обновления dashboard {channel.key} "
+                    f"для {subscriber.subscriber_id}: {result}"
+                )
+
+    def _collect(self):
+        return [
+            ("dashboard_subscribers", {"type": key[0], "symbol": key[1]}, len(ch.subscribers))
+            for key, ch in self.channels.items()
+        ]
+
+
+# ==================== SINGLETON ====================
+
+_global_dashboard_publisher: Optional[DashboardPublisher] = None
+
+
+def get_dashboard_publisher() -> DashboardPublisher:
+    """Получить глобальный DashboardPublisher"""
+    global _global_dashboard_publisher
+    if _global_dashboard_publisher is None:
+        _global_dashboard_publisher = DashboardPublisher()
+    return _global_dashboard_publisher
+
+
+# Экспорт
+__all__ = [
+    "DashboardPublisher",
+    "DashboardSubscriber",
+    "default_footer",
+    "html_footer",
+    "get_dashboard_publisher",
+]
@@ -23,6 +23,7 @@ class LiquidityHandler:
         """
         /liquidity — Enhanced liquidity analysis for BTCUSDT
         /liquidity SYMBOL — Enhanced liquidity analysis for specific symbol
+        /liquidity SYMBOL all — Consolidated book (Bybit + Binance + OKX + Coinbase)
         """
         try:
             user = update.effective_user.username or "Unknown"
@@ -36,6 +37,8 @@ class LiquidityHandler:
             else:
                 symbol = self.default_symbol
 
+            consolidated = len(context.args or []) >= 2 and context.args[1].lower() == "all"
+
             # Loading message
             loading = await update.message.reply_text(
                 f"💧 Analyzing liquidity depth for {symbol}..."
@@ -46,7 +49,7 @@ class LiquidityHandler:
                 try:
                     # Проводим расширенный анализ
                     analysis = await self.bot.enhanced_liquidity_analyzer.analyze(
-                        symbol
+                        symbol, consolidated=consolidated
                     )
 
                     # Форматируем расширенный вывод
@@ -216,6 +219,15 @@ class LiquidityHandler:
         message += f"├─ Spread: ${analysis.spread:.2f} ({analysis.spread_pct:.4f}%)\n"
         message += f"└─ Status: {spread_status}\n\n"
 
+        # 4.1 Depth from mid
+        if analysis.depth_bps:
+            sources = ", ".join(s.upper().replace("_", " ") for s in analysis.sources)
+            message += f"📏 *DEPTH FROM MID* ({sources})\n"
+            for i, (bps, (bid_usd, ask_usd)) in enumerate(analysis.depth_bps.items()):
+                prefix = "└─" if i == len(analysis.depth_bps) - 1 else "├─"
+                message += f"{prefix} ±{bps}bps: BID ${bid_usd/1e6:.1f}M / ASK ${ask_usd/1e6:.1f}M\n"
+            message += "\n"
+
         # 5. Key Levels
         message += "🎯 *KEY LEVELS*\n"
 
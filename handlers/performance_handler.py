@@ -5,12 +5,12 @@ Performance Handler
 Telegram command handler for signal performance analytics
 """
 
-import asyncio
-import sqlite3
 from typing import List
 from telegram import Update
 from telegram.ext import ContextTypes
 from config.settings import logger, DB_FILE
+from analytics.performance_rollup import get_performance_rollup
+from utils.performance import run_blocking
 
 
 class PerformanceHandler:
@@ -164,40 +164,11 @@ class PerformanceHandler:
             Список сигналов [{symbol, roi, direction, entry_time}, ...]
         """
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-
-            # Сортировка: DESC для лучших, ASC для худших
-            order = "DESC" if best else "ASC"
-
-            cursor.execute(
-                f"""
-                SELECT symbol, roi, direction, entry_time
-                FROM signals
-                WHERE status = 'closed'
-                  AND roi IS NOT NULL
-                ORDER BY roi {order}
-                LIMIT ?
-            """,
-                (limit,),
+            # Частичный индекс по ROI закрытых сигналов: читается только limit строк
+            return await run_blocking(
+                get_performance_rollup(DB_FILE).top_signals, limit=limit, best=best
             )
 
-            rows = cursor.fetchall()
-            conn.close()
-
-            if not rows:
-                return []
-
-            return [
-                {
-                    "symbol": row[0],
-                    "roi": row[1],
-                    "direction": row[2],
-                    "entry_time": row[3],
-                }
-                for row in rows
-            ]
-
         except Exception as e:
             logger.error(f"_get_top_signals error: {e}")
             return []
@@ -3,37 +3,55 @@
 """
 Advanced Support/Resistance Detector для GIO Bot
 Объединяет Volume Profile, Order Book, Price Clusters, CVD для определения уровней
+Кандидаты пишутся в общую книгу уровней символа (LevelEngine), уровни
+и ключевые S/R читаются из неё
 """
 
-import numpy as np
 from typing import Dict, List, Tuple, Optional
+from analytics.level_engine import LevelBook, LevelEngine, LevelSource, STRENGTH_WEIGHTS, get_level_engine
 from config.settings import logger
 
 
+# source кандидата → источник книги уровней
+_LEVEL_SOURCES = {
+    "volume": LevelSource.VOLUME_PROFILE,
+    "volume_poc": LevelSource.VOLUME_PROFILE,
+    "order_book": LevelSource.ORDERBOOK,
+    "recent_low": LevelSource.PIVOT,
+    "recent_high": LevelSource.PIVOT,
+}
+
+
 class AdvancedSupportResistanceDetector:
     """
     Улучшенный детектор уровней поддержки и сопротивления.
     Объединяет анализ объема, стакана ордеров, CVD и ценовых кластеров.
     """
 
-    def __init__(self, atr_multiplier: float = 0.5, volume_threshold: float = 1.5):
+    def __init__(self, atr_multiplier: float = 0.5, volume_threshold: float = 1.5,
+                 engine: Optional[LevelEngine] = None):
         self.atr_multiplier = atr_multiplier
         self.volume_threshold = volume_threshold
+        self.engine = engine
         self.previous_levels = {'support': [], 'resistance': []}
 
     def detect_support_resistance(self, features: Dict) -> Dict:
         """
         Определяет уровни поддержки и сопротивления на основе множества факторов.
+
+        С features["symbol"] уровни копятся в общей книге символа (вместе
+        с pivot'ами, стенами стакана и ликвидациями других модулей), без
+        symbol — во временной книге только этого вызова.
         """
         try:
             # Извлечение features
+            symbol = features.get("symbol")
             price = features.get("price")
             poc = features.get("poc", 0)
             vah = features.get("vah", 0)
             val = features.get("val", 0)
             atr = features.get("atr", 1.0)
             cvd_slope = features.get("cvd_slope", 0)
-            cvd_value = features.get("cvd_value", 0)
             bids = features.get("order_book_bids", 0)
             asks = features.get("order_book_asks", 0)
             high = features.get("high", price)
@@ -53,17 +71,17 @@ class AdvancedSupportResistanceDetector:
             # 3. Уровни из ценовых кластеров (High/Low)
             price_cluster_levels = self._get_price_cluster_levels(high, low, price, atr)
 
-            # 4. Объединение всех уровней
-            all_support = base_support + order_book_levels['support'] + price_cluster_levels['support']
-            all_resistance = base_resistance + order_book_levels['resistance'] + price_cluster_levels['resistance']
-
-            # 5. Фильтрация и взвешивание уровней по CVD
-            filtered_levels = self._apply_cvd_filter(
-                all_support, all_resistance, cvd_slope, cvd_value, price
+            # 4. Слияние кандидатов в книгу уровней (допуск — доля ATR)
+            book = self._level_book(symbol)
+            book.set_atr(atr)
+            self._publish_levels(
+                book,
+                base_support + order_book_levels['support'] + price_cluster_levels['support']
+                + base_resistance + order_book_levels['resistance'] + price_cluster_levels['resistance']
             )
 
-            # 6. Консолидация и ранжирование уровней
-            final_levels = self._consolidate_levels(filtered_levels, price, atr)
+            # 5-6. Уровни из книги с фильтрацией и взвешиванием по CVD
+            final_levels = self._consolidate_levels(book, price, cvd_slope)
 
             # 7. Определение силы уровней
             strength_analysis = self._analyze_strength(final_levels, volume_profile, bids, asks)
@@ -180,42 +198,32 @@ class AdvancedSupportResistanceDetector:
 
         return {'support': support, 'resistance': resistance}
 
-    def _apply_cvd_filter(self, support: List, resistance: List,
-                         cvd_slope: float, cvd_value: float, price: float) -> Dict:
-        """Применяет CVD анализ для фильтрации и взвешивания уровней."""
-
-        cvd_bias = "bullish" if cvd_slope > 0 else "bearish"
-        cvd_strength = min(abs(cvd_slope) / 100, 1.0)  # Нормализация силы CVD
-
-        filtered_support = []
-        filtered_resistance = []
-
-        if cvd_bias == "bullish":
-            # Бычий тренд: усиливаем поддержки, фильтруем слабые сопротивления
-            for level in support:
-                if level['price'] <= price:
-                    level['strength'] = self._enhance_strength(level['strength'], cvd_strength)
-                    level['cvd_bias'] = "confirmed"
-                    filtered_support.append(level)
-
-            for level in resistance:
-                if level['price'] > price * 1.02:  # Только значительные сопротивления
-                    level['cvd_bias'] = "weakened"
-                    filtered_resistance.append(level)
-
-        else:  # Медвежий тренд
-            for level in resistance:
-                if level['price'] >= price:
-                    level['strength'] = self._enhance_strength(level['strength'], cvd_strength)
-                    level['cvd_bias'] = "confirmed"
-                    filtered_resistance.append(level)
-
-            for level in support:
-                if level['price'] < price * 0.98:  # Только значительные поддержки
-                    level['cvd_bias'] = "weakened"
-                    filtered_support.append(level)
+    def _level_book(self, symbol: Optional[str]) -> LevelBook:
+        """Общая книга символа или временная книга вызова"""
+        if not symbol:
+            return LevelBook()
+        if self.engine is None:
+            self.engine = get_level_engine()
+        return self.engine.book(symbol)
+
+    def _publish_levels(self, book: LevelBook, levels: List[Dict]):
+        """Записывает кандидатов в книгу уровней (слияние близких — в книге)."""
+        for level in levels:
+            book.add(
+                level['price'],
+                _LEVEL_SOURCES.get(level['source'], LevelSource.PIVOT),
+                STRENGTH_WEIGHTS.get(level['strength'], 1.0),
+            )
 
-        return {'support': filtered_support, 'resistance': filtered_resistance}
+    def _apply_cvd_filter(self, levels: List[Dict], confirmed: bool, cvd_strength: float) -> List[Dict]:
+        """Усиливает уровни стороны, подтверждённой CVD, помечает ослабленные."""
+        for level in levels:
+            if confirmed:
+                level['strength'] = self._enhance_strength(level['strength'], cvd_strength)
+                level['cvd_bias'] = "confirmed"
+            else:
+                level['cvd_bias'] = "weakened"
+        return levels
 
     def _enhance_strength(self, current_strength: str, cvd_strength: float) -> str:
         """Усиливает уровень на основе силы CVD."""
@@ -229,83 +237,41 @@ class AdvancedSupportResistanceDetector:
         else:
             return "weak"
 
-    def _consolidate_levels(self, levels: Dict, price: float, atr: float) -> Dict:
-        """Консолидирует и ранжирует уровни."""
-        # Объединение близких уровней
-        support = self._merge_near_levels(levels['support'], atr * 0.3)
-        resistance = self._merge_near_levels(levels['resistance'], atr * 0.3)
+    def _consolidate_levels(self, book: LevelBook, price: float, cvd_slope: float) -> Dict:
+        """
+        Выбирает уровни из книги и ранжирует их.
 
-        # Сортировка
-        support.sort(key=lambda x: x['price'], reverse=True)  # Ближайшие сверху
-        resistance.sort(key=lambda x: x['price'])  # Ближайшие снизу
+        Бычий CVD: поддержки не выше цены, сопротивления — только дальше 2%.
+        Медвежий CVD: сопротивления не ниже цены, поддержки — дальше 2%.
+        """
+        bullish = cvd_slope > 0
+        cvd_strength = min(abs(cvd_slope) / 100, 1.0)  # Нормализация силы CVD
+        support_bound = price if bullish else price * 0.98
+        resistance_bound = price * 1.02 if bullish else price
 
-        # Выбор ключевых уровней
-        key_support = self._select_key_level(support, price, "below")
-        key_resistance = self._select_key_level(resistance, price, "above")
+        # Ближайшие уровни (bisect от цены)
+        support = [book.describe(level) for level in book.below(support_bound, limit=5, inclusive=bullish)]
+        resistance = [book.describe(level) for level in book.above(resistance_bound, limit=5, inclusive=not bullish)]
+
+        # Ключевые уровни: самая сильная категория, из неё — ближайший к цене
+        key_support = book.key_level(support_bound, "below", inclusive=bullish)
+        key_resistance = book.key_level(resistance_bound, "above", inclusive=not bullish)
+        key_support = book.describe(key_support) if key_support else None
+        key_resistance = book.describe(key_resistance) if key_resistance else None
+
+        for levels, confirmed in ((support, bullish), (resistance, not bullish)):
+            self._apply_cvd_filter(levels, confirmed, cvd_strength)
+        for level, confirmed in ((key_support, bullish), (key_resistance, not bullish)):
+            if level:
+                self._apply_cvd_filter([level], confirmed, cvd_strength)
 
         return {
-            'support': support[:5],  # Топ 5 поддержек
-            'resistance': resistance[:5],  # Топ 5 сопротивлений
+            'support': support,  # Топ 5 поддержек, ближайшие первыми
+            'resistance': resistance,  # Топ 5 сопротивлений
             'key_support': key_support,
             'key_resistance': key_resistance
         }
 
-    def _merge_near_levels(self, levels: List, threshold: float) -> List:
-        """Объединяет уровни, находящиеся близко друг к другу."""
-        if not levels:
-            return []
-
-        levels.sort(key=lambda x: x['price'])
-        merged = [levels[0]]
-
-        for level in levels[1:]:
-            last = merged[-1]
-            if abs(level['price'] - last['price']) <= threshold:
-                merged_price = (last['price'] + level['price']) / 2
-                merged_strength = self._merge_strengths(last['strength'], level['strength'])
-
-                merged[-1] = {
-                    'price': merged_price,
-                    'strength': merged_strength,
-                    'source': f"merged_{last['source']}_{level['source']}",
-                    'original_levels': [last, level]
-                }
-            else:
-                merged.append(level)
-
-        return merged
-
-    def _merge_strengths(self, strength1: str, strength2: str) -> str:
-        """Объединяет силы двух уровней."""
-        strength_values = {"weak": 1, "medium": 2, "strong": 3}
-        total = strength_values.get(strength1, 1) + strength_values.get(strength2, 1)
-
-        if total >= 5:
-            return "strong"
-        elif total >= 3:
-            return "medium"
-        else:
-            return "weak"
-
-    def _select_key_level(self, levels: List, price: float, position: str) -> Optional[Dict]:
-        """Выбирает ключевой уровень поддержки/сопротивления."""
-        if not levels:
-            return None
-
-        if position == "below":
-            candidate_levels = [level for level in levels if level['price'] < price]
-        else:  # "above"
-            candidate_levels = [level for level in levels if level['price'] > price]
-
-        if not candidate_levels:
-            return None
-
-        return max(candidate_levels, key=lambda x: (
-            x['strength'] == "strong",
-            x['strength'] == "medium",
-            -abs(x['price'] - price)
-        ))
-
     def _analyze_strength(self, levels: Dict, volume_profile: Dict,
                          bids: float, asks: float) -> Dict:
         """Анализирует общую силу уровней."""
@@ -15,9 +15,14 @@ from telegram.ext import ContextTypes
 from telegram.error import BadRequest
 from core.scenario_interpreter import ScenarioInterpreter, get_scenario_emoji
 from core.mm_scenarios_generator import MMScenariosGenerator
+from handlers.dashboard_publisher import get_dashboard_publisher
+from utils.http_transport import get_http_transport
 
 logger = logging.getLogger(__name__)
 
+# Unified dashboard не зависит от символа — один канал на всех
+UNIFIED_DASHBOARD_KEY = ("unified", "ALL")
+
 
 def escape_markdown_v2(text: str) -> str:
     """Экранирует специальные символы для MarkdownV2"""
@@ -32,7 +37,7 @@ class UnifiedDashboardHandler:
         self.bot = bot
         self.interpreter = ScenarioInterpreter()
         self.generator = MMScenariosGenerator()
-        self.live_tasks = {}  # {chat_id: task}
+        self.publisher = get_dashboard_publisher()
 
     async def handle_dashboard(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -59,7 +64,9 @@ class UnifiedDashboardHandler:
         try:
             await update.message.reply_text("📊 Загрузка dashboard...")
 
-            dashboard_text = await self._build_dashboard_text()
+            dashboard_text = await self.publisher.render(
+                UNIFIED_DASHBOARD_KEY, self._build_dashboard_text
+            )
 
             # ✅ УБИРАЕМ parse_mode для безопасности
             await update.message.reply_text(dashboard_text)
@@ -74,19 +81,16 @@ class UnifiedDashboardHandler:
         """Запустить LIVE dashboard с автообновлением"""
         chat_id = update.effective_chat.id
 
-        # Остановить предыдущую live-сессию если есть
-        if chat_id in self.live_tasks:
-            self.live_tasks[chat_id].cancel()
-            logger.info(f"🛑 Stopped previous live dashboard for chat {chat_id}")
-
         try:
             # Отправляем первое сообщение
             loading_msg = await update.message.reply_text(
                 "📊 Загрузка GIO Dashboard Live..."
             )
 
-            # Генерируем первый dashboard
-            dashboard_text = await self._build_dashboard_text()
+            # Генерируем первый dashboard (общий кэш для всех чатов)
+            dashboard_text = await self.publisher.render(
+                UNIFIED_DASHBOARD_KEY, self._build_dashboard_text
+            )
 
             # Добавляем индикатор автообновления
             end_time = datetime.now() + timedelta(minutes=60)
@@ -96,83 +100,23 @@ class UnifiedDashboardHandler:
             # Обновляем сообщение
             await loading_msg.edit_text(dashboard_text)
 
-            # Запускаем фоновое автообновление
-            task = asyncio.create_task(
-                self._auto_update_loop(
-                    chat_id=chat_id,
-                    message_id=loading_msg.message_id,
-                    end_time=end_time,
-                    context=context,
-                )
+            # Подписка по chat_id: новая live-сессия заменяет предыдущую
+            message_id = loading_msg.message_id
+            self.publisher.subscribe(
+                UNIFIED_DASHBOARD_KEY,
+                subscriber_id=chat_id,
+                builder=self._build_dashboard_text,
+                editor=lambda text: context.bot.edit_message_text(
+                    chat_id=chat_id, message_id=message_id, text=text
+                ),
             )
 
-            self.live_tasks[chat_id] = task
-
             logger.info(f"✅ Live dashboard started for chat {chat_id}")
 
         except Exception as e:
             logger.error(f"Start live dashboard error: {e}")
             await update.message.reply_text(f"❌ Ошибка: {e}")
 
-    async def _auto_update_loop(
-        self,
-        chat_id: int,
-        message_id: int,
-        end_time: datetime,
-        context: ContextTypes.DEFAULT_TYPE,
-    ):
-        """Фоновый цикл автообновления"""
-        try:
-            update_count = 0
-
-            while datetime.now() < end_time:
-                await asyncio.sleep(60)  # Ждём 60 секунд
-
-                try:
-                    update_count += 1
-                    time_left = int((end_time - datetime.now()).total_seconds() / 60)
-
-                    # Генерируем новый dashboard
-                    dashboard_text = await self._build_dashboard_text()
-
-                    # Добавляем индикатор
-                    dashboard_text += f"\n\n🔄 Обновлено #{update_count} | Осталось ~{time_left} мин"  # ✅ БЕЗ ПОДЧЁРКИВАНИЙ!
-
-                    # Обновляем сообщение
-                    await context.bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=dashboard_text,
-                    )
-
-                    logger.info(
-                        f"🔄 Dashboard updated #{update_count} for chat {chat_id}"
-                    )
-
-                except BadRequest as e:
-                    if "message is not modified" in str(e).lower():
-                        logger.debug("Dashboard unchanged, skipping update")
-                        continue
-                    else:
-                        logger.error(f"Update error: {e}")
-                        break
-
-                except Exception as e:
-                    logger.error(f"Update loop error: {e}")
-                    break
-
-        except asyncio.CancelledError:
-            logger.info(f"🛑 Live dashboard cancelled for chat {chat_id}")
-
-        except Exception as e:
-            logger.error(f"Auto-update loop error: {e}")
-
-        finally:
-            # Удаляем задачу из словаря
-            if chat_id in self.live_tasks:
-                del self.live_tasks[chat_id]
-            logger.info(f"🛑 Live dashboard stopped for chat {chat_id}")
-
     async def _build_dashboard_text(self) -> str:
         """Построить текст dashboard"""
         try:
@@ -223,30 +167,30 @@ class UnifiedDashboardHandler:
     async def _get_market_overview(self) -> str:
         """Получить Market Overview с реальными ценами"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.binance.com/api/v3/ticker/24hr"
-                params = {"symbols": '["BTCUSDT","ETHUSDT"]'}
+            transport = get_http_transport()
+            url = "https://api.binance.com/api/v3/ticker/24hr"
+            params = {"symbols": '["BTCUSDT","ETHUSDT"]'}
 
-                async with session.get(url, params=params) as resp:
-                    data = await resp.json()
+            async with transport.get(url, params=params) as resp:
+                data = await resp.json()
 
-                    btc = next(d for d in data if d["symbol"] == "BTCUSDT")
-                    eth = next(d for d in data if d["symbol"] == "ETHUSDT")
+                btc = next(d for d in data if d["symbol"] == "BTCUSDT")
+                eth = next(d for d in data if d["symbol"] == "ETHUSDT")
 
-                    btc_price = float(btc["lastPrice"])
-                    btc_change = float(btc["priceChangePercent"])
-                    eth_price = float(eth["lastPrice"])
-                    eth_change = float(eth["priceChangePercent"])
+                btc_price = float(btc["lastPrice"])
+                btc_change = float(btc["priceChangePercent"])
+                eth_price = float(eth["lastPrice"])
+                eth_change = float(eth["priceChangePercent"])
 
-                    total_vol = (
-                        float(btc["quoteVolume"]) + float(eth["quoteVolume"])
-                    ) / 1e9
+                total_vol = (
+                    float(btc["quoteVolume"]) + float(eth["quoteVolume"])
+                ) / 1e9
 
-                    # Эмодзи для изменения цены
-                    btc_emoji = "🟢" if btc_change >= 0 else "🔴"
-                    eth_emoji = "🟢" if eth_change >= 0 else "🔴"
+                # Эмодзи для изменения цены
+                btc_emoji = "🟢" if btc_change >= 0 else "🔴"
+                eth_emoji = "🟢" if eth_change >= 0 else "🔴"
 
-                    return f"""📊 Market Overview  #
+                return f"""📊 Market Overview  #
     • BTC: ${btc_price:,.0f} ({btc_emoji}{btc_change:+.1f}%)
     • ETH: ${eth_price:,.0f} ({eth_emoji}{eth_change:+.1f}%)
     • Total Vol: ${total_vol:.1f}B"""
@@ -486,27 +430,28 @@ class UnifiedDashboardHandler:
     async def _get_hot_pairs(self) -> str:
         """Получить ТОП-3 пары по объёму"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = "https://api.binance.com/api/v3/ticker/24hr"
+            transport = get_http_transport()
+            url = "https://api.binance.com/api/v3/ticker/24hr"
 
-                async with session.get(url) as resp:
-                    data = await resp.json()
+            # Полный список тикеров: вес 80 в бюджете Binance
+            async with transport.get(url, weight=80) as resp:
+                data = await resp.json()
 
-                    # Фильтруем USDT пары
-                    usdt_pairs = [d for d in data if d["symbol"].endswith("USDT")]
+                # Фильтруем USDT пары
+                usdt_pairs = [d for d in data if d["symbol"].endswith("USDT")]
 
-                    # Сортируем по объёму
-                    top_pairs = sorted(
-                        usdt_pairs, key=lambda x: float(x["quoteVolume"]), reverse=True
-                    )[:3]
+                # Сортируем по объёму
+                top_pairs = sorted(
+                    usdt_pairs, key=lambda x: float(x["quoteVolume"]), reverse=True
+                )[:3]
 
-                    message = "🔥 HOT Pairs\n"
-                    for pair in top_pairs:
-                        symbol = pair["symbol"]
-                        volume = float(pair["quoteVolume"]) / 1e9
-                        message += f"• {symbol} - Vol: ${volume:.1f}B\n"
+                message = "🔥 HOT Pairs\n"
+                for pair in top_pairs:
+                    symbol = pair["symbol"]
+                    volume = float(pair["quoteVolume"]) / 1e9
+                    message += f"• {symbol} - Vol: ${volume:.1f}B\n"
 
-                    return message.strip()
+                return message.strip()
 
         except Exception as e:
             logger.error(f"HOT Pairs error: {e}")
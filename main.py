@@ -284,6 +284,7 @@ async def main():
             trade_accumulator = TradeDataAccumulator(window_minutes=60)
             bot.trade_accumulator = trade_accumulator
             bot.tradedata = trade_accumulator
+            bot.trade_bus.subscribe("trade_accumulator", trade_accumulator.on_trades)
             logger.info("✅ Trade Data Accumulator готов (60 мин окно)")
 
         # Whale Tracker (если доступен)
@@ -293,6 +294,8 @@ async def main():
 
             whale_tracker = WhaleTracker(window_minutes=5, db_path=DATABASE_PATH)
             bot.whale_tracker = whale_tracker
+            # Заменяем подписчика Trade Bus с тем же именем
+            bot.trade_bus.subscribe("whale_tracker", whale_tracker.on_trades)
             logger.info(f"✅ Whale Activity Tracker готов с БД: {DATABASE_PATH}")
 
             # Market Dashboard (если доступен)
@@ -6,6 +6,8 @@ from typing import Dict, Optional
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 class TradeDataAccumulator:
@@ -55,6 +57,28 @@ class TradeDataAccumulator:
 
             logger.debug(f"TradeData updated: {symbol} - {side} vol={volume:.2f} | Total Buy={data['buy_volume']:.2f}, Sell={data['sell_volume']:.2f}")
 
+    async def on_trades(self, batch):
+        """
+        Подписчик TradeBus: объёмы в USD по символам за один проход по батчу
+
+        Args:
+            batch: core.trade_bus.TradeBatch
+        """
+        notional = batch.notional
+        buy = np.where(batch.side > 0, notional, 0.0)
+        buys = batch.per_symbol(buy)
+        sells = batch.per_symbol(notional - buy)
+        counts = batch.per_symbol(np.ones(len(batch)))
+        now = datetime.now()
+
+        async with self._lock:
+            for symbol, buy_volume in buys.items():
+                data = self.trade_data[symbol]
+                data["buy_volume"] += buy_volume
+                data["sell_volume"] += sells[symbol]
+                data["total_trades"] += int(counts[symbol])
+                data["last_update"] = now
+
     def get_trade_data(self, symbol: str) -> Dict:
         """
         Возвращает накопленные данные по символу
@@ -9,6 +9,49 @@ from typing import Dict, Optional
 from config.settings import logger
 
 
+# Базовая уверенность по режиму
+REGIME_CONFIDENCE = {
+    "TRENDING": 0.7,
+    "RANGING": 0.65,
+    "SQUEEZING": 0.6,
+    "EXPANDING": 0.65,
+    "NEUTRAL": 0.5,
+}
+
+
+def classify_regime(
+    adx: float,
+    volume_ratio: float,
+    bb_width_percentile: float,
+    atr_percentile: float,
+) -> str:
+    """
+    Режим по индикаторам (ADX, объём к среднему, перцентиль ширины BB)
+
+    Returns:
+        TRENDING, RANGING, SQUEEZING, EXPANDING или NEUTRAL
+    """
+    # 1. TRENDING: сильный ADX + высокий объём
+    if adx > 30 and volume_ratio > 1.5:
+        return "TRENDING"
+
+    # 2. SQUEEZING: низкий ADX + узкие полосы + низкий объём
+    elif adx < 20 and bb_width_percentile < 30 and volume_ratio < 0.8:
+        return "SQUEEZING"
+
+    # 3. EXPANDING: широкие полосы + высокий объём
+    elif bb_width_percentile > 60 and volume_ratio > 1.8:
+        return "EXPANDING"
+
+    # 4. RANGING: низкий ADX + средние полосы + низкий объём
+    elif adx < 20 and 30 <= bb_width_percentile <= 60 and volume_ratio < 0.9:
+        return "RANGING"
+
+    # 5. NEUTRAL: всё остальное
+    else:
+        return "NEUTRAL"
+
+
 class MarketRegimeDetector:
     """
     Определяет текущий рыночный режим на основе технических индикаторов
@@ -129,26 +172,7 @@ class MarketRegimeDetector:
         atr_percentile: float,
     ) -> str:
         """Логика определения режима (полная версия с индикаторами)"""
-
-        # 1. TRENDING: сильный ADX + высокий объём
-        if adx > 30 and volume_ratio > 1.5:
-            return "TRENDING"
-
-        # 2. SQUEEZING: низкий ADX + узкие полосы + низкий объём
-        elif adx < 20 and bb_width_percentile < 30 and volume_ratio < 0.8:
-            return "SQUEEZING"
-
-        # 3. EXPANDING: широкие полосы + высокий объём
-        elif bb_width_percentile > 60 and volume_ratio > 1.8:
-            return "EXPANDING"
-
-        # 4. RANGING: низкий ADX + средние полосы + низкий объём
-        elif adx < 20 and 30 <= bb_width_percentile <= 60 and volume_ratio < 0.9:
-            return "RANGING"
-
-        # 5. NEUTRAL: всё остальное
-        else:
-            return "NEUTRAL"
+        return classify_regime(adx, volume_ratio, bb_width_percentile, atr_percentile)
 
     def _detect_regime_simple(
         self,
@@ -196,15 +220,7 @@ class MarketRegimeDetector:
         """
         try:
             # Базовая confidence в зависимости от режима
-            base_confidence = {
-                "TRENDING": 0.7,
-                "RANGING": 0.65,
-                "SQUEEZING": 0.6,
-                "EXPANDING": 0.65,
-                "NEUTRAL": 0.5,
-            }
-
-            confidence = base_confidence.get(regime, 0.5)
+            confidence = REGIME_CONFIDENCE.get(regime, 0.5)
 
             # Увеличиваем confidence если есть подтверждающие данные
             volume = market_data.get("volume", 0)
@@ -254,4 +270,4 @@ class MarketRegimeDetector:
 
 
 # Экспорт
-__all__ = ["MarketRegimeDetector"]
+__all__ = ["MarketRegimeDetector", "REGIME_CONFIDENCE", "classify_regime"]
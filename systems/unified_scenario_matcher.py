@@ -5,12 +5,16 @@ Enhanced Unified Scenario Matcher v2.0
 """
 
 import json
+import logging
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 from config.settings import logger, SCENARIOS_DIR, DATA_DIR
 from systems.market_regime_detector import MarketRegimeDetector
+from analytics.regime_service import get_regime_service
+from utils.helpers import current_epoch_ms
+from utils.log_batcher import log_batcher
 
 
 class EnhancedScenarioMatcher:
@@ -26,6 +30,9 @@ class EnhancedScenarioMatcher:
         """Инициализация матчера"""
         self.scenarios = []
         self.strategies = {}
+        # режим (lowercase) → стратегии режима + all_weather
+        self._strategies_by_regime: Dict[str, FrozenSet[str]] = {}
+        self._all_weather: FrozenSet[str] = frozenset()
         self.regime_detector = MarketRegimeDetector()
 
         # Загружаем данные
@@ -67,12 +74,22 @@ class EnhancedScenarioMatcher:
             with open(strategies_path, 'r', encoding='utf-8') as f:
                 self.strategies = json.load(f)
 
+            self._index_strategies()
             logger.info("✅ Загружены правила стратегий")
 
         except Exception as e:
             logger.error(f"❌ Ошибка загрузки стратегий: {e}")
             self.strategies = {}
 
+    def _index_strategies(self):
+        """Стратегии по режиму считаются один раз при загрузке"""
+        selector = self.strategies.get("strategy_selector", {})
+        self._all_weather = frozenset(selector.get("all_weather", []))
+        self._strategies_by_regime = {
+            regime.lower(): frozenset(strategies) | self._all_weather
+            for regime, strategies in selector.get("market_regime", {}).items()
+        }
+
 
     def match_scenario(
         self,
@@ -106,13 +123,17 @@ class EnhancedScenarioMatcher:
                 volume_profile, news_sentiment
             )
 
-            # 2. Определяем рыночный режим
-            market_regime = self.regime_detector.detect(metrics)
-            logger.info(f"📊 {symbol}: Рыночный режим = {market_regime}")
+            # 2. Рыночный режим: состояние RegimeService, иначе по метрикам
+            state = get_regime_service().get(symbol, now_ms=current_epoch_ms())
+            if state is not None:
+                market_regime = state.regime
+            else:
+                market_regime = self.regime_detector.detect(metrics)
+            log_batcher.log_throttled(logging.INFO, "📊 %s: Рыночный режим = %s", symbol, market_regime, key=symbol)
 
             # 3. Выбираем подходящие стратегии для режима
             suitable_strategies = self._get_suitable_strategies(market_regime)
-            logger.debug(f"🎯 Подходящие стратегии: {suitable_strategies}")
+            logger.debug("🎯 Подходящие стратегии: %s", suitable_strategies)
 
             # 4. Ищем лучший сценарий
             best_match = self._find_best_scenario(
@@ -182,15 +203,8 @@ class EnhancedScenarioMatcher:
 
 
     def _get_suitable_strategies(self, market_regime: str) -> List[str]:
-        """Получить подходящие стратегии для режима"""
-        selector = self.strategies.get("strategy_selector", {})
-        regime_map = selector.get("market_regime", {})
-        all_weather = selector.get("all_weather", [])
-
-        strategies = regime_map.get(market_regime, [])
-        strategies.extend(all_weather)
-
-        return list(set(strategies))  # Убираем дубликаты
+        """Получить подходящие стратегии для режима (режим в любом регистре)"""
+        return list(self._strategies_by_regime.get(market_regime.lower(), self._all_weather))
 
 
     def _find_best_scenario(
@@ -292,7 +306,7 @@ class EnhancedScenarioMatcher:
             return False
 
         except Exception as e:
-            logger.debug(f"⚠️ Ошибка проверки условия '{condition}': {e}")
+            logger.debug("⚠️ Ошибка проверки условия '%s': %s", condition, e)
             return False
 
 
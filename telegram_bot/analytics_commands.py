@@ -10,6 +10,7 @@ from telegram.ext import ContextTypes
 
 from analytics.signal_analytics import SignalAnalytics
 from config.settings import logger
+from utils.performance import run_blocking
 
 
 class AnalyticsCommands:
@@ -40,8 +41,8 @@ class AnalyticsCommands:
                 except:
                     days = 30
 
-            # Получаем статистику
-            stats = self.analytics.get_overall_stats(days)
+            # Получаем статистику (дневной rollup, вне event loop)
+            stats = await run_blocking(self.analytics.get_overall_stats, days)
 
             if stats["total_signals"] == 0:
                 await update.message.reply_text(
@@ -103,7 +104,7 @@ class AnalyticsCommands:
                 except:
                     days = 30
 
-            stats = self.analytics.get_stats_by_scenario(days)
+            stats = await run_blocking(self.analytics.get_stats_by_scenario, days)
 
             if not stats:
                 await update.message.reply_text(
@@ -164,7 +165,7 @@ class AnalyticsCommands:
                 except:
                     days = 30
 
-            stats = self.analytics.get_stats_by_strategy(days)
+            stats = await run_blocking(self.analytics.get_stats_by_strategy, days)
 
             if not stats:
                 await update.message.reply_text(
@@ -232,7 +233,7 @@ class AnalyticsCommands:
                 except:
                     days = 30
 
-            stats = self.analytics.get_stats_by_market_regime(days)
+            stats = await run_blocking(self.analytics.get_stats_by_market_regime, days)
 
             if not stats:
                 await update.message.reply_text(
@@ -302,7 +303,9 @@ class AnalyticsCommands:
                 except:
                     days = 30
 
-            top_scenarios = self.analytics.get_top_performing_scenarios(days, limit=5)
+            top_scenarios = await run_blocking(
+                self.analytics.get_top_performing_scenarios, days, limit=5
+            )
 
             if not top_scenarios:
                 await update.message.reply_text(
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Telegram Outbox - очередь исходящих сообщений
+Приоритеты, rate limiting (per-chat + global), RetryAfter и coalescing
+одинаковых алертов в одно сообщение
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from config.settings import logger
+from utils.metrics import get_metrics_registry
+from utils.rate_limiter import RateLimiter, ExponentialBackoff
+
+
+# Приоритеты (меньше = важнее)
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_MEDIUM = 2
+PRIORITY_LOW = 3
+
+PRIORITY_NAMES = {
+    "critical": PRIORITY_CRITICAL,
+    "high": PRIORITY_HIGH,
+    "medium": PRIORITY_MEDIUM,
+    "normal": PRIORITY_MEDIUM,
+    "low": PRIORITY_LOW,
+}
+
+
+def resolve_priority(priority: Union[str, int, None]) -> int:
+    """Привести приоритет (строка low/medium/high или число) к числу"""
+    if priority is None:
+        return PRIORITY_MEDIUM
+    if isinstance(priority, int):
+        return max(PRIORITY_CRITICAL, min(PRIORITY_LOW, priority))
+    return PRIORITY_NAMES.get(str(priority).lower(), PRIORITY_MEDIUM)
+
+
+@dataclass
+class OutboxMessage:
+    """Сообщение в очереди"""
+
+    key: str
+    chat_id: Union[int, str]
+    text: str
+    priority: int
+    parse_mode: Optional[str] = None
+    disable_web_page_preview: bool = True
+    enqueued_at: float = field(default_factory=time.monotonic)
+    coalesced: int = 1
+    attempts: int = 0
+
+    def render_text(self) -> str:
+        """Текст с пометкой о количестве объединённых алертов"""
+        if self.coalesced > 1:
+            return f"{self.text}\n\n🔁 ×{self.coalesced} за {self._age_text()}"
+        return self.text
+
+    def _age_text(self) -> str:
+        age = int(time.monotonic() - self.enqueued_at)
+        return f"{age}s" if age < 60 else f"{age // 60}m"
+
+
+class TelegramOutbox:
+    """
+    Единая очередь исходящих сообщений Telegram
+
+    Features:
+    - Приоритетная очередь (critical → low), FIFO внутри приоритета
+    - Coalescing: сообщения с одинаковым coalesce_key, ещё не отправленные,
+      заменяются последним текстом со счётчиком повторов
+    - Rate limits: global (30 msg/s) и per-chat (1 msg/s) через RateLimiter
+    - RetryAfter: пауза всего worker'а на указанное Telegram время
+    - Retry сетевых ошибок с exponential backoff
+    - Метрики глубины очереди и латентности доставки
+    """
+
+    def __init__(
+        self,
+        sender: Callable[..., Awaitable],
+        default_chat_id: Union[int, str, None] = None,
+        global_rate: int = 25,
+        per_chat_rate: int = 1,
+        max_queue_size: int = 1000,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            sender: Корутина отправки (обычно bot.send_message)
+            default_chat_id: Chat ID по умолчанию
+            global_rate: Максимум сообщений в секунду на бота
+            per_chat_rate: Максимум сообщений в секунду в один чат
+            max_queue_size: Лимит очереди (при переполнении отбрасываются LOW)
+            max_retries: Попыток на сообщение при сетевых ошибках
+        """
+        self.sender = sender
+        self.default_chat_id = default_chat_id
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+
+        self.global_limiter = RateLimiter(
+            requests_per_second=global_rate, burst_size=global_rate
+        )
+        self.chat_limiter = RateLimiter(
+            requests_per_second=per_chat_rate, burst_size=per_chat_rate
+        )
+
+        self._heap: List = []
+        self._pending: Dict[str, OutboxMessage] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._paused_until = 0.0
+        self._inflight: Optional[OutboxMessage] = None
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "retry_after": 0,
+        }
+
+        registry = get_metrics_registry()
+        self._queue_depth = registry.gauge(
+            "telegram_outbox_queue_depth", "Сообщений в очереди Telegram"
+        )
+        self._delivery_latency = registry.histogram(
+            "telegram_delivery_seconds",
+            "Время от постановки в очередь до доставки",
+            ("priority",),
+            buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+        )
+        self._events = registry.counter(
+            "telegram_outbox_events_total", "События Telegram outbox", ("event",)
+        )
+
+        logger.info(
+            f"✅ TelegramOutbox инициализирован: global={global_rate}/s, "
+            f"per_chat={per_chat_rate}/s, max_queue={max_queue_size}"
+        )
+
+    # ==================== ПУБЛИЧНЫЙ API ====================
+
+    def enqueue(
+        self,
+        text: str,
+        chat_id: Union[int, str, None] = None,
+        priority: Union[str, int, None] = PRIORITY_MEDIUM,
+        coalesce_key: Optional[str] = None,
+        parse_mode: Optional[str] = None,
+        disable_web_page_preview: bool = True,
+    ) -> bool:
+        """
+        Поставить сообщение в очередь (не блокирует)
+
+        Args:
+            text: Текст сообщения
+            chat_id: Получатель (по умолчанию default_chat_id)
+            priority: Приоритет (строка или PRIORITY_*)
+            coalesce_key: Ключ объединения (например "l2_imbalance:BTCUSDT")
+            parse_mode: Parse mode Telegram
+            disable_web_page_preview: Отключить превью ссылок
+
+        Returns:
+            True если сообщение принято (или объединено с ожидающим)
+        """
+        chat_id = chat_id if chat_id is not None else self.default_chat_id
+        if chat_id is None:
+            logger.warning("⚠️ TelegramOutbox: chat_id не задан, сообщение пропущено")
+            return False
+
+        priority = resolve_priority(priority)
+
+        if coalesce_key is not None:
+            key = f"{chat_id}:{coalesce_key}"
+            pending = self._pending.get(key)
+            if pending is not None:
+                # Объединяем: последний текст, максимальный приоритет
+                pending.text = text
+                pending.parse_mode = parse_mode
+                pending.coalesced += 1
+                if priority < pending.priority:
+                    pending.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), key))
+                self.stats["coalesced"] += 1
+                self._events.labels("coalesced").inc()
+                return True
+        else:
+            key = f"msg:{next(self._seq)}"
+
+        if len(self._pending) >= self.max_queue_size and not self._drop_lowest(priority):
+            self.stats["dropped"] += 1
+            self._events.labels("dropped").inc()
+            logger.warning(f"⚠️ TelegramOutbox переполнен, сообщение отброшено")
+            return False
+
+        message = OutboxMessage(
+            key=key,
+            chat_id=chat_id,
+            text=text,
+            priority=priority,
+            parse_mode=parse_mode,
+            disable_web_page_preview=disable_web_page_preview,
+        )
+        self._pending[key] = message
+        heapq.heappush(self._heap, (priority, next(self._seq), key))
+
+        self.stats["enqueued"] += 1
+        self._queue_depth.set(len(self._pending))
+        self._wakeup.set()
+        return True
+
+    async def start(self):
+        """Запуск worker'а"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._task = asyncio.create_task(self._worker())
+        logger.info("🚀 TelegramOutbox worker запущен")
+
+    async def stop(self, flush_timeout: float = 5.0):
+        """
+        Остановка worker'а с попыткой дослать очередь
+
+        Args:
+            flush_timeout: Сколько секунд ждать опустошения очереди
+        """
+        if not self.is_running:
+            return
+
+        deadline = time.monotonic() + flush_timeout
+        while (self._pending or self._inflight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        self.is_running = False
+        self._wakeup.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        if self._pending:
+            logger.warning(f"⚠️ TelegramOutbox: {len(self._pending)} сообщений не отправлено")
+        logger.info("🛑 TelegramOutbox остановлен")
+
+    def queue_depth(self) -> int:
+        """Текущая глубина очереди"""
+        return len(self._pending)
+
+    def get_stats(self) -> Dict:
+        """Статистика outbox"""
+        return {
+            **self.stats,
+            "queue_depth": len(self._pending),
+            "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+        }
+
+    # ==================== WORKER ====================
+
+    def _pop_next(self) -> Optional[OutboxMessage]:
+        """Следующее сообщение по приоритету (устаревшие записи heap пропускаются)"""
+        while self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            message = self._pending.get(key)
+            # Запись устарела: сообщение уже отправлено или повышен приоритет
+            if message is None or message.priority != priority:
+                continue
+            del self._pending[key]
+            return message
+        return None
+
+    def _requeue_front(self, message: OutboxMessage):
+        """Вернуть сообщение в начало своей приоритетной группы"""
+        existing = self._pending.get(message.key)
+        if existing is not None:
+            # Пока отправляли — пришёл новый алерт с тем же ключом
+            existing.coalesced += message.coalesced
+            existing.enqueued_at = min(existing.enqueued_at, message.enqueued_at)
+            return
+        self._pending[message.key] = message
+        heapq.heappush(self._heap, (message.priority, -next(self._seq), message.key))
+
+    def _drop_lowest(self, incoming_priority: int) -> bool:
+        """Освободить место, выбросив самое старое сообщение с низшим приоритетом"""
+        victim = None
+        for message in self._pending.values():
+            if message.priority <= incoming_priority:
+                continue
+            if victim is None or message.priority > victim.priority:
+                victim = message
+        if victim is None:
+            return False
+        del self._pending[victim.key]
+        self.stats["dropped"] += 1
+        self._events.labels("dropped").inc()
+        return True
+
+    async def _worker(self):
+        """Цикл доставки"""
+        try:
+            while self.is_running:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+
+                message = self._pop_next()
+                if message is None:
+                    self._wakeup.clear()
+                    self._queue_depth.set(0)
+                    await self._wakeup.wait()
+                    continue
+
+                self._queue_depth.set(len(self._pending))
+                self._inflight = message
+                try:
+                    await self._deliver(message)
+                finally:
+                    self._inflight = None
+
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"❌ TelegramOutbox worker error: {e}", exc_info=True)
+            self.is_running = False
+
+    async def _deliver(self, message: OutboxMessage):
+        """Отправка одного сообщения с обработкой ошибок Telegram"""
+        from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+        await self.global_limiter.acquire("global")
+        await self.chat_limiter.acquire(str(message.chat_id))
+
+        message.attempts += 1
+        try:
+            await self.sender(
+                chat_id=message.chat_id,
+                text=message.render_text(),
+                parse_mode=message.parse_mode,
+                disable_web_page_preview=message.disable_web_page_preview,
+            )
+            self.stats["sent"] += 1
+            self._events.labels("sent").inc()
+            self._delivery_latency.labels(message.priority).observe(
+                time.monotonic() - message.enqueued_at
+            )
+
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            self._paused_until = time.monotonic() + float(retry_after)
+            self.stats["retry_after"] += 1
+            self._events.labels("retry_after").inc()
+            logger.warning(f"⏸️ Telegram flood control: пауза {retry_after}s")
+            message.attempts -= 1  # Flood control — не ошибка сообщения
+            self._requeue_front(message)
+
+        except BadRequest as e:
+            # Чаще всего — ошибка разметки: повторяем как обычный текст
+            if message.parse_mode and "parse" in str(e).lower():
+                logger.warning(f"⚠️ Telegram BadRequest ({e}), повтор без parse_mode")
+                message.parse_mode = None
+                self._requeue_front(message)
+            else:
+                self._fail(message, e)
+
+        except (TimedOut, NetworkError) as e:
+            if message.attempts < self.max_retries:
+                backoff = ExponentialBackoff(base_delay=1.0, max_delay=30.0)
+                backoff.attempt = message.attempts - 1
+                delay = backoff.get_delay()
+                logger.warning(
+                    f"⚠️ Telegram network error ({e}), повтор через {delay:.1f}s"
+                )
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self._requeue_front(message)
+            else:
+                self._fail(message, e)
+
+        except Exception as e:
+            self._fail(message, e)
+
+    def _fail(self, message: OutboxMessage, error: Exception):
+        self.stats["failed"] += 1
+        self._events.labels("failed").inc()
+        logger.error(
+            f"❌ TelegramOutbox: сообщение не доставлено после "
+            f"{message.attempts} попыток: {error}"
+        )
+
+
+# Экспорт
+__all__ = [
+    "TelegramOutbox",
+    "OutboxMessage",
+    "resolve_priority",
+    "PRIORITY_CRITICAL",
+    "PRIORITY_HIGH",
+    "PRIORITY_MEDIUM",
+    "PRIORITY_LOW",
+]
@@ -514,7 +514,7 @@ class ROITracker:
                     f"   • Сделка успешна! 🎉"
                 )
 
-            await self.telegram.send_alert(message)
+            await self.telegram.send_alert(message, priority="high")
             logger.info(
                 f"✅ Отправлено Telegram уведомление {tp_level.upper()} для {metrics.symbol}"
             )
@@ -542,7 +542,7 @@ class ROITracker:
                 f"   • Ждём новую возможность"
             )
 
-            await self.telegram.send_alert(message)
+            await self.telegram.send_alert(message, priority="high")
             logger.info(f"✅ Отправлено Telegram уведомление STOP для {metrics.symbol}")
         except Exception as e:
             logger.error(f"❌ Ошибка отправки Telegram уведомления STOP: {e}")
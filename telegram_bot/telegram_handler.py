@@ -29,6 +29,9 @@ import sqlite3
 from handlers.support_resistance_detector import AdvancedSupportResistanceDetector
 
 from telegram.request import HTTPXRequest
+from telegram_bot.outbox import TelegramOutbox, PRIORITY_HIGH
+from utils.http_transport import get_http_transport
+from utils.loop_monitor import get_loop_monitor
 from ai.gemini_interpreter import GeminiInterpreter
 
 from analytics.news_sentiment import NewsSentimentAnalyzer
@@ -45,6 +48,7 @@ class TelegramBotHandler:
         self.enabled = TELEGRAM_CONFIG.get("enabled", False)
         self.auto_signals = TELEGRAM_CONFIG.get("auto_signals", True)
         self.application = None
+        self.outbox: Optional[TelegramOutbox] = None
         self.is_running = False
         self.gio_dashboard = GIODashboardHandler(bot_instance)
         self.db_path = os.path.join(DATA_DIR, "gio_crypto_bot.db")
@@ -132,6 +136,15 @@ class TelegramBotHandler:
                 Application.builder().token(self.token).request(request).build()
             )
 
+            # Все исходящие сообщения идут через очередь с rate limiting
+            self.outbox = TelegramOutbox(
+                sender=self.application.bot.send_message,
+                default_chat_id=self.chat_id,
+                global_rate=TELEGRAM_CONFIG.get("outbox_global_rate", 25),
+                per_chat_rate=TELEGRAM_CONFIG.get("outbox_per_chat_rate", 1),
+                max_queue_size=TELEGRAM_CONFIG.get("outbox_max_queue", 1000),
+            )
+
             # Регистрируем все команды
             self.application.add_handler(CommandHandler("start", self.cmd_start))
             self.application.add_handler(CommandHandler("help", self.cmd_help))
@@ -273,6 +286,7 @@ class TelegramBotHandler:
         try:
             await self.application.initialize()
             await self.application.start()
+            await self.outbox.start()
 
             # Отправляем приветственное сообщение
             await self.send_message(
@@ -306,6 +320,11 @@ class TelegramBotHandler:
             return
 
         try:
+            await self.unified_dashboard_handler.publisher.stop()
+
+            if self.outbox:
+                await self.outbox.stop()
+
             if self.application and self.application.updater:
                 await self.application.updater.stop()
 
@@ -318,16 +337,23 @@ class TelegramBotHandler:
         except Exception as e:
             logger.error(f"❌ Ошибка остановки: {e}")
 
-    async def send_alert(self, message: str, priority: str = "medium"):
+    async def send_alert(
+        self,
+        message: str,
+        priority: str = "medium",
+        coalesce_key: Optional[str] = None,
+    ):
         """
-        Отправка алерта в Telegram
+        Отправка алерта в Telegram (через outbox, не блокирует)
 
         Args:
             message: Текст сообщения
             priority: Приоритет (low, medium, high)
+            coalesce_key: Ключ объединения повторяющихся алертов
+                (например "l2_imbalance:BTCUSDT")
         """
         try:
-            if not self.enabled or not self.chat_id:
+            if not self.enabled or not self.chat_id or not self.outbox:
                 logger.warning("⚠️ Telegram bot не настроен для алертов")
                 return
 
@@ -337,32 +363,78 @@ class TelegramBotHandler:
             emoji = priority_emoji.get(priority, "📢")
             formatted_message = f"{emoji} {message}"
 
-            await self.application.bot.send_message(
-                chat_id=self.chat_id,  # ← ИСПРАВЛЕНО!
-                text=formatted_message,
-                parse_mode=None,  # Без HTML, чтобы избежать проблем с символами
-            )
-
-            logger.info(f"✅ Алерт отправлен в Telegram (приоритет: {priority})")
+            # Без parse_mode, чтобы избежать проблем с символами
+            if self.outbox.enqueue(
+                formatted_message,
+                priority=priority,
+                coalesce_key=coalesce_key,
+            ):
+                logger.debug(f"📤 Алерт поставлен в очередь (приоритет: {priority})")
 
         except Exception as e:
             logger.error(f"❌ Ошибка отправки алерта: {e}")
 
-    async def send_message(self, text: str, parse_mode: str = ParseMode.MARKDOWN):
-        """Отправка сообщения в Telegram"""
-        if not self.enabled or not self.application:
+    async def send_message(
+        self,
+        text: str,
+        parse_mode: str = ParseMode.MARKDOWN,
+        priority: str = "medium",
+        coalesce_key: Optional[str] = None,
+    ):
+        """Отправка сообщения в Telegram (через outbox)"""
+        if not self.enabled or not self.outbox:
             return
 
         try:
-            await self.application.bot.send_message(
-                chat_id=self.chat_id,
-                text=text,
+            self.outbox.enqueue(
+                text,
+                priority=priority,
+                coalesce_key=coalesce_key,
                 parse_mode=parse_mode,
                 disable_web_page_preview=True,
             )
         except Exception as e:
             logger.error(f"❌ Ошибка отправки: {e}")
 
+    async def notify_new_signal(self, signal: Dict):
+        """
+        Уведомление о новом торговом сигнале (высокий приоритет)
+
+        Args:
+            signal: Dict сигнала (symbol, direction, entry_price, tp1-3, stop_loss, ...)
+        """
+        if not self.enabled or not self.auto_signals or not self.outbox:
+            return
+
+        try:
+            symbol = signal.get("symbol", "N/A")
+            direction = str(signal.get("direction", "")).upper()
+            direction_emoji = "🟢" if direction in ("LONG", "BUY") else "🔴"
+
+            lines = [
+                f"{direction_emoji} НОВЫЙ СИГНАЛ #{signal.get('id', '—')}",
+                f"{symbol} {direction}",
+                "",
+                f"Entry: {signal.get('entry_price', 0)}",
+                f"SL: {signal.get('stop_loss', 0)}",
+            ]
+            for tp in ("tp1", "tp2", "tp3"):
+                if signal.get(tp):
+                    lines.append(f"{tp.upper()}: {signal[tp]}")
+            lines.append("")
+            lines.append(
+                f"Quality: {signal.get('quality_score', 0):.1f} | "
+                f"R:R: {signal.get('risk_reward', 0):.2f}"
+            )
+
+            self.outbox.enqueue(
+                "\n".join(lines),
+                priority=PRIORITY_HIGH,
+                coalesce_key=f"signal:{symbol}:{direction}",
+            )
+        except Exception as e:
+            logger.error(f"❌ Ошибка уведомления о сигнале: {e}")
+
     # ==================== ОСНОВНЫЕ КОМАНДЫ ====================
 
     async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -701,6 +773,21 @@ class TelegramBotHandler:
                         count += 1
                 text += "\n"
 
+            # Память по компонентам (кэши/буферы)
+            try:
+                from utils.memory_manager import get_memory_manager
+
+                text += get_memory_manager().format_component_report() + "\n\n"
+            except Exception as e:
+                logger.warning(f"⚠️ Memory report недоступен: {e}")
+
+            rest = get_http_transport().get_totals()
+            text += (
+                f"🌐 REST: {rest['requests']:.0f} запросов, "
+                f"ошибок {rest['errors']:.0f}, повторов {rest['retries']:.0f}\n"
+            )
+            text += get_loop_monitor().format_report() + "\n\n"
+
             text += (
                 f"🔄 *Бот:* ✅ Работает\n"
                 f"📱 *Telegram:* ✅ Подключен\n"
@@ -778,20 +865,18 @@ class TelegramBotHandler:
             binance_low = 0
 
             try:
-                import aiohttp
-
-                async with aiohttp.ClientSession() as session:
-                    url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}"
-                    async with session.get(url) as resp:
-                        if resp.status == 200:
-                            binance_data = await resp.json()
-                            binance_price = float(binance_data.get("lastPrice", 0))
-                            binance_change = float(
-                                binance_data.get("priceChangePercent", 0)
-                            )
-                            binance_high = float(binance_data.get("highPrice", 0))
-                            binance_low = float(binance_data.get("lowPrice", 0))
-                            binance_volume = float(binance_data.get("volume", 0))
+                binance_data = await get_http_transport().get_json(
+                    "https://api.binance.com/api/v3/ticker/24hr",
+                    params={"symbol": symbol},
+                )
+                if binance_data:
+                    binance_price = float(binance_data.get("lastPrice", 0))
+                    binance_change = float(
+                        binance_data.get("priceChangePercent", 0)
+                    )
+                    binance_high = float(binance_data.get("highPrice", 0))
+                    binance_low = float(binance_data.get("lowPrice", 0))
+                    binance_volume = float(binance_data.get("volume", 0))
             except Exception as e:
                 pass
 
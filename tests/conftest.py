@@ -6,6 +6,7 @@
 
 import pytest
 import asyncio
+import os
 import sys
 from pathlib import Path
 
@@ -13,6 +14,21 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
+def pytest_configure(config):
+    """Маркер benchmark: замеры скорости не входят в обычный прогон"""
+    config.addinivalue_line("markers", "benchmark: замер производительности (запуск: RUN_BENCHMARKS=1)")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Пропустить benchmark-тесты, если не задан RUN_BENCHMARKS=1"""
+    if os.environ.get("RUN_BENCHMARKS") == "1":
+        return
+    skip = pytest.mark.skip(reason="benchmark: запуск с RUN_BENCHMARKS=1")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Фикстура для event loop"""
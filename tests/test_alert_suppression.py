@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для AlertSuppressionIndex
+Cooldown по типу и bucket, лимит в минуту, сохранение между рестартами,
+общий индекс в PremiumAlertSystem / EnhancedAlertsSystem / AlertSystem
+"""
+
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import core.alert_suppression as alert_suppression
+from core.alert_suppression import AlertSuppressionIndex
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """Общий индекс без файла состояния"""
+    suppression = AlertSuppressionIndex(state_path="")
+    monkeypatch.setattr(alert_suppression, "_global_alert_suppression", suppression)
+    return suppression
+
+
+class TestSuppression:
+    """Cooldown и лимит"""
+
+    def test_cooldown_per_type_and_bucket(self, index):
+        """Тест: повтор в пределах cooldown типа подавлен, другой bucket — нет"""
+        assert index.acquire("Liquidation", "BTCUSDT", now=0.0)
+        assert not index.acquire("liquidation", "BTCUSDT", now=30.0)
+        assert index.remaining("liquidation", "BTCUSDT", now=30.0) == pytest.approx(30.0)
+        assert index.acquire("liquidation", "ETHUSDT", now=30.0)
+        assert index.acquire("liquidation", "BTCUSDT", now=60.0)
+
+        assert index.acquire("orderbook_imbalance", "BTCUSDT", "bullish", now=0.0)
+        assert index.acquire("orderbook_imbalance", "BTCUSDT", "bearish", now=1.0)
+        assert not index.acquire("orderbook_imbalance", "BTCUSDT", "bullish", now=299.0)
+        assert index.stats["suppressed_cooldown"] == 2
+
+    def test_rate_cap_and_release(self, index):
+        """Тест: не больше max_per_minute алертов в минуту, release освобождает слот"""
+        index.max_per_minute = 3
+        assert all(index.acquire("volume_spike", f"S{i}", now=float(i)) for i in range(3))
+        assert not index.acquire("volume_spike", "S3", now=10.0)
+        assert index.stats["suppressed_rate"] == 1
+
+        index.release("volume_spike", "S2")
+        assert index.acquire("volume_spike", "S3", now=10.0)
+        assert index.acquire("volume_spike", "S4", now=60.5)
+
+    def test_state_survives_restart(self, tmp_path):
+        """Тест: после рестарта активные cooldown восстанавливаются, истёкшие — нет"""
+        path = str(tmp_path / "alerts.json")
+        first = AlertSuppressionIndex(state_path=path)
+        now = time.monotonic()
+        first.acquire("mm_scenario", "BTCUSDT", now=now)
+        first.acquire("liquidation", "ETHUSDT", now=now - 120)
+        first.flush()
+
+        restarted = AlertSuppressionIndex(state_path=path)
+        assert restarted.stats["restored"] == 1
+        assert not restarted.acquire("mm_scenario", "BTCUSDT")
+        assert restarted.remaining("mm_scenario", "BTCUSDT") == pytest.approx(600, abs=1)
+        assert restarted.acquire("liquidation", "ETHUSDT")
+        assert restarted.get_stats()["last_minute"] == 2
+
+    def test_custom_cooldown_kept_with_key(self, tmp_path):
+        """Тест: cooldown из acquire хранится с ключом — очистка и рестарт его не укорачивают"""
+        path = str(tmp_path / "alerts.json")
+        first = AlertSuppressionIndex(state_path=path)
+        now = time.monotonic()
+        first.acquire("liquidation", "BTCUSDT", cooldown=1200, now=now - 300)
+        first.save(now)  # cooldown типа (60 сек) уже прошёл
+        assert first.remaining("liquidation", "BTCUSDT", now=now) == pytest.approx(900)
+
+        restarted = AlertSuppressionIndex(state_path=path)
+        assert restarted.stats["restored"] == 1
+        assert restarted.remaining("liquidation", "BTCUSDT") == pytest.approx(900, abs=1)
+
+    def test_prune_without_state_file(self, index):
+        """Тест: истёкшие ключи удаляются и без файла состояния"""
+        index.max_per_minute = 10**9
+        index._last_save = 0.0
+        for i in range(100):
+            index.acquire("liquidation", f"S{i}", now=0.0)
+        index.acquire("liquidation", "LAST", now=index.save_interval + 60.0)
+        assert list(index._last_fire) == [("liquidation", "LAST", "")]
+
+    @pytest.mark.asyncio
+    async def test_periodic_save_off_loop(self, tmp_path, monkeypatch):
+        """Тест: периодическое сохранение из цикла уходит в executor"""
+        path = str(tmp_path / "alerts.json")
+        suppression = AlertSuppressionIndex(state_path=path)
+        submitted = []
+
+        def nowait(func, *args):
+            submitted.append(func)
+            return func(*args)
+
+        monkeypatch.setattr(alert_suppression, "run_blocking_nowait", nowait)
+        now = time.monotonic()
+        suppression.acquire("mm_scenario", "BTCUSDT", now=now + suppression.save_interval)
+        assert submitted == [suppression._write_state]
+        assert AlertSuppressionIndex(state_path=path).stats["restored"] == 1
+
+
+class TestAlertSystems:
+    """Алерт-системы через общий индекс"""
+
+    def test_premium_duplicates(self, index):
+        """Тест: PremiumAlertSystem подавляет type + symbol на 5 минут"""
+        from core.premium_alerts import PremiumAlertSystem
+
+        premium = PremiumAlertSystem()
+        alert = {"type": "whale_liquidation", "symbol": "BTCUSDT"}
+        assert not premium._is_duplicate_alert(alert)
+        assert premium._is_duplicate_alert(alert)
+        assert not premium._is_duplicate_alert({**alert, "symbol": "ETHUSDT"})
+
+    @pytest.mark.asyncio
+    async def test_enhanced_and_core_share_index(self, index):
+        """Тест: неотправленный L2 алерт не занимает cooldown; AlertSystem режет дубли"""
+        from alerts.enhanced_alerts_system import EnhancedAlertsSystem
+        from core.alerts import AlertSystem
+
+        enhanced = EnhancedAlertsSystem(bot_instance=SimpleNamespace(market_data={}))
+        sent = []
+
+        async def send_alert(alert_type, message, priority="medium", symbol=None):
+            sent.append(symbol)
+            return len(sent) > 1
+
+        enhanced.send_alert = send_alert
+        assert not await enhanced.check_l2_imbalance("BTCUSDT", 90.0, 95.0, 5.0)
+        assert await enhanced.check_l2_imbalance("BTCUSDT", 90.0, 95.0, 5.0)
+        assert not await enhanced.check_l2_imbalance("BTCUSDT", 90.0, 95.0, 5.0)
+        assert len(sent) == 2 and enhanced.alert_stats["blocked_by_cooldown"] == 1
+        assert index.remaining("l2_imbalance", "BTCUSDT") > 0
+
+        system = AlertSystem()
+        market_data = {"bid_volume": 300.0, "ask_volume": 100.0}
+        first = await system.check_all_alerts("BTCUSDT", market_data)
+        assert [a["type"] for a in first] == ["orderbook_imbalance"]
+        assert await system.check_all_alerts("BTCUSDT", market_data) == []
+
+
+class TestSuppressionBenchmark:
+    """Индекс против скана deque с fromisoformat"""
+
+    @pytest.mark.benchmark
+    def test_index_vs_deque_scan(self, index):
+        """Тест: проверка по индексу быстрее прохода по последним 100 алертам"""
+        symbols = [f"SYM{i}USDT" for i in range(200)]
+        recent = deque(
+            ({"type": "volume_spike", "symbol": s, "timestamp": datetime.now().isoformat()} for s in symbols[:100]),
+            maxlen=100,
+        )
+        index.max_per_minute = 10**9
+
+        start = time.perf_counter()
+        for i in range(20_000):
+            symbol = symbols[i % 200]
+            cutoff = datetime.now() - timedelta(minutes=5)
+            any(
+                a["type"] == "volume_spike" and a["symbol"] == symbol
+                and datetime.fromisoformat(a["timestamp"]) > cutoff
+                for a in recent
+            )
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for i in range(20_000):
+            index.acquire("volume_spike", symbols[i % 200], now=float(i))
+        index_ms = (time.perf_counter() - start) * 1000
+
+        assert index_ms < scan_ms
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для ClusterDetector
+Кольцевые буферы L2 дисбалансов (стрики на append) и POC
+(бегущее среднее) против пересборки списков
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from analytics.cluster_detector import ClusterDetector, ImbalanceRing, PocRing
+
+
+def trailing_streak(values, threshold, buy: bool) -> int:
+    """Эталон: длина текущей серии с конца списка"""
+    streak = 0
+    for value in reversed(values):
+        if (value > threshold) if buy else (value < -threshold):
+            streak += 1
+        else:
+            break
+    return streak
+
+
+class TestImbalanceRing:
+    """Кольцевой буфер дисбалансов"""
+
+    def test_streaks_match_scan(self):
+        """Тест: стрики на append совпадают с проходом по истории"""
+        rng = np.random.default_rng(0)
+        values = np.clip(rng.normal(0, 0.6, 3_000), -1, 1)
+        ring = ImbalanceRing(capacity=100)
+
+        for i, value in enumerate(values):
+            ring.append(value, timestamp=float(i))
+            history = values[: i + 1]
+            assert ring.buy_streak == trailing_streak(history, 0.6, True)
+            assert ring.sell_streak == trailing_streak(history, 0.6, False)
+
+        assert len(ring) == 100
+        assert np.array_equal(ring.last(10), values[-10:])
+        assert ring.latest == values[-1]
+        assert ring.timestamps[(ring.head - 1) % 100] == len(values) - 1
+
+    def test_streak_longer_than_capacity(self):
+        """Тест: серия длиннее буфера не обрезается"""
+        ring = ImbalanceRing(capacity=4)
+        for _ in range(10):
+            ring.append(0.9)
+        assert ring.streak("LONG") == 10 and ring.streak("SELL") == 0
+        ring.append(0.1)
+        assert ring.streak("BUY") == 0
+
+
+class TestPocRing:
+    """Бегущее среднее предыдущих POC"""
+
+    def test_shift_matches_mean(self):
+        """Тест: смещение от среднего 5 предыдущих POC, повтор POC не пишется"""
+        rng = np.random.default_rng(1)
+        pocs = 60_000 + np.cumsum(rng.normal(0, 50, 200))
+        ring = PocRing(capacity=20, window=5)
+
+        for i, poc in enumerate(pocs):
+            shift = ring.push(poc)
+            if i >= 5:
+                mean = np.mean(pocs[i - 5:i])
+                assert shift == pytest.approx((poc - mean) / mean * 100)
+        assert ring.ready and len(ring) == 20
+
+        assert ring.push(pocs[-1]) == shift
+        assert len(ring) == 20 and ring.latest == pocs[-1]
+
+
+class TestClusterScore:
+    """Score по буферам бота"""
+
+    @pytest.mark.asyncio
+    async def test_stacked_and_poc_score(self):
+        """Тест: стрик ≥ 3 и POC shift в сторону сделки дают score"""
+        ring = ImbalanceRing()
+        for value in (0.7, 0.8, 0.9, 0.75):
+            ring.append(value)
+        bot = SimpleNamespace(l2_imbalances={"BTCUSDT": ring}, exocharts_data={}, large_trades={})
+        detector = ClusterDetector(bot)
+
+        assert await detector.detect_stacked_imbalances("BTCUSDT", "LONG") == 4
+        assert await detector.detect_stacked_imbalances("BTCUSDT", "SHORT") == 0
+        assert await detector.detect_stacked_imbalances("ETHUSDT", "LONG") == 0
+
+        for poc in (100.0, 100.1, 99.9, 100.0, 100.2, 102.0):
+            bot.exocharts_data["BTCUSDT"] = {"poc": poc}
+            shift = await detector.detect_poc_shift("BTCUSDT")
+        assert shift["shifted"] and shift["direction"] == "up"
+        # Повторный запрос на том же тике — то же смещение
+        assert await detector.detect_poc_shift("BTCUSDT") == shift
+
+        scores = await detector.get_cluster_scores("LONG")
+        assert set(scores) == {"BTCUSDT"}
+        assert scores["BTCUSDT"] == pytest.approx(4 / 5 * 0.4 + shift["magnitude"] / 2 * 0.3)
+
+    @pytest.mark.asyncio
+    async def test_bot_rings_per_symbol(self):
+        """Тест: Bybit стаканы двух символов — отдельные кольца, score по обоим"""
+        from core.bot import GIOCryptoBot
+
+        bot = GIOCryptoBot()
+        bot.veto_system = bot.cross_validator = None
+        bot.l2_imbalances = {}
+        bot.cluster_detector = ClusterDetector(bot)
+        for _ in range(4):
+            await bot.handle_bybit_orderbook(
+                {"symbol": "BTCUSDT", "bids": [[60_000.0, 9.0]], "asks": [[60_000.1, 1.0]]}
+            )
+            await bot.handle_bybit_orderbook(
+                {"symbol": "ETHUSDT", "bids": [[3_000.0, 1.0]], "asks": [[3_000.1, 9.0]]}
+            )
+
+        rings = bot.l2_imbalances
+        assert set(rings) == {"BTCUSDT", "ETHUSDT"}
+        assert rings["BTCUSDT"].buy_streak == 4 and rings["BTCUSDT"].sell_streak == 0
+        assert rings["ETHUSDT"].sell_streak == 4 and len(rings["ETHUSDT"]) == 4
+        assert bot.market_data["ETHUSDT"].orderbook_imbalance == pytest.approx(-0.8)
+
+        scores = await bot.cluster_detector.get_cluster_scores("LONG")
+        assert set(scores) == {"BTCUSDT", "ETHUSDT"}
+        assert scores["BTCUSDT"] > 0 and scores["ETHUSDT"] == 0
+
+
+class TestClusterBenchmark:
+    """Кольцевой буфер против списка словарей"""
+
+    @pytest.mark.benchmark
+    def test_ring_vs_list(self):
+        """Тест: append + стрик по буферу быстрее append/slice списка и обхода"""
+        rng = np.random.default_rng(2)
+        values = np.clip(rng.normal(0, 0.6, 20_000), -1, 1).tolist()
+
+        start = time.perf_counter()
+        history = []
+        for value in values:
+            history.append({"imbalance": value, "timestamp": 0.0, "direction": "BUY"})
+            if len(history) > 100:
+                history = history[-100:]
+            trailing_streak([h.get("imbalance", 0) for h in history[-10:]], 0.6, True)
+        list_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        ring = ImbalanceRing(capacity=100)
+        for value in values:
+            ring.append(value, 0.0)
+            ring.streak("BUY")
+        ring_ms = (time.perf_counter() - start) * 1000
+
+        assert ring_ms < list_ms
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для CrossExchangeValidator
+Rolling min / max, средние и корреляция объёмов на общей сетке против
+пересчёта по кольцу, детекторы аномалий, проверка на каждом обновлении
+"""
+
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from analytics.cross_exchange_validator import (
+    AnomalyType,
+    CrossExchangeValidator,
+    ExchangePanel,
+    PriceData,
+    ValidationStatus,
+)
+
+
+NOW = 1_700_000_000_000
+EXCHANGES = ["Bybit", "Binance", "OKX"]
+TRADE_SYMBOLS = (("bybit", "BTCUSDT"), ("binance", "BTCUSDT"), ("okx", "BTC-USDT"), ("coinbase", "BTC-USD"))
+
+
+def brute_force(panel: ExchangePanel, col: int):
+    """Эталон по кольцу: max / min цены, средний объём закрытых слотов"""
+    open_pos = panel.head % panel.size
+    closed = [pos for pos in range(panel.size) if pos != open_pos]
+    prices = panel.price[col]
+    volumes = panel.volume[col, closed]
+    return np.nanmax(prices), np.nanmin(prices), np.nanmean(volumes)
+
+
+def brute_correlation(panel: ExchangePanel, min_points: int):
+    open_pos = panel.head % panel.size
+    closed = [pos for pos in range(panel.size) if pos != open_pos]
+    values = []
+    count = len(panel.exchanges)
+    for i in range(count):
+        for j in range(i + 1, count):
+            x, y = panel.volume[i, closed], panel.volume[j, closed]
+            mask = (x > 0) & (y > 0)
+            if mask.sum() >= min_points and np.log(x[mask]).std() > 1e-6 and np.log(y[mask]).std() > 1e-6:
+                values.append(np.corrcoef(np.log(x[mask]), np.log(y[mask]))[0, 1])
+    return float(np.mean(values)) if values else None
+
+
+class TestExchangePanel:
+    """Rolling статистики на общей сетке"""
+
+    def test_rolling_stats_match_ring(self):
+        """Тест: max / min / средний объём / корреляция = пересчёт по окну"""
+        rng = np.random.default_rng(0)
+        panel = ExchangePanel(grid_ms=1000, window=30, max_exchanges=4)
+        base = np.cumsum(rng.normal(0, 0.5, 2_000)) + 100
+        ts = NOW
+        for step in range(2_000):
+            ts += int(rng.integers(50, 900))
+            if step == 1_200:
+                ts += 45_000  # разрыв длиннее окна
+            col = step % 3 if step < 300 else int(rng.integers(0, 3))
+            volume = float(1000 * np.exp(rng.normal(0, 0.2) + base[step] / 100))
+            panel.update(EXCHANGES[col], ts, base[step] * (1 + rng.normal(0, 1e-4)), volume, depth=float(rng.uniform(50, 150)))
+
+            if step % 97 == 0 and step > 100:
+                for c in range(3):
+                    peak, low, mean_volume = brute_force(panel, c)
+                    assert panel.rolling_max(c) == pytest.approx(peak)
+                    assert panel.rolling_min(c) == pytest.approx(low)
+                    current = panel.volume[c, panel.head % panel.size]
+                    assert panel.volume_ratio(c) == pytest.approx(current / mean_volume)
+                expected = brute_correlation(panel, 10)
+                assert panel.volume_correlation(10) == pytest.approx(expected, abs=1e-6)
+
+        assert panel.exchanges == EXCHANGES
+
+    def test_gap_fill_keeps_grid_aligned(self):
+        """Тест: пустые слоты заполняются последним значением биржи"""
+        panel = ExchangePanel(grid_ms=1000, window=10, max_exchanges=2)
+        panel.update("Bybit", NOW, 100.0, 10.0)
+        panel.update("Binance", NOW + 100, 101.0, 20.0)
+        panel.update("Bybit", NOW + 5_000, 90.0, 30.0)
+
+        assert panel.head == (NOW + 5_000) // 1000
+        assert panel.latest(1) == 101.0  # Binance перенесена в новый слот
+        assert panel.rolling_max(0) == 100.0 and panel.rolling_min(0) == 90.0
+        assert panel.volume_n[0] == 5 and panel.volume_ratio(0) == pytest.approx(3.0)
+        assert panel.column("C") is None and not panel.update("C", NOW, 1.0)
+
+
+class TestDetectors:
+    """Аномалии по рядам"""
+
+    def test_flash_crash_and_liquidity_drain(self):
+        """Тест: просадка от rolling max и уход глубины на 2 биржах"""
+        validator = CrossExchangeValidator(config={"window_slots": 60})
+        ts = NOW
+        for i in range(40):
+            ts += 1000
+            for exchange in ("Bybit", "Binance"):
+                validator.on_book("BTCUSDT", exchange, 60_000.0, 60_001.0, depth=100.0, ts_ms=ts)
+
+        ts += 1000
+        first = validator.on_book("BTCUSDT", "Bybit", 57_500.0, 57_501.0, depth=30.0, ts_ms=ts)
+        assert AnomalyType.FLASH_CRASH not in first  # пока только одна биржа
+        new = validator.on_book("BTCUSDT", "Binance", 57_600.0, 57_601.0, depth=40.0, ts_ms=ts)
+        assert {AnomalyType.FLASH_CRASH, AnomalyType.LIQUIDITY_DRAIN} <= set(new)
+
+        # Повторное обновление: аномалии уже активны, фронта нет
+        assert not validator.on_book("BTCUSDT", "Binance", 57_600.0, 57_601.0, depth=40.0, ts_ms=ts + 10)
+        kinds = [a["type"] for a in validator.detected_anomalies]
+        assert kinds.count(AnomalyType.FLASH_CRASH) == 1
+        crash = validator._flash_crash(*validator._fresh_columns("BTCUSDT", ts))
+        assert crash["price_changes"]["Bybit"] == pytest.approx(57_500.5 / 60_000.5 - 1)
+
+    @pytest.mark.asyncio
+    async def test_pump_and_validate_price(self):
+        """Тест: всплеск объёма + рост от rolling min — pump; validate_price совместим"""
+        validator = CrossExchangeValidator()
+        start = datetime.utcnow() - timedelta(seconds=60)
+        result = None
+        for i in range(60):
+            price = 100.0 if i < 55 else 100.0 * (1 + 0.015 * (i - 54))
+            volume = 1_000.0 if i < 59 else 10_000.0
+            prices = {
+                ex: PriceData(ex, "SOLUSDT", price * (1 + 0.0001 * k), start + timedelta(seconds=i), volume_24h=volume)
+                for k, ex in enumerate(EXCHANGES)
+            }
+            result = await validator.validate_price("SOLUSDT", prices)
+
+        assert result.status == ValidationStatus.VALID and result.exchanges_count == 3
+        assert result.price_deviation == pytest.approx(0.0002, rel=1e-3)
+        pump = validator._pump_dump(*validator._fresh_columns("SOLUSDT", int(time.time() * 1000)))
+        assert pump and pump["direction"] == "pump" and len(pump["exchanges"]) == 3
+        assert validator.get_best_price("SOLUSDT", "buy")[0] == "Bybit"
+        assert validator.get_best_price("SOLUSDT", "sell")[0] == "OKX"
+
+        single = await validator.validate_price("ETHUSDT", {"Bybit": prices["Bybit"]})
+        assert single.status == ValidationStatus.INSUFFICIENT_DATA
+
+
+class TestBotFeeds:
+    """Обработчики стаканов бота и сделки TradeBus → ряды панели"""
+
+    @pytest.mark.asyncio
+    async def test_handlers_feed_depth_and_volume(self, monkeypatch):
+        """Тест: все 4 биржи дают глубину из стакана и объём из сделок, drain ловится"""
+        import analytics.cross_exchange_validator as validator_module
+        from connectors.coinbase_connector import CoinbaseConnector
+        from connectors.okx_connector import OKXConnector
+        from core.bot import GIOCryptoBot
+        from core.trade_bus import TradeBus
+
+        clock = [NOW]
+        monkeypatch.setattr(validator_module, "current_epoch_ms", lambda: clock[0])
+        bot = GIOCryptoBot()
+        bot.cross_validator = CrossExchangeValidator(config={"window_slots": 30})
+        bot.l2_imbalances = {}
+        bot.okx_connector = OKXConnector(symbols=["BTC-USDT"], enable_websocket=False)
+        bot.coinbase_connector = CoinbaseConnector(symbols=["BTC-USD"], enable_websocket=False)
+        bus = TradeBus()
+        bus.subscribe("cross_exchange", bot.cross_validator.on_trades)
+
+        async def feed(qty: float, traded: float):
+            bids = [(60_000.0 - i, qty) for i in range(30)]
+            asks = [(60_001.0 + i, qty) for i in range(30)]
+            await bot.handle_bybit_orderbook({"symbol": "BTCUSDT", "bids": bids, "asks": asks})
+            await bot.handle_binance_orderbook("btcusdt", {"bids": bids, "asks": asks})
+            okx = {"bids": [(p, q, 1) for p, q in bids], "asks": [(p, q, 1) for p, q in asks],
+                   "timestamp": clock[0]}
+            bot.okx_connector.orderbooks["BTC-USDT"] = okx
+            await bot.handle_okx_orderbook("BTC-USDT", okx)
+            coinbase = {"bids": dict(bids), "asks": dict(asks), "timestamp": clock[0]}
+            bot.coinbase_connector.orderbooks["BTC-USD"] = coinbase
+            await bot.handle_coinbase_orderbook("BTC-USD", coinbase)
+            for exchange, symbol in TRADE_SYMBOLS:
+                bus.publish(exchange, symbol, clock[0], 60_000.0, traded, "buy")
+            await bus.flush()
+
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            clock[0] += 1000
+            await feed(5.0, float(rng.uniform(1, 10)))
+
+        panel = bot.cross_validator.panels["BTCUSDT"]
+        assert set(panel.exchanges) == {"Bybit", "Binance", "OKX", "Coinbase"}
+        for col in range(4):
+            assert panel.depth[col, panel.head % panel.size] == pytest.approx(200.0)  # top-20 x 2 x 5
+            assert panel.depth_ratio(col) == pytest.approx(1.0) and panel.volume_n[col] > 0
+        assert panel.volume_correlation(10) == pytest.approx(1.0)
+        assert not bot.cross_validator.detected_anomalies
+
+        # Пустой слот без сделок — объём 0, а не перенос прошлого значения
+        clock[0] += 2000
+        await feed(1.0, 1.0)
+        assert panel.volume[0, (panel.head - 1) % panel.size] == 0.0
+        kinds = [a["type"] for a in bot.cross_validator.detected_anomalies]
+        assert AnomalyType.LIQUIDITY_DRAIN in kinds
+
+    @pytest.mark.asyncio
+    async def test_bybit_books_by_symbol(self, monkeypatch):
+        """Тест: Bybit стаканы двух символов попадают в панели своих символов"""
+        import analytics.cross_exchange_validator as validator_module
+        from core.bot import GIOCryptoBot
+
+        clock = [NOW]
+        monkeypatch.setattr(validator_module, "current_epoch_ms", lambda: clock[0])
+        bot = GIOCryptoBot()
+        bot.veto_system = None
+        bot.cross_validator = CrossExchangeValidator(config={"window_slots": 30})
+        bot.l2_imbalances = {}
+
+        for _ in range(20):
+            clock[0] += 1000
+            for symbol, mid in (("BTCUSDT", 60_000.0), ("ETHUSDT", 3_000.0)):
+                bids = [(mid - 0.5 - i, 5.0) for i in range(30)]
+                asks = [(mid + 0.5 + i, 5.0) for i in range(30)]
+                await bot.handle_bybit_orderbook({"symbol": symbol, "bids": bids, "asks": asks})
+                await bot.handle_binance_orderbook(symbol.lower(), {"bids": bids, "asks": asks})
+
+        panels = bot.cross_validator.panels
+        assert set(panels) == {"BTCUSDT", "ETHUSDT"}
+        for symbol, mid in (("BTCUSDT", 60_000.0), ("ETHUSDT", 3_000.0)):
+            panel = panels[symbol]
+            assert set(panel.exchanges) == {"Bybit", "Binance"}
+            assert panel.price[:2, panel.head % panel.size] == pytest.approx([mid, mid])
+        assert not bot.cross_validator.detected_anomalies
+
+
+class TestCrossExchangeBenchmark:
+    """Проверка на каждом обновлении против пересборки истории"""
+
+    @pytest.mark.benchmark
+    def test_on_book_vs_rebuild(self):
+        """Тест: on_book (обновление + все проверки) быстрее пересборки массивов из dict истории"""
+        rng = np.random.default_rng(1)
+        updates = 20_000
+        prices = 60_000 + np.cumsum(rng.normal(0, 5, updates))
+        volumes = rng.uniform(900, 1100, updates)
+
+        history = {ex: deque(maxlen=100) for ex in EXCHANGES}
+        start = time.perf_counter()
+        for i in range(updates):
+            exchange = EXCHANGES[i % 3]
+            history[exchange].append({"price": prices[i], "volume": volumes[i], "timestamp": NOW + i * 50})
+            series = [np.array([h["price"] for h in history[ex]]) for ex in EXCHANGES if history[ex]]
+            vols = [np.array([h["volume"] for h in history[ex]]) for ex in EXCHANGES if history[ex]]
+            [s.max() / s[-1] for s in series]
+            if len(vols) == 3 and min(len(v) for v in vols) > 2:
+                n = min(len(v) for v in vols)
+                np.corrcoef([v[-n:] for v in vols])
+        rebuild_us = (time.perf_counter() - start) * 1e6 / updates
+
+        validator = CrossExchangeValidator()
+        start = time.perf_counter()
+        for i in range(updates):
+            validator.on_book("BTCUSDT", EXCHANGES[i % 3], prices[i], prices[i] + 1, depth=100.0,
+                              volume=volumes[i], ts_ms=NOW + i * 50)
+        panel_us = (time.perf_counter() - start) * 1e6 / updates
+
+        assert panel_us < rebuild_us
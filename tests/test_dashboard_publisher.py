@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для Dashboard Publisher
+Общий рендер, fan-out, пропуск неизменённого содержимого, teardown
+"""
+
+import asyncio
+import pytest
+from handlers.dashboard_publisher import DashboardPublisher
+
+
+class FakeBuilder:
+    """Builder, считающий количество рендеров"""
+
+    def __init__(self, texts=None):
+        self.calls = 0
+        self.texts = texts
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.texts:
+            return self.texts[min(self.calls, len(self.texts)) - 1]
+        return f"dashboard v{self.calls}"
+
+
+class FakeMessage:
+    """Сообщение Telegram, запоминающее правки"""
+
+    def __init__(self, fail: Exception = None):
+        self.edits = []
+        self.fail = fail
+
+    async def edit(self, text: str):
+        if self.fail:
+            raise self.fail
+        self.edits.append(text)
+
+
+KEY = ("gio", "BTCUSDT")
+
+
+class TestDashboardPublisher:
+    """Тесты для DashboardPublisher"""
+
+    @pytest.mark.asyncio
+    async def test_render_is_shared(self):
+        """Тест: повторный render в пределах интервала берётся из кэша"""
+        publisher = DashboardPublisher(interval=60)
+        builder = FakeBuilder()
+
+        first = await publisher.render(KEY, builder)
+        second = await publisher.render(KEY, builder)
+
+        assert first == second
+        assert builder.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_one_render_per_interval_for_all_subscribers(self):
+        """Тест: десять подписчиков → один рендер за тик"""
+        publisher = DashboardPublisher(interval=0.05)
+        builder = FakeBuilder()
+        messages = [FakeMessage() for _ in range(10)]
+
+        for i, msg in enumerate(messages):
+            publisher.subscribe(KEY, i, builder, msg.edit)
+
+        await asyncio.sleep(0.08)
+        await publisher.stop()
+
+        assert builder.calls == 1
+        assert all(len(msg.edits) == 1 for msg in messages)
+        assert messages[0].edits[0].startswith("dashboard v1")
+        assert "Обновлено #1" in messages[0].edits[0]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_content_skips_edit(self):
+        """Тест: при неизменном hash сообщение не редактируется"""
+        publisher = DashboardPublisher(interval=0.03)
+        builder = FakeBuilder(texts=["same"])
+        msg = FakeMessage()
+
+        await publisher.render(KEY, builder)
+        publisher.subscribe(KEY, "chat", builder, msg.edit)
+
+        await asyncio.sleep(0.1)
+        await publisher.stop()
+
+        assert builder.calls >= 2
+        assert msg.edits == []
+        assert publisher.stats["edits_skipped"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_teardown_after_last_subscriber_expires(self):
+        """Тест: канал останавливается после истечения последней подписки"""
+        publisher = DashboardPublisher(interval=0.02)
+        builder = FakeBuilder()
+        msg = FakeMessage()
+
+        publisher.subscribe(KEY, "chat", builder, msg.edit, duration=0.03)
+        task = publisher.channels[KEY].task
+
+        await asyncio.wait_for(task, timeout=1.0)
+
+        assert KEY not in publisher.channels
+        calls = builder.calls
+        await asyncio.sleep(0.05)
+        assert builder.calls == calls
+
+    @pytest.mark.asyncio
+    async def test_failed_edit_unsubscribes(self):
+        """Тест: ошибка редактирования (сообщение удалено) снимает подписку"""
+        publisher = DashboardPublisher(interval=0.02)
+        builder = FakeBuilder()
+        good = FakeMessage()
+        bad = FakeMessage(fail=RuntimeError("message to edit not found"))
+
+        publisher.subscribe(KEY, "good", builder, good.edit)
+        publisher.subscribe(KEY, "bad", builder, bad.edit)
+
+        await asyncio.sleep(0.05)
+        subscribers = set(publisher.channels[KEY].subscribers)
+        await publisher.stop()
+
+        assert subscribers == {"good"}
+        assert len(good.edits) >= 1
+        assert publisher.stats["edit_errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_resubscribe_replaces_previous(self):
+        """Тест: повторная подписка того же чата заменяет старую"""
+        publisher = DashboardPublisher(interval=60)
+        builder = FakeBuilder()
+        old, new = FakeMessage(), FakeMessage()
+
+        publisher.subscribe(KEY, 42, builder, old.edit)
+        publisher.subscribe(KEY, 42, builder, new.edit)
+
+        assert len(publisher.channels[KEY].subscribers) == 1
+        assert publisher.channels[KEY].subscribers[42].editor == new.edit
+        await publisher.stop()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для FootprintAggregator
+Бины и срезы против раскладки по сделкам, сдвиг окна и диапазона,
+absorption / exhaustion по всем сделкам, латентность на 200 символах
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from analytics.cluster_detector import ClusterDetector
+from analytics.footprint_aggregator import FootprintAggregator, nice_tick
+from core.trade_bus import TradeBatch
+
+
+NOW = 1_700_000_000_000
+SLICE = 15_000
+
+
+def make_trades(count: int, seconds: int, price: float = 60_000.0, drift: float = 0.0, seed: int = 0):
+    """Сделки (ts, price, qty, side) за seconds секунд до NOW"""
+    rng = np.random.default_rng(seed)
+    ts = np.sort(NOW - rng.integers(0, seconds * 1000, count))
+    progress = (ts - ts[0]) / max(1, ts[-1] - ts[0])
+    prices = price * (1 + drift * progress) + rng.normal(0, price * 0.0003, count)
+    qty = rng.exponential(0.05, count)
+    side = rng.choice([-1, 1], count).astype(np.int8)
+    return ts, prices, qty, side
+
+
+def ingest(aggregator, symbol, trades):
+    ts, price, qty, side = trades
+    rows = np.full(len(ts), aggregator._row(symbol), dtype=np.int64)
+    aggregator.ingest(rows, ts, price, qty, side)
+
+
+class TestBinning:
+    """Раскладка по бинам и срезам"""
+
+    def test_nice_tick(self):
+        """Тест: тик ≈ 0.05% цены, округлённый до 1 / 2 / 5"""
+        assert nice_tick(60_000, 0.05) == 50.0
+        assert nice_tick(3_000, 0.05) == 2.0
+        assert nice_tick(150, 0.05) == pytest.approx(0.1)
+
+    def test_profile_matches_trades(self):
+        """Тест: buy / sell по бинам равны сумме сделок окна"""
+        aggregator = FootprintAggregator()
+        trades = make_trades(5_000, 600)
+        for chunk in np.array_split(np.arange(5_000), 10):
+            ingest(aggregator, "BTCUSDT", tuple(a[chunk] for a in trades))
+
+        ts, price, qty, side = trades
+        tick = aggregator.tick[0]
+        in_window = ts // SLICE > NOW // SLICE - aggregator.slices
+        expected = {}
+        for p, q, s in zip(price[in_window], qty[in_window], side[in_window]):
+            key = int(p // tick)
+            buy, sell = expected.get(key, (0.0, 0.0))
+            expected[key] = (buy + q, sell) if s > 0 else (buy, sell + q)
+
+        profile = aggregator.profile("BTCUSDT")
+        assert len(profile["prices"]) == len(expected)
+        for p, buy, sell in zip(profile["prices"], profile["buy"], profile["sell"]):
+            assert (buy, sell) == pytest.approx(expected[int(p // tick)])
+        assert aggregator.volume[0].sum() == pytest.approx(qty[in_window].sum())
+
+    def test_window_expiry_and_recenter(self):
+        """Тест: окно сдвигается по времени, диапазон — за ценой"""
+        aggregator = FootprintAggregator()
+        aggregator.add("ETHUSDT", 3_000.0, 1.0, 1, NOW)
+        aggregator.add("ETHUSDT", 3_000.0, 2.0, -1, NOW + SLICE)
+        assert aggregator.profile("ETHUSDT")["buy"].sum() == 1.0
+
+        # Цена ушла за край диапазона (±5%): бины сдвигаются, 3000 остаётся
+        aggregator.add("ETHUSDT", 3_220.0, 1.0, 1, NOW + SLICE)
+        profile = aggregator.profile("ETHUSDT")
+        assert aggregator.stats["recenters"] == 1
+        assert set(np.round(profile["prices"])) == {3_001.0, 3_221.0}
+
+        # Через окно сделки выходят из footprint
+        later = NOW + SLICE + aggregator.slices * SLICE
+        assert not aggregator.absorption("ETHUSDT", now_ms=later)["detected"]
+        assert not aggregator.has("ETHUSDT")
+        aggregator.add("ETHUSDT", 3_000.0, 1.0, 1, NOW)
+        assert aggregator.stats["rejected"] == 1
+
+
+class TestDetection:
+    """Absorption и exhaustion"""
+
+    def test_absorption_from_mid_size_prints(self):
+        """Тест: много средних продаж на уровне без движения цены — absorption"""
+        aggregator = FootprintAggregator()
+        ingest(aggregator, "BTCUSDT", make_trades(3_000, 240, seed=1))
+        count = 400
+        ts = np.linspace(NOW - 200_000, NOW, count).astype(np.int64)
+        price = np.full(count, 60_010.0)
+        ingest(aggregator, "BTCUSDT", (ts, price, np.full(count, 0.2), np.full(count, -1, dtype=np.int8)))
+
+        result = aggregator.absorption("BTCUSDT", now_ms=NOW)
+        assert result["detected"]
+        assert result["level"] == pytest.approx(60_025.0)
+        assert result["absorbing_side"] == "buy"
+        assert result["volume"] >= count * 0.2
+
+        # Тренд: объём размазан по бинам, цена смещена — не absorption
+        trend = FootprintAggregator()
+        ingest(trend, "BTCUSDT", make_trades(3_000, 240, drift=0.01, seed=2))
+        assert not trend.absorption("BTCUSDT", now_ms=NOW)["detected"]
+
+    def test_exhaustion_after_move(self):
+        """Тест: рост с затухающим объёмом — exhaustion вверх"""
+        aggregator = FootprintAggregator()
+        for k in range(aggregator.slices):
+            start = NOW - (aggregator.slices - k) * SLICE
+            count = 300 if k < aggregator.slices - 4 else 20
+            ts = np.linspace(start, start + SLICE - 1, count).astype(np.int64)
+            price = np.full(count, 60_000.0 * (1 + 0.0005 * k))
+            ingest(aggregator, "BTCUSDT", (ts, price, np.full(count, 0.1), np.ones(count, dtype=np.int8)))
+
+        result = aggregator.exhaustion("BTCUSDT", now_ms=NOW)
+        assert result["detected"] and result["direction"] == "up"
+        assert result["strength"] > 0.8
+        assert "BTCUSDT" in aggregator.scan(now_ms=NOW)
+
+    @pytest.mark.asyncio
+    async def test_trade_bus_and_cluster_detector(self):
+        """Тест: батч TradeBus попадает в footprint, ClusterDetector читает его"""
+        aggregator = FootprintAggregator()
+        ts, price, qty, side = make_trades(1_000, 120, seed=3)
+        ts = ts - NOW + int(time.time() * 1000)
+        batch = TradeBatch(
+            np.zeros(1_000, dtype=np.int8),
+            np.arange(1_000, dtype=np.int32) % 2,
+            ts, price, qty, side,
+            ["BTCUSDT", "ETHUSDT"],
+        )
+        aggregator.on_trades(batch)
+        assert aggregator.symbols == ["BTCUSDT", "ETHUSDT"]
+        assert aggregator.volume[:2].sum() == pytest.approx(qty.sum())
+
+        detector = ClusterDetector(SimpleNamespace(footprint_aggregator=aggregator, large_trades={}))
+        assert set(await detector.detect_absorption("BTCUSDT")) >= {"detected", "level", "volume"}
+        assert set(await detector.detect_exhaustion("ETHUSDT")) >= {"detected", "level", "strength"}
+
+
+class TestFootprintBenchmark:
+    """Латентность запросов на 200 символах"""
+
+    @pytest.mark.benchmark
+    def test_query_latency_200_symbols(self):
+        """Тест: скан всех символов одним проходом быстрее запросов по каждому"""
+        aggregator = FootprintAggregator()
+        rng = np.random.default_rng(4)
+        symbols = 200
+        count = 200_000
+        rows = rng.integers(0, symbols, count)
+        for s in range(symbols):
+            aggregator._row(f"SYM{s}USDT")
+        ts = np.sort(NOW - rng.integers(0, 300_000, count))
+        price = (100.0 + rows) * (1 + rng.normal(0, 0.001, count))
+
+        for chunk in np.array_split(np.arange(count), 100):
+            aggregator.ingest(rows[chunk], ts[chunk], price[chunk], rng.exponential(1.0, len(chunk)),
+                              rng.choice([-1, 1], len(chunk)).astype(np.int8))
+
+        start = time.perf_counter()
+        for s in range(symbols):
+            aggregator.absorption(f"SYM{s}USDT", now_ms=NOW)
+            aggregator.exhaustion(f"SYM{s}USDT", now_ms=NOW)
+        query = time.perf_counter() - start
+
+        start = time.perf_counter()
+        aggregator.scan(now_ms=NOW)
+        scan = time.perf_counter() - start
+
+        assert scan < query
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для HttpTransport
+Retry по 5xx/429, весовые бюджеты, статистика endpoint, клиенты бирж
+"""
+
+import time
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from utils.http_transport import HttpTransport, resolve_exchange
+
+
+class FakeExchange:
+    """Локальный HTTP сервер с настраиваемыми ответами"""
+
+    def __init__(self):
+        self.failures = []  # статусы, которые вернуть перед 200
+        self.requests = []
+        app = web.Application()
+        app.router.add_get("/v5/market/kline", self.handle)
+        self.server = TestServer(app)
+
+    async def handle(self, request):
+        self.requests.append(dict(request.headers))
+        if self.failures:
+            status = self.failures.pop(0)
+            headers = {"Retry-After": "0"} if status == 429 else {}
+            return web.json_response({"error": status}, status=status, headers=headers)
+        return web.json_response({"retCode": 0, "params": dict(request.query)})
+
+    def url(self, path="/v5/market/kline"):
+        return str(self.server.make_url(path))
+
+
+@pytest_asyncio.fixture
+async def exchange():
+    fake = FakeExchange()
+    await fake.server.start_server()
+    yield fake
+    await fake.server.close()
+
+
+@pytest_asyncio.fixture
+async def transport():
+    instance = HttpTransport(
+        {"retry_base_delay": 0.01, "retry_max_delay": 0.05, "max_retries": 2}
+    )
+    yield instance
+    await instance.close()
+
+
+class TestHttpTransport:
+    """Тесты для HttpTransport"""
+
+    def test_resolve_exchange(self):
+        """Тест: биржа определяется по хосту"""
+        assert resolve_exchange("https://api.bybit.com/v5/market/kline") == "bybit"
+        assert resolve_exchange("https://fapi.binance.com/fapi/v1/depth") == "binance"
+        assert resolve_exchange("http://example.org/x") == "example.org"
+
+    @pytest.mark.asyncio
+    async def test_get_json_and_endpoint_stats(self, exchange, transport):
+        """Тест: запрос через общий пул попадает в статистику endpoint"""
+        data = await transport.get_json(exchange.url(), params={"symbol": "BTCUSDT"})
+
+        assert data["params"] == {"symbol": "BTCUSDT"}
+        stats = transport.get_endpoint_stats()
+        key = f"{resolve_exchange(exchange.url())}:/v5/market/kline"
+        assert stats[key]["requests"] == 1
+        assert stats[key]["errors"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self, exchange, transport):
+        """Тест: 500 и 429 повторяются, затем возвращается успешный ответ"""
+        exchange.failures = [500, 429]
+
+        data = await transport.get_json(exchange.url())
+
+        assert data["retCode"] == 0
+        assert len(exchange.requests) == 3
+        assert transport.get_totals()["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted_returns_error_status(self, exchange, transport):
+        """Тест: после исчерпания повторов возвращается последний ответ"""
+        exchange.failures = [503, 503, 503, 503]
+
+        async with transport.get(exchange.url()) as response:
+            assert response.status == 503
+
+        assert len(exchange.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_weight_budget_paces_requests(self, exchange):
+        """Тест: вес запросов списывается из бюджета биржи"""
+        transport = HttpTransport(
+            {"exchange_budgets": {"local": 10}, "default_budget": 10}
+        )
+        client = transport.client("local")
+        try:
+            start = time.monotonic()
+            for _ in range(3):
+                async with client.get(exchange.url(), weight=5) as response:
+                    assert response.status == 200
+            elapsed = time.monotonic() - start
+        finally:
+            await transport.close()
+
+        # 15 единиц веса при бюджете 10/сек → минимум одна пауза окна
+        assert elapsed >= 0.9
+
+    @pytest.mark.asyncio
+    async def test_client_headers_and_shared_session(self, exchange, transport):
+        """Тест: клиенты бирж делят одну сессию и добавляют свои headers"""
+        binance = transport.client("binance", headers={"X-MBX-APIKEY": "key"})
+        okx = transport.client("okx")
+
+        await binance.get_json(exchange.url())
+        session = transport._session
+        async with okx.get(exchange.url(), headers={"X-Test": "1"}) as response:
+            assert response.status == 200
+
+        assert transport._session is session
+        assert exchange.requests[0]["X-MBX-APIKEY"] == "key"
+        assert "X-MBX-APIKEY" not in exchange.requests[1]
+        assert exchange.requests[1]["X-Test"] == "1"
+        assert not binance.closed
+        await binance.close()
+        assert not transport.closed
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для LevelEngine
+Слияние в отсортированном массиве против перебора, bisect запросы,
+общая книга для S/R детектора, pivot'ов, зон ликвидности и ликвидаций
+"""
+
+import time
+
+import numpy as np
+import pytest
+from analytics.level_engine import LevelBook, LevelEngine, LevelSource, strength_label
+from analytics.liquidation_aggregator import LiquidationAggregator
+from analytics.market_structure import MarketStructureAnalyzer
+from analytics.pattern_detector import PatternDetector
+from handlers.support_resistance_detector import AdvancedSupportResistanceDetector
+
+
+NOW = 1_700_000_000.0
+SOURCES = list(LevelSource)
+
+
+def random_book(count: int = 400, seed: int = 0, **kwargs):
+    rng = np.random.default_rng(seed)
+    book = LevelBook(**kwargs)
+    book.set_atr(50.0)
+    for i in range(count):
+        book.add(
+            float(60_000 + rng.normal(0, 1_500)),
+            SOURCES[i % 4],
+            float(rng.uniform(1, 3)),
+            now=NOW + i,
+        )
+    return book
+
+
+class TestLevelBook:
+    """Отсортированный массив уровней"""
+
+    def test_merge_keeps_sorted_and_separated(self):
+        """Тест: массив отсортирован, соседи дальше допуска, маски — объединение"""
+        book = random_book(max_levels=10_000)
+        prices = book.prices
+        assert prices == sorted(prices) and prices == [level.price for level in book.levels]
+        assert all(b - a > book.tolerance(b) for a, b in zip(prices, prices[1:]))
+        assert book.stats["merges"] > 0 and len(book) < 400
+
+        book.add(60_000.0, LevelSource.PIVOT, 2.0, now=NOW + 500)
+        level = book.add(60_000.0 + book.tolerance(60_000.0) / 2, LevelSource.ORDERBOOK, 3.0, now=NOW + 500)
+        assert level.sources & LevelSource.PIVOT and level.sources & LevelSource.ORDERBOOK
+
+    def test_nearest_matches_scan(self):
+        """Тест: bisect ближайший уровень = линейный перебор с фильтрами"""
+        book = random_book(seed=1, max_levels=10_000)
+        now = NOW + 400
+        rng = np.random.default_rng(2)
+        for price in rng.uniform(55_000, 65_000, 200).tolist():
+            for sources in (0, LevelSource.ORDERBOOK | LevelSource.LIQUIDATION):
+                passing = [
+                    level for level in book.levels
+                    if (not sources or level.sources & sources)
+                    and level.strength(now, book.half_lives) >= 1.5
+                ]
+                below = [level for level in passing if level.price < price]
+                above = [level for level in passing if level.price > price]
+                assert book.nearest_below(price, 1.5, sources, now=now) is (below[-1] if below else None)
+                assert book.nearest_above(price, 1.5, sources, now=now) is (above[0] if above else None)
+
+    def test_decay_accumulate_and_capacity(self):
+        """Тест: полураспад по источнику, сумма ликвидаций, вытеснение слабых"""
+        book = LevelBook(config={"half_life": {"volume_profile": 100, "orderbook": 10, "pivot": 100, "liquidation": 100}})
+        level = book.add(100.0, LevelSource.ORDERBOOK, 3.0, now=0.0)
+        book.add(100.0, LevelSource.ORDERBOOK, 3.0, now=0.0)  # повтор того же источника не суммируется
+        assert level.strength(10.0, book.half_lives) == pytest.approx(1.5)
+        book.add(100.0, LevelSource.LIQUIDATION, 1.0, now=10.0)
+        book.add(100.0, LevelSource.LIQUIDATION, 1.0, now=10.0)
+        assert level.strength(10.0, book.half_lives) == pytest.approx(3.5)
+        assert strength_label(3.5) == "strong"
+        assert book.nearest_below(101.0, now=200.0) is level  # ликвидации ещё держат уровень
+
+        small = LevelBook(max_levels=8)
+        for i in range(20):
+            small.add(100.0 + i * 10, LevelSource.PIVOT, 1.0 + i / 10, now=0.0)
+        assert len(small) <= 8 and small.prices == sorted(small.prices)
+        assert small.levels[-1].weights[2] == pytest.approx(2.9)  # сильнейшие остаются
+
+
+class TestSharedCallers:
+    """Все потребители пишут в одну книгу символа"""
+
+    def test_detector_reads_shared_book(self):
+        """Тест: pivot'ы PatternDetector и стены стакана видны S/R детектору"""
+        engine = LevelEngine()
+        rng = np.random.default_rng(3)
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, 200))
+        candles = [
+            {"timestamp": i * 60_000, "open": c, "high": c + abs(rng.normal(0, 0.4)),
+             "low": c - abs(rng.normal(0, 0.4)), "close": c}
+            for i, c in enumerate(closes.tolist())
+        ]
+        PatternDetector(engine=engine).analyze("SOLUSDT", "60", candles)
+        book = engine.book("SOLUSDT")
+        assert len(book) > 0 and all(level.sources == LevelSource.PIVOT for level in book.levels)
+
+        price = float(closes[-1])
+        wall = book.levels[0].price if book.levels[0].price < price else price * 0.97
+        book.add(wall, LevelSource.ORDERBOOK, 3.0)
+
+        detector = AdvancedSupportResistanceDetector(engine=engine)
+        result = detector.detect_support_resistance({
+            "symbol": "SOLUSDT", "price": price, "poc": price * 0.99, "vah": price * 1.03,
+            "val": price * 0.96, "atr": book.atr, "cvd_slope": 20, "high": price * 1.01, "low": price * 0.99,
+        })
+        supports = result["support_levels"]
+        assert supports and [s["price"] for s in supports] == sorted((s["price"] for s in supports), reverse=True)
+        assert all(s["price"] <= price and s["cvd_bias"] == "confirmed" for s in supports)
+        assert all(r["price"] > price * 1.02 for r in result["resistance_levels"])
+        assert any("orderbook" in s["sources"] for s in supports)
+        assert result["key_support"]["strength"] == "strong"
+
+        # Без symbol — временная книга вызова, общая не меняется
+        levels_before = len(book)
+        assert detector.detect_support_resistance({"price": 100.0, "val": 95.0, "vah": 105.0, "atr": 1.0})["support_levels"]
+        assert len(book) == levels_before
+
+    def test_liquidity_zones_and_liquidations(self):
+        """Тест: зоны ликвидности сливаются в пределах 1%, ликвидации — уровни книги"""
+        engine = LevelEngine()
+        highs = [101.0, 101.3] + [110.0 + 10 * i for i in range(6)]
+        lows = [99.0, 99.5] + [108.0 + 10 * i for i in range(6)]
+        volumes = [500.0, 480.0] + [10.0] * 6
+        result = MarketStructureAnalyzer.detect_liquidity_zones(highs * 8, lows * 8, [100.2] * 64, volumes * 8, lookback=64)
+        assert len(result["zones"]) == 1
+        zone = result["zones"][0]
+        assert zone["low"] == 99.0 and zone["high"] == 101.3 and result["current_zone"] == zone
+        assert zone["volume"] == pytest.approx(980 * 8)
+
+        aggregator = LiquidationAggregator(bucket_seconds=60, history_hours=1)
+        aggregator.subscribe(engine.on_liquidation, min_usd=0, with_price=True)
+        now_ms = int(time.time() * 1000)
+        for price in (95.0, 95.02, 94.98):
+            aggregator.add("bybit", "ETHUSDT", "long", price, 10_000.0, timestamp=now_ms, now_ms=now_ms)
+        level = engine.book("ETHUSDT").nearest_below(100.0)
+        assert level.sources == LevelSource.LIQUIDATION and level.volume == pytest.approx(2_850_000)
+        assert engine.get_stats()["levels"] == 1
+
+        # Часы биржи на час впереди: сила не больше веса (штамп — локальное время)
+        book = engine.book("BTCUSDT")
+        engine.on_liquidation("BTCUSDT", 1_000_000.0, "short", timestamp=now_ms + 3_600_000, price=60_000.0)
+        [level] = book.levels
+        assert max(level.stamps) <= time.time()
+        assert level.strength(time.time(), book.half_lives) == pytest.approx(1.0, abs=1e-3)
+        assert level.strength(max(level.stamps) - 600, book.half_lives) == pytest.approx(max(level.weights))
+
+
+class TestLevelBenchmark:
+    """Книга против пересборки и сортировки списков dict на каждый запрос"""
+
+    @pytest.mark.benchmark
+    def test_book_vs_rebuild(self):
+        """Тест: add + nearest выше/ниже быстрее сортировки и слияния списка на запрос"""
+        rng = np.random.default_rng(4)
+        prices = (60_000 + rng.normal(0, 1_000, 5_000)).tolist()
+        tolerance = 15.0
+
+        candidates = []
+        start = time.perf_counter()
+        for i, price in enumerate(prices):
+            candidates.append({"price": price, "strength": "medium", "source": "pivot"})
+            candidates = candidates[-64:]
+            ordered = sorted(candidates, key=lambda x: x["price"])
+            merged = [ordered[0]]
+            for level in ordered[1:]:
+                if abs(level["price"] - merged[-1]["price"]) <= tolerance:
+                    merged[-1] = {"price": (level["price"] + merged[-1]["price"]) / 2, "strength": "strong",
+                                  "source": f"merged_{merged[-1]['source']}_{level['source']}"}
+                else:
+                    merged.append(level)
+            below = [level for level in merged if level["price"] < price]
+            above = [level for level in merged if level["price"] > price]
+            max(below, key=lambda x: x["price"]) if below else None
+            min(above, key=lambda x: x["price"]) if above else None
+        rebuild_us = (time.perf_counter() - start) * 1e6 / len(prices)
+
+        book = LevelBook(tolerance_pct=0.0, max_levels=64)
+        book.set_atr(tolerance / book.atr_multiplier)
+        start = time.perf_counter()
+        for i, price in enumerate(prices):
+            book.add(price, LevelSource.PIVOT, 2.0, now=NOW + i)
+            book.nearest_below(price, now=NOW + i)
+            book.nearest_above(price, now=NOW + i)
+        book_us = (time.perf_counter() - start) * 1e6 / len(prices)
+
+        assert book_us < rebuild_us
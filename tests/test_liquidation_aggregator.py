@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для LiquidationAggregator
+Скользящие суммы 1h/4h/24h по бакетам против суммы по событиям,
+heatmap и зоны ликвидаций, разбор стримов Bybit / Binance, подписчики
+"""
+
+import random
+import time
+
+import numpy as np
+import pytest
+from analytics.liquidation_aggregator import LiquidationAggregator
+from analytics.veto_system import EnhancedVetoSystem
+from connectors.liquidation_websocket import BinanceLiquidationWebSocket, BybitLiquidationWebSocket
+from connectors.ws_parsers import parse_binance_force_order, parse_bybit_liquidation
+from utils import fast_json
+
+
+NOW = 1_700_000_000_000
+HOUR = 3_600_000
+
+
+def make_events(count: int, seed: int = 0):
+    """События (ts, side, price, size) за последние 30 часов"""
+    rng = random.Random(seed)
+    return [
+        (
+            NOW - rng.randint(0, 30 * HOUR),
+            rng.choice(("long", "short")),
+            rng.uniform(58_000, 62_000),
+            rng.uniform(0.01, 5.0),
+        )
+        for _ in range(count)
+    ]
+
+
+def naive_sum(events, window_ms, bucket_ms=60_000):
+    """Эталон: сумма по событиям бакетов окна"""
+    first = NOW // bucket_ms - window_ms // bucket_ms
+    totals = {"long": 0.0, "short": 0.0}
+    for ts, side, price, size in events:
+        if first < ts // bucket_ms <= NOW // bucket_ms:
+            totals[side] += price * size
+    return totals
+
+
+class TestParsers:
+    """Разбор сообщений стримов"""
+
+    def test_bybit_all_liquidation(self):
+        """Тест: S=Buy — ликвидирован лонг"""
+        message = {
+            "topic": "allLiquidation.BTCUSDT",
+            "ts": NOW,
+            "data": [
+                {"T": NOW, "s": "BTCUSDT", "S": "Buy", "v": "0.5", "p": "60000"},
+                {"T": NOW + 1, "s": "BTCUSDT", "S": "Sell", "v": "1", "p": "60100"},
+            ],
+        }
+        ticks = parse_bybit_liquidation(message)
+        assert [t.side for t in ticks] == ["long", "short"]
+        assert ticks[0].price == 60_000.0 and ticks[0].size == 0.5
+        assert parse_bybit_liquidation({"topic": "orderbook.50.BTCUSDT"}) == []
+
+    def test_binance_force_order(self):
+        """Тест: SELL — ликвидирован лонг, цена — средняя цена исполнения"""
+        message = {
+            "e": "forceOrder",
+            "o": {"s": "ETHUSDT", "S": "SELL", "q": "2", "p": "2990", "ap": "3000", "z": "2", "T": NOW},
+        }
+        tick = parse_binance_force_order(message)
+        assert (tick.symbol, tick.side, tick.price, tick.size) == ("ETHUSDT", "long", 3000.0, 2.0)
+        assert parse_binance_force_order({"e": "trade"}) is None
+
+
+class TestRollingWindows:
+    """Скользящие суммы по бакетам"""
+
+    def test_windows_match_events(self):
+        """Тест: 1h / 4h / 24h равны сумме событий соответствующих бакетов"""
+        events = make_events(5_000)
+        aggregator = LiquidationAggregator()
+        for ts, side, price, size in sorted(events):
+            aggregator.add("bybit", "BTCUSDT", side, price, size, ts, now_ms=NOW)
+
+        for window, seconds in aggregator.windows.items():
+            expected = naive_sum(events, seconds * 1000)
+            summary = aggregator.summary("BTCUSDT", window, now_ms=NOW)
+            assert summary["total_long"] == pytest.approx(expected["long"])
+            assert summary["total_short"] == pytest.approx(expected["short"])
+            assert summary["long_pct"] + summary["short_pct"] == pytest.approx(100.0)
+
+        # События старше 24ч отклонены
+        assert aggregator.stats["rejected"] > 0
+        assert aggregator.summary("ETHUSDT", now_ms=NOW)["total"] == 0.0
+
+    def test_slot_reuse_after_history(self):
+        """Тест: через сутки слот бакета переиспользуется, старая сумма уходит"""
+        aggregator = LiquidationAggregator()
+        aggregator.add("bybit", "BTCUSDT", "long", 60_000, 1.0, NOW, now_ms=NOW)
+        later = NOW + 24 * HOUR
+        aggregator.add("bybit", "BTCUSDT", "short", 61_000, 1.0, later, now_ms=later)
+
+        summary = aggregator.summary("BTCUSDT", "24h", now_ms=later)
+        assert summary["total_long"] == 0.0
+        assert summary["total_short"] == pytest.approx(61_000)
+        # Запоздавшее событие: старше окна истории отклоняется, внутри — учитывается
+        assert not aggregator.add("bybit", "BTCUSDT", "long", 60_000, 1.0, NOW, now_ms=later)
+        assert aggregator.add("bybit", "BTCUSDT", "long", 60_000, 1.0, NOW + 60_000, now_ms=later)
+        assert aggregator.summary("BTCUSDT", "24h", now_ms=later)["total_long"] == pytest.approx(60_000)
+        assert aggregator.summary("BTCUSDT", "1h", now_ms=later)["total_long"] == 0.0
+
+    def test_coverage_and_live(self):
+        """Тест: live по подключённым стримам, покрытие не больше окна"""
+        aggregator = LiquidationAggregator()
+        assert not aggregator.is_live()
+        aggregator.mark_connected("bybit")
+        aggregator.mark_connected("binance")
+        assert aggregator.is_live()
+        assert aggregator.summary("BTCUSDT", "1h", now_ms=int(time.time() * 1000) + 2 * HOUR)["coverage_sec"] == 3600
+        aggregator.mark_disconnected("bybit")
+        aggregator.mark_disconnected("binance")
+        assert not aggregator.is_live()
+
+
+class TestHeatmap:
+    """Heatmap и зоны ликвидаций"""
+
+    def test_heatmap_bins_and_levels(self):
+        """Тест: бины суммируют события, зоны — тяжёлые бины по сторонам цены"""
+        events = make_events(2_000, seed=1)
+        aggregator = LiquidationAggregator()
+        for ts, side, price, size in events:
+            aggregator.add("binance", "BTCUSDT", side, price, size, ts, now_ms=NOW)
+        aggregator.add("binance", "BTCUSDT", "long", 59_000, 1_000.0, NOW, now_ms=NOW)
+        aggregator.add("binance", "BTCUSDT", "short", 61_500, 1_000.0, NOW, now_ms=NOW)
+
+        heatmap = aggregator.heatmap("BTCUSDT", now_ms=NOW)
+        summary = aggregator.summary("BTCUSDT", now_ms=NOW)
+        assert np.all(np.diff(heatmap["prices"]) > 0)
+        assert heatmap["long_usd"].sum() == pytest.approx(summary["total_long"], rel=1e-6)
+        assert aggregator.heatmap("BTCUSDT", now_ms=NOW) is heatmap
+
+        levels = aggregator.levels("BTCUSDT", 60_000, now_ms=NOW)
+        assert levels["long_liq_level"] == pytest.approx(59_000, rel=0.0025)
+        assert levels["short_liq_level"] == pytest.approx(61_500, rel=0.0025)
+        assert levels["long_liq_volume"] <= summary["total_long"]
+
+        assert aggregator.levels("ETHUSDT", 3_000, now_ms=NOW)["long_liq_level"] is None
+
+    def test_recent_and_listeners(self):
+        """Тест: крупные события за минуту и подписка Veto на каскад"""
+        aggregator = LiquidationAggregator()
+        veto = EnhancedVetoSystem()
+        aggregator.subscribe(veto.on_liquidation, min_usd=100_000)
+
+        now = int(time.time() * 1000)
+        aggregator.add("bybit", "BTCUSDT", "long", 60_000, 0.1, now - 10_000)
+        aggregator.add("bybit", "BTCUSDT", "short", 60_000, 5.0, now - 5_000)
+        aggregator.add("bybit", "BTCUSDT", "long", 60_000, 3.0, now - 120_000)
+
+        recent = aggregator.recent("BTCUSDT", now - 60_000, min_usd=100_000)
+        assert [(e["side"], e["usd"]) for e in recent] == [("short", 300_000.0)]
+        assert len(veto.states["BTCUSDT"].liquidation_events) == 2
+
+
+class TestStreams:
+    """WebSocket → агрегатор"""
+
+    def test_messages_feed_aggregator(self):
+        """Тест: сообщения обоих стримов попадают в общий агрегатор"""
+        aggregator = LiquidationAggregator()
+        now = int(time.time() * 1000)
+        bybit = BybitLiquidationWebSocket(["BTCUSDT"], aggregator)
+        binance = BinanceLiquidationWebSocket(["BTCUSDT"], aggregator)
+
+        bybit._handle_message(fast_json.dumps({
+            "topic": "allLiquidation.BTCUSDT",
+            "data": [{"T": now, "s": "BTCUSDT", "S": "Buy", "v": "1", "p": "60000"}],
+        }))
+        binance._handle_message(fast_json.dumps({
+            "stream": "btcusdt@forceOrder",
+            "data": {"e": "forceOrder", "o": {"s": "BTCUSDT", "S": "BUY", "q": "2", "p": "60000", "T": now}},
+        }))
+        bybit._handle_message("not json")
+
+        summary = aggregator.summary("BTCUSDT", "1h")
+        assert (summary["total_long"], summary["total_short"]) == (60_000.0, 120_000.0)
+        assert bybit.get_stats()["messages_failed"] == 1
+        assert "btcusdt@forceOrder" in binance._url()
+
+
+class TestLiquidationBenchmark:
+    """Запрос из памяти против прохода по сделкам"""
+
+    @pytest.mark.benchmark
+    def test_summary_vs_scan(self):
+        """Тест: 3 окна из бакетов быстрее фильтрации 20k событий на запрос"""
+        events = make_events(20_000, seed=2)
+        aggregator = LiquidationAggregator()
+        for ts, side, price, size in events:
+            aggregator.add("bybit", "BTCUSDT", side, price, size, ts, now_ms=NOW)
+
+        rounds = 50
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for seconds in aggregator.windows.values():
+                naive_sum(events, seconds * 1000)
+        scan_ms = (time.perf_counter() - start) / rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            aggregator.window_summaries("BTCUSDT", now_ms=NOW)
+        memory_ms = (time.perf_counter() - start) / rounds * 1000
+
+        assert memory_ms < scan_ms
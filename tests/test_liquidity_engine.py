@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для LiquidityEngine
+Slippage / глубина / зоны через searchsorted против обхода уровней,
+кэш живых книг, сводный стакан, анализаторы ликвидности
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+from analytics.enhanced_liquidity_analyzer import EnhancedLiquidityAnalyzer
+from analytics.liquidity_depth_analyzer import LiquidityDepthAnalyzer
+from analytics.liquidity_engine import DepthSide, LiquidityBook, LiquidityEngine
+
+
+def make_book(mid: float = 60_000.0, levels: int = 200, seed: int = 1):
+    """Стакан [[price, size], ...]: bids по убыванию, asks по возрастанию"""
+    rng = random.Random(seed)
+    bids = [[mid - 0.5 - i * 0.5, rng.uniform(0.01, 3.0)] for i in range(levels)]
+    asks = [[mid + 0.5 + i * 0.5, rng.uniform(0.01, 3.0)] for i in range(levels)]
+    return {"bids": bids, "asks": asks, "timestamp": 1}
+
+
+def naive_fill(levels, notional):
+    """Эталон: обход уровней до исполнения notional USD"""
+    remaining, qty = notional, 0.0
+    for price, size in levels:
+        take = min(remaining, price * size)
+        qty += take / price
+        remaining -= take
+        if remaining <= 0:
+            return notional / qty
+    return None
+
+
+class FakeWs:
+    """Bybit orderbook WebSocket с готовым стаканом"""
+
+    def __init__(self, symbol, orderbook):
+        self.symbol = symbol
+        self.orderbook = orderbook
+
+    def get_orderbook(self):
+        return self.orderbook
+
+
+class TestDepthSide:
+    """Тесты для DepthSide"""
+
+    def test_slippage_matches_naive(self):
+        """Тест: slippage через searchsorted совпадает с обходом уровней"""
+        book = make_book()
+        for key, is_bid in (("bids", True), ("asks", False)):
+            side = DepthSide.from_levels(book[key], is_bid)
+            best = book[key][0][0]
+            sizes = [10_000, 100_000, 500_000, 1_000_000, 50_000_000]
+
+            slippage = side.slippage(sizes)
+            for size in sizes:
+                expected = naive_fill(book[key], size)
+                if expected is None:
+                    assert slippage[size] is None
+                else:
+                    assert slippage[size] == pytest.approx(abs(expected - best) / best * 100)
+
+    def test_depth_and_ranges(self):
+        """Тест: глубина в bps и объём диапазона цен"""
+        book = make_book()
+        bids = DepthSide.from_levels(book["bids"], True)
+        asks = DepthSide.from_levels(book["asks"], False)
+        usd = lambda levels, low, high: sum(p * q for p, q in levels if low <= p <= high)
+
+        mid = 60_000.0
+        for bps in (1, 10, 50):
+            shift = mid * bps / 10_000
+            assert bids.depth_within_bps(bps, mid) == pytest.approx(usd(book["bids"], mid - shift, mid))
+            assert asks.depth_within_bps(bps, mid) == pytest.approx(usd(book["asks"], mid, mid + shift))
+
+        assert bids.range_usd(59_950, 59_980) == pytest.approx(usd(book["bids"], 59_950, 59_980))
+        assert asks.range_usd(60_010.5, 60_020.5) == pytest.approx(usd(book["asks"], 60_010.5, 60_020.5))
+        assert asks.range_usd(1, 2) == 0.0
+
+    def test_unsorted_input_and_walls(self):
+        """Тест: любой порядок уровней, нулевые отброшены; стены и ближайшая стена"""
+        side = DepthSide.from_levels(
+            [["99", "1"], ["101", "0"], ["100", "20"], ["98", "30"], ["97", "20.62"]], is_bid=True
+        )
+        assert side.prices.tolist() == [100.0, 99.0, 98.0, 97.0]
+        assert side.largest(2).tolist() == [2, 3]
+        assert side.walls(1_990).tolist() == [2, 3, 0]
+        assert side.nearest_wall(1_990) == 0
+        assert side.nearest_wall(10**9) is None
+
+    def test_coinbase_mapping(self):
+        """Тест: стакан-словарь Coinbase даёт ту же сторону, что и список"""
+        levels = make_book()["asks"]
+        from_dict = DepthSide.from_mapping({p: q for p, q in levels}, is_bid=False)
+        from_list = DepthSide.from_levels(levels, is_bid=False)
+        assert from_dict.cum_usd.tolist() == pytest.approx(from_list.cum_usd.tolist())
+
+
+class TestLiquidityEngine:
+    """Тесты для живых и сводных книг"""
+
+    def make_bot(self):
+        bybit = make_book(seed=1)
+        binance = make_book(seed=2)
+        okx = {"bids": [(59_999.5, 2.0, 3)], "asks": [(60_000.5, 1.0, 2)], "timestamp": 5}
+        return SimpleNamespace(
+            orderbook_ws_list=[FakeWs("BTCUSDT", bybit)],
+            binance_orderbook_ws=SimpleNamespace(get_orderbook=lambda s: binance if s == "BTCUSDT" else None),
+            okx_connector=SimpleNamespace(orderbooks={"BTC-USDT": okx}),
+            coinbase_connector=SimpleNamespace(orderbooks={}),
+        )
+
+    def test_live_book_cache(self):
+        """Тест: книга пересобирается только при новом стакане"""
+        bot = self.make_bot()
+        engine = LiquidityEngine(bot)
+
+        first = engine.live_book("BTCUSDT")
+        assert engine.live_book("BTCUSDT") is first
+        assert engine.stats == {**engine.stats, "hits": 1, "builds": 1}
+
+        bot.orderbook_ws_list[0].orderbook = make_book(seed=3)
+        assert engine.live_book("BTCUSDT") is not first
+        assert engine.live_book("ETHUSDT") is None
+
+    def test_consolidated_book(self):
+        """Тест: сводный стакан суммирует объёмы одинаковых цен бирж"""
+        bot = self.make_bot()
+        engine = LiquidityEngine(bot)
+        book = engine.consolidated("BTCUSDT")
+
+        assert book.sources == ("bybit", "binance", "okx")
+        parts = [engine.live_book("BTCUSDT", ex) for ex in ("bybit", "binance", "okx")]
+        assert book.bids.total_usd == pytest.approx(sum(p.bids.total_usd for p in parts))
+        assert book.best_bid == 59_999.5
+        assert book.bids.sizes[0] == pytest.approx(
+            parts[0].bids.sizes[0] + parts[1].bids.sizes[0] + 2.0
+        )
+        assert engine.consolidated("BTCUSDT") is book
+
+    def test_consolidated_after_rebuilds(self):
+        """Тест: пересобранная книга биржи не отдаёт старый сводный стакан (id переиспользуется)"""
+        bot = self.make_bot()
+        engine = LiquidityEngine(bot)
+        others = [engine.live_book("BTCUSDT", ex).bids.total_usd for ex in ("binance", "okx")]
+        for seed in range(10, 60):
+            engine.consolidated("BTCUSDT")
+            bot.orderbook_ws_list[0].orderbook = make_book(seed=seed)
+            engine.live_book("BTCUSDT")  # промежуточная книга без сводного запроса
+            raw = make_book(seed=seed + 100)
+            bot.orderbook_ws_list[0].orderbook = raw
+            expected = LiquidityBook.from_orderbook("BTCUSDT", raw, "bybit").bids.total_usd + sum(others)
+            assert engine.consolidated("BTCUSDT").bids.total_usd == pytest.approx(expected)
+
+    @pytest.mark.asyncio
+    async def test_rest_fallback(self):
+        """Тест: без живого стакана — REST Bybit"""
+        rest = make_book()
+
+        class Connector:
+            async def get_orderbook(self, symbol, limit=50):
+                return {**rest, "bids": [[str(p), str(q)] for p, q in rest["bids"]]}
+
+        engine = LiquidityEngine(SimpleNamespace(bybit_connector=Connector()))
+        book = await engine.get_book("BTCUSDT")
+        assert book.sources == ("bybit_rest",)
+        assert book.best_bid == rest["bids"][0][0]
+        assert engine.stats["rest_fallbacks"] == 1
+
+
+class TestAnalyzers:
+    """Анализаторы ликвидности на живом стакане"""
+
+    @pytest.mark.asyncio
+    async def test_enhanced_analyzer(self):
+        """Тест: зоны, POC, slippage и глубина без REST"""
+        book = make_book()
+        bot = SimpleNamespace(orderbook_ws_list=[FakeWs("BTCUSDT", book)])
+        bot.liquidity_engine = LiquidityEngine(bot)
+        analyzer = EnhancedLiquidityAnalyzer(bot)
+
+        analysis = await analyzer.analyze("BTCUSDT")
+        assert analysis.current_price == pytest.approx(60_000.0)
+        assert analysis.spread == pytest.approx(1.0)
+        assert analysis.sources == ("bybit",)
+
+        top_ask = max(book["asks"], key=lambda level: level[0] * level[1])
+        assert analysis.resistance_zones[0]["strength"] == "Heavy"
+        assert analysis.resistance_zones[0]["price_low"] == pytest.approx(top_ask[0] - 150)
+        assert analysis.slippage_buy[10_000] == pytest.approx(
+            abs(naive_fill(book["asks"], 10_000) - book["asks"][0][0]) / book["asks"][0][0] * 100
+        )
+        assert set(analysis.depth_bps) == {10, 50, 100}
+
+    @pytest.mark.asyncio
+    async def test_depth_analyzer_walls(self):
+        """Тест: стены и ближайшая поддержка из массивов"""
+        book = make_book()
+        book["bids"][5][1] = 40.0  # ~$2.4M стена
+        book["bids"][50][1] = 60.0
+        bot = SimpleNamespace(orderbook_ws_list=[FakeWs("BTCUSDT", book)])
+        analyzer = LiquidityDepthAnalyzer(bot)
+
+        result = await analyzer.analyze_liquidity("BTCUSDT")
+        walls = result["bid_walls"]
+        assert [w["price"] for w in walls] == [book["bids"][50][0], book["bids"][5][0]]
+        assert walls[0]["is_whale"]
+        assert result["key_levels"]["strongest_support"]["price"] == book["bids"][50][0]
+        assert result["key_levels"]["nearest_support"]["price"] == book["bids"][5][0]
+        assert "DEPTH FROM MID" in analyzer.format_liquidity_analysis(result)
+
+
+class TestLiquidityEngineBenchmark:
+    """Сравнение с обходом LiquidityLevel-списков на каждый запрос"""
+
+    @pytest.mark.benchmark
+    def test_queries_vs_naive(self):
+        """Тест: slippage для 4 размеров + зоны быстрее обхода уровней"""
+        book = make_book(levels=1000)
+        side = DepthSide.from_levels(book["asks"], is_bid=False)
+        sizes = [10_000, 100_000, 500_000, 1_000_000]
+        rounds = 200
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            [naive_fill(book["asks"], size) for size in sizes]
+            top = sorted(book["asks"], key=lambda level: level[0] * level[1], reverse=True)[:3]
+            [sum(p * q for p, q in book["asks"] if t[0] - 150 <= p <= t[0] + 150) for t in top]
+        naive_us = (time.perf_counter() - start) / rounds * 1e6
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            side.slippage(sizes)
+            [side.range_usd(side.prices[i] - 150, side.prices[i] + 150) for i in side.largest(3)]
+        engine_us = (time.perf_counter() - start) / rounds * 1e6
+
+        assert engine_us < naive_us
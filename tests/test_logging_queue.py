@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для очереди логов и hot-path throttling
+QueueHandler → QueueListener (запись в фоновом потоке),
+LogBatcher.log_throttled по месту вызова, 20k сообщений/сек
+"""
+
+import logging
+import threading
+import time
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+import pytest
+from config.logging_config import ColoredFormatter, LogConfig, attach_queue, detach_queue, get_queue_stats
+from utils.log_batcher import LogBatcher
+
+
+class CollectingHandler(logging.Handler):
+    """Запоминает сообщения и поток, в котором вызван emit"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+
+class CountingStr:
+    """Считает форматирование аргумента"""
+
+    calls = 0
+
+    def __str__(self):
+        CountingStr.calls += 1
+        return "value"
+
+
+def hot(batcher: LogBatcher, symbol: str, i: int, **kwargs) -> bool:
+    """Одно место вызова для всех сообщений"""
+    return batcher.log_throttled(logging.INFO, "🛡️ %s: hot %d", symbol, i, key=symbol, **kwargs)
+
+
+def isolated_logger(name: str) -> logging.Logger:
+    log = logging.getLogger(name)
+    log.handlers.clear()
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    return log
+
+
+class TestQueueLogging:
+    """Запись через QueueListener"""
+
+    def test_handlers_run_in_background_thread(self):
+        """Тест: logger держит только QueueHandler, handlers вызываются из потока listener'а"""
+        log = isolated_logger("gio_bot_test_queue")
+        handler = CollectingHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        attach_queue(log, [handler])
+        assert len(log.handlers) == 1 and isinstance(log.handlers[0], QueueHandler)
+        assert get_queue_stats()["listeners"] >= 1
+
+        for i in range(100):
+            log.info("msg %d", i)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed")
+        detach_queue(log)
+
+        assert handler.messages[:2] == ["INFO msg 0", "INFO msg 1"] and len(handler.messages) == 101
+        assert "ValueError: boom" in handler.messages[-1]
+        assert threading.current_thread().name not in handler.threads
+        assert log.handlers == []
+
+    def test_setup_logger_files_without_ansi(self, tmp_path, monkeypatch):
+        """Тест: setup_logger через очередь, файловые логи без цветного levelname"""
+        monkeypatch.chdir(tmp_path)
+        log = LogConfig.setup_logger(name="gio_bot_test_setup", environment="production", use_queue=True)
+        log.propagate = False
+        assert len(log.handlers) == 1 and isinstance(log.handlers[0], QueueHandler)
+
+        log.warning("⚠️ queued warning")
+        detach_queue(log)
+        errors = (tmp_path / "data" / "logs" / "gio_bot_production_errors.log").read_text(encoding="utf-8")
+        assert "WARNING" in errors and "queued warning" in errors and "\033[" not in errors
+
+        # Консольный и файловый форматтеры на одном записи
+        record = logging.LogRecord("x", logging.ERROR, __file__, 1, "m", None, None)
+        assert "\033[31m" in ColoredFormatter("%(levelname)s").format(record)
+        assert logging.Formatter("%(levelname)s").format(record) == "ERROR"
+
+
+class TestThrottledLogging:
+    """LogBatcher.log_throttled"""
+
+    @pytest.mark.asyncio
+    async def test_per_call_site_and_summary(self, caplog):
+        """Тест: раз в интервал на место вызова и key, счётчик подавленных в следующем сообщении и сводке"""
+        caplog.set_level(logging.INFO, logger="gio_bot")
+        batcher = LogBatcher(throttle_interval=60)
+
+        results = [hot(batcher, "BTCUSDT", i) for i in range(50)]
+        assert results.count(True) == 1
+        assert hot(batcher, "ETHUSDT", 0)
+        assert batcher.log_throttled(logging.INFO, "другое место вызова")
+
+        # Интервал прошёл — сообщение с числом подавленных
+        for _ in range(2):
+            hot(batcher, "BTCUSDT", 99, interval=0)
+        messages = [r.getMessage() for r in caplog.records if "hot" in r.getMessage()]
+        assert messages == ["🛡️ BTCUSDT: hot 0", "🛡️ ETHUSDT: hot 0", "🛡️ BTCUSDT: hot 99 (+49 подавлено)", "🛡️ BTCUSDT: hot 99"]
+        assert all(r.funcName == "hot" for r in caplog.records if "hot" in r.getMessage())
+
+        assert sum(batcher.suppressed.values()) == 49
+        await batcher._flush()
+        assert any("49 suppressed" in r.getMessage() for r in caplog.records)
+        assert not batcher.suppressed
+
+    def test_no_formatting_when_disabled_or_suppressed(self, caplog):
+        """Тест: аргументы не форматируются ниже уровня logger'а и при подавлении"""
+        caplog.set_level(logging.INFO, logger="gio_bot")
+        batcher = LogBatcher(throttle_interval=60)
+        value = CountingStr()
+        emitted = []
+        for i in range(1000):
+            assert not batcher.log_throttled(logging.DEBUG, "debug %s", value)
+            emitted.append(batcher.log_throttled(logging.INFO, "info %s", value))
+            if i == 0:
+                rendered = CountingStr.calls  # один вывод (по разу на handler caplog)
+        assert emitted.count(True) == 1 and CountingStr.calls == rendered
+
+
+class TestQueueFileOutput:
+    """Запись в файл через очередь"""
+
+    def test_all_lines_written(self, tmp_path):
+        """Тест: все 10k сообщений доходят до RotatingFileHandler после detach_queue"""
+        handler = RotatingFileHandler(tmp_path / "queue.log", maxBytes=50 * 1024 * 1024, backupCount=1, encoding="utf-8")
+        handler.setFormatter(logging.Formatter(LogConfig.FORMATS["detailed"]))
+        log = isolated_logger("gio_bot_test_queue_file")
+        attach_queue(log, [handler])
+        for i in range(10_000):
+            log.info("📊 %s: update %d", "BTCUSDT", i)
+        detach_queue(log)
+
+        lines = (tmp_path / "queue.log").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 10_000 and lines[-1].endswith("BTCUSDT: update 9999")
+
+
+class TestLoggingBenchmark:
+    """Стоимость сообщения на потоке цикла при 20k сообщений/сек"""
+
+    @staticmethod
+    def paced(log_call, rate: int = 20_000, seconds: float = 0.5) -> float:
+        """Пачки по 200 сообщений с темпом rate; время только на вызовах, мкс на сообщение"""
+        batch = 200
+        batches = int(rate * seconds) // batch
+        spent = 0.0
+        next_tick = time.perf_counter()
+        for b in range(batches):
+            start = time.perf_counter()
+            for i in range(batch):
+                log_call(b, i)
+            spent += time.perf_counter() - start
+            next_tick += batch / rate
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return spent * 1e6 / (batches * batch)
+
+    @pytest.mark.benchmark
+    def test_queue_vs_sync_file(self, tmp_path, caplog):
+        """Тест: QueueHandler дешевле синхронного RotatingFileHandler, throttled ещё дешевле"""
+        detailed = logging.Formatter(LogConfig.FORMATS["detailed"])
+
+        def file_handler(name):
+            handler = RotatingFileHandler(tmp_path / name, maxBytes=50 * 1024 * 1024, backupCount=1, encoding="utf-8")
+            handler.setFormatter(detailed)
+            return handler
+
+        sync_log = isolated_logger("gio_bot_bench_sync")
+        sync_log.addHandler(file_handler("sync.log"))
+        sync_us = self.paced(lambda b, i: sync_log.info("📊 %s: level %d update %d", "BTCUSDT", b, i))
+        sync_log.handlers[0].close()
+
+        queue_log = isolated_logger("gio_bot_bench_queue")
+        attach_queue(queue_log, [file_handler("queue.log")])
+        queue_us = self.paced(lambda b, i: queue_log.info("📊 %s: level %d update %d", "BTCUSDT", b, i))
+        detach_queue(queue_log)
+
+        caplog.set_level(logging.INFO, logger="gio_bot")
+        batcher = LogBatcher(throttle_interval=1.0)
+        throttled_us = self.paced(
+            lambda b, i: batcher.log_throttled(logging.INFO, "📊 %s: level %d update %d", "BTCUSDT", b, i, key="BTCUSDT")
+        )
+
+        assert queue_us < sync_us
+        assert throttled_us < queue_us
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для LoopMonitor и BlockingCallGuard
+Задержка loop, стек блокирующей корутины, guard, run_blocking
+"""
+
+import asyncio
+import time
+
+import pytest
+from utils.loop_monitor import BlockingCallGuard, LoopMonitor
+from utils.metrics import get_metrics_registry
+from utils.performance import run_blocking, run_blocking_nowait
+
+
+def blocking_work(seconds: float):
+    """Синхронная работа, блокирующая event loop"""
+    time.sleep(seconds)
+
+
+async def offender():
+    blocking_work(0.3)
+
+
+class TestLoopMonitor:
+    """Тесты для LoopMonitor"""
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_has_no_stalls(self):
+        """Тест: свободный loop не даёт stall'ов"""
+        monitor = LoopMonitor(interval=0.01, stall_threshold_ms=100)
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        assert monitor.stats["beats"] >= 5
+        assert monitor.stats["stalls"] == 0
+        assert monitor.stats["max_lag_ms"] < 100
+
+    @pytest.mark.asyncio
+    async def test_stall_captures_offending_stack(self):
+        """Тест: stall фиксируется со стеком и задачей-виновником"""
+        monitor = LoopMonitor(interval=0.02, stall_threshold_ms=50)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+
+        await asyncio.create_task(offender(), name="offender-task")
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert monitor.stats["stalls"] == 1
+        stall = monitor.get_recent_stalls(1)[0]
+        assert stall["lag_ms"] >= 200
+        assert "blocking_work" in stall["location"]
+        assert "offender-task" in stall["task"]
+        assert any("offender" in line for line in stall["stack"])
+        assert "Event loop" in monitor.format_report()
+
+
+class TestBlockingCallGuard:
+    """Тесты для BlockingCallGuard и run_blocking"""
+
+    @pytest.mark.asyncio
+    async def test_guard_flags_loop_thread_only(self):
+        """Тест: блокирующий вызов из loop отмечается, из executor — нет"""
+        guard = BlockingCallGuard()
+        original_sleep = time.sleep
+        guard.install()
+        try:
+            time.sleep(0)
+            await run_blocking(time.sleep, 0)
+        finally:
+            guard.uninstall()
+
+        assert time.sleep is original_sleep
+        report = guard.get_report()
+        assert len(report) == 1
+        assert report[0]["call"] == "time.sleep"
+        assert "test_loop_monitor.py" in report[0]["location"]
+
+    @pytest.mark.asyncio
+    async def test_run_blocking_records_latency(self):
+        """Тест: run_blocking возвращает результат и пишет метрику"""
+        result = await run_blocking(sum, [1, 2, 3])
+
+        assert result == 6
+        histogram = get_metrics_registry().get("blocking_offload_seconds")
+        assert histogram.labels("sum").count >= 1
+
+    def test_run_blocking_nowait_outside_loop_is_sync(self):
+        """Тест: вне event loop вызов выполняется синхронно"""
+        assert run_blocking_nowait(max, 3, 7) == 7
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для MarketStateStore
+Слияние полей, timestamps по полям, версии, snapshot, сравнение с dict
+"""
+
+import time
+import tracemalloc
+
+import pytest
+from core.market_state import STATE_FIELDS, MarketStateStore, SymbolState
+
+
+SYMBOLS = [f"SYM{i}USDT" for i in range(200)]
+
+
+def fill_fields(i: int) -> dict:
+    """Значения всех полей для символа i"""
+    values = {}
+    for j, name in enumerate(STATE_FIELDS):
+        values[name] = "Unknown" if name in ("pattern", "strategy") else float(i * 100 + j)
+    return values
+
+
+def measure_memory(build) -> int:
+    """Пиковый прирост памяти при построении структуры (байты)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del obj
+    return after - before
+
+
+class TestMarketStateStore:
+    """Тесты для MarketStateStore"""
+
+    def test_update_merges_fields(self):
+        """Тест: обновление сливается с существующими полями"""
+        store = MarketStateStore()
+        store.update("BTCUSDT", binance_bid=100.0, binance_ask=101.0)
+        store.update("BTCUSDT", price=100.5, cvd=12.0)
+
+        state = store["BTCUSDT"]
+        assert state.binance_bid == 100.0
+        assert state.price == 100.5
+        assert state.get("okx_bid", 0) == 0
+        assert "okx_bid" not in state and "price" in state
+        assert state.to_dict() == {
+            "price": 100.5,
+            "cvd": 12.0,
+            "binance_bid": 100.0,
+            "binance_ask": 101.0,
+        }
+
+    def test_unknown_field_rejected(self):
+        """Тест: неизвестное поле — KeyError, а не молчаливый новый ключ"""
+        store = MarketStateStore()
+        with pytest.raises(KeyError):
+            store.update("BTCUSDT", prcie=1.0)
+
+    def test_per_field_timestamps(self):
+        """Тест: время обновления хранится отдельно для каждого поля"""
+        store = MarketStateStore()
+        store.update("BTCUSDT", now=1000.0, price=1.0)
+        store.update("BTCUSDT", now=1005.0, cvd=2.0)
+
+        state = store["BTCUSDT"]
+        assert state.updated_at("price") == 1000.0
+        assert state.updated_at("cvd") == 1005.0
+        assert state.age("price", now=1010.0) == 10.0
+        assert state.age("okx_bid") == float("inf")
+
+    def test_changed_since(self):
+        """Тест: versioned read возвращает только изменённые символы"""
+        store = MarketStateStore()
+        for symbol in ("BTCUSDT", "ETHUSDT", "SOLUSDT"):
+            store.update(symbol, price=1.0)
+
+        version, symbols = store.changed_since(0)
+        assert sorted(symbols) == ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+
+        store.update("ETHUSDT", price=2.0)
+        version, symbols = store.changed_since(version)
+        assert symbols == ["ETHUSDT"]
+        assert store.changed_since(version) == (version, [])
+
+    def test_snapshot_is_isolated(self):
+        """Тест: snapshot не меняется при последующих обновлениях"""
+        store = MarketStateStore()
+        store.update("BTCUSDT", price=1.0)
+
+        version, snapshot = store.snapshot()
+        store.update("BTCUSDT", price=2.0, cvd=5.0)
+
+        assert snapshot["BTCUSDT"].price == 1.0
+        assert "cvd" not in snapshot["BTCUSDT"]
+        assert snapshot["BTCUSDT"].version == version
+        assert store["BTCUSDT"].price == 2.0
+
+
+class TestMarketStateBenchmark:
+    """Сравнение с dict-of-dicts на 200 символах"""
+
+    @staticmethod
+    def build_dicts():
+        data = {}
+        for i, symbol in enumerate(SYMBOLS):
+            data[symbol] = dict(fill_fields(i))
+        return data
+
+    @staticmethod
+    def build_store():
+        store = MarketStateStore()
+        for i, symbol in enumerate(SYMBOLS):
+            store.update(symbol, **fill_fields(i))
+        return store
+
+    def test_memory_vs_dicts(self):
+        """Тест: память меньше, чем у dict-of-dicts; снимок покрывает все символы"""
+        assert measure_memory(self.build_store) < measure_memory(self.build_dicts)
+        version, snapshot = self.build_store().snapshot()
+        assert len(snapshot) == 200 and isinstance(snapshot[SYMBOLS[0]], SymbolState)
+
+    @pytest.mark.benchmark
+    def test_read_latency_vs_dicts(self):
+        """Тест: чтение атрибута быстрее dict.get-цепочки"""
+        dicts, store = self.build_dicts(), self.build_store()
+        rounds = 20
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for symbol in SYMBOLS:
+                dicts.get(symbol, {}).get("orderbook_imbalance", 0)
+        dict_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for symbol in SYMBOLS:
+                store.states[symbol].orderbook_imbalance
+        store_read = time.perf_counter() - start
+
+        assert store_read < dict_read
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для per-component учёта памяти в AdvancedMemoryManager
+Size probes, бюджеты с eviction hooks, атрибуция роста, tracemalloc
+"""
+
+import gc
+from collections import deque
+
+import pytest
+from analytics.whale_activity_tracker import WhaleActivityTracker, WhaleTradeBuffer, _evict_whale_buffers
+from config.settings import MEMORY_CONFIG
+from utils.memory_manager import AdvancedMemoryManager, approx_sizeof, count_items, evict_oldest
+
+
+class FakeComponent:
+    """Компонент с долгоживущими кэшами"""
+
+    def __init__(self):
+        self.trades = {"BTCUSDT": deque(maxlen=10000), "ETHUSDT": deque(maxlen=10000)}
+        self.klines = {}
+
+
+@pytest.fixture
+def manager():
+    return AdvancedMemoryManager(max_memory_mb=100000)
+
+
+class TestMemoryAccounting:
+    """Тесты per-component учёта памяти"""
+
+    def test_approx_sizeof_scales_with_content(self):
+        """Тест: оценка размера растёт с содержимым"""
+        small = [{"price": float(i), "size": 1.0} for i in range(10)]
+        large = [{"price": float(i), "size": 1.0} for i in range(1000)]
+
+        assert approx_sizeof(large) > approx_sizeof(small) * 50
+
+    def test_evict_oldest(self):
+        """Тест: стандартный eviction hook для deque / dict / dict of deques"""
+        dq = deque(range(10))
+        assert evict_oldest(dq, 0.3) == 3
+        assert dq[0] == 3
+
+        cache = {f"k{i}": i for i in range(10)}
+        assert evict_oldest(cache, 0.5) == 5
+        assert "k0" not in cache and "k9" in cache
+
+        nested = {"A": deque(range(10)), "B": [1, 2, 3, 4]}
+        assert evict_oldest(nested, 0.5) == 7
+        assert list(nested["B"]) == [3, 4]
+
+    def test_sample_aggregates_by_name(self, manager):
+        """Тест: замер агрегирует экземпляры одного компонента"""
+        a, b = FakeComponent(), FakeComponent()
+        a.trades["BTCUSDT"].extend(range(100))
+        b.trades["ETHUSDT"].extend(range(50))
+
+        manager.register_component("fake.trades", a, "trades")
+        manager.register_component("fake.trades", b, "trades")
+
+        totals = manager.sample_components()
+        assert totals["fake.trades"]["instances"] == 2
+        assert totals["fake.trades"]["items"] == 150
+        assert totals["fake.trades"]["bytes"] > 0
+
+    def test_registration_does_not_keep_owner_alive(self, manager):
+        """Тест: регистрация держит владельца по weakref"""
+        component = FakeComponent()
+        manager.register_component("fake.trades", component, "trades")
+        assert len(manager.components) == 1
+
+        del component
+        gc.collect()
+
+        assert manager.components == {}
+
+    def test_budget_triggers_eviction(self, manager):
+        """Тест: превышение бюджета вызывает eviction hook компонента"""
+        component = FakeComponent()
+        component.klines.update({f"k{i}": "x" * 1000 for i in range(2000)})
+
+        manager.register_component(
+            "fake.klines", component, "klines", evict=evict_oldest, budget_mb=1.0
+        )
+
+        evictions = manager.enforce_budgets()
+
+        assert evictions and evictions[0]["component"] == "fake.klines"
+        assert approx_sizeof(component.klines) / (1024 * 1024) <= 1.0
+        assert "k1999" in component.klines
+
+    def test_whale_trades_budget(self, manager):
+        """Тест: колоночные буферы китов учитываются по данным, бюджет срабатывает"""
+        budget_mb = MEMORY_CONFIG["component_budgets_mb"]["whale_tracker.whale_trades"]
+        tracker = WhaleActivityTracker(enable_batcher=False)
+        per_symbol = int(budget_mb * 1024 * 1024 * 0.6 / 65)  # 65 байт на сделку, 2 символа = 120% бюджета
+        for symbol in ("BTCUSDT", "ETHUSDT"):
+            buffer = tracker.whale_trades[symbol] = WhaleTradeBuffer(max_trades=per_symbol)
+            for i in range(per_symbol):
+                buffer.append(1_700_000_000_000 + i, 1 if i % 2 else -1, 0.5, 100.0, 50.0)
+
+        assert count_items(tracker.whale_trades) == 2 * per_symbol
+        size_mb = approx_sizeof(tracker.whale_trades) / (1024 * 1024)
+        assert size_mb > budget_mb
+
+        manager.register_component(
+            "whale_tracker.whale_trades", tracker, "whale_trades",
+            evict=_evict_whale_buffers,
+        )
+        evictions = manager.enforce_budgets()
+        assert [e["component"] for e in evictions] == ["whale_tracker.whale_trades"]
+        assert approx_sizeof(tracker.whale_trades) / (1024 * 1024) <= budget_mb
+        assert tracker.whale_trades["BTCUSDT"].window(0)["count"] == len(tracker.whale_trades["BTCUSDT"])
+
+    def test_component_growth_detected(self, manager):
+        """Тест: устойчивый рост компонента попадает в отчёт об утечках"""
+        component = FakeComponent()
+        manager.register_component("fake.klines", component, "klines")
+
+        for step in range(12):
+            component.klines.update(
+                {f"k{step}_{i}": "x" * 1000 for i in range(300)}
+            )
+            manager.sample_components()
+
+        leaks = manager._detect_component_growth()
+        assert [leak["component"] for leak in leaks] == ["fake.klines"]
+
+    def test_report_and_tracemalloc(self, manager):
+        """Тест: отчёт для /status и diff tracemalloc по модулям"""
+        component = FakeComponent()
+        manager.register_component("fake.trades", component, "trades")
+
+        manager.start_tracemalloc()
+        try:
+            component.trades["BTCUSDT"].extend([b"x" * 512 for _ in range(2000)])
+            diff = manager.tracemalloc_diff()
+        finally:
+            manager.stop_tracemalloc()
+
+        assert any(entry["module"] == "tests.test_memory_accounting" for entry in diff)
+
+        text = manager.format_component_report()
+        assert "fake.trades" in text
+        assert manager.get_component_report()["components"][0]["items"] == 2000
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для Metrics Registry
+Counters / Gauges / Histograms + Prometheus exposition + микробенчмарк
+"""
+
+import asyncio
+import pytest
+from utils.metrics import (
+    MetricsRegistry,
+    benchmark_overhead,
+    stats_collector,
+    track_latency,
+    get_metrics_registry,
+)
+
+
+class TestMetricsRegistry:
+    """Тесты для MetricsRegistry"""
+
+    @pytest.fixture
+    def registry(self):
+        """Фикстура чистого реестра"""
+        return MetricsRegistry(prefix="test")
+
+    def test_counter_with_labels(self, registry):
+        """Тест: counter с labels"""
+        counter = registry.counter("requests_total", "help", ("endpoint",))
+        counter.labels("ticker").inc()
+        counter.labels(endpoint="ticker").inc(2)
+        counter.labels("orderbook").inc()
+
+        assert counter.get("ticker") == 3
+        assert counter.get("orderbook") == 1
+        assert registry.counter("requests_total") is counter
+
+    def test_gauge(self, registry):
+        """Тест: gauge set/inc/dec"""
+        gauge = registry.gauge("queue_depth")
+        gauge.set(10)
+        gauge.inc(5)
+        gauge.dec(3)
+        assert gauge.get() == 12
+
+    def test_histogram_buckets(self, registry):
+        """Тест: histogram — cumulative bucket'ы в exposition"""
+        hist = registry.histogram("latency_seconds", buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.01, 0.05, 0.5, 5.0):
+            hist.observe(value)
+
+        text = registry.render()
+        assert 'test_latency_seconds_bucket{le="0.01"} 2' in text
+        assert 'test_latency_seconds_bucket{le="0.1"} 3' in text
+        assert 'test_latency_seconds_bucket{le="1"} 4' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 5' in text
+        assert "test_latency_seconds_count 5" in text
+
+    def test_type_conflict(self, registry):
+        """Тест: одно имя — один тип"""
+        registry.counter("events")
+        with pytest.raises(ValueError):
+            registry.gauge("events")
+
+    def test_collector_from_get_stats(self, registry):
+        """Тест: экспорт существующего get_stats() через collector"""
+        registry.register_collector(
+            "cache",
+            stats_collector("cache", lambda: {"hits": 7, "hit_rate": 70.0, "top": []}),
+        )
+        text = registry.render()
+        assert "test_cache_hits 7" in text
+        assert "test_cache_hit_rate 70" in text
+        assert "top" not in text
+
+    def test_broken_collector_is_skipped(self, registry):
+        """Тест: ошибка collector'а не ломает /metrics"""
+
+        def broken():
+            raise RuntimeError("boom")
+
+        registry.register_collector("broken", broken)
+        registry.counter("ok_total").inc()
+        assert "test_ok_total 1" in registry.render()
+
+    def test_track_latency_async(self):
+        """Тест: декоратор для async функций"""
+
+        @track_latency("unit_test_call_seconds", stage="async")
+        async def work():
+            await asyncio.sleep(0)
+            return 42
+
+        assert asyncio.run(work()) == 42
+        hist = get_metrics_registry().get("unit_test_call_seconds")
+        assert hist.labels(stage="async").count == 1
+
+    @pytest.mark.benchmark
+    def test_overhead_benchmark(self):
+        """Тест: накладные расходы на событие пренебрежимо малы"""
+        result = benchmark_overhead(iterations=50_000)
+
+        # Событие дешевле замера времени блока вокруг него
+        assert result["counter_inc_ns"] < result["timed_block_ns"]
+        assert result["histogram_observe_ns"] < result["timed_block_ns"]
+
+
+if __name__ == "__main__":
+    for key, value in benchmark_overhead().items():
+        print(f"{key:24} {value:8.1f} ns/op")
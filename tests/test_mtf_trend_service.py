@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для MTFTrendService
+Пересчёт тренда только на закрытии бара, версия входных свечей,
+общий результат для MTF Analyzer / Filter / TrendDetector
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import analytics.mtf_trend_service as mts
+from analytics.mtf_analyzer import MultiTimeframeAnalyzer
+from analytics.mtf_trend_service import MTFTrendService, normalize_timeframe
+from analytics.trenddetector import MultiTimeframeTrendDetector
+from filters.multi_tf_filter import MultiTimeframeFilter
+from utils.data_validator import DataValidator
+
+
+HOUR = 3_600_000
+
+
+def make_candles(count: int, bar_ms: int, now_ms: int, slope: float = 0.002, seed: int = 0):
+    """Свечи Bybit (от новых к старым), последняя — незакрытый бар"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(slope + rng.normal(0, 0.003, count)))
+    first = now_ms // bar_ms * bar_ms - (count - 1) * bar_ms
+    candles = [
+        {
+            "timestamp": first + i * bar_ms,
+            "open": float(closes[i - 1] if i else closes[0]),
+            "high": float(closes[i] * 1.002),
+            "low": float(closes[i] * 0.998),
+            "close": float(closes[i]),
+            "volume": 10.0,
+        }
+        for i in range(count)
+    ]
+    return candles[::-1]
+
+
+class FakeConnector:
+    """Коннектор с klines_cache и счётчиком загрузок"""
+
+    def __init__(self, slope: float = 0.002):
+        self.klines_cache = {}
+        self.slope = slope
+        self.calls = 0
+
+    async def get_klines(self, symbol, interval, limit=100):
+        self.calls += 1
+        tf = normalize_timeframe(interval)
+        return make_candles(limit, mts.TIMEFRAMES[tf][1], int(time.time() * 1000), self.slope)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Свежий глобальный сервис на FakeConnector"""
+    instance = MTFTrendService(FakeConnector())
+    monkeypatch.setattr(mts, "_global_mtf_trend_service", instance)
+    return instance
+
+
+class TestBarClose:
+    """Пересчёт только на закрытии бара"""
+
+    def test_normalize_timeframe(self):
+        """Тест: 1H / 60 / D приводятся к 1h / 1d"""
+        assert normalize_timeframe("1H") == "1h"
+        assert normalize_timeframe("60") == "1h"
+        assert normalize_timeframe("D") == normalize_timeframe("1D") == "1d"
+        with pytest.raises(KeyError):
+            normalize_timeframe("7m")
+
+    @pytest.mark.asyncio
+    async def test_hit_until_next_bar(self, service):
+        """Тест: до закрытия следующего бара — кэш, после — одна загрузка"""
+        now = int(time.time() * 1000) // HOUR * HOUR + 10 * 60_000
+        connector = service.connector
+
+        first = await service.get_trend("BTCUSDT", "1h", now_ms=now)
+        assert connector.calls == 1
+        assert first.bar_ts == now // HOUR * HOUR - HOUR  # незакрытый бар отброшен
+        assert first.trend == "BULLISH" and first.direction == "UP"
+
+        for offset in (1, 20, 45):
+            assert await service.get_trend("BTCUSDT", "60", now_ms=now + offset * 60_000) is first
+        assert connector.calls == 1
+        assert service.stats["hits"] == 3
+
+        # Новый бар закрыт, но биржа его ещё не отдала — повтор не чаще recheck
+        later = now + HOUR
+        await service.get_trend("BTCUSDT", "1h", now_ms=later)
+        await service.get_trend("BTCUSDT", "1h", now_ms=later + 1_000)
+        assert connector.calls == 2
+
+    def test_unchanged_version(self, service):
+        """Тест: те же свечи в другом порядке — без пересчёта, новый close — пересчёт"""
+        now = 1_700_000_000_000
+        candles = make_candles(120, HOUR, now)
+
+        state = service.update("ETHUSDT", "1h", candles, now)
+        assert service.update("ETHUSDT", "1h", candles[::-1], now) is state
+        assert service.stats["unchanged"] == 1
+
+        changed = [dict(c) for c in candles]
+        changed[1]["close"] *= 0.9  # последний закрытый бар
+        assert service.update("ETHUSDT", "1h", changed, now) is not state
+        assert service.stats["recomputes"] == 2
+
+        assert service.update("SOLUSDT", "1h", candles[:30], now) is None
+        service.invalidate("ETHUSDT")
+        assert service.peek("ETHUSDT", "1h") is None
+
+
+class TestConsumers:
+    """Один результат для всех MTF потребителей"""
+
+    @pytest.mark.asyncio
+    async def test_shared_state(self, service):
+        """Тест: Analyzer, Filter, TrendDetector и дашборд читают один расчёт"""
+        connector = service.connector
+        analyzer = MultiTimeframeAnalyzer(connector)
+        mtf_filter = MultiTimeframeFilter()
+        detector = MultiTimeframeTrendDetector()
+
+        data = await mtf_filter._get_mtf_data("BTCUSDT", ["1h", "4h", "1d"])
+        assert set(data) == {"1h", "4h", "1d"}
+        assert connector.calls == 3
+
+        result = await analyzer.analyze("BTCUSDT", "4h")
+        state = service.peek("BTCUSDT", "4h")
+        assert result["trend"] == state.trend and result["strength"] == state.strength
+        assert data["4h"] == {"trend": state.direction, "strength": state.strength}
+        assert detector.get_trend("BTCUSDT", "4H") == state.label
+        assert mtf_filter.trends["BTCUSDT"]["4h"]["trend"] == state.direction
+
+        # Повторная валидация — без загрузок и пересчётов
+        await mtf_filter.validate("BTCUSDT", "LONG")
+        assert connector.calls == 3
+        assert service.stats["recomputes"] == 3
+
+        mtf_filter.clear_cache("BTCUSDT")
+        assert service.peek("BTCUSDT", "1h") is None
+
+    def test_detect_trends_frame_cache(self, monkeypatch):
+        """Тест: detect_trends не чистит и не пересчитывает неизменные свечи"""
+        calls = []
+        original = DataValidator.clean_dataframe
+
+        def counting(df):
+            calls.append(len(df))
+            return original(df)
+
+        monkeypatch.setattr(DataValidator, "clean_dataframe", staticmethod(counting))
+        frame = pd.DataFrame(make_candles(100, HOUR, 1_700_000_000_000)[::-1])
+        detector = MultiTimeframeTrendDetector()
+
+        first = detector.detect_trends(frame, frame, frame)
+        assert detector.detect_trends(frame, frame, frame) == first
+        assert len(calls) == 3
+
+        grown = pd.concat([frame, frame.tail(1).assign(close=1.0)], ignore_index=True)
+        detector.detect_trends(grown, frame, frame)
+        assert len(calls) == 4
+
+
+class TestMTFTrendBenchmark:
+    """Кэш против пересчёта индикаторов на каждый запрос"""
+
+    @pytest.mark.benchmark
+    @pytest.mark.asyncio
+    async def test_hits_vs_recompute(self, service):
+        """Тест: 1000 запросов из кэша быстрее 1000 пересчётов по 200 свечам"""
+        now = int(time.time() * 1000)
+        candles = sorted(make_candles(200, HOUR, now), key=mts.candle_ts)[:-1]
+        analyzer = MultiTimeframeAnalyzer(None)
+        await service.get_trend("BTCUSDT", "1h")
+
+        rounds = 1_000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            price = candles[-1]["close"]
+            analyzer._determine_trend(
+                price,
+                analyzer.calculate_ema(candles, 20),
+                analyzer.calculate_ema(candles, 50),
+                analyzer.calculate_rsi(candles, 14),
+                analyzer.calculate_adx(candles, 14),
+                analyzer.calculate_macd(candles),
+            )
+        recompute_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await service.get_trend("BTCUSDT", "1h")
+        cached_ms = (time.perf_counter() - start) * 1000
+
+        assert cached_ms < recompute_ms
+        assert service.stats["hits"] == rounds
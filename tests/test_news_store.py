@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для NewsStore
+Дедупликация между источниками, TTL, persistence, кэш sentiment
+"""
+
+import time
+
+import pytest
+from analytics.news_sentiment import NewsSentimentAnalyzer
+from connectors.news_store import NewsStore
+
+
+def cryptopanic_item(i: int, title: str = None) -> dict:
+    return {
+        "id": f"cp_{i}",
+        "title": title or f"Bitcoin headline {i}",
+        "published_at": "2026-10-18T10:00:00Z",
+        "url": f"https://cryptopanic.com/news/{i}/slug",
+        "source": "cryptopanic",
+    }
+
+
+def cryptocompare_item(i: int, title: str = None) -> dict:
+    return {
+        "id": str(i),
+        "title": title or f"Ethereum headline {i}",
+        "published_at": 1760781600,
+        "url": f"https://www.coindesk.com/markets/{i}?utm_source=cc",
+        "source": "CryptoCompare",
+    }
+
+
+class FakeGemini:
+    """Считает вызовы AI"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def interpret_text(self, prompt: str) -> str:
+        self.calls += 1
+        return "BULLISH"
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "news_store.db")
+
+
+class TestNewsStore:
+    """Тесты для NewsStore"""
+
+    def test_query_ttl(self, store_path):
+        """Тест: результат запроса отдаётся в пределах TTL, fallback — любой давности"""
+        store = NewsStore(path=store_path)
+        store.put_query("cryptopanic_BTC", [cryptopanic_item(1)], now=1000.0)
+
+        assert len(store.get_query("cryptopanic_BTC", max_age=900, now=1500.0)) == 1
+        assert store.get_query("cryptopanic_BTC", max_age=900, now=2000.0) is None
+        assert len(store.get_query("cryptopanic_BTC")) == 1
+        assert store.get_query("cryptocompare_all") is None
+
+    def test_dedup_across_sources(self, store_path):
+        """Тест: одна новость из CryptoPanic и CryptoCompare — одна статья"""
+        store = NewsStore(path=store_path)
+        title = "SEC approves spot Bitcoin ETF!"
+
+        [cp] = store.put_query("cryptopanic_BTC", [cryptopanic_item(1, title)])
+        cc = store.put_query(
+            "cryptocompare_all",
+            [cryptocompare_item(7, "SEC Approves Spot Bitcoin ETF"), cryptocompare_item(8)],
+        )
+
+        assert cc[0]["news_key"] == cp["news_key"]
+        assert cc[1]["news_key"] != cp["news_key"]
+        assert len(store.articles) == 2
+        assert store.stats["duplicates"] == 1
+
+        # Повтор в одном ответе и URL с другим query string — тот же ключ
+        items = store.put_query(
+            "cryptocompare_BTC",
+            [cryptocompare_item(8), {**cryptocompare_item(8), "url": "https://coindesk.com/markets/8/"}],
+        )
+        assert len(items) == 1
+
+    def test_persistence_and_sentiment_reload(self, store_path):
+        """Тест: статьи, запросы и sentiment переживают перезапуск"""
+        store = NewsStore(path=store_path)
+        [item] = store.put_query("cryptopanic_BTC", [cryptopanic_item(1)])
+        store.set_sentiment(item, "BEARISH", "🔴")
+        store.flush()
+
+        reloaded = NewsStore(path=store_path)
+        assert len(reloaded.get_query("cryptopanic_BTC")) == 1
+        assert reloaded.get_sentiment(cryptopanic_item(1)) == {
+            "sentiment": "BEARISH",
+            "sentiment_emoji": "🔴",
+        }
+
+        # Повторная загрузка статьи от API не теряет sentiment
+        [again] = reloaded.put_query("cryptopanic_BTC", [cryptopanic_item(1)])
+        assert again["sentiment"] == "BEARISH"
+
+    def test_ttl_eviction(self, store_path):
+        """Тест: статьи старше TTL удаляются из памяти и с диска"""
+        store = NewsStore(path=store_path, article_ttl=100)
+        store.put_query("q1", [cryptopanic_item(1)], now=1000.0)
+        store.put_query("q2", [cryptopanic_item(2)], now=1150.0)
+
+        assert store.evict_expired(now=1150.0) == 1
+        assert store.get_query("q1") is None
+        assert [a["id"] for a in store.get_query("q2")] == ["cp_2"]
+        store.flush()
+
+        # На диске осталась только свежая статья (время — реальное, поэтому
+        # перечитываем с большим TTL)
+        reloaded = NewsStore(path=store_path, article_ttl=10**10)
+        assert list(reloaded.articles) == list(store.articles)
+
+    @pytest.mark.asyncio
+    async def test_writes_keep_submission_order(self, store_path):
+        """Тест: записи из event loop идут в порядке постановки — sentiment не затирается"""
+        store = NewsStore(path=store_path)
+        write = store._write
+        order = []
+
+        def slow_write(rows, query_row):
+            order.append(query_row[0] if query_row else rows[0][5])
+            if len(order) == 1:
+                time.sleep(0.05)  # первая запись дольше остальных
+            write(rows, query_row)
+
+        store._write = slow_write
+        items = [store.put_query(f"q{i}", [cryptopanic_item(i)])[0] for i in range(20)]
+        for item in items:
+            store.set_sentiment(item, "BEARISH", "🔴")
+        store.flush()
+
+        assert order == [f"q{i}" for i in range(20)] + ["BEARISH"] * 20
+        reloaded = NewsStore(path=store_path)
+        assert all(reloaded.get_sentiment(cryptopanic_item(i)) for i in range(20))
+
+    def test_evict_oldest_drops_indexes(self, store_path):
+        """Тест: eviction по бюджету памяти убирает статьи вместе с _seen / _titles"""
+        store = NewsStore(path=store_path)
+        store.put_query("q", [cryptopanic_item(i) for i in range(10)])
+
+        assert store.evict_oldest(0.5) == 5
+        assert len(store.articles) == len(store._seen) == len(store._titles) == 5
+        assert store.article_key(cryptopanic_item(0, "Bitcoin headline 0")) not in store.articles
+
+
+class TestSentimentCache:
+    """analyze_sentiment не пересчитывает уже оценённые статьи"""
+
+    @pytest.mark.asyncio
+    async def test_seen_article_not_rescored(self, store_path):
+        """Тест: повторный анализ и новый экземпляр не вызывают AI"""
+        gemini = FakeGemini()
+        analyzer = NewsSentimentAnalyzer(gemini_interpreter=gemini)
+        analyzer.news_store = NewsStore(path=store_path)
+
+        news = [cryptocompare_item(i) for i in range(5)]
+        await analyzer.analyze_sentiment(news)
+        assert gemini.calls == 5
+        assert all(n["sentiment"] == "BULLISH" for n in news)
+
+        await analyzer.analyze_sentiment([cryptocompare_item(i) for i in range(5)])
+        assert gemini.calls == 5
+        analyzer.news_store.flush()
+
+        restarted = NewsSentimentAnalyzer(gemini_interpreter=gemini)
+        restarted.news_store = NewsStore(path=store_path)
+        fresh = [cryptocompare_item(i) for i in range(6)]
+        await restarted.analyze_sentiment(fresh)
+        assert gemini.calls == 6
+        assert fresh[0]["sentiment_emoji"] == "🟢"
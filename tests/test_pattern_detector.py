@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для PatternDetector
+Маски свечных паттернов и pivot'ы против поэлементного обхода,
+касания через searchsorted, кэш по последней закрытой свече
+"""
+
+import time
+
+import numpy as np
+import pytest
+from analytics.pattern_detector import (
+    PatternDetector,
+    candlestick_masks,
+    count_touches,
+    pivot_mask,
+)
+
+
+def make_ohlc(bars: int, seed: int = 0):
+    """Случайное блуждание OHLC с разными телами и тенями"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    opens = np.roll(closes, 1) * (1 + rng.normal(0, 0.002, bars))
+    opens[0] = closes[0]
+    highs = np.maximum(opens, closes) * (1 + rng.exponential(0.004, bars))
+    lows = np.minimum(opens, closes) * (1 - rng.exponential(0.004, bars))
+    return opens, highs, lows, closes
+
+
+def naive_patterns(o, h, l, c, i):
+    """Эталон: паттерны, завершившиеся на свече i (обход по индексам)"""
+    found = set()
+    body = abs(c[i] - o[i])
+    if h[i] - l[i] > 0 and body / (h[i] - l[i]) < 0.1:
+        found.add("Doji")
+    if c[i] > o[i] and o[i] - l[i] > body * 2 and h[i] - c[i] < body * 0.5:
+        found.add("Hammer")
+    if o[i] > c[i] and h[i] - o[i] > body * 2 and c[i] - l[i] < body * 0.5:
+        found.add("Shooting Star")
+    if i >= 1:
+        prev = abs(c[i - 1] - o[i - 1])
+        if o[i - 1] > c[i - 1] and c[i] > o[i] and c[i] > o[i - 1] and o[i] < c[i - 1] and body > prev:
+            found.add("Bullish Engulfing")
+        if c[i - 1] > o[i - 1] and o[i] > c[i] and o[i] > c[i - 1] and c[i] < o[i - 1] and body > prev:
+            found.add("Bearish Engulfing")
+    if i >= 2:
+        small = abs(c[i - 1] - o[i - 1]) < (h[i - 2] - l[i - 2]) * 0.3
+        if o[i - 2] > c[i - 2] and small and c[i] > o[i] and c[i] > (o[i - 2] + c[i - 2]) / 2:
+            found.add("Morning Star")
+        if c[i - 2] > o[i - 2] and small and o[i] > c[i] and c[i] < (o[i - 2] + c[i - 2]) / 2:
+            found.add("Evening Star")
+    return found
+
+
+def naive_resistance(highs, threshold):
+    """Эталон: вложенный цикл pivot'ов и касаний — O(n²)"""
+    levels = []
+    for i in range(2, len(highs) - 2):
+        if all(highs[i] > highs[j] for j in (i - 2, i - 1, i + 1, i + 2)):
+            touches = sum(1 for h in highs if abs(h - highs[i]) / highs[i] < threshold)
+            levels.append((highs[i], touches))
+    return levels
+
+
+class TestCandlestickMasks:
+    """Маски паттернов по всей истории"""
+
+    def test_masks_match_per_bar(self):
+        """Тест: маска каждого паттерна совпадает с проверкой по индексам"""
+        o, h, l, c = make_ohlc(2_000)
+        masks = candlestick_masks(o, h, l, c)
+
+        for i in range(len(c)):
+            found = {name for name, mask in masks.items() if mask[i]}
+            assert found == naive_patterns(o, h, l, c, i), i
+        assert sum(int(m.sum()) for m in masks.values()) > 50
+
+    def test_last_bar_patterns_and_lookback(self):
+        """Тест: паттерны последней свечи; lookback ограничивает длину паттерна"""
+        # Красная, маленькая, сильная зелёная — Morning Star
+        o = [110.0, 100.5, 101.0]
+        c = [100.0, 100.2, 109.0]
+        h = [111.0, 101.0, 109.5]
+        l = [99.0, 99.5, 100.5]
+
+        result = PatternDetector.detect_candlestick_patterns(o, h, l, c)
+        assert "Morning Star" in [p["name"] for p in result["patterns"]]
+        assert result["signal"] == "bullish"
+        assert result["occurrences"]["Morning Star"] == 1
+
+        short = PatternDetector.detect_candlestick_patterns(o, h, l, c, lookback=2)
+        assert "Morning Star" not in [p["name"] for p in short["patterns"]]
+        assert PatternDetector.detect_candlestick_patterns(o[:2], h[:2], l[:2], c[:2])["signal"] == "neutral"
+
+
+class TestSupportResistance:
+    """Pivot'ы и касания"""
+
+    def test_pivots_and_touches_match_loops(self):
+        """Тест: скользящий max и searchsorted дают те же уровни и касания"""
+        _, h, l, _ = make_ohlc(500, seed=1)
+        mask = pivot_mask(h, 2)
+        touches = count_touches(h, h[mask], 0.02)
+        assert list(zip(h[mask].tolist(), touches.tolist())) == naive_resistance(h.tolist(), 0.02)
+
+        low_pivots = np.flatnonzero(pivot_mask(l, 2, highs=False))
+        expected = [
+            i for i in range(2, len(l) - 2)
+            if all(l[i] < l[j] for j in (i - 2, i - 1, i + 1, i + 2))
+        ]
+        assert low_pivots.tolist() == expected
+
+    def test_find_support_resistance(self):
+        """Тест: уровни с ≥ 2 касаниями, расстояние от текущей цены"""
+        _, h, l, c = make_ohlc(300, seed=2)
+        result = PatternDetector.find_support_resistance(h, l, c, lookback=200)
+
+        assert result["current_price"] == round(c[-1], 2)
+        assert 0 < len(result["resistance"]) <= 3
+        for level in result["resistance"]:
+            assert level["touches"] >= 2
+            assert level["distance_pct"] == pytest.approx((level["level"] - c[-1]) / c[-1] * 100, abs=0.01)
+        touches = [level["touches"] for level in result["support"]]
+        assert touches == sorted(touches, reverse=True)
+
+    def test_trend_structure(self):
+        """Тест: ступенчатый рост — higher highs / higher lows"""
+        base = np.arange(40, dtype=float)
+        wave = np.tile([0.0, 4.0, 0.0, -4.0], 10)
+        highs = 100 + base + wave + 1
+        lows = 100 + base + wave - 1
+
+        result = PatternDetector.detect_trend_structure(highs, lows, highs, lookback=20)
+        assert result["trend"] == "uptrend"
+        assert result["swing_highs_count"] >= 2
+        assert PatternDetector.detect_trend_structure(highs[:5], lows[:5], highs[:5])["trend"] == "unknown"
+
+
+class TestAnalyzeCache:
+    """Кэш по (symbol, interval, ts последней свечи)"""
+
+    def test_cache_until_new_bar(self):
+        """Тест: тот же бар — кэш, новый бар — пересчёт; порядок свечей не важен"""
+        o, h, l, c = make_ohlc(120, seed=3)
+        candles = [
+            {"timestamp": t * 60_000, "open": o[t], "high": h[t], "low": l[t], "close": c[t]}
+            for t in range(120)
+        ]
+        detector = PatternDetector()
+
+        first = detector.analyze("BTCUSDT", "60", candles[::-1])
+        assert detector.analyze("BTCUSDT", "60", candles) is first
+        assert detector.stats == {"hits": 1, "misses": 1}
+        assert first["last_close_ts"] == 119 * 60_000
+
+        detector.analyze("BTCUSDT", "240", candles)
+        second = detector.analyze("BTCUSDT", "60", candles[1:] + [{**candles[-1], "timestamp": 120 * 60_000}])
+        assert second is not first
+        assert detector.stats["misses"] == 3
+
+        detector.invalidate("BTCUSDT")
+        assert detector.analyze("BTCUSDT", "60", candles) is not first
+
+
+class TestPatternBenchmark:
+    """Векторный проход против обхода"""
+
+    @pytest.mark.benchmark
+    def test_vectorized_vs_loops(self):
+        """Тест: 3000 баров — маски + S/R быстрее обхода с O(n²) касаниями"""
+        o, h, l, c = make_ohlc(3_000, seed=4)
+        highs = h.tolist()
+
+        start = time.perf_counter()
+        [naive_patterns(o, h, l, c, i) for i in range(len(c))]
+        naive_resistance(highs, 0.02)
+        naive_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        candlestick_masks(o, h, l, c)
+        PatternDetector.find_support_resistance(h, l, c, lookback=len(c))
+        vector_ms = (time.perf_counter() - start) * 1000
+
+        assert vector_ms < naive_ms
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для PerformanceRollup
+Триггеры на закрытие сигнала против пересчёта по signals, backfill,
+статистика SignalAnalytics / SignalPerformanceAnalyzer, 1M сигналов
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from analytics.performance_rollup import PerformanceRollup
+from analytics.signal_analytics import SignalAnalytics
+from analytics.signal_performance_analyzer import SignalPerformanceAnalyzer
+
+
+SIGNALS_TABLE = """
+CREATE TABLE signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    direction TEXT,
+    scenario_id TEXT,
+    status TEXT DEFAULT 'active',
+    roi REAL,
+    profit_percent REAL,
+    current_roi REAL,
+    quality_score REAL,
+    risk_reward REAL,
+    entry_time TEXT,
+    close_time TEXT,
+    timestamp TEXT
+)
+"""
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"]
+SCENARIOS = ["SCN_001", "SCN_002", None]
+CLOSES = [  # (статус, колонка ROI) как пишут signal_recorder и ROI tracker'ы
+    ("closed", "roi"),
+    ("completed", "profit_percent"),
+    ("stopped", "current_roi"),
+]
+
+
+def make_signals(count: int, seed: int = 0):
+    """Сигналы за последние 60 дней: (symbol, direction, scenario, ts, roi, quality, rr, status, column)"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    for i in range(count):
+        opened = now - timedelta(minutes=int(rng.integers(0, 60 * 24 * 60)))
+        status, column = CLOSES[i % 3]
+        yield (
+            SYMBOLS[i % 4],
+            "LONG" if rng.random() < 0.5 else "SHORT",
+            SCENARIOS[i % 3],
+            opened.strftime("%Y-%m-%d %H:%M:%S"),
+            float(np.round(rng.normal(0.3, 2.0), 4)),
+            float(rng.integers(40, 100)),
+            float(np.round(rng.uniform(1, 4), 2)),
+            status,
+            column,
+        )
+
+
+def open_signal(cursor, symbol, direction, scenario, ts, quality, rr):
+    cursor.execute(
+        "INSERT INTO signals (symbol, direction, scenario_id, timestamp, entry_time, quality_score, risk_reward) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (symbol, direction, scenario, ts, ts, quality, rr),
+    )
+    return cursor.lastrowid
+
+
+def close_signal(cursor, signal_id, status, column, roi, ts):
+    close_time = (datetime.strptime(ts, "%Y-%m-%d %H:%M:%S") + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute(
+        f"UPDATE signals SET status = ?, {column} = ?, close_time = ? WHERE id = ?",
+        (status, roi, close_time, signal_id),
+    )
+
+
+def brute_force(db_path: str, days: int):
+    """Эталон: скан всех закрытых сигналов окна"""
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        """
+        SELECT symbol, scenario_id, COALESCE(profit_percent, roi, current_roi), quality_score
+        FROM signals WHERE status IN ('closed', 'completed', 'stopped') AND date(timestamp) >= ?
+        """,
+        (cutoff,),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "signals.db")
+    conn = sqlite3.connect(path)
+    conn.execute(SIGNALS_TABLE)
+    conn.commit()
+    conn.close()
+    return path
+
+
+class TestRollupMaintenance:
+    """Обновление rollup при закрытии"""
+
+    def test_triggers_match_scan_and_backfill(self, db_path):
+        """Тест: rollup по триггерам = скан signals = backfill"""
+        rollup = PerformanceRollup(db_path)
+        assert rollup.ensure()
+
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        for i, (symbol, direction, scenario, ts, roi, quality, rr, status, column) in enumerate(make_signals(600)):
+            signal_id = open_signal(cursor, symbol, direction, scenario, ts, quality, rr)
+            if i % 5:  # каждый пятый остаётся активным
+                close_signal(cursor, signal_id, status, column, roi, ts)
+        # Повторное обновление закрытого сигнала не считается второй раз
+        cursor.execute("UPDATE signals SET status = 'closed' WHERE status = 'completed'")
+        conn.commit()
+        conn.close()
+
+        rows = brute_force(db_path, 30)
+        overall = rollup.summary(30)
+        rois = np.array([r[2] for r in rows])
+        assert overall["count"] == len(rows)
+        assert overall["wins"] == int((rois > 0).sum())
+        assert overall["total_roi"] == pytest.approx(rois.sum())
+        assert overall["std_roi"] == pytest.approx(rois.std())
+        assert overall["max_roi"] == pytest.approx(rois.max())
+        assert overall["avg_hold_minutes"] == pytest.approx(120)
+        assert overall["avg_quality"] == pytest.approx(np.mean([r[3] for r in rows]))
+
+        by_symbol = rollup.summary(30, by=("symbol",))
+        for symbol in SYMBOLS:
+            assert by_symbol[symbol]["count"] == sum(r[0] == symbol for r in rows)
+
+        scenarios = rollup.summary(30, by=("scenario",), scenario_only=True)
+        assert set(scenarios) == {"SCN_001", "SCN_002"}
+
+        incremental = rollup.summary(60, by=("symbol", "scenario", "direction"))
+        assert rollup.ensure(rebuild=True)
+        rebuilt = rollup.summary(60, by=("symbol", "scenario", "direction"))
+        assert rebuilt.keys() == incremental.keys()
+        for key, stats in rebuilt.items():
+            assert stats == pytest.approx(incremental[key])
+
+    def test_top_signals_and_missing_table(self, tmp_path, db_path):
+        """Тест: топ по ROI через индекс; без таблицы signals — пустой результат"""
+        rollup = PerformanceRollup(db_path)
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        for roi in (1.5, -2.0, 4.0, 0.5):
+            signal_id = open_signal(cursor, "BTCUSDT", "LONG", None, "2030-01-01 00:00:00", 50, 2)
+            close_signal(cursor, signal_id, "closed", "roi", roi, "2030-01-01 00:00:00")
+        conn.commit()
+        conn.close()
+
+        assert [s["roi"] for s in rollup.top_signals(limit=2)] == [4.0, 1.5]
+        assert rollup.top_signals(limit=1, best=False)[0]["roi"] == -2.0
+
+        empty = PerformanceRollup(str(tmp_path / "empty.db"))
+        assert not empty.ensure()
+        assert empty.summary(30)["count"] == 0 and empty.summary(30, by=("symbol",)) == {}
+
+
+class TestAnalyticsOnRollup:
+    """SignalAnalytics и SignalPerformanceAnalyzer поверх rollup"""
+
+    @pytest.mark.asyncio
+    async def test_overview_and_stats(self, db_path):
+        """Тест: /performance и /stats считаются по rollup"""
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        for i, (symbol, direction, scenario, ts, roi, quality, rr, status, column) in enumerate(make_signals(300, seed=1)):
+            signal_id = open_signal(cursor, symbol, direction, scenario, ts, quality, rr)
+            if i % 4:
+                close_signal(cursor, signal_id, status, column, roi, ts)
+        conn.commit()
+        conn.close()
+
+        analytics = SignalAnalytics(db_path)
+        rows = brute_force(db_path, 7)
+        stats = analytics.get_overall_stats(7)
+        assert stats["total_signals"] == len(rows)
+        assert stats["symbols_traded"] == len({r[0] for r in rows})
+        assert stats["scenarios_used"] == len({r[1] for r in rows if r[1]})
+        top = analytics.get_top_performing_scenarios(60, limit=5)
+        assert [s["scenario_id"] for s in top] and all(s["total_signals"] >= 5 for s in top)
+
+        analyzer = SignalPerformanceAnalyzer(bot_instance=None)
+        analyzer.db_path = db_path
+        analyzer.rollup = analytics.rollup
+        overview = await analyzer.get_performance_overview(30)
+        rows = brute_force(db_path, 30)
+        assert overview["closed_signals"] == len(rows)
+        assert overview["active_signals"] > 0
+        assert overview["best_trade"]["roi"] == pytest.approx(max(r[2] for r in rows), abs=0.01)
+        assert sum(v["count"] for v in overview["by_type"].values()) == len(rows)
+        assert "SIGNAL PERFORMANCE" in analyzer.format_performance_overview(overview)
+
+
+class TestRollupBenchmark:
+    """/stats по rollup против скана 1M сигналов"""
+
+    @pytest.mark.benchmark
+    def test_stats_1m_signals(self, db_path):
+        """Тест: сумма по дневным строкам быстрее скана и группировки в Python"""
+        count = 1_000_000
+        rng = np.random.default_rng(2)
+        now = datetime.now()
+        days = [(now - timedelta(days=int(d))).strftime("%Y-%m-%d 12:00:00") for d in range(365)]
+        day_idx = rng.integers(0, 365, count)
+        rois = np.round(rng.normal(0.3, 2.0, count), 4)
+        symbols = rng.integers(0, 50, count)
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE INDEX idx_signals_timestamp ON signals(timestamp)")
+        conn.executemany(
+            "INSERT INTO signals (symbol, direction, scenario_id, status, roi, timestamp) VALUES (?, ?, ?, 'closed', ?, ?)",
+            (
+                (f"SYM{s}USDT", "LONG" if s % 2 else "SHORT", f"SCN_{s % 7}", float(r), days[d])
+                for s, r, d in zip(symbols.tolist(), rois.tolist(), day_idx.tolist())
+            ),
+        )
+        conn.commit()
+        conn.close()
+
+        rollup = PerformanceRollup(db_path)
+        rollup.ensure()
+
+        # Прежний путь /performance: скан окна + группировка и std в Python
+        start = time.perf_counter()
+        conn = sqlite3.connect(db_path)
+        cutoff = (now - timedelta(days=90)).strftime("%Y-%m-%d")
+        trades = conn.execute(
+            "SELECT symbol, direction, roi FROM signals WHERE status = 'closed' AND timestamp >= ? AND roi IS NOT NULL",
+            (cutoff,),
+        ).fetchall()
+        conn.close()
+        scan_rois = [t[2] for t in trades]
+        mean = sum(scan_rois) / len(scan_rois)
+        (sum((x - mean) ** 2 for x in scan_rois) / len(scan_rois)) ** 0.5
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        overall = rollup.summary(90)
+        rollup.summary(90, by=("symbol",))
+        rollup.summary(90, by=("direction",))
+        rollup_ms = (time.perf_counter() - start) * 1000
+
+        assert overall["count"] == len(trades)
+        assert overall["avg_roi"] == pytest.approx(mean)
+        assert rollup_ms * 10 < scan_ms
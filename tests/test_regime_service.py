@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для RegimeService
+Признаки на закрытии бара против пересчёта, подтверждение перехода,
+всплеск внутри бара, O(1) режим для EnhancedScenarioMatcher
+"""
+
+import time
+
+import numpy as np
+import pytest
+from analytics.mtf_trend_service import MTFTrendService
+from analytics.regime_service import RegimeService, bar_features
+from systems.market_regime_detector import MarketRegimeDetector
+from systems.unified_scenario_matcher import EnhancedScenarioMatcher
+
+
+HOUR = 3_600_000
+START = 1_700_000_000_000 // HOUR * HOUR
+
+
+def make_candles(count: int, seed: int = 0, volume: float = 1_000.0, spread: float = 0.3):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 0.4, count))
+    return [
+        {"timestamp": START + i * HOUR, "open": c - 0.1, "high": c + spread, "low": c - spread,
+         "close": c, "volume": volume * rng.uniform(0.9, 1.1)}
+        for i, c in enumerate(closes.tolist())
+    ]
+
+
+def brute_features(candles, lookback):
+    """Эталон: ATR / ширина BB по каждому окну отдельно"""
+    highs = np.array([c["high"] for c in candles])
+    lows = np.array([c["low"] for c in candles])
+    closes = np.array([c["close"] for c in candles])
+    atrs, widths = [], []
+    for end in range(len(candles) - lookback, len(candles)):
+        tr = [max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1]))
+              for i in range(end - 13, end + 1)]
+        atrs.append(np.mean(tr))
+        window = closes[end - 19:end + 1]
+        widths.append(4 * window.std() / window.mean())
+    atr_pct = np.mean(np.array(atrs) <= atrs[-1]) * 100
+    bb_pct = np.mean(np.array(widths) <= widths[-1]) * 100
+    return atrs[-1], atr_pct, bb_pct
+
+
+class TestRegimeState:
+    """Конечный автомат режима"""
+
+    def test_features_match_brute_force(self):
+        """Тест: перцентили ATR и ширины BB = пересчёт по окнам"""
+        candles = make_candles(300, seed=1)
+        features = bar_features(candles, 100)
+        atr, atr_pct, bb_pct = brute_features(candles, 100)
+        assert features["atr"] == pytest.approx(atr)
+        assert features["atr_percentile"] == pytest.approx(atr_pct)
+        assert features["bb_width_percentile"] == pytest.approx(bb_pct)
+        volumes = [c["volume"] for c in candles[-20:]]
+        assert features["volume_ratio"] == pytest.approx(volumes[-1] / np.mean(volumes))
+
+    def test_transition_needs_confirmation(self):
+        """Тест: режим меняется только после confirm_bars баров подряд"""
+        service = RegimeService(config={"confirm_bars": 2})
+        candles = make_candles(150, seed=2)
+        state = service.on_bar_close("BTCUSDT", candles, adx=12.0)
+        initial = state.regime
+        assert initial != "TRENDING" and state.phase
+
+        # Сильный ADX + объём: первый бар — только кандидат
+        hot = dict(candles[-1], timestamp=START + 150 * HOUR, volume=5_000.0)
+        candles.append(hot)
+        state = service.on_bar_close("BTCUSDT", candles, adx=40.0)
+        assert state.regime == initial and state.pending == "TRENDING"
+
+        # Повтор того же бара ничего не меняет
+        assert service.on_bar_close("BTCUSDT", candles, adx=40.0).pending_count == 1
+
+        candles.append(dict(hot, timestamp=START + 151 * HOUR, volume=6_000.0))
+        state = service.on_bar_close("BTCUSDT", candles, adx=40.0)
+        assert state.regime == "TRENDING" and state.pending is None
+        assert state.since_ts == START + 151 * HOUR
+        assert list(state.transitions) == [
+            {"ts": START + 151 * HOUR, "from": initial, "to": "TRENDING", "reason": "bar_close"}
+        ]
+        assert service.get_stats()["transitions"] == 1
+
+    def test_spike_switches_inside_bar(self):
+        """Тест: всплеск диапазона внутри бара — переход без ожидания, раз за бар"""
+        service = RegimeService()
+        candles = make_candles(150, seed=3)
+        state = service.on_bar_close("ETHUSDT", candles, adx=15.0)
+        forming = START + 150 * HOUR
+        price = candles[-1]["close"]
+
+        assert not service.on_market_update("ETHUSDT", forming, price + 0.1, price - 0.1, 100.0)
+        assert service.on_market_update("ETHUSDT", forming, price + 3 * state.atr, price, 100.0)
+        assert state.regime == "EXPANDING" and state.transitions[-1]["reason"] == "range_spike"
+        assert not service.on_market_update("ETHUSDT", forming, price + 5 * state.atr, price, 1e9)
+        assert not service.on_market_update("BTCUSDT", forming, 1.0, 0.0, 1e9)  # нет состояния
+
+    @pytest.mark.asyncio
+    async def test_trade_bus_forming_bar(self):
+        """Тест: сделки Bybit из TradeBus собирают формирующийся бар и ловят всплеск"""
+        from core.trade_bus import TradeBus
+
+        service = RegimeService()
+        bus = TradeBus()
+        bus.subscribe("regime", service.on_trades, exchanges=("bybit",))
+        candles = make_candles(150, seed=3)
+        state = service.on_bar_close("ETHUSDT", candles, adx=15.0)
+        forming = START + 150 * HOUR
+        price = candles[-1]["close"]
+
+        bus.publish("bybit", "ETHUSDT", forming - 1, price + 10 * state.atr, 1.0, "buy")  # прошлый бар
+        bus.publish("bybit", "ETHUSDT", forming + 1_000, price, 1.0, "buy")
+        bus.publish("binance", "ETHUSDT", forming + 2_000, price + 10 * state.atr, 1.0, "buy")
+        bus.publish("bybit", "SOLUSDT", forming + 2_000, 1.0, 1e9, "buy")  # нет состояния
+        await bus.flush()
+        assert state.regime != "EXPANDING" and "SOLUSDT" not in service._forming
+
+        # Диапазон набирается по нескольким батчам одного бара
+        bus.publish("bybit", "ETHUSDT", forming + 60_000, price + 1.5 * state.atr, 1.0, "sell")
+        await bus.flush()
+        assert state.regime != "EXPANDING"
+        bus.publish("bybit", "ETHUSDT", forming + 120_000, price - 1.6 * state.atr, 1.0, "sell")
+        await bus.flush()
+        assert state.regime == "EXPANDING" and state.transitions[-1]["reason"] == "range_spike"
+        assert service._forming["ETHUSDT"][0] == forming
+
+    def test_trend_service_listener_and_stale(self):
+        """Тест: пересчёт MTFTrendService на закрытии 1h бара обновляет режим"""
+        trends = MTFTrendService()
+        service = RegimeService()
+        trends.subscribe(service.on_trend)
+        candles = make_candles(120, seed=4)
+        now = START + 120 * HOUR + 1
+
+        trends.update("SOLUSDT", "4h", candles, now_ms=now)
+        assert service.get("SOLUSDT") is None  # чужой таймфрейм
+
+        trend = trends.update("SOLUSDT", "1h", candles, now_ms=now)
+        state = service.get("SOLUSDT", now_ms=now)
+        assert state.bar_ts == START + 119 * HOUR and state.adx == trend.adx
+        assert service.get("SOLUSDT", now_ms=now + 4 * HOUR) is None
+        assert service.regime("SOLUSDT") == state.regime and service.regime("XRPUSDT") == "NEUTRAL"
+
+
+class TestMatcherIntegration:
+    """EnhancedScenarioMatcher читает режим из сервиса"""
+
+    def test_suitable_strategies_index(self):
+        """Тест: стратегии по режиму в любом регистре, JSON не мутирует"""
+        matcher = EnhancedScenarioMatcher()
+        selector = matcher.strategies["strategy_selector"]
+        before = {k: list(v) for k, v in selector["market_regime"].items()}
+        for _ in range(3):
+            trending = matcher._get_suitable_strategies("TRENDING")
+        assert set(trending) == {"momentum", "breakout", "mean_reversion"}
+        assert set(matcher._get_suitable_strategies("ranging")) == {"mean_reversion", "counter_trend", "momentum"}
+        assert set(matcher._get_suitable_strategies("UNKNOWN")) == set(selector["all_weather"])
+        assert selector["market_regime"] == before
+
+
+class TestRegimeBenchmark:
+    """Поиск режима на скан против классификации по сырым данным"""
+
+    @pytest.mark.benchmark
+    def test_lookup_vs_detect(self):
+        """Тест: get() + стратегии быстрее detect() + копирования списков на каждом скане"""
+        symbols = [f"SYM{i}USDT" for i in range(50)]
+        service = RegimeService()
+        candles = make_candles(150, seed=5)
+        for symbol in symbols:
+            service.on_bar_close(symbol, candles, adx=25.0)
+        matcher = EnhancedScenarioMatcher()
+        selector = matcher.strategies["strategy_selector"]
+        detector = MarketRegimeDetector()
+        scans = 200
+        metrics = {"adx": 25.0, "volume": 1_200, "volume_ma20": 1_000, "bb_width_percentile": 45,
+                   "atr_percentile": 50, "price": 100.0, "high_24h": 104.0, "low_24h": 97.0}
+
+        start = time.perf_counter()
+        for _ in range(scans):
+            for symbol in symbols:
+                regime = detector.detect(metrics)
+                detector.detect_regime(metrics)
+                strategies = list(selector["market_regime"].get(regime.lower(), []))
+                list(set(strategies + selector["all_weather"]))
+        detect_us = (time.perf_counter() - start) * 1e6 / (scans * len(symbols))
+
+        start = time.perf_counter()
+        for _ in range(scans):
+            for symbol in symbols:
+                matcher._get_suitable_strategies(service.get(symbol).regime)
+        lookup_us = (time.perf_counter() - start) * 1e6 / (scans * len(symbols))
+
+        assert lookup_us < detect_us
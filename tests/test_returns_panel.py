@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для ReturnsPanel
+Инкрементальные Pearson / EWMA / beta против пересчёта по окну,
+пропуски и опоздавшие бары, backfill, CorrelationAnalyzer на панели
+"""
+
+import itertools
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from analytics.correlation_analyzer import CorrelationAnalyzer
+from analytics.returns_panel import ReturnsPanel
+
+
+BAR_MS = 300_000
+
+
+def make_prices(bars: int, symbols: int, seed: int = 0) -> np.ndarray:
+    """Цены bars × symbols; второй символ коррелирует с первым"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, (bars, symbols))
+    if symbols > 1:
+        returns[:, 1] += returns[:, 0]
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+def pairwise_reference(matrix: np.ndarray) -> np.ndarray:
+    """Эталон: np.corrcoef по общим барам каждой пары"""
+    n = len(matrix)
+    ref = np.full((n, n), np.nan)
+    for i, j in itertools.product(range(n), range(n)):
+        ok = ~np.isnan(matrix[i]) & ~np.isnan(matrix[j])
+        ref[i, j] = np.corrcoef(matrix[i, ok], matrix[j, ok])[0, 1]
+    return ref
+
+
+def full_recompute(returns: np.ndarray) -> np.ndarray:
+    """Пересчёт по всему окну с попарными пропусками — O(bars·n²)"""
+    present = ~np.isnan(returns)
+    x = np.where(present, returns, 0.0)
+    m = present.astype(np.float64)
+    n, sx, sxx, sxy = m.T @ m, x.T @ m, (x * x).T @ m, x.T @ x
+    var = n * sxx - sx * sx
+    return (n * sxy - sx * sx.T) / np.sqrt(var * var.T)
+
+
+class TestReturnsPanel:
+    """Тесты для скользящей панели"""
+
+    def test_rolling_pearson_matches_corrcoef(self):
+        """Тест: после вытеснения старых баров корреляция равна corrcoef по окну"""
+        prices = make_prices(400, 5)
+        panel = ReturnsPanel("5", window=100)
+        symbols = [f"S{i}" for i in range(5)]
+        for t in range(400):
+            for i, symbol in enumerate(symbols):
+                panel.on_bar_close(symbol, t * BAR_MS, prices[t, i])
+
+        returns = np.diff(np.log(prices[-101:]), axis=0).T
+        assert panel.count == 100
+        assert panel.matrix(symbols) == pytest.approx(returns)
+        assert panel.correlation(symbols) == pytest.approx(np.corrcoef(returns), abs=1e-9)
+        assert panel.bar_timestamps()[-1] == 399 * BAR_MS
+
+    def test_missing_bars_pairwise(self):
+        """Тест: пропуски символа учитываются попарно, бар фиксирует следующий бар"""
+        prices = make_prices(300, 4, seed=1)
+        panel = ReturnsPanel("5", window=120)
+        symbols = [f"S{i}" for i in range(4)]
+        for t in range(300):
+            for i, symbol in enumerate(symbols):
+                if i == 3 and t % 5 == 0:
+                    continue
+                panel.on_bar_close(symbol, t * BAR_MS, prices[t, i])
+        panel.flush()
+
+        matrix = panel.matrix(symbols)
+        assert np.isnan(matrix[3]).sum() > 0
+        assert panel.correlation(symbols) == pytest.approx(pairwise_reference(matrix), abs=1e-9)
+
+    def test_late_bar_amends_window(self):
+        """Тест: опоздавшая доходность дописывается в зафиксированный бар"""
+        panel = ReturnsPanel("5", window=50)
+        prices = make_prices(60, 2, seed=2)
+        for t in range(60):
+            panel.on_bar_close("A", t * BAR_MS, prices[t, 0])
+            if t < 59:
+                panel.on_bar_close("B", t * BAR_MS, prices[t, 1])
+        panel.on_bar_close("A", 60 * BAR_MS, prices[59, 0])  # фиксирует бар 59 без B
+        assert panel.on_bar_close("B", 59 * BAR_MS, prices[59, 1])
+        assert panel.stats["amended"] == 1
+
+        matrix = panel.matrix(["A", "B"])
+        assert panel.correlation(["A", "B"]) == pytest.approx(pairwise_reference(matrix), abs=1e-9)
+        assert not panel.on_bar_close("B", 59 * BAR_MS, prices[59, 1])
+
+    def test_beta_and_ewma(self):
+        """Тест: beta равна МНК-наклону; EWMA видит сильную связь"""
+        prices = make_prices(200, 3, seed=3)
+        panel = ReturnsPanel("5", window=150, ewma_halflife=30)
+        symbols = ["BTCUSDT", "ETHUSDT", "XRPUSDT"]
+        for t in range(200):
+            for i, symbol in enumerate(symbols):
+                panel.on_bar_close(symbol, t * BAR_MS, prices[t, i])
+
+        x, y = panel.matrix(["BTCUSDT", "ETHUSDT"])
+        slope = np.polyfit(x, y, 1)[0]
+        assert panel.beta("BTCUSDT")["ETHUSDT"] == pytest.approx(slope)
+        assert panel.beta("BTCUSDT")["BTCUSDT"] == pytest.approx(1.0)
+        assert panel.beta("SOLUSDT") == {}
+
+        ewma = panel.correlation(symbols, method="ewma")
+        assert ewma[0, 1] > 0.5
+        assert abs(ewma[0, 2]) < 0.5
+        assert np.allclose(ewma, ewma.T)
+
+    def test_backfill_new_symbol(self):
+        """Тест: символ, добавленный позже, дописывается в окно backfill'ом"""
+        prices = make_prices(150, 3, seed=4)
+        candles = {
+            s: [{"timestamp": t * BAR_MS, "close": prices[t, i]} for t in range(150)]
+            for i, s in enumerate(["A", "B", "C"])
+        }
+        panel = ReturnsPanel("5", window=100)
+        panel.load_history({"A": candles["A"], "B": candles["B"]})
+        panel.load_history({"C": candles["C"][::-1]})  # порядок свечей не важен
+
+        returns = np.diff(np.log(prices[-101:]), axis=0).T
+        assert panel.count == 100
+        assert panel.correlation(["A", "B", "C"]) == pytest.approx(np.corrcoef(returns), abs=1e-9)
+
+        # Повторная загрузка тех же свечей ничего не меняет
+        bars = panel.stats["bars"]
+        panel.load_history(candles)
+        assert panel.stats["bars"] == bars
+
+
+class FakeConnector:
+    """Bybit коннектор со свечами от новых к старым"""
+
+    def __init__(self, prices, symbols, interval_ms, now_ms):
+        self.klines_cache = {}
+        self.calls = []
+        self.prices = prices
+        self.symbols = symbols
+        self.interval_ms = interval_ms
+        self.now_ms = now_ms
+
+    async def get_klines(self, symbol, interval="60", limit=100):
+        self.calls.append((symbol, interval, limit))
+        i = self.symbols.index(symbol)
+        open_ts = (self.now_ms // self.interval_ms) * self.interval_ms
+        bars = len(self.prices)
+        return [
+            {"timestamp": open_ts - k * self.interval_ms, "close": float(self.prices[bars - 1 - k, i])}
+            for k in range(min(limit, bars))
+        ]
+
+
+class TestCorrelationAnalyzer:
+    """CorrelationAnalyzer на панели доходностей"""
+
+    @pytest.mark.asyncio
+    async def test_matrix_from_panel(self, monkeypatch):
+        """Тест: матрица из свечей, повторный вызов без новых баров не ходит в REST"""
+        symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+        prices = make_prices(120, 3, seed=5)
+        now = 1_700_000_000_000
+        connector = FakeConnector(prices, symbols, 15 * 60_000, now)
+        monkeypatch.setattr("analytics.correlation_analyzer.current_epoch_ms", lambda: now)
+
+        analyzer = CorrelationAnalyzer(SimpleNamespace(bybit_connector=connector))
+        result = await analyzer.calculate_correlation_matrix(symbols, period="24h")
+
+        window = analyzer.panels["24h"].window
+        # Последняя свеча не закрыта
+        closed = prices[-window - 2 : -1]
+        expected = np.corrcoef(np.diff(np.log(closed), axis=0).T)
+        assert np.array(result["matrix"]) == pytest.approx(expected, abs=1e-9)
+        assert result["bars"] == window
+        assert result["betas"]["ETH"] > 0.5
+        assert result["insights"]["highest_pair"][:2] == ("BTC", "ETH")
+        assert len(connector.calls) == 3
+
+        analyzer._cache.clear()
+        nested = await analyzer.calculate_correlations(symbols)
+        assert nested["ETHUSDT"]["BTCUSDT"] == pytest.approx(expected[1, 0], abs=1e-4)
+        assert len(connector.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_refresh_appends_new_bars(self, monkeypatch):
+        """Тест: refresh дописывает только новые бары без пересчёта, после разрыва — backfill"""
+        symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+        bar_ms = 15 * 60_000
+        prices = make_prices(140, 3, seed=7)
+        now = [1_700_000_000_000 // bar_ms * bar_ms + 1_000]
+        connector = FakeConnector(prices[:120], symbols, bar_ms, now[0])
+        monkeypatch.setattr("analytics.correlation_analyzer.current_epoch_ms", lambda: now[0])
+
+        analyzer = CorrelationAnalyzer(SimpleNamespace(bybit_connector=connector))
+        await analyzer.refresh(symbols, period="24h")
+        panel = analyzer.panels["24h"]
+        recomputes = panel.stats["recomputes"]
+
+        for step in range(1, 4):
+            now[0] += bar_ms
+            connector.now_ms = now[0]
+            connector.prices = prices[: 120 + step]
+            await analyzer.refresh(symbols, period="24h")
+        assert panel.stats["recomputes"] == recomputes
+        assert [limit for _, _, limit in connector.calls[-3:]] == [3, 3, 3]
+
+        closed = prices[121 - panel.window : 122]  # последняя свеча не закрыта
+        expected = np.corrcoef(np.diff(np.log(closed), axis=0).T)
+        assert panel.correlation(symbols) == pytest.approx(expected, abs=1e-9)
+
+        # Разрыв длиннее окна — полный backfill
+        now[0] += (panel.window + 5) * bar_ms
+        connector.now_ms = now[0]
+        await analyzer.refresh(symbols, period="24h")
+        assert panel.stats["recomputes"] == recomputes + 1
+
+    @pytest.mark.asyncio
+    async def test_shared_kline_cache_and_format(self, monkeypatch):
+        """Тест: свечи из klines_cache; большой список — без полной матрицы"""
+        symbols = [f"C{i}USDT" for i in range(12)]
+        prices = make_prices(110, 12, seed=6)
+        now = 1_700_000_000_000
+        connector = FakeConnector(prices, symbols, 15 * 60_000, now)
+        for symbol in symbols:
+            candles = await connector.get_klines(symbol, "15", 110)
+            connector.klines_cache[f"{symbol}_15"] = {"candles": candles}
+        connector.calls.clear()
+        monkeypatch.setattr("analytics.correlation_analyzer.current_epoch_ms", lambda: now)
+
+        analyzer = CorrelationAnalyzer(SimpleNamespace(bybit_connector=connector))
+        result = await analyzer.calculate_correlation_matrix(symbols)
+        assert connector.calls == []
+        assert np.array(result["matrix"]).shape == (12, 12)
+
+        text = analyzer.format_correlation_matrix(result)
+        assert "матрица скрыта" in text
+        assert "C0-C1" in text
+
+
+class TestReturnsPanelBenchmark:
+    """Обновление на баре против пересчёта всего окна"""
+
+    @pytest.mark.benchmark
+    def test_200_symbols_per_bar(self):
+        """Тест: 200 символов — бар за O(n²) быстрее попарного пересчёта по окну"""
+        n, window = 200, 288
+        rng = np.random.default_rng(7)
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (window + 21, n)), axis=0))
+        symbols = [f"S{i}USDT" for i in range(n)]
+
+        panel = ReturnsPanel("5", window=window)
+        panel.load_history(
+            {s: [{"timestamp": t * BAR_MS, "close": prices[t, i]} for t in range(window + 1)]
+             for i, s in enumerate(symbols)}
+        )
+
+        start = time.perf_counter()
+        for t in range(window + 1, window + 21):
+            for i, symbol in enumerate(symbols):
+                panel.on_bar_close(symbol, t * BAR_MS, prices[t, i])
+            panel.correlation()
+        incremental_ms = (time.perf_counter() - start) / 20 * 1000
+
+        start = time.perf_counter()
+        for t in range(window + 1, window + 21):
+            returns = np.diff(np.log(prices[t - window : t + 1]), axis=0)
+            full_recompute(returns)
+        full_ms = (time.perf_counter() - start) / 20 * 1000
+
+        returns = np.diff(np.log(prices[-window - 1 :]), axis=0).T
+        assert panel.correlation() == pytest.approx(np.corrcoef(returns), abs=1e-8)
+        assert incremental_ms < full_ms
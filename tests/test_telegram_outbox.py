@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для Telegram Outbox
+Приоритеты, coalescing, RetryAfter, переполнение очереди
+"""
+
+import asyncio
+import pytest
+from telegram.error import BadRequest, RetryAfter
+from telegram_bot.outbox import (
+    TelegramOutbox,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    resolve_priority,
+)
+
+
+class FakeSender:
+    """Фейковый bot.send_message, записывающий отправленные сообщения"""
+
+    def __init__(self, errors=None):
+        self.sent = []
+        self.errors = list(errors or [])
+
+    async def __call__(self, chat_id, text, parse_mode=None, disable_web_page_preview=True):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append({"chat_id": chat_id, "text": text, "parse_mode": parse_mode})
+
+
+def make_outbox(sender, **kwargs):
+    params = {"default_chat_id": 1, "global_rate": 1000, "per_chat_rate": 1000}
+    params.update(kwargs)
+    return TelegramOutbox(sender, **params)
+
+
+async def drain(outbox, timeout=2.0):
+    """Запустить worker и дождаться опустошения очереди"""
+    await outbox.start()
+    await outbox.stop(flush_timeout=timeout)
+
+
+class TestTelegramOutbox:
+    """Тесты для TelegramOutbox"""
+
+    def test_resolve_priority(self):
+        """Тест: строковые и числовые приоритеты"""
+        assert resolve_priority("high") == PRIORITY_HIGH
+        assert resolve_priority("LOW") == PRIORITY_LOW
+        assert resolve_priority(99) == PRIORITY_LOW
+        assert resolve_priority("unknown") == resolve_priority("medium")
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Тест: high уходит раньше low, FIFO внутри приоритета"""
+        sender = FakeSender()
+        outbox = make_outbox(sender)
+
+        outbox.enqueue("low-1", priority="low")
+        outbox.enqueue("medium-1", priority="medium")
+        outbox.enqueue("high-1", priority="high")
+        outbox.enqueue("medium-2", priority="medium")
+
+        await drain(outbox)
+
+        assert [m["text"] for m in sender.sent] == [
+            "high-1",
+            "medium-1",
+            "medium-2",
+            "low-1",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_coalescing(self):
+        """Тест: повторы с одним ключом объединяются в одно сообщение"""
+        sender = FakeSender()
+        outbox = make_outbox(sender)
+
+        for i in range(5):
+            outbox.enqueue(f"imbalance {i}", coalesce_key="l2_imbalance:BTCUSDT")
+        outbox.enqueue("other", coalesce_key="l2_imbalance:ETHUSDT")
+
+        assert outbox.queue_depth() == 2
+        await drain(outbox)
+
+        assert len(sender.sent) == 2
+        assert sender.sent[0]["text"].startswith("imbalance 4")
+        assert "×5" in sender.sent[0]["text"]
+        assert outbox.get_stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_retry_after_requeues(self):
+        """Тест: RetryAfter ставит worker на паузу и повторяет сообщение"""
+        sender = FakeSender(errors=[RetryAfter(0)])
+        outbox = make_outbox(sender)
+
+        outbox.enqueue("first", priority="high")
+        outbox.enqueue("second", priority="low")
+        await drain(outbox)
+
+        assert [m["text"] for m in sender.sent] == ["first", "second"]
+        stats = outbox.get_stats()
+        assert stats["retry_after"] == 1
+        assert stats["sent"] == 2
+
+    @pytest.mark.asyncio
+    async def test_bad_markup_fallback(self):
+        """Тест: ошибка разметки → повтор без parse_mode"""
+        sender = FakeSender(errors=[BadRequest("Can't parse entities")])
+        outbox = make_outbox(sender)
+
+        outbox.enqueue("*broken", parse_mode="Markdown")
+        await drain(outbox)
+
+        assert len(sender.sent) == 1
+        assert sender.sent[0]["parse_mode"] is None
+
+    @pytest.mark.asyncio
+    async def test_overflow_drops_lowest(self):
+        """Тест: при переполнении отбрасывается сообщение с низшим приоритетом"""
+        sender = FakeSender()
+        outbox = make_outbox(sender, max_queue_size=2)
+
+        assert outbox.enqueue("low", priority="low")
+        assert outbox.enqueue("medium", priority="medium")
+        assert outbox.enqueue("high", priority="high")
+        assert not outbox.enqueue("low-2", priority="low")
+
+        await drain(outbox)
+
+        assert [m["text"] for m in sender.sent] == ["high", "medium"]
+        assert outbox.get_stats()["dropped"] == 2
+
+    @pytest.mark.asyncio
+    async def test_per_chat_rate_limit(self):
+        """Тест: per-chat лимит растягивает отправку во времени"""
+        sender = FakeSender()
+        outbox = make_outbox(sender, per_chat_rate=2)
+
+        for i in range(3):
+            outbox.enqueue(f"msg {i}")
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await drain(outbox, timeout=3.0)
+
+        assert len(sender.sent) == 3
+        assert loop.time() - start >= 0.9
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для TradeBus
+Нормализация сделок, батчи, фильтр бирж, rolling CVD, подписчики аналитики
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from analytics.orderbook_analyzer import OrderbookAnalyzer
+from analytics.whale_activity_tracker import WhaleActivityTracker
+from core.trade_bus import (
+    SIDE_BUY,
+    SIDE_SELL,
+    RollingDelta,
+    TradeBus,
+    normalize_side,
+    normalize_symbol,
+)
+from models.trade_data_accumulator import TradeDataAccumulator
+
+
+TS = 1_700_000_000_000
+
+
+class TestNormalization:
+    """Тесты нормализации символа и стороны"""
+
+    def test_symbol_and_side(self):
+        """Тест: форматы разных бирж приводятся к одному виду"""
+        assert normalize_symbol("BTC-USDT") == "BTCUSDT"
+        assert normalize_symbol("btc/usdt") == "BTCUSDT"
+        assert normalize_side("Buy") == normalize_side("buy") == SIDE_BUY
+        assert normalize_side("SELL") == normalize_side(-1) == SIDE_SELL
+        with pytest.raises(KeyError):
+            normalize_side("hold")
+
+    def test_publish_rejects_invalid(self):
+        """Тест: неизвестная биржа/сторона и нулевой объём не попадают в буфер"""
+        bus = TradeBus()
+        assert bus.publish("okx", "BTC-USDT", TS, 60_000, 0.1, "buy")
+        assert not bus.publish("kraken", "BTCUSD", TS, 60_000, 0.1, "buy")
+        assert not bus.publish("okx", "BTC-USDT", TS, 60_000, 0.1, "hold")
+        assert not bus.publish("okx", "BTC-USDT", TS, 60_000, 0.0, "buy")
+        assert bus.pending() == 1
+        assert bus.stats["rejected"] == 3
+
+
+class TestTradeBus:
+    """Тесты доставки батчей"""
+
+    @pytest.mark.asyncio
+    async def test_batch_per_symbol(self):
+        """Тест: один символ с разных бирж — одна колонка, суммы через bincount"""
+        bus = TradeBus()
+        batches = []
+        bus.subscribe("collect", batches.append)
+
+        bus.publish("bybit", "BTCUSDT", TS, 60_000, 1.0, "Buy")
+        bus.publish("okx", "BTC-USDT", TS + 1, 60_010, 2.0, "sell")
+        bus.publish("binance", "ETHUSDT", TS + 2, 3_000, 5.0, "buy")
+        assert await bus.flush() == 3
+        assert await bus.flush() == 0
+
+        [batch] = batches
+        assert bus.symbols == ["BTCUSDT", "ETHUSDT"]
+        assert batch.per_symbol(batch.signed_qty) == {"BTCUSDT": -1.0, "ETHUSDT": 5.0}
+        assert list(batch.records())[1] == ("okx", "BTCUSDT", TS + 1, 60_010, 2.0, SIDE_SELL)
+
+    @pytest.mark.asyncio
+    async def test_exchange_filter_and_error_isolation(self):
+        """Тест: фильтр по биржам; ошибка подписчика не мешает остальным"""
+        bus = TradeBus()
+        okx_only, everything = [], []
+
+        def broken(batch):
+            raise RuntimeError("boom")
+
+        async def async_handler(batch):
+            everything.append(len(batch))
+
+        bus.subscribe("broken", broken)
+        bus.subscribe("okx_only", okx_only.append, exchanges=("okx",))
+        bus.subscribe("all", async_handler)
+
+        bus.publish("bybit", "BTCUSDT", TS, 60_000, 1.0, "Buy")
+        bus.publish("okx", "BTC-USDT", TS, 60_000, 1.0, "buy")
+        await bus.flush()
+
+        assert [len(b) for b in okx_only] == [1]
+        assert everything == [2]
+        stats = bus.get_stats()
+        assert stats["broken"]["errors"] == 1
+        assert stats["okx_only"]["trades"] == 1
+
+    @pytest.mark.asyncio
+    async def test_background_delivery(self):
+        """Тест: фоновая задача доставляет буфер, stop() сбрасывает остаток"""
+        bus = TradeBus(flush_interval=0.01)
+        received = []
+        bus.subscribe("collect", lambda batch: received.append(len(batch)))
+        await bus.start()
+
+        bus.publish("bybit", "BTCUSDT", TS, 60_000, 1.0, "Buy")
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        bus.publish("bybit", "BTCUSDT", TS, 60_000, 1.0, "Buy")
+        await bus.stop()
+
+        assert sum(received) == 2
+
+
+class TestRollingDelta:
+    """Тесты для rolling CVD коннекторов"""
+
+    def test_window_eviction(self):
+        """Тест: сделки старше окна вытесняются из суммы и объёма"""
+        delta = RollingDelta(window_seconds=300)
+        delta.add("BTCUSDT", 1000, 2.0)
+        delta.add("BTCUSDT", 1100, -0.5)
+        assert delta.value("BTCUSDT") == pytest.approx(1.5)
+        assert delta.volume("BTCUSDT") == pytest.approx(2.5)
+
+        assert delta.add("BTCUSDT", 1301, 1.0) == pytest.approx(0.5)
+        assert delta.volume("BTCUSDT") == pytest.approx(1.5)
+        assert delta.value("ETHUSDT") == 0.0
+
+    @pytest.mark.asyncio
+    async def test_add_batch_subscriber(self):
+        """Тест: add_batch как подписчик шины — CVD только своей биржи"""
+        bus = TradeBus()
+        delta = RollingDelta()
+        bus.subscribe("okx_cvd", delta.add_batch, exchanges=("okx",))
+
+        bus.publish("okx", "BTC-USDT", TS, 60_000, 1.0, "buy")
+        bus.publish("okx", "BTC-USDT", TS + 10, 60_000, 0.25, "sell")
+        bus.publish("bybit", "BTCUSDT", TS, 60_000, 5.0, "Buy")
+        await bus.flush()
+
+        assert delta.value("BTCUSDT") == pytest.approx(0.75)
+
+    def test_add_batch_matches_add(self):
+        """Тест: батч по нескольким символам = построчный add, включая вытеснение"""
+        bus = TradeBus()
+        rng = np.random.default_rng(7)
+        symbols = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+        rows = []
+        for i in range(3000):
+            row = ("bybit", symbols[rng.integers(3)], TS + i * 250, 100.0, float(rng.uniform(0.1, 2)),
+                   "Buy" if rng.random() < 0.5 else "Sell")
+            bus.publish(*row)
+            rows.append(row)
+
+        batched, sequential = RollingDelta(window_seconds=60), RollingDelta(window_seconds=60)
+        batched.add_batch(bus._take_batch())
+        for _, symbol, ts, _, qty, side in rows:
+            sequential.add(symbol, ts / 1000, qty * normalize_side(side))
+
+        for symbol in symbols:
+            assert batched.value(symbol) == pytest.approx(sequential.value(symbol))
+            assert batched.volume(symbol) == pytest.approx(sequential.volume(symbol))
+            assert list(batched.trades[symbol]) == pytest.approx(list(sequential.trades[symbol]))
+
+    @pytest.mark.asyncio
+    async def test_coinbase_skips_empty_symbol(self, monkeypatch):
+        """Тест: сделка Coinbase без product_id не попадает в шину"""
+        import connectors.coinbase_connector as coinbase_connector
+
+        bus = TradeBus()
+        monkeypatch.setattr(coinbase_connector, "get_trade_bus", lambda: bus)
+        connector = coinbase_connector.CoinbaseConnector(symbols=["BTC-USD"], enable_websocket=False)
+        trade = {"product_id": "BTC-USD", "price": "60000", "size": "0.5", "side": "buy",
+                 "time": "2023-11-14T22:13:20.123456Z"}
+        await connector._handle_trade(trade)
+        await connector._handle_trade({**trade, "product_id": None})
+        assert bus.pending() == 1 and bus.symbols == ["BTCUSD"]
+
+
+class TestSubscribers:
+    """Подписчики аналитики совпадают с построчной обработкой"""
+
+    @pytest.mark.asyncio
+    async def test_analytics_subscribers(self):
+        """Тест: CVD, объёмы и киты по батчу совпадают с add_trade/process_trade"""
+        bus = TradeBus()
+        analyzer = OrderbookAnalyzer()
+        whales = WhaleActivityTracker(enable_batcher=False)
+        reference = WhaleActivityTracker(enable_batcher=False)
+        accumulator = TradeDataAccumulator(window_minutes=60)
+        bus.subscribe("cvd", analyzer.on_trades)
+        bus.subscribe("whales", whales.on_trades)
+        bus.subscribe("accumulator", accumulator.on_trades)
+
+        trades = [
+            ("bybit", "BTCUSDT", 60_000, 10.0, "Buy"),  # кит
+            ("okx", "BTC-USDT", 60_000, 0.5, "sell"),
+            ("binance", "ETHUSDT", 3_000, 1.0, "buy"),
+            ("coinbase", "BTC-USDT", 60_000, 9.0, "sell"),  # кит
+        ]
+        for exchange, symbol, price, qty, side in trades:
+            bus.publish(exchange, symbol, TS, price, qty, side)
+            reference.add_trade(normalize_symbol(symbol), side.upper(), qty, price)
+        await bus.flush()
+
+        cvd = analyzer.cvd_cache["BTCUSDT"]
+        assert cvd["cvd"] == pytest.approx(10.0 - 0.5 - 9.0)
+        assert analyzer._trade_counter["ETHUSDT"] == 1
+
+        for symbol in ("BTCUSDT", "ETHUSDT"):
+            got, expected = whales.get_trade_data(symbol), reference.get_trade_data(symbol)
+            assert got["buy_volume"] == pytest.approx(expected["buy_volume"])
+            assert got["sell_volume"] == pytest.approx(expected["sell_volume"])
+            assert len(whales.whale_trades.get(symbol, ())) == len(
+                reference.whale_trades.get(symbol, ())
+            )
+
+        data = accumulator.get_trade_data("BTCUSDT")
+        assert data["buy_volume"] == pytest.approx(600_000)
+        assert data["total_trades"] == 3
+
+
+class TestTradeBusBenchmark:
+    """Пропускная способность шины"""
+
+    @pytest.mark.benchmark
+    @pytest.mark.asyncio
+    async def test_10k_trades_four_subscribers(self):
+        """Тест: 10k сделок через 4 подписчика — публикация дешевле доставки"""
+        bus = TradeBus(max_batch=20000)
+        bus.subscribe("cvd", OrderbookAnalyzer().on_trades)
+        bus.subscribe("whales", WhaleActivityTracker(enable_batcher=False).on_trades)
+        bus.subscribe("accumulator", TradeDataAccumulator(window_minutes=60).on_trades)
+        bus.subscribe("bybit_cvd", RollingDelta().add_batch, exchanges=("bybit",))
+
+        rng = np.random.default_rng(3)
+        exchanges = ("bybit", "binance", "okx", "coinbase")
+        symbols = ("BTCUSDT", "ETH-USDT", "SOLUSDT", "BTC-USD")
+        prices = rng.uniform(100, 60_000, 10_000).tolist()
+        sizes = rng.uniform(0.001, 5, 10_000).tolist()
+
+        start = time.perf_counter()
+        for i in range(10_000):
+            bus.publish(
+                exchanges[i % 4], symbols[i % 4], TS + i, prices[i], sizes[i],
+                "buy" if i % 3 else "sell",
+            )
+        published = time.perf_counter() - start
+        start = time.perf_counter()
+        assert await bus.flush() == 10_000
+        delivered = time.perf_counter() - start
+
+        assert bus.get_stats()["bybit_cvd"]["trades"] == 2_500
+        assert published < delivered
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для EnhancedVetoSystem
+Пересчёт только зависимых проверок, кэш вердиктов по символу,
+истечение вето, каскад ликвидаций, совместимость analyze_market_conditions
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from analytics.veto_system import CHECK_INPUTS, EnhancedVetoSystem
+from config.constants import VetoReasonEnum
+
+
+def market_data(funding=0.0001, volume=1000.0, change=1.0, bid=100.0, ask=100.1, bid_size=1.0):
+    return {
+        "funding_rate": {"funding_rate": funding},
+        "ticker": {"volume_24h": volume, "price_24h_pcnt": change},
+        "orderbook": {
+            "bids": [{"price": bid, "size": bid_size}] * 5,
+            "asks": [[ask, 1.0]] * 5,
+        },
+    }
+
+
+class TestIncrementalEvaluation:
+    """Пересчёт только при изменении входов"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_inputs_reuse_result(self):
+        """Тест: те же данные — ни одной проверки, тот же результат"""
+        veto = EnhancedVetoSystem()
+        first = await veto.analyze_market_conditions("BTCUSDT", market_data())
+        evals = veto.eval_stats["check_evals"]
+
+        second = await veto.analyze_market_conditions("BTCUSDT", market_data())
+        assert second is first
+        assert not first.is_vetoed
+        assert veto.eval_stats["check_evals"] == evals
+        assert veto.eval_stats["unchanged_inputs"] == 3
+
+    def test_only_dependent_checks(self):
+        """Тест: funding пересчитывает funding и stability, стакан — три проверки"""
+        veto = EnhancedVetoSystem()
+        veto.ingest("BTCUSDT", market_data())
+
+        evals = veto.eval_stats["check_evals"]
+        veto.on_funding("BTCUSDT", 0.0002)
+        assert veto.eval_stats["check_evals"] - evals == 2
+
+        evals = veto.eval_stats["check_evals"]
+        veto.on_orderbook("BTCUSDT", [[100.0, 2.0]], [[100.2, 1.0]])
+        depends_on_book = [c for c, inputs in CHECK_INPUTS.items() if "orderbook" in inputs]
+        assert veto.eval_stats["check_evals"] - evals == len(depends_on_book) == 3
+
+    def test_per_symbol_verdicts(self):
+        """Тест: вето одного символа не блокирует другой"""
+        veto = EnhancedVetoSystem()
+        veto.ingest("BTCUSDT", market_data())
+        veto.ingest("ETHUSDT", market_data())
+        veto.on_funding("BTCUSDT", 0.05)
+
+        assert veto.is_vetoed("BTCUSDT")
+        assert not veto.is_vetoed("ETHUSDT")
+        assert veto.veto_checks("BTCUSDT")["funding_rate"]
+        assert not veto.veto_checks("ETHUSDT")["funding_rate"]
+        assert set(veto.active_vetos) >= {"high_funding_rate_BTCUSDT"}
+        # Без данных — вето по умолчанию
+        assert veto.is_vetoed("SOLUSDT")
+
+    def test_orderbook_levels_and_manipulation(self):
+        """Тест: уровни [p, q] и dict, спред считается по лучшим ценам"""
+        veto = EnhancedVetoSystem()
+        veto.on_orderbook("BTCUSDT", [[100.0, 50.0]] * 5, [{"price": 100.01, "size": 1.0}] * 5)
+
+        orderbook = veto.states["BTCUSDT"].inputs["orderbook"]
+        assert orderbook["spread_bps"] == pytest.approx(1.0, rel=1e-3)
+        trigger = veto.states["BTCUSDT"].verdicts["orderbook_manipulation"]
+        assert trigger.reason == VetoReasonEnum.ORDERBOOK_MANIPULATION
+        assert trigger.data["stronger_side"] == "bid"
+
+    def test_orderbook_fingerprint_ignores_mid_drift(self):
+        """Тест: сдвиг цены при том же спреде и топе ниже порога манипуляции — без пересчёта"""
+        veto = EnhancedVetoSystem()
+        veto.on_orderbook("BTCUSDT", [[60_000.0, 2.0]], [[60_000.1, 1.0]])
+        evals = veto.eval_stats["check_evals"]
+        for tick in range(1, 50):
+            price = 60_000.0 + tick * 0.1
+            assert not veto.on_orderbook("BTCUSDT", [[price, 2.0 + tick * 0.01]], [[price + 0.1, 1.0]])
+        assert veto.eval_stats["check_evals"] == evals
+
+        assert veto.on_orderbook("BTCUSDT", [[60_000.0, 2.0]], [[60_030.0, 1.0]])  # спред 5 bps
+        assert veto.on_orderbook("BTCUSDT", [[60_000.0, 20.0]], [[60_030.0, 1.0]])  # дисбаланс 20x
+        assert veto.veto_checks("BTCUSDT")["orderbook_manipulation"]
+
+    @pytest.mark.asyncio
+    async def test_bot_handler_routes_by_symbol(self):
+        """Тест: Bybit стаканы двух символов попадают в вердикты своих символов"""
+        from core.bot import GIOCryptoBot
+
+        bot = GIOCryptoBot()
+        bot.veto_system = EnhancedVetoSystem()
+        bot.cross_validator = None
+        bot.l2_imbalances = {}
+        for _ in range(3):
+            await bot.handle_bybit_orderbook(
+                {"symbol": "BTCUSDT", "bids": [[60_000.0, 1.0]] * 5, "asks": [[60_000.1, 1.0]] * 5}
+            )
+            await bot.handle_bybit_orderbook(
+                {"symbol": "ETHUSDT", "bids": [[3_000.0, 40.0]] * 5, "asks": [[3_003.0, 1.0]] * 5}
+            )
+
+        states = bot.veto_system.states
+        assert set(states) == {"BTCUSDT", "ETHUSDT"}
+        assert states["BTCUSDT"].inputs["orderbook"]["mid_price"] == pytest.approx(60_000.05)
+        assert not bot.veto_system.veto_checks("BTCUSDT")["spread"]
+        assert not bot.veto_system.veto_checks("BTCUSDT")["orderbook_manipulation"]
+        assert bot.veto_system.veto_checks("ETHUSDT")["orderbook_manipulation"]
+
+
+class TestMultipleVetos:
+    """Несколько вето одновременно"""
+
+    @pytest.mark.asyncio
+    async def test_two_vetos_analyze_and_log(self, caplog):
+        """Тест: funding + обвал объёма — оба вето, лог без ошибки выбора severity"""
+        veto = EnhancedVetoSystem()
+        await veto.analyze_market_conditions("BTCUSDT", market_data())
+        result = await veto.analyze_market_conditions("BTCUSDT", market_data(funding=0.05, change=-25.0))
+
+        reasons = {v.reason.value for v in result.active_vetos}
+        assert result.is_vetoed and len(reasons) >= 2 and "high_funding_rate" in reasons
+        veto._log_veto_result(result, "BTCUSDT")
+        assert not [r for r in caplog.records if "Ошибка логирования veto" in r.getMessage()]
+
+
+class TestExpiry:
+    """Истечение вето по времени"""
+
+    def test_veto_lasts_until_condition_clears(self):
+        """Тест: вето держится, пока выполняется условие, и истекает после снятия"""
+        veto = EnhancedVetoSystem()
+        veto.ingest("BTCUSDT", market_data())
+        veto.on_funding("BTCUSDT", 0.05)
+        now = int(time.time() * 1000)
+
+        later = now + 2 * 3600 * 1000
+        assert "high_funding_rate" in {v.reason.value for v in veto.get_veto("BTCUSDT", later).active_vetos}
+
+        veto.on_funding("BTCUSDT", 0.0001)
+        assert veto.get_veto("BTCUSDT", now + 60_000).is_vetoed
+        result = veto.get_veto("BTCUSDT", now + 31 * 60_000)
+        assert "high_funding_rate" not in {v.reason.value for v in result.active_vetos}
+
+    def test_liquidation_cascade(self):
+        """Тест: принты ликвидаций сверх порога дают каскадное вето"""
+        veto = EnhancedVetoSystem()
+        veto.ingest("BTCUSDT", market_data())
+        threshold = veto.adaptive_thresholds["liquidation_cascade"]
+        for _ in range(int(threshold) + 1):
+            veto.on_liquidation("BTCUSDT", 250_000, "Sell")
+
+        trigger = veto.states["BTCUSDT"].verdicts["liquidation_cascade"]
+        assert trigger.data["liquidated_usd"] == pytest.approx(250_000 * (threshold + 1))
+        assert veto.is_vetoed("BTCUSDT")
+        assert veto.get_veto_stats()["data_counts"]["liquidation_events"] == threshold + 2
+
+
+class TestNewsConflict:
+    """Новостной вход"""
+
+    def test_news_conflict(self):
+        """Тест: равные bullish/bearish — вето, повтор того же sentiment — без пересчёта"""
+        veto = EnhancedVetoSystem()
+        veto.ingest("BTCUSDT", market_data())
+        sentiment = SimpleNamespace(
+            bullish_count=5, bearish_count=5, total_news_count=10,
+            confidence=0.95, overall_sentiment=0.0,
+        )
+        assert veto.on_news("BTCUSDT", sentiment)
+        assert not veto.on_news("BTCUSDT", SimpleNamespace(**vars(sentiment)))
+        assert veto.veto_checks("BTCUSDT")["news_conflict"]
+        assert veto.veto_stats["most_common_reason"] is not None
+
+
+class TestVetoBenchmark:
+    """Lookup из кэша против полного прогона проверок"""
+
+    @pytest.mark.benchmark
+    @pytest.mark.asyncio
+    async def test_lookup_vs_full_analysis(self):
+        """Тест: 10k lookup быстрее 10k полных анализов с меняющимися данными"""
+        veto = EnhancedVetoSystem()
+        await veto.analyze_market_conditions("BTCUSDT", market_data())
+
+        start = time.perf_counter()
+        for i in range(10_000):
+            veto.is_vetoed("BTCUSDT")
+        lookup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(2_000):
+            await veto.analyze_market_conditions("BTCUSDT", market_data(volume=1000.0 + i, change=1.0 + i * 1e-4))
+        full = (time.perf_counter() - start) * 5
+
+        assert lookup < full
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для колоночного хранилища whale-сделок
+WhaleTradeBuffer: окна по bisect, префиксные суммы, вытеснение
+"""
+
+import random
+import time
+
+import pytest
+from analytics.whale_activity_tracker import (
+    SIDE_BUY,
+    SIDE_SELL,
+    WhaleActivityTracker,
+    WhaleTradeBuffer,
+)
+
+
+def naive_window(trades, since_ms):
+    """Эталон: линейный проход по списку сделок"""
+    window = [t for t in trades if t[0] >= since_ms]
+    return {
+        "count": len(window),
+        "buy_count": sum(1 for t in window if t[1] == SIDE_BUY),
+        "sell_count": sum(1 for t in window if t[1] == SIDE_SELL),
+        "buy_volume": sum(t[2] for t in window if t[1] == SIDE_BUY),
+        "sell_volume": sum(t[2] for t in window if t[1] == SIDE_SELL),
+    }
+
+
+class TestWhaleTradeBuffer:
+    """Тесты для WhaleTradeBuffer"""
+
+    def test_window_matches_naive(self):
+        """Тест: агрегаты окна совпадают с линейным подсчётом"""
+        rng = random.Random(7)
+        buffer = WhaleTradeBuffer(max_trades=100000)
+        trades = []
+        ts = 1_700_000_000_000
+        for _ in range(2000):
+            ts += rng.randint(0, 5000)
+            side = rng.choice((SIDE_BUY, SIDE_SELL))
+            value = rng.uniform(10_000, 500_000)
+            buffer.append(ts, side, value / 50_000, 50_000, value)
+            trades.append((ts, side, value))
+
+        for since in (trades[0][0], trades[500][0], trades[1999][0], ts + 1):
+            got = buffer.window(since)
+            expected = naive_window(trades, since)
+            assert got["count"] == expected["count"]
+            assert got["buy_count"] == expected["buy_count"]
+            assert got["sell_count"] == expected["sell_count"]
+            assert got["buy_volume"] == pytest.approx(expected["buy_volume"])
+            assert got["sell_volume"] == pytest.approx(expected["sell_volume"])
+
+    def test_capacity_and_compaction(self):
+        """Тест: при переполнении вытесняются старые сделки, суммы корректны"""
+        buffer = WhaleTradeBuffer(max_trades=100)
+        trades = []
+        for i in range(1000):
+            side = SIDE_BUY if i % 3 else SIDE_SELL
+            buffer.append(i, side, 1.0, 1.0, float(i))
+            trades.append((i, side, float(i)))
+
+        assert len(buffer) == 100
+        assert len(buffer.timestamps) <= 200  # компактизация держит память
+        got = buffer.window(0)
+        expected = naive_window(trades[-100:], 0)
+        assert got["count"] == 100
+        assert got["buy_volume"] == pytest.approx(expected["buy_volume"])
+        assert got["sell_volume"] == pytest.approx(expected["sell_volume"])
+
+    def test_trades_and_largest(self):
+        """Тест: материализация окна (новые первыми) и крупнейшая сделка"""
+        buffer = WhaleTradeBuffer()
+        buffer.append(1000, SIDE_BUY, 1, 100, 100.0)
+        buffer.append(2000, SIDE_SELL, 5, 100, 500.0)
+        buffer.append(3000, SIDE_BUY, 2, 100, 200.0)
+
+        trades = buffer.trades(1500)
+        assert [t["timestamp_ms"] for t in trades] == [3000, 2000]
+        assert trades[1]["side"] == "SELL"
+        assert buffer.largest(0)["value"] == 500.0
+        assert buffer.largest(2500)["value"] == 200.0
+        assert buffer.largest(4000) is None
+
+    def test_drop_before(self):
+        """Тест: удаление старых сделок по времени"""
+        buffer = WhaleTradeBuffer()
+        for i in range(10):
+            buffer.append(i * 1000, SIDE_BUY, 1, 1, 1.0)
+
+        assert buffer.drop_before(5000) == 5
+        assert len(buffer) == 5
+        assert buffer.window(0)["buy_volume"] == pytest.approx(5.0)
+
+    def test_out_of_order_timestamp_clamped(self):
+        """Тест: сделка с ts раньше последней не ломает упорядоченность"""
+        buffer = WhaleTradeBuffer()
+        buffer.append(2000, SIDE_BUY, 1, 1, 1.0)
+        buffer.append(1000, SIDE_SELL, 1, 1, 2.0)
+
+        assert list(buffer.timestamps) == [2000, 2000]
+        assert buffer.window(1500)["count"] == 2
+
+
+class TestWhaleActivityTrackerStore:
+    """Тесты WhaleActivityTracker поверх колоночного буфера"""
+
+    def test_summary_and_activity(self):
+        """Тест: сводка и активность считаются из памяти"""
+        tracker = WhaleActivityTracker(enable_batcher=False)
+        tracker.add_trade("BTCUSDT", "BUY", 1.0, 60_000)
+        tracker.add_trade("BTCUSDT", "BUY", 0.5, 60_000)
+        tracker.add_trade("BTCUSDT", "SELL", 0.2, 60_000)
+        tracker.add_trade("BTCUSDT", "SELL", 0.0001, 60_000)  # не кит
+
+        summary = tracker.get_whale_summary("BTCUSDT", minutes=5)
+        assert summary["count"] == 3
+        assert summary["buy_volume"] == pytest.approx(90_000)
+        assert summary["sell_volume"] == pytest.approx(12_000)
+        assert summary["sentiment"] == "BULLISH"
+        assert summary["largest_trade"]["value"] == pytest.approx(60_000)
+
+        activity = tracker.get_whale_activity("BTCUSDT", timeframe_seconds=300)
+        assert activity["trades"] == 3
+        assert activity["dominant_side"] == "bullish"
+
+        windows = tracker.get_multi_window_stats("BTCUSDT")
+        assert set(windows) == {300, 900, 3600}
+        assert windows[3600]["net_volume"] == pytest.approx(78_000)
+
+        recent = tracker.get_recent_whales("BTCUSDT")
+        assert [t["side"] for t in recent] == ["SELL", "BUY", "BUY"]
+
+    def test_summary_over_large_buffer(self):
+        """Тест: сводка по окну видит все 10k сделок буфера"""
+        tracker = WhaleActivityTracker(enable_batcher=False)
+        buffer_start = int(time.time() * 1000) - 3_600_000
+        for i in range(10000):
+            tracker.add_trade("ETHUSDT", "BUY" if i % 2 else "SELL", 10, 3000)
+        buffer = tracker.whale_trades["ETHUSDT"]
+        assert len(buffer) == 10000 and buffer.timestamps[0] >= buffer_start
+
+        stats = tracker.get_window_stats("ETHUSDT", 300)
+        assert stats["count"] == 10000 and stats["buy_count"] == 5000
+        assert stats["net_volume"] == pytest.approx(0.0)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests для fast_json и WebSocket парсеров
+Разбор сообщений Bybit / Binance / OKX / Coinbase, переключение backend,
+сравнение с json.loads + обход dict
+"""
+
+import json
+import time
+
+import pytest
+from connectors.ws_parsers import (
+    BookMessage,
+    TradeTick,
+    parse_binance_trade,
+    parse_bybit_orderbook,
+    parse_coinbase_changes,
+    parse_coinbase_snapshot,
+    parse_okx_books,
+    parse_okx_trades,
+)
+from utils import fast_json
+
+
+def make_levels(count: int, base: float, step: float) -> list:
+    return [[f"{base + i * step:.2f}", f"{0.5 + i * 0.01:.3f}"] for i in range(count)]
+
+
+BYBIT_SNAPSHOT = json.dumps(
+    {
+        "topic": "orderbook.200.BTCUSDT",
+        "type": "snapshot",
+        "ts": 1700000000123,
+        "data": {
+            "s": "BTCUSDT",
+            "b": make_levels(200, 50000.0, -0.1),
+            "a": make_levels(200, 50000.1, 0.1),
+            "u": 1001,
+            "seq": 7,
+        },
+    }
+)
+
+BINANCE_TRADE = json.dumps(
+    {
+        "e": "trade",
+        "E": 1700000000124,
+        "s": "BTCUSDT",
+        "t": 12345,
+        "p": "50000.10",
+        "q": "0.250",
+        "b": 88,
+        "a": 50,
+        "T": 1700000000123,
+        "m": True,
+        "M": True,
+    }
+)
+
+OKX_BOOKS = json.dumps(
+    {
+        "arg": {"channel": "books", "instId": "BTC-USDT"},
+        "action": "snapshot",
+        "data": [
+            {
+                "bids": [[p, q, "0", "3"] for p, q in make_levels(400, 50000.0, -0.1)],
+                "asks": [[p, q, "0", "2"] for p, q in make_levels(400, 50000.1, 0.1)],
+                "ts": "1700000000123",
+                "checksum": -855196043,
+            }
+        ],
+    }
+)
+
+OKX_TRADES = json.dumps(
+    {
+        "arg": {"channel": "trades", "instId": "BTC-USDT"},
+        "data": [
+            {
+                "instId": "BTC-USDT",
+                "tradeId": "130639474",
+                "px": "42219.9",
+                "sz": "0.12060306",
+                "side": "buy",
+                "ts": "1630048897897",
+            },
+            {
+                "instId": "BTC-USDT",
+                "tradeId": "130639475",
+                "px": "42219.8",
+                "sz": "0.5",
+                "side": "sell",
+                "ts": "1630048897899",
+            },
+        ],
+    }
+)
+
+COINBASE_SNAPSHOT = json.dumps(
+    {
+        "type": "snapshot",
+        "product_id": "BTC-USD",
+        "bids": make_levels(500, 50000.0, -0.01),
+        "asks": make_levels(500, 50000.01, 0.01),
+    }
+)
+
+COINBASE_UPDATE = json.dumps(
+    {
+        "type": "l2update",
+        "product_id": "BTC-USD",
+        "changes": [["buy", "50000.00", "1.5"], ["sell", "50000.01", "0"]],
+        "time": "2023-11-14T22:13:20.123Z",
+    }
+)
+
+
+class TestWsParsers:
+    """Тесты для разбора сообщений бирж"""
+
+    def test_bybit_orderbook(self):
+        """Тест: Bybit snapshot → BookMessage с float-уровнями"""
+        book = parse_bybit_orderbook(fast_json.loads(BYBIT_SNAPSHOT))
+
+        assert isinstance(book, BookMessage)
+        assert book.kind == "snapshot"
+        assert book.symbol == "BTCUSDT"
+        assert book.update_id == 1001
+        assert book.timestamp == 1700000000123
+        assert len(book.bids) == 200 and len(book.asks) == 200
+        assert book.bids[0] == (50000.0, 0.5)
+        assert book.asks[1] == (50000.2, 0.51)
+
+    def test_bybit_non_orderbook_ignored(self):
+        """Тест: сообщения без orderbook (pong, подписка) пропускаются"""
+        assert parse_bybit_orderbook({"success": True, "op": "subscribe"}) is None
+        assert parse_bybit_orderbook({"topic": "publicTrade.BTCUSDT", "data": [{}]}) is None
+
+    def test_binance_trade(self):
+        """Тест: Binance trade → TradeTick, m=True — продажа"""
+        trade = parse_binance_trade(fast_json.loads(BINANCE_TRADE))
+
+        assert trade == TradeTick("BTCUSDT", 50000.1, 0.25, 1700000000123, "sell", "12345")
+        assert parse_binance_trade({"result": None, "id": 1}) is None
+
+    def test_okx_books_and_trades(self):
+        """Тест: OKX books → (ts, bids, asks) с числом ордеров; trades → TradeTick"""
+        [(ts, bids, asks)] = parse_okx_books(fast_json.loads(OKX_BOOKS))
+        assert ts == 1700000000123
+        assert bids[0] == (50000.0, 0.5, 3)
+        assert asks[0] == (50000.1, 0.5, 2)
+
+        trades = parse_okx_trades(fast_json.loads(OKX_TRADES))
+        assert [t.side for t in trades] == ["buy", "sell"]
+        assert trades[0].price == 42219.9
+        assert trades[1].timestamp == 1630048897899
+
+    def test_coinbase_snapshot_and_changes(self):
+        """Тест: Coinbase snapshot → dict уровней; l2update → (is_bid, price, size)"""
+        bids, asks = parse_coinbase_snapshot(fast_json.loads(COINBASE_SNAPSHOT))
+        assert len(bids) == 500 and bids[50000.0] == 0.5
+
+        changes = parse_coinbase_changes(fast_json.loads(COINBASE_UPDATE))
+        assert changes == [(True, 50000.0, 1.5), (False, 50000.01, 0.0)]
+
+
+class TestFastJson:
+    """Тесты для выбора JSON backend"""
+
+    def test_backend_switching(self):
+        """Тест: переключение backend, недоступный — откат на json"""
+        original = fast_json.get_backend()
+        try:
+            assert fast_json.set_backend("json") == "json"
+            assert fast_json.loads(BINANCE_TRADE)["p"] == "50000.10"
+
+            assert fast_json.set_backend("no-such-backend") == "json"
+
+            auto = fast_json.set_backend("auto")
+            assert auto in fast_json.BACKEND_PRIORITY
+            assert fast_json.loads(fast_json.dumps({"a": [1, 2]})) == {"a": [1, 2]}
+            assert isinstance(fast_json.dumps({"a": 1}), str)
+        finally:
+            fast_json.set_backend(original)
+
+    def test_decode_error_is_catchable(self):
+        """Тест: ошибка любого backend ловится через fast_json.JSONDecodeError"""
+        with pytest.raises(fast_json.JSONDecodeError):
+            fast_json.loads("{not json")
+        with pytest.raises(fast_json.JSONDecodeError):
+            fast_json.loads(b"")
+
+
+class TestWsParsersBenchmark:
+    """Сравнение с json.loads + обход dict по биржам"""
+
+    @staticmethod
+    def timeit(func, rounds: int = 200) -> float:
+        """Среднее время вызова (мкс)"""
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - start) / rounds * 1e6
+
+    @pytest.mark.benchmark
+    def test_decode_and_parse_vs_stdlib(self):
+        """Тест: fast_json + парсер не медленнее json.loads + обхода dict"""
+
+        def bybit_baseline():
+            data = json.loads(BYBIT_SNAPSHOT)
+            if data.get("topic", "").startswith("orderbook"):
+                book = data["data"]
+                return (
+                    [[float(b[0]), float(b[1])] for b in book.get("b", [])],
+                    [[float(a[0]), float(a[1])] for a in book.get("a", [])],
+                )
+
+        def binance_baseline():
+            data = json.loads(BINANCE_TRADE)
+            if data.get("e") == "trade":
+                return (
+                    data.get("s"),
+                    float(data.get("p")),
+                    float(data.get("q")),
+                    data.get("T"),
+                    "sell" if data.get("m") else "buy",
+                )
+
+        def okx_baseline():
+            data = json.loads(OKX_BOOKS)
+            for book in data["data"]:
+                return (
+                    [[float(p), float(q), int(n)] for p, q, _, n in book["bids"]],
+                    [[float(p), float(q), int(n)] for p, q, _, n in book["asks"]],
+                )
+
+        def coinbase_baseline():
+            data = json.loads(COINBASE_SNAPSHOT)
+            return (
+                {float(p): float(s) for p, s in data.get("bids", [])},
+                {float(p): float(s) for p, s in data.get("asks", [])},
+            )
+
+        cases = {
+            "bybit": (bybit_baseline, lambda: parse_bybit_orderbook(fast_json.loads(BYBIT_SNAPSHOT))),
+            "binance": (binance_baseline, lambda: parse_binance_trade(fast_json.loads(BINANCE_TRADE))),
+            "okx": (okx_baseline, lambda: parse_okx_books(fast_json.loads(OKX_BOOKS))),
+            "coinbase": (
+                coinbase_baseline,
+                lambda: parse_coinbase_snapshot(fast_json.loads(COINBASE_SNAPSHOT)),
+            ),
+        }
+
+        for exchange, (baseline, fast) in cases.items():
+            assert fast() is not None
+            # Свободная граница: шум CI не должен ронять тест
+            assert self.timeit(fast) < self.timeit(baseline) * 3
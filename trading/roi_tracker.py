@@ -250,8 +250,10 @@ class ROITracker:
         """
         try:
             # Попробовать получить из bot.market_data (WebSocket)
-            if hasattr(self.bot, "market_data") and symbol in self.bot.market_data:
-                return float(self.bot.market_data[symbol].get("price", 0))
+            if hasattr(self.bot, "market_data"):
+                price = self.bot.market_data.value(symbol, "price")
+                if price:
+                    return float(price)
 
             # Fallback: прямой запрос к бирже
             if hasattr(self.bot, "bybit") and self.bot.bybit:
@@ -731,7 +733,7 @@ class ROITracker:
 
             # Отправить
             if hasattr(self.telegram_handler, "send_alert"):
-                await self.telegram_handler.send_alert(message)
+                await self.telegram_handler.send_alert(message, priority="high")
             elif hasattr(self.telegram_handler, "send_message"):
                 await self.telegram_handler.send_message(message)
 
@@ -772,7 +774,7 @@ class ROITracker:
 
             # Отправить
             if hasattr(self.telegram_handler, "send_alert"):
-                await self.telegram_handler.send_alert(message)
+                await self.telegram_handler.send_alert(message, priority="high")
             elif hasattr(self.telegram_handler, "send_message"):
                 await self.telegram_handler.send_message(message)
 
@@ -31,6 +31,7 @@ from analytics.veto_system import EnhancedVetoSystem, VetoAnalysisResult
 from utils.helpers import current_epoch_ms, safe_float, calculate_percentage_change
 from utils.validators import validate_signal_data
 from systems.unified_scenario_matcher import EnhancedScenarioMatcher
+from analytics.regime_service import get_regime_service
 
 
 # Импорт фильтров (если они есть)
@@ -259,8 +260,13 @@ class AdvancedSignalGenerator:
                     logger.error(f"❌ Ошибка EnhancedScenarioMatcher для {symbol}: {e}")
                     scenario_match = None
 
-            # Обогащаем market_data информацией о Market Regime
-            if hasattr(self.bot, "market_regime_detector"):
+            # Обогащаем market_data информацией о Market Regime:
+            # состояние RegimeService (закрытый бар), иначе детектор по сырым данным
+            regime_state = get_regime_service().get(symbol, now_ms=current_epoch_ms())
+            if regime_state is not None:
+                market_data["market_regime"] = regime_state.regime
+                market_data["regime_confidence"] = regime_state.confidence
+            elif hasattr(self.bot, "market_regime_detector"):
                 try:
                     regime_result = self.bot.market_regime_detector.detect_regime(
                         market_data
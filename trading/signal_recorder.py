@@ -5,9 +5,11 @@ Signal Recorder - Сохранение и управление торговым
 """
 
 import sqlite3
+import time
 from typing import List, Dict, Optional
 from datetime import datetime
 from config.settings import logger, DATABASE_PATH
+from utils.metrics import get_metrics_registry
 
 
 class SignalRecorder:
@@ -15,6 +17,9 @@ class SignalRecorder:
 
     def __init__(self, db_path: str = None):
         self.db_path = db_path or DATABASE_PATH
+        self._db_write_latency = get_metrics_registry().histogram(
+            "db_write_seconds", "Латентность записи в SQLite", ("table",)
+        ).labels("signals")
         logger.info(f"✅ SignalRecorder инициализирован (DB: {self.db_path})")
 
     def record_signal(
@@ -41,6 +46,7 @@ class SignalRecorder:
     ) -> int:
         """Сохранение нового сигнала в БД"""
         try:
+            write_start = time.perf_counter()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
 
@@ -82,6 +88,7 @@ class SignalRecorder:
             signal_id = cursor.lastrowid
             conn.commit()
             conn.close()
+            self._db_write_latency.observe(time.perf_counter() - write_start)
 
             logger.info(
                 f"✅ Сигнал #{signal_id} сохранён: {symbol} {direction} ({strategy}/{market_regime})"
@@ -11,6 +11,7 @@ from typing import Optional, List, Dict
 from datetime import datetime
 from config.settings import logger, TRACKED_SYMBOLS, SCANNER_CONFIG
 from utils.data_validator import DataValidator  # ← ДОБАВЛЕНО!
+from utils.metrics import get_metrics_registry
 
 
 class UnifiedAutoScanner:
@@ -70,6 +71,13 @@ class UnifiedAutoScanner:
         self.max_signals_per_hour = 10  # Максимум 10 сигналов в час
         self.max_active_positions_per_symbol = 2  # Макс. позиций по символу
 
+        # Метрики этапов сканирования
+        self._stage_latency = get_metrics_registry().histogram(
+            "scan_stage_seconds",
+            "Время этапов цикла сканирования",
+            ("stage",),
+        )
+
         logger.info(
             f"✅ UnifiedAutoScanner инициализирован (интервал: {self.interval_minutes} мин)"
         )
@@ -120,8 +128,15 @@ class UnifiedAutoScanner:
         except asyncio.CancelledError:
             logger.info("🛑 Цикл сканирования отменён")
 
+    def _observe_stage(self, stage: str, start: float) -> float:
+        """Записать время этапа и вернуть новую точку отсчёта"""
+        now = time.perf_counter()
+        self._stage_latency.labels(stage).observe(now - start)
+        return now
+
     async def scan_market(self):
         """Сканирование рынка на всех символах"""
+        cycle_start = time.perf_counter()
         try:
             now = time.time()
             hour_ago = now - 3600
@@ -168,39 +183,39 @@ class UnifiedAutoScanner:
                             # Сохраняем данные в market_data для команды /scenario
                             try:
                                 # ✅ ИСПОЛЬЗУЕМ result НАПРЯМУЮ (без market_data)
-                                self.bot.market_data[symbol] = {
-                                    "price": result["entry_price"],
-                                    "cvd": result.get(
+                                self.bot.market_data.update(
+                                    symbol,
+                                    price=result["entry_price"],
+                                    cvd=result.get(
                                         "cvd", 0
                                     ),  # ← НАПРЯМУЮ ИЗ result!
-                                    "volume_ratio": result.get(
+                                    volume_ratio=result.get(
                                         "volume_ratio", 0
                                     ),  # ← НАПРЯМУЮ ИЗ result!
-                                    "funding_rate": result.get("funding_rate", 0),
-                                    "long_short_ratio": result.get(
+                                    funding_rate=result.get("funding_rate", 0),
+                                    long_short_ratio=result.get(
                                         "long_short_ratio", 0
                                     ),
-                                    "market_regime": result.get(
+                                    market_regime=result.get(
                                         "market_regime", "Unknown"
                                     ),
-                                    "wyckoff_phase": result.get(
+                                    wyckoff_phase=result.get(
                                         "wyckoff_phase", "Unknown"
                                     ),
-                                    "pattern": result.get("scenario_name", "Unknown"),
-                                    "strategy": result.get("strategy", "Unknown"),
-                                    "score": result.get("quality_score", 0),
-                                    "trend_1h": result.get("trend_1h", "UNKNOWN"),
-                                    "trend_4h": result.get("trend_4h", "UNKNOWN"),
-                                    "trend_1d": result.get("trend_1d", "UNKNOWN"),
-                                    "mtf_aligned": result.get("mtf_aligned", 0),
-                                    "mtf_agreement": result.get("mtf_agreement", 0),
-                                    "timestamp": datetime.now().isoformat(),
-                                }
+                                    pattern=result.get("scenario_name", "Unknown"),
+                                    strategy=result.get("strategy", "Unknown"),
+                                    score=result.get("quality_score", 0),
+                                    trend_1h=result.get("trend_1h", "UNKNOWN"),
+                                    trend_4h=result.get("trend_4h", "UNKNOWN"),
+                                    trend_1d=result.get("trend_1d", "UNKNOWN"),
+                                    mtf_aligned=result.get("mtf_aligned", 0),
+                                    mtf_agreement=result.get("mtf_agreement", 0),
+                                )
                                 logger.info(
                                     f"💾 {symbol}: Данные сохранены в market_data для /scenario"
                                 )
                                 logger.debug(
-                                    f"🔍 DEBUG: bot.market_data[{symbol}] CVD={self.bot.market_data.get(symbol, {}).get('cvd', 'N/A')}"
+                                    f"🔍 DEBUG: bot.market_data[{symbol}] CVD={self.bot.market_data.value(symbol, 'cvd', 'N/A')}"
                                 )
                                 logger.debug(
                                     f"🔍 DEBUG: Всего символов в market_data: {len(self.bot.market_data)}"
@@ -252,6 +267,8 @@ class UnifiedAutoScanner:
 
         except Exception as e:
             logger.error(f"❌ Ошибка scan_market: {e}")
+        finally:
+            self._observe_stage("cycle", cycle_start)
 
     # ✅ ДОБАВИТЬ ЭТОТ МЕТОД ЗДЕСЬ:
     async def scan_symbol(self, symbol: str) -> Optional[Dict]:
@@ -291,29 +308,29 @@ class UnifiedAutoScanner:
 
                 # СОХРАНЯЕМ ДАННЫЕ В market_data ДЛЯ КОМАНДЫ /scenario
                 try:
-                    self.bot.market_data[symbol] = {
-                        "price": result["entry_price"],
-                        "cvd": result.get("cvd", 0),
-                        "volume_ratio": result.get("volume_ratio", 0),
-                        "funding_rate": result.get("funding_rate", 0),
-                        "long_short_ratio": result.get("long_short_ratio", 0),
-                        "market_regime": result.get("market_regime", "Unknown"),
-                        "wyckoff_phase": result.get("wyckoff_phase", "Unknown"),
-                        "pattern": result.get("scenario_name", "Unknown"),
-                        "strategy": result.get("strategy", "Unknown"),
-                        "score": result.get("quality_score", 0),
-                        "trend_1h": result.get("trend_1h", "UNKNOWN"),
-                        "trend_4h": result.get("trend_4h", "UNKNOWN"),
-                        "trend_1d": result.get("trend_1d", "UNKNOWN"),
-                        "mtf_aligned": result.get("mtf_aligned", 0),
-                        "mtf_agreement": result.get("mtf_agreement", 0),
-                        "timestamp": datetime.now().isoformat(),
-                    }
+                    self.bot.market_data.update(
+                        symbol,
+                        price=result["entry_price"],
+                        cvd=result.get("cvd", 0),
+                        volume_ratio=result.get("volume_ratio", 0),
+                        funding_rate=result.get("funding_rate", 0),
+                        long_short_ratio=result.get("long_short_ratio", 0),
+                        market_regime=result.get("market_regime", "Unknown"),
+                        wyckoff_phase=result.get("wyckoff_phase", "Unknown"),
+                        pattern=result.get("scenario_name", "Unknown"),
+                        strategy=result.get("strategy", "Unknown"),
+                        score=result.get("quality_score", 0),
+                        trend_1h=result.get("trend_1h", "UNKNOWN"),
+                        trend_4h=result.get("trend_4h", "UNKNOWN"),
+                        trend_1d=result.get("trend_1d", "UNKNOWN"),
+                        mtf_aligned=result.get("mtf_aligned", 0),
+                        mtf_agreement=result.get("mtf_agreement", 0),
+                    )
                     logger.info(
                         f"💾 {symbol}: Данные сохранены в market_data для /scenario"
                     )
                     logger.debug(
-                        f"🔍 DEBUG: bot.market_data[{symbol}] CVD={self.bot.market_data.get(symbol, {}).get('cvd', 'N/A')}"
+                        f"🔍 DEBUG: bot.market_data[{symbol}] CVD={self.bot.market_data.value(symbol, 'cvd', 'N/A')}"
                     )
                     logger.debug(
                         f"🔍 DEBUG: Всего символов в market_data: {len(self.bot.market_data)}"
@@ -422,7 +439,9 @@ class UnifiedAutoScanner:
 
             # ========== 3. ПОЛУЧАЕМ ДАННЫЕ РЫНКА ==========
 
+            stage_start = time.perf_counter()
             market_data = await self._get_market_data(symbol)
+            stage_start = self._observe_stage("market_data", stage_start)
             if not market_data:
                 return None
 
@@ -441,7 +460,9 @@ class UnifiedAutoScanner:
             # ========== 6. ПОДГОТОВКА ДАННЫХ ==========
             indicators = {}
             mtf_trends = {}
+            stage_start = time.perf_counter()
             volume_profile = await self.bot.get_volume_profile(symbol)
+            stage_start = self._observe_stage("volume_profile", stage_start)
 
             # ВАЛИДАЦИЯ VOLUME PROFILE
             if volume_profile:
@@ -465,7 +486,12 @@ class UnifiedAutoScanner:
                 volume_profile = {}
 
             news_sentiment = {}
-            veto_checks = {}
+            # Кэшированные вердикты вето (O(1), без пересчёта проверок)
+            veto_checks = (
+                self.veto_system.veto_checks(symbol)
+                if hasattr(self.veto_system, "veto_checks")
+                else {}
+            )
 
             # Если есть MTF analyzer - получаем тренды
             if hasattr(self.bot, "mtf_analyzer") and self.bot.mtf_analyzer:
@@ -491,6 +517,7 @@ class UnifiedAutoScanner:
                 news_sentiment=news_sentiment,
                 veto_checks=veto_checks,
             )
+            stage_start = self._observe_stage("scenario_match", stage_start)
 
             # Проверяем успешность match
             if not match_result:
@@ -524,6 +551,7 @@ class UnifiedAutoScanner:
                     market_data,
                     signal_data,  # ← ПЕРЕДАЁМ signal_data!
                 )
+                stage_start = self._observe_stage("confirm_filter", stage_start)
 
                 # ✅ ПОЛУЧАЕМ CVD **СРАЗУ** ПОСЛЕ validate() (независимо от результата!)
                 try:
@@ -552,6 +580,7 @@ class UnifiedAutoScanner:
                     direction=direction,
                     scenario_name=match_result.get("scenario_name"),
                 )
+                stage_start = self._observe_stage("mtf_filter", stage_start)
 
                 if not is_valid:
                     logger.warning(
@@ -644,6 +673,8 @@ class UnifiedAutoScanner:
             except Exception as e:
                 logger.debug(f"   ⚠️ Не удалось получить L/S Ratio для {symbol}: {e}")
 
+            self._observe_stage("extras", stage_start)
+
             # ========== 12. ФОРМИРУЕМ СИГНАЛ ==========
             signal = {
                 "signal": True,
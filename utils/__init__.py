@@ -57,6 +57,15 @@ try:
 except ImportError:
     WebSocketManager = None
 
+# ============================================================================
+# METRICS
+# ============================================================================
+try:
+    from .metrics import MetricsRegistry, get_metrics_registry
+except ImportError:
+    MetricsRegistry = None
+    get_metrics_registry = None
+
 # ============================================================================
 # ERROR LOGGER
 # ============================================================================
@@ -104,6 +113,9 @@ if RateLimiter is not None:
 if WebSocketManager is not None:
     __all__.append("WebSocketManager")
 
+if MetricsRegistry is not None:
+    __all__.extend(["MetricsRegistry", "get_metrics_registry"])
+
 if ErrorLogger is not None:
     __all__.append("ErrorLogger")
 
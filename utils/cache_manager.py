@@ -11,6 +11,7 @@ from typing import Dict, Optional, Any, Tuple
 from collections import OrderedDict
 from dataclasses import dataclass
 from config.settings import logger
+from utils.metrics import get_metrics_registry
 
 
 @dataclass
@@ -69,6 +70,13 @@ class CacheManager:
         # Lock для thread-safety
         self.lock = asyncio.Lock()
 
+        # Hit/miss по namespace для /metrics
+        self._requests_metric = get_metrics_registry().counter(
+            "cache_requests_total",
+            "Запросы к CacheManager по namespace и результату",
+            ("namespace", "result"),
+        )
+
         logger.info(
             f"✅ CacheManager инициализирован: "
             f"max_size={max_size}, default_ttl={default_ttl}s"
@@ -92,6 +100,7 @@ class CacheManager:
             # Проверяем наличие в кэше
             if full_key not in self.cache:
                 self.stats["misses"] += 1
+                self._requests_metric.labels(namespace, "miss").inc()
                 logger.debug(f"❌ Cache MISS: {full_key}")
                 return None
 
@@ -101,12 +110,14 @@ class CacheManager:
             if entry.is_expired:
                 self.stats["misses"] += 1
                 self.stats["expirations"] += 1
+                self._requests_metric.labels(namespace, "expired").inc()
                 del self.cache[full_key]
                 logger.debug(f"⏰ Cache EXPIRED: {full_key} (age: {entry.age:.1f}s)")
                 return None
 
             # Hit! Обновляем статистику и LRU order
             self.stats["hits"] += 1
+            self._requests_metric.labels(namespace, "hit").inc()
             entry.hit_count += 1
             self.cache.move_to_end(full_key)
 
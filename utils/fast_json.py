@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fast JSON - подключаемый декодер для WebSocket/REST сообщений
+orjson / ujson, если установлены, иначе stdlib json.
+Backend выбирается при импорте (WEBSOCKET_CONFIG['json_backend'])
+и может быть переключён в runtime через set_backend()
+"""
+
+import json
+from typing import Any, Callable, Dict, Tuple, Union
+
+from config.settings import logger, WEBSOCKET_CONFIG
+
+
+# Порядок предпочтения для "auto"
+BACKEND_PRIORITY = ("orjson", "ujson", "json")
+
+
+def _load_backend(name: str) -> Tuple[Callable[[Any], Any], Callable[[Any], str]]:
+    """(loads, dumps) для backend; ImportError, если пакет не установлен"""
+    if name == "orjson":
+        import orjson
+
+        return orjson.loads, lambda obj: orjson.dumps(obj).decode("utf-8")
+    if name == "ujson":
+        import ujson
+
+        return ujson.loads, ujson.dumps
+    if name == "json":
+        return json.loads, json.dumps
+    raise ValueError(f"Неизвестный JSON backend: {name}")
+
+
+def _available_backends() -> Dict[str, Tuple[Callable, Callable]]:
+    backends = {}
+    for name in BACKEND_PRIORITY:
+        try:
+            backends[name] = _load_backend(name)
+        except ImportError:
+            continue
+    return backends
+
+
+_backends = _available_backends()
+
+# Ошибки декодирования всех backend'ов (для except); orjson.JSONDecodeError
+# наследует json.JSONDecodeError, у ujson — собственный класс
+JSONDecodeError: Tuple[type, ...] = (json.JSONDecodeError,)
+if "ujson" in _backends:
+    import ujson
+
+    JSONDecodeError += (ujson.JSONDecodeError,)
+
+_backend_name = "json"
+_loads, _dumps = json.loads, json.dumps
+
+
+def set_backend(name: str = "auto") -> str:
+    """
+    Выбрать JSON backend
+
+    Args:
+        name: auto / orjson / ujson / json
+
+    Returns:
+        Имя выбранного backend (при недоступном — stdlib json)
+    """
+    global _backend_name, _loads, _dumps
+
+    if name == "auto":
+        name = next(n for n in BACKEND_PRIORITY if n in _backends)
+    elif name not in _backends:
+        logger.warning(f"⚠️ JSON backend {name} недоступен, используется json")
+        name = "json"
+
+    _backend_name = name
+    _loads, _dumps = _backends[name]
+    return name
+
+
+def get_backend() -> str:
+    """Имя текущего backend"""
+    return _backend_name
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Декодировать JSON текущим backend"""
+    return _loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Компактный JSON (str) текущим backend"""
+    return _dumps(obj)
+
+
+set_backend(WEBSOCKET_CONFIG.get("json_backend", "auto"))
+logger.debug(f"✅ JSON backend: {_backend_name}")
+
+
+# Экспорт
+__all__ = [
+    "JSONDecodeError",
+    "loads",
+    "dumps",
+    "set_backend",
+    "get_backend",
+]
@@ -9,6 +9,8 @@ import logging
 from aiohttp import web
 import time
 
+from utils.metrics import get_metrics_registry, register_default_collectors
+
 logger = logging.getLogger("gio_bot.health_server")
 
 # Глобальная ссылка на сервер
@@ -22,6 +24,16 @@ async def health_check_handler(request):
     )
 
 
+async def metrics_handler(request):
+    """Обработчик /metrics (Prometheus text exposition format)"""
+    return web.Response(
+        text=get_metrics_registry().render(),
+        content_type="text/plain",
+        charset="utf-8",
+        headers={"X-Prometheus-Format": "0.0.4"},
+    )
+
+
 async def start_health_server(port: int = 8080):
     """
     Запустить Health Check Server
@@ -37,6 +49,9 @@ async def start_health_server(port: int = 8080):
     try:
         app = web.Application()
         app.router.add_get("/health", health_check_handler)
+        app.router.add_get("/metrics", metrics_handler)
+
+        register_default_collectors()
 
         runner = web.AppRunner(app)
         await runner.setup()
@@ -48,6 +63,7 @@ async def start_health_server(port: int = 8080):
 
         logger.info(f"✅ Health Check Server запущен на порту {port}")
         logger.info(f"   • Endpoint: http://0.0.0.0:{port}/health")
+        logger.info(f"   • Endpoint: http://0.0.0.0:{port}/metrics")
 
         return runner
 
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Transport - единый пул соединений для всех REST запросов
+Keep-alive пулы по хостам, весовые бюджеты бирж, retry с jitter,
+латентность по endpoint
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config.settings import logger, HTTP_TRANSPORT_CONFIG
+from utils.metrics import get_metrics_registry, stats_collector
+from utils.rate_limiter import RateLimiter, ExponentialBackoff
+
+
+# Хост → биржа (для бюджета и labels метрик)
+HOST_EXCHANGES = {
+    "api.bybit.com": "bybit",
+    "api-testnet.bybit.com": "bybit",
+    "api.binance.com": "binance",
+    "fapi.binance.com": "binance",
+    "testnet.binance.vision": "binance",
+    "www.okx.com": "okx",
+    "aws.okx.com": "okx",
+    "api.exchange.coinbase.com": "coinbase",
+    "api.coinbase.com": "coinbase",
+}
+
+# Веса запросов, отличные от 1 (по документации бирж)
+ENDPOINT_WEIGHTS = {
+    ("binance", "/api/v3/klines"): 2,
+    ("binance", "/api/v3/depth"): 5,
+    ("binance", "/api/v3/ticker/24hr"): 2,
+    ("binance", "/api/v3/trades"): 25,
+    ("binance", "/fapi/v1/klines"): 2,
+    ("binance", "/fapi/v1/depth"): 5,
+}
+
+# Статусы, при которых запрос повторяется
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def resolve_exchange(url: str) -> str:
+    """Определить биржу по URL (неизвестные хосты — по имени хоста)"""
+    host = urlsplit(url).hostname or "unknown"
+    return HOST_EXCHANGES.get(host, host)
+
+
+class _RequestContext:
+    """
+    Async context manager одного запроса: бюджет → запрос → retry
+
+    Совместим с `async with session.get(...) as response`, поэтому
+    коннекторы переходят на транспорт без переписывания обработки ответов.
+    """
+
+    __slots__ = ("transport", "method", "url", "kwargs", "exchange", "weight", "retries", "_response")
+
+    def __init__(self, transport, method, url, exchange, weight, retries, kwargs):
+        self.transport = transport
+        self.method = method
+        self.url = url
+        self.exchange = exchange
+        self.weight = weight
+        self.retries = retries
+        self.kwargs = kwargs
+        self._response = None
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self._response = await self.transport._request(
+            self.method, self.url, self.exchange, self.weight, self.retries, self.kwargs
+        )
+        return self._response
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._response is not None:
+            self._response.release()
+
+
+class ExchangeClient:
+    """
+    Клиент транспорта для одной биржи / сервиса
+
+    Повторяет интерфейс aiohttp.ClientSession (get/post/request, closed,
+    close), добавляя дефолтные headers/timeout и параметр weight.
+    """
+
+    def __init__(
+        self,
+        transport: "HttpTransport",
+        exchange: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.transport = transport
+        self.exchange = exchange
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    def request(self, method: str, url: str, weight: Optional[int] = None, retries: Optional[int] = None, **kwargs) -> _RequestContext:
+        """Запрос через общий пул (использовать как async context manager)"""
+        if self.headers:
+            kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        if "timeout" not in kwargs and self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        exchange = self.exchange or resolve_exchange(url)
+        return self.transport.request(method, url, exchange=exchange, weight=weight, retries=retries, **kwargs)
+
+    def get(self, url: str, **kwargs) -> _RequestContext:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _RequestContext:
+        return self.request("POST", url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs) -> Any:
+        """GET + JSON (None при HTTP ошибке)"""
+        return await self.transport.get_json(url, exchange=self.exchange, headers=self.headers or None, **kwargs)
+
+    @property
+    def closed(self) -> bool:
+        """Клиент не владеет соединениями; сессия транспорта пересоздаётся сама"""
+        return False
+
+    async def close(self):
+        """No-op: пул общий, закрывается HttpTransport.close() при остановке бота"""
+
+
+class HttpTransport:
+    """
+    Единый HTTP транспорт для REST запросов к биржам
+
+    Features:
+    - Одна aiohttp сессия: keep-alive пулы соединений по хостам
+    - Весовой бюджет на биржу (RateLimiter, endpoint = биржа)
+    - Retry сетевых ошибок / 429 / 5xx с exponential backoff + jitter
+    - Латентность и ошибки по (биржа, endpoint) в метриках
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**HTTP_TRANSPORT_CONFIG, **(config or {})}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+
+        # Бюджеты: weight/сек на биржу
+        self.budgets: Dict[str, RateLimiter] = {}
+
+        # Статистика по endpoint: {(exchange, path): {...}}
+        self.endpoint_stats: Dict[tuple, Dict[str, float]] = {}
+
+        registry = get_metrics_registry()
+        self._latency = registry.histogram(
+            "rest_request_seconds",
+            "Латентность REST запросов к биржам",
+            ("exchange", "endpoint"),
+        )
+        self._errors = registry.counter(
+            "rest_request_errors_total",
+            "Ошибки REST запросов к биржам",
+            ("exchange", "endpoint"),
+        )
+        self._statuses = registry.counter(
+            "rest_responses_total",
+            "Ответы REST по HTTP статусу",
+            ("exchange", "status"),
+        )
+        self._retries = registry.counter(
+            "rest_retries_total", "Повторы REST запросов", ("exchange",)
+        )
+        registry.register_collector(
+            "http_transport", stats_collector("http_transport", self.get_totals)
+        )
+
+        logger.info(
+            f"✅ HttpTransport инициализирован: "
+            f"budgets={self.config['exchange_budgets']}, retries={self.config['max_retries']}"
+        )
+
+    # ==================== СЕССИЯ ====================
+
+    @property
+    def closed(self) -> bool:
+        return self._session is not None and self._session.closed
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Общая сессия (пересоздаётся, если закрыта или сменился event loop)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.config["pool_limit"],
+                limit_per_host=self.config["pool_limit_per_host"],
+                keepalive_timeout=self.config["keepalive_timeout"],
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=self.config["timeout"], connect=self.config["connect_timeout"]
+                ),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Закрыть пул соединений"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("🌐 HttpTransport: пул соединений закрыт")
+
+    def client(
+        self,
+        exchange: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> ExchangeClient:
+        """
+        Получить клиент для биржи / сервиса
+
+        Args:
+            exchange: Имя бюджета (bybit/binance/okx/coinbase/...); по умолчанию — по хосту
+            headers: Заголовки по умолчанию (API ключи и т.п.)
+            timeout: Таймаут по умолчанию (секунды)
+        """
+        return ExchangeClient(self, exchange=exchange, headers=headers, timeout=timeout)
+
+    # ==================== БЮДЖЕТЫ ====================
+
+    def _budget(self, exchange: str) -> RateLimiter:
+        limiter = self.budgets.get(exchange)
+        if limiter is None:
+            rate = self.config["exchange_budgets"].get(
+                exchange, self.config["default_budget"]
+            )
+            limiter = RateLimiter(requests_per_second=rate, burst_size=rate)
+            self.budgets[exchange] = limiter
+        return limiter
+
+    async def acquire(self, exchange: str, weight: int = 1):
+        """Списать вес запроса из бюджета биржи (ждёт при исчерпании)"""
+        await self._budget(exchange).acquire_bulk(exchange, weight)
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        exchange: Optional[str] = None,
+        weight: Optional[int] = None,
+        retries: Optional[int] = None,
+        **kwargs,
+    ) -> _RequestContext:
+        """
+        Запрос через общий пул
+
+        Использование:
+            async with transport.request("GET", url, params=params) as response:
+                data = await response.json()
+
+        Args:
+            method: HTTP метод
+            url: URL
+            exchange: Бюджет (по умолчанию — по хосту)
+            weight: Вес запроса (по умолчанию — из ENDPOINT_WEIGHTS или 1)
+            retries: Повторов (по умолчанию — из конфига)
+            **kwargs: Аргументы aiohttp (params, json, headers, timeout)
+        """
+        exchange = exchange or resolve_exchange(url)
+        if weight is None:
+            weight = ENDPOINT_WEIGHTS.get((exchange, urlsplit(url).path), 1)
+        if retries is None:
+            retries = self.config["max_retries"]
+
+        timeout = kwargs.get("timeout")
+        if isinstance(timeout, (int, float)):
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        return _RequestContext(self, method, url, exchange, weight, retries, kwargs)
+
+    def get(self, url: str, **kwargs) -> _RequestContext:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _RequestContext:
+        return self.request("POST", url, **kwargs)
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        exchange: Optional[str] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        GET и разбор JSON
+
+        Returns:
+            Распарсенный JSON или None при HTTP статусе != 200
+        """
+        async with self.get(url, params=params, exchange=exchange, **kwargs) as response:
+            if response.status != 200:
+                logger.warning(f"⚠️ HTTP {response.status}: {urlsplit(url).path}")
+                return None
+            return await response.json(content_type=None)
+
+    async def _request(self, method, url, exchange, weight, retries, kwargs) -> aiohttp.ClientResponse:
+        """Выполнить запрос с бюджетом и retry; вернуть ответ (тело не прочитано)"""
+        endpoint = urlsplit(url).path or "/"
+        stats = self.endpoint_stats.get((exchange, endpoint))
+        if stats is None:
+            stats = {"requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0}
+            self.endpoint_stats[(exchange, endpoint)] = stats
+
+        backoff = ExponentialBackoff(
+            base_delay=self.config["retry_base_delay"], max_delay=self.config["retry_max_delay"]
+        )
+        attempt = 0
+
+        while True:
+            retry_after = None
+            await self.acquire(exchange, weight)
+            start = time.perf_counter()
+            try:
+                response = await self._get_session().request(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record(stats, exchange, endpoint, start, error=True)
+                if attempt >= retries:
+                    raise
+                logger.debug(f"⚠️ {exchange} {endpoint}: {type(e).__name__}, повтор {attempt + 1}")
+            else:
+                self._record(stats, exchange, endpoint, start, status=response.status)
+                if response.status not in RETRY_STATUSES or attempt >= retries:
+                    return response
+
+                header = response.headers.get("Retry-After", "")
+                if header.isdigit():
+                    retry_after = min(float(header), self.config["retry_max_delay"])
+                response.release()
+                logger.debug(f"⚠️ {exchange} {endpoint}: HTTP {response.status}, повтор {attempt + 1}")
+
+            attempt += 1
+            stats["retries"] += 1
+            self._retries.labels(exchange).inc()
+            if retry_after is not None:
+                await asyncio.sleep(retry_after)
+            else:
+                # Full jitter: равномерно в [0, delay] — разводит одновременные повторы
+                await asyncio.sleep(random.uniform(0, backoff.get_delay()))
+
+    def _record(self, stats, exchange, endpoint, start, status=None, error=False):
+        elapsed = time.perf_counter() - start
+        stats["requests"] += 1
+        stats["total_ms"] += elapsed * 1000
+        stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+        self._latency.labels(exchange, endpoint).observe(elapsed)
+        if error:
+            stats["errors"] += 1
+            self._errors.labels(exchange, endpoint).inc()
+        else:
+            self._statuses.labels(exchange, status).inc()
+            if status >= 400:
+                stats["errors"] += 1
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_endpoint_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика по endpoint: запросы, ошибки, retry, средняя/максимальная латентность"""
+        return {
+            f"{exchange}:{endpoint}": {
+                "requests": s["requests"],
+                "errors": s["errors"],
+                "retries": s["retries"],
+                "avg_ms": round(s["total_ms"] / s["requests"], 1) if s["requests"] else 0.0,
+                "max_ms": round(s["max_ms"], 1),
+            }
+            for (exchange, endpoint), s in self.endpoint_stats.items()
+        }
+
+    def get_totals(self) -> Dict[str, float]:
+        """Суммарная статистика транспорта"""
+        stats = self.endpoint_stats.values()
+        return {
+            "requests": sum(s["requests"] for s in stats),
+            "errors": sum(s["errors"] for s in stats),
+            "retries": sum(s["retries"] for s in stats),
+            "endpoints": len(self.endpoint_stats),
+        }
+
+
+# ==================== SINGLETON ====================
+
+_global_http_transport: Optional[HttpTransport] = None
+
+
+def get_http_transport() -> HttpTransport:
+    """Получить глобальный HttpTransport"""
+    global _global_http_transport
+    if _global_http_transport is None:
+        _global_http_transport = HttpTransport()
+    return _global_http_transport
+
+
+# Экспорт
+__all__ = [
+    "HttpTransport",
+    "ExchangeClient",
+    "resolve_exchange",
+    "get_http_transport",
+]
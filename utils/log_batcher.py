@@ -1,27 +1,38 @@
 # -*- coding: utf-8 -*-
 """
 Батчинг логов - объединяет повторяющиеся сообщения
+Hot-path сообщения (log_throttled) выводятся не чаще раза в интервал
+на место вызова: форматирование ленивое (%-аргументы), подавленные
+считаются и попадают в следующее сообщение и сводку.
 """
 
 import asyncio
+import os
+import sys
+import time
 from collections import defaultdict, Counter
 from datetime import datetime
-from typing import Dict, List
-from config.settings import logger
+from typing import Dict, List, Optional, Tuple
+from config.settings import logger, LOG_THROTTLE_SECONDS
 
 
 class LogBatcher:
     """Агрегирует логи и выводит сводки"""
 
-    def __init__(self, flush_interval: int = 30):
+    def __init__(self, flush_interval: int = 30, throttle_interval: float = LOG_THROTTLE_SECONDS):
         """
         Args:
             flush_interval: Интервал вывода сводок (секунды)
+            throttle_interval: Минимальный интервал hot-path сообщения на место вызова
         """
         self.flush_interval = flush_interval
+        self.throttle_interval = throttle_interval
         self.orderbook_updates: Counter = Counter()
         self.volume_calculations: Counter = Counter()
         self.scenario_matches: List[Dict] = []
+        # (файл, строка, key) → [время последнего вывода, подавлено с тех пор]
+        self._throttled: Dict[Tuple[str, int, Optional[str]], List] = {}
+        self.suppressed: Counter = Counter()
         self.last_flush = datetime.now()
         self.is_running = False
 
@@ -55,6 +66,53 @@ class LogBatcher:
             'time': datetime.now()
         })
 
+    def log_throttled(
+        self,
+        level: int,
+        msg: str,
+        *args,
+        key: Optional[str] = None,
+        interval: Optional[float] = None,
+    ) -> bool:
+        """
+        Hot-path лог: не чаще раза в interval на место вызова (+ key)
+
+        Сообщение форматируется только при выводе; уровень ниже
+        включённого отбрасывается до любой работы.
+
+        Args:
+            level: logging.DEBUG / INFO / ...
+            msg: Шаблон с %-аргументами
+            *args: Аргументы шаблона
+            key: Доп. ключ (например, символ) — отдельный лимит
+            interval: Интервал (секунды), по умолчанию throttle_interval
+
+        Returns:
+            True, если сообщение выведено
+        """
+        if not logger.isEnabledFor(level):
+            return False
+
+        frame = sys._getframe(1)
+        site = (frame.f_code.co_filename, frame.f_lineno, key)
+        now = time.monotonic()
+        entry = self._throttled.get(site)
+        if entry is None:
+            entry = self._throttled[site] = [now, 0]
+        elif now - entry[0] < (self.throttle_interval if interval is None else interval):
+            entry[1] += 1
+            self.suppressed[site] += 1
+            return False
+        else:
+            entry[0] = now
+
+        skipped, entry[1] = entry[1], 0
+        if skipped:
+            logger.log(level, msg + " (+%d подавлено)", *args, skipped, stacklevel=2)
+        else:
+            logger.log(level, msg, *args, stacklevel=2)
+        return True
+
     async def _flush_loop(self):
         """Периодический вывод сводок"""
         while self.is_running:
@@ -63,7 +121,7 @@ class LogBatcher:
 
     async def _flush(self):
         """Вывести сводку"""
-        if not any([self.orderbook_updates, self.volume_calculations, self.scenario_matches]):
+        if not any([self.orderbook_updates, self.volume_calculations, self.scenario_matches, self.suppressed]):
             return
 
         logger.info("=" * 70)
@@ -99,6 +157,14 @@ class LogBatcher:
                 logger.info(f"   • {symbol:10} → {len(matches):3} matches | Avg: {avg_score:.1f} | Best: {best_score:.1f}")
             self.scenario_matches.clear()
 
+        # Подавленные hot-path сообщения
+        if self.suppressed:
+            logger.info(f"🔇 Throttled Logs ({sum(self.suppressed.values())} suppressed):")
+            for (filename, lineno, key), count in self.suppressed.most_common(10):
+                site = f"{os.path.basename(filename)}:{lineno}" + (f" {key}" if key else "")
+                logger.info(f"   • {site:30} → {count:5} suppressed")
+            self.suppressed.clear()
+
         logger.info("=" * 70)
 
 
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Loop Monitor - watchdog задержки event loop и guard блокирующих вызовов
+Heartbeat измеряет lag, фоновый поток снимает стек корутины,
+заблокировавшей loop; debug-режим ловит известные блокирующие вызовы
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import logger, LOOP_MONITOR_CONFIG
+from utils.metrics import get_metrics_registry, stats_collector
+
+
+# Bucket'ы задержки loop (секунды): 1ms ... 10s
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Корень проекта: для поиска "своего" кадра в стеке
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _in_loop_thread() -> bool:
+    """Вызов выполняется в потоке с запущенным event loop"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _project_frame(frames: List[traceback.FrameSummary]) -> Optional[traceback.FrameSummary]:
+    """Самый глубокий кадр из кода проекта (не stdlib / site-packages)"""
+    for frame in reversed(frames):
+        filename = os.path.abspath(frame.filename)
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and "site-packages" not in filename
+            and not filename.endswith(os.path.join("utils", "loop_monitor.py"))
+        ):
+            return frame
+    return frames[-1] if frames else None
+
+
+def _format_location(frame: Optional[traceback.FrameSummary]) -> str:
+    if frame is None:
+        return "unknown"
+    filename = os.path.relpath(frame.filename, PROJECT_ROOT)
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopMonitor:
+    """
+    Watchdog event loop
+
+    Features:
+    - Heartbeat корутина: lag = фактическое пробуждение - ожидаемое
+    - Фоновый поток: если heartbeat не пришёл дольше порога, снимает
+      стек потока loop и текущую задачу (кто именно блокирует)
+    - Метрики: гистограмма lag, счётчик stall'ов, максимум lag
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        stall_threshold_ms: Optional[float] = None,
+        max_reports: int = 20,
+    ):
+        """
+        Args:
+            interval: Период heartbeat (секунды)
+            stall_threshold_ms: Порог stall (мс), после которого снимается стек
+            max_reports: Сколько последних stall'ов хранить
+        """
+        self.interval = interval or LOOP_MONITOR_CONFIG["interval"]
+        self.stall_threshold = (
+            stall_threshold_ms or LOOP_MONITOR_CONFIG["stall_threshold_ms"]
+        ) / 1000
+
+        self.stalls: deque = deque(maxlen=max_reports)
+        self.stats = {"beats": 0, "stalls": 0, "max_lag_ms": 0.0, "last_lag_ms": 0.0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._last_beat = time.perf_counter()
+        self._pending: Optional[Dict] = None  # stall, снятый watchdog'ом
+
+        registry = get_metrics_registry()
+        self._lag = registry.histogram(
+            "event_loop_lag_seconds", "Задержка event loop", buckets=LOOP_LAG_BUCKETS
+        )
+        self._stall_counter = registry.counter(
+            "event_loop_stalls_total", "Блокировки event loop дольше порога"
+        )
+        registry.register_collector(
+            "loop_monitor", stats_collector("event_loop", self.get_stats)
+        )
+
+    # ==================== ЗАПУСК ====================
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Запустить heartbeat и watchdog поток для текущего loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop_event.clear()
+
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watchdog, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+        logger.info(
+            f"✅ LoopMonitor запущен: interval={self.interval * 1000:.0f}мс, "
+            f"порог stall={self.stall_threshold * 1000:.0f}мс"
+        )
+
+    async def stop(self):
+        """Остановить heartbeat и watchdog"""
+        self._stop_event.set()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        logger.info("🛑 LoopMonitor остановлен")
+
+    # ==================== HEARTBEAT ====================
+
+    async def _heartbeat(self):
+        """Просыпается каждые interval; опоздание пробуждения = lag loop"""
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._record_beat(max(0.0, now - expected), now)
+
+    def _record_beat(self, lag: float, now: float):
+        with self._lock:
+            self._last_beat = now
+            pending, self._pending = self._pending, None
+
+        lag_ms = lag * 1000
+        self._lag.observe(lag)
+        self.stats["beats"] += 1
+        self.stats["last_lag_ms"] = lag_ms
+        self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+
+        if lag < self.stall_threshold:
+            return
+
+        # Stall: стек снят watchdog'ом во время блокировки (если успел)
+        report = pending or {
+            "time": time.time(),
+            "task": None,
+            "location": "unknown",
+            "stack": [],
+        }
+        report["lag_ms"] = round(lag_ms, 1)
+        self.stalls.append(report)
+        self.stats["stalls"] += 1
+        self._stall_counter.inc()
+
+        logger.warning(
+            f"🐢 Event loop заблокирован на {lag_ms:.0f}мс: "
+            f"{report['task'] or '?'} → {report['location']}"
+        )
+
+    # ==================== WATCHDOG ====================
+
+    def _watchdog(self):
+        """Фоновый поток: снимает стек loop, пока тот заблокирован"""
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                blocked_for = time.perf_counter() - self._last_beat
+                captured = self._pending is not None
+            if captured or blocked_for < self.interval + self.stall_threshold:
+                continue
+
+            report = self.capture()
+            with self._lock:
+                if self._pending is None:
+                    self._pending = report
+
+    def capture(self) -> Dict:
+        """
+        Снять стек потока event loop и текущую задачу
+
+        Returns:
+            {'time', 'task', 'location', 'stack'}
+        """
+        frame = sys._current_frames().get(self._loop_thread_id)
+        frames = traceback.extract_stack(frame, limit=30) if frame else []
+
+        task_name = None
+        if self._loop is not None:
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                coro = task.get_coro()
+                task_name = f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+        return {
+            "time": time.time(),
+            "task": task_name,
+            "location": _format_location(_project_frame(frames)),
+            "stack": traceback.format_list(frames),
+        }
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, float]:
+        """Счётчики heartbeat / stall и lag"""
+        return {
+            **self.stats,
+            "lag_p99_ms": self._lag.labels().quantile(0.99) * 1000,
+        }
+
+    def get_recent_stalls(self, limit: int = 5) -> List[Dict]:
+        """Последние stall'ы (новые первыми)"""
+        return list(self.stalls)[-limit:][::-1]
+
+    def format_report(self) -> str:
+        """Краткий отчёт для /status"""
+        stats = self.get_stats()
+        text = (
+            f"⏱️ Event loop: lag {stats['last_lag_ms']:.0f}мс, "
+            f"p99 ≤{stats['lag_p99_ms']:.0f}мс, max {stats['max_lag_ms']:.0f}мс, "
+            f"stalls {stats['stalls']}"
+        )
+        for stall in self.get_recent_stalls(3):
+            text += f"\n├─ {stall['lag_ms']:.0f}мс: {stall['location']}"
+        return text
+
+
+class BlockingCallGuard:
+    """
+    Debug guard: предупреждает о блокирующих вызовах из потока event loop
+
+    Оборачивает известные блокирующие функции; вызов из потока с
+    запущенным loop считается в метрике и логируется один раз на место
+    вызова. Из executor-потоков (run_blocking) вызовы не отмечаются.
+    """
+
+    def __init__(self):
+        self.installed = False
+        self.sites: Dict[Tuple[str, str], int] = {}
+        self._originals: List[Tuple[object, str, Callable]] = []
+        self._calls = get_metrics_registry().counter(
+            "blocking_calls_total", "Блокирующие вызовы из event loop", ("call",)
+        )
+
+    def _targets(self) -> List[Tuple[str, object, str]]:
+        targets = [
+            ("time.sleep", time, "sleep"),
+            ("sqlite3.connect", sqlite3, "connect"),
+            ("json.dump", json, "dump"),
+        ]
+        try:
+            import requests
+
+            targets.append(("requests", requests.Session, "request"))
+        except ImportError:
+            pass
+        return targets
+
+    def install(self):
+        """Обернуть известные блокирующие вызовы"""
+        if self.installed:
+            return
+        for name, owner, attr in self._targets():
+            original = getattr(owner, attr)
+            setattr(owner, attr, self._wrap(name, original))
+            self._originals.append((owner, attr, original))
+        self.installed = True
+        logger.warning(
+            f"🧪 BlockingCallGuard включён: {', '.join(n for n, _, _ in self._targets())}"
+        )
+
+    def uninstall(self):
+        """Вернуть оригинальные функции"""
+        for owner, attr, original in self._originals:
+            setattr(owner, attr, original)
+        self._originals.clear()
+        self.installed = False
+
+    def _wrap(self, name: str, original: Callable) -> Callable:
+        guard = self
+
+        def guarded(*args, **kwargs):
+            if _in_loop_thread():
+                guard._report(name)
+            return original(*args, **kwargs)
+
+        guarded.__wrapped__ = original
+        return guarded
+
+    def _report(self, name: str):
+        # Кадры: [..., вызывающий, guarded, _report] → берём до guarded
+        frames = traceback.extract_stack(limit=12)[:-2]
+        location = _format_location(_project_frame(frames))
+
+        self._calls.labels(name).inc()
+        key = (name, location)
+        self.sites[key] = self.sites.get(key, 0) + 1
+        if self.sites[key] == 1:
+            logger.warning(f"🐢 Блокирующий вызов {name} в event loop: {location}")
+
+    def get_report(self) -> List[Dict]:
+        """Места блокирующих вызовов (частые первыми)"""
+        return [
+            {"call": name, "location": location, "count": count}
+            for (name, location), count in sorted(
+                self.sites.items(), key=lambda item: item[1], reverse=True
+            )
+        ]
+
+
+# ==================== SINGLETON ====================
+
+_global_loop_monitor: Optional[LoopMonitor] = None
+_global_blocking_guard: Optional[BlockingCallGuard] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Получить глобальный LoopMonitor"""
+    global _global_loop_monitor
+    if _global_loop_monitor is None:
+        _global_loop_monitor = LoopMonitor()
+    return _global_loop_monitor
+
+
+def get_blocking_guard() -> BlockingCallGuard:
+    """Получить глобальный BlockingCallGuard"""
+    global _global_blocking_guard
+    if _global_blocking_guard is None:
+        _global_blocking_guard = BlockingCallGuard()
+    return _global_blocking_guard
+
+
+# Экспорт
+__all__ = [
+    "LoopMonitor",
+    "BlockingCallGuard",
+    "get_loop_monitor",
+    "get_blocking_guard",
+]
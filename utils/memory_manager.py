@@ -4,17 +4,27 @@
 Совместим с Python 3.13+
 """
 
+import asyncio
 import gc
+import itertools
 import psutil
 import os
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-from collections import deque
-
-from config.settings import logger, MAX_MEMORY_MB
+import sys
+import time
+import tracemalloc
+import weakref
+from typing import Callable, Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from collections import defaultdict, deque
+
+from config.settings import logger, MAX_MEMORY_MB, MEMORY_CONFIG, BASE_DIR
 from utils.helpers import current_epoch_ms
 
 
+# Eviction hook: evict(container, fraction) -> количество удалённых элементов
+EvictFn = Callable[[Any, float], int]
+
+
 @dataclass
 class CleanupResult:
     """Результат очистки памяти"""
@@ -26,6 +36,155 @@ class CleanupResult:
     timestamp: int
 
 
+# ============================================================================
+# ОЦЕНКА РАЗМЕРА И EVICTION HELPERS
+# ============================================================================
+
+_SEQUENCE_TYPES = (list, tuple, deque, set, frozenset)
+
+
+def approx_sizeof(obj: Any, sample: int = 32, depth: int = 3) -> int:
+    """
+    Приблизительный "глубокий" размер объекта в байтах
+
+    Для контейнеров меряются первые `sample` элементов, результат
+    экстраполируется на весь размер — O(sample^depth) вместо обхода
+    всех объектов, достаточно для кэшей однородных записей.
+
+    Args:
+        obj: Объект (dict / list / deque / dataclass / ...)
+        sample: Сколько элементов контейнера измерять
+        depth: Глубина рекурсии
+
+    Returns:
+        Размер в байтах
+    """
+    try:
+        size = sys.getsizeof(obj)
+    except TypeError:
+        return 0
+
+    if depth <= 0:
+        return size
+
+    if isinstance(obj, dict):
+        count = len(obj)
+        if not count:
+            return size
+        measured = 0
+        taken = 0
+        for key, value in itertools.islice(obj.items(), sample):
+            measured += approx_sizeof(key, sample, depth - 1)
+            measured += approx_sizeof(value, sample, depth - 1)
+            taken += 1
+        return size + int(measured / taken * count)
+
+    if isinstance(obj, _SEQUENCE_TYPES):
+        count = len(obj)
+        if not count:
+            return size
+        measured = 0
+        taken = 0
+        for item in itertools.islice(obj, sample):
+            measured += approx_sizeof(item, sample, depth - 1)
+            taken += 1
+        return size + int(measured / taken * count)
+
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return size + approx_sizeof(vars(obj), sample, depth - 1)
+
+    return size
+
+
+def count_items(obj: Any) -> int:
+    """Количество элементов контейнера (для dict из контейнеров с len — сумма)"""
+    if obj is None:
+        return 0
+    try:
+        if isinstance(obj, dict) and obj:
+            first = next(iter(obj.values()))
+            if hasattr(first, "__len__") and not isinstance(first, (str, bytes)):
+                return sum(len(v) for v in obj.values() if hasattr(v, "__len__"))
+        return len(obj)
+    except TypeError:
+        return 0
+
+
+def evict_oldest(container: Any, fraction: float) -> int:
+    """
+    Стандартный eviction hook: удалить самую старую долю записей
+
+    - deque / list: удаляются элементы с начала
+    - dict последовательностей (symbol → list/deque): обрезается каждая
+    - dict: удаляются первые ключи (порядок вставки)
+
+    Args:
+        container: Кэш компонента
+        fraction: Доля удаляемых записей (0..1)
+
+    Returns:
+        Количество удалённых записей
+    """
+    fraction = max(0.0, min(1.0, fraction))
+    removed = 0
+
+    if isinstance(container, deque):
+        n = int(len(container) * fraction)
+        for _ in range(n):
+            container.popleft()
+        return n
+
+    if isinstance(container, list):
+        n = int(len(container) * fraction)
+        del container[:n]
+        return n
+
+    if isinstance(container, dict) and container:
+        values = list(container.values())
+        if all(isinstance(v, (list, deque)) for v in values):
+            for value in values:
+                removed += evict_oldest(value, fraction)
+            return removed
+
+        n = int(len(container) * fraction)
+        for key in list(itertools.islice(container.keys(), n)):
+            del container[key]
+        return n
+
+    return removed
+
+
+def _module_from_filename(filename: str) -> str:
+    """Имя модуля для группировки tracemalloc (пакет проекта или библиотека)"""
+    base_dir = str(BASE_DIR)
+    if filename.startswith(base_dir):
+        rel = os.path.relpath(filename, base_dir)
+        return rel[:-3].replace(os.sep, ".") if rel.endswith(".py") else rel
+    if "site-packages" in filename:
+        rel = filename.split("site-packages" + os.sep, 1)[-1]
+        return rel.split(os.sep, 1)[0]
+    return os.path.basename(filename) or filename
+
+
+@dataclass
+class MemoryComponent:
+    """Зарегистрированный долгоживущий кэш/буфер"""
+    name: str
+    owner_ref: Callable[[], Any]
+    attr: str
+    evict: Optional[EvictFn] = None
+    items: int = 0
+    size_bytes: int = 0
+    evictions: int = 0
+    evicted_items: int = 0
+
+    def container(self) -> Any:
+        owner = self.owner_ref()
+        if owner is None:
+            return None
+        return getattr(owner, self.attr, None)
+
+
 class AdvancedMemoryManager:
     """
     Продвинутый менеджер памяти с автоматической очисткой
@@ -49,6 +208,17 @@ class AdvancedMemoryManager:
         self.last_cleanup_time = 0
         self.emergency_cleanup_count = 0
 
+        # Per-component учёт: {key: MemoryComponent}, бюджеты по имени компонента
+        self.components: Dict[str, MemoryComponent] = {}
+        self.component_budgets_mb: Dict[str, float] = dict(
+            MEMORY_CONFIG.get("component_budgets_mb", {})
+        )
+        self.component_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+
+        # tracemalloc: последний снимок и diff по модулям
+        self._last_snapshot = None
+        self.last_tracemalloc_diff: List[Dict[str, Any]] = []
+
         logger.info(f"✅ AdvancedMemoryManager инициализирован (лимит: {self.max_memory_mb}MB)")
 
     def _get_memory_usage(self) -> float:
@@ -78,6 +248,12 @@ class AdvancedMemoryManager:
         try:
             before_usage = self._get_memory_usage()
 
+            # Сначала компоненты освобождают память сами (бюджеты),
+            # при давлении на процесс — дополнительно крупнейшие кэши
+            evicted = self.enforce_budgets()
+            if force or self.should_cleanup():
+                evicted += self.evict_components(0.25)
+
             # Принудительная сборка мусора
             collected = gc.collect()
 
@@ -92,11 +268,14 @@ class AdvancedMemoryManager:
                 freed_mb=round(freed_mb, 2),
                 before_mb=round(before_usage, 2),
                 after_mb=round(after_usage, 2),
-                method="gc.collect",
+                method="eviction+gc.collect" if evicted else "gc.collect",
                 timestamp=self.last_cleanup_time
             )
 
-            logger.debug(f"🧹 Очистка памяти: освобождено {freed_mb:.2f}MB, собрано {collected} объектов")
+            logger.debug(
+                f"🧹 Очистка памяти: освобождено {freed_mb:.2f}MB, "
+                f"evicted {len(evicted)} компонентов, собрано {collected} объектов"
+            )
 
             return result
 
@@ -118,7 +297,8 @@ class AdvancedMemoryManager:
 
             before_usage = self._get_memory_usage()
 
-            # Агрессивная очистка
+            # Агрессивная очистка: половина содержимого всех кэшей
+            self.evict_components(0.5)
             gc.collect(2)  # Полная сборка всех поколений
             gc.collect(2)  # Повторная для уверенности
 
@@ -231,6 +411,9 @@ class AdvancedMemoryManager:
                         "recommendation": "Проверьте кэши и большие объекты"
                     })
 
+            # Атрибуция роста по зарегистрированным компонентам
+            leaks.extend(self._detect_component_growth())
+
             # Проверяем количество объектов
             try:
                 total_objects = len(gc.get_objects())
@@ -250,6 +433,346 @@ class AdvancedMemoryManager:
             logger.error(f"❌ Ошибка обнаружения утечек памяти: {e}")
             return []
 
+    # ========================================================================
+    # PER-COMPONENT УЧЁТ ПАМЯТИ
+    # ========================================================================
+
+    def register_component(
+        self,
+        name: str,
+        owner: Any,
+        attr: str,
+        evict: Optional[EvictFn] = None,
+        budget_mb: Optional[float] = None,
+    ) -> str:
+        """
+        Зарегистрировать долгоживущий кэш/буфер для учёта памяти
+
+        Владелец хранится по weakref — регистрация не продлевает ему жизнь.
+        Eviction hook получает сам контейнер, а не bound method владельца.
+
+        Args:
+            name: Имя компонента (например "whale_tracker.whale_trades")
+            owner: Объект-владелец кэша
+            attr: Имя атрибута с кэшем
+            evict: evict(container, fraction) -> удалено записей
+            budget_mb: Бюджет (MB) на все экземпляры компонента
+
+        Returns:
+            Ключ регистрации
+        """
+        key = f"{name}#{id(owner)}"
+
+        def _on_owner_collected(_ref, key=key):
+            self.components.pop(key, None)
+
+        try:
+            owner_ref = weakref.ref(owner, _on_owner_collected)
+        except TypeError:
+            owner_ref = lambda owner=owner: owner  # noqa: E731
+
+        self.components[key] = MemoryComponent(
+            name=name, owner_ref=owner_ref, attr=attr, evict=evict
+        )
+        if budget_mb is not None:
+            self.component_budgets_mb[name] = budget_mb
+
+        logger.debug(f"📏 Memory component зарегистрирован: {name}")
+        return key
+
+    def unregister_component(self, name: str, owner: Any) -> bool:
+        """Снять компонент с учёта"""
+        return self.components.pop(f"{name}#{id(owner)}", None) is not None
+
+    def sample_components(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Замер всех компонентов (агрегировано по имени)
+
+        Returns:
+            {name: {"instances", "items", "bytes"}}
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        now = current_epoch_ms()
+
+        for key, component in list(self.components.items()):
+            container = component.container()
+            if component.owner_ref() is None:
+                self.components.pop(key, None)
+                continue
+
+            try:
+                component.items = count_items(container)
+                component.size_bytes = approx_sizeof(container) if container is not None else 0
+            except Exception as e:
+                logger.debug(f"⚠️ Ошибка замера {component.name}: {e}")
+                continue
+
+            total = totals.setdefault(
+                component.name, {"instances": 0, "items": 0, "bytes": 0}
+            )
+            total["instances"] += 1
+            total["items"] += component.items
+            total["bytes"] += component.size_bytes
+
+        for name, total in totals.items():
+            self.component_history[name].append((now, total["bytes"]))
+
+        return totals
+
+    def _evict_component(self, component: MemoryComponent, fraction: float) -> int:
+        container = component.container()
+        if component.evict is None or container is None or fraction <= 0:
+            return 0
+        try:
+            removed = component.evict(container, fraction) or 0
+        except Exception as e:
+            logger.error(f"❌ Eviction {component.name}: {e}")
+            return 0
+        component.evictions += 1
+        component.evicted_items += removed
+        return removed
+
+    def enforce_budgets(self) -> List[Dict[str, Any]]:
+        """
+        Проверить бюджеты и вызвать eviction hooks превысивших компонентов
+
+        Компонент ужимается до 80% бюджета, чтобы не срабатывать на каждом замере.
+
+        Returns:
+            Список выполненных evictions
+        """
+        totals = self.sample_components()
+        evictions = []
+
+        for name, total in totals.items():
+            budget_mb = self.component_budgets_mb.get(name)
+            if not budget_mb:
+                continue
+            size_mb = total["bytes"] / (1024 * 1024)
+            if size_mb <= budget_mb:
+                continue
+
+            fraction = min(0.9, 1.0 - (budget_mb * 0.8) / size_mb)
+            removed = sum(
+                self._evict_component(c, fraction)
+                for c in list(self.components.values())
+                if c.name == name
+            )
+            evictions.append({
+                "component": name,
+                "size_mb": round(size_mb, 2),
+                "budget_mb": budget_mb,
+                "fraction": round(fraction, 2),
+                "removed_items": removed,
+            })
+            logger.warning(
+                f"📏 {name}: {size_mb:.1f}MB > бюджет {budget_mb}MB, "
+                f"удалено {removed} записей ({fraction:.0%})"
+            )
+
+        return evictions
+
+    def evict_components(self, fraction: float, top: int = 3) -> List[Dict[str, Any]]:
+        """
+        Eviction крупнейших компонентов при давлении на память процесса
+
+        Args:
+            fraction: Доля записей для удаления
+            top: Сколько крупнейших компонентов затронуть
+
+        Returns:
+            Список выполненных evictions
+        """
+        evictable = [c for c in self.components.values() if c.evict is not None]
+        evictable.sort(key=lambda c: c.size_bytes, reverse=True)
+
+        evictions = []
+        for component in evictable[:top]:
+            removed = self._evict_component(component, fraction)
+            if removed:
+                evictions.append({
+                    "component": component.name,
+                    "fraction": fraction,
+                    "removed_items": removed,
+                })
+        return evictions
+
+    def _detect_component_growth(self) -> List[Dict[str, Any]]:
+        """Компоненты с устойчивым ростом размера"""
+        leaks = []
+        for name, history in self.component_history.items():
+            if len(history) < 10:
+                continue
+            values = [size for _, size in list(history)[-10:]]
+            increases = sum(1 for i in range(1, len(values)) if values[i] > values[i - 1])
+            growth_mb = (values[-1] - values[0]) / (1024 * 1024)
+            if increases >= 8 and growth_mb > 1.0:
+                leaks.append({
+                    "type": "component_growth",
+                    "severity": "high" if growth_mb > 10 else "medium",
+                    "component": name,
+                    "total_growth_mb": round(growth_mb, 2),
+                    "size_mb": round(values[-1] / (1024 * 1024), 2),
+                    "recommendation": f"Проверьте ограничение размера {name}",
+                })
+        return leaks
+
+    # ========================================================================
+    # TRACEMALLOC
+    # ========================================================================
+
+    def start_tracemalloc(self, frames: Optional[int] = None):
+        """Включить tracemalloc (заметный overhead — только для диагностики)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or MEMORY_CONFIG.get("tracemalloc_frames", 1))
+            logger.info("🔬 tracemalloc включён")
+        self._last_snapshot = tracemalloc.take_snapshot()
+
+    def stop_tracemalloc(self):
+        """Выключить tracemalloc"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._last_snapshot = None
+
+    def tracemalloc_diff(self, top: int = 10) -> List[Dict[str, Any]]:
+        """
+        Diff с предыдущим снимком tracemalloc, сгруппированный по модулям
+
+        Args:
+            top: Количество модулей в результате
+
+        Returns:
+            [{"module", "size_kb", "size_diff_kb", "count_diff"}] по убыванию роста
+        """
+        if not tracemalloc.is_tracing():
+            return []
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        previous = self._last_snapshot
+        self._last_snapshot = snapshot
+        if previous is None:
+            return []
+
+        by_module: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"size": 0, "size_diff": 0, "count_diff": 0}
+        )
+        for stat in snapshot.compare_to(previous, "filename"):
+            module = _module_from_filename(stat.traceback[0].filename)
+            entry = by_module[module]
+            entry["size"] += stat.size
+            entry["size_diff"] += stat.size_diff
+            entry["count_diff"] += stat.count_diff
+
+        diff = sorted(
+            (
+                {
+                    "module": module,
+                    "size_kb": round(v["size"] / 1024, 1),
+                    "size_diff_kb": round(v["size_diff"] / 1024, 1),
+                    "count_diff": int(v["count_diff"]),
+                }
+                for module, v in by_module.items()
+            ),
+            key=lambda x: x["size_diff_kb"],
+            reverse=True,
+        )[:top]
+
+        self.last_tracemalloc_diff = diff
+        return diff
+
+    # ========================================================================
+    # ОТЧЁТЫ И МОНИТОРИНГ
+    # ========================================================================
+
+    def get_component_report(self) -> Dict[str, Any]:
+        """Отчёт по компонентам: размер, бюджет, рост, evictions"""
+        totals = self.sample_components()
+        rss_mb = self._get_memory_usage()
+
+        evictions: Dict[str, int] = defaultdict(int)
+        for component in self.components.values():
+            evictions[component.name] += component.evictions
+
+        components = []
+        for name, total in totals.items():
+            history = self.component_history.get(name)
+            growth_mb = 0.0
+            if history and len(history) > 1:
+                growth_mb = (history[-1][1] - history[0][1]) / (1024 * 1024)
+            components.append({
+                "name": name,
+                "instances": total["instances"],
+                "items": total["items"],
+                "size_mb": round(total["bytes"] / (1024 * 1024), 2),
+                "budget_mb": self.component_budgets_mb.get(name),
+                "growth_mb": round(growth_mb, 2),
+                "evictions": evictions[name],
+            })
+        components.sort(key=lambda c: c["size_mb"], reverse=True)
+
+        tracked_mb = sum(c["size_mb"] for c in components)
+        return {
+            "rss_mb": round(rss_mb, 2),
+            "tracked_mb": round(tracked_mb, 2),
+            "untracked_mb": round(max(0.0, rss_mb - tracked_mb), 2),
+            "components": components,
+            "tracemalloc_top": self.last_tracemalloc_diff,
+        }
+
+    def format_component_report(self, top: int = 8) -> str:
+        """Текст отчёта для Telegram (/status)"""
+        report = self.get_component_report()
+        lines = [
+            f"🧠 *ПАМЯТЬ ПО КОМПОНЕНТАМ:* "
+            f"{report['tracked_mb']:.1f} / {report['rss_mb']:.1f} MB RSS"
+        ]
+        for c in report["components"][:top]:
+            budget = f"/{c['budget_mb']}" if c["budget_mb"] else ""
+            growth = f" ↑{c['growth_mb']:.1f}" if c["growth_mb"] > 0.1 else ""
+            lines.append(
+                f"├─ {c['name']}: {c['size_mb']:.1f}{budget} MB "
+                f"({c['items']} зап.){growth}"
+            )
+        for t in report["tracemalloc_top"][:3]:
+            lines.append(f"├─ 🔬 {t['module']}: {t['size_diff_kb']:+.0f} KB")
+        return "\n".join(lines)
+
+    async def run_monitor(self, interval: Optional[int] = None):
+        """
+        Периодический замер компонентов, бюджеты, tracemalloc и поиск утечек
+
+        Args:
+            interval: Интервал в секундах (по умолчанию MEMORY_CONFIG)
+        """
+        interval = interval or MEMORY_CONFIG.get("sample_interval", 300)
+        if MEMORY_CONFIG.get("tracemalloc"):
+            self.start_tracemalloc()
+
+        logger.info(f"📏 Memory accounting запущен (интервал {interval}s)")
+        while True:
+            try:
+                await asyncio.sleep(interval)
+
+                self.enforce_budgets()
+                if tracemalloc.is_tracing():
+                    top = self.tracemalloc_diff()
+                    if top:
+                        logger.info(
+                            "🔬 tracemalloc рост: "
+                            + ", ".join(f"{t['module']} {t['size_diff_kb']:+.0f}KB" for t in top[:5])
+                        )
+
+                for leak in self.detect_memory_leaks():
+                    logger.warning(f"⚠️ Memory leak suspect: {leak}")
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Memory monitor error: {e}")
+
     def get_memory_stats(self) -> Dict[str, Any]:
         """Получение детальной статистики памяти"""
         try:
@@ -271,8 +794,23 @@ class AdvancedMemoryManager:
             return {}
 
 
+_global_memory_manager: Optional[AdvancedMemoryManager] = None
+
+
+def get_memory_manager() -> AdvancedMemoryManager:
+    """Получить глобальный AdvancedMemoryManager"""
+    global _global_memory_manager
+    if _global_memory_manager is None:
+        _global_memory_manager = AdvancedMemoryManager()
+    return _global_memory_manager
+
+
 # Экспорт классов
 __all__ = [
     'AdvancedMemoryManager',
     'CleanupResult',
+    'MemoryComponent',
+    'approx_sizeof',
+    'evict_oldest',
+    'get_memory_manager',
 ]
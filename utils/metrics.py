@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics Registry - лёгкий in-process реестр метрик в формате Prometheus
+Counters, Gauges и Histograms с фиксированными bucket'ами + collectors
+для экспорта существующих get_stats() через /metrics
+"""
+
+import time
+import asyncio
+import functools
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import logger
+
+
+# Bucket'ы латентности по умолчанию (секунды): 0.5ms ... 10s
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Сэмпл collector'а: (имя метрики, labels, значение)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Форматирование labels в синтаксис Prometheus"""
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    """Экранирование значения label"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    """Форматирование числа для exposition format"""
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Базовый класс метрики с поддержкой labels"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values, **kwargs):
+        """
+        Получить дочернюю метрику для набора labels
+
+        Дочерний объект кэшируется — на горячих путях его стоит
+        сохранить один раз и дальше вызывать inc()/observe() напрямую.
+        """
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name}: ожидались labels {self.labelnames}, получено {values}"
+                )
+            child = self._new_child()
+            self._children[values] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default_child(self):
+        """Дочерняя метрика без labels"""
+        return self.labels()
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default_child().inc(amount)
+
+    def get(self, *values) -> float:
+        child = self._children.get(tuple(str(v) for v in values))
+        return child.value if child else 0.0
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Значение, которое может расти и падать"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default_child().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default_child().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default_child().dec(amount)
+
+    def get(self, *values) -> float:
+        child = self._children.get(tuple(str(v) for v in values))
+        return child.value if child else 0.0
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Последний слот — +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # bisect_left: значение, равное границе, попадает в этот bucket (le)
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по bucket'ам (верхняя граница bucket'а)"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными bucket'ами"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != float("inf")))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default_child().observe(value)
+
+    def time(self):
+        return self._default_child().time()
+
+    def collect(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labelnames + ("le",), values + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            base_labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{base_labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{base_labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса
+
+    Features:
+    - get-or-create для counter/gauge/histogram по имени
+    - Collectors: функции, вызываемые при scrape (для существующих get_stats())
+    - Рендер в Prometheus text exposition format
+    """
+
+    def __init__(self, prefix: str = "gio"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[Sample]]] = {}
+
+    def _full_name(self, name: str) -> str:
+        if self.prefix and not name.startswith(f"{self.prefix}_"):
+            return f"{self.prefix}_{name}"
+        return name
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames, **kwargs):
+        full_name = self._full_name(name)
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = cls(full_name, documentation, labelnames, **kwargs)
+            self._metrics[full_name] = metric
+        elif not isinstance(metric, cls):
+            raise ValueError(
+                f"Метрика {full_name} уже зарегистрирована как {metric.type_name}"
+            )
+        return metric
+
+    def counter(self, name: str, documentation: str = "", labelnames: Iterable[str] = ()) -> Counter:
+        """Получить или создать Counter"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str = "", labelnames: Iterable[str] = ()) -> Gauge:
+        """Получить или создать Gauge"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Получить или создать Histogram"""
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Получить метрику по имени (с префиксом или без)"""
+        return self._metrics.get(self._full_name(name))
+
+    def register_collector(self, key: str, collector: Callable[[], Iterable[Sample]]):
+        """
+        Зарегистрировать collector
+
+        Args:
+            key: Уникальный ключ (повторная регистрация заменяет старый)
+            collector: Функция, возвращающая сэмплы (name, labels, value)
+        """
+        self._collectors[key] = collector
+
+    def unregister_collector(self, key: str):
+        """Удалить collector"""
+        self._collectors.pop(key, None)
+
+    def render(self) -> str:
+        """Рендер всех метрик в Prometheus text format"""
+        lines: List[str] = []
+
+        for metric in self._metrics.values():
+            if not metric._children:
+                continue
+            if metric.documentation:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+
+        # Collectors экспортируются как gauges
+        collected: Dict[str, List[str]] = {}
+        for key, collector in list(self._collectors.items()):
+            try:
+                for name, labels, value in collector():
+                    if value is None:
+                        continue
+                    full_name = self._full_name(name)
+                    label_names = tuple(labels.keys())
+                    label_values = tuple(labels.values())
+                    collected.setdefault(full_name, []).append(
+                        f"{full_name}{_format_labels(label_names, label_values)} "
+                        f"{_format_value(float(value))}"
+                    )
+            except Exception as e:
+                logger.debug(f"⚠️ Metrics collector {key} error: {e}")
+
+        for full_name, samples in collected.items():
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+    def get_summary(self) -> Dict:
+        """Краткая сводка (для /status и логов)"""
+        summary = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Histogram):
+                for values, child in metric._children.items():
+                    key = name + _format_labels(metric.labelnames, values)
+                    summary[key] = {
+                        "count": child.count,
+                        "avg_ms": (child.sum / child.count * 1000) if child.count else 0.0,
+                        "p95_ms": child.quantile(0.95) * 1000,
+                    }
+            else:
+                for values, child in metric._children.items():
+                    key = name + _format_labels(metric.labelnames, values)
+                    summary[key] = child.value
+        return summary
+
+    def reset(self):
+        """Сбросить все метрики и collectors (для тестов)"""
+        self._metrics.clear()
+        self._collectors.clear()
+
+
+# ============================================================================
+# ИНСТРУМЕНТАЦИЯ
+# ============================================================================
+
+
+@contextmanager
+def track_time(name: str, documentation: str = "", **labels):
+    """
+    Context manager для замера латентности блока в Histogram
+
+    Пример:
+        with track_time("db_write_seconds", table="signals"):
+            cursor.execute(...)
+    """
+    child = get_metrics_registry().histogram(name, documentation, tuple(labels)).labels(**labels)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.observe(time.perf_counter() - start)
+
+
+def track_latency(name: str, documentation: str = "", **labels):
+    """
+    Декоратор для замера латентности sync/async функций в Histogram
+
+    Дочерняя метрика создаётся один раз при декорировании,
+    поэтому накладные расходы на вызов — perf_counter() + observe().
+    """
+    child = get_metrics_registry().histogram(name, documentation, tuple(labels)).labels(**labels)
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def count_calls(name: str, documentation: str = "", **labels):
+    """Декоратор-счётчик вызовов (sync/async)"""
+    child = get_metrics_registry().counter(name, documentation, tuple(labels)).labels(**labels)
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                child.inc()
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            child.inc()
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def aiohttp_trace_config(exchange: str):
+    """
+    TraceConfig для aiohttp.ClientSession: латентность REST запросов по endpoint
+
+    Все запросы сессии попадают в rest_request_seconds{exchange, endpoint}
+    без правки каждого вызова session.get().
+    """
+    import aiohttp
+
+    registry = get_metrics_registry()
+    latency = registry.histogram(
+        "rest_request_seconds",
+        "Латентность REST запросов к биржам",
+        ("exchange", "endpoint"),
+    )
+    errors = registry.counter(
+        "rest_request_errors_total",
+        "Ошибки REST запросов к биржам",
+        ("exchange", "endpoint"),
+    )
+    statuses = registry.counter(
+        "rest_responses_total",
+        "Ответы REST по HTTP статусу",
+        ("exchange", "status"),
+    )
+
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        latency.labels(exchange, params.url.path).observe(time.perf_counter() - ctx.start)
+        statuses.labels(exchange, params.response.status).inc()
+
+    async def on_request_exception(session, ctx, params):
+        errors.labels(exchange, params.url.path).inc()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+def stats_collector(prefix: str, get_stats: Callable[[], Dict], **labels) -> Callable[[], List[Sample]]:
+    """
+    Обернуть существующий get_stats() в collector
+
+    Числовые поля dict экспортируются как {prefix}_{field}; вложенные
+    и нечисловые значения пропускаются.
+    """
+
+    def collect() -> List[Sample]:
+        samples = []
+        for key, value in (get_stats() or {}).items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                samples.append((f"{prefix}_{key}", labels, value))
+        return samples
+
+    return collect
+
+
+def register_default_collectors(registry: Optional["MetricsRegistry"] = None):
+    """Подключить глобальные singleton'ы (cache, rate limiter, log batcher)"""
+    registry = registry or get_metrics_registry()
+
+    try:
+        from utils.cache_manager import get_cache_manager
+
+        registry.register_collector(
+            "cache_manager", stats_collector("cache", get_cache_manager().get_stats)
+        )
+    except Exception as e:
+        logger.debug(f"⚠️ CacheManager collector недоступен: {e}")
+
+    try:
+        from utils.rate_limiter import get_rate_limiter
+
+        limiter = get_rate_limiter()
+
+        def collect_rate_limiter() -> List[Sample]:
+            samples = []
+            for endpoint in list(limiter.request_windows.keys()):
+                stats = limiter.get_stats(endpoint)
+                labels = {"endpoint": endpoint}
+                samples.append(("rate_limiter_requests_last_second", labels, stats["requests_last_second"]))
+                samples.append(("rate_limiter_utilization_percent", labels, stats["utilization"]))
+            return samples
+
+        registry.register_collector("rate_limiter", collect_rate_limiter)
+    except Exception as e:
+        logger.debug(f"⚠️ RateLimiter collector недоступен: {e}")
+
+    try:
+        from config.logging_config import get_queue_stats
+        from utils.log_batcher import log_batcher
+
+        def collect_log_batcher() -> List[Sample]:
+            return [
+                ("log_batcher_pending_orderbook_updates", {}, sum(log_batcher.orderbook_updates.values())),
+                ("log_batcher_pending_volume_calculations", {}, sum(log_batcher.volume_calculations.values())),
+                ("log_batcher_pending_scenario_matches", {}, len(log_batcher.scenario_matches)),
+                ("log_batcher_suppressed", {}, sum(log_batcher.suppressed.values())),
+                ("log_queue_pending_records", {}, get_queue_stats()["queued"]),
+            ]
+
+        registry.register_collector("log_batcher", collect_log_batcher)
+    except Exception as e:
+        logger.debug(f"⚠️ LogBatcher collector недоступен: {e}")
+
+
+def benchmark_overhead(iterations: int = 200_000) -> Dict[str, float]:
+    """
+    Микробенчмарк накладных расходов на событие (наносекунды)
+
+    Returns:
+        Dict: ns/op для counter.inc, histogram.observe и track_time
+    """
+    registry = MetricsRegistry(prefix="bench")
+    counter = registry.counter("events_total", labelnames=("kind",)).labels("ws")
+    histogram = registry.histogram("latency_seconds", labelnames=("kind",)).labels("ws")
+
+    def measure(fn) -> float:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter_ns() - start) / iterations
+
+    baseline = measure(lambda: None)
+
+    def timed_block():
+        start = time.perf_counter()
+        histogram.observe(time.perf_counter() - start)
+
+    return {
+        "counter_inc_ns": max(measure(counter.inc) - baseline, 0.0),
+        "histogram_observe_ns": max(measure(lambda: histogram.observe(0.003)) - baseline, 0.0),
+        "timed_block_ns": max(measure(timed_block) - baseline, 0.0),
+    }
+
+
+# Глобальный экземпляр Metrics Registry
+_global_metrics_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Получить глобальный Metrics Registry (Singleton)"""
+    global _global_metrics_registry
+    if _global_metrics_registry is None:
+        _global_metrics_registry = MetricsRegistry(prefix="gio")
+    return _global_metrics_registry
+
+
+# Экспорт
+__all__ = [
+    "MetricsRegistry",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "DEFAULT_LATENCY_BUCKETS",
+    "get_metrics_registry",
+    "track_time",
+    "track_latency",
+    "count_calls",
+    "aiohttp_trace_config",
+    "stats_collector",
+    "register_default_collectors",
+    "benchmark_overhead",
+]
@@ -76,6 +76,45 @@ async def run_in_executor(func: Callable, *args, use_process: bool = False, **kw
 
     return await loop.run_in_executor(executor, partial_func)
 
+async def run_blocking(func: Callable, *args, use_process: bool = False, **kwargs) -> Any:
+    """
+    Вынести блокирующий вызов (sqlite3, requests, ML inference, json.dump)
+    из event loop в executor, с метрикой времени выполнения
+
+    Args:
+        func: Блокирующая функция
+        *args: Позиционные аргументы
+        use_process: True для CPU-bound (ProcessPoolExecutor)
+        **kwargs: Именованные аргументы
+    """
+    name = getattr(func, "__qualname__", None) or type(func).__name__
+    start = time.perf_counter()
+    try:
+        return await run_in_executor(func, *args, use_process=use_process, **kwargs)
+    finally:
+        _offload_latency().labels(name).observe(time.perf_counter() - start)
+
+def run_blocking_nowait(func: Callable, *args, **kwargs):
+    """
+    Fire-and-forget вариант run_blocking для sync кода (callbacks WebSocket):
+    из потока event loop — в ThreadPoolExecutor, иначе синхронно
+
+    Returns:
+        Future при выносе в executor, иначе результат func
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return func(*args, **kwargs)
+    return get_thread_executor().submit(func, *args, **kwargs)
+
+def _offload_latency():
+    from utils.metrics import get_metrics_registry
+
+    return get_metrics_registry().histogram(
+        "blocking_offload_seconds", "Блокирующие вызовы, вынесенные в executor", ("func",)
+    )
+
 class BatchProcessor:
     """Процессор для пакетной обработки данных"""
 
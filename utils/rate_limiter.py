@@ -56,22 +56,22 @@ class RateLimiter:
             self.locks[endpoint] = asyncio.Lock()
 
         async with self.locks[endpoint]:
-            current_time = time.time()
             window = self.request_windows[endpoint]
 
-            # Удаляем старые запросы (старше 1 секунды)
-            while window and window[0] < current_time - 1.0:
-                window.popleft()
+            while True:
+                current_time = time.time()
 
-            # Проверяем лимиты
-            if len(window) >= self.requests_per_second:
-                # Превышен лимит - ждём
+                # Удаляем старые запросы (старше 1 секунды)
+                while window and window[0] < current_time - 1.0:
+                    window.popleft()
+
+                if len(window) < self.requests_per_second:
+                    break
+
+                # Превышен лимит - ждём (без повторного захвата lock)
                 sleep_time = window[0] + 1.0 - current_time
-                if sleep_time > 0:
-                    logger.debug(f"⚠️ Rate limit для {endpoint}: ждём {sleep_time:.2f}s")
-                    await asyncio.sleep(sleep_time)
-                    # Рекурсивный вызов после ожидания
-                    return await self.acquire(endpoint)
+                logger.debug(f"⚠️ Rate limit для {endpoint}: ждём {sleep_time:.2f}s")
+                await asyncio.sleep(max(sleep_time, 0.001))
 
             # Burst protection
             if len(window) >= self.burst_size:
@@ -5,11 +5,13 @@ Robust WebSocket connection with automatic reconnection and health monitoring
 """
 
 import asyncio
-import json
+import time
 import websockets
 from typing import Callable, Optional, Dict, Any
 from datetime import datetime
 from config.settings import logger
+from utils import fast_json
+from utils.metrics import get_metrics_registry, stats_collector
 
 
 class WebSocketManager:
@@ -51,6 +53,22 @@ class WebSocketManager:
         self.connection_start_time: Optional[datetime] = None
         self.total_messages = 0
 
+        # Метрики (дочерние объекты кэшируются — горячий путь)
+        registry = get_metrics_registry()
+        self._message_latency = registry.histogram(
+            "ws_message_seconds",
+            "Время обработки WebSocket сообщения",
+            ("stream",),
+        ).labels(name)
+        self._message_errors = registry.counter(
+            "ws_message_errors_total",
+            "Ошибки обработки WebSocket сообщений",
+            ("stream",),
+        ).labels(name)
+        registry.register_collector(
+            f"ws:{name}", stats_collector("ws", self.get_stats, stream=name)
+        )
+
     async def start(self):
         """Запуск WebSocket с автореконнектом"""
         self.running = True
@@ -95,13 +113,18 @@ class WebSocketManager:
                     self.last_message_time = datetime.now()
                     self.total_messages += 1
 
+                    start = time.perf_counter()
                     try:
-                        data = json.loads(message)
+                        data = fast_json.loads(message)
                         await self.on_message(data)
-                    except json.JSONDecodeError as e:
+                    except fast_json.JSONDecodeError as e:
+                        self._message_errors.inc()
                         logger.error(f"❌ {self.name}: JSON decode error: {e}")
                     except Exception as e:
+                        self._message_errors.inc()
                         logger.error(f"❌ {self.name}: Message processing error: {e}")
+                    finally:
+                        self._message_latency.observe(time.perf_counter() - start)
 
         except Exception as e:
             logger.error(f"❌ {self.name}: Connection error: {e}")
@@ -143,7 +166,7 @@ class WebSocketManager:
         """Отправка сообщения"""
         if self.ws and not self.ws.closed:
             try:
-                await self.ws.send(json.dumps(message))
+                await self.ws.send(fast_json.dumps(message))
             except Exception as e:
                 logger.error(f"❌ {self.name}: Send error: {e}")
         else: